@@ -60,7 +60,7 @@ async def _generate_execution_stream(session_id: str):
     try:
         # #21 fix: 先取数据退出 with 再 yield，连接不占 SSE 流 — 小欧 2026-07-18
         _rows_with_steps = []
-        with db.get_conn("chat") as conn:
+        with db.get_read_conn("chat") as conn:
             cursor = conn.cursor()
             cursor.execute(
                 '''SELECT id, session_id, role, content, timestamp
@@ -123,7 +123,7 @@ async def get_execution_stream(session_id: str):
     - complete: 流结束
     """
     # 验证会话是否存在
-    with db.get_conn("chat") as conn:
+    with db.get_read_conn("chat") as conn:
         cursor = conn.cursor()
         cursor.execute(
             'SELECT id FROM chat_sessions WHERE id = ? AND is_deleted = FALSE',
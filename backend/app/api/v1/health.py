@@ -49,7 +49,7 @@ async def health_check(request: Request):
     db_status = "healthy"
     for db_name in ["chat", "operations", "task_tracker"]:
         try:
-            with db.get_conn(db_name) as conn:
+            with db.get_read_conn(db_name) as conn:
                 conn.execute("SELECT 1")
         except Exception:
             logger.warning(f"[health] DB {db_name} 连接失败")
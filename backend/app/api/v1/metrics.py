@@ -5,6 +5,14 @@
 编辑历史:
 # 2026-08-08 - 小欧 - 全程统一本地时区: 4处响应 timestamp 改 get_local_iso_timestamp() (本地ISO无Z)
 # 2026-08-14 - 小欧 - monitoring 独立为 app 顶层能力层目录(services/monitoring→app/monitoring), 本文件 import 路径同步
+# 2026-10-17 - 小欧 - 新增 GET /metrics/stream_buffers: 在册流态缓冲逐任务观测(热区/落盘/内存高水位)
+# 2026-10-17 - 小欧 - 新增 GET /metrics/tool_process_pool: 工具进程池观测(饱和度/排队/击杀)
+# 2026-10-17 - 小欧 - 新增 GET /metrics/dataframe_cache: 数据分析 DataFrame 缓存观测(命中/未命中/淘汰/Parquet 旁路文件)
+# 2026-10-17 - 小欧 - 新增 GET /metrics/fetchpage_cache: fetchpage 页面缓存观测(命中率/304 条件命中/省下字节)
+# 2026-10-17 - 小欧 - 新增 GET /metrics/browser_pool: fetchpage 常驻浏览器池观测(排队/渲染耗时/回收次数)
+# 2026-10-17 - 小欧 - 新增 GET /metrics/db_engines: 数据库引擎注册表(各引擎借出/池内连接)与表结构缓存命中观测
+# 2026-10-17 - 小欧 - 新增 GET /metrics/recycle_bin: 回收站容量账本与后台清理调度观测(上次耗时/回收字节/账面值)
+# 2026-10-17 - 小欧 - 新增 GET /metrics/shell_pool: 持久 shell 会话池健康观测(实例/占用/复用/排队/按原因淘汰)
 """
 
 from fastapi import APIRouter, HTTPException
@@ -13,6 +21,15 @@ from typing import Dict, List, Optional, Any
 from app.utils.time_utils import get_local_iso_timestamp  # 小欧 2026-08-08 全程统一本地时区
 
 from app.monitoring import get_metrics_summary, get_raw_metrics, reset_metrics
+from app.services.task.task_state import get_stream_buffer_stats
+from app.tools.tool_process_pool import tool_process_pool
+from app.tools.dataanalysis.df_cache import cache_stats as get_dataframe_cache_stats
+from app.tools.network.page_cache import cache_stats as get_page_cache_stats
+from app.tools.network.browser_pool import browser_pool
+from app.tools.toolhelper.db_engines import engine_stats as get_db_engine_stats
+from app.tools.dataanalysis.schema_cache import cache_stats as get_schema_cache_stats
+from app.safety import cleanup_stats as get_recycle_cleanup_stats
+from app.tools.fundamental.shell_engine import shell_pool
 from app.logger import logger
 from app.utils.response_utils import handle_api_errors
 
@@ -93,6 +110,120 @@ async def get_raw_metrics_endpoint(name: Optional[str] = None):
         "timestamp": get_local_iso_timestamp()
     }
 
+@router.get("/metrics/stream_buffers")
+@handle_api_errors("获取流态缓冲指标")
+async def get_stream_buffer_metrics():
+    """
+    获取在册流态缓冲指标(逐任务)
+    
+    返回每个任务事件回放缓冲的事件总数、热区/落盘事件数、压缩合并数、落盘字节、当前内存估算与内存高水位
+    """
+    return {
+        "success": True,
+        "buffers": get_stream_buffer_stats(),
+        "timestamp": get_local_iso_timestamp()
+    }
+
+@router.get("/metrics/tool_process_pool")
+@handle_api_errors("获取工具进程池指标")
+async def get_tool_process_pool_metrics():
+    """
+    获取工具进程池指标
+    
+    返回开关状态、容量、空闲/占用/排队工作进程数、饱和度、累计执行数、进程启动/退役数、按原因(timeout/cancel/crash)的击杀数与生效路由
+    """
+    return {
+        "success": True,
+        "pool": tool_process_pool.stats(),
+        "timestamp": get_local_iso_timestamp()
+    }
+
+@router.get("/metrics/dataframe_cache")
+@handle_api_errors("获取DataFrame缓存指标")
+async def get_dataframe_cache_metrics():
+    """
+    获取数据分析 DataFrame 缓存指标
+    
+    返回本进程缓存条目数、内存字节/上限、命中/未命中/淘汰次数、Parquet 旁路文件开关与命中/写入次数
+    (开启隔离执行时数据分析工具在工作进程内执行, 各工作进程缓存独立, 不计入本接口)
+    """
+    return {
+        "success": True,
+        "cache": get_dataframe_cache_stats(),
+        "timestamp": get_local_iso_timestamp()
+    }
+
+@router.get("/metrics/fetchpage_cache")
+@handle_api_errors("获取页面缓存指标")
+async def get_fetchpage_cache_metrics():
+    """
+    获取 fetchpage 本地页面缓存指标
+    
+    返回查找次数、新鲜期命中/304 条件命中/未命中/写入次数、命中率、命中省下的下载字节与磁盘条目数/字节
+    """
+    return {
+        "success": True,
+        "cache": get_page_cache_stats(),
+        "timestamp": get_local_iso_timestamp()
+    }
+
+@router.get("/metrics/browser_pool")
+@handle_api_errors("获取浏览器池指标")
+async def get_browser_pool_metrics():
+    """
+    获取 fetchpage JS 渲染常驻浏览器池指标
+    
+    返回槽位容量/存活/占用/排队数、渲染次数与平均渲染/排队耗时、浏览器启动次数、按原因的槽位回收次数
+    """
+    return {
+        "success": True,
+        "pool": browser_pool.stats(),
+        "timestamp": get_local_iso_timestamp()
+    }
+
+@router.get("/metrics/db_engines")
+@handle_api_errors("获取数据库引擎指标")
+async def get_db_engine_metrics():
+    """
+    获取数据库工具引擎注册表与表结构缓存指标
+    
+    返回引擎新建/复用/淘汰/建连失败次数、各引擎(隐藏密码 URL)借出与池内连接数, 以及 get_db_schema 表结构缓存命中/失效
+    """
+    return {
+        "success": True,
+        "engines": get_db_engine_stats(),
+        "schema_cache": get_schema_cache_stats(),
+        "timestamp": get_local_iso_timestamp()
+    }
+
+@router.get("/metrics/recycle_bin")
+@handle_api_errors("获取回收站清理指标")
+async def get_recycle_bin_metrics():
+    """
+    获取回收站容量账本与后台清理调度指标
+    
+    返回清理运行次数、上次耗时/删除备份数/回收字节、累计回收、账本账面值与上限、上次盘点时间与漂移
+    """
+    return {
+        "success": True,
+        "recycle_bin": get_recycle_cleanup_stats(),
+        "timestamp": get_local_iso_timestamp()
+    }
+
+@router.get("/metrics/shell_pool")
+@handle_api_errors("获取shell会话池指标")
+async def get_shell_pool_metrics():
+    """
+    获取持久 shell 会话池(ps7/ps5/bash)健康指标
+    
+    按 shell 类型返回池数/实例/占用/空闲/存活数、acquire 次数与平均排队耗时、新建/复用/槽位耗尽次数、按原因的会话淘汰次数
+    """
+    return {
+        "success": True,
+        "pool": shell_pool.stats(),
+        "timestamp": get_local_iso_timestamp()
+    }
+
 @router.post("/metrics/reset", response_model=ResetMetricsResponse)
 @handle_api_errors("重置监控指标")
 async def reset_metrics_endpoint(request: ResetMetricsRequest):
@@ -144,6 +144,10 @@ class Config:
         """
         return self.get('app.max_steps', default)
 
+    def get_history_load_max_messages(self, default: int = 0) -> int:
+        """获取history_load_max_messages配置 — 多轮上下文只加载最近 N 条消息, 0=全量(默认) — 小欧 2026-10-17"""
+        return self.get('app.history_load_max_messages', default)
+
     def get_max_context_tokens(self, default: int = 200000) -> int:
         """获取max_context_tokens配置 — 对话历史 Token 上限"""
         return self.get('app.max_context_tokens', default)
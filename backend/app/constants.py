@@ -34,6 +34,17 @@
         日志result截断长度,防MemoryError); action_handler导入改为
         from app.constants 引用
    2026-08-14 小欧 改名名实相符: model_schemas.py → config_schemas.py(注释同步)
+   2026-10-17 小欧 新增第9节 STEP_WRITER_MAX_BATCH/STEP_WRITER_FLUSH_INTERVAL(step_writer 批量落库预算)
+   2026-10-17 小欧 新增第10节 DB_POOL_READERS/DB_EXECUTOR_WORKERS/DB_WRITER_WAIT_TIMEOUT(db 连接池+异步门面)
+   2026-10-17 小欧 新增第11节 HISTORY_LOAD_MAX_MESSAGES(会话历史单次加载尾部窗口)
+   2026-10-17 小欧 新增第12节 STREAM_BUFFER_HOT_EVENTS(流态缓冲热区上限)
+   2026-10-17 小欧 新增第13节 BACKUP_STORE_*(safety 备份内容寻址去重存储)
+   2026-10-17 小欧 新增第14节 RECYCLE_*(回收站容量账本 + 后台清理调度)
+   2026-10-17 小欧 新增第15节 HASH_*/DIGEST_CACHE_*(并行批量哈希 + 持久化摘要缓存); 第13节 BACKUP_STORE_STAT_MEMO_MAX/BACKUP_STORE_RACY_SECONDS 由摘要缓存取代删除
+   2026-10-17 小欧 新增第16节 DB_DATA_MIGRATION_*(db_migrations 后台数据迁移批大小/批间让出)
+   2026-10-17 小欧 第10节新增 DB_LOOP_WAIT_TIMEOUT(事件循环线程上同步借连接的短等待)
+   2026-10-17 小欧 第11节 HISTORY_LOAD_MAX_MESSAGES 200→0(默认全量, 不再静默截断多轮上下文; 尾部窗口改由 config 显式开启)
+   2026-10-17 小欧 新增第17节 PROMPT_LOG_PART_STALE_SECONDS(启动时收尾遗留 .jsonl.part 的闲置阈值)
 # 注: 本文件数值型长度/上限/超时/阈值常量均标注【使用对象】, 搜全仓无引用的即为候选废弃常量(待清理)
 """
 
@@ -143,4 +154,71 @@ UTC_OFFSET_PATTERN = re.compile(r'([+-]\d{2}):?(\d{2})')  # 【系统级】使
 
 SUPPORTED_ALGORITHMS: set[str] = {"md5", "sha1", "sha256", "sha512"}  # 【系统级】使用对象: hash工具+safety/hash_helper 哈希算法白名单 — 从 tools/tool_constants.py 迁入 小沈 2026-08-13
 
+# ============================================================
+# 9. 步骤批量落库(step_writer) — 小欧 2026-10-17
+# ============================================================
+
+STEP_WRITER_MAX_BATCH = 64  # 【系统级】使用对象: step_writer 单事务最大待写行数(达到即立即刷写)
+STEP_WRITER_FLUSH_INTERVAL = 0.5  # 【系统级】使用对象: step_writer 攒批最长等待(秒), 超时即刷写
+
+# ============================================================
+# 10. SQLite 连接池与异步门面(app/db/database.py) — 小欧 2026-10-17
+# ============================================================
+
+DB_POOL_READERS = 4  # 【系统级】使用对象: database._ConnectionPool 每库读连接上限(写连接固定1条)
+DB_EXECUTOR_WORKERS = 4  # 【系统级】使用对象: db.run 异步门面有界线程池大小
+DB_WRITER_WAIT_TIMEOUT = 30.0  # 【系统级】使用对象: database._ConnectionPool 借写/读连接最长等待(秒), 超时按 locked 报错
+DB_LOOP_WAIT_TIMEOUT = 3.5  # 【系统级】使用对象: database._ConnectionPool 事件循环线程上同步借连接最长等待(秒, 同旧 0.5/1/2s 退避总和), 超时按 locked 报错
+
+# ============================================================
+# 11. 会话历史加载(stream_reader._load_previous_messages) — 小欧 2026-10-17
+# ============================================================
+
+HISTORY_LOAD_MAX_MESSAGES = 0  # 【系统级】使用对象: stream_reader._load_previous_messages 多轮上下文只取最近 N 条消息(0=全量, 默认); config app.history_load_max_messages 覆盖
+
+# ============================================================
+# 12. 流态回放缓冲(task_state.StreamBuffer) — 小欧 2026-10-17
+# ============================================================
+
+STREAM_BUFFER_HOT_EVENTS = 2000  # 【系统级】使用对象: task_state.StreamBuffer 内存热区事件上限, 超限压缩驱逐最旧一半落盘(0=不设上限)
+
+# ============================================================
+# 13. 安全备份内容寻址存储(app/safety/backup_store.py) — 小欧 2026-10-17
+# ============================================================
+
+BACKUP_STORE_DIRNAME = ".blobs"  # 【系统级】使用对象: backup_store 回收站下 blob 仓目录名(按摘要存一份, 各次备份硬链接引用)
+BACKUP_STORE_ALGORITHM = "sha256"  # 【系统级】使用对象: backup_store 内容摘要算法(与 collect_file_info 的 file_hash 同算法, 单文件备份可直接复用)
+BACKUP_STORE_CHUNK_SIZE = 1024 * 1024  # 【系统级】使用对象: backup_store 入库单次读写块大小(字节), 读一遍同时算摘要+写临时文件
+
+# ============================================================
+# 14. 回收站容量账本与后台清理调度(recycle_ledger / operation_maintenance) — 小欧 2026-10-17
+# ============================================================
+
+RECYCLE_LEDGER_FILENAME = ".ledger.json"  # 【系统级】使用对象: recycle_ledger 回收站根下容量账本文件名(备份增删时增量记账)
+RECYCLE_LEDGER_RECONCILE_INTERVAL = 86400.0  # 【系统级】使用对象: operation_maintenance 调度线程全量盘点校准账本的间隔(秒), 账本缺失时首轮即盘点
+RECYCLE_CLEANUP_MIN_INTERVAL = 60.0  # 【系统级】使用对象: operation_maintenance 两次清理(过期+超限)最短间隔(秒), 备份触发的清理请求在此窗口内合并
+RECYCLE_CLEANUP_INTERVAL = 3600.0  # 【系统级】使用对象: operation_maintenance 无备份触发时的定期清理间隔(秒)
+
+# ============================================================
+# 15. 并行批量哈希与持久化摘要缓存(hash_helper / digest_cache) — 小欧 2026-10-17
+# ============================================================
+
+HASH_WORKERS = 8  # 【系统级】使用对象: hash_helper 并行哈希线程数(按 I/O 定: hashlib 大块 update 释放 GIL, 读盘等待可重叠)
+HASH_READ_BUFFER = 1024 * 1024  # 【系统级】使用对象: hash_helper 并行/缓存哈希单次读块大小(字节)
+HASH_PARALLEL_MIN_FILES = 8  # 【系统级】使用对象: hash_helper/backup_store 文件数不足该值时在调用线程串行算(免线程池调度开销)
+DIGEST_CACHE_FILENAME = "digest_cache.sqlite3"  # 【系统级】使用对象: digest_cache ~/.omniagent 下持久化摘要缓存库文件名
+DIGEST_CACHE_MAX_ENTRIES = 500000  # 【系统级】使用对象: digest_cache 落盘条目上限, 超限按写入时间淘汰最旧(淘汰到上限的 90%)
+DIGEST_CACHE_RACY_SECONDS = 2.0  # 【系统级】使用对象: digest_cache mtime 距今不足该秒数的文件不缓存(防同一时间戳粒度内再次改写被误判未变)
+
+# ============================================================
+# 16. 版本化迁移与后台数据迁移(app/db/db_migrations.py) — 小欧 2026-10-17
+# ============================================================
+
+DB_DATA_MIGRATION_BATCH_ROWS = 500  # 【系统级】使用对象: db_migrations.DataMigrationRunner 每批处理行数(每批一个写事务, 与进度游标同提交)
+DB_DATA_MIGRATION_PAUSE = 0.05  # 【系统级】使用对象: db_migrations.DataMigrationRunner 批间让出写连接的间隔(秒), 前台写入在批间插队
+
+# ============================================================
+# 17. Prompt 日志流式写出(app/logger/prompt_logger.py) — 小欧 2026-10-17
+# ============================================================
 
+PROMPT_LOG_PART_STALE_SECONDS = 3600.0  # 【系统级】使用对象: prompt_logger 启动收尾: 闲置(mtime 距今)超过该秒数的 .jsonl.part 视为异常中断遗留, 定名为 .jsonl(更新的可能属于共用日志目录的其他进程, 不动)
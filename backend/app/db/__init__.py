@@ -11,6 +11,11 @@
     with db.get_conn("chat") as conn:
         conn.execute("SELECT ...")
 
+    with db.get_read_conn("chat") as conn:       # 纯读(读连接池)
+        conn.execute("SELECT ...")
+
+    rows = await db.run("chat", fn, readonly=True)  # 异步调用方(有界线程池, 不阻塞事件循环)
+
 禁止行为:
     - 禁止手动conn.commit()
     - 禁止手动conn.close()
@@ -20,6 +20,22 @@
 #   【病根】①BUG-03: 47处调用方用get_conn(无retry), 并发写锁死时静默失败; ②BUG-04: get_conn_with_retry在except内re-yield违反@contextmanager协议 → "generator didn't stop after throw()"(日志09:11:16)
 #   【改法】①get_conn新增max_retries: 连接获取期(a)与commit期(b)对"locked"指数退避(0.5/1/2s), 47处调用零改动即获重试能力(DRY); ②get_conn_with_retry改为get_conn薄包装(仅透传, 单次yield)
 #   【合规】DRY+KISS-DIRECT+SRP
+# 2026-10-17 - 小欧 - 持久连接池 + 异步门面
+#   【病根】get_conn 每次新建 sqlite3 连接并重跑 journal_mode/busy_timeout/foreign_keys 三条 PRAGMA; 进程内写者之间靠 sqlite 文件锁
+#          互斥, 撞锁即 time.sleep(0.5/1/2s) 退避, 而调用方多在事件循环上, 一次撞锁整个事件循环停摆。
+#   【改法】①每库一个 _ConnectionPool: 1 条写连接(线程级可重入独占锁, 进程内写者排队而非撞 sqlite 锁) + N 条读连接(query_only),
+#            PRAGMA 仅在建连时执行一次; get_conn 对外语义不变(自动 commit/rollback, 调用方零改动), 新增 get_read_conn 供纯读路径
+#          ②新增异步门面 db.run(db_name, fn, *args, readonly=False): 在有界线程池(DB_EXECUTOR_WORKERS)执行 fn(conn, ...), 异步调用方不阻塞事件循环
+#          ③close_all() 供应用 shutdown 关闭连接池与线程池; DatabaseManager(db_dir=...) 供基准脚本指向临时目录
+#          基准: scripts/bench_db_pool.py(逐次建连 vs 连接池)
+# 2026-10-17 - 小欧 - init 走版本化迁移(db_migrations): 各库已是最新版本时只查一次 schema_version;
+#   长耗时数据迁移(DATA_MIGRATIONS)在 schema 迁移后由 DataMigrationRunner 后台分批续跑, close_all 先在批间停下它
+# 2026-10-17 - 小欧 - 事件循环线程上借连接改短等待 + 纯读调用方改走读连接池
+#   【病根】连接池后 get_conn 一律借写连接(RLock 独占), 纯 SELECT 调用方也排在写者后面; 在事件循环线程上同步调用时
+#          最长阻塞 DB_WRITER_WAIT_TIMEOUT=30s, 比池化前的 0.5/1/2s 退避(共 3.5s)拖得更久。
+#   【改法】①_ConnectionPool 借写/读连接时, 当前线程正在跑事件循环则只等 DB_LOOP_WAIT_TIMEOUT(3.5s), 线程池/后台线程仍等 30s;
+#            需要久等的异步调用方应走 db.run(在 DB 线程池内等待, 不占事件循环)
+#          ②纯 SELECT 的 get_conn 调用方(会话/消息/任务/操作查询、健康检查、prompt_logger 等)改用 get_read_conn, WAL 下不等写者
 """DB SDK - 统一数据库操作接口
 
 管理3个SQLite数据库:
@@ -33,9 +49,16 @@
     with db.get_conn("chat") as conn:
         conn.execute("SELECT ...")
 
+    # 纯读路径(读连接池, 不占写连接):
+    with db.get_read_conn("chat") as conn:
+        conn.execute("SELECT ...")
+
+    # 异步调用方(有界线程池执行, 不阻塞事件循环):
+    rows = await db.run("chat", lambda conn: conn.execute("SELECT ...").fetchall(), readonly=True)
+
 设计原则:
-- 统一入口:所有DB操作通过db.get_conn()
-- 自动事务:上下文管理器自动commit/rollback/close
+- 统一入口:所有DB操作通过db.get_conn()/get_read_conn()/run()
+- 自动事务:上下文管理器自动commit/rollback, 连接归还连接池(不再逐次close)
 - 摒弃裸连接:禁止手动管理连接
 - SRP拆分:初始化逻辑委托给db_initializer
 
@@ -44,16 +67,24 @@ Author: 小沈 - 2026-05-28
 小健 2026-06-18 删除向后兼容迁移代码(db_migrator.py)
 """
 
+import asyncio
+import contextvars
+import queue
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from contextlib import contextmanager
 from datetime import datetime, date, timezone
-from typing import Iterator
+from typing import Any, Callable, Dict, Iterator, Optional
+from app.constants import DB_POOL_READERS, DB_EXECUTOR_WORKERS, DB_WRITER_WAIT_TIMEOUT, DB_LOOP_WAIT_TIMEOUT
 from app.logger import logger
 from app.utils.time_utils import to_local_iso  # 小欧 2026-08-08: datetime/date 归一化为本地ISO无Z
 from app.db.db_initializer import (
-    init_chat_db, init_operations_db, init_task_tracker_db,
+    init_chat_db, init_operations_db, init_task_tracker_db, DATA_MIGRATIONS,
 )
+from app.db.db_migrations import DataMigrationRunner
 
 
 class _ParamSafeConnection:
@@ -106,12 +137,153 @@ class _ParamSafeConnection:
         return getattr(self._conn, name)
 
 
+def _is_locked_error(e: BaseException) -> bool:
+    return isinstance(e, sqlite3.OperationalError) and "locked" in str(e)
+
+
+def _wait_timeout() -> float:
+    """借连接最长等待: 事件循环线程上同步调用只等 DB_LOOP_WAIT_TIMEOUT, 不让整个事件循环陪写者排队 — 小欧 2026-10-17"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return DB_WRITER_WAIT_TIMEOUT
+    return DB_LOOP_WAIT_TIMEOUT
+
+
+class _ConnectionPool:
+    """单库连接池: 1 条写连接 + N 条读连接, PRAGMA 建连时执行一次 — 小欧 2026-10-17
+
+    写连接: threading.RLock 独占, 同线程嵌套 get_conn 复用同一连接(仅最外层 commit/rollback), 不自锁;
+    读连接: 有界信号量限流, 空闲连接 LIFO 复用; query_only=ON 防误写。
+    借连接等待上限见 _wait_timeout(事件循环线程短等待, 其余线程 DB_WRITER_WAIT_TIMEOUT)。
+    连接出错且 rollback 失败视为损坏, 直接丢弃, 下次按需重建。
+    """
+
+    def __init__(self, db_name: str, db_path: Path, readers: int = DB_POOL_READERS):
+        self.db_name = db_name
+        self.db_path = str(db_path)
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.RLock()
+        self._writer_depth = 0  # 仅持锁线程读写
+        self._idle_readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(max(1, readers))
+        self._closed = False
+
+    def _connect(self, readonly: bool, max_retries: int) -> sqlite3.Connection:
+        """建连 + 一次性 PRAGMA; 对 locked 指数退避(仅建连期, 池化后极少发生)"""
+        conn = None
+        for attempt in range(max_retries + 1):
+            try:
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                # 全部库统一WAL模式(含chat) — 小欧 2026-07-17
+                # 历史因果(经验累积,勿删): 2026-07-14曾将chat改为DELETE,系误诊"WAL-shm在Windows 2GB+库并发读写Errno22"所致;
+                #   同日《后端step单步保存设计说明书》v1.2已更正Errno22真实根因为time_utils潜伏bug(与WAL无关),DELETE属误诊白做但无害、当时未回退。
+                #   2026-07-17 E2E验证暴露DELETE模式在chat_message_steps膨胀185万行/2.7GB时写I/O拥塞(每次写journal+fsync),
+                #   致create_session同步写>10s超时;故改回WAL统一三库,消除写拥塞。
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA busy_timeout=500")  # #14: 30000→500ms (快速失败, 应用层指数退避重试) — 小欧 2026-07-23
+                conn.execute("PRAGMA foreign_keys=ON")  # M-05: SQLite默认OFF — 小欧 2026-07-10
+                if readonly:
+                    conn.execute("PRAGMA query_only=ON")
+                return conn
+            except sqlite3.OperationalError as _lock_e:
+                if conn:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+                if not _is_locked_error(_lock_e):
+                    raise
+                if attempt == max_retries:
+                    logger.error(f"[db] {self.db_name} 连接locked, {max_retries}次重试后放弃")
+                    raise
+                delay = 0.5 * (2 ** attempt)
+                logger.warning(f"[db] {self.db_name} 连接locked, 第{attempt+1}/{max_retries}次重试, 等待{delay:.1f}s")
+                time.sleep(delay)
+        raise sqlite3.OperationalError(f"{self.db_name} 连接失败")  # 不可达, 满足类型检查
+
+    # ── 写连接 ────────────────────────────────────────────────
+
+    def acquire_writer(self, max_retries: int):
+        """获取写连接 → (conn, is_outermost)"""
+        timeout = _wait_timeout()
+        if not self._writer_lock.acquire(timeout=timeout):
+            raise sqlite3.OperationalError(
+                f"database is locked: {self.db_name} 写连接等待超过{timeout}s")
+        try:
+            if self._writer is None:
+                self._writer = self._connect(readonly=False, max_retries=max_retries)
+        except BaseException:
+            self._writer_lock.release()
+            raise
+        self._writer_depth += 1
+        return self._writer, self._writer_depth == 1
+
+    def release_writer(self, broken: bool = False) -> None:
+        self._writer_depth -= 1
+        if broken and self._writer_depth == 0 and self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception:
+                logger.warning(f"[db] 关闭损坏写连接失败: {self.db_name}")
+            self._writer = None
+        self._writer_lock.release()
+
+    # ── 读连接 ────────────────────────────────────────────────
+
+    def acquire_reader(self, max_retries: int) -> sqlite3.Connection:
+        timeout = _wait_timeout()
+        if not self._reader_slots.acquire(timeout=timeout):
+            raise sqlite3.OperationalError(f"{self.db_name} 读连接池耗尽(等待超过{timeout}s)")
+        try:
+            return self._idle_readers.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._connect(readonly=True, max_retries=max_retries)
+        except BaseException:
+            self._reader_slots.release()
+            raise
+
+    def release_reader(self, conn: sqlite3.Connection, broken: bool = False) -> None:
+        if broken or self._closed:
+            try:
+                conn.close()
+            except Exception:
+                logger.warning(f"[db] 关闭读连接失败: {self.db_name}")
+        else:
+            self._idle_readers.put(conn)
+        self._reader_slots.release()
+
+    def close(self) -> None:
+        """关闭池内全部空闲连接(应用 shutdown); 借出中的读连接归还时关闭"""
+        self._closed = True
+        with self._writer_lock:
+            if self._writer is not None:
+                try:
+                    self._writer.close()
+                except Exception:
+                    logger.warning(f"[db] 关闭写连接失败: {self.db_name}")
+                self._writer = None
+        while True:
+            try:
+                conn = self._idle_readers.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except Exception:
+                logger.warning(f"[db] 关闭读连接失败: {self.db_name}")
+
+
 class DatabaseManager:
     """统一数据库管理器(SDK核心) — 仅负责连接管理"""
     
-    def __init__(self):
-        """初始化数据库管理器"""
-        self._db_dir = Path.home() / ".omniagent"
+    def __init__(self, db_dir: Optional[Path] = None):
+        """初始化数据库管理器(db_dir 仅供基准/脚本指向临时目录, 默认 ~/.omniagent)"""
+        self._db_dir = Path(db_dir) if db_dir else Path.home() / ".omniagent"
         self._db_paths = {
             "chat": self._db_dir / "chat_history.db",
             "operations": self._db_dir / "operations.db",
@@ -119,6 +291,27 @@ class DatabaseManager:
             "task_tracker": self._db_dir / "task_tracker.db",
         }
         self._db_dir.mkdir(parents=True, exist_ok=True)
+        # 连接池按库文件路径建(测试/脚本改 _db_paths 时不复用旧池) — 小欧 2026-10-17
+        self._pools: Dict[str, _ConnectionPool] = {}
+        self._pools_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._data_migrations: Optional[DataMigrationRunner] = None  # init 启动的后台数据迁移 — 小欧 2026-10-17
+
+    def _get_pool(self, db_name: str) -> _ConnectionPool:
+        if db_name not in self._db_paths:
+            raise ValueError(
+                f"Unknown database: {db_name}. "
+                f"Supported: {list(self._db_paths.keys())}"
+            )
+        key = str(self._db_paths[db_name])
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._pools_lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = _ConnectionPool(db_name, self._db_paths[db_name])
+                    self._pools[key] = pool
+        return pool
 
     @contextmanager
     def get_conn(self, db_name: str = "chat", max_retries: int = 3) -> Iterator[sqlite3.Connection]:
@@ -129,10 +322,12 @@ class DatabaseManager:
                 conn.execute("SELECT ...")
         
         自动处理:
-            - 连接获取: 对"database is locked"指数退避重试(0.5/1/2s, 不阻塞事件循环过长 — 小欧 2026-08-07)
-            - 正常退出: commit + close (commit对lock重试, 无re-yield)
-            - 异常退出: rollback + close
-            - 无论如何: 都会关闭连接
+            - 连接获取: 从连接池借写连接(进程内写者排队, 事件循环线程上最多等 DB_LOOP_WAIT_TIMEOUT); 首次建连对"database is locked"指数退避重试(0.5/1/2s)
+            - 纯 SELECT 请用 get_read_conn, 不占写连接
+            - 正常退出: commit (commit对lock重试, 无re-yield)
+            - 异常退出: rollback
+            - 无论如何: 连接归还连接池(损坏连接丢弃重建)
+            - 同线程嵌套: 复用同一写连接, 仅最外层 commit/rollback — 小欧 2026-10-17
         
         支持的db_name: chat, operations, observer, task_tracker
         
@@ -140,91 +335,119 @@ class DatabaseManager:
             @contextmanager协议禁止二次yield → 抛出"generator didn't stop after throw()"(日志09:11:16).
             重构: 重试点只在【连接获取】与【commit】两处(均为单yield/无re-yield), 保证generator清洁退出.
             BUG-03(小欧 2026-08-07): 重试逻辑下沉至get_conn统一入口, 47处调用方零改动即获重试能力(DRY).
+        小欧 2026-10-17: 连接改由 _ConnectionPool 持有(PRAGMA 建连时一次), 不再逐次 connect/close。
         """
-        import time as _time
-        if db_name not in self._db_paths:
-            raise ValueError(
-                f"Unknown database: {db_name}. "
-                f"Supported: {list(self._db_paths.keys())}"
-            )
-
-        db_path = self._db_paths[db_name]
-        conn = None
-
-        # (a) 连接获取: 对 connected前的 lock 指数退避重试(单次连接, 无re-yield) — 小欧 2026-08-07
-        for attempt in range(max_retries + 1):
-            try:
-                conn = sqlite3.connect(str(db_path))
-                conn.row_factory = sqlite3.Row
-
-                # 全部库统一WAL模式(含chat) — 小欧 2026-07-17
-                # 历史因果(经验累积,勿删): 2026-07-14曾将chat改为DELETE,系误诊"WAL-shm在Windows 2GB+库并发读写Errno22"所致;
-                #   同日《后端step单步保存设计说明书》v1.2已更正Errno22真实根因为time_utils潜伏bug(与WAL无关),DELETE属误诊白做但无害、当时未回退。
-                #   2026-07-17 E2E验证暴露DELETE模式在chat_message_steps膨胀185万行/2.7GB时写I/O拥塞(每次写journal+fsync),
-                #   致create_session同步写>10s超时;故改回WAL统一三库,消除写拥塞。
-                conn.execute("PRAGMA journal_mode=WAL")
-                conn.execute("PRAGMA busy_timeout=500")  # #14: 30000→500ms (快速失败, 应用层指数退避重试, 不空等30s) — 小欧 2026-07-23
-                # M-05: SQLite默认OFF，外键约束不生效 — 小欧 2026-07-10
-                conn.execute("PRAGMA foreign_keys=ON")
-                break  # 连接成功
-            except sqlite3.OperationalError as _lock_e:
-                if "locked" not in str(_lock_e):
-                    raise  # 非locked异常不重试
-                if conn:
-                    try:
-                        conn.close()
-                    except Exception:
-                        pass
-                    conn = None
-                if attempt == max_retries:
-                    logger.error(f"[db] {db_name} 连接locked, {max_retries}次重试后放弃")
-                    raise
-                delay = 0.5 * (2 ** attempt)  # 0.5, 1, 2 (max_retries=3, 总~3.5s, 不阻塞事件循环过长) — 小欧 2026-07-23
-                logger.warning(f"[db] {db_name} 连接locked, 第{attempt+1}/{max_retries}次重试, 等待{delay:.1f}s")
-                _time.sleep(delay)
-
+        pool = self._get_pool(db_name)
+        # (a) 连接获取: 写连接独占 + 首次建连 lock 指数退避(单次获取, 无re-yield) — 小欧 2026-08-07 / 2026-10-17
+        conn, outermost = pool.acquire_writer(max_retries)
+        broken = False
         try:
             yield _ParamSafeConnection(conn)  # 小欧 2026-07-18: 参数安全闸门包装, 校验SQL参数类型(非基元类型抛清晰错误)
 
             # (b) 提交: 对lock指数退避重试(无re-yield, 省去外层re-yield的Bug4) — 小欧 2026-08-07
-            for commit_attempt in range(max_retries + 1):
-                try:
-                    conn.commit()
-                    break
-                except sqlite3.OperationalError as _commit_e:
-                    if "locked" not in str(_commit_e):
-                        raise  # 非locked异常不重试
-                    if commit_attempt == max_retries:
-                        logger.error(f"[db] {db_name} commit locked, {max_retries}次重试后放弃")
-                        raise
-                    delay = 0.5 * (2 ** commit_attempt)
-                    logger.warning(f"[db] {db_name} commit locked, 第{commit_attempt+1}/{max_retries}次重试, 等待{delay:.1f}s")
-                    _time.sleep(delay)
+            if outermost:
+                self._commit_with_retry(conn, db_name, max_retries)
 
         except sqlite3.Error as e:
             # DB级错误(连接/SQL/事务): 回滚 + 记"DB operation failed" — 小欧 2026-07-15
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    logger.warning(f"[db] rollback 失败: {db_name}")
+            if outermost:
+                broken = not self._safe_rollback(conn, db_name)
             logger.error(f"DB operation failed [{db_name}]: {e}")
             raise
-        except Exception as e:
+        except Exception:
             # 业务级异常(如FileExistsError): 仅回滚, 不当DB错误记避免误报; 由调用方(如execute_with_safety)记录 — 小欧 2026-07-15
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    logger.warning(f"[db] rollback 失败: {db_name}")
+            if outermost:
+                broken = not self._safe_rollback(conn, db_name)
             raise
 
         finally:
-            if conn:
-                try:
-                    conn.close()
-                except Exception:
-                    logger.warning(f"[db] 关闭连接失败: {db_name}")
+            # 非 Exception 退出(GeneratorExit 等)时事务可能未结束: 归还前兜底回滚, 不把半截事务留给下一个借用者
+            if outermost and not broken and conn.in_transaction:
+                broken = not self._safe_rollback(conn, db_name)
+            pool.release_writer(broken=broken)
+
+    @contextmanager
+    def get_read_conn(self, db_name: str = "chat", max_retries: int = 3) -> Iterator[sqlite3.Connection]:
+        """获取只读连接(读连接池, query_only) — 小欧 2026-10-17
+
+        纯 SELECT 路径使用: WAL 下与写连接并发, 不排队等写者; 退出时结束读事务(释放快照)。
+        """
+        pool = self._get_pool(db_name)
+        conn = pool.acquire_reader(max_retries)
+        broken = False
+        try:
+            yield _ParamSafeConnection(conn)
+        except sqlite3.Error as e:
+            logger.error(f"DB operation failed [{db_name}]: {e}")
+            raise
+        finally:
+            if conn.in_transaction:
+                broken = not self._safe_rollback(conn, db_name)
+            pool.release_reader(conn, broken=broken)
+
+    @staticmethod
+    def _commit_with_retry(conn: sqlite3.Connection, db_name: str, max_retries: int) -> None:
+        for commit_attempt in range(max_retries + 1):
+            try:
+                conn.commit()
+                return
+            except sqlite3.OperationalError as _commit_e:
+                if not _is_locked_error(_commit_e):
+                    raise  # 非locked异常不重试
+                if commit_attempt == max_retries:
+                    logger.error(f"[db] {db_name} commit locked, {max_retries}次重试后放弃")
+                    raise
+                delay = 0.5 * (2 ** commit_attempt)
+                logger.warning(f"[db] {db_name} commit locked, 第{commit_attempt+1}/{max_retries}次重试, 等待{delay:.1f}s")
+                time.sleep(delay)
+
+    @staticmethod
+    def _safe_rollback(conn: sqlite3.Connection, db_name: str) -> bool:
+        """回滚; 失败返回 False(连接视为损坏, 由连接池丢弃)"""
+        try:
+            conn.rollback()
+            return True
+        except Exception:
+            logger.warning(f"[db] rollback 失败: {db_name}")
+            return False
+
+    async def run(self, db_name: str, fn: Callable[..., Any], *args: Any,
+                  readonly: bool = False, max_retries: int = 3) -> Any:
+        """异步门面: 在有界 DB 线程池中执行 fn(conn, *args) 并返回其结果 — 小欧 2026-10-17
+
+        readonly=False 走 get_conn(写连接, 自动 commit/rollback); True 走 get_read_conn。
+        上下文(contextvars, 如日志 session_id)随调用复制进工作线程。
+        使用方式:
+            rows = await db.run("chat", lambda conn: conn.execute("SELECT ...").fetchall(), readonly=True)
+        """
+        def _call():
+            cm = self.get_read_conn(db_name, max_retries) if readonly else self.get_conn(db_name, max_retries)
+            with cm as conn:
+                return fn(conn, *args)
+
+        ctx = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), ctx.run, _call)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._pools_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="omni-db")
+        return self._executor
+
+    def close_all(self) -> None:
+        """关闭全部连接池与 DB 线程池(应用 shutdown 调用) — 小欧 2026-10-17"""
+        if self._data_migrations is not None:
+            self._data_migrations.stop()  # 批间停下, 未完成部分下次启动从游标续跑
+            self._data_migrations = None
+        with self._pools_lock:
+            pools, self._pools = list(self._pools.values()), {}
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        for pool in pools:
+            pool.close()
 
     @contextmanager
     def get_conn_with_retry(self, db_name: str = "chat", max_retries: int = 3) -> Iterator[sqlite3.Connection]:  # max_retries=3 (0.5+1+2=3.5s总阻塞,time.sleep不阻塞事件循环过长) — 小欧 2026-07-23
@@ -249,7 +472,7 @@ class DatabaseManager:
             yield conn
 
     def init(self):
-        """初始化所有数据库(应用启动时调用)"""
+        """初始化所有数据库(应用启动时调用): 各库 schema 迁移到最新版本, 再起后台数据迁移 — 小欧 2026-10-17"""
         import time as _time
         logger.info("Initializing all databases...")
         _ta = _time.time()
@@ -261,6 +484,8 @@ class DatabaseManager:
         _tc = _time.time()
         init_task_tracker_db(self.get_conn)
         logger.info(f"[启动耗时] init_task_tracker_db: {_time.time()-_tc:.3f}s")
+        self._data_migrations = DataMigrationRunner(self.get_conn, DATA_MIGRATIONS)
+        self._data_migrations.start()
         logger.info(f"[启动耗时] db.init 合计: {_time.time()-_ta:.3f}s")
         logger.info("All databases initialized successfully")
     
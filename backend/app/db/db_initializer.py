@@ -12,207 +12,258 @@
 #          ③DROP+RENAME使迁移在任何状态都收敛到唯一task_operations, 幂等自愈
 # 2026-07-18 - 小欧 - 所有时间列 TIMESTAMP→TEXT, 去 DEFAULT CURRENT_TIMESTAMP; _ensure_column title_updated_at TEXT; backup_expires_at TEXT
 # 2026-08-08 - 小欧 - 全程统一本地时区: 时间列注释 `-- UTC ISO 8601` → `-- 本地ISO无Z` (13处)
+# 2026-10-17 - 小欧 - 版本化迁移: 三库原 init 内容原样收为各库迁移 v1(baseline, 幂等, 旧库任意历史状态执行一次即收敛),
+#   init_* 改为 db_migrations.apply_migrations(启动只查一次 schema_version); chat v2 把旧 schema_migrations 守卫并入 data_migrations;
+#   migrate_execution_steps_status 不再在 init_chat_db 里同步跑, 改登记 DATA_MIGRATIONS 由后台分批执行。
+#   新增 schema 变更 = 在对应 *_MIGRATIONS 末尾追加 Migration(下一版本号, ...), 不改已发布版本
 """
 db_initializer — 数据库初始化
 
-职责: 创建表、确保字段存在
+职责: 登记各库有序 schema 迁移(建表、确保字段存在)与后台数据迁移, 启动时按版本应用
 小欧 2026-06-18 从database.py拆分，遵守SRP
 """
 import sqlite3
 from app.logger import logger
+from app.db.db_migrations import DataMigration, Migration, apply_migrations
 
 
 def init_chat_db(get_conn):
-    """初始化聊天数据库"""
-    with get_conn("chat") as conn:
-        conn.executescript('''
-            CREATE TABLE IF NOT EXISTS chat_sessions (
-                id TEXT PRIMARY KEY,
-                title TEXT NOT NULL,
-                created_at TEXT,  -- 本地ISO无Z
-                updated_at TEXT,  -- 本地ISO无Z
-                message_count INTEGER DEFAULT 0,
-                is_deleted BOOLEAN DEFAULT FALSE,
-                is_valid BOOLEAN DEFAULT FALSE,
-                title_locked BOOLEAN DEFAULT FALSE,
-                title_updated_at TEXT,  -- 本地ISO无Z
-                version INTEGER DEFAULT 1
-            );
-            
-            CREATE TABLE IF NOT EXISTS chat_messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT NOT NULL,
-                role TEXT NOT NULL,
-                content TEXT NOT NULL,
-                timestamp TEXT,  -- 本地ISO无Z
-                execution_steps TEXT,
-                display_name TEXT
-            );
-            
-            CREATE TABLE IF NOT EXISTS chat_session_title_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT NOT NULL,
-                title TEXT NOT NULL,
-                created_at TEXT,  -- 本地ISO无Z
-                updated_by TEXT,
-                change_reason TEXT,
-                FOREIGN KEY (session_id) REFERENCES chat_sessions(id) ON DELETE CASCADE
-            );
-
-            -- 独立步骤表 — 小欧 2026-07-14
-            CREATE TABLE IF NOT EXISTS chat_message_steps (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                message_id INTEGER NOT NULL,
-                session_id TEXT NOT NULL,
-                step_index INTEGER NOT NULL,
-                step_json TEXT NOT NULL,
-                created_at TEXT,  -- 本地ISO无Z
-                FOREIGN KEY (message_id) REFERENCES chat_messages(id) ON DELETE CASCADE
-            );
-        ''')
-        
-        _ensure_column(conn, "chat_sessions", "message_count", "INTEGER DEFAULT 0")
-        _ensure_column(conn, "chat_sessions", "is_deleted", "BOOLEAN DEFAULT FALSE")
-        _ensure_column(conn, "chat_sessions", "is_valid", "BOOLEAN DEFAULT FALSE")
-        _ensure_column(conn, "chat_sessions", "title_locked", "BOOLEAN DEFAULT FALSE")
-        _ensure_column(conn, "chat_sessions", "title_updated_at", "TEXT")
-        _ensure_column(conn, "chat_sessions", "version", "INTEGER DEFAULT 1")
+    """初始化聊天数据库(升到 CHAT_MIGRATIONS 最新版本)"""
+    apply_migrations(get_conn, "chat", CHAT_MIGRATIONS)
+
+
+def init_operations_db(get_conn):
+    """初始化操作数据库(升到 OPERATIONS_MIGRATIONS 最新版本)"""
+    apply_migrations(get_conn, "operations", OPERATIONS_MIGRATIONS)
+
+
+def init_task_tracker_db(get_conn):
+    """初始化 Task 追踪数据库(升到 TASK_TRACKER_MIGRATIONS 最新版本)"""
+    apply_migrations(get_conn, "task_tracker", TASK_TRACKER_MIGRATIONS)
+
+
+def _chat_baseline(conn):
+    """chat v1: 建表 + 补列 + 索引(原 init_chat_db)"""
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS chat_sessions (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            created_at TEXT,  -- 本地ISO无Z
+            updated_at TEXT,  -- 本地ISO无Z
+            message_count INTEGER DEFAULT 0,
+            is_deleted BOOLEAN DEFAULT FALSE,
+            is_valid BOOLEAN DEFAULT FALSE,
+            title_locked BOOLEAN DEFAULT FALSE,
+            title_updated_at TEXT,  -- 本地ISO无Z
+            version INTEGER DEFAULT 1
+        );
         
-        _ensure_column(conn, "chat_messages", "timestamp", "TEXT")
-        _ensure_column(conn, "chat_messages", "display_name", "TEXT")
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp TEXT,  -- 本地ISO无Z
+            execution_steps TEXT,
+            display_name TEXT
+        );
         
-        for field in ["client_os", "browser", "device", "network", "reply_to_message_id"]:
-            col_type = "INTEGER" if field == "reply_to_message_id" else "TEXT"
-            _ensure_column(conn, "chat_messages", field, col_type)
+        CREATE TABLE IF NOT EXISTS chat_session_title_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            title TEXT NOT NULL,
+            created_at TEXT,  -- 本地ISO无Z
+            updated_by TEXT,
+            change_reason TEXT,
+            FOREIGN KEY (session_id) REFERENCES chat_sessions(id) ON DELETE CASCADE
+        );
+
+        -- 独立步骤表 — 小欧 2026-07-14
+        CREATE TABLE IF NOT EXISTS chat_message_steps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id INTEGER NOT NULL,
+            session_id TEXT NOT NULL,
+            step_index INTEGER NOT NULL,
+            step_json TEXT NOT NULL,
+            created_at TEXT,  -- 本地ISO无Z
+            FOREIGN KEY (message_id) REFERENCES chat_messages(id) ON DELETE CASCADE
+        );
+    ''')
+    
+    _ensure_column(conn, "chat_sessions", "message_count", "INTEGER DEFAULT 0")
+    _ensure_column(conn, "chat_sessions", "is_deleted", "BOOLEAN DEFAULT FALSE")
+    _ensure_column(conn, "chat_sessions", "is_valid", "BOOLEAN DEFAULT FALSE")
+    _ensure_column(conn, "chat_sessions", "title_locked", "BOOLEAN DEFAULT FALSE")
+    _ensure_column(conn, "chat_sessions", "title_updated_at", "TEXT")
+    _ensure_column(conn, "chat_sessions", "version", "INTEGER DEFAULT 1")
+    
+    _ensure_column(conn, "chat_messages", "timestamp", "TEXT")
+    _ensure_column(conn, "chat_messages", "display_name", "TEXT")
+    
+    for field in ["client_os", "browser", "device", "network", "reply_to_message_id"]:
+        col_type = "INTEGER" if field == "reply_to_message_id" else "TEXT"
+        _ensure_column(conn, "chat_messages", field, col_type)
+
+    # 小欧 2026-07-13: 终态列(status), 记录一次请求的任务终态, 供前端/迁移直接读取
+    _ensure_column(conn, "chat_messages", "status", "TEXT")
+    _ensure_column(conn, "chat_messages", "thought", "TEXT")  # 小欧 2026-07-16
+    
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON chat_sessions(updated_at DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_deleted ON chat_sessions(is_deleted)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON chat_messages(session_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON chat_messages(timestamp)")
+
+    # steps 表索引 — 小欧 2026-07-14
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_steps_message ON chat_message_steps(message_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_steps_session ON chat_message_steps(session_id, step_index)")
 
-        # 小欧 2026-07-13: 终态列(status), 记录一次请求的任务终态, 供前端/迁移直接读取
-        _ensure_column(conn, "chat_messages", "status", "TEXT")
-        _ensure_column(conn, "chat_messages", "thought", "TEXT")  # 小欧 2026-07-16
+
+def _chat_adopt_schema_migrations(conn):
+    """chat v2: 旧一次性迁移守卫表 schema_migrations(小欧 2026-07-13)登记并入 data_migrations(已完成), 删旧表"""
+    if conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='schema_migrations'").fetchone():
+        conn.execute(
+            "INSERT OR IGNORE INTO data_migrations(name, cursor, migrated_rows, completed_at) "
+            "SELECT name, 0, 0, COALESCE(applied_at, '') FROM schema_migrations"
+        )
+        conn.execute("DROP TABLE schema_migrations")
+
+
+def _operations_baseline(conn):
+    """operations v1: 建表 + 索引(原 init_operations_db)"""
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS file_operations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            operation_id TEXT UNIQUE NOT NULL,
+            task_id TEXT NOT NULL,
+            operation_type TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            source_path TEXT,
+            destination_path TEXT,
+            backup_path TEXT,
+            backup_expires_at TEXT,  -- 本地ISO无Z
+            file_size INTEGER,
+            file_hash TEXT,
+            is_directory BOOLEAN DEFAULT 0,
+            file_extension TEXT,
+            duration_ms INTEGER,
+            space_impact_bytes INTEGER,
+            metadata TEXT DEFAULT '{}',
+            error_message TEXT,
+            created_at TEXT,  -- 本地ISO无Z
+            executed_at TEXT,  -- 本地ISO无Z
+            rolled_back_at TEXT,  -- 本地ISO无Z
+            sequence_number INTEGER DEFAULT 0
+        );
         
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON chat_sessions(updated_at DESC)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_deleted ON chat_sessions(is_deleted)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON chat_messages(session_id)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON chat_messages(timestamp)")
+        CREATE TABLE IF NOT EXISTS timers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timer_id TEXT UNIQUE NOT NULL,
+            delay REAL NOT NULL,
+            callback TEXT NOT NULL DEFAULT '',
+            created_at TIMESTAMP NOT NULL,
+            trigger_at TIMESTAMP NOT NULL,
+            triggered_at TIMESTAMP,
+            status TEXT NOT NULL DEFAULT 'active'
+        );
 
-        # steps 表索引 — 小欧 2026-07-14
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_steps_message ON chat_message_steps(message_id)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_steps_session ON chat_message_steps(session_id, step_index)")
+        CREATE INDEX IF NOT EXISTS idx_operations_session ON file_operations(task_id);
+        CREATE INDEX IF NOT EXISTS idx_operations_created ON file_operations(created_at);
+    ''')
 
-        # 小欧 2026-07-13: 一次性迁移旧 execution_steps(幂等)
-        from app.services.chat.migrate_steps import migrate_execution_steps_status
-        migrate_execution_steps_status(get_conn)
 
+def _task_tracker_baseline(conn):
+    """task_tracker v1: operations→task_operations 正名 + 建表 + 索引(原 init_task_tracker_db)"""
+    # ==========================================================================
+    # task_tracker 迁移：旧 operations 表改名为 task_operations（命名正名） — 小欧 2026-07-16
+    # 目标：把含糊的 operations 表正名为 task_operations（任务步骤统一记录），与
+    #       operations.db 内的 file_operations 区分，消除"双轨/多套 ID"混乱。
+    # 为什么需要幂等处理半残状态：
+    #   - 旧库首次启动会先 CREATE TABLE IF NOT EXISTS task_operations（空表），
+    #     再 ALTER RENAME operations→task_operations 失败 → 留下"operations + 空 task_operations"残表；
+    #   - 再次启动时 RENAME 撞名（already another table with name task_operations），后端起不来。
+    # 处理逻辑：
+    #   [查] 先查 _has_ops / _has_task_ops 两个表是否并存；
+    #   [清] 若并存（半残）→ DROP 空 task_operations（半残态必为空表，DROP 安全不丢数据）；
+    #   [迁] ALTER operations RENAME TO task_operations（保留旧历史数据）；
+    #   [兜底] 末尾 CREATE TABLE IF NOT EXISTS 覆盖新库/已迁移库，幂等自愈。
+    # 原理：DROP 空残表 + RENAME 使迁移在任何状态都收敛到唯一 task_operations，不丢历史、不撞名。
+    # ==========================================================================
+    _has_ops = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name='operations'"
+    ).fetchone()
+    _has_task_ops = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name='task_operations'"
+    ).fetchone()
+    if _has_ops:
+        if _has_task_ops:
+            conn.execute("DROP TABLE IF EXISTS task_operations")  # 半残: 清掉空/旧的 task_operations, 小欧 2026-07-16
+        conn.execute("ALTER TABLE operations RENAME TO task_operations")
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            task_id          TEXT PRIMARY KEY,
+            intent           TEXT NOT NULL DEFAULT '',
+            agent_id         TEXT NOT NULL,
+            task_description TEXT NOT NULL,
+            status           TEXT NOT NULL DEFAULT 'executing',
+            total_operations INTEGER DEFAULT 0,
+            success_count    INTEGER DEFAULT 0,
+            failed_count     INTEGER DEFAULT 0,
+            rolled_back_count INTEGER DEFAULT 0,
+            report_generated INTEGER DEFAULT 0,
+            report_path      TEXT,
+            created_at       TEXT,  -- 本地ISO无Z
+            completed_at     TEXT   -- 本地ISO无Z
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks(created_at);
 
-def init_operations_db(get_conn):
-    """初始化操作数据库"""
-    with get_conn("operations") as conn:
-        conn.executescript('''
-            CREATE TABLE IF NOT EXISTS file_operations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                operation_id TEXT UNIQUE NOT NULL,
-                task_id TEXT NOT NULL,
-                operation_type TEXT NOT NULL,
-                status TEXT NOT NULL DEFAULT 'pending',
-                source_path TEXT,
-                destination_path TEXT,
-                backup_path TEXT,
-                backup_expires_at TEXT,  -- 本地ISO无Z
-                file_size INTEGER,
-                file_hash TEXT,
-                is_directory BOOLEAN DEFAULT 0,
-                file_extension TEXT,
-                duration_ms INTEGER,
-                space_impact_bytes INTEGER,
-                metadata TEXT DEFAULT '{}',
-                error_message TEXT,
-                created_at TEXT,  -- 本地ISO无Z
-                executed_at TEXT,  -- 本地ISO无Z
-                rolled_back_at TEXT,  -- 本地ISO无Z
-                sequence_number INTEGER DEFAULT 0
-            );
-            
-            CREATE TABLE IF NOT EXISTS timers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timer_id TEXT UNIQUE NOT NULL,
-                delay REAL NOT NULL,
-                callback TEXT NOT NULL DEFAULT '',
-                created_at TIMESTAMP NOT NULL,
-                trigger_at TIMESTAMP NOT NULL,
-                triggered_at TIMESTAMP,
-                status TEXT NOT NULL DEFAULT 'active'
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_operations_session ON file_operations(task_id);
-            CREATE INDEX IF NOT EXISTS idx_operations_created ON file_operations(created_at);
-        ''')
+        CREATE TABLE IF NOT EXISTS task_operations (
+            operation_id     TEXT PRIMARY KEY,
+            task_id          TEXT NOT NULL REFERENCES tasks(task_id) ON DELETE CASCADE,
+            intent           TEXT NOT NULL DEFAULT '',
+            operation_type   TEXT NOT NULL,
+            status           TEXT NOT NULL DEFAULT 'pending',
+            source_path      TEXT,
+            destination_path TEXT,
+            backup_path      TEXT,
+            file_size        INTEGER DEFAULT 0,
+            file_hash        TEXT,
+            sequence_number  INTEGER NOT NULL DEFAULT 0,
+            details          TEXT,
+            error            TEXT,
+            created_at       TEXT  -- 本地ISO无Z
+        );
 
+        CREATE INDEX IF NOT EXISTS idx_ops_task ON task_operations(task_id);
+        CREATE INDEX IF NOT EXISTS idx_ops_seq  ON task_operations(task_id, sequence_number);
+    ''')
 
-def init_task_tracker_db(get_conn):
-    """初始化 Task 追踪数据库"""
-    with get_conn("task_tracker") as conn:
-        # ==========================================================================
-        # task_tracker 迁移：旧 operations 表改名为 task_operations（命名正名） — 小欧 2026-07-16
-        # 目标：把含糊的 operations 表正名为 task_operations（任务步骤统一记录），与
-        #       operations.db 内的 file_operations 区分，消除"双轨/多套 ID"混乱。
-        # 为什么需要幂等处理半残状态：
-        #   - 旧库首次启动会先 CREATE TABLE IF NOT EXISTS task_operations（空表），
-        #     再 ALTER RENAME operations→task_operations 失败 → 留下"operations + 空 task_operations"残表；
-        #   - 再次启动时 RENAME 撞名（already another table with name task_operations），后端起不来。
-        # 处理逻辑：
-        #   [查] 先查 _has_ops / _has_task_ops 两个表是否并存；
-        #   [清] 若并存（半残）→ DROP 空 task_operations（半残态必为空表，DROP 安全不丢数据）；
-        #   [迁] ALTER operations RENAME TO task_operations（保留旧历史数据）；
-        #   [兜底] 末尾 CREATE TABLE IF NOT EXISTS 覆盖新库/已迁移库，幂等自愈。
-        # 原理：DROP 空残表 + RENAME 使迁移在任何状态都收敛到唯一 task_operations，不丢历史、不撞名。
-        # ==========================================================================
-        _has_ops = conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='operations'"
-        ).fetchone()
-        _has_task_ops = conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='task_operations'"
-        ).fetchone()
-        if _has_ops:
-            if _has_task_ops:
-                conn.execute("DROP TABLE IF EXISTS task_operations")  # 半残: 清掉空/旧的 task_operations, 小欧 2026-07-16
-            conn.execute("ALTER TABLE operations RENAME TO task_operations")
-        conn.executescript('''
-            CREATE TABLE IF NOT EXISTS tasks (
-                task_id          TEXT PRIMARY KEY,
-                intent           TEXT NOT NULL DEFAULT '',
-                agent_id         TEXT NOT NULL,
-                task_description TEXT NOT NULL,
-                status           TEXT NOT NULL DEFAULT 'executing',
-                total_operations INTEGER DEFAULT 0,
-                success_count    INTEGER DEFAULT 0,
-                failed_count     INTEGER DEFAULT 0,
-                rolled_back_count INTEGER DEFAULT 0,
-                report_generated INTEGER DEFAULT 0,
-                report_path      TEXT,
-                created_at       TEXT,  -- 本地ISO无Z
-                completed_at     TEXT   -- 本地ISO无Z
-            );
-            CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks(created_at);
-
-            CREATE TABLE IF NOT EXISTS task_operations (
-                operation_id     TEXT PRIMARY KEY,
-                task_id          TEXT NOT NULL REFERENCES tasks(task_id) ON DELETE CASCADE,
-                intent           TEXT NOT NULL DEFAULT '',
-                operation_type   TEXT NOT NULL,
-                status           TEXT NOT NULL DEFAULT 'pending',
-                source_path      TEXT,
-                destination_path TEXT,
-                backup_path      TEXT,
-                file_size        INTEGER DEFAULT 0,
-                file_hash        TEXT,
-                sequence_number  INTEGER NOT NULL DEFAULT 0,
-                details          TEXT,
-                error            TEXT,
-                created_at       TEXT  -- 本地ISO无Z
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_ops_task ON task_operations(task_id);
-            CREATE INDEX IF NOT EXISTS idx_ops_seq  ON task_operations(task_id, sequence_number);
-        ''')
+
+# ============================================================
+# 迁移登记(版本号从 1 起连续; 只在末尾追加, 已发布版本不改) — 小欧 2026-10-17
+# ============================================================
+
+CHAT_MIGRATIONS = [
+    Migration(1, "baseline", _chat_baseline),
+    Migration(2, "adopt_schema_migrations", _chat_adopt_schema_migrations),
+]
+OPERATIONS_MIGRATIONS = [
+    Migration(1, "baseline", _operations_baseline),
+]
+TASK_TRACKER_MIGRATIONS = [
+    Migration(1, "baseline", _task_tracker_baseline),
+]
+
+
+def _migrate_execution_steps_batch(conn, last_id: int, batch_rows: int):
+    # 延迟导入: migrate_steps 经 chat.storage 依赖 app.db
+    from app.services.chat.migrate_steps import migrate_execution_steps_batch
+    return migrate_execution_steps_batch(conn, last_id, batch_rows)
+
+
+# 后台数据迁移(DatabaseManager.init 在 schema 迁移之后启动, 按序执行)
+DATA_MIGRATIONS = [
+    DataMigration("migrate_execution_steps_status", "chat", _migrate_execution_steps_batch),
+]
 
 
 def _ensure_column(conn: sqlite3.Connection, table: str, column: str, col_type: str):
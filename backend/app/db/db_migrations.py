@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: 版本化 schema 迁移 + 可续跑后台数据迁移
+#   【病根】DatabaseManager.init 每次启动对三库全量重跑建表脚本 + 逐列 _ensure_column(PRAGMA table_info) + 建索引,
+#          并在 init_chat_db 末尾同步跑 migrate_execution_steps_status: 首次升级时在启动路径上一次 fetchall 全表改写,
+#          chat_messages 大时启动被拖住; 迁移是否执行靠各迁移自管的 schema_migrations 表, 没有统一版本
+#   【改法】①每库 schema_version 表(一行 = 一个已应用版本), 迁移按 Migration(version, name, apply) 有序登记(db_initializer),
+#            启动只查一次 MAX(version): 已是最新即返回; 落后才逐个应用, 每个迁移与其版本行同一事务提交
+#          ②长耗时数据迁移登记为 DataMigration, 启动后由 DataMigrationRunner 后台线程分批执行: 每批与进度游标(data_migrations)
+#            同一事务提交, 中途退出/崩溃下次启动从游标续跑; 批间让出写连接, 前台写入不被长事务挡住
+#   【合规】SRP(只管版本/进度登记与执行顺序; 迁移内容在 db_initializer / migrate_steps) + 迁移须幂等(executescript 会先提交, 中途崩溃重跑安全)
+"""
+db_migrations — 版本化 schema 迁移与后台数据迁移
+
+使用方式(db_initializer 登记, DatabaseManager.init 调用):
+    CHAT_MIGRATIONS = [Migration(1, "baseline", _chat_baseline), Migration(2, "...", _fn)]   # 只追加, 不改已发布版本
+    apply_migrations(get_conn, "chat", CHAT_MIGRATIONS)                                     # 启动: 一次版本查询
+
+    DATA_MIGRATIONS = [DataMigration("name", "chat", run_batch)]   # run_batch(conn, cursor, batch_rows) -> (新游标, 改写行数, 是否完成)
+    runner = DataMigrationRunner(get_conn, DATA_MIGRATIONS)
+    runner.start()   # 后台分批; runner.stop() 于 shutdown 在批间停下, 下次启动续跑
+"""
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from app.constants import DB_DATA_MIGRATION_BATCH_ROWS, DB_DATA_MIGRATION_PAUSE
+from app.logger import logger
+from app.utils.time_utils import get_local_iso_timestamp
+
+
+@dataclass(frozen=True)
+class Migration:
+    """schema 迁移: version 从 1 起连续递增; apply(conn) 须幂等"""
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+@dataclass(frozen=True)
+class DataMigration:
+    """后台数据迁移: run_batch(conn, cursor, batch_rows) → (新游标, 改写行数, 是否完成); 游标语义由迁移自定(如已处理到的最大 id)"""
+    name: str
+    db_name: str
+    run_batch: Callable[[sqlite3.Connection, int, int], Tuple[int, int, bool]]
+
+
+def _ensure_version_tables(conn: sqlite3.Connection) -> None:
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT  -- 本地ISO无Z
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_migrations (
+            name TEXT PRIMARY KEY,
+            cursor INTEGER NOT NULL DEFAULT 0,
+            migrated_rows INTEGER NOT NULL DEFAULT 0,
+            completed_at TEXT  -- 本地ISO无Z
+        )
+    ''')
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """库当前 schema 版本; 无 schema_version 表(新库/版本化之前的旧库)为 0"""
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+        return 0
+    return row[0] or 0
+
+
+def apply_migrations(get_conn, db_name: str, migrations: Sequence[Migration]) -> int:
+    """把 db_name 升到 migrations 最新版本, 返回本次应用的迁移数; 已最新时只有一次版本查询"""
+    latest = migrations[-1].version
+    with get_conn(db_name) as conn:
+        version = current_version(conn)
+    if version == latest:
+        logger.info(f"[migrate] {db_name} schema 已是 v{version}")
+        return 0
+    if version > latest:
+        logger.warning(f"[migrate] {db_name} schema v{version} 高于本程序已知 v{latest}(新版本写过该库?), 不做迁移")
+        return 0
+
+    applied = 0
+    for migration in migrations:
+        if migration.version <= version:
+            continue
+        t0 = time.time()
+        with get_conn(db_name) as conn:
+            _ensure_version_tables(conn)
+            migration.apply(conn)
+            conn.execute("INSERT OR REPLACE INTO schema_version(version, name, applied_at) VALUES (?, ?, ?)",
+                         (migration.version, migration.name, get_local_iso_timestamp()))
+        applied += 1
+        logger.info(f"[migrate] {db_name} v{migration.version} {migration.name}: {time.time()-t0:.3f}s")
+    return applied
+
+
+class DataMigrationRunner:
+    """后台数据迁移执行器: 逐个迁移分批跑, 每批与进度游标同一事务提交(可续跑) — 小欧 2026-10-17"""
+
+    def __init__(self, get_conn, migrations: Sequence[DataMigration],
+                 batch_rows: int = DB_DATA_MIGRATION_BATCH_ROWS, pause: float = DB_DATA_MIGRATION_PAUSE):
+        self._get_conn = get_conn
+        self._migrations: List[DataMigration] = list(migrations)
+        self._batch_rows = batch_rows
+        self._pause = pause
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> Optional[threading.Thread]:
+        """起后台 daemon 线程; 无登记迁移返回 None"""
+        if not self._migrations:
+            return None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-data-migration", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """请求在批间停下并等待线程退出(应用 shutdown); 未完成的迁移下次启动从游标续跑"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_until_done(self) -> None:
+        """在调用线程跑完全部迁移(脚本/基准用)"""
+        self._stop.clear()
+        self._run()
+
+    def _run(self) -> None:
+        for migration in self._migrations:
+            if self._stop.is_set():
+                return
+            try:
+                self._run_one(migration)
+            except Exception as e:
+                logger.error(f"[migrate] 数据迁移 {migration.name} 失败, 下次启动从上次进度续跑: {e}")
+
+    def _run_one(self, migration: DataMigration) -> None:
+        with self._get_conn(migration.db_name) as conn:
+            row = conn.execute("SELECT cursor, migrated_rows, completed_at FROM data_migrations WHERE name=?",
+                               (migration.name,)).fetchone()
+        if row is not None and row["completed_at"]:
+            return
+        cursor, total = (row["cursor"], row["migrated_rows"]) if row is not None else (0, 0)
+        t0 = time.time()
+        batches = 0
+        logger.info(f"[migrate] 数据迁移 {migration.name} 开始(游标 {cursor})")
+        while not self._stop.is_set():
+            with self._get_conn(migration.db_name) as conn:
+                cursor, changed, done = migration.run_batch(conn, cursor, self._batch_rows)
+                total += changed
+                conn.execute(
+                    "INSERT INTO data_migrations(name, cursor, migrated_rows, completed_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET cursor=excluded.cursor, migrated_rows=excluded.migrated_rows, "
+                    "completed_at=excluded.completed_at",
+                    (migration.name, cursor, total, get_local_iso_timestamp() if done else None),
+                )
+            batches += 1
+            if done:
+                logger.info(f"[migrate] 数据迁移 {migration.name} 完成: 本次 {batches} 批, 累计改写 {total} 行, "
+                            f"{time.time()-t0:.3f}s")
+                return
+            self._stop.wait(self._pause)
+        logger.info(f"[migrate] 数据迁移 {migration.name} 暂停于游标 {cursor}(本次 {batches} 批), 下次启动续跑")
@@ -25,7 +25,7 @@ from app.logger import logger
 
 def _execute_query(sql: str, params: tuple) -> list:
     """公用查询：打开 operations 连接并执行 SQL — 小欧 2026-07-10 M-18"""
-    with db.get_conn("operations") as conn:
+    with db.get_read_conn("operations") as conn:
         return conn.cursor().execute(sql, params).fetchall()
 
 
@@ -45,7 +45,7 @@ def row_to_operation_record(row) -> OperationRecord:
 
 def get_operation(operation_id: str) -> Optional[OperationRecord]:
     try:
-        with db.get_conn("operations") as conn:
+        with db.get_read_conn("operations") as conn:
             cursor = conn.cursor()
             # #24 fix: explicit columns取代SELECT * — 小欧 2026-07-18
             cursor.execute('''SELECT id, operation_id, task_id, operation_type, status,
@@ -63,7 +63,7 @@ def get_operation(operation_id: str) -> Optional[OperationRecord]:
 
 def get_session_operations(task_id: str) -> List[OperationRecord]:
     try:
-        with db.get_conn("operations") as conn:
+        with db.get_read_conn("operations") as conn:
             cursor = conn.cursor()
             cursor.execute(
                 # #24 fix: explicit columns取代SELECT * — 小欧 2026-07-18
@@ -83,7 +83,7 @@ def get_session_operations(task_id: str) -> List[OperationRecord]:
 
 def get_operation_task_id(operation_id: str) -> Optional[str]:
     try:
-        with db.get_conn("operations") as conn:
+        with db.get_read_conn("operations") as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT task_id FROM file_operations WHERE operation_id = ?', (operation_id,))
             row = cursor.fetchone()
@@ -3,6 +3,7 @@
 - 修改人 小欧 2026-07-11
 - 根因：7个独立 handler 写同一文件 → Windows rename 文件锁冲突 → PermissionError 死循环
 - 修复：全局共享一个 handler，消除竞争；doRollover() 加 OSError 保护
+- 小欧 2026-10-17 LogConfig 新增 get_prompt_log_format()(logging.prompt_log_format: jsonl/json)
 """
 
 import logging
@@ -42,6 +43,12 @@ class LogConfig:
     def get_backup_count(cls) -> int:
         return cls._config.get('logging.backup_count', 5)
 
+    @classmethod
+    def get_prompt_log_format(cls) -> str:
+        """prompt 日志格式: jsonl(流式逐条追加, 默认) / json(请求结束一次性写出) — 小欧 2026-10-17"""
+        fmt = str(cls._config.get('logging.prompt_log_format', 'jsonl')).lower()
+        return fmt if fmt in ("jsonl", "json") else "jsonl"
+
 
 # ============================================================
 # SafeRotatingFileHandler
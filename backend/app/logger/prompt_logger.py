@@ -12,12 +12,26 @@
 # 2026-08-13 - 小欧 - 三堂会审修复#35: 删除观察条目重复字段"格式化内容"(与"内容"逐字节相同, 每个观察步骤存两份全文)
 #   【病根】2026-08-12补"内容"后L409 `entry["格式化内容"]=observation_content` 与"内容"完全重复, 大工具结果(读文件/长SQL输出)日志体积/IO/磁盘双倍开销, 违DRY
 #   【改法】删除"格式化内容"赋值, 保留"原始内容"兼容分析脚本; 已grep确认全仓无调用方依赖"格式化内容"键
+# 2026-10-17 - 小欧 - 新增流式 JSONL 模式(logging.prompt_log_format=jsonl, 默认)
+#   【病根】整次请求的日志(每轮工具定义摘要、每个 chunk 的步骤产出)全部堆在 contextvar 字典里, save() 时一次性
+#          indent 序列化写出: 长任务内存随轮次线性增长, 结束瞬间产生大块序列化+写盘尖峰; 且只存消息摘要, 无法还原完整 prompt
+#   【改法】_emit 统一出口: jsonl 模式每条记录即时追加一行(每轮 LLM 调用后 flush), 内存只留基本信息;
+#          LLM 调用记录完整 prompt: tools 数组与每条消息按内容 sha1 寻址, 同一文件只写一次(记录"块");
+#          消息列表记为"基于上一轮 + 保留前 k 条 + 追加新消息哈希", 未变前缀不重复写; load_prompt_log() 还原每轮完整 prompt
+#   【合规】json 模式(旧格式)行为不变; 读取端 load_prompt_log + scripts/prompt_log_reader.py
+# 2026-10-17 - 小欧 - 流式写出端的异常路径收尾
+#   【病根】任务在 save() 之前异常退出(runner 的 finally 中 step_writer.close/task_cleanup 抛错、流态缓冲不存在等)时,
+#          .jsonl.part 与其打开的 fd 一直留着: fd 随进程泄漏, .part 永不改名, 日志目录里越积越多
+#   【改法】①save() 收尾放 finally: 写结束记录/改名失败也关 fd 并清当前日志
+#          ②_JsonlSink.__del__ 兜底: 请求上下文回收时 fd 仍开着 → 关闭并把 .part 定名为 .jsonl(保留已写记录, 状态停在最后一次更新)
+#          ③sweep_stale_parts(): 应用启动时把闲置超 PROMPT_LOG_PART_STALE_SECONDS 的遗留 .part 定名为 .jsonl(崩溃/强杀遗留)
 """
 Prompt 日志记录器 - 记录 Prompt 组装全过程
 
 【功能】记录每次请求的 prompt 组装过程,便于调试和分析
-【存放】backend/logs/prompt-logs/ 目录下,每次请求一个 JSON 文件
-【格式】JSON 文件,可用文本编辑器查看
+【存放】backend/logs/prompt-logs/ 目录下,每次请求一个文件
+【格式】jsonl(默认): 每行一条记录, 边运行边追加, 进行中文件后缀 .jsonl.part, 用 load_prompt_log() 或
+        scripts/prompt_log_reader.py 还原; json: 请求结束一次性写出的缩进 JSON(旧格式), 可用文本编辑器直接查看
 
 创建时间: 2026-03-24 18:30:00
 作者: 小沈
@@ -25,17 +39,105 @@ Prompt 日志记录器 - 记录 Prompt 组装全过程
 更新说明: v1.1 小健 - 修复并发安全问题,使用线程局部存储
 """
 
+import hashlib
 import json
+import os
+import time
 import uuid
 import contextvars
 from app.utils.time_utils import now_str, timestamp_for_filename
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
+from app.constants import PROMPT_LOG_PART_STALE_SECONDS
 from app.utils.json_utils import safe_json_dumps
 from app.services.chat.storage import get_user_message_id
 from app.db import db
 from app.logger import logger
+from app.logger.config import LogConfig
+
+_BLOCK_HASH_LEN = 16  # 块哈希截取长度(sha1 前 16 位, 单文件内足够区分)
+_PART_SUFFIX = ".part"  # 进行中文件后缀(流式模式 .jsonl.part)
+
+
+def _digest(obj: Any) -> str:
+    """按规范 JSON 计算内容哈希(键排序, 与字典顺序无关) — 小欧 2026-10-17"""
+    raw = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:_BLOCK_HASH_LEN]
+
+
+class _JsonlSink:
+    """单次请求的流式 JSONL 写出端 — 小欧 2026-10-17
+
+    每条记录一行 {"记录": 分区名, ...条目}; 大负载以"块"记录按内容哈希写一次:
+      {"记录": "块", "哈希": h, "数据": ...}
+    LLM 调用记录的完整 prompt:
+      "工具引用": tools 块哈希
+      "消息引用": {"基于": 上一次调用序号或 None, "保留": 沿用其前 k 条, "追加": [新消息块哈希]}
+    只在内存保留: 已写块哈希集合 + 上一轮消息列表(比对公共前缀用), 与轮次数无关。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fh = open(path, "w", encoding="utf-8")
+        self._blocks: set = set()
+        self._call_seq = -1  # 已写 LLM 调用记录序号
+        self._prev_messages: List[Dict[str, Any]] = []
+
+    def write(self, section: str, entry: Dict[str, Any], flush: bool = False) -> None:
+        line = safe_json_dumps({"记录": section, **entry}, ensure_ascii=False)
+        self._fh.write(line + "\n")  # 紧凑 JSON 不含裸换行, 一条记录恰好一行
+        if flush:
+            self._fh.flush()
+
+    def _block(self, data: Any) -> str:
+        h = _digest(data)
+        if h not in self._blocks:
+            self._blocks.add(h)
+            self.write("块", {"哈希": h, "数据": data})
+        return h
+
+    def prompt_refs(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """写出本轮 prompt 所需的新块, 返回引用字段(消息前缀按对象相等比对, 只对新增消息计算哈希)"""
+        keep = 0
+        limit = min(len(messages), len(self._prev_messages))
+        while keep < limit and messages[keep] == self._prev_messages[keep]:
+            keep += 1
+        appended = [self._block(m) for m in messages[keep:]]
+        refs = {
+            "消息引用": {
+                "基于": self._call_seq if self._call_seq >= 0 and keep else None,
+                "保留": keep,
+                "追加": appended,
+            },
+            "工具引用": self._block(tools) if tools else None,
+        }
+        self._call_seq += 1
+        self._prev_messages = list(messages)
+        return refs
+
+    def close(self, final_path: Optional[Path] = None) -> Path:
+        """关闭文件; 给定 final_path 时改名(进行中 .part → 最终文件名)"""
+        self._fh.close()
+        if final_path is not None:
+            os.replace(self.path, final_path)
+            self.path = final_path
+        return self.path
+
+    def __del__(self):
+        """兜底: 未经 save() 收尾就被回收(任务异常退出) → 关 fd, .part 定名为 .jsonl"""
+        fh = getattr(self, "_fh", None)
+        if fh is None or fh.closed:
+            return
+        try:
+            self.close(_finalized_path(self.path))
+        except Exception:
+            pass
+
+
+def _finalized_path(part_path: Path) -> Path:
+    """进行中文件名 → 最终文件名(去掉 .part)"""
+    return part_path.with_name(part_path.name[:-len(_PART_SUFFIX)])
 
 
 class PromptLogger:
@@ -84,18 +186,32 @@ class PromptLogger:
             user_message_id = self._user_id_from_db(session_id)
         
         # 初始化日志数据 — AI消息ID由update_ai_message_id()设置,文件名在save()时生成
-        current_log = {
-            "基本信息": {
-                "时间戳": timestamp,
-                "会话ID": session_id,
-                "用户消息ID": user_message_id,
-                "AI消息ID": None,
-                "用户消息": user_message,
-                "状态": "处理中",
-            },
-            "Prompt组装过程": [],
-            "LLM调用记录": []
+        basic_info = {
+            "时间戳": timestamp,
+            "会话ID": session_id,
+            "用户消息ID": user_message_id,
+            "AI消息ID": None,
+            "用户消息": user_message,
+            "状态": "处理中",
         }
+        if LogConfig.get_prompt_log_format() == "jsonl":
+            # 流式模式: 内存只留基本信息(定文件名) + 写出端, 各分区记录即时落盘 — 小欧 2026-10-17
+            short_id = str(user_message_id)[-6:] if user_message_id else uuid.uuid4().hex[:8]
+            part_path = self.log_dir / f"prompt_{short_id}+{uuid.uuid4().hex[:8]}+{timestamp_for_filename()}.jsonl{_PART_SUFFIX}"
+            try:
+                sink = _JsonlSink(part_path)
+            except OSError as e:
+                logger.error(f"[PromptLogger] 创建流式日志失败, 本次请求不记录: {e}")
+                self._set_current_log(None)
+                return session_id
+            current_log = {"基本信息": basic_info, "_sink": sink}
+            sink.write("基本信息", basic_info, flush=True)
+        else:
+            current_log = {
+                "基本信息": basic_info,
+                "Prompt组装过程": [],
+                "LLM调用记录": []
+            }
         
         # 保存到线程局部存储
         self._set_current_log(current_log)
@@ -106,7 +222,7 @@ class PromptLogger:
     def _user_id_from_db(self, sid: str) -> Optional[int]:
         """P1修复: 改用db.get_conn() SDK+修复裸except"""
         try:
-            with db.get_conn("chat") as conn:
+            with db.get_read_conn("chat") as conn:
                 row = conn.execute(
                     "SELECT id FROM chat_messages WHERE session_id=? AND role='user' ORDER BY id DESC LIMIT 1",
                     (sid,)
@@ -117,12 +233,30 @@ class PromptLogger:
             return None
 
 
-    def update_ai_message_id(self, ai_message_id: str):
-        """拿到真实ai_message_id后更新日志数据 — 小欧 2026-06-23"""
+    @staticmethod
+    def _emit(current_log: Dict[str, Any], section: str, entry: Dict[str, Any], flush: bool = False) -> None:
+        """记录统一出口: jsonl 模式即时写一行, json 模式追加到内存分区列表 — 小欧 2026-10-17"""
+        sink = current_log.get("_sink")
+        if sink is not None:
+            try:
+                sink.write(section, entry, flush=flush)
+            except Exception as e:
+                logger.warning(f"[PromptLogger] 流式写入失败({section}): {e}")
+            return
+        current_log.setdefault(section, []).append(entry)
+
+    def _update_basic_info(self, field: str, value: Any) -> None:
+        """更新基本信息字段; jsonl 模式同时写一条"基本信息更新"(中途崩溃也可还原) — 小欧 2026-10-17"""
         current_log = self._get_current_log()
         if not current_log:
             return
-        current_log["基本信息"]["AI消息ID"] = ai_message_id
+        current_log["基本信息"][field] = value
+        if current_log.get("_sink") is not None:
+            self._emit(current_log, "基本信息更新", {field: value}, flush=True)
+
+    def update_ai_message_id(self, ai_message_id: str):
+        """拿到真实ai_message_id后更新日志数据 — 小欧 2026-06-23"""
+        self._update_basic_info("AI消息ID", ai_message_id)
 
     def log_system_prompt(
         self,
@@ -160,7 +294,7 @@ class PromptLogger:
         if details:
             entry["详情"] = details
         
-        current_log["Prompt组装过程"].append(entry)
+        self._emit(current_log, "Prompt组装过程", entry)
     
     def log_task_prompt(
         self,
@@ -196,7 +330,7 @@ class PromptLogger:
         if context:
             entry["上下文"] = context
         
-        current_log["Prompt组装过程"].append(entry)
+        self._emit(current_log, "Prompt组装过程", entry)
     
     def _summarize_messages(self, messages):
         """消息统计和摘要提取 — 小欧 2026-07-10 M-43"""
@@ -279,8 +413,14 @@ class PromptLogger:
         if not current_log:
             return
         
-        message_stats, message_summaries = self._summarize_messages(messages)
-        tools_summary = self._summarize_tools(tools)
+        sink = current_log.get("_sink")
+        if sink is not None:
+            message_stats: Dict[str, int] = {}
+            for msg in messages or []:
+                role = msg.get("role", "unknown")
+                message_stats[role] = message_stats.get(role, 0) + 1
+        else:
+            message_stats, message_summaries = self._summarize_messages(messages)
 
         entry = {
             "轮次": round_number,
@@ -288,12 +428,19 @@ class PromptLogger:
             "模型": model,
             "提供商": provider,
             "消息统计": message_stats,
-            "消息总数": len(messages),
-            "消息摘要": message_summaries,
+            "消息总数": len(messages or []),
             "工具数量": len(tools) if tools else 0,
-            "工具定义": tools_summary,
             "时间戳": now_str()
         }
+        if sink is not None:
+            # 流式模式记完整 prompt(块引用, 未变前缀/工具定义不重复写), 摘要由读取端按需从完整内容生成 — 小欧 2026-10-17
+            try:
+                entry.update(sink.prompt_refs(messages or [], tools))
+            except Exception as e:
+                logger.warning(f"[PromptLogger] 写入prompt块失败: {e}")
+        else:
+            entry["消息摘要"] = message_summaries
+            entry["工具定义"] = self._summarize_tools(tools)
         
         if extra_params:
             # 已经用工具数量和工具定义替代了原来的 tool_count
@@ -301,7 +448,7 @@ class PromptLogger:
             if extra_params:
                 entry["额外参数"] = extra_params
         
-        current_log["LLM调用记录"].append(entry)
+        self._emit(current_log, "LLM调用记录", entry, flush=True)
     
     def log_llm_response(
         self,
@@ -333,6 +480,18 @@ class PromptLogger:
             raw_response = str(raw_response) if raw_response is not None else ""
 
         timestamp = now_str()
+        if current_log.get("_sink") is not None:
+            # 流式模式不回改已写行: 单独记"LLM响应", 读取端按轮次合并进对应调用记录 — 小欧 2026-10-17
+            self._emit(current_log, "LLM响应", {
+                "轮次": round_number,
+                "返回类型": response_type,
+                "原始响应时间": timestamp,
+                "解析结果": response_content,
+                "原始响应": raw_response,
+                "结束原因": finish_reason,
+                "token信息": extra_info or {},
+            }, flush=True)
+            return
         # 查找已有条目更新（不重复追加）— 北京老陈 2026-06-14 — 小欧 2026-07-10 C-08 修复
         # 2026-07-26 小欧 修复更新路径漏写token信息bug，改字段名"额外信息"→"token信息"
         # 2026-08-09 小欧 task004-A2修复: entry构造移入else分支, 消除更新路径整包丢弃的冗余赋值(三堂会审通过)
@@ -361,9 +520,7 @@ class PromptLogger:
         current_log = self._get_current_log()
         if not current_log:
             return
-        if "步骤产出" not in current_log:
-            current_log["步骤产出"] = []
-        current_log["步骤产出"].append({
+        self._emit(current_log, "步骤产出", {
             "轮次": round_number,
             "步骤": step_dict.get("step", 0),
             "步骤类型": step_dict.get("type", ""),
@@ -414,15 +571,13 @@ class PromptLogger:
         if raw_data is not None:
             entry["原始内容"] = raw_data
         
-        current_log["Prompt组装过程"].append(entry)
+        self._emit(current_log, "Prompt组装过程", entry)
 
     def log_status(self, old_status: str, new_status: str, reason: str = ""):
         """记录Agent状态变化到prompt log — 小欧 2026-07-01"""
         current_log = self._get_current_log()
         if not current_log:
             return
-        if "状态变化记录" not in current_log:
-            current_log["状态变化记录"] = []
         entry = {
             "时间": now_str(),
             "旧状态": str(old_status),
@@ -430,16 +585,14 @@ class PromptLogger:
         }
         if reason:
             entry["原因"] = reason
-        current_log["状态变化记录"].append(entry)
+        self._emit(current_log, "状态变化记录", entry)
 
     # 2026-07-18 小欧 删除死代码 mark_completed/mark_error: openai.py 消费者已退出日志层
     # (删除 start_request/mark_completed/mark_error/save/import 全部5处引用), 终态标签统一由
     # 生产者 agent_runner 调 set_terminal_status 设置, 此二方法现已无人调用, 删除避免误导。
     def set_terminal_status(self, label: str) -> None:
         """由生产者按真实终态设状态标签（"已完成"/"异常终止"/"已取消"/"已暂停"）— 小欧 2026-07-18"""
-        current_log = self._get_current_log()
-        if current_log:
-            current_log["基本信息"]["状态"] = label
+        self._update_basic_info("状态", label)
 
     def save(self):
         """保存日志到文件 — 文件名用ai_message_id生成 — 小欧 2026-06-23"""
@@ -459,6 +612,20 @@ class PromptLogger:
         file_timestamp = timestamp_for_filename()
         # #48 fix: 文件名加UUID片段防覆蓋 — 小欧 2026-07-18
         _uid = uuid.uuid4().hex[:8]
+        sink = current_log.get("_sink")
+        if sink is not None:
+            # 流式模式: 记录已逐条落盘, 此处只写结束记录并把 .part 改为最终文件名 — 小欧 2026-10-17
+            try:
+                self._emit(current_log, "结束", {"基本信息": current_log["基本信息"]})
+                path = sink.close(self.log_dir / f"prompt_{short_id}+{_uid}+{file_timestamp}.jsonl")
+                logger.info(f"[PromptLogger] 日志已保存: {path}")
+            except OSError as e:
+                logger.error(f"[PromptLogger] 保存失败: {e}")
+            finally:
+                if not sink._fh.closed:  # 结束记录写失败时 close 未执行, fd 不留给 GC
+                    sink._fh.close()
+                self._set_current_log(None)
+            return
         filename = f"prompt_{short_id}+{_uid}+{file_timestamp}.json"
         log_file_path = self.log_dir / filename
         
@@ -478,6 +645,79 @@ class PromptLogger:
         """获取当前日志数据"""
         return self._get_current_log()
 
+    def sweep_stale_parts(self, max_idle: float = PROMPT_LOG_PART_STALE_SECONDS) -> int:
+        """启动收尾: 闲置超 max_idle 秒的遗留 .jsonl.part 定名为 .jsonl(崩溃/强杀未走 save), 返回处理个数 — 小欧 2026-10-17
+
+        只看闲置时长不看归属: 共用日志目录的其他进程正在写的 .part 每轮 LLM 调用都会刷新 mtime, 不会被误收。
+        """
+        now = time.time()
+        swept = 0
+        for part in self.log_dir.glob(f"*.jsonl{_PART_SUFFIX}"):
+            try:
+                if now - part.stat().st_mtime < max_idle:
+                    continue
+                os.replace(part, _finalized_path(part))
+                swept += 1
+            except OSError as e:
+                logger.warning(f"[PromptLogger] 遗留日志收尾失败: {part.name}: {e}")
+        if swept:
+            logger.info(f"[PromptLogger] 遗留 .part 日志已定名: {swept} 个")
+        return swept
+
+
+def load_prompt_log(path) -> Dict[str, Any]:
+    """读取 prompt 日志并还原为分区结构 — 小欧 2026-10-17
+
+    .json(旧格式)直接返回; .jsonl / .jsonl.part 逐行重放:
+      块按哈希还原, LLM调用记录补"消息"(完整消息列表)/"工具"(完整 tools 数组),
+      "LLM响应"按轮次合并进最近的同轮调用记录, "基本信息更新"/"结束"回写基本信息。
+    """
+    path = Path(path)
+    if path.suffix == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    result: Dict[str, Any] = {"基本信息": {}, "Prompt组装过程": [], "LLM调用记录": []}
+    blocks: Dict[str, Any] = {}
+    call_messages: List[List[Dict[str, Any]]] = []  # 按调用序号的完整消息列表(供后续轮"基于"引用)
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"[load_prompt_log] 第{line_no}行不完整, 停止读取(进行中/异常中断的文件): {path.name}")
+                break
+            section = rec.pop("记录", "")
+            if section == "块":
+                blocks[rec["哈希"]] = rec["数据"]
+            elif section == "基本信息":
+                result["基本信息"] = rec
+            elif section == "基本信息更新":
+                result["基本信息"].update(rec)
+            elif section == "结束":
+                result["基本信息"].update(rec.get("基本信息") or {})
+            elif section == "LLM调用记录":
+                refs = rec.pop("消息引用", None)
+                tools_ref = rec.pop("工具引用", None)
+                if refs is not None:
+                    base = call_messages[refs["基于"]] if refs.get("基于") is not None else []
+                    messages = base[:refs.get("保留", 0)] + [blocks[h] for h in refs.get("追加", [])]
+                    call_messages.append(messages)
+                    rec["消息"] = messages
+                rec["工具"] = blocks.get(tools_ref) if tools_ref else None
+                result["LLM调用记录"].append(rec)
+            elif section == "LLM响应":
+                for call_entry in reversed(result["LLM调用记录"]):
+                    if call_entry.get("轮次") == rec.get("轮次"):
+                        call_entry.update(rec)
+                        break
+                else:
+                    result["LLM调用记录"].append(rec)
+            elif section:
+                result.setdefault(section, []).append(rec)
+    return result
+
 
 # 全局实例
 _prompt_logger = PromptLogger()
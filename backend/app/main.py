@@ -9,6 +9,13 @@
 # 2026-08-12 - 小欧 - A4(方案4.4.3): 注册 tool_routes router(工具测试路由由 health.py 迁出), include_router 加 /api/v1 tags=tools — 小欧 2026-08-12
 # 2026-08-14 - 小欧 - 改名名实相符: model_routes→config_routes(import与挂载变量model_router→config_router); api/v1/chat/sse→execution_stream(chat_execution_router导入同步)
 # 2026-08-14 - 小欧 - monitoring 独立为 app 顶层能力层目录(services/monitoring→app/monitoring), 本文件 import 路径同步
+# 2026-10-17 - 小欧 - shutdown 调 db.close_all() 关闭 SQLite 连接池与 DB 线程池
+# 2026-10-17 - 小欧 - startup 预热工具进程池(tools.isolated_execution 开启时), shutdown 关闭工作进程
+# 2026-10-17 - 小欧 - shutdown 关闭 network 工具共用 HTTP 连接池(close_http_pools)
+# 2026-10-17 - 小欧 - shutdown 关闭 fetchpage 常驻浏览器池(browser_pool)
+# 2026-10-17 - 小欧 - shutdown dispose 数据库工具引擎注册表(dispose_engines)
+# 2026-10-17 - 小欧 - startup 启动回收站后台清理调度(start_cleanup_scheduler, 首轮补清停机期间到期备份), shutdown 停止
+# 2026-10-17 - 小欧 - startup 收尾上次异常退出遗留的 prompt-log .jsonl.part(sweep_stale_parts)
 import sys
 import asyncio
 from typing import Optional
@@ -29,6 +36,10 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 import traceback
 from app.utils.time_utils import get_local_iso_timestamp  # 小欧 2026-08-08 全程统一本地时区
 from app.tools import ensure_tools_registered
+from app.tools.tool_process_pool import tool_process_pool
+from app.tools.network.http_client_sdk import close_http_pools
+from app.tools.network.browser_pool import browser_pool
+from app.tools.toolhelper.db_engines import dispose_engines
 from app.config import get_config, get_code_root
 from pathlib import Path
 import os
@@ -40,10 +51,12 @@ from app.api.v1.tool_routes import router as tool_routes_router  # A4: 工具测
 from app.api.v1.chat import router as chat_router, task_router, execution_stream as chat_execution_router
 from app.api.v1.task_queries import router as task_queries_router
 from app.logger import logger
+from app.logger.prompt_logger import get_prompt_logger
 from app.monitoring import setup_monitoring
 from app.constants import DEFAULT_CORS_ORIGINS
 from app.services.task.task_registry import cleanup_expired_tasks
 from app.db import db
+from app.safety import start_cleanup_scheduler, stop_cleanup_scheduler
 
 logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
@@ -187,9 +200,18 @@ async def startup_event():
     _t1 = _time.time()
     ensure_tools_registered()
     logger.info(f"[启动耗时] ensure_tools_registered: {_time.time()-_t1:.3f}s")
+    _tp = _time.time()
+    tool_process_pool.warm_up()  # 未开启隔离执行时直接返回 0
+    logger.info(f"[启动耗时] tool_process_pool.warm_up: {_time.time()-_tp:.3f}s")
     _t2 = _time.time()
     _start_cleanup_task()
     logger.info(f"[启动耗时] _start_cleanup_task: {_time.time()-_t2:.3f}s")
+    _t3 = _time.time()
+    start_cleanup_scheduler()  # 回收站过期/超限清理在后台线程跑, 备份只唤醒
+    logger.info(f"[启动耗时] start_cleanup_scheduler: {_time.time()-_t3:.3f}s")
+    _t4 = _time.time()
+    get_prompt_logger().sweep_stale_parts()  # 上次崩溃/强杀遗留的进行中日志定名, 不再堆积 .part
+    logger.info(f"[启动耗时] sweep_stale_parts: {_time.time()-_t4:.3f}s")
     logger.info(f"[启动耗时] startup_event 合计: {_time.time()-_t0:.3f}s")
     print(f"当前版本: {app_version}")
     _cfg = get_config()
@@ -204,6 +226,12 @@ async def shutdown_event():
         _cleanup_task_ref.cancel()
     from app.services.lifecycle import reset
     reset()
+    db.close_all()  # 连接池持久连接在此关闭 — 小欧 2026-10-17
+    tool_process_pool.shutdown()  # 工具工作进程在此关闭(atexit 兜底) — 小欧 2026-10-17
+    await close_http_pools()  # network 工具共用 keep-alive 连接在此关闭 — 小欧 2026-10-17
+    browser_pool.shutdown()  # fetchpage 常驻 Chromium 在此关闭 — 小欧 2026-10-17
+    dispose_engines()  # query_sql/execute_sql/get_db_schema 复用的数据库连接池在此关闭 — 小欧 2026-10-17
+    stop_cleanup_scheduler()  # 回收站清理调度线程在此停止(进行中的一轮跑完) — 小欧 2026-10-17
 
 
 @app.get("/")
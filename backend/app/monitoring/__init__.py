@@ -6,12 +6,14 @@
 - KISS: 本文件仅做导出入口,不混入实现逻辑
 - 禁止向后兼容: monitoring.py旧入口已删除,统一从 monitoring/ 包导入
 小欧 2026-08-14 monitoring 独立为 app 顶层能力层目录(services/monitoring→app/monitoring), 包内 import 路径同步
+小欧 2026-10-17 导出 record_metric(业务指标写入门面)
 """
 
 from app.monitoring.collector import MetricType, Metric, MetricsCollector
 from app.monitoring.middleware import (
     MonitoringMiddleware,
     setup_monitoring,
+    record_metric,
     get_metrics_summary,
     get_raw_metrics,
     reset_metrics,
@@ -19,6 +21,7 @@ from app.monitoring.middleware import (
 
 __all__ = [
     "setup_monitoring",
+    "record_metric",
     "get_metrics_summary",
     "get_raw_metrics",
     "reset_metrics",
@@ -5,6 +5,13 @@
 编辑历史:
 # 2026-08-08 - 小欧 - 全程统一本地时区: Metric.timestamp / cutoff_time 由 aware UTC 改 naive 本地, 消除 metrics API summary 每指标 timestamp 的 +00:00 偏移; L30与L94必须同步改否则比较TypeError
 # 2026-08-14 - 小欧 - monitoring 独立为 app 顶层能力层目录(services/monitoring→app/monitoring), 本文件为包内文件移动(无 import 改动)
+# 2026-10-17 - 小欧 - 默认指标新增 stream_buffer_memory_high_water_bytes(GAUGE, 流态缓冲内存高水位)
+# 2026-10-17 - 小欧 - 默认指标新增 tool_process_pool_saturation/wait_seconds/kills_total(工具进程池饱和度/排队/击杀)
+# 2026-10-17 - 小欧 - 默认指标新增 dataframe_cache_events_total(数据分析 DataFrame 缓存命中/未命中/淘汰/旁路文件命中)
+# 2026-10-17 - 小欧 - 默认指标新增 fetchpage_cache_events_total / fetchpage_cache_bytes_saved_total(fetchpage 页面缓存)
+# 2026-10-17 - 小欧 - 默认指标新增 browser_pool_wait_seconds / browser_pool_render_seconds / browser_pool_recycles_total(fetchpage 常驻浏览器池)
+# 2026-10-17 - 小欧 - 默认指标新增 db_engine_events_total / db_schema_cache_events_total(数据库引擎注册表 / 表结构缓存)
+# 2026-10-17 - 小欧 - 默认指标新增 recycle_cleanup_seconds / recycle_reclaimed_bytes_total(回收站后台清理耗时 / 回收字节)
 """
 
 from typing import Dict, List, Optional, Any
@@ -58,6 +65,20 @@ class MetricsCollector:
             "http_response_size_bytes": MetricType.HISTOGRAM,
             "http_requests_in_progress": MetricType.GAUGE,
             "errors_total": MetricType.COUNTER,
+            "stream_buffer_memory_high_water_bytes": MetricType.GAUGE,  # task_state 回收流态缓冲时记录 — 小欧 2026-10-17
+            "tool_process_pool_saturation": MetricType.GAUGE,  # 工具进程池占槽时记录 busy/size — 小欧 2026-10-17
+            "tool_process_pool_wait_seconds": MetricType.HISTOGRAM,  # 工具进程池池满排队时长
+            "tool_process_pool_kills_total": MetricType.COUNTER,  # 工具进程池击杀(labels: tool/reason)
+            "dataframe_cache_events_total": MetricType.COUNTER,  # 数据分析 DataFrame 缓存(labels: event=hit/miss/eviction/sidecar_hit)
+            "fetchpage_cache_events_total": MetricType.COUNTER,  # fetchpage 页面缓存(labels: event=fresh_hits/revalidated/misses/stores)
+            "fetchpage_cache_bytes_saved_total": MetricType.COUNTER,  # fetchpage 页面缓存命中省下的下载字节
+            "browser_pool_wait_seconds": MetricType.HISTOGRAM,  # 浏览器池排队等待槽位耗时
+            "browser_pool_render_seconds": MetricType.HISTOGRAM,  # 浏览器池单次页面渲染耗时
+            "browser_pool_recycles_total": MetricType.COUNTER,  # 浏览器池槽位回收(labels: reason=uses/memory/reset_failed/crash)
+            "db_engine_events_total": MetricType.COUNTER,  # 数据库引擎注册表(labels: event=created/reused/evicted/connect_failed)
+            "db_schema_cache_events_total": MetricType.COUNTER,  # get_db_schema 表结构缓存(labels: event=hits/misses/invalidations)
+            "recycle_cleanup_seconds": MetricType.HISTOGRAM,  # 回收站后台清理(过期+超限)每轮耗时
+            "recycle_reclaimed_bytes_total": MetricType.COUNTER,  # 回收站后台清理释放字节
         }
     
     def _get_metric_type(self, name: str) -> Optional[Any]:
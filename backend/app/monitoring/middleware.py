@@ -2,6 +2,7 @@
 监控中间件模块
 负责HTTP请求监控和门面函数
 小欧 2026-08-14 monitoring 独立为 app 顶层能力层目录(services/monitoring→app/monitoring), 本文件 import 路径同步
+小欧 2026-10-17 新增门面 record_metric, 供业务模块(流态缓冲等)写入指标
 """
 
 import time
@@ -115,6 +116,18 @@ def setup_monitoring(app) -> MetricsCollector:
     return _collector
 
 
+def record_metric(name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+    """
+    记录业务指标(非HTTP中间件来源) — 小欧 2026-10-17
+    
+    Args:
+        name: 指标名称(须已在 MetricsCollector 注册)
+        value: 指标值
+        labels: 标签字典
+    """
+    _collector.record_metric(name=name, value=value, labels=labels)
+
+
 def get_metrics_summary() -> Dict[str, Dict[str, Any]]:
     """
     获取指标摘要
@@ -4,6 +4,7 @@
 # 2026-07-26 - 小沈 - import 路径对应 operation_record/operation_backup 改名+职责理顺
 # 2026-08-12 - 小欧 - A2-内部环(方案4.2.3): FileSafetyConfig 导入改 models, cleanup_expired_backups 导入改 operation_maintenance
 # 2026-08-12 - 小欧 - A1越层前置: safety 整目录由 app.services.safety 提升为顶层 app.safety, 本文件全部 import 由 app.services.safety.xxx 改 app.safety.xxx(配合 tools 禁 app.services 守护规则)
+# 2026-10-17 - 小欧 - 导出回收站后台清理调度 request_cleanup/start_cleanup_scheduler/stop_cleanup_scheduler/cleanup_stats(main 启停 + metrics 观测)
 """Safety 模块 — 安全检查 + 文件操作安全
 
 小欧 2026-07-10 拍平 file_safety/ 目录到 safety/
@@ -27,7 +28,7 @@ from app.safety.operation_rollback import (
     rollback_operation, rollback_session,
 )
 from app.safety.operation_maintenance import (
-    cleanup_expired_backups,
+    cleanup_expired_backups, request_cleanup, start_cleanup_scheduler, stop_cleanup_scheduler, cleanup_stats,
 )
 from app.db.models.operation_models import OperationType, OperationStatus
 
@@ -37,7 +38,7 @@ __all__ = [
     "record_operation", "collect_file_info", "update_op_failed",
     "execute_with_safety", "rollback_operation", "get_operation_task_id",
     "rollback_session", "get_session_operations", "get_operation",
-    "cleanup_expired_backups",
+    "cleanup_expired_backups", "request_cleanup", "start_cleanup_scheduler", "stop_cleanup_scheduler", "cleanup_stats",
     "query_file_operations", "query_tree_operations", "query_sankey_operations",
     "query_animation_operations", "query_mermaid_operations",
     "OperationType", "OperationStatus",
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: 备份内容寻址去重存储(backup_to_recycle_bin 由整份 copytree/copy2 改为 blob + 清单)
+#   【病根】每次 DELETE/MODIFY 前整份复制目标到新时间戳目录, 同一大文件/目录反复修改就反复存全量副本, 备份耗时与回收站占用随次数线性增长
+#   【改法】①文件读一遍同时算摘要(hash_helper.select_hasher)+写临时文件, 按摘要入 .blobs 仓, 内容已存在则丢弃临时文件
+#          ②(路径, size/mtime/ctime/inode)→摘要 进程内记忆, 未变文件再次备份不读内容
+#          ③每次备份 = 清单(相对路径/权限/mtime/摘要) + objects/ 下按摘要硬链接到仓内 blob(不支持硬链接则 reflink, 再不行复制)
+#          ④引用计数 = blob 硬链接数: 备份目录被过期/超限清理删除即减一, gc() 删除只剩仓内一条链接的 blob
+#   【合规】SRP(只管"入库/快照/还原/回收", 备份时机/记录仍在 operation_record, 清理时机仍在 operation_maintenance) + 长路径(to_win_long_path)全链路
+# 2026-10-17 - 小欧 - 接 recycle_ledger 增量记账: 新入仓 blob / 清单 / 非硬链接副本 add, gc 与新增 release(删除单个备份并回收其独占 blob) sub
+# 2026-10-17 - 小欧 - 进程内 (路径, stat)→摘要 记忆改用持久化 digest_cache(重启后未变文件仍免读, 与 collect_file_info 共用);
+#   目录备份先遍历收集文件, 入仓(读+算摘要+写临时文件)经 hash_helper.run_parallel 并行, 链接/清单仍按遍历顺序串行
+"""
+backup_store — 安全快照内容寻址去重存储
+
+回收站布局:
+    <RECYCLE_BIN_PATH>/.blobs/objects/ab/<sha256>      内容仓(每份内容一份)
+    <RECYCLE_BIN_PATH>/<时间戳_uuid>/<源名>/           一次备份(backup_path)
+        .omni_backup_manifest.json                      清单: 条目相对路径/类型/权限/mtime/摘要
+        objects/<sha256>                                 仓内 blob 的硬链接(本次备份引用的内容)
+
+调用约定:
+    backup_path = snapshot(source_path, backup_dir)     # operation_backup.backup_to_recycle_bin
+    is_snapshot(backup_path) → restore(backup_path, target)   # operation_rollback
+    snapshot_info(backup_path)                          # operation_record DELETE 统计(同 collect_file_info 结构)
+    release(backup_path)                                # operation_maintenance 删除单个备份 + 回收其独占 blob, 返回释放字节
+    gc()                                                # 全仓兜底回收无引用 blob(中断残留)
+"""
+import json
+import os
+import shutil
+import stat
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+try:
+    import fcntl  # reflink(FICLONE) 仅 Linux
+except ImportError:
+    fcntl = None
+
+from app.constants import (
+    BACKUP_STORE_DIRNAME, BACKUP_STORE_ALGORITHM, BACKUP_STORE_CHUNK_SIZE,
+)
+from app.logger import logger
+from app.safety.hash_helper import select_hasher, run_parallel
+from app.safety import digest_cache, recycle_ledger
+from app.safety.models import FileSafetyConfig
+from app.utils.file_utils import remove_readonly
+from app.utils.path_utils import to_win_long_path
+from app.utils.time_utils import get_local_iso_timestamp
+
+MANIFEST_NAME = ".omni_backup_manifest.json"
+_MANIFEST_FORMAT = 1
+_FICLONE = 0x40049409
+_TMP_MAX_AGE = 3600  # 入库中断残留的临时文件超过该秒数由 gc 清除
+
+_lock = threading.Lock()  # 串行化"blob 存在判定 + 链接"与 gc 删除, 防 gc 删掉正要被链接的 blob
+_counters = {"files": 0, "deduped": 0, "ingested": 0, "ingested_bytes": 0, "cache_hits": 0, "gc_blobs": 0, "gc_bytes": 0}
+
+
+def _store_root() -> Path:
+    return FileSafetyConfig.RECYCLE_BIN_PATH / BACKUP_STORE_DIRNAME
+
+
+def _blob_path(digest: str) -> str:
+    return to_win_long_path(_store_root() / "objects" / digest[:2] / digest)
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """Linux FICLONE 写时复制克隆(btrfs/xfs 等), 不支持返回 False"""
+    if fcntl is None:
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return True
+    except OSError:
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        return False
+
+
+def _clone_or_copy(src: str, dst: str) -> None:
+    if not _reflink(src, dst):
+        shutil.copyfile(src, dst)
+
+
+def _cached_digest(digest: Optional[str]) -> Optional[str]:
+    """摘要缓存命中且 blob 仍在仓 → 该摘要(不读源文件); 否则 None"""
+    if digest is None or not os.path.exists(_blob_path(digest)):
+        return None
+    with _lock:
+        _counters["cache_hits"] += 1
+        _counters["deduped"] += 1
+    return digest
+
+
+def _ingest(src: str, st: os.stat_result) -> str:
+    """源文件入仓, 返回摘要: 读一遍同时算摘要+写临时文件, 同内容已在仓则丢弃临时文件; 读前读后 stat 不变则记入摘要缓存"""
+    tmp_dir = _store_root() / "tmp"
+    os.makedirs(to_win_long_path(tmp_dir), exist_ok=True)
+    tmp = to_win_long_path(tmp_dir / uuid4().hex)
+    hasher = select_hasher(BACKUP_STORE_ALGORITHM)
+    try:
+        with open(src, "rb") as f, open(tmp, "wb") as out:
+            for chunk in iter(lambda: f.read(BACKUP_STORE_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+                out.write(chunk)
+            st_after = os.fstat(f.fileno())
+        digest = hasher.hexdigest()
+        blob = _blob_path(digest)
+        with _lock:
+            if os.path.exists(blob):
+                os.unlink(tmp)
+                _counters["deduped"] += 1
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.replace(tmp, blob)
+                _counters["ingested"] += 1
+                _counters["ingested_bytes"] += st.st_size
+                recycle_ledger.add(st.st_size)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    if (st_after.st_size, st_after.st_mtime_ns) == (st.st_size, st.st_mtime_ns):  # 读期间被改写则不缓存
+        digest_cache.remember(st, BACKUP_STORE_ALGORITHM, digest)
+    return digest
+
+
+def _link_blob(digest: str, dst: str) -> Optional[int]:
+    """仓内 blob 链接到备份 objects/: 硬链接 → reflink → 复制, 返回额外占用字节(硬链接为 0);
+       blob 已被 gc 返回 None(调用方重新入仓)"""
+    with _lock:
+        blob = _blob_path(digest)
+        if not os.path.exists(blob):
+            return None
+        try:
+            os.link(blob, dst)
+            return 0
+        except OSError:  # 不支持硬链接(FAT/exFAT)或链接数达上限
+            _clone_or_copy(blob, dst)
+            return os.path.getsize(dst)
+
+
+def _add_file(src: str, st: os.stat_result, digest: str, objects: Path, linked: Dict[str, int]) -> str:
+    """已入仓文件链接到本次备份 objects/(同一备份内同内容只链接一次); linked: 摘要 → 额外占用字节"""
+    _counters["files"] += 1
+    if digest not in linked:
+        dst = to_win_long_path(objects / digest)
+        extra = _link_blob(digest, dst)
+        if extra is None:
+            digest = _ingest(src, st)
+            extra = _link_blob(digest, dst)
+            if extra is None:
+                raise OSError(f"blob 入仓后丢失: {digest}")
+        linked[digest] = extra
+    return digest
+
+
+def _raise(err: OSError) -> None:
+    raise err  # os.walk 默认吞掉不可读目录, 备份须整体失败而非静默缺项
+
+
+def _file_entry(rel: str, st: os.stat_result, digest: str) -> Dict[str, Any]:
+    return {"path": rel, "type": "file", "digest": digest, "size": st.st_size,
+            "mode": stat.S_IMODE(st.st_mode), "mtime_ns": st.st_mtime_ns}
+
+
+def snapshot(source_path: Path, backup_dir: Path) -> Path:
+    """备份 source_path(文件或目录, 跟随符号链接, 同 copytree/copy2 默认行为)到 backup_dir/<源名>, 返回 backup_path"""
+    backup_path = backup_dir / source_path.name
+    objects = backup_path / "objects"
+    os.makedirs(to_win_long_path(objects), exist_ok=True)
+    src_long = to_win_long_path(source_path)
+    entries: List[Dict[str, Any]] = []
+    pending: List[Tuple[int, str, os.stat_result]] = []  # 待入仓文件: (entries 下标, 路径, stat)
+    linked: Dict[str, int] = {}
+    try:
+        if os.path.isdir(src_long):
+            for root, dirs, files in os.walk(src_long, onerror=_raise, followlinks=True):
+                dirs.sort()
+                rel_root = os.path.relpath(root, src_long).replace(os.sep, "/")
+                rel_root = "" if rel_root == "." else rel_root
+                st_dir = os.stat(root)
+                entries.append({"path": rel_root, "type": "dir", "mode": stat.S_IMODE(st_dir.st_mode),
+                                "mtime_ns": st_dir.st_mtime_ns})
+                for name in sorted(files):
+                    full = os.path.join(root, name)
+                    st = os.stat(full)
+                    if not stat.S_ISREG(st.st_mode):  # FIFO/套接字/设备文件不备份(copytree 会卡死或失败)
+                        logger.debug(f"[backup_store] 跳过非普通文件: {full}")
+                        continue
+                    rel = f"{rel_root}/{name}" if rel_root else name
+                    pending.append((len(entries), full, st))
+                    entries.append(_file_entry(rel, st, ""))
+            hints = digest_cache.lookup_many([st for _i, _f, st in pending], BACKUP_STORE_ALGORITHM)
+            digests = [_cached_digest(hint) for hint in hints]
+            misses = [i for i, digest in enumerate(digests) if digest is None]
+            for i, digest in zip(misses, run_parallel(lambda i: _ingest(pending[i][1], pending[i][2]), misses)):
+                digests[i] = digest  # 未命中的才读盘+算摘要, 线程池并行
+            for (index, full, st), digest in zip(pending, digests):
+                entries[index]["digest"] = _add_file(full, st, digest, objects, linked)
+            kind = "dir"
+        else:
+            st = os.stat(src_long)
+            digest = _cached_digest(digest_cache.lookup(st, BACKUP_STORE_ALGORITHM)) or _ingest(src_long, st)
+            entries.append(_file_entry("", st, _add_file(src_long, st, digest, objects, linked)))
+            kind = "file"
+        manifest = {"format": _MANIFEST_FORMAT, "algorithm": BACKUP_STORE_ALGORITHM, "kind": kind,
+                    "source": str(source_path), "created_at": get_local_iso_timestamp(), "entries": entries}
+        manifest_path = to_win_long_path(backup_path / MANIFEST_NAME)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+    except BaseException:
+        shutil.rmtree(to_win_long_path(backup_path), ignore_errors=True)  # 半截备份不留(其引用的 blob 由 gc 回收)
+        raise
+    finally:
+        digest_cache.flush()
+    recycle_ledger.add(os.path.getsize(manifest_path) + sum(linked.values()))
+    return backup_path
+
+
+def is_snapshot(backup_path: Path) -> bool:
+    """backup_path 是否为清单式备份(否则为旧版整份复制备份)"""
+    return os.path.isfile(to_win_long_path(Path(backup_path) / MANIFEST_NAME))
+
+
+def _load_manifest(backup_path: Path) -> Dict[str, Any]:
+    with open(to_win_long_path(Path(backup_path) / MANIFEST_NAME), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != _MANIFEST_FORMAT:
+        raise ValueError(f"不支持的备份清单格式: {manifest.get('format')}")
+    return manifest
+
+
+def restore(backup_path: Path, target: Path) -> None:
+    """按清单还原到 target(目录合并覆盖, 同 copytree(dirs_exist_ok=True)); 文件为独立副本(reflink 或复制), 不与备份共享"""
+    manifest = _load_manifest(backup_path)
+    objects = Path(backup_path) / "objects"
+    dir_entries = []
+    for entry in manifest["entries"]:
+        dest = to_win_long_path(target / entry["path"] if entry["path"] else target)
+        if entry["type"] == "dir":
+            os.makedirs(dest, exist_ok=True)
+            dir_entries.append((dest, entry))
+            continue
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        _clone_or_copy(to_win_long_path(objects / entry["digest"]), dest)
+        os.chmod(dest, entry["mode"])
+        os.utime(dest, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+    for dest, entry in reversed(dir_entries):  # 目录属性最后设(先设只读会挡住子项写入; 子项写入会改目录 mtime)
+        os.chmod(dest, entry["mode"])
+        os.utime(dest, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+
+
+def snapshot_info(backup_path: Path) -> Dict[str, Any]:
+    """清单式备份的文件信息, 结构同 operation_record.collect_file_info(单文件 hash 即清单摘要, 同为 sha256)"""
+    manifest = _load_manifest(backup_path)
+    files = [e for e in manifest["entries"] if e["type"] == "file"]
+    if manifest["kind"] == "file":
+        suffix = Path(manifest["source"]).suffix
+        return {"size": files[0]["size"], "is_directory": False, "hash": files[0]["digest"],
+                "extension": suffix.lower() if suffix else None}
+    return {"size": sum(e["size"] for e in files), "is_directory": True, "hash": None, "extension": None}
+
+
+def release(backup_path: Path) -> int:
+    """删除一个清单式备份, 并回收仅被它引用的 blob; 返回释放字节(已记账)。只看本备份引用的摘要, 不扫全仓"""
+    backup_long = to_win_long_path(Path(backup_path))
+    objects_long = os.path.join(backup_long, "objects")
+    freed = 0
+    digests = []
+    if os.path.isdir(objects_long):
+        for entry in os.scandir(objects_long):
+            st = entry.stat()
+            digests.append(entry.name)
+            if st.st_nlink == 1:  # 非硬链接副本(或仓内 blob 已丢失): 独占, 随备份删除释放
+                freed += st.st_size
+    manifest = os.path.join(backup_long, MANIFEST_NAME)
+    if os.path.isfile(manifest):
+        freed += os.path.getsize(manifest)
+    shutil.rmtree(backup_long, onerror=remove_readonly)
+    for digest in digests:
+        blob = _blob_path(digest)
+        with _lock:
+            try:
+                st = os.stat(blob)
+                if st.st_nlink > 1:
+                    continue
+                os.chmod(blob, st.st_mode | 0o200)
+                os.unlink(blob)
+            except OSError:
+                continue
+        freed += st.st_size
+        _counters["gc_blobs"] += 1
+        _counters["gc_bytes"] += st.st_size
+    recycle_ledger.sub(freed)
+    return freed
+
+
+def gc() -> int:
+    """删除无备份引用(硬链接数只剩仓内一条)的 blob 及过期临时文件, 返回删除的 blob 数"""
+    root = _store_root()
+    objects_long = to_win_long_path(root / "objects")
+    removed = 0
+    freed = 0
+    if os.path.isdir(objects_long):
+        for shard in os.listdir(objects_long):
+            shard_path = os.path.join(objects_long, shard)
+            for name in os.listdir(shard_path):
+                blob = os.path.join(shard_path, name)
+                with _lock:
+                    try:
+                        st = os.stat(blob)
+                        if st.st_nlink > 1:
+                            continue
+                        os.chmod(blob, st.st_mode | 0o200)
+                        os.unlink(blob)
+                    except OSError as e:
+                        logger.debug(f"[backup_store] gc 跳过 {blob}: {e}")
+                        continue
+                removed += 1
+                freed += st.st_size
+            try:
+                os.rmdir(shard_path)  # 空分片目录顺手删
+            except OSError:
+                pass
+    tmp_long = to_win_long_path(root / "tmp")
+    if os.path.isdir(tmp_long):
+        now = time.time()
+        for name in os.listdir(tmp_long):
+            tmp = os.path.join(tmp_long, name)
+            try:
+                if now - os.stat(tmp).st_mtime > _TMP_MAX_AGE:
+                    os.unlink(tmp)
+            except OSError:
+                pass
+    if removed:
+        recycle_ledger.sub(freed)
+        _counters["gc_blobs"] += removed
+        _counters["gc_bytes"] += freed
+        logger.info(f"[backup_store] gc 回收 {removed} 个无引用 blob, 释放 {freed / 1024 ** 2:.1f}MB")
+    return removed
+
+
+def store_stats() -> Dict[str, Any]:
+    """仓统计: blob 数/字节 + 累计计数(备份文件数/去重命中/新入仓/摘要缓存命中/gc 回收)"""
+    objects_long = to_win_long_path(_store_root() / "objects")
+    blobs = 0
+    size = 0
+    if os.path.isdir(objects_long):
+        for shard in os.listdir(objects_long):
+            for entry in os.scandir(os.path.join(objects_long, shard)):
+                blobs += 1
+                size += entry.stat().st_size
+    return {**_counters, "blobs": blobs, "blob_bytes": size}
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: 持久化文件摘要缓存(按 stat 键)
+#   【病根】collect_file_info 每次操作后整文件重算 sha256; backup_store 目录备份每个文件都读一遍算摘要(进程内记忆重启即失),
+#          大目录反复 DELETE/MODIFY 时绝大多数文件根本没变
+#   【改法】①键 (算法, st_dev, st_ino) → (st_size, st_mtime_ns, st_ctime_ns, 摘要), 任一变化即视为未命中(改名不改 inode 照样命中);
+#            ctime 不能被 utime 伪造, 防 inode 复用后恰好同大小、mtime 被拷贝工具保留的新文件误命中
+#          ②~/.omniagent/digest_cache.sqlite3 落盘(WAL), 写入先攒批 flush 一次事务; 超 DIGEST_CACHE_MAX_ENTRIES 按写入时间淘汰最旧
+#          ③mtime 距今不足 DIGEST_CACHE_RACY_SECONDS 不缓存(同一时间戳粒度内再次改写 stat 可能不变); st_ino 为 0(FAT 等无 inode 文件系统)不缓存
+#   【合规】SRP(只管"stat 键 → 摘要"存取, 读文件算摘要在 hash_helper / backup_store) + 缓存失败(库损坏/只读)只降级为不缓存, 不影响摘要结果
+"""
+digest_cache — 文件摘要持久化缓存
+
+调用约定:
+    digest = lookup(st, algorithm)          # 未命中返回 None
+    digests = lookup_many(stats, algorithm) # 批量: 每 _QUERY_BATCH 个一条 SQL, 按输入顺序返回
+    remember(st, algorithm, digest)         # st 须为读文件前的 stat, 读完后 stat 不变才应调用
+    flush()                                 # 批量操作结束时落盘(满 _FLUSH_BATCH 条也会自动落盘)
+"""
+import atexit
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.constants import DIGEST_CACHE_FILENAME, DIGEST_CACHE_MAX_ENTRIES, DIGEST_CACHE_RACY_SECONDS
+from app.logger import logger
+
+_DB_PATH = Path.home() / ".omniagent" / DIGEST_CACHE_FILENAME
+_FLUSH_BATCH = 1024
+_QUERY_BATCH = 500  # 单条 IN 查询的 inode 数(低于 SQLite 变量数上限)
+
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+_broken = False  # 打开/写入失败后本进程不再碰库, 只用内存中的待写条目
+_rows: Optional[int] = None  # 落盘条目数(估计值, 超限淘汰时重新计数)
+_pending: Dict[Tuple[str, int, int], Tuple[int, int, int, str, float]] = {}
+_counters = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+
+def _i64(n: int) -> int:
+    """st_ino/st_dev 在 Windows 上可达 2^64, 折成 sqlite 有符号 64 位"""
+    return n - (1 << 64) if n >= (1 << 63) else n
+
+
+def _key(st, algorithm: str) -> Optional[Tuple[str, int, int]]:
+    if not st.st_ino:
+        return None
+    return algorithm.lower(), _i64(st.st_dev), _i64(st.st_ino)
+
+
+def _matches(row, st) -> bool:
+    return row is not None and (row[0], row[1], row[2]) == (st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+
+def _connect_locked() -> Optional[sqlite3.Connection]:
+    global _conn, _broken
+    if _conn is None and not _broken:
+        try:
+            _DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(_DB_PATH), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS digests(algorithm TEXT, dev INTEGER, ino INTEGER, size INTEGER, "
+                "mtime_ns INTEGER, ctime_ns INTEGER, digest TEXT, stored_at REAL, PRIMARY KEY(algorithm, ino, dev))")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_digests_stored_at ON digests(stored_at)")
+            _conn = conn
+        except (sqlite3.Error, OSError) as e:
+            _broken = True
+            logger.warning(f"[digest_cache] 打开摘要缓存失败({_DB_PATH}), 本进程不落盘: {e}")
+    return _conn
+
+
+def lookup(st, algorithm: str) -> Optional[str]:
+    """按 stat 查缓存摘要: inode 相同且 size/mtime_ns/ctime_ns 未变才命中"""
+    key = _key(st, algorithm)
+    if key is None:
+        return None
+    with _lock:
+        row = _pending.get(key)
+        if row is None:
+            conn = _connect_locked()
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        "SELECT size, mtime_ns, ctime_ns, digest FROM digests WHERE algorithm=? AND ino=? AND dev=?",
+                        (key[0], key[2], key[1])).fetchone()
+                except sqlite3.Error as e:
+                    logger.debug(f"[digest_cache] 查询失败: {e}")
+        if _matches(row, st):
+            _counters["hits"] += 1
+            return row[3]
+        _counters["misses"] += 1
+        return None
+
+
+def lookup_many(stats: Sequence[Any], algorithm: str) -> List[Optional[str]]:
+    """批量查缓存摘要(stats 中 None 视为未命中), 按输入顺序返回; 大目录一次遍历后批量查, 免逐个加锁查询"""
+    keys = [None if st is None else _key(st, algorithm) for st in stats]
+    rows: Dict[Tuple[str, int, int], Tuple[int, int, int, str]] = {}
+    with _lock:
+        conn = _connect_locked()
+        wanted = [k for k in keys if k is not None and k not in _pending]
+        if conn is not None and wanted:
+            algo = algorithm.lower()
+            try:
+                for i in range(0, len(wanted), _QUERY_BATCH):
+                    inos = sorted({k[2] for k in wanted[i:i + _QUERY_BATCH]})
+                    sql = (f"SELECT dev, ino, size, mtime_ns, ctime_ns, digest FROM digests "
+                           f"WHERE algorithm=? AND ino IN ({','.join('?' * len(inos))})")
+                    for dev, ino, *row in conn.execute(sql, [algo, *inos]):
+                        rows[(algo, dev, ino)] = tuple(row)
+            except sqlite3.Error as e:
+                logger.debug(f"[digest_cache] 批量查询失败: {e}")
+        out: List[Optional[str]] = []
+        for st, key in zip(stats, keys):
+            row = None if key is None else (_pending.get(key) or rows.get(key))
+            if _matches(row, st):
+                _counters["hits"] += 1
+                out.append(row[3])
+            else:
+                _counters["misses"] += 1
+                out.append(None)
+    return out
+
+
+def remember(st, algorithm: str, digest: str) -> None:
+    """记录摘要(st 须为算摘要前的 stat); mtime 过近/无 inode 不记"""
+    key = _key(st, algorithm)
+    if key is None or time.time_ns() - st.st_mtime_ns < DIGEST_CACHE_RACY_SECONDS * 1e9:
+        return
+    with _lock:
+        _pending[key] = (st.st_size, st.st_mtime_ns, st.st_ctime_ns, digest, time.time())
+        _counters["stored"] += 1
+        if len(_pending) >= _FLUSH_BATCH:
+            _flush_locked()
+
+
+def _flush_locked() -> None:
+    global _rows, _broken
+    if not _pending:
+        return
+    conn = _connect_locked()
+    if conn is None:
+        if len(_pending) > _FLUSH_BATCH:  # 不落盘时内存里只留最近一批
+            for k in list(_pending)[:len(_pending) - _FLUSH_BATCH]:
+                del _pending[k]
+        return
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO digests(algorithm, dev, ino, size, mtime_ns, ctime_ns, digest, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [k + v for k, v in _pending.items()])
+        if _rows is None:
+            _rows = conn.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+        else:
+            _rows += len(_pending)  # 同键覆盖也计入, 偏大只会让下次计数提前
+        _pending.clear()
+        if _rows > DIGEST_CACHE_MAX_ENTRIES:
+            _rows = conn.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+            excess = _rows - int(DIGEST_CACHE_MAX_ENTRIES * 0.9)
+            if excess > 0:
+                with conn:
+                    conn.execute("DELETE FROM digests WHERE rowid IN "
+                                 "(SELECT rowid FROM digests ORDER BY stored_at LIMIT ?)", (excess,))
+                _rows -= excess
+                _counters["evicted"] += excess
+    except sqlite3.Error as e:
+        _broken = True
+        logger.warning(f"[digest_cache] 写入摘要缓存失败({_DB_PATH}), 本进程不再落盘: {e}")
+
+
+def flush() -> None:
+    """待写条目一次事务落盘"""
+    with _lock:
+        _flush_locked()
+
+
+def close() -> None:
+    """落盘并关闭连接(进程退出 atexit 兜底); 之后再用会重新打开"""
+    global _conn, _rows
+    with _lock:
+        _flush_locked()
+        if _conn is not None:
+            _conn.close()
+            _conn, _rows = None, None
+
+
+def cache_stats() -> Dict[str, Any]:
+    """命中/未命中/写入/淘汰计数 + 待写条目数"""
+    with _lock:
+        return {**_counters, "pending": len(_pending), "path": str(_DB_PATH), "persistent": not _broken}
+
+
+atexit.register(close)
@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
 # 编辑历史:
 # 2026-08-13 - 小沈 - P2: SUPPORTED_ALGORITHMS 改从 app.constants 导入(消除 safety→tools 常量依赖)
+# 2026-10-17 - 小欧 - 并行批量哈希 + 持久化摘要缓存:
+#   【病根】compute_batch_file_hash 逐个文件串行算, 64KB 小块读; collect_file_info 每次操作后整文件重算, 未变文件也不例外
+#   【改法】①run_parallel: 进程级 HASH_WORKERS 线程池(hashlib 大块 update 释放 GIL, 读盘等待可重叠), 不足 HASH_PARALLEL_MIN_FILES 个在调用线程串行
+#          ②hash_file_cached: 先查 digest_cache(inode+size+mtime_ns+ctime_ns), 未命中才 HASH_READ_BUFFER 大块读算, 读前读后 stat 不变才记入缓存
+#          ③hash_files / compute_batch_file_hash 走 ①+②, 结果按输入顺序; 批末 digest_cache.flush 一次落盘
+#   【合规】compute_file_hash 保持原语义(不查缓存, 支持超时); 缓存只按 stat 判定未变, 与 backup_store 共用同一缓存(同 sha256 一次算两边用)
 """
 哈希计算公共Helper - 统一哈希算法选择和计算
 【创建时间】2026-05-18 小沈
@@ -9,17 +15,29 @@
 包含函数:
 - select_hasher: 统一哈希算法选择(md5/sha1/sha256/sha512)
 - compute_file_hash: 核心哈希计算,返回hexdigest字符串
-- compute_batch_file_hash: 批量哈希计算
+- compute_batch_file_hash: 批量哈希计算(并行 + 摘要缓存)
+- hash_file_cached / hash_files: 带持久化摘要缓存的单个/批量哈希
+- run_parallel: 哈希线程池并行 map(backup_store 目录备份入仓复用)
 
 Author: 小沈 - 2026-05-18
 """
 
 import hashlib
 import os
+import stat
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
 
 from app.constants import SUPPORTED_ALGORITHMS  # P2: 从系统常量导入 — 小沈 2026-08-13
+from app.constants import HASH_WORKERS, HASH_READ_BUFFER, HASH_PARALLEL_MIN_FILES
+from app.safety import digest_cache
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
 
 
 def select_hasher(algorithm: str) -> Any:
@@ -67,36 +85,104 @@ def compute_file_hash(
     return hasher.hexdigest()
 
 
-def compute_batch_file_hash(
-    file_paths: List[str],
-    algorithm: str = "md5",
-    chunk_size: int = 65536,
-) -> Dict[str, Any]:
-    """批量哈希计算 - 小沈 2026-05-18"""
-    results = []
-    success_count = 0
-    failed_count = 0
+def run_parallel(fn: Callable[[_T], _R], items: Sequence[_T]) -> List[_R]:
+    """哈希线程池并行 map, 结果按输入顺序; 任一项抛异常即向上抛 — 小欧 2026-10-17
+    按 HASH_WORKERS*4 份切块提交(每块一个任务), 小文件多时免逐个任务调度开销"""
+    global _executor
+    if len(items) < HASH_PARALLEL_MIN_FILES:
+        return [fn(item) for item in items]
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="hash")
+    size = -(-len(items) // (HASH_WORKERS * 4))
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    return [r for part in _executor.map(lambda chunk: [fn(item) for item in chunk], chunks) for r in part]
+
+
+def _same_stat(a: os.stat_result, b: os.stat_result) -> bool:
+    return (a.st_size, a.st_mtime_ns, a.st_ino, a.st_dev) == (b.st_size, b.st_mtime_ns, b.st_ino, b.st_dev)
+
 
+def _hash_and_remember(file_path: str, st: os.stat_result, algorithm: str, chunk_size: int) -> str:
+    hasher = select_hasher(algorithm)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+        st_after = os.fstat(f.fileno())
+    digest = hasher.hexdigest()
+    if (st_after.st_size, st_after.st_mtime_ns) == (st.st_size, st.st_mtime_ns):  # 读期间被改写则不缓存
+        digest_cache.remember(st, algorithm, digest)
+    return digest
+
+
+def hash_file_cached(file_path: str, algorithm: str = "sha256", chunk_size: int = HASH_READ_BUFFER) -> str:
+    """带摘要缓存的文件哈希: 文件未变(inode/size/mtime_ns/ctime_ns)直接返回缓存摘要 — 小欧 2026-10-17"""
+    if not isinstance(file_path, str) or not file_path.strip():
+        raise ValueError("文件路径不能为空")
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+    st = os.stat(file_path)
+    digest = digest_cache.lookup(st, algorithm)
+    return digest if digest is not None else _hash_and_remember(file_path, st, algorithm, chunk_size)
+
+
+def hash_files(
+    file_paths: Sequence[str],
+    algorithm: str = "sha256",
+    chunk_size: int = HASH_READ_BUFFER,
+) -> List[Dict[str, Any]]:
+    """并行批量哈希(带摘要缓存), 按输入顺序返回 {file_path, hash, algorithm, file_size} 或 {file_path, error} — 小欧 2026-10-17
+    先串行 stat + 批量查缓存, 只有未命中的文件进线程池读盘计算"""
+    results: List[Dict[str, Any]] = []
+    stats: List[Optional[os.stat_result]] = []
     for fp in file_paths:
         try:
             abs_path = os.path.abspath(fp)
-            if not os.path.isfile(abs_path):
-                results.append({"file_path": fp, "error": "文件不存在或不是文件"})
-                failed_count += 1
-                continue
-
-            hash_value = compute_file_hash(abs_path, algorithm, chunk_size)
-            file_size = os.path.getsize(abs_path)
-            results.append({
-                "file_path": abs_path,
-                "hash": hash_value,
-                "algorithm": algorithm,
-                "file_size": file_size,
-            })
-            success_count += 1
+            st = os.stat(abs_path)
+            if not stat.S_ISREG(st.st_mode):
+                raise FileNotFoundError
+            results.append({"file_path": abs_path, "hash": None, "algorithm": algorithm, "file_size": st.st_size})
+            stats.append(st)
+        except (OSError, ValueError):
+            results.append({"file_path": fp, "error": "文件不存在或不是文件"})
+            stats.append(None)
+
+    try:
+        select_hasher(algorithm)
+    except ValueError as e:  # 不支持的算法: 同旧版逐个报错
+        return [r if "error" in r else {"file_path": r["file_path"], "error": str(e)} for r in results]
+
+    misses = []
+    for i, digest in enumerate(digest_cache.lookup_many(stats, algorithm)):
+        if digest is not None:
+            results[i]["hash"] = digest
+        elif stats[i] is not None:
+            misses.append(i)
+
+    def _one(i: int) -> None:
+        try:
+            results[i]["hash"] = _hash_and_remember(results[i]["file_path"], stats[i], algorithm, chunk_size)
         except Exception as e:
-            results.append({"file_path": fp, "error": str(e)})
-            failed_count += 1
+            results[i] = {"file_path": file_paths[i], "error": str(e)}
+
+    try:
+        run_parallel(_one, misses)
+    finally:
+        digest_cache.flush()
+    return results
+
+
+def compute_batch_file_hash(
+    file_paths: List[str],
+    algorithm: str = "md5",
+    chunk_size: int = HASH_READ_BUFFER,
+) -> Dict[str, Any]:
+    """批量哈希计算 - 小沈 2026-05-18
+    小欧 2026-10-17: 改走 hash_files(并行 + 摘要缓存), 返回结构不变
+    """
+    results = hash_files(file_paths, algorithm, chunk_size)
+    failed_count = sum(1 for r in results if "error" in r)
+    success_count = len(results) - failed_count
 
     return {
         "results": results,
@@ -110,5 +196,8 @@ __all__ = [
     "select_hasher",
     "compute_file_hash",
     "compute_batch_file_hash",
+    "hash_file_cached",
+    "hash_files",
+    "run_parallel",
     "SUPPORTED_ALGORITHMS",
 ]
\ No newline at end of file
@@ -9,6 +9,8 @@
 #   (三堂会审: 清理链路 operation_cleanup 需同用长路径, 否则超长备份永远清不掉; 提公共层避免循环依赖)
 # 2026-08-12 - 小欧 - A2-内部环(方案4.2.3步骤3): FileSafetyConfig 导入改 models.py, cleanup_expired_backups 导入改 operation_maintenance.py
 # 2026-08-12 - 小欧 - A1越层前置: safety 整目录由 app.services.safety 提升为顶层 app.safety, 本文件内部 import 路径同步更新(配合 tools 禁 app.services 守护规则)
+# 2026-10-17 - 小欧 - 整份 copytree/copy2 改 backup_store.snapshot(内容寻址去重: blob 按摘要存一份, 本次备份=清单+硬链接), 未变内容备份近零耗时/零占用
+# 2026-10-17 - 小欧 - 备份后 cleanup_expired_backups() 同步清理改 request_cleanup() 唤醒后台调度(限频合并), 备份不再承担回收站全量扫描
 """
 operation_backup — 文件备份到回收站 + 备份路径管理
 
@@ -16,7 +18,6 @@ operation_backup — 文件备份到回收站 + 备份路径管理
 小欧 2026-06-18
 """
 import os
-import shutil
 import threading
 from pathlib import Path
 from typing import Optional
@@ -25,8 +26,9 @@ from uuid import uuid4
 from app.logger import logger
 from app.utils.path_utils import to_win_long_path
 from app.utils.time_utils import timestamp_for_filename
+from app.safety import backup_store
 from app.safety.models import FileSafetyConfig
-from app.safety.operation_maintenance import cleanup_expired_backups
+from app.safety.operation_maintenance import request_cleanup
 
 
 _backup_path = None
@@ -37,21 +39,16 @@ _backup_lock = threading.Lock()
 def backup_to_recycle_bin(source_path: Path) -> Optional[Path]:
     r"""备份文件到回收站 — 小欧 2026-08-11 长路径支持: 源/目标加\\?\前缀,
     解决深嵌套目录(递归自复制套娃)备份时 WinError 206 路径超长整体失败。
+    小欧 2026-10-17 改内容寻址快照: 返回的 backup_path 为清单式备份目录, 还原走 backup_store.restore
     """
     config = FileSafetyConfig()
     try:
         timestamp = timestamp_for_filename()
         backup_dir = config.RECYCLE_BIN_PATH / f"{timestamp}_{uuid4().hex[:8]}"
         os.makedirs(to_win_long_path(backup_dir), exist_ok=True)
-        backup_path = backup_dir / source_path.name
-        src_long = to_win_long_path(source_path)
-        dst_long = to_win_long_path(backup_path)
-        if os.path.isdir(src_long):
-            shutil.copytree(src_long, dst_long)
-        else:
-            shutil.copy2(src_long, dst_long)
+        backup_path = backup_store.snapshot(source_path, backup_dir)
         logger.info(f"File backed up to recycle bin: {source_path} -> {backup_path}")
-        cleanup_expired_backups()
+        request_cleanup()  # 小欧 2026-10-17: 只唤醒后台清理调度, 不在文件操作路径扫盘/删旧备份
         return backup_path
     except Exception as e:
         logger.warning(f"Failed to backup file to recycle bin: {e}")  # 2026-08-11 小欧 error→warning: 备份失败不阻断操作, 仅提示(北京老陈驱动)
@@ -11,69 +11,141 @@
 #   (1)加进程内锁 _cleanup_lock 串行化 cleanup, 锁内重查DB, 后进线程见文件已删→exists=False跳过, 天然幂等
 #   (2)FileNotFoundError(目标已删=目标达成) 降为 debug, 不再报 ERROR
 #   (3)PermissionError(文件被占用/只读残留) 降为 warning, 下次再清; 与 backup_to_recycle_bin 备份失败降warning策略一致
+# 2026-10-17 - 小欧 - 配合 backup_store 内容寻址备份: 有备份被删即 backup_store.gc() 回收无引用 blob; _get_folder_size 硬链接按 inode 只计一次;
+#   超限清理跳过 .blobs 仓目录, 单个备份可释放量只计独占内容(仓外仅本备份引用的 blob)
+# 2026-10-17 - 小欧 - 容量账本 + 后台清理调度(限频):
+#   【病根】每次备份末尾同步 cleanup_expired_backups, 其中 _get_folder_size rglob 全回收站求总量, 备份成本随历史备份总量增长
+#   【改法】①超限判断读 recycle_ledger 账面值, 不扫盘; 删除单个备份按本备份计释放量(清单式走 backup_store.release, 旧版整份复制只遍历该备份)并记账
+#          ②过期+超限清理移入后台调度线程: backup_to_recycle_bin 只 request_cleanup() 唤醒, RECYCLE_CLEANUP_MIN_INTERVAL 内多次请求合并为一次,
+#            无请求时每 RECYCLE_CLEANUP_INTERVAL 定期跑; 账本缺失或满 RECYCLE_LEDGER_RECONCILE_INTERVAL 时在后台全量盘点校准(顺带 backup_store.gc 兜底)
+#          ③cleanup_stats(): 上次耗时/回收字节/删除个数/累计/账面值/上次盘点, GET /metrics/recycle_bin 观测
+#   【合规】文件操作路径零全量扫描; cleanup_expired_backups 仍可同步调用(同一 _cleanup_lock 串行)
 """
 operation_maintenance — 备份回收站维护
 
 职责: 清理过期备份文件 + 回收站超限清理(归口维护职责, 与备份职责 operation_backup 解耦)
+      + 后台清理调度(request_cleanup 唤醒, 限频合并) + 容量账本盘点校准
 小欧 2026-08-12 承接原 operation_cleanup.py
 """
 import os
 import shutil
 import threading
+import time
 from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
 
 _cleanup_lock = threading.Lock()  # #15: 并发串行化清理, 防多工具并行 backup 各自 cleanup 竞态 — 小沈 2026-08-13
 
 from app.db import db
 from app.logger import logger
+from app.monitoring import record_metric
 from app.utils.path_utils import to_win_long_path
 from app.utils.time_utils import get_local_iso_timestamp  # 小欧 2026-08-08 全程统一本地时区
 from app.utils.file_utils import remove_readonly  # P1: 从 utils 导入 — 小沈 2026-08-13
+from app.constants import (
+    BACKUP_STORE_DIRNAME, RECYCLE_LEDGER_FILENAME, RECYCLE_LEDGER_RECONCILE_INTERVAL,
+    RECYCLE_CLEANUP_MIN_INTERVAL, RECYCLE_CLEANUP_INTERVAL,
+)
+from app.safety import backup_store, recycle_ledger
+from app.safety.models import FileSafetyConfig
+
+_scheduler_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+_scheduler_thread: Optional[threading.Thread] = None
+_stats: Dict[str, Any] = {
+    "runs": 0, "last_run_at": None, "last_duration_ms": None, "last_removed": 0, "last_reclaimed_bytes": 0,
+    "total_removed": 0, "total_reclaimed_bytes": 0, "last_reconcile_drift_bytes": None, "last_error": None,
+}
 
 
 def _get_folder_size(path: Path) -> int:
-    """递归计算文件夹总字节数（长路径支持: 深嵌套子项普通Path无法遍历, 需\\?\前缀）"""
+    """递归计算文件夹总字节数（长路径支持: 深嵌套子项普通Path无法遍历, 需\\?\前缀）
+    硬链接(backup_store 备份引用仓内 blob)按 inode 只计一次, 不计账本文件自身。仅用于后台盘点与旧版整份复制备份的单个删除, 文件操作路径不调用"""
     total = 0
+    seen = set()
     try:
         for entry in Path(to_win_long_path(path)).rglob("*"):
-            if entry.is_file():
-                total += entry.stat().st_size
+            if entry.is_file() and not entry.name.startswith(RECYCLE_LEDGER_FILENAME):
+                st = entry.stat()
+                if st.st_nlink > 1:
+                    if (st.st_dev, st.st_ino) in seen:
+                        continue
+                    seen.add((st.st_dev, st.st_ino))
+                total += st.st_size
     except Exception:
         pass
     return total
 
 
-def _cleanup_by_size() -> int:
-    """总大小超过上限时，从最旧的备份开始删"""
-    from app.safety.models import FileSafetyConfig
+def _remove_backup(path: Path) -> int:
+    """删除一个备份(backup_path 形态: 时间戳目录/源名), 记账并返回释放字节; 不存在抛 FileNotFoundError"""
+    long_path = to_win_long_path(path)
+    if backup_store.is_snapshot(path):
+        return backup_store.release(path)
+    if os.path.isdir(long_path):
+        size = _get_folder_size(path)
+        # onerror解决Windows下只读文件备份后无法删除的问题; 长路径rmtree递归删内部超长子项
+        shutil.rmtree(long_path, onerror=remove_readonly)
+    else:
+        size = os.stat(long_path).st_size
+        # 只读文件: chmod加写权限后再删(同remove_readonly逻辑) — 小欧 2026-07-26
+        os.chmod(long_path, os.stat(long_path).st_mode | 0o200)
+        try:
+            os.unlink(long_path)
+        except PermissionError:
+            # 首次chmod可能不够(Windows只读属性), 再试一次更激进
+            os.chmod(long_path, 0o666)
+            os.unlink(long_path)
+    recycle_ledger.sub(size)
+    return size
+
+
+def _reconcile() -> int:
+    """全量盘点回收站实际占用(硬链接计一次)并校准账本; 顺带 backup_store.gc 回收中断残留的无引用 blob。只在后台调度/账本缺失时调用"""
+    backup_store.gc()
+    recycle_path = FileSafetyConfig.RECYCLE_BIN_PATH
+    total = _get_folder_size(recycle_path) if recycle_path.exists() else 0
+    before = recycle_ledger.reset(total)
+    _stats["last_reconcile_drift_bytes"] = None if before is None else before - total
+    logger.info(f"[recycle] 容量盘点: {total / 1024 ** 2:.1f}MB (账面 {'未建账' if before is None else f'{before / 1024 ** 2:.1f}MB'})")
+    return total
+
+
+def _cleanup_by_size() -> Tuple[int, int]:
+    """总大小(账本)超过上限时，从最旧的备份开始删, 返回 (删除备份数, 释放字节)"""
     config = FileSafetyConfig()
     max_bytes = config.RECYCLE_BIN_MAX_SIZE_GB * 1024 ** 3
     recycle_path = config.RECYCLE_BIN_PATH
     if not recycle_path.exists():
-        return 0
+        return 0, 0
 
-    total = _get_folder_size(recycle_path)
+    total = recycle_ledger.total()
+    if total is None:
+        total = _reconcile()
     if total <= max_bytes:
-        return 0
+        return 0, 0
 
     folders = sorted(
-        [p for p in recycle_path.iterdir() if p.is_dir()],
+        [p for p in recycle_path.iterdir() if p.is_dir() and p.name != BACKUP_STORE_DIRNAME],
         key=lambda p: p.name,
     )
     count = 0
+    freed_total = 0
     for folder in folders:
         if total <= max_bytes:
             break
         try:
-            folder_size = _get_folder_size(folder)
+            folder_freed = sum(_remove_backup(child) for child in folder.iterdir())
             # onerror解决Windows下只读文件被copy2备份后属性锁死的问题; 长路径rmtree带\\?\前缀递归删内部超长子项
             shutil.rmtree(to_win_long_path(folder), onerror=remove_readonly)
-            total -= folder_size
+            total -= folder_freed
+            freed_total += folder_freed
             count += 1
-            logger.info(f"Size cleanup: removed {folder.name} (saved {folder_size / 1024**3:.2f}GB)")
+            logger.info(f"Size cleanup: removed {folder.name} (saved {folder_freed / 1024**3:.2f}GB)")
         except Exception as e:
             logger.error(f"Failed to size-cleanup {folder}: {e}")
-    return count
+    return count, freed_total
 
 
 def cleanup_expired_backups() -> int:
@@ -81,13 +153,33 @@ def cleanup_expired_backups() -> int:
     
     shutil.rmtree加onerror是因为Windows下只读文件+备份文件属性继承会导致[WinError 5]
     #15: 加锁串行化, 防多工具并行 backup 各自 cleanup 同批过期记录竞态(见文件头编辑历史) — 小沈 2026-08-13
+    小欧 2026-10-17: 正常由后台调度线程调用(request_cleanup 唤醒), 统计本次耗时/释放字节入 cleanup_stats
     """
     with _cleanup_lock:
-        return _cleanup_expired_backups_locked()
+        t0 = time.perf_counter()
+        error = None
+        try:
+            reconciled = recycle_ledger.reconciled_at()
+            if reconciled is None or time.time() - reconciled > RECYCLE_LEDGER_RECONCILE_INTERVAL:
+                _reconcile()
+            count, freed = _cleanup_expired_backups_locked()
+        except Exception as e:
+            logger.error(f"[recycle] 回收站清理失败: {e}")
+            count, freed, error = 0, 0, str(e)
+        duration = time.perf_counter() - t0
+        _stats.update(runs=_stats["runs"] + 1, last_run_at=get_local_iso_timestamp(),
+                      last_duration_ms=round(duration * 1000, 1), last_removed=count, last_reclaimed_bytes=freed,
+                      total_removed=_stats["total_removed"] + count,
+                      total_reclaimed_bytes=_stats["total_reclaimed_bytes"] + freed, last_error=error)
+    record_metric("recycle_cleanup_seconds", duration)
+    if freed:
+        record_metric("recycle_reclaimed_bytes_total", freed)
+    return count
 
 
-def _cleanup_expired_backups_locked() -> int:
+def _cleanup_expired_backups_locked() -> Tuple[int, int]:
     count = 0
+    freed = 0
     try:
         with db.get_conn("operations") as conn:
             cursor = conn.cursor()
@@ -101,18 +193,7 @@ def _cleanup_expired_backups_locked() -> int:
                     path = Path(backup_path)
                     long_path = to_win_long_path(path)
                     if os.path.exists(long_path):
-                        if os.path.isdir(long_path):
-                            # onerror解决Windows下只读文件备份后无法删除的问题; 长路径rmtree递归删内部超长子项
-                            shutil.rmtree(long_path, onerror=remove_readonly)
-                        else:
-                            # 只读文件: chmod加写权限后再删(同remove_readonly逻辑) — 小欧 2026-07-26
-                            os.chmod(long_path, os.stat(long_path).st_mode | 0o200)
-                            try:
-                                os.unlink(long_path)
-                            except PermissionError:
-                                # 首次chmod可能不够(Windows只读属性), 再试一次更激进
-                                os.chmod(long_path, 0o666)
-                                os.unlink(long_path)
+                        freed += _remove_backup(path)
                         count += 1
                         logger.info(f"Cleaned up expired backup: {backup_path}")
                         # #14修复: 备份形态为 backup_dir(时间戳uuid)/源名, 删完源后父时间戳目录可能变空,
@@ -132,8 +213,73 @@ def _cleanup_expired_backups_locked() -> int:
                     logger.warning(f"Backup cleanup deferred (access denied): {backup_path}: {e}")
                 except Exception as e:
                     logger.error(f"Failed to cleanup backup {backup_path}: {e}")
-        count += _cleanup_by_size()
-        return count
+        size_count, size_freed = _cleanup_by_size()
+        return count + size_count, freed + size_freed
     except Exception as e:
         logger.error(f"Failed to cleanup expired backups: {e}")
-        return count
+        return count, freed
+
+
+# ============================================================
+# 后台清理调度 — 小欧 2026-10-17
+# ============================================================
+
+def _scheduler_loop() -> None:
+    last_run = None
+    while not _stop.is_set():
+        _wake.wait(RECYCLE_CLEANUP_INTERVAL)  # 有请求立即醒, 无请求定期醒
+        if _stop.is_set():
+            break
+        if last_run is not None:
+            gap = last_run + RECYCLE_CLEANUP_MIN_INTERVAL - time.monotonic()
+            if gap > 0 and _stop.wait(gap):  # 限频: 窗口内的多次请求合并为窗口结束后的一次
+                break
+        _wake.clear()
+        cleanup_expired_backups()
+        last_run = time.monotonic()
+
+
+def _ensure_scheduler() -> None:
+    global _scheduler_thread
+    with _scheduler_lock:
+        if _scheduler_thread is not None and _scheduler_thread.is_alive():
+            return
+        _stop.clear()
+        _scheduler_thread = threading.Thread(target=_scheduler_loop, name="recycle-cleanup", daemon=True)
+        _scheduler_thread.start()
+
+
+def request_cleanup() -> None:
+    """请求一次回收站清理(备份后调用): 唤醒后台调度线程即返回, 不在调用方线程扫盘/删备份"""
+    _ensure_scheduler()
+    _wake.set()
+
+
+def start_cleanup_scheduler() -> None:
+    """应用启动: 起调度线程并立即跑一轮(补上停机期间到期的备份; 账本缺失时后台盘点)"""
+    request_cleanup()
+
+
+def stop_cleanup_scheduler(timeout: float = 5.0) -> None:
+    """应用关闭: 停调度线程(正在进行的一轮清理跑完为止, 最多等 timeout 秒)"""
+    global _scheduler_thread
+    with _scheduler_lock:
+        thread, _scheduler_thread = _scheduler_thread, None
+    if thread is None:
+        return
+    _stop.set()
+    _wake.set()
+    thread.join(timeout)
+
+
+def cleanup_stats() -> Dict[str, Any]:
+    """清理调度观测: 运行次数/上次耗时与释放字节/累计释放/账本账面值与上限/上次盘点漂移"""
+    reconciled = recycle_ledger.reconciled_at()
+    return {
+        **_stats,
+        "ledger_bytes": recycle_ledger.total(),
+        "max_bytes": int(FileSafetyConfig.RECYCLE_BIN_MAX_SIZE_GB * 1024 ** 3),
+        "last_reconcile_at": reconciled,
+        "scheduler_alive": _scheduler_thread is not None and _scheduler_thread.is_alive(),
+        "pending": _wake.is_set(),
+    }
@@ -19,6 +19,8 @@
 # 2026-08-12 - 小欧 - A1越层前置: safety 整目录由 app.services.safety 提升为顶层 app.safety, 本文件内部 import 路径同步更新(配合 tools 禁 app.services 守护规则)
 # 2026-08-13 - 小欧 - 三堂会审修复#26: collect_file_info 对目录 os.stat().st_size(Windows 常为0)
 #   → DELETE 空间回收统计 space_impact=0 失真; 改目录 size 递归求和(长路径rglob), 遍历失败回退原值
+# 2026-10-17 - 小欧 - DELETE 统计: 清单式备份(backup_store)从清单取 size/hash, 不再 collect_file_info 遍历备份目录
+# 2026-10-17 - 小欧 - collect_file_info 文件哈希改 hash_file_cached: 未变文件(inode/size/mtime_ns/ctime_ns)取持久化摘要缓存, 不再整文件重读
 """
 operation_record — 操作记录和DB状态管理
 
@@ -37,8 +39,9 @@ from app.logger import logger
 from app.utils.id_utils import generate_operation_id
 from app.utils.path_utils import to_win_long_path
 from app.utils.time_utils import get_local_iso_timestamp, to_local_iso  # 小欧 2026-08-08 全程统一本地时区
-from app.safety.hash_helper import compute_file_hash
+from app.safety.hash_helper import hash_file_cached
 from app.safety.models import FileSafetyConfig  # 小欧 2026-08-12 A2-内部环: 配置数据类独立
+from app.safety import backup_store
 from app.safety.operation_backup import backup_to_recycle_bin
 
 
@@ -51,7 +54,7 @@ def collect_file_info(path: Path) -> Dict[str, Any]:
         return {"size": None, "hash": None, "extension": None, "is_directory": False}
     info = {"size": os.stat(long_path).st_size, "is_directory": os.path.isdir(long_path)}
     if os.path.isfile(long_path):
-        info["hash"] = compute_file_hash(long_path)
+        info["hash"] = hash_file_cached(long_path)
         info["extension"] = Path(long_path).suffix.lower() if Path(long_path).suffix else None
     else:
         # #26修复: 目录size递归求和(原os.stat目录自身大小Windows常为0, DELETE空间回收统计失真→space_impact=0) — 小欧 2026-08-13
@@ -196,7 +199,7 @@ def execute_with_safety(operation_id: str, operation_func, *args, **kwargs) -> T
             cursor = conn.cursor()
             if success:
                 if op_type == OperationType.DELETE.value and backup_path and os.path.exists(to_win_long_path(backup_path)):
-                    info = collect_file_info(backup_path)
+                    info = backup_store.snapshot_info(backup_path) if backup_store.is_snapshot(backup_path) else collect_file_info(backup_path)
                 else:
                     # 2026-08-11 小欧 三堂会审: 目标/源exists()长路径兼容(超长路径普通Path.exists()为False)
                     target = dest_path if dest_path and os.path.exists(to_win_long_path(dest_path)) else source_path if source_path and os.path.exists(to_win_long_path(source_path)) else None
@@ -17,6 +17,7 @@
 # 2026-08-13 - 小欧 - 三堂会审修复#10: MOVE回滚"source被新文件占用→rename为.rollback_bak→移回"链路中,
 #   L87 移回后无清理, .rollback_bak 永久残留; 新增 _bak_renamed 记录并在移回成功后删除
 #   (目录走 rmtree onerror=remove_readonly, 文件走 unlink), 回滚不留残留
+# 2026-10-17 - 小欧 - MODIFY/DELETE 恢复: 清单式备份(backup_store.is_snapshot)按清单还原(文件内容/权限/mtime), 旧版整份复制备份仍走 copytree/copy2
 """
 operation_rollback — 操作回滚
 
@@ -33,6 +34,7 @@ from app.utils.path_utils import to_win_long_path
 from app.utils.time_utils import get_local_iso_timestamp  # 小欧 2026-08-08 全程统一本地时区
 from app.db.models.operation_models import OperationType, OperationStatus
 from app.logger import logger
+from app.safety import backup_store
 from app.utils.file_utils import remove_readonly  # P1: 从 utils 导入 — 小沈 2026-08-13
 
 
@@ -66,7 +68,9 @@ def rollback_operation(operation_id: str) -> bool:
                     os.makedirs(to_win_long_path(source_path.parent), exist_ok=True)
                     backup_long = to_win_long_path(backup_path)
                     src_long = to_win_long_path(source_path)
-                    if os.path.isdir(backup_long):
+                    if backup_store.is_snapshot(backup_path):
+                        backup_store.restore(backup_path, source_path)
+                    elif os.path.isdir(backup_long):
                         shutil.copytree(backup_long, src_long, dirs_exist_ok=True)
                     else:
                         shutil.copy2(backup_long, src_long)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: 回收站容量账本
+#   【病根】每次备份末尾 cleanup_expired_backups → _cleanup_by_size → _get_folder_size rglob 全回收站求总量, 备份成本随历史备份总量增长
+#   【改法】①回收站根下 .ledger.json 持久化总字节数; backup_store 入仓/新建清单 add, 删除备份/回收 blob sub, 文件操作路径不再扫盘
+#          ②账本缺失(首次升级/回收站被手工清空)记为未建账, total() 返回 None, 由清理调度线程后台全量盘点后 reset
+#          ③调度线程按 RECYCLE_LEDGER_RECONCILE_INTERVAL 定期盘点校准(盘点与并发备份交错的少量漂移在下次校准时归零)
+#   【合规】SRP(只管"记账/持久化", 何时盘点/清理归 operation_maintenance) + 进程内锁 + 临时文件 os.replace 原子落盘
+"""
+recycle_ledger — 回收站容量账本
+
+调用约定:
+    add(nbytes) / sub(nbytes)      # backup_store / operation_maintenance 增删备份时记账
+    total() → int | None           # None = 未建账, 需 reset(全量盘点结果)
+    reset(nbytes)                  # operation_maintenance 调度线程盘点后校准
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.constants import RECYCLE_LEDGER_FILENAME
+from app.logger import logger
+from app.safety.models import FileSafetyConfig
+from app.utils.path_utils import to_win_long_path
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {"root": None, "ledger": None}  # root: 载入时的回收站路径(路径变更则重载)
+
+
+def _ledger_path(root: Path) -> str:
+    return to_win_long_path(root / RECYCLE_LEDGER_FILENAME)
+
+
+def _load_locked() -> Optional[Dict[str, Any]]:
+    """持锁调用: 当前回收站的账本(内存缓存, 回收站路径变更则重新读盘); 无账本返回 None"""
+    root = FileSafetyConfig.RECYCLE_BIN_PATH
+    if _state["root"] != root:
+        ledger = None
+        try:
+            with open(_ledger_path(root), "r", encoding="utf-8") as f:
+                ledger = json.load(f)
+            if not isinstance(ledger.get("total_bytes"), int):
+                ledger = None
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"[recycle_ledger] 账本读取失败, 待重新盘点: {e}")
+        _state["root"], _state["ledger"] = root, ledger
+    return _state["ledger"]
+
+
+def _save_locked(ledger: Dict[str, Any]) -> None:
+    root = FileSafetyConfig.RECYCLE_BIN_PATH
+    os.makedirs(to_win_long_path(root), exist_ok=True)
+    path = _ledger_path(root)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(ledger, f)
+    os.replace(tmp, path)
+
+
+def _apply(delta: int) -> None:
+    if not delta:
+        return
+    with _lock:
+        ledger = _load_locked()
+        if ledger is None:  # 未建账: 增量丢弃, 以盘点结果为准
+            return
+        ledger["total_bytes"] = max(0, ledger["total_bytes"] + delta)
+        ledger["updated_at"] = time.time()
+        try:
+            _save_locked(ledger)
+        except OSError as e:
+            logger.warning(f"[recycle_ledger] 账本落盘失败(内存账本仍有效): {e}")
+
+
+def add(nbytes: int) -> None:
+    """新增占用(新入仓 blob / 清单 / 非硬链接副本)"""
+    _apply(int(nbytes))
+
+
+def sub(nbytes: int) -> None:
+    """释放占用(删除备份 / 回收 blob)"""
+    _apply(-int(nbytes))
+
+
+def total() -> Optional[int]:
+    """回收站总字节数; 未建账返回 None"""
+    with _lock:
+        ledger = _load_locked()
+        return None if ledger is None else ledger["total_bytes"]
+
+
+def reconciled_at() -> Optional[float]:
+    """上次全量盘点时间(epoch 秒); 未建账返回 None"""
+    with _lock:
+        ledger = _load_locked()
+        return None if ledger is None else ledger.get("reconciled_at")
+
+
+def reset(nbytes: int) -> Optional[int]:
+    """以全量盘点结果校准账本, 返回校准前的账面值(未建账为 None)"""
+    with _lock:
+        ledger = _load_locked()
+        before = None if ledger is None else ledger["total_bytes"]
+        now = time.time()
+        ledger = {"version": 1, "total_bytes": int(nbytes), "updated_at": now, "reconciled_at": now}
+        _state["ledger"] = ledger
+        _save_locked(ledger)
+    return before
@@ -27,12 +27,19 @@
 #   改为通过 db_ops 命名空间对象注入(调用方stream_orchestrator构造注入), 消除agent→chat反向依赖,
 #   依赖方向变为 chat→agent 单向。db_ops 为 types.SimpleNamespace, 6个属性对应原6个chat函数,
 #   KISS-DIRECT(一个参数替代6个回调, 不引入Protocol/ABC新抽象)。
+# 2026-10-17 - 小欧 - 步骤落库改走 StepWriter(db_ops.create_step_writer 注入): 热循环/异常分支/finally 守卫不再逐事件开事务,
+#   改 writer.submit 入队(相邻 chunk 合并一行, 后台单写者按行数/时间预算批量提交, 事务在工作线程执行不占事件循环);
+#   finally 先 await writer.close() 最终刷写再 finalize; 暂停由 task_runtime._pause_core 经 running_tasks["step_writer"] 显式 flush。
+#   db_ops.allocate_and_insert/append_step 两属性由 create_step_writer 取代(分配并入 writer 首批事务)。
+# 2026-10-17 - 小欧 - finally 的 finalize 改 await db.run(...)(DB 线程池+池化连接), 不再在事件循环上开事务
+# 2026-10-17 - 小欧 - 会话历史加载改 await asyncio.to_thread(db_ops.load_previous, ...), 单次 JOIN 查询在工作线程执行
+# 2026-10-17 - 小欧 - _append 改 buffer.append(分配 seq + 有界压缩落盘), 不再直接操作 event_log 列表
 """
 agent_runner — agent 后台运行器（与 SSE 传输解耦）
 
 北京老陈 2026-07-12: 将 agent 执行从 HTTP handler 解耦为独立后台任务。
-事件写入 agent_streams[task_id].event_log（append-only，含 seq），
-SSE 连接只从 event_log 按 seq 偏移读取，支持断线重连。 — 小欧 2026-07-12
+事件写入 agent_streams[task_id]（StreamBuffer.append，含 seq），
+SSE 连接只从缓冲按 seq 偏移读取(read_from)，支持断线重连。 — 小欧 2026-07-12
 
 设计原则：
 - SRP: 本模块是"生产者"单一职责，只负责运行 agent + 写事件缓冲
@@ -77,11 +84,11 @@ async def run_agent_in_background(
     start_time: Optional[float] = None,
     db_ops: Any = None,  # P4: 持久化操作命名空间(由调用方注入), 消除agent→chat反向依赖 — 小沈 2026-08-13
 ) -> None:
-    """后台运行 agent，事件追加到 event_log，结束置 done。
+    """后台运行 agent，事件追加到流态缓冲，结束置 done。
 
     解决什么问题：前端 SSE 断线时，FastAPI 会取消 handler 协程；
     若 agent 在 handler 内运行，断线即终止 agent。解耦后 agent 在
-    独立后台任务运行，断线不影响，前端可重连读取同一 event_log。 — 小欧 2026-07-12
+    独立后台任务运行，断线不影响，前端可重连读取同一缓冲。 — 小欧 2026-07-12
     """
     # 强引用自身任务, 防止 SSE 消费者断开后任务被 GC 回收→取消→打断 finally 的 DB 保存
     # (功能退化修复: 升级前 LLM 正常/异常结束 DB 均落库, 升级后断流导致任务被回收而丢失结果)
@@ -94,18 +101,22 @@ async def run_agent_in_background(
     buffer = agent_streams.get(task_id)
     current_execution_steps: List[Dict] = []
     end_type = "unknown"
-    ai_message_id: Optional[int] = None  # 首步分配后复用 — 小欧 2026-07-14
+    ai_message_id: Optional[int] = None  # 由 step_writer 首批事务分配, close() 后取回 — 小欧 2026-10-17
 
     # [新] 生产者全权拥有 prompt-log 生命周期(创建) — 小欧 2026-07-18
     get_prompt_logger().start_request(last_message, session_id)
 
+    # 步骤批量写入器: 须在 start_request 之后创建, 写任务继承本任务上下文(分配回调写入同一 prompt-log) — 小欧 2026-10-17
+    step_writer = db_ops.create_step_writer(
+        session_id,
+        on_allocated=lambda mid: get_prompt_logger().update_ai_message_id(str(mid)),
+    ).start()
+
     async def _append(event_dict: Dict) -> None:
         # 注意: current_execution_steps 由各调用点(主循环/异常分支)显式追加,
-        # 此处仅负责写入 event_log + 唤醒消费者, 禁止再 append current_execution_steps,
+        # 此处仅负责写入流态缓冲 + 唤醒消费者, 禁止再 append current_execution_steps,
         # 否则会导致DB步骤被重复累积(实测 SSE=21/DB=42 翻倍) — 小欧 2026-07-13
-        d = dict(event_dict)
-        d["seq"] = len(buffer.event_log)
-        buffer.event_log.append(d)
+        d = buffer.append(dict(event_dict))  # 分配 seq; 热区超限时缓冲自行压缩落盘 — 小欧 2026-10-17
         get_prompt_logger().log_step_yield(d, round_number=d.get("step", 0))
         # 唤醒等待中的消费者: Condition.notify_all 必须在持锁时调用,
         # 否则抛 RuntimeError('cannot notify on un-acquired lock') — 小欧 2026-07-13
@@ -135,6 +146,7 @@ async def run_agent_in_background(
         async with running_tasks_lock:
             if task_id in running_tasks:
                 running_tasks[task_id]["agent"] = agent
+                running_tasks[task_id]["step_writer"] = step_writer  # 暂停路径显式 flush 用 — 小欧 2026-10-17
         llm_service = getattr(agent, "llm_client", None)
         if llm_service is not None and hasattr(llm_service, "context_limit") and llm_service.context_limit:
             agent.message_builder.MAX_CONTEXT_TOKENS = llm_service.context_limit
@@ -153,7 +165,8 @@ async def run_agent_in_background(
         # 加载会话历史，支持多轮对话 — 北京老陈 2026-06-13
         ctx = {}
         if session_id and db_ops and db_ops.load_previous:
-            prev = db_ops.load_previous(session_id)
+            # 同步 DB 读放工作线程, 长会话加载不阻塞事件循环 — 小欧 2026-10-17
+            prev = await asyncio.to_thread(db_ops.load_previous, session_id)
             if prev:
                 ctx["previous_messages"] = prev
         run_context = context or ctx or None
@@ -175,17 +188,9 @@ async def run_agent_in_background(
             # 累积 execution_steps
             if event_dict:
                 current_execution_steps.append(event_dict)
-                # 每步独立事务, 渐进耐久 — 小欧 2026-07-14
-                if ai_message_id is None:
-                    with db.get_conn_with_retry("chat") as conn:
-                        ai_message_id = db_ops.allocate_and_insert(conn, session_id)
-                        get_prompt_logger().update_ai_message_id(str(ai_message_id))
-                        db_ops.append_step(conn, ai_message_id, session_id,
-                                              len(current_execution_steps) - 1, event_dict)
-                else:
-                    with db.get_conn_with_retry("chat") as conn:
-                        db_ops.append_step(conn, ai_message_id, session_id,
-                                              len(current_execution_steps) - 1, event_dict)
+                # 入队由 step_writer 合并+批量落库(渐进耐久不变, 事务数从逐事件降为逐批) — 小欧 2026-10-17
+                step_writer.submit(event_dict)
+                step_writer.raise_if_failed()
             # 更新 current_content / current_thought — 小沈 2026-06-09; 小欧 2026-07-16 增 thought 持久化
             if event_type == "final":
                 content = event_dict.get("response", "") or ""
@@ -227,11 +232,8 @@ async def run_agent_in_background(
         )
         final_dict = final_step.to_dict()
         current_execution_steps.append(final_dict)
-        # 终态 step 立即落库 — 小欧 2026-07-14
-        if ai_message_id is not None:
-            with db.get_conn_with_retry("chat") as conn:
-                db_ops.append_step(conn, ai_message_id, session_id,
-                                      len(current_execution_steps) - 1, final_dict)
+        # 终态 step 入队, finally 的 step_writer.close() 保证落库 — 小欧 2026-10-17
+        step_writer.submit(final_dict)
         await _append(final_dict)
         if stream_state is not None:
             stream_state.current_content = "任务执行失败"  # 兜底: ③路径 response_text 非空, 根治空 bug
@@ -267,10 +269,7 @@ async def run_agent_in_background(
                             outcome=_oc, error_type=_et, error_message=_em)
             _fd = _fs.to_dict()
             current_execution_steps.append(_fd)
-            if ai_message_id is not None:
-                with db.get_conn_with_retry("chat") as conn:
-                    db_ops.append_step(conn, ai_message_id, session_id,
-                                          len(current_execution_steps) - 1, _fd)
+            step_writer.submit(_fd)
             if stream_state is not None and _oc != "completed":
                 stream_state.current_content = _resp or stream_state.current_content
             await _append(_fd)
@@ -295,6 +294,8 @@ async def run_agent_in_background(
         # 此时该任务并非真正完成, 若误标 completed 会让崩溃/异常任务在 DB 被当成成功,
         # 前端会话列表与历史回放都会显示错误终态。失败默认失败, 完成必须显式完成。
         _terminal_status = _STATUS_MAP.get(end_type, "failed")
+        # 完成/取消/失败统一显式刷写: 终态 finalize 前全部步骤落库 — 小欧 2026-10-17
+        ai_message_id = await step_writer.close()
         if current_execution_steps:
             for retry in range(2):
                 try:
@@ -302,8 +303,8 @@ async def run_agent_in_background(
                     saved_thought = stream_state.current_thought if stream_state else ""
                     if ai_message_id is not None:
                         # 步骤已逐步落库, 仅 finalize content+status — 小欧 2026-07-14; 2026-07-16 小欧 增 thought 持久化
-                        with db.get_conn_with_retry("chat") as conn:
-                            db_ops.finalize(conn, ai_message_id, saved_content, _terminal_status, thought=saved_thought)
+                        # 小欧 2026-10-17: 经 db.run 异步门面执行, 不阻塞事件循环
+                        await db.run("chat", db_ops.finalize, ai_message_id, saved_content, _terminal_status, saved_thought)
                     else:
                         # 兜底: ai_message_id未分配时沿用原有写入逻辑 — 小欧 2026-07-14
                         ai_message_id = await db_ops.save_steps(
@@ -708,13 +708,13 @@ async def build_observation(ctx: ObservationContext, merged_other: Optional[Dict
     }
     _pending_op_ids = []
     try:
-        with db.get_conn("operations") as _cf:
+        with db.get_read_conn("operations") as _cf:
             _fo = _cf.execute(
                 "SELECT operation_id FROM file_operations WHERE task_id = ? "
                 "ORDER BY created_at ASC, rowid ASC",
                 (ctx.agent.task_id,),
             ).fetchall()
-        with db.get_conn("task_tracker") as _ct:
+        with db.get_read_conn("task_tracker") as _ct:
             _used = set(r[0] for r in _ct.execute(
                 "SELECT operation_id FROM task_operations WHERE task_id = ?",
                 (ctx.agent.task_id,),
@@ -14,6 +14,14 @@
 # 2026-08-09 - 小欧 - v1.7发送即清(北京老陈 2026-08-09 指示): prepare_messages_for_llm浅拷贝messages后, 由conversation_history源中
 #   立即剔除本轮已发送的_temp_*临时消息(纠偏/推理仅活"本轮发送这一次"), 防死循环长历史中残留/重复携带/污染压缩与持久化;
 #   与终态pop_temp_messages安全网双保险(reasoning-only/纠偏正常脱落)。ast语法✓
+# 2026-10-17 - 小欧 - 增量 token 记账 + tool_call_id 索引
+#   【病根】trim_history 每轮对整个 conversation_history 重算 _estimate_tokens(assistant 的 tool_calls 每次重新 json.dumps),
+#          _trim_to_budget 逐条再估一遍; _append_observation 每个工具结果全表扫描找同 tool_call_id 的 assistant;
+#          长任务(数百条消息)每轮准备上下文的开销随历史总长线性增长
+#   【改法】逐消息字符数缓存 _chars + 累计 _chars_total + tool_call_id→位置索引 _tc_index, 由 _sync_ledger 维护:
+#          其他模块直接 conversation_history.append(react_cycle/answer_handler 既有写法)只增量计新增尾部;
+#          列表被整体替换/缩短(trim/pop_temp/inject/init)才全量重建。token 仍为"总字符//CHARS_PER_TOKEN", 估算结果与原逐次计算逐值一致
+#          prepare_messages_for_llm 无 _temp_* 消息时不再重建 conversation_history 列表(避免每轮触发全量重建)
 """
 MessageBuilder — conversation_history 状态管理器
 
@@ -83,6 +91,12 @@ class MessageBuilder:
         self.MAX_CONTEXT_TOKENS = max_context_tokens
         self._max_rounds: int = get_config().get_max_rounds()  # 最多保留FC轮数(默认100) — 小欧 2026-07-08
         self.last_total_tokens: Optional[int] = None  # 上一轮 LLM 返回的精确 total_tokens（Provider 返回），用于增量触发 — 小欧 2026-07-22
+        # 增量记账(见 _sync_ledger): 跟踪的列表对象 + 逐消息字符数 + 累计字符 + tool_call_id→assistant 位置 — 小欧 2026-10-17
+        self._ledger_list: Optional[List[Dict[str, Any]]] = None
+        self._chars: List[int] = []
+        self._chars_total = 0
+        self._tc_index: Dict[str, int] = {}
+        self._ledger_last: Optional[Dict[str, Any]] = None
 
     def reset_per_run(self) -> None:
         """每次 run_react_cycle 仅重置 conversation_history,缓存和计数保留跨会话"""
@@ -180,12 +194,10 @@ class MessageBuilder:
         """
         tool_call_id = fc_context.get("tool_call_id", "")
         tool_calls = fc_context.get("tool_calls", [])
-        # 检查是否已有相同tool_call_id的assistant消息(并行工具调用场景)
-        has_existing_assistant = any(
-            msg.get("role") == "assistant" and
-            any(tc.get("id") == tool_call_id for tc in (msg.get("tool_calls") or []))
-            for msg in self.conversation_history
-        ) if tool_call_id else False
+        # 检查是否已有相同tool_call_id的assistant消息(并行工具调用场景); 查索引替代全表扫描 — 小欧 2026-10-17
+        if tool_call_id:
+            self._sync_ledger()
+        has_existing_assistant = tool_call_id in self._tc_index if tool_call_id else False
         if tool_calls and not has_existing_assistant:
             llm_content = fc_context.get("llm_content", "") or None
             llm_reasoning = fc_context.get("llm_reasoning", "") or None  # 2026-07-19 小欧 新增reasoning传递
@@ -244,19 +256,24 @@ class MessageBuilder:
         if self.temp_history:
             messages = messages + [dict(msg) for msg in self.temp_history]
         # 剥离内部标记防止泄漏到 LLM 请求(_temp_reasoning/_temp_same_tool_warn) — 小欧 2026-07-19 / 2026-08-08 通用前缀
+        has_temp = False
         for msg in messages:
             for _k in [k for k in msg if k.startswith("_temp_")]:
                 msg.pop(_k, None)
+                has_temp = True
         # 发送即清: 本轮发送的_temp_*临时消息(纠偏/推理)仅活"本轮发送这一次", 已浅拷贝进messages后
         # 由conversation_history源中立即剔除, 防后续轮次/压缩/持久化残留(北京老陈 2026-08-09 指示) — 小欧 2026-08-09
-        self.conversation_history = [m for m in self.conversation_history
-                                     if not any(k.startswith("_temp_") for k in m)]
+        # 无临时消息时保留原列表对象, 增量记账不因每轮换列表而全量重建 — 小欧 2026-10-17
+        if has_temp:
+            self.conversation_history = [m for m in self.conversation_history
+                                         if not any(k.startswith("_temp_") for k in m)]
         return messages
 
     def _cap_temp_history(self):
         """对temp_history加字符容量限制(最多50000字符),从最旧条目开始截断"""
-        while self._total_chars(self.temp_history) > TEMP_HISTORY_CHAR_LIMIT and len(self.temp_history) > 1:
-            self.temp_history.pop(0)
+        total = self._total_chars(self.temp_history)
+        while total > TEMP_HISTORY_CHAR_LIMIT and len(self.temp_history) > 1:
+            total -= self._message_chars(self.temp_history.pop(0))  # 减去弹出条目, 不再每次全量重算 — 小欧 2026-10-17
 
     # =========================================================================
     # 第三组:历史裁剪
@@ -273,7 +290,7 @@ class MessageBuilder:
         - 配对不完整的 FC 对由 _trim_fc_pairs 清理
         """
         try:
-            rough_current = self._estimate_tokens(self.conversation_history)
+            rough_current = self.history_tokens()
             msg_count = len(self.conversation_history)
 
             if msg_count <= 5:
@@ -290,6 +307,7 @@ class MessageBuilder:
 
             system_msgs, user_msgs, obs_list, assistant_msgs = self._classify_messages()
             original_order = {id(m): i for i, m in enumerate(self.conversation_history)}
+            chars_of = self._chars_by_id()
 
             # 条件1: 轮次太多 → 保留最近 self._max_rounds 轮FC完整对
             if msg_count > self._max_rounds * 2 + 2:
@@ -299,9 +317,10 @@ class MessageBuilder:
                 assistant_msgs = [m for m in kept_fc if m.get("role") == "assistant"]
 
             # 条件2: budget = context - COMPACTION_BUFFER - system/user 占用量
-            always_keep_tokens = self._estimate_tokens(system_msgs) + self._estimate_tokens(user_msgs)
+            always_keep_tokens = (sum(chars_of[id(m)] for m in system_msgs) // CHARS_PER_TOKEN
+                                  + sum(chars_of[id(m)] for m in user_msgs) // CHARS_PER_TOKEN)
             available_budget = max(1, self.MAX_CONTEXT_TOKENS - COMPACTION_BUFFER - always_keep_tokens)
-            trimmed = self._trim_to_budget(obs_list, assistant_msgs, available_budget)
+            trimmed = self._trim_to_budget(obs_list, assistant_msgs, available_budget, chars_of)
 
             rebuilt = self._rebuild_and_validate(system_msgs, user_msgs, trimmed)
             if rebuilt is not None:
@@ -333,14 +352,17 @@ class MessageBuilder:
                 system_msgs.append(msg)
         return system_msgs, user_msgs, obs_list, assistant_msgs
 
-    def _trim_to_budget(self, obs_list, assistant_msgs, budget_tokens):
+    def _trim_to_budget(self, obs_list, assistant_msgs, budget_tokens, chars_of: Optional[Dict[int, int]] = None):
         """FC-only: 从最新往最旧扫,按配对收集,简洁高效
 
         策略: 从最后一条消息往前遍历,遇到tool就找其配对assistant一起保留,
         遇到独立消息直接保留,直到budget_tokens用完。剩余的全部丢弃。
         小欧 2026-06-25: 去掉强制保留机制,纯预算裁剪,简单可靠。
         2026-07-22 小欧: _total_chars→_estimate_tokens 统一为 token
+        2026-10-17 小欧: 字符数取记账缓存 chars_of(id→字符数), 不再逐条重算(tool_calls 不再重复 json.dumps)
         """
+        if chars_of is None:
+            chars_of = self._chars_by_id()
         tool_to_assistant = {}
         for msg in assistant_msgs:
             for tc in (msg.get("tool_calls") or []):
@@ -367,9 +389,9 @@ class MessageBuilder:
                 asst = tool_to_assistant[tc_id]
                 asst_already_kept = id(asst) in consumed_ids
                 if asst_already_kept:
-                    need_tokens = self._estimate_tokens([msg])
+                    need_tokens = chars_of[id(msg)] // CHARS_PER_TOKEN
                 else:
-                    need_tokens = self._estimate_tokens([asst, msg])
+                    need_tokens = (chars_of[id(asst)] + chars_of[id(msg)]) // CHARS_PER_TOKEN
                 if used_tokens + need_tokens <= budget_tokens:
                     kept.append(msg)
                     if not asst_already_kept:
@@ -379,7 +401,7 @@ class MessageBuilder:
                 i -= 1
                 continue
 
-            msg_tokens = self._estimate_tokens([msg])
+            msg_tokens = chars_of[id(msg)] // CHARS_PER_TOKEN
             if used_tokens + msg_tokens <= budget_tokens:
                 kept.append(msg)
                 if msg.get("role") == "assistant":
@@ -402,6 +424,45 @@ class MessageBuilder:
             return self.conversation_history[:2] + self.conversation_history[-8:]
         return None
 
+    # =========================================================================
+    # 第三组(续):增量记账 — 小欧 2026-10-17
+    # =========================================================================
+
+    def _sync_ledger(self) -> None:
+        """使记账与 conversation_history 一致: 仅尾部追加时增量计新消息, 列表被替换/缩短时全量重建
+
+        判定依据: 同一列表对象 + 长度不减 + 已记账末条仍是同一对象 → 视为纯追加。
+        (外部模块存在直接 conversation_history.append 的既有写法, 故不能只在本类写入口记账)
+        """
+        hist = self.conversation_history
+        n = len(self._chars)
+        if hist is not self._ledger_list or len(hist) < n or (n and self._ledger_last is not hist[n - 1]):
+            self._ledger_list = hist
+            self._chars = []
+            self._chars_total = 0
+            self._tc_index = {}
+            n = 0
+        for pos in range(n, len(hist)):
+            msg = hist[pos]
+            c = self._message_chars(msg)
+            self._chars.append(c)
+            self._chars_total += c
+            if msg.get("role") == "assistant":
+                for tc in msg.get("tool_calls") or []:
+                    if isinstance(tc, dict) and tc.get("id"):
+                        self._tc_index.setdefault(tc["id"], pos)
+        self._ledger_last = hist[-1] if hist else None
+
+    def history_tokens(self) -> int:
+        """conversation_history 粗估 token(= _estimate_tokens(conversation_history), 增量维护)"""
+        self._sync_ledger()
+        return self._chars_total // CHARS_PER_TOKEN
+
+    def _chars_by_id(self) -> Dict[int, int]:
+        """id(消息)→字符数(裁剪时按对象查缓存)"""
+        self._sync_ledger()
+        return {id(m): c for m, c in zip(self.conversation_history, self._chars)}
+
     # =========================================================================
     # 第四组:observation 辅助
     # =========================================================================
@@ -465,21 +526,24 @@ class MessageBuilder:
         return result
 
     @staticmethod
-    def _total_chars(messages: List[Dict]) -> int:
-        """计算消息列表总字符数 — 含tool_calls JSON
+    def _message_chars(msg: Dict) -> int:
+        """单条消息字符数 — 含tool_calls JSON
 
         FC模式下assistant消息content可为None(tool_calls协议),
         但tool_calls包含JSON负载(tool名/参数/id),必须计入预算。
         """
-        total = 0
-        for msg in messages:
-            content = msg.get("content")
-            total += len(content) if content is not None else 0
-            tool_calls = msg.get("tool_calls")
-            if tool_calls:
-                total += len(json.dumps(tool_calls, ensure_ascii=False))
+        content = msg.get("content")
+        total = len(content) if content is not None else 0
+        tool_calls = msg.get("tool_calls")
+        if tool_calls:
+            total += len(json.dumps(tool_calls, ensure_ascii=False))
         return total
 
+    @staticmethod
+    def _total_chars(messages: List[Dict]) -> int:
+        """计算消息列表总字符数(逐条 _message_chars 求和)"""
+        return sum(MessageBuilder._message_chars(msg) for msg in messages)
+
     @staticmethod
     def _estimate_tokens(messages: List[Dict]) -> int:
         """纯数学估算 token 数 — chars//4，零外部依赖
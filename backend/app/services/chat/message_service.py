@@ -35,7 +35,7 @@ def delete_session_display_names(session_id: str) -> None:
 def get_session_messages(session_id: str):
     """获取会话消息历史(21.3 重构,小沈 2026-05-25 实施) — 自 api/v1/messages.py 迁入"""
     from fastapi import HTTPException
-    with db.get_conn("chat") as conn:
+    with db.get_read_conn("chat") as conn:
         cursor = conn.cursor()
 
         cursor.execute('''SELECT id, title, created_at, updated_at,
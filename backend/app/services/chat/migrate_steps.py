@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 # 编辑历史:
 # 2026-07-18 小欧 #5 fix: _needs_migration final分支补response字段
+# 2026-10-17 小欧 改后台分批: migrate_execution_steps_status(启动时同步全表 fetchall + 自管 schema_migrations 守卫)
+#   → migrate_execution_steps_batch(按主键游标分批), 由 db_migrations.DataMigrationRunner 后台执行并登记进度;
+#   旧 schema_migrations 登记由 chat schema 迁移 v2 并入 data_migrations
 """
 migrate_steps — execution_steps 一次性数据迁移
 
@@ -10,7 +13,7 @@ migrate_steps — execution_steps 一次性数据迁移
   - HITL 用 authorization_required=True
   - 取消终态曾用 FinalStep(type='final', content 含'已取消')
 
-本模块在 init_chat_db 末尾幂等执行一次, 将上述旧表示改写为新统一表示:
+本模块由后台数据迁移分批执行一次(小欧 2026-10-17), 将上述旧表示改写为新统一表示:
   - 删 recoverable
   - incident → type=incident_value(value 注入 step)
   - authorization_required → MetaStep(type='paused', confirm_id=...)
@@ -19,6 +22,7 @@ migrate_steps — execution_steps 一次性数据迁移
 一次性守卫(小欧 2026-07-13): 用 chat 库 schema_migrations 表登记"已执行",
 跑过一次后续启动直接跳过全表扫描。修复前该迁移每次启动无条件全表扫描
 2.5GB 聊天库(3107 行), 单次耗时 ~25s, 是启动变慢根因; 加守卫后启动回到 <1s。
+小欧 2026-10-17: 守卫与进度改由 db_migrations 的 data_migrations 表登记, 首次执行也不再占启动路径。
 
 10规范(DRY): 复用 json_utils.parse_json / safe_json_dumps
 小欧 2026-07-13
@@ -26,9 +30,8 @@ migrate_steps — execution_steps 一次性数据迁移
 # 2026-07-18 小欧 #5 fix: _needs_migration final分支补齐response字段(与_migrate_one_step一致); 取消文本仅存response的历史消息不再漏迁移误判完成
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.logger import logger
 from app.utils.json_utils import parse_json, safe_json_dumps
 from app.services.chat.storage import derive_status_from_steps
 
@@ -114,78 +117,23 @@ def _migrate_one_step(step: dict) -> dict:
     return step
 
 
-MIGRATION_NAME = "migrate_execution_steps_status"
+def migrate_execution_steps_batch(conn, last_id: int, batch_rows: int) -> Tuple[int, int, bool]:
+    """改写 id > last_id 的一批旧 execution_steps → (本批最大 id, 改写行数, 是否已到表尾) — 小欧 2026-10-17
 
-
-def _ensure_migrations_table(conn):
-    """确保迁移记录表存在(chat 库) — 小欧 2026-07-13
-    用于登记"一次性迁移"是否已执行, 避免每次启动重跑。
-    """
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS schema_migrations (
-            name TEXT PRIMARY KEY,
-            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-
-
-def _is_migration_applied(conn, name: str) -> bool:
-    """该一次性迁移是否已执行过 — 小欧 2026-07-13
-
-    用途: 避免每次启动都对 chat_messages 做全表扫描。
-    背景: 该迁移原本每次启动无条件执行, 对 2.5GB 聊天库扫描 3107 行并逐行
-          JSON 解析, 单次耗时约 25s, 是启动变慢的根因。加守卫后只跑一次。
-    """
-    _ensure_migrations_table(conn)
-    cur = conn.cursor()
-    cur.execute("SELECT 1 FROM schema_migrations WHERE name=?", (name,))
-    return cur.fetchone() is not None
-
-
-def _mark_migration_applied(conn, name: str) -> None:
-    """标记该一次性迁移已执行(幂等) — 小欧 2026-07-13"""
-    _ensure_migrations_table(conn)
-    conn.execute("INSERT OR IGNORE INTO schema_migrations(name) VALUES(?)", (name,))
-
-
-def migrate_execution_steps_status(get_conn) -> int:
-    """一次性迁移旧 execution_steps; 返回迁移记录数 — 小欧 2026-07-13
-
-    守卫逻辑(核心修复): 用 chat 库的 schema_migrations 表登记"已执行",
-    跑过一次之后续启动直接跳过整段全表扫描, 启动耗时从 ~25s 回到 ~0s。
-    迁移本身保持幂等: 已迁移的行 _needs_migration 返回 False 不会重复改。
+    由 db_migrations.DataMigrationRunner 在后台分批调用(登记于 db_initializer.DATA_MIGRATIONS), 游标与本批改写同一事务提交,
+    中断后从游标续跑; 按主键范围取批, 不 fetchall 全表。改写本身幂等: 已迁移的行 _needs_migration 返回 False。
     """
-    import time as _time
-    _t0 = _time.time()
-    updated = 0
-    with get_conn("chat") as conn:
-        # 一次性迁移守卫: 已执行过则跳过整段扫描(核心修复) — 小欧 2026-07-13
-        if _is_migration_applied(conn, MIGRATION_NAME):
-            logger.info(f"[migrate] {MIGRATION_NAME} 已执行过, 跳过全表扫描")
-            logger.info(f"[启动耗时] migrate_execution_steps_status: {_time.time()-_t0:.3f}s (skipped)")
-            return 0
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, execution_steps FROM chat_messages WHERE execution_steps IS NOT NULL"
-        )
-        rows = cursor.fetchall()
-        for row in rows:
-            msg_id = row["id"]
-            steps = parse_json(row["execution_steps"], label="execution_steps")
-            if not isinstance(steps, list) or not steps:
-                continue
-            if not _needs_migration(steps):
-                continue
-            new_steps = [_migrate_one_step(s) for s in steps]
-            status = derive_status_from_steps(new_steps)
-            cursor.execute(
-                "UPDATE chat_messages SET execution_steps=?, status=? WHERE id=?",
-                (safe_json_dumps(new_steps), status, msg_id),
-            )
-            updated += 1
-        # 标记已执行, 后续启动跳过扫描
-        _mark_migration_applied(conn, MIGRATION_NAME)
-    if updated:
-        logger.info(f"[migrate] 迁移旧 execution_steps 记录数={updated}")
-    logger.info(f"[启动耗时] migrate_execution_steps_status: {_time.time()-_t0:.3f}s")
-    return updated
+    rows = conn.execute(
+        "SELECT id, execution_steps FROM chat_messages WHERE id > ? AND execution_steps IS NOT NULL ORDER BY id LIMIT ?",
+        (last_id, batch_rows),
+    ).fetchall()
+    updates = []
+    for row in rows:
+        steps = parse_json(row["execution_steps"], label="execution_steps")
+        if not isinstance(steps, list) or not steps or not _needs_migration(steps):
+            continue
+        new_steps = [_migrate_one_step(s) for s in steps]
+        updates.append((safe_json_dumps(new_steps), derive_status_from_steps(new_steps), row["id"]))
+    if updates:
+        conn.executemany("UPDATE chat_messages SET execution_steps=?, status=? WHERE id=?", updates)
+    return (rows[-1]["id"] if rows else last_id), len(updates), len(rows) < batch_rows
@@ -143,7 +143,7 @@ def list_sessions(
     is_valid: Optional[bool] = None,
 ):
     """获取会话列表 — 自 api/v1/sessions.py 迁入"""
-    with db.get_conn("chat") as conn:
+    with db.get_read_conn("chat") as conn:
         cursor = conn.cursor()
 
         where, params = build_list_where(keyword, is_valid, for_count=True)
@@ -244,7 +244,7 @@ def get_session_titles_batch(session_ids: str):
     if len(id_list) > 100:
         raise HTTPException(status_code=400, detail="最多一次查询100个会话")
 
-    with db.get_conn("chat") as conn:
+    with db.get_read_conn("chat") as conn:
         cursor = conn.cursor()
         placeholders = ','.join(['?' for _ in id_list])
         cursor.execute(
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: 运行期步骤合并批量写入器(StepWriter)
+#   【病根】agent_runner 每个事件(含每个 token chunk)都在事件循环上开一次 get_conn_with_retry("chat") 事务并 commit,
+#          一次长回答 commit 数千次; 且 get_conn 的 locked 退避是 time.sleep, 写竞争时直接卡住事件循环。
+#   【改法】①生产者 submit() 仅入内存队列(不碰DB); 相邻同轮同类 chunk 合并为一行(已落库的合并行走 UPDATE 续写)
+#          ②单一后台写任务按 行数(STEP_WRITER_MAX_BATCH)/时间(STEP_WRITER_FLUSH_INTERVAL) 预算攒批,
+#            一批一个事务, 在工作线程中执行(sqlite 连接/locked 退避均不占事件循环)
+#          ③完成/取消走 close(), 暂停走 flush(): 显式刷写, 保证终态前步骤全部落库
+#   【合规】SRP(只管步骤落库, 不管终态 finalize) + KISS-DIRECT(单写者, 无额外线程池/锁表)
+# 2026-10-17 - 小欧 - 批量事务改走 db.run 异步门面(有界 DB 线程池 + 池化写连接), 替代 asyncio.to_thread 默认线程池
+# 2026-10-17 - 小欧 - 写失败不再停写 + flush 不再悬挂:
+#   【病根】①一批写失败即记 error, 此后每批都被 `self.error is None` 挡掉, 终态 FinalStep 也不落库, close() 只记日志
+#          ②flush 的等待条件含 _task.done(), 但只在 notify_all 时复查; _run 在内层 try 之外异常退出(如 _take_batch)无人通知, 暂停路径永久挂起
+#   【改法】①批失败(事务已回滚)→ 逐行各自一个事务重写, 仍失败的行跳过并记 error(生产者经 raise_if_failed 感知), 后续批次照常写;
+#            INSERT 失败的行复位 persisted, 之后合并续写改走 INSERT 而非 UPDATE 空行
+#          ②写任务结束(正常/异常/取消)由 done 回调通知 _cond, flush 必然醒来
+"""
+step_writer — 运行期步骤批量写入器
+
+由 stream_orchestrator 经 db_ops.create_step_writer 注入 agent_runner(P4: agent 不直接 import chat)。
+调用约定:
+    writer = StepWriter(session_id, on_allocated=cb)
+    writer.start()
+    writer.submit(step_dict)   # 同步、非阻塞, 事件循环内调用
+    await writer.flush()       # 暂停等需要"此刻之前全部落库"的时机
+    await writer.close()       # 完成/取消/失败: 最终刷写并停止写任务
+
+行序号 step_index 由写入器自行分配(合并后的 chunk 只占一行), 读取端按 step_index 排序不受影响。
+"""
+
+import asyncio
+from typing import Callable, List, Optional, Tuple
+
+from app.constants import STEP_WRITER_MAX_BATCH, STEP_WRITER_FLUSH_INTERVAL
+from app.db import db
+from app.logger import logger
+from app.utils.json_utils import safe_json_dumps
+from app.utils.time_utils import get_local_iso_timestamp
+from app.services.chat.storage import (
+    allocate_and_insert_message, insert_execution_step_rows,
+    update_execution_step_json, _truncate_step_dict,
+)
+
+
+class _StepRow:
+    """待写步骤行: persisted=已 INSERT 过(后续合并改走 UPDATE) — 小欧 2026-10-17"""
+
+    __slots__ = ("index", "step", "persisted", "queued")
+
+    def __init__(self, index: int, step: dict):
+        self.index = index
+        self.step = step
+        self.persisted = False
+        self.queued = False
+
+
+def _is_mergeable_chunk(tail: Optional[_StepRow], step_dict: dict) -> bool:
+    """同一轮(step)、同一区(is_reasoning)的相邻 chunk 才合并, 思考区/答案区不混写 — 小欧 2026-10-17"""
+    if tail is None or step_dict.get("type") != "chunk":
+        return False
+    prev = tail.step
+    return (prev.get("step") == step_dict.get("step")
+            and bool(prev.get("is_reasoning")) == bool(step_dict.get("is_reasoning")))
+
+
+class StepWriter:
+    """单写者步骤落库器 — 小欧 2026-10-17
+
+    submit 只在事件循环内改内存状态; 序列化在事件循环内完成(行对象仅被本类持有),
+    DB 事务经 db.run 在 DB 线程池执行, 线程只接触已序列化的字符串, 无共享可变状态。
+    批写失败逐行重写, 仍失败的行跳过并记 error(raise_if_failed() 供生产者主循环感知); 后续批次照常写入,
+    终态步骤不因前面的失败丢失。close() 不抛(保证 finally 继续 finalize)。
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        on_allocated: Optional[Callable[[int], None]] = None,
+        max_batch: int = STEP_WRITER_MAX_BATCH,
+        flush_interval: float = STEP_WRITER_FLUSH_INTERVAL,
+    ):
+        self._session_id = session_id
+        self._on_allocated = on_allocated
+        self._max_batch = max_batch
+        self._flush_interval = flush_interval
+
+        self.message_id: Optional[int] = None
+        self.error: Optional[BaseException] = None
+        self.commit_count = 0  # 已提交事务数(观测用)
+
+        self._pending: List[_StepRow] = []
+        self._tail: Optional[_StepRow] = None  # 可继续合并的 chunk 行
+        self._next_index = 0
+        self._submit_seq = 0
+        self._written_seq = 0
+        self._closing = False
+
+        self._has_data = asyncio.Event()
+        self._urgent = asyncio.Event()
+        self._cond = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> "StepWriter":
+        """启动后台写任务(须在运行中的事件循环内调用)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            self._task.add_done_callback(lambda _t: asyncio.ensure_future(self._notify()))  # 异常/取消退出也唤醒 flush
+        return self
+
+    # ── 生产者侧 ─────────────────────────────────────────────
+
+    def submit(self, step_dict: dict) -> None:
+        """入队一步(同步非阻塞)。chunk 合并进尾行; 其余步骤原地截断后入队(SSE 与 DB 所见一致, 同原 append_execution_step)"""
+        if self._closing:
+            logger.warning(f"[StepWriter] 已关闭仍提交步骤, 丢弃: type={step_dict.get('type')}")
+            return
+        self._submit_seq += 1
+        if _is_mergeable_chunk(self._tail, step_dict):
+            row = self._tail
+            row.step["content"] = (row.step.get("content") or "") + (step_dict.get("content") or "")
+            for _k in ("thought", "reasoning"):
+                if step_dict.get(_k):
+                    row.step[_k] = (row.step.get(_k) or "") + step_dict[_k]
+        else:
+            if step_dict.get("type") == "chunk":
+                row = _StepRow(self._next_index, dict(step_dict))  # 副本: 合并只改写入器自有对象, 不改 event_log 中的原事件
+                self._tail = row
+            else:
+                row = _StepRow(self._next_index, _truncate_step_dict(step_dict))
+                self._tail = None
+            self._next_index += 1
+        if not row.queued:
+            row.queued = True
+            self._pending.append(row)
+        self._has_data.set()
+        if len(self._pending) >= self._max_batch:
+            self._urgent.set()
+
+    def raise_if_failed(self) -> None:
+        """写任务失败时向生产者抛出原异常(主循环调用, 走 agent_runner 异常分支)"""
+        if self.error is not None:
+            raise self.error
+
+    async def flush(self) -> None:
+        """等待此刻之前提交的步骤全部落库(暂停时调用)"""
+        if self._task is None:
+            return
+        target = self._submit_seq
+        self._urgent.set()
+        async with self._cond:
+            await self._cond.wait_for(
+                lambda: self._written_seq >= target or self.error is not None or self._task.done())
+
+    async def close(self) -> Optional[int]:
+        """最终刷写并停止写任务, 返回 message_id(未分配为 None)。不抛异常 — 完成/取消/失败统一调用"""
+        self._closing = True
+        self._has_data.set()
+        self._urgent.set()
+        if self._task is not None:
+            try:
+                await asyncio.shield(self._task)
+            except asyncio.CancelledError:
+                # 生产者在 finally 中再次被取消: 写任务仍在 shield 保护下跑完, 此处不阻塞等待
+                logger.warning("[StepWriter] close 等待被取消, 写任务后台继续刷写")
+            except Exception as e:
+                logger.error(f"[StepWriter] 写任务异常退出: {e}", exc_info=True)
+        return self.message_id
+
+    # ── 写者侧 ───────────────────────────────────────────────
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_data.wait()
+            if not self._urgent.is_set():
+                # 时间预算攒批: 最多等 flush_interval, 期间行数达标/flush/close 提前唤醒
+                try:
+                    await asyncio.wait_for(self._urgent.wait(), timeout=self._flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._urgent.clear()
+            self._has_data.clear()
+
+            seq = self._submit_seq
+            rows, batch = self._take_batch()
+            if batch:
+                await self._commit(rows, batch)
+            self._written_seq = seq
+            await self._notify()
+
+            if self._closing and not self._pending:
+                return
+
+    async def _notify(self) -> None:
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def _commit(self, rows: List[_StepRow], batch: List[Tuple[int, str, str, bool]]) -> None:
+        """一批一个事务; 失败(已回滚)则逐行各自一个事务重写, 仍失败的行跳过并记 error"""
+        try:
+            await self._write(batch)
+            return
+        except Exception as e:
+            logger.warning(f"[StepWriter] 批量落库失败, 逐行重写(session={self._session_id}, rows={len(batch)}): {e}")
+        lost = 0
+        for row, item in zip(rows, batch):
+            try:
+                await self._write([item])
+            except Exception as e:
+                lost += 1
+                self.error = e
+                if not item[3]:
+                    row.persisted = False  # 未插入: 之后合并续写须重新 INSERT
+        if lost:
+            logger.error(f"[StepWriter] 逐行重写仍失败, 跳过 {lost}/{len(batch)} 行(session={self._session_id}): {self.error}")
+
+    async def _write(self, batch: List[Tuple[int, str, str, bool]]) -> None:
+        self.message_id, allocated = await db.run("chat", self._write_batch, self.message_id, batch)
+        self.commit_count += 1
+        if allocated and self._on_allocated is not None:
+            self._on_allocated(self.message_id)
+
+    def _take_batch(self) -> Tuple[List[_StepRow], List[Tuple[int, str, str, bool]]]:
+        """摘取待写行并序列化(事件循环内) → (行对象, [(step_index, step_json, created_at, is_update)])"""
+        rows, self._pending = self._pending, []
+        now = get_local_iso_timestamp()
+        batch = []
+        for row in rows:
+            row.queued = False
+            batch.append((row.index, safe_json_dumps(row.step), now, row.persisted))
+            row.persisted = True
+        return rows, batch
+
+    def _write_batch(self, conn, message_id: Optional[int],
+                     batch: List[Tuple[int, str, str, bool]]) -> Tuple[int, bool]:
+        """一批一个事务(DB 线程池内执行, conn 由 db.run 提供); 首批在同一事务内分配 assistant 消息ID"""
+        allocated = False
+        if message_id is None:
+            message_id = allocate_and_insert_message(conn, self._session_id)
+            allocated = True
+        insert_execution_step_rows(
+            conn, message_id, self._session_id,
+            [(idx, js, ts) for idx, js, ts, is_update in batch if not is_update])
+        for idx, js, _ts, is_update in batch:
+            if is_update:
+                update_execution_step_json(conn, message_id, idx, js)
+        return message_id, allocated
@@ -19,6 +19,8 @@
 # 2026-08-13 - 小欧 - 三堂会审修复#1/#9: #1 allocate_and_insert_message 的 local_time 提前到 if is_new 外赋值,
 #   消除 is_new=False(同session二次任务 agent_runner路径)时 UPDATE 引用未绑定变量 NameError;
 #   #9 _truncate_tool_result 递归返回值统一回写父节点, 修复 list 内嵌超长 list 截断失效(如 {"rows":[[…1001…]]})
+# 2026-10-17 - 小欧 - 新增 insert_execution_step_rows/update_execution_step_json, 供 step_writer 批量事务落库与合并 chunk 行续写
+# 2026-10-17 - 小欧 - 新增 load_session_history: 单条 LEFT JOIN 一次取回会话消息+步骤(可选尾部窗口), 替代逐条 load_execution_steps 的 N+1
 """
 storage — 会话存储业务逻辑
 从 conversation_storage.py 移入
@@ -31,7 +33,7 @@ storage — 会话存储业务逻辑
 """
 
 import threading
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from sqlite3 import Connection
 
 from fastapi import HTTPException
@@ -334,6 +336,27 @@ def append_execution_step(conn: Connection, message_id: int, session_id: str,
     )
 
 
+def insert_execution_step_rows(conn: Connection, message_id: int, session_id: str,
+                               rows: List[Tuple[int, str, str]]) -> None:
+    """批量落库已序列化步骤 rows=[(step_index, step_json, created_at)] — 小欧 2026-10-17
+    供 StepWriter 一个事务写一批(executemany), 序列化/截断由调用方在事件循环内完成"""
+    if not rows:
+        return
+    conn.executemany(
+        "INSERT INTO chat_message_steps(message_id, session_id, step_index, step_json, created_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(message_id, session_id, idx, step_json, created_at) for idx, step_json, created_at in rows],
+    )
+
+
+def update_execution_step_json(conn: Connection, message_id: int, step_index: int, step_json: str) -> None:
+    """覆盖已落库步骤的 step_json(合并 chunk 行续写) — 小欧 2026-10-17"""
+    conn.execute(
+        "UPDATE chat_message_steps SET step_json=? WHERE message_id=? AND step_index=?",
+        (step_json, message_id, step_index),
+    )
+
+
 def load_execution_steps(conn: Connection, message_id: int) -> Optional[list]:
     """从 chat_message_steps 表组装步骤列表,无数据时从chat_messages.execution_steps列读取 — 小欧 2026-07-14"""
     rows = conn.execute(
@@ -350,6 +373,39 @@ def load_execution_steps(conn: Connection, message_id: int) -> Optional[list]:
     return []
 
 
+def load_session_history(conn: Connection, session_id: str,
+                         max_messages: Optional[int] = None) -> List[Tuple[int, str, str, list]]:
+    """单次查询加载会话消息及其步骤 → [(msg_id, role, content, steps)] 按 id 升序 — 小欧 2026-10-17
+
+    messages LEFT JOIN chat_message_steps 一次往返取回, 每条 step_json 只 parse 一次;
+    无步骤行的旧消息回退 chat_messages.execution_steps(语义同 load_execution_steps)。
+    max_messages>0 时只取最近 N 条消息(按 id 的尾部窗口), None/0 为全量。
+    """
+    tail_clause = ""
+    params: List[Any] = [session_id]
+    if max_messages and max_messages > 0:
+        tail_clause = (" AND m.id >= COALESCE((SELECT id FROM chat_messages WHERE session_id=? "
+                       "ORDER BY id DESC LIMIT 1 OFFSET ?), 0)")
+        params.extend([session_id, max_messages - 1])
+    rows = conn.execute(
+        "SELECT m.id, m.role, m.content, "
+        "CASE WHEN s.step_json IS NULL THEN m.execution_steps END AS legacy_steps, s.step_json "
+        "FROM chat_messages m LEFT JOIN chat_message_steps s ON s.message_id = m.id "
+        "WHERE m.session_id=?" + tail_clause + " ORDER BY m.id ASC, s.step_index ASC",
+        params,
+    ).fetchall()
+    history: List[Tuple[int, str, str, list]] = []
+    for msg_id, role, content, legacy_steps, step_json in rows:
+        if not history or history[-1][0] != msg_id:
+            steps: list = []
+            if step_json is None and legacy_steps:
+                steps = parse_json(legacy_steps, label="execution_steps") or []
+            history.append((msg_id, role, content, steps))
+        if step_json is not None:
+            history[-1][3].append(parse_json(step_json, label="step_json"))
+    return history
+
+
 def finalize_message(conn: Connection, message_id: int, content: str, status: str, thought: str = "") -> None:
     """finally 轻量终态 — 小欧 2026-07-14; 2026-07-16 小欧 增 thought 持久化"""
     conn.execute(
@@ -12,6 +12,7 @@
 #   _load_previous_messages/_log_task_end)由本编排器构造 db_ops SimpleNamespace 注入 run_agent_in_background,
 #   依赖方向变为 chat→agent 单向。6个属性与原 agent_runner 直接 import 的6个chat函数一一对应,KISS-DIRECT。
 # 2026-08-14 - 小欧 - 改名名实相符引用同步: handlers.py→sse_events.py, stream.py→stream_reader.py(4处import更新, 行为不变)
+# 2026-10-17 - 小欧 - db_ops 的 allocate_and_insert/append_step 换为 create_step_writer=StepWriter(合并+批量落库, 见 step_writer.py)
 """
 stream_orchestrator — 聊天流编排器(services 层)
 
@@ -41,7 +42,8 @@ from app.services.agent.steps.final_step import FinalStep
 from app.services.task.task_state import create_stream_buffer, get_stream_buffer
 from app.services.task.task_context import _current_task_id
 from app.logger.shared_handler import set_session_id
-from app.services.chat.storage import get_user_message_id, allocate_and_insert_message, append_execution_step, finalize_message
+from app.services.chat.storage import get_user_message_id, finalize_message
+from app.services.chat.step_writer import StepWriter
 from app.services.chat.sse_events import save_execution_steps_to_db
 from app.services.chat.stream_reader import _load_previous_messages, _log_task_end
 
@@ -169,10 +171,10 @@ async def chat_stream_orchestrator(
         agent = UniversalAgent(llm_client=ai_service, task_id=task_id)
         # P4: 构造 db_ops 命名空间注入 agent_runner, 消除 agent→chat 反向依赖 — 小沈 2026-08-13
         #   6个属性对应原 agent_runner 直接 import 的6个chat函数, KISS-DIRECT(一个对象替代6个回调)
+        #   小欧 2026-10-17: allocate_and_insert/append_step 合并为 create_step_writer(步骤批量写入器工厂)
         import types as _types
         _db_ops = _types.SimpleNamespace(
-            allocate_and_insert=allocate_and_insert_message,
-            append_step=append_execution_step,
+            create_step_writer=StepWriter,
             finalize=finalize_message,
             save_steps=save_execution_steps_to_db,
             load_previous=_load_previous_messages,
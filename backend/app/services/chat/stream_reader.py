@@ -10,6 +10,14 @@
 #   (paused/resumed/retrying/cancelled/authorization_required/start + usage),与"Meta步骤非业务步骤"注释自洽;
 #   业务步骤(chunk/action/thought/observation/final/error)不计入排除不误伤; total在pop之后计算。ast语法✓
 # 2026-08-14 - 小欧 - 改名名实相符: stream.py → stream_reader.py(实为SSE流运行器/消费者 stream_reader; "stream"过宽且与api/v1/chat/execution_stream语义重叠)
+# 2026-10-17 - 小欧 - 会话历史单次加载
+#   【病根】_load_previous_messages 每条 assistant 消息一次 load_execution_steps 查询(N+1), 且步骤 safe_json_dumps 后
+#          _parse_tool_calls/_parse_observations 再各 json.loads 一遍; 数百轮长会话恢复要数百次往返+三次编解码
+#   【改法】改走 storage.load_session_history(一条 LEFT JOIN, 每步只 parse 一次, 可选尾部窗口 HISTORY_LOAD_MAX_MESSAGES);
+#          两个解析函数入参改为已解析 list; 走读连接 get_read_conn, agent_runner 经 asyncio.to_thread 离开事件循环调用
+# 2026-10-17 - 小欧 - stream_reader 改按 buffer.next_seq/read_from(after_seq) 读取(StreamBuffer 有界压缩落盘后无 event_log 列表)
+# 2026-10-17 - 小欧 - _load_previous_messages 默认全量加载: 尾部窗口原默认 200 条会静默截断长会话上下文,
+#   改为未传 max_messages 时读 config app.history_load_max_messages(缺省 HISTORY_LOAD_MAX_MESSAGES=0 全量), 截断须显式配置开启
 """
 stream_reader — SSE流运行器（消费者）
 
@@ -25,29 +33,27 @@ import json
 import time
 from typing import Any, Callable, Dict, List, Optional
 
+from app.config import get_config
 from app.db import db
 from app.services.agent.steps import ErrorStep
 from app.services.task.task_state import agent_streams
 from app.logger import logger, log_and_print
 from app.utils.sse_formatter import format_agent_sse
-from app.utils.json_utils import safe_json_dumps  # steps序列化为JSON串供多轮上下文 — 小欧 2026-07-14
-from app.services.chat.storage import load_execution_steps  # 从chat_message_steps组装 — 小欧 2026-07-14
+from app.constants import HISTORY_LOAD_MAX_MESSAGES
+from app.services.chat.storage import load_session_history  # 单次JOIN取消息+步骤 — 小欧 2026-10-17
 
 
-def _parse_tool_calls(msg_id: int, exec_steps_json: str) -> List[Dict]:
-    """从execution_steps JSON提取tool_calls列表
+def _parse_tool_calls(msg_id: int, exec_steps: list) -> List[Dict]:
+    """从已解析的步骤列表提取tool_calls列表
     小欧 2026-06-25 从_load_previous_messages提取
-    小欧 2026-07-18 F4修复: try收窄到单步, 单步参数异常不株连整批"""
-    try:
-        exec_steps = json.loads(exec_steps_json)
-    except Exception:
-        return []
+    小欧 2026-07-18 F4修复: try收窄到单步, 单步参数异常不株连整批
+    小欧 2026-10-17: 入参由JSON串改为已解析list(步骤只解析一次, 不再dumps→loads往返)"""
     if not isinstance(exec_steps, list):
         logger.warning(f"[_parse_tool_calls] exec_steps非list, 跳过: {type(exec_steps)}")
         return []
     tool_calls = []
     for step in exec_steps:
-        if step.get("type") != "action_tool":
+        if not isinstance(step, dict) or step.get("type") != "action_tool":
             continue
         try:
             arguments = json.dumps(step.get("tool_params", {}), ensure_ascii=False)
@@ -65,51 +71,49 @@ def _parse_tool_calls(msg_id: int, exec_steps_json: str) -> List[Dict]:
     return tool_calls
 
 
-def _parse_observations(msg_id: int, exec_steps_json: str) -> List[Dict]:
-    """从execution_steps JSON提取observation tool消息 — 小欧 2026-06-25 从_load_previous_messages提取
-    小欧 2026-07-10 M-12: content已扁平到顶层，不再从observation包装读取"""
-    try:
-        exec_steps = json.loads(exec_steps_json)
-        observations = []
-        for step in exec_steps:
-            if step.get("type") == "observation":
-                content = step.get("content", "")
-                if content:
-                    observations.append({
-                        "role": "tool",
-                        "content": content,
-                        "tool_call_id": f"call_{msg_id}_{step.get('step', 0)}"
-                    })
-        return observations
-    except Exception:
+def _parse_observations(msg_id: int, exec_steps: list) -> List[Dict]:
+    """从已解析的步骤列表提取observation tool消息 — 小欧 2026-06-25 从_load_previous_messages提取
+    小欧 2026-07-10 M-12: content已扁平到顶层，不再从observation包装读取
+    小欧 2026-10-17: 入参由JSON串改为已解析list"""
+    if not isinstance(exec_steps, list):
         return []
-
-
-def _load_previous_messages(session_id: str) -> List[Dict[str, Any]]:
+    observations = []
+    for step in exec_steps:
+        if isinstance(step, dict) and step.get("type") == "observation":
+            content = step.get("content", "")
+            if content:
+                observations.append({
+                    "role": "tool",
+                    "content": content,
+                    "tool_call_id": f"call_{msg_id}_{step.get('step', 0)}"
+                })
+    return observations
+
+
+def _load_previous_messages(session_id: str,
+                            max_messages: Optional[int] = None) -> List[Dict[str, Any]]:
     """从DB加载会话历史消息 — 小健 2026-06-17 委托db层，消除SQLite越界
     小欧 2026-06-25: 抽取_parse_tool_calls/_parse_observations消除嵌套try/except
-    小欧 2026-07-14: 从chat_message_steps组装"""
+    小欧 2026-07-14: 从chat_message_steps组装
+    小欧 2026-10-17: 改走 load_session_history 单次 JOIN 查询(读连接), 消除逐条消息查步骤的 N+1;
+                     max_messages>0 只取尾部窗口, 0 全量; 未传(None)读 config app.history_load_max_messages, 缺省全量"""
+    if max_messages is None:
+        max_messages = get_config().get_history_load_max_messages(HISTORY_LOAD_MAX_MESSAGES)
     try:
-        with db.get_conn("chat") as conn:
-            rows = conn.execute(
-                "SELECT id, role, content FROM chat_messages "
-                "WHERE session_id=? ORDER BY id ASC",
-                (session_id,),
-            ).fetchall()
-            messages = []
-            for msg_id, role, content in rows:
-                if role == "user":
-                    messages.append({"role": "user", "content": content or ""})
-                elif role == "assistant":
-                    steps = load_execution_steps(conn, msg_id)
-                    steps_json = safe_json_dumps(steps) if steps else None
-                    tool_calls = _parse_tool_calls(msg_id, steps_json) if steps_json else []
-                    if tool_calls:
-                        messages.append({"role": "assistant", "content": content or "", "tool_calls": tool_calls})
-                    else:
-                        messages.append({"role": "assistant", "content": content or ""})
-                    if steps_json:
-                        messages.extend(_parse_observations(msg_id, steps_json))
+        with db.get_read_conn("chat") as conn:
+            history = load_session_history(conn, session_id, max_messages)
+        messages = []
+        for msg_id, role, content, steps in history:
+            if role == "user":
+                messages.append({"role": "user", "content": content or ""})
+            elif role == "assistant":
+                tool_calls = _parse_tool_calls(msg_id, steps) if steps else []
+                if tool_calls:
+                    messages.append({"role": "assistant", "content": content or "", "tool_calls": tool_calls})
+                else:
+                    messages.append({"role": "assistant", "content": content or ""})
+                if steps:
+                    messages.extend(_parse_observations(msg_id, steps))
         return messages
     except Exception as e:
         # 【P1-14修复】DB异常加日志而非静默吞掉 — chendyg 2026-06-26
@@ -126,12 +130,11 @@ async def stream_reader(buffer, task_id: str, after_seq: int = 0):
     offset = after_seq
     while True:
         async with buffer.cond:
-            while offset < len(buffer.event_log):
-                yield format_agent_sse(buffer.event_log[offset])
-                offset += 1
-            # #30 fix:排空后复查 len,防止 done.set() 前 producer 追加丢事件 — 小欧 2026-07-18
-            if offset < len(buffer.event_log):
-                continue
+            # 小欧 2026-10-17: 缓冲有界化后按 seq 取(落盘段+热区); while 复查 next_seq 覆盖 #30(done 前追加不丢)
+            while offset < buffer.next_seq:
+                for event in buffer.read_from(offset):
+                    yield format_agent_sse(event)
+                    offset = event["seq"] + 1
             if buffer.done.is_set():
                 return
             # cond.wait()无超时: 若producer崩溃永不set.done, 消费者永久挂起泄漏HTTP连接
@@ -211,7 +211,7 @@ class TaskQueries:
     """任务查询服务 — 只负责查询,不修改数据"""
 
     def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
-        with db.get_conn("task_tracker") as conn:
+        with db.get_read_conn("task_tracker") as conn:
             row = conn.execute(
                 "SELECT * FROM tasks WHERE task_id = ?", (task_id,)
             ).fetchone()
@@ -224,7 +224,7 @@ class TaskQueries:
             }
 
     def get_recent_tasks(self, limit: int = 10) -> List[Dict[str, Any]]:
-        with db.get_conn("task_tracker") as conn:
+        with db.get_read_conn("task_tracker") as conn:
             rows = conn.execute(
                 "SELECT * FROM tasks ORDER BY created_at DESC LIMIT ?",
                 (limit,),
@@ -236,7 +236,7 @@ class TaskQueries:
             } for r in rows]
 
     def get_operations(self, task_id: str) -> List[Dict[str, Any]]:
-        with db.get_conn("task_tracker") as conn:
+        with db.get_read_conn("task_tracker") as conn:
             rows = conn.execute(
                 "SELECT * FROM task_operations WHERE task_id = ? "
                 "ORDER BY sequence_number DESC",
@@ -3,6 +3,7 @@
 # 2026-08-09 - 小欧 - P4拆分(见doc-8月优化修复代码三堂会审报告v1.1): 暂停阻塞核心提取为 _pause_core,
 #   react_cycle后台路径改 wait_for_resume(纯阻塞不产SSE), task_pause_check 保留产SSE供前端消费路径
 #   (openai._stream_with_control 的 task_pause_check_and_yield)。职责单一, 消除后台死路SSE事件。ast语法✓
+# 2026-10-17 - 小欧 - _pause_core 进入暂停时 flush running_tasks[task_id]["step_writer"](agent_runner 注册), 暂停点步骤即时落库
 """
 task_runtime — 运行态任务管理（内存）
 
@@ -115,6 +116,10 @@ async def _pause_core(
         _agent = running_tasks.get(task_id, {}).get("agent")
         if _agent is not None and _agent.status in (AgentStatus.THINKING, AgentStatus.EXECUTING):
             set_status(_agent, AgentStatus.SUSPENDED, "用户暂停任务")
+        # 暂停即显式刷写已产出步骤, 暂停期间 DB 可见完整进度(不等攒批超时) — 小欧 2026-10-17
+        _writer = running_tasks.get(task_id, {}).get("step_writer")
+        if _writer is not None:
+            await _writer.flush()
         if emit_sse:
             step_value = next_step() if next_step else None
             yield _emit_step_sse(step_value, "paused", '任务已暂停')
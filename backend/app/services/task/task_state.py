@@ -7,11 +7,27 @@ task_state — 运行态任务数据存储 + 只读查询
 
 北京老陈 2026-07-12: 新增 agent_streams/StreamBuffer，将"流态"(事件回放缓冲)
 与"控制态"(running_tasks) 分离，支撑前端 SSE 断线重连 — 小欧 2026-07-12
+
+编辑历史:
+# 2026-10-17 - 小欧 - StreamBuffer 有界化
+#   【病根】event_log 为无界 list, 长任务每个 token chunk 一条常驻内存直到回收(结束后再留 300s), 并发任务成倍放大
+#   【改法】热区只留最近 STREAM_BUFFER_HOT_EVENTS 条; 超限驱逐最旧一半: 相邻 chunk 压缩成段后追加写入本地临时文件,
+#          内存只留段索引; read_from(after_seq) 合并"落盘段+热区"回放, 段内续传按 cuts 截取, 重连不丢字;
+#          mem_bytes/mem_high_water 逐缓冲观测, 回收时记 stream_buffer_memory_high_water_bytes 指标
+#   【合规】event_log 属性删除(禁止 backward), 生产者改 append()/消费者改 read_from()/next_seq
 """
 
 import asyncio
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+import bisect
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.constants import STREAM_BUFFER_HOT_EVENTS
+from app.logger import logger
+from app.monitoring import record_metric
 
 running_tasks_lock = asyncio.Lock()
 running_tasks: dict[str, dict] = {}
@@ -21,17 +37,162 @@ running_tasks: dict[str, dict] = {}
 # 流态缓冲(与控制态 running_tasks 分离) — 北京老陈 2026-07-12 断线重连
 # ============================================================
 
-@dataclass
-class StreamBuffer:
-    """单个任务的事件回放缓冲 — 小欧 2026-07-12
+# 落盘目录: 与 DB 同根(~/.omniagent), 文件为 TemporaryFile(关闭/进程退出即删, 不留残留)
+_STREAM_SPILL_DIR = Path.home() / ".omniagent" / "stream_spill"
+_EVENT_BASE_BYTES = 240  # dict 本体 + seq 等定长开销估算
+_FIELD_BASE_BYTES = 16   # 非字符串字段估算
+
+
+def _event_size(event: Dict) -> int:
+    """事件内存占用估算(字符串按长度计, 其余按定长) — 小欧 2026-10-17
+    只用于高水位观测与比较, 不追求与 sys.getsizeof 精确一致, 避免逐事件深度遍历"""
+    size = _EVENT_BASE_BYTES
+    for k, v in event.items():
+        size += len(k) + (len(v) if isinstance(v, str) else _FIELD_BASE_BYTES)
+    return size
+
 
-    event_log: append-only 事件列表，每条含 seq(单调递增序号)
+def _is_mergeable_chunk(prev: Optional[Dict], event: Dict) -> bool:
+    """同一轮、同一区(is_reasoning)的相邻纯文本 chunk 才可合并; 带 thought/reasoning 附加字段的不合并(保证回放逐字不变)"""
+    if prev is None or prev.get("type") != "chunk" or event.get("type") != "chunk":
+        return False
+    if "thought" in event or "reasoning" in event or "thought" in prev or "reasoning" in prev:
+        return False
+    return (prev.get("step") == event.get("step")
+            and bool(prev.get("is_reasoning")) == bool(event.get("is_reasoning")))
+
+
+class StreamBuffer:
+    """单个任务的事件回放缓冲 — 小欧 2026-07-12; 2026-10-17 小欧 改有界环形+压缩+落盘
+
+    seq: 单调递增序号(= 追加顺序), 前端断线重连以 after_seq 续传
+    热区 _hot: 最近 hot_limit 条原样事件(内存); 超限时最旧一半被驱逐:
+      相邻同轮同区 chunk 压缩为一段(记录各原事件在合并 content 中的起点 cuts),
+      段逐行追加写入本地临时文件(TemporaryFile, 关闭即删), 内存只留段索引(seq_start/seq_end/文件偏移)
+    read_from(after_seq): 返回 seq >= after_seq 的事件; 落在已压缩段中间时按 cuts 截取后缀, 内容逐字不丢
+      (合并段以 seq_end 作为 seq 下发, 前端 lastSeq 推进语义不变)
+    hot_limit=0: 不设上限(全部留内存, 旧行为)
     cond: 生产者追加新事件时唤醒消费者
     done: 生产者结束信号
     """
-    event_log: List[Dict] = field(default_factory=list)
-    cond: asyncio.Condition = field(default_factory=asyncio.Condition)
-    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def __init__(self, hot_limit: int = STREAM_BUFFER_HOT_EVENTS):
+        self.cond = asyncio.Condition()
+        self.done = asyncio.Event()
+        self._hot_limit = hot_limit
+        self._hot: List[Dict] = []
+        self._hot_base = 0  # _hot[0] 的 seq
+        self._spill = None  # 临时文件(首次驱逐时创建)
+        self._spill_starts: List[int] = []  # 段 seq_start(升序, 供 bisect)
+        self._spill_index: List[Tuple[int, int, int]] = []  # (seq_end, 文件偏移, 字节数)
+        self._spill_bytes = 0
+        self._compacted_events = 0  # 被并入他段的 chunk 数
+        self.mem_bytes = 0
+        self.mem_high_water = 0
+
+    @property
+    def next_seq(self) -> int:
+        """下一条事件的 seq(= 已追加事件总数)"""
+        return self._hot_base + len(self._hot)
+
+    def append(self, event: Dict) -> Dict:
+        """追加一条事件(原地写入 seq)并返回; 热区超限时压缩驱逐最旧一半到落盘文件"""
+        event["seq"] = self.next_seq
+        self._hot.append(event)
+        self.mem_bytes += _event_size(event)
+        if self.mem_bytes > self.mem_high_water:
+            self.mem_high_water = self.mem_bytes
+        if self._hot_limit and len(self._hot) > self._hot_limit:
+            self._evict(len(self._hot) - self._hot_limit // 2)
+        return event
+
+    def read_from(self, after_seq: int) -> List[Dict]:
+        """取 seq >= after_seq 的全部事件(已落盘部分为压缩段)"""
+        after_seq = max(after_seq, 0)
+        events: List[Dict] = []
+        if after_seq < self._hot_base and self._spill_index:
+            events.extend(self._read_spilled(after_seq))
+        events.extend(self._hot[max(after_seq - self._hot_base, 0):])
+        return events
+
+    def stats(self) -> Dict[str, int]:
+        """缓冲观测指标(metrics API 与回收时记录用)"""
+        return {
+            "events_total": self.next_seq,
+            "hot_events": len(self._hot),
+            "spilled_segments": len(self._spill_index),
+            "spilled_events": self._hot_base,
+            "compacted_events": self._compacted_events,
+            "spill_bytes": self._spill_bytes,
+            "mem_bytes": self.mem_bytes,
+            "mem_high_water": self.mem_high_water,
+        }
+
+    def close(self) -> None:
+        """关闭并删除落盘文件(回收缓冲时调用)"""
+        if self._spill is not None:
+            try:
+                self._spill.close()
+            except OSError as e:
+                logger.debug(f"[StreamBuffer] 关闭落盘文件失败: {e}")
+            self._spill = None
+
+    # ── 驱逐/落盘 ────────────────────────────────────────────
+
+    def _evict(self, count: int) -> None:
+        evicted, self._hot = self._hot[:count], self._hot[count:]
+        self._hot_base += count
+        self.mem_bytes -= sum(_event_size(e) for e in evicted)
+
+        segments: List[Tuple[int, Dict, List[int]]] = []  # (seq_start, 合并事件, cuts)
+        for ev in evicted:
+            if segments and _is_mergeable_chunk(segments[-1][1], ev):
+                merged, cuts = segments[-1][1], segments[-1][2]
+                cuts.append(len(merged.get("content") or ""))
+                merged["content"] = (merged.get("content") or "") + (ev.get("content") or "")
+                merged["seq"] = ev["seq"]
+                self._compacted_events += 1
+            else:
+                segments.append((ev["seq"], dict(ev), [0]))
+
+        if self._spill is None:
+            _STREAM_SPILL_DIR.mkdir(parents=True, exist_ok=True)
+            self._spill = tempfile.TemporaryFile(dir=_STREAM_SPILL_DIR, prefix="stream-", suffix=".jsonl")
+        self._spill.seek(0, os.SEEK_END)
+        offset = self._spill.tell()
+        lines = []
+        for seq_start, merged, cuts in segments:
+            line = json.dumps({"start": seq_start, "cuts": cuts, "event": merged},
+                              ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+            self._spill_starts.append(seq_start)
+            self._spill_index.append((merged["seq"], offset, len(line)))
+            offset += len(line)
+            lines.append(line)
+        data = b"".join(lines)
+        self._spill.write(data)
+        self._spill_bytes += len(data)
+
+    def _read_spilled(self, after_seq: int) -> List[Dict]:
+        # 起始段: 最后一个 seq_start <= after_seq 的段(after_seq 落在其内部时需截取后缀)
+        i = max(bisect.bisect_right(self._spill_starts, after_seq) - 1, 0)
+        if self._spill_index[i][0] < after_seq:
+            i += 1
+        if i >= len(self._spill_index):
+            return []
+        self._spill.flush()
+        first_offset = self._spill_index[i][1]
+        self._spill.seek(first_offset)
+        end_offset = self._spill_index[-1][1] + self._spill_index[-1][2]
+        raw = self._spill.read(end_offset - first_offset)
+        events = []
+        for line in raw.splitlines():
+            seg = json.loads(line)
+            event, start = seg["event"], seg["start"]
+            if start < after_seq:
+                cut = seg["cuts"][after_seq - start]
+                event["content"] = event["content"][cut:]
+            events.append(event)
+        return events
 
 
 # 流态缓冲表: task_id -> StreamBuffer(独立于 running_tasks 的生命周期)
@@ -50,9 +211,19 @@ def get_stream_buffer(task_id: str) -> Optional["StreamBuffer"]:
     return agent_streams.get(task_id)
 
 
+def get_stream_buffer_stats() -> Dict[str, Dict[str, int]]:
+    """全部在册流态缓冲的观测指标 {task_id: stats} — 小欧 2026-10-17"""
+    return {task_id: buf.stats() for task_id, buf in list(agent_streams.items())}
+
+
 def reclaim_stream_buffer(task_id: str) -> None:
-    """回收任务的流态缓冲(任务彻底结束后调用) — 小欧 2026-07-12"""
-    agent_streams.pop(task_id, None)
+    """回收任务的流态缓冲(任务彻底结束后调用) — 小欧 2026-07-12
+    小欧 2026-10-17: 回收时记录内存高水位指标并删除落盘文件"""
+    buf = agent_streams.pop(task_id, None)
+    if buf is None:
+        return
+    record_metric("stream_buffer_memory_high_water_bytes", buf.mem_high_water, {"task_id": task_id})
+    buf.close()
 
 
 async def check_cancelled(task_id: str) -> bool:
@@ -105,7 +276,7 @@ async def get_task_field(task_id: str, field: str) -> Any:
 __all__ = [
     "running_tasks_lock", "running_tasks",
     "agent_streams", "StreamBuffer",
-    "create_stream_buffer", "get_stream_buffer", "reclaim_stream_buffer",
+    "create_stream_buffer", "get_stream_buffer", "get_stream_buffer_stats", "reclaim_stream_buffer",
     "check_cancelled", "check_paused", "check_was_paused",
     "get_task_status", "is_task_running",
     "get_cancel_request_time", "get_pause_event", "get_task_field",
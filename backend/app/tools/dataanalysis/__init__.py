@@ -1,4 +1,4 @@
 # -*- coding: utf-8 -*-
-from .dataanalysis_register import _register_dataanalysis_tools
-
-__all__ = ["_register_dataanalysis_tools"]
+"""DATAANALYSIS 模块 - 数据分析工具"""
+# 2026-10-17 - 小欧 - 包初始化不再导入 dataanalysis_register(连带本分类全部工具实现): 导入本包任一子模块不再拖入整个分类;
+#   注册入口由 tool_constants.CATEGORY_MODULES 直指 app.tools.dataanalysis.dataanalysis_register
@@ -4,6 +4,7 @@
 # 2026-07-26 - 小欧 - Bug#A: .xlsx大小写不敏感修复(data.lower().endswith); Bug#B: convert_pd_value加DataFrame防御
 # 2026-07-26 - 小沈 - load_data_to_df入口调normalize_list_dict展平[[{...}]]→[{...}](覆盖generate_chart直入路径)
 # 2026-07-31 - 小欧 - Bug⑬修复: .xls旧格式需xlrd(防落入pd.read_csv报ParserError), .xlsm纳入openpyxl; 大小写不敏感延续 | py_compile ✓
+# 2026-10-17 - 小欧 - 文件路径加载改走 df_cache.load_cached(键 路径/大小/mtime/读取参数 的 LRU 缓存 + opt-in Parquet 旁路文件), 同一文件反复分析不再重解析
 """
 data_loader  dataanalysis模块的数据加载公用函数
 【2026-07-26 小欧】从 analyze_data.py / filter_data.py 抽取OOD公共函数
@@ -17,6 +18,7 @@ import pandas as pd
 
 from app.tools.validate.file_path_checker import validate_path, OpCategory
 from app.tools.tool_fc_helper import _check_module
+from app.tools.dataanalysis.df_cache import load_cached
 from app.utils.json_utils import normalize_list_dict
 
 
@@ -36,12 +38,12 @@ def load_data_to_df(data: Union[str, List[Dict[str, Any]]]) -> dict:
         if data.lower().endswith(('.xlsx', '.xlsm')):
             if not _check_module("openpyxl"):
                 return {"error_detail": "openpyxl库未安装", "params": {"library": "openpyxl"}}
-            return {"df": pd.read_excel(data, engine="openpyxl")}  # 不try/except，异常自然抛出给调用方
+            return {"df": load_cached(data, "excel", {"engine": "openpyxl", "sheet_name": 0})}  # 不try/except，异常自然抛出给调用方
         if data.lower().endswith('.xls'):
             if not _check_module("xlrd"):
                 return {"error_detail": "xlrd库未安装(读取.xls旧格式Excel需要)", "params": {"library": "xlrd"}}
-            return {"df": pd.read_excel(data, engine="xlrd")}  # 不try/except，异常自然抛出给调用方
-        return {"df": pd.read_csv(data)}  # 不try/except，异常(OOM等)自然抛出给调用方
+            return {"df": load_cached(data, "excel", {"engine": "xlrd", "sheet_name": 0})}  # 不try/except，异常自然抛出给调用方
+        return {"df": load_cached(data, "csv", {})}  # 不try/except，异常(OOM等)自然抛出给调用方
     if isinstance(data, list):
         return {"df": pd.DataFrame(data)}
     return {"error_detail": "data参数必须是文件路径或数据数组", "params": {"data_type": type(data).__name__}}
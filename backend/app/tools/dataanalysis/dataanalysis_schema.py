@@ -10,6 +10,7 @@
 # 2026-07-25 - 小欧 - 编辑历史归并+去冗余示例: AnalyzeDataInput/FilterDataInput.path移除示例
 # 2026-07-25 - 小欧 - 删除max_rows: top_n唯一行数控制, 统计在head之前计算
 # 2026-08-07 - 小欧 - ExecuteSqlInput 新增 confirm_ddl 字段(危险DDL放行开关): True=显式确认后放行裸CREATE/DROP等DDL, False=默认拦截; 与 execute_sql 实现层白名单联动 — 小欧 2026-08-07
+# 2026-10-17 - 小欧 - QuerySqlInput 新增 cursor 字段(分页游标): 传上次结果的 next_cursor 续读下一页, 不重跑查询
 """
 DataAnalysis Schema - 数据分析工具参数模型
 
@@ -223,6 +224,10 @@ class QuerySqlInput(_DbConnectionMixin):
         le=1000,
         description=f"返回行数上限，建议不超过{OBS_MAX_DISPLAY_ITEMS}条，超限部分需分页"
     )
+    cursor: Optional[str] = Field(
+        default=None,
+        description="分页游标: 上次结果的 next_cursor, 与相同 sql/连接参数一起传入读取下一页(不重跑查询)"
+    )
 
 
 class ExecuteSqlInput(_DbConnectionMixin):
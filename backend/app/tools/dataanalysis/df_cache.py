@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: 数据分析 DataFrame 进程内 LRU 缓存 + 可选 Parquet 旁路文件
+#   【病根】analyze_data/filter_data/generate_chart 每次调用都由 load_data_to_df 重新 pd.read_csv/read_excel,
+#          LLM 对同一文件连做十几次分析时, 大 Excel 每次都要 openpyxl 逐单元格重解析
+#   【改法】①键 (realpath, size, mtime_ns, 读取器, 读取参数含 sheet), 文件变化自动失效(旧版本条目随新版本入缓存移除); 按 DataFrame 内存字节 LRU 淘汰
+#          ②opt-in(config tools.dataanalysis.parquet_sidecar, 需 pyarrow): 大 Excel 首次解析后写 Parquet 旁路文件,
+#            进程重启/缓存淘汰后再读直接读 Parquet, 跳过 openpyxl
+#          ③命中/未命中/淘汰/旁路命中计数, 经 GET /metrics/dataframe_cache 与 dataframe_cache_events_total 暴露
+#   【合规】SRP(只管"按文件取 DataFrame", 路径校验/依赖检查仍在 data_loader) + 返回浅拷贝(pandas 3 写时复制), 调用方改动不污染缓存
+# 2026-10-17 - 小欧 - pandas 改函数内导入(注解改字符串): GET /metrics/dataframe_cache 在应用启动时导入本模块, 模块级导入让启动即加载 pandas
+# 2026-10-17 - 小欧 - 字符串注解 "pd.DataFrame" 补 TYPE_CHECKING 导入(pyflakes undefined name 'pd'), 运行时仍不加载 pandas
+"""
+df_cache — 数据分析 DataFrame 缓存
+
+调用约定(data_loader 内):
+    df = load_cached(path, "excel", {"engine": "openpyxl", "sheet_name": 0})
+    df = load_cached(path, "csv", {})
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from app.config import get_config
+from app.monitoring import record_metric
+from app.tools.tool_constants import (
+    DATAFRAME_CACHE_MAX_BYTES, DATAFRAME_SIDECAR_MIN_BYTES, DATAFRAME_SIDECAR_MAX_FILES,
+)
+from app.tools.tool_fc_helper import _check_module
+from app.logger import logger
+
+if TYPE_CHECKING:  # 仅供注解; 运行时 pandas 在函数内按需导入
+    import pandas as pd
+
+_SIDECAR_DIR = Path.home() / ".omniagent" / "df_sidecar"
+
+_READERS = {"csv": "read_csv", "excel": "read_excel"}  # 读取器 → pandas 函数名
+
+
+class _DataFrameCache:
+    """文件键 → DataFrame; 按内存字节 LRU 淘汰 — 小欧 2026-10-17"""
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._items: "OrderedDict[tuple, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.sidecar_hits = 0
+        self.sidecar_writes = 0
+
+    def get(self, key: tuple) -> Optional["pd.DataFrame"]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: tuple, df: "pd.DataFrame", cost: int) -> int:
+        """放入缓存, 返回本次淘汰条数; 同一文件旧版本(大小/mtime 不同)的条目随之移除; 单个超预算的 DataFrame 不缓存"""
+        if cost > self._max_bytes:
+            return 0
+        evicted = 0
+        with self._lock:
+            for stale in [k for k in self._items if k[0] == key[0] and k[3:] == key[3:] and k != key]:
+                self._bytes -= self._items.pop(stale)[1]
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (df, cost)
+            self._bytes += cost
+            while self._bytes > self._max_bytes:
+                _k, (_df, c) = self._items.popitem(last=False)
+                self._bytes -= c
+                evicted += 1
+            self.evictions += evicted
+        return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._items), "bytes": self._bytes, "max_bytes": self._max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "sidecar_hits": self.sidecar_hits, "sidecar_writes": self.sidecar_writes}
+
+
+_cache = _DataFrameCache(DATAFRAME_CACHE_MAX_BYTES)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """DataFrame 缓存统计(条目/字节/命中/未命中/淘汰/旁路文件命中与写入)"""
+    stats: Dict[str, Any] = _cache.stats()
+    stats["sidecar_enabled"] = _sidecar_enabled()
+    return stats
+
+
+def _event(event: str, count: int = 1) -> None:
+    record_metric("dataframe_cache_events_total", count, {"event": event})
+
+
+# ============================================================
+# Parquet 旁路文件(opt-in)
+# ============================================================
+
+def _sidecar_enabled() -> bool:
+    return bool(get_config().get("tools.dataanalysis.parquet_sidecar", False)) and _check_module("pyarrow")
+
+
+def _sidecar_path(key: tuple) -> Path:
+    return _SIDECAR_DIR / f"{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()}.parquet"
+
+
+def _read_sidecar(key: tuple) -> Optional["pd.DataFrame"]:
+    path = _sidecar_path(key)
+    if not path.is_file():
+        return None
+    import pandas as pd
+    try:
+        return pd.read_parquet(path, engine="pyarrow")
+    except Exception as e:  # 旁路文件损坏/版本不兼容: 丢弃后重新解析源文件
+        logger.warning(f"[df_cache] Parquet 旁路文件读取失败, 改读源文件: {path}: {e}")
+        path.unlink(missing_ok=True)
+        return None
+
+
+def _write_sidecar(key: tuple, df: "pd.DataFrame") -> bool:
+    """写旁路文件(先写临时文件再替换); 混合类型列等 Arrow 不支持的 DataFrame 跳过"""
+    path = _sidecar_path(key)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        _SIDECAR_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp, engine="pyarrow")
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.debug(f"[df_cache] 跳过 Parquet 旁路文件: {e}")
+        tmp.unlink(missing_ok=True)
+        return False
+    _prune_sidecars()
+    return True
+
+
+def _prune_sidecars() -> None:
+    """旁路文件数超过上限时按 mtime 删最旧的(源文件变化后旧旁路文件不再命中, 由此回收)"""
+    try:
+        files = sorted(_SIDECAR_DIR.glob("*.parquet"), key=lambda p: p.stat().st_mtime)
+    except OSError:
+        return
+    for old in files[:max(0, len(files) - DATAFRAME_SIDECAR_MAX_FILES)]:
+        old.unlink(missing_ok=True)
+
+
+# ============================================================
+# 入口
+# ============================================================
+
+def load_cached(path: str, reader: str, options: Dict[str, Any]) -> "pd.DataFrame":
+    """按 (文件, 读取器, 读取参数) 取 DataFrame: 内存缓存 → Parquet 旁路文件(仅 Excel) → 解析源文件
+    返回浅拷贝; 解析异常不 catch, 自然抛给调用方(同 load_data_to_df 异常策略)"""
+    st = os.stat(path)
+    key = (os.path.realpath(path), st.st_size, st.st_mtime_ns, reader, tuple(sorted(options.items())))
+    df = _cache.get(key)
+    if df is not None:
+        _event("hit")
+        return df.copy(deep=False)
+    _event("miss")
+
+    use_sidecar = reader == "excel" and st.st_size >= DATAFRAME_SIDECAR_MIN_BYTES and _sidecar_enabled()
+    df = _read_sidecar(key) if use_sidecar else None
+    if df is not None:
+        _cache.sidecar_hits += 1
+        _event("sidecar_hit")
+    else:
+        import pandas as pd
+        df = getattr(pd, _READERS[reader])(path, **options)
+        if use_sidecar and _write_sidecar(key, df):
+            _cache.sidecar_writes += 1
+
+    evicted = _cache.put(key, df, int(df.memory_usage(index=True, deep=True).sum()))
+    if evicted:
+        _event("eviction", evicted)
+    return df.copy(deep=False)
@@ -17,6 +17,7 @@ execute_sql — 执行写操作SQL
 【2026-08-11 小欧】三堂会审复核落地(P2-7): 删除外层except无条件syntax_valid=False覆写 — 内层语法校验已通过(syntax_valid=True)时,
    外层SAVEPOINT/ROLLBACK/RELEASE失败(连接异常)不再误报"SQL语法校验失败"; syntax_valid仅反映内层真实校验结果, 增强不退化
 【2026-08-13 小欧】A5职责拆分: sql_error_hint/hint_for_data_error 导入源从 app.tools.validate.file_path_checker 改为 app.tools.toolhelper.error_hints
+【2026-10-17 小欧】执行含 DDL 的语句后(无论成败, MySQL DDL 失败也可能已隐式提交)失效 get_db_schema 表结构缓存 schema_cache.invalidate
 """
 # 【铁规1】helper/被调函数(以下划线_开头的函数)只返回raw dict，严禁调用build_success/build_error/build_warning和构建llm_data。
 # build3+llm_data只能在tool的main函数(对外公开的函数)中包装。违反此规则的代码视为不合规。
@@ -32,6 +33,7 @@ from app.tools.tool_response import build_success, build_error, build_warning
 from app.tools.tool_constants import ERR_SQL_EXEC, EXECUTE_SQL_OUTPARM_LIMIT_SQL
 from app.tools.toolhelper.error_hints import sql_error_hint, hint_for_data_error
 from app.tools.tool_fc_helper import _get_connection, _close_connection, _strip_sql_comments_and_strings  # 2026-07-31 小欧: Bug①注释绕过修复引入
+from app.tools.dataanalysis import schema_cache
 
 # #6: 影响行数安全阈值(模块级常量,DRY消除3处硬编码) — 小欧 2026-07-23
 _AFFECTED_ROWS_LIMIT = 10000
@@ -139,6 +141,7 @@ def execute_sql(sql: str, connection_type: Literal["sqlite", "mysql", "postgresq
     """
     conn = None
     engine = None
+    ddl_sent = False
     t0 = _time_mod.perf_counter()
     _sql_preview = (sql or "")[:EXECUTE_SQL_OUTPARM_LIMIT_SQL]
 
@@ -253,9 +256,9 @@ def execute_sql(sql: str, connection_type: Literal["sqlite", "mysql", "postgresq
                                                      connection_type=connection_type, path=path, dry_run=dry_run, timeout=timeout)
             return build_error(data={}, llm_data=llm_data)
 
+        ddl_sent = bool(_DDL_PATTERN.search(_strip_sql_comments_and_strings(sql)))
         if connection_type in ("mysql", "postgresql"):
             from sqlalchemy import text
-            engine = conn.engine
             result = conn.execute(text(sql))
             affected_rows = result.rowcount
             if isinstance(affected_rows, (int, float)) and affected_rows > _AFFECTED_ROWS_LIMIT:
@@ -318,7 +321,9 @@ def execute_sql(sql: str, connection_type: Literal["sqlite", "mysql", "postgresq
                 logger.warning("[execute_sql] 回滚失败")
         return build_error(data={}, llm_data=llm_data)
     finally:
-        _close_connection(conn, engine)
+        _close_connection(conn)
+        if ddl_sent:
+            schema_cache.invalidate(connection_type, connection_string, path)
 
 
 __all__ = ["execute_sql"]
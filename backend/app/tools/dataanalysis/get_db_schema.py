@@ -7,6 +7,7 @@ get_db_schema — 获取数据库结构元数据
 # 2026-07-26 - 小欧 - 迁移: sql_error_hint导入从tool_constants改为file_path_checker(配合函数迁移)
 # 2026-07-31 - 小欧 - Bug⑨⑩⑰修复: postgres默认schema test→public(新增_resolve_schema); mysql/pg列/索引查询按schema过滤防跨库同名表错列; sqlite表名正则改Unicode单词字符支持中文表名 | py_compile ✓
 # 2026-08-13 - 小欧 - A5职责拆分: sql_error_hint 导入源从 app.tools.validate.file_path_checker 改为 app.tools.toolhelper.error_hints
+# 2026-10-17 - 小欧 - 表结构走 schema_cache: 表清单/各表列与索引按库缓存, SQLite 以 PRAGMA schema_version 校验, execute_sql 执行 DDL 即失效
 """
 # 【铁规】helper/被调函数(以下划线_开头的函数)只返回raw dict，严禁调用build_success/build_error/build_warning和构建llm_data。
 # build3+llm_data只能在tool的main函数(对外公开的函数)中包装。违反此规则的代码视为不合规。
@@ -27,6 +28,7 @@ from app.tools.tool_constants import (
 )
 from app.tools.toolhelper.error_hints import sql_error_hint
 from app.tools.tool_fc_helper import _get_connection, _close_connection
+from app.tools.dataanalysis import schema_cache
 
 
 def _resolve_schema(conn, connection_type: str, db_name: Optional[str]) -> Optional[str]:
@@ -99,6 +101,13 @@ def _get_indexes(conn, connection_type: str, table_name: str, schema: Optional[s
     return [{"name": r[1], "unique": bool(r[2])} for r in cursor.fetchall()]
 
 
+def _schema_version(conn, connection_type: str) -> Optional[int]:
+    """SQLite 表结构版本号(任何 DDL 都会递增), 供 schema_cache 校验; MySQL/PostgreSQL 返回 None(按有效期)"""
+    if connection_type == "sqlite":
+        return conn.execute("PRAGMA schema_version").fetchone()[0]
+    return None
+
+
 def _filter_tables(tables: List[str], table_name: Optional[str], filter_pattern: Optional[str]) -> List[str]:
     """表名过滤:精确匹配优先,fnmatch降级 — 小沈 2026-05-25 — 小健 2026-06-22 移除截断"""
     if table_name:
@@ -163,8 +172,14 @@ def get_db_schema(connection_type="sqlite", connection_string=None, path=None,
                                                        connection_type=connection_type, path=path, db_name=db_name, table_name=table_name, filter_pattern=filter_pattern)
             return build_error(data={}, llm_data=llm_data)
 
-        tables = _get_tables(conn, connection_type, db_name)
-        tables = _filter_tables(tables, table_name, filter_pattern)
+        cache_key = schema_cache.cache_key(connection_type, connection_string, path, db_name)
+        version = _schema_version(conn, connection_type)
+        cached = schema_cache.lookup(cache_key, version)
+        if cached is None:
+            cached = schema_cache.store(cache_key, version,
+                                        _get_tables(conn, connection_type, db_name),
+                                        _resolve_schema(conn, connection_type, db_name))  # 2026-07-31 小欧: Bug⑩ 跨库同名表按schema过滤
+        tables = _filter_tables(cached["tables"], table_name, filter_pattern)
         if table_name and not tables:
             duration_ms = int((_time_mod.perf_counter() - t0) * 1000)
             llm_data = _build_get_db_schema_llm_data("error", duration_ms, err_code=ERR_DOC_DB_TABLE_NOT_FOUND, detail=f"表不存在: {table_name}", hint="请确认表名正确",
@@ -172,11 +187,13 @@ def get_db_schema(connection_type="sqlite", connection_string=None, path=None,
             return build_error(data={}, llm_data=llm_data)
 
         schema_info = []
-        schema = _resolve_schema(conn, connection_type, db_name)  # 2026-07-31 小欧: Bug⑩ 跨库同名表按schema过滤
+        schema = cached["schema"]
         for t in tables:
-            columns = _get_columns(conn, connection_type, t, schema)
-            indexes = _get_indexes(conn, connection_type, t, schema)
-            schema_info.append({"name": t, "columns": columns, "indexes": indexes})
+            detail = schema_cache.table_detail(cached, t)
+            if detail is None:
+                detail = schema_cache.set_table_detail(cached, t, _get_columns(conn, connection_type, t, schema),
+                                                       _get_indexes(conn, connection_type, t, schema))
+            schema_info.append({"name": t, "columns": detail["columns"], "indexes": detail["indexes"]})
 
         duration_ms = int((_time_mod.perf_counter() - t0) * 1000)
         table_names = [t["name"] for t in schema_info]
@@ -208,7 +225,7 @@ def get_db_schema(connection_type="sqlite", connection_string=None, path=None,
                                                    connection_type=connection_type, path=path, db_name=db_name, table_name=table_name, filter_pattern=filter_pattern)
         return build_error(data={}, llm_data=llm_data)
     finally:
-        _close_connection(conn, engine)
+        _close_connection(conn)
 
 
 __all__ = ["get_db_schema"]
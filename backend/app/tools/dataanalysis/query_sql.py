@@ -11,6 +11,7 @@
 # 2026-07-31 - 小欧 - CRITICAL: WITH CTE体绕过只读检测修复。原代码跳过CTE括号体仅检查外层SELECT, 导致 `WITH malicious AS (DELETE FROM users) SELECT * FROM malicious` 通过检测。补充CTE体内容的DML/DDL关键字扫描 | py_compile ✓
 # 2026-07-31 - 小欧 - 只读安全增强(Bug②/⑤/⑲): PRAGMA写操作检测(赋值=或非只读白名单拒绝); 检测前剥离注释与字符串字面量(修复"-- SELECT"前导注释误拒、'a;b'字符串分号误判、SET note='WHERE'漏判); timeout None/<=0 防御
 # 2026-08-13 - 小欧 - A5职责拆分: hint_* 错误提示函数/导入源改 app.tools.toolhelper.error_hints
+# 2026-10-17 - 小欧 - 结果改 sql_cursor 列式分批拉取(fetchmany + 逐列类型转换, 日期/Decimal/bytes JSON 安全); 超出 limit 的行缓冲为分页游标, 返回 next_cursor, 传 cursor 续读不重跑查询
 """
 query_sql — 执行只读SQL查询
 【2026-06-22 小健】从 database_tools.py 拆分为独立文件
@@ -19,6 +20,7 @@ query_sql — 执行只读SQL查询
 # build3+llm_data只能在tool的main函数(对外公开的函数)中包装。违反此规则的代码视为不合规。
 # 【铁规2】工具返回原始data，禁止调用truncate_data_for_frontend。截断只能在前端yield层。
 # 【铁规3】计时(duration_ms计算)只能在tool的主函数中，严禁在子函数/helper中计时。
+import os
 import re  # 2026-07-31 小欧: CTE体写操作检测
 import sqlite3
 import threading
@@ -28,8 +30,10 @@ from typing import Any, Dict, Optional, Literal  # 2026-07-31 小欧: 移除未
 from app.logger import logger
 from app.tools.tool_response import build_success, build_error
 from app.tools.tool_constants import ERR_SQL_EXEC, QUERY_SQL_OUTPARM_LIMIT_SQL, OBS_QUERY_SQL_PREVIEW_COLUMNS, QUERY_SQL_INER_LOG_SQL  # 2026-07-31 小欧: 移除未使用 OBS_MAX_DISPLAY_ITEMS
+from app.tools.tool_constants import QUERY_SQL_CURSOR_TTL, QUERY_SQL_CURSOR_MAX_ROWS
 from app.tools.toolhelper.error_hints import sql_error_hint, hint_for_data_error
 from app.tools.tool_fc_helper import _get_connection, _close_connection, _strip_sql_comments_and_strings  # 2026-07-31 小欧: Bug②⑤注释/字符串剥离修复引入
+from app.tools.dataanalysis import sql_cursor
 
 
 # 2026-07-31 小欧: Bug② PRAGMA只读白名单 — 仅放行纯只读PRAGMA, 其余(含赋值=形式)一律拒绝, 防 user_version/journal_mode 等写操作借PRAGMA白名单执行
@@ -59,7 +63,7 @@ def _is_write_pragma(sql: str) -> bool:
 
 def _build_query_sql_llm_data(exec_code, duration_ms, sql, row_count, columns, detail="", hint="",
                                connection_type="", path="", limit=0, timeout=0,
-                               truncated=False, truncated_reason=""):
+                               truncated=False, truncated_reason="", cursor=None, next_cursor=None):
     """query_sql的llm_data构建函数 — 小健 2026-06-22 — 小沈 2026-07-05 新增detail/hint参数 — 小欧 2026-07-05 新增user_params — 小欧 2026-07-24 主函数入口统一截断，build函数不再截断"""
     _act_params = {"sql": sql}
     if connection_type:
@@ -70,6 +74,8 @@ def _build_query_sql_llm_data(exec_code, duration_ms, sql, row_count, columns, d
         _act_params["limit"] = limit
     if timeout is not None:
         _act_params["timeout"] = timeout
+    if cursor:
+        _act_params["cursor"] = cursor
     _target = path or connection_type or "database"
     if exec_code == "error":
         return {
@@ -83,8 +89,9 @@ def _build_query_sql_llm_data(exec_code, duration_ms, sql, row_count, columns, d
     col_text = ", ".join(_preview_cols)
     if len(columns) > OBS_QUERY_SQL_PREVIEW_COLUMNS:
         col_text += "..."
+    _more = f"; {truncated_reason}" if next_cursor else ""
     return {
-        "summary": f"查询{_target}，成功: {row_count}行, 列: {col_text}",
+        "summary": f"查询{_target}，成功: {row_count}行, 列: {col_text}{_more}",
         "action": {"tool": "query_sql", "tool_zh": "查询", "target": sql, "params": _act_params},
         "status": {"exec_code": "success", "message": "查询成功", "code": "", "detail": "", "hint": ""},
         "duration_ms": duration_ms,
@@ -94,11 +101,22 @@ def _build_query_sql_llm_data(exec_code, duration_ms, sql, row_count, columns, d
     }
 
 
+def _page_reason(returned: int, remaining: int, capped: bool, next_cursor: Optional[str]) -> str:
+    """分页截断说明: 还有多少行、如何续读; 缓冲上限/超时导致的不可续读部分一并说明"""
+    if next_cursor:
+        more = f"{remaining}+" if capped else f"{remaining}"
+        return f"已返回{returned}行, 还有{more}行, 传 cursor=\"{next_cursor}\" 及相同 sql 续读(不重跑查询, {int(QUERY_SQL_CURSOR_TTL)}秒内有效)"
+    if capped:
+        return f"结果超过缓冲上限({QUERY_SQL_CURSOR_MAX_ROWS}行)或拉取超时, 其余行未读取, 请加 WHERE/LIMIT 缩小结果"
+    return ""
+
+
 def query_sql(sql: str, connection_type: Literal["sqlite", "mysql", "postgresql"] = "sqlite",
               connection_string: Optional[str] = None, path: Optional[str] = None,
-              limit: int = 50, timeout: int = 15000) -> Dict[str, Any]:
+              limit: int = 50, timeout: int = 15000, cursor: Optional[str] = None) -> Dict[str, Any]:
     """执行只读SQL查询 — 小健 2026-06-22 拆分独立文件
     小欧 2026-07-04 修复: 增加None/空字符串校验
+    小欧 2026-10-17 列式分批拉取 + 分页游标(cursor 续读)
     """
     conn = None
     engine = None
@@ -208,56 +226,66 @@ def query_sql(sql: str, connection_type: Literal["sqlite", "mysql", "postgresql"
                                                    connection_type=connection_type, path=path, limit=limit, timeout=timeout)
             return build_error(data={}, llm_data=llm_data)
 
-        conn, engine, conn_error = _get_connection(connection_type, connection_string, path, timeout)
-        if conn is None:
-            duration_ms = int((_time_mod.perf_counter() - t0) * 1000)
-            logger.warning("query_sql连接失败: error=%s, connection_type=%s", conn_error, connection_type)
-            llm_data = _build_query_sql_llm_data("error", duration_ms, _sql_preview, 0, [], detail=conn_error, hint="请检查数据库连接参数",
-                                                   connection_type=connection_type, path=path, limit=limit, timeout=timeout)
-            return build_error(data={}, llm_data=llm_data)
-
-        results = []
-        truncated = False
-        truncated_reason = ""
-        if connection_type in ("mysql", "postgresql"):
-            # 【已知限制】MySQL/PostgreSQL查询超时 — KISS原则，记录为已知限制
-            # MySQL: 需要KILL QUERY <process_id>，需额外连接，复杂度高
-            # PostgreSQL: 需要pg_cancel_backend(<pid>)，需superuser权限
-            # 当前仅SQLite支持conn.interrupt()中断查询
-            from sqlalchemy import text
-            engine = conn.engine
-            result = conn.execute(text(sql))
-            columns = list(result.keys()) if hasattr(result, 'keys') else []
-            for row in result:
-                if len(results) >= limit:
-                    truncated = True
-                    break
-                results.append(dict(zip(columns, row)))
+        target = (connection_type, connection_string or "", os.path.realpath(path) if path else "")
+        if cursor:
+            page = sql_cursor.take_page(cursor, sql, target, limit)
+            if page is None:
+                duration_ms = int((_time_mod.perf_counter() - t0) * 1000)
+                llm_data = _build_query_sql_llm_data("error", duration_ms, _sql_preview, 0, [], detail=f"游标{cursor}不存在、已读完或已过期({int(QUERY_SQL_CURSOR_TTL)}秒), 或sql/连接与创建游标时不一致",
+                                                       hint="请去掉cursor重新查询", connection_type=connection_type, path=path, limit=limit, timeout=timeout, cursor=cursor)
+                return build_error(data={}, llm_data=llm_data)
+            columns, page_data, remaining, capped = page
+            next_cursor = cursor if remaining > 0 else None
         else:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            _timer = threading.Timer(timeout / 1000, conn.interrupt)
-            _timer.start()
+            conn, engine, conn_error = _get_connection(connection_type, connection_string, path, timeout)
+            if conn is None:
+                duration_ms = int((_time_mod.perf_counter() - t0) * 1000)
+                logger.warning("query_sql连接失败: error=%s, connection_type=%s", conn_error, connection_type)
+                llm_data = _build_query_sql_llm_data("error", duration_ms, _sql_preview, 0, [], detail=conn_error, hint="请检查数据库连接参数",
+                                                       connection_type=connection_type, path=path, limit=limit, timeout=timeout)
+                return build_error(data={}, llm_data=llm_data)
+
+            remaining, capped, next_cursor = 0, False, None
+            if connection_type in ("mysql", "postgresql"):
+                # 【已知限制】MySQL/PostgreSQL查询超时 — KISS原则，记录为已知限制
+                # MySQL: 需要KILL QUERY <process_id>，需额外连接，复杂度高
+                # PostgreSQL: 需要pg_cancel_backend(<pid>)，需superuser权限
+                # 当前仅SQLite支持conn.interrupt()中断查询
+                from sqlalchemy import text
+                result = conn.execute(text(sql))
+                columns = list(result.keys()) if result.returns_rows else []
+                fetchmany, stop_errors = (result.fetchmany if result.returns_rows else (lambda n: [])), ()
+                _timer = None
+            else:
+                db_cursor = conn.cursor()
+                _timer = threading.Timer(timeout / 1000, conn.interrupt)
+                _timer.start()
+                db_cursor.execute(sql)
+                columns = [desc[0] for desc in db_cursor.description] if db_cursor.description else []
+                fetchmany, stop_errors = db_cursor.fetchmany, (sqlite3.OperationalError,)
             try:
-                cursor.execute(sql)
-                columns = [desc[0] for desc in cursor.description] if cursor.description else []
-                for row in cursor:
-                    if len(results) >= limit:
-                        truncated = True
-                        break
-                    results.append(dict(row))
+                # 首页之后的剩余行在本次执行内缓冲为游标(SQLite 剩余部分拉取超时则保留已拉取部分)
+                page_data, _n, exhausted = sql_cursor.fetch_columns(fetchmany, len(columns), limit)
+                if not exhausted:
+                    rest, remaining, capped = sql_cursor.fetch_rest(fetchmany, len(columns), stop_errors)
+                    if remaining:
+                        next_cursor = sql_cursor.open_cursor(sql, target, columns, rest, remaining, capped)
             finally:
-                _timer.cancel()
-        if truncated:
-            truncated_reason = f"已截断：结果超过{limit}行限制，仅返回前{limit}行"
+                if _timer is not None:
+                    _timer.cancel()
+        results = sql_cursor.to_records(columns, page_data)
+        truncated = bool(next_cursor) or capped and remaining <= 0
+        truncated_reason = _page_reason(len(results), remaining, capped, next_cursor) if truncated else ""
 
         duration_ms = int((_time_mod.perf_counter() - t0) * 1000)
         logger.info("query_sql执行完成: rows=%d, truncated=%s, duration=%dms, connection_type=%s",
                      len(results), truncated, duration_ms, connection_type)
-        data = {"columns": columns, "rows": results, "truncated": truncated, "truncated_reason": truncated_reason}
+        data = {"columns": columns, "rows": results, "truncated": truncated, "truncated_reason": truncated_reason,
+                "next_cursor": next_cursor}
         llm_data = _build_query_sql_llm_data("success", duration_ms, _sql_preview, len(results), columns,
                                                connection_type=connection_type, path=path, limit=limit, timeout=timeout,
-                                               truncated=truncated, truncated_reason=truncated_reason)
+                                               truncated=truncated, truncated_reason=truncated_reason,
+                                               cursor=cursor, next_cursor=next_cursor)
         # =============================================================================
         # 数据设计：total 从 data 移除，行数通过 llm_data.metrics（key:row_count）传入 summary
         # summary 示例: "查询返回10行, 列: id, name"
@@ -284,7 +312,7 @@ def query_sql(sql: str, connection_type: Literal["sqlite", "mysql", "postgresql"
                                                connection_type=connection_type, path=path, limit=limit, timeout=timeout)
         return build_error(data={}, llm_data=llm_data)
     finally:
-        _close_connection(conn, engine)
+        _close_connection(conn)
 
 
 __all__ = ["query_sql"]
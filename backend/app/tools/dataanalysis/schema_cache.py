@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: get_db_schema 表结构进程内缓存
+#   【病根】LLM 写 SQL 前后反复调 get_db_schema, 每次都查表清单 + 逐表查列/索引(information_schema/PRAGMA), 大库数百次往返
+#   【改法】①键 (库类型, 连接标识(连接串 / SQLite 文件 realpath), 库名); 表清单与有效 schema 整体缓存, 各表列/索引按需补齐
+#          ②SQLite 每次以 PRAGMA schema_version 校验(任何连接执行 DDL 都会改变); MySQL/PostgreSQL 以 DB_SCHEMA_CACHE_TTL 兜底库外 DDL
+#          ③execute_sql 执行 DDL 后 invalidate 该连接下全部库的缓存; 条目超 DB_SCHEMA_CACHE_MAX_ENTRIES 按最久未用淘汰
+#   【合规】SRP(只管"缓存存取", 反射 SQL 仍在 get_db_schema) + 返回副本, 调用方改动不污染缓存
+"""
+schema_cache — 数据库表结构缓存
+
+调用约定(get_db_schema 内):
+    key = cache_key(connection_type, connection_string, path, db_name)
+    entry = lookup(key, version)                       # version: SQLite schema_version, 其余 None
+    entry = entry or store(key, version, tables, schema)
+    detail = table_detail(entry, table) or set_table_detail(entry, table, columns, indexes)
+execute_sql 执行 DDL 后: invalidate(connection_type, connection_string, path)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.monitoring import record_metric
+from app.tools.tool_constants import DB_SCHEMA_CACHE_TTL, DB_SCHEMA_CACHE_MAX_ENTRIES
+
+_entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _event(event: str) -> None:
+    with _lock:
+        _stats[event] += 1
+    record_metric("db_schema_cache_events_total", 1, {"event": event})
+
+
+def _target(connection_type: str, connection_string: Optional[str], path: Optional[str]) -> tuple:
+    if connection_type == "sqlite":
+        return connection_type, os.path.realpath(path) if path else ""
+    return connection_type, connection_string or ""
+
+
+def cache_key(connection_type: str, connection_string: Optional[str], path: Optional[str],
+              db_name: Optional[str]) -> tuple:
+    return _target(connection_type, connection_string, path) + (db_name or "",)
+
+
+def lookup(key: tuple, version: Optional[int]) -> Optional[Dict[str, Any]]:
+    """有效条目(版本一致且未过期)返回并计命中, 否则 None 计未命中"""
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            stale = entry["version"] != version if version is not None else \
+                time.monotonic() - entry["cached_at"] > DB_SCHEMA_CACHE_TTL
+            if stale:
+                del _entries[key]
+                entry = None
+            else:
+                _entries.move_to_end(key)
+    _event("hits" if entry is not None else "misses")
+    return entry
+
+
+def store(key: tuple, version: Optional[int], tables: List[str], schema: Optional[str]) -> Dict[str, Any]:
+    entry = {"version": version, "cached_at": time.monotonic(), "tables": list(tables), "schema": schema, "details": {}}
+    with _lock:
+        _entries[key] = entry
+        _entries.move_to_end(key)
+        while len(_entries) > DB_SCHEMA_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return entry
+
+
+def table_detail(entry: Dict[str, Any], table: str) -> Optional[Dict[str, List[Dict]]]:
+    """已缓存的某表列/索引(副本), 未缓存返回 None"""
+    detail = entry["details"].get(table)
+    if detail is None:
+        return None
+    return {"columns": [dict(c) for c in detail["columns"]], "indexes": [dict(i) for i in detail["indexes"]]}
+
+
+def set_table_detail(entry: Dict[str, Any], table: str, columns: List[Dict], indexes: List[Dict]) -> Dict[str, List[Dict]]:
+    entry["details"][table] = {"columns": [dict(c) for c in columns], "indexes": [dict(i) for i in indexes]}
+    return {"columns": columns, "indexes": indexes}
+
+
+def invalidate(connection_type: str, connection_string: Optional[str], path: Optional[str]) -> None:
+    """清除该连接(任意库名)下的全部缓存条目"""
+    target = _target(connection_type, connection_string, path)
+    with _lock:
+        doomed = [k for k in _entries if k[:2] == target]
+        for k in doomed:
+            del _entries[k]
+    if doomed:
+        _event("invalidations")
+
+
+def cache_stats() -> Dict[str, Any]:
+    """表结构缓存统计(条目数/命中/未命中/DDL 失效次数/命中率)"""
+    with _lock:
+        stats: Dict[str, Any] = dict(_stats)
+        stats["entries"] = len(_entries)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: query_sql 列式分批拉取 + 分页游标
+#   【病根】query_sql 逐行 dict(zip()) 拼结果, 单次最多 1000 行且超出即丢弃; 想看第 1001 行起只能改 SQL 重跑整条查询
+#   【改法】①fetch_columns: fetchmany 分批拉取, 每批转置为列后逐列 _serialize_column(按列类型分派转换, 日期/Decimal/bytes 等 JSON 安全)
+#          ②首页之外的行(至多 QUERY_SQL_CURSOR_MAX_ROWS)在同一次执行内缓冲为列式游标, 释放数据库连接/读锁
+#          ③query_sql(cursor=...) 按游标续读下一页, 不重跑查询; 游标 QUERY_SQL_CURSOR_TTL 过期, 并存数超 QUERY_SQL_CURSOR_MAX_OPEN 淘汰最久未用
+#   【合规】SRP(只管"拉取/缓冲/分页", 只读校验/连接/超时仍在 query_sql) + 不长期占用连接(SQLite 读锁不阻塞后续 execute_sql)
+"""
+sql_cursor — query_sql 列式结果与分页游标
+
+调用约定(query_sql 内):
+    page, n, exhausted = fetch_columns(fetchmany, width, limit)
+    rest, rest_n, capped = fetch_rest(fetchmany, width)          # exhausted=False 时, 剩余行缓冲
+    cursor_id = open_cursor(sql, target, columns, rest, rest_n, capped)
+    rows = to_records(columns, page)
+续读: entry = take_page(cursor_id, sql, target, limit) → (columns, page, remaining, capped) 或 None(过期/不匹配)
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.tools.tool_constants import (
+    QUERY_SQL_FETCH_BATCH, QUERY_SQL_CURSOR_MAX_ROWS, QUERY_SQL_CURSOR_TTL, QUERY_SQL_CURSOR_MAX_OPEN,
+)
+from app.tools.tool_fc_helper import _serialize_column
+
+_cursors: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+# ============================================================
+# 列式拉取
+# ============================================================
+
+def fetch_columns(fetchmany: Callable[[int], Sequence[Sequence[Any]]], width: int, max_rows: int,
+                  stop_errors: Tuple[type, ...] = ()) -> Tuple[List[List[Any]], int, bool]:
+    """分批 fetchmany 至多 max_rows 行, 返回 (列式 JSON 安全值, 行数, 结果集是否已读完);
+       拉取中抛 stop_errors(如 SQLite 超时中断)时保留已拉取部分, 按未读完返回"""
+    columns: List[List[Any]] = [[] for _ in range(width)]
+    fetched = 0
+    exhausted = False
+    while fetched < max_rows:
+        want = min(QUERY_SQL_FETCH_BATCH, max_rows - fetched)
+        try:
+            batch = fetchmany(want)
+        except stop_errors:
+            break
+        if batch:
+            for col, values in zip(columns, zip(*batch)):
+                col.extend(_serialize_column(list(values)))
+            fetched += len(batch)
+        if len(batch) < want:
+            exhausted = True
+            break
+    return columns, fetched, exhausted
+
+
+def fetch_rest(fetchmany: Callable[[int], Sequence[Sequence[Any]]], width: int,
+               stop_errors: Tuple[type, ...] = ()) -> Tuple[List[List[Any]], int, bool]:
+    """首页之后的剩余行(至多 QUERY_SQL_CURSOR_MAX_ROWS), 返回 (列式值, 行数, 是否因上限/超时未读完)"""
+    columns, fetched, exhausted = fetch_columns(fetchmany, width, QUERY_SQL_CURSOR_MAX_ROWS, stop_errors)
+    if exhausted:
+        return columns, fetched, False
+    if fetched < QUERY_SQL_CURSOR_MAX_ROWS:  # 未到上限却未读完: 被 stop_errors 中断
+        return columns, fetched, True
+    try:
+        return columns, fetched, bool(fetchmany(1))
+    except stop_errors:
+        return columns, fetched, True
+
+
+def to_records(columns: List[str], data: List[List[Any]]) -> List[Dict[str, Any]]:
+    """列式值 → 行 dict 列表(query_sql 对外结构不变)"""
+    return [dict(zip(columns, row)) for row in zip(*data)] if data else []
+
+
+# ============================================================
+# 分页游标
+# ============================================================
+
+def _expire(now: float) -> None:
+    """持锁调用: 删除过期游标"""
+    for cid in [c for c, e in _cursors.items() if now - e["touched"] > QUERY_SQL_CURSOR_TTL]:
+        del _cursors[cid]
+
+
+def open_cursor(sql: str, target: tuple, columns: List[str], data: List[List[Any]], rows: int, capped: bool) -> str:
+    """登记缓冲的剩余行, 返回游标 id"""
+    cursor_id = f"qc-{secrets.token_hex(6)}"
+    now = time.monotonic()
+    with _lock:
+        _expire(now)
+        _cursors[cursor_id] = {"sql": sql.strip(), "target": target, "columns": columns, "data": data,
+                               "rows": rows, "pos": 0, "capped": capped, "touched": now}
+        while len(_cursors) > QUERY_SQL_CURSOR_MAX_OPEN:
+            _cursors.popitem(last=False)
+    return cursor_id
+
+
+def take_page(cursor_id: str, sql: str, target: tuple,
+              limit: int) -> Optional[Tuple[List[str], List[List[Any]], int, bool]]:
+    """按游标取下一页: (columns, 列式页数据, 剩余行数, 是否曾因上限截断); 游标不存在/过期/SQL 或连接不符返回 None。读完即关闭"""
+    now = time.monotonic()
+    with _lock:
+        _expire(now)
+        entry = _cursors.get(cursor_id)
+        if entry is None or entry["sql"] != sql.strip() or entry["target"] != target:
+            return None
+        start = entry["pos"]
+        end = min(start + limit, entry["rows"])
+        page = [col[start:end] for col in entry["data"]]
+        entry["pos"] = end
+        entry["touched"] = now
+        remaining = entry["rows"] - end
+        if remaining <= 0:
+            del _cursors[cursor_id]
+        else:
+            _cursors.move_to_end(cursor_id)
+    return entry["columns"], page, remaining, entry["capped"]
@@ -1,6 +1,4 @@
 # -*- coding: utf-8 -*-
 """DESKTOP Tools - 桌面工具模块 — 小健 2026-06-22 拆分为16个独立文件"""
-
-from app.tools.desktop.desktop_register import *
-
-__all__ = ["_register_desktop_tools"]
+# 2026-10-17 - 小欧 - 包初始化不再导入 desktop_register(连带本分类全部工具实现): 导入本包任一子模块不再拖入整个分类;
+#   注册入口由 tool_constants.CATEGORY_MODULES 直指 app.tools.desktop.desktop_register
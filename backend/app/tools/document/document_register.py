@@ -7,6 +7,7 @@ Document Register - 文档操作工具注册点（仅DOCUMENT分类）
 【2026-07-20 小欧】加描述规范:工具描述保持简洁不冗余,能力详情与默认支持能力只写在 schema 类 docstring,禁止在 register 工具描述里重复
 【2026-07-21 小欧】补 read_pdf/read_docx/read_pptx 翻页示例(page/pages/offset/limit/tail/slide), 对齐5259ef2ed新增参数; 此前schema漏更新致LLM看不到且校验拒收, 本次连schema一并修复
 【2026-07-31 小欧】TOOL_DEPENDENCIES 依赖修正: read_xlsx/write_xlsx 移除 pandas(实际仅用 openpyxl), write_pdf 移除 pdfplumber(实际仅用 reportlab); 同步修正文件头工具列表依赖注释
+【2026-10-17 小欧】read_pdf 描述/示例补 tables/images 按需提取参数(默认仅提取文本)
 
 【工具列表】(共8个) → DOCUMENT分类:
 1. read_pdf - 读取PDF文档 (依赖: pdfplumber)
@@ -68,7 +69,7 @@ from app.tools.document.write_pptx import write_pptx
 # 能力详情与默认支持的能力只写在对应 Schema 类的 docstring 里(会进入 JSON Schema 发给 LLM);
 # 本字典仅作一句话路由/适用场景说明,严禁重复 schema docstring 内容。
 DESCRIPTIONS = {
-    "read_pdf": """读取PDF(.pdf)文件内容。自动提取文本、表格和图片。适用场景:需要读取PDF文档内容时使用。""",
+    "read_pdf": """读取PDF(.pdf)文件内容。默认提取文本, 需要表格/图片信息时传 tables/images=true。适用场景:需要读取PDF文档内容时使用。""",
     "read_docx": """读取Word(.docx)文档内容。自动提取文本和表格。适用场景:需要读取Word文档内容时使用。""",
     "read_pptx": """读取PPT(.pptx)演示文稿内容。自动提取每页文本和备注。适用场景:需要读取PPT内容时使用。""",
     "read_xlsx": """读取Excel(.xlsx/.csv)文件。自动检测编码和分隔符,自动识别表头。适用场景:需要读取表格数据时使用。""",
@@ -84,6 +85,7 @@ EXAMPLES = {
         {"path": "D:/documents/report.pdf"},
         {"path": "D:/documents/report.pdf", "page": 3},
         {"path": "D:/documents/report.pdf", "pages": "5-10"},
+        {"path": "D:/documents/report.pdf", "page": 2, "tables": True},
     ],
     "read_docx": [
         {"path": "D:/documents/report.docx"},
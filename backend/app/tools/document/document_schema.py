@@ -17,6 +17,7 @@
 # 2026-07-28 - 小欧 - description精确化: write_pptx.path/write_docx.path/write_xlsx.path/write_pdf.path 全部加"必填"标注
 # 2026-07-31 - 小欧 - ReadPdfInput 补 page/pages 互斥校验(model_validator): 二者同时指定时报 ValueError, 与运行时逻辑对齐(Pydantic 层即拦截非法组合); 移除未使用 Literal 导入
 # 2026-08-07 - 小欧 - WriteXlsxInput 新增 append_mode 字段(追加模式): True=文件已存在时末尾追加, False=默认覆盖; 与 write_xlsx 实现层同步 — 小欧 2026-08-07
+# 2026-10-17 - 小欧 - ReadPdfInput 新增 tables/images 字段(默认 False): 表格/图片信息按需提取, 默认仅提取文本
 """
 Document Schema - 文档工具参数模型
 
@@ -42,6 +43,8 @@ class ReadPdfInput(BaseModel):
     path: str = Field(..., description="文件名+路径(.pdf)")
     page: Optional[int] = Field(default=None, description="1-based; 与pages互斥，二选一；不传则读取默认前几页")
     pages: Optional[Union[int, str, List[int]]] = Field(default=None, description="1-based; 与page互斥")
+    tables: bool = Field(default=False, description="True=同时提取所选页表格(较慢)")
+    images: bool = Field(default=False, description="True=同时提取所选页图片位置信息")
 
     @model_validator(mode="after")
     def _check_page_pages_mutually_exclusive(self):
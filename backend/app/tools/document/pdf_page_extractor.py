@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: read_pdf 页级提取 + 页级缓存 + 整本并行提取(从 read_pdf._process_page/_extract_with_fitz 迁入并改为按页)
+#   【病根】read_pdf 不论 page/pages 选了几页, 都对全部页跑 pdfplumber 文本+表格+图片提取, 再事后按页过滤;
+#          乱码回退 fitz 又整本重解析一遍; 逐页翻阅 500 页 PDF 时每次调用都从头解析整本
+#   【改法】①PdfDocument 懒打开: 一次调用最多打开一次 pdfplumber, 只处理所需页, 表格/图片仅在请求时提取
+#          ②进程内页级缓存, 键 (realpath, size, mtime_ns, 页号, 模式), 文件变化自动失效; 全部命中时不打开 PDF
+#          ③fitz 回退只读所选页(结果同样入缓存)
+#          ④未命中页数 >= READ_PDF_PARALLEL_MIN_PAGES 且 CPU>1 时按块派到共用进程池(toolhelper/cpu_pool)并行提取
+#   【合规】SRP(只管"取页内容", 页选择校验/llm_data 仍在 read_pdf) + 输出每页格式不变
+"""
+pdf_page_extractor — PDF 页级提取与缓存
+
+调用约定(read_pdf 内):
+    with PdfDocument(path) as doc:
+        n = doc.page_count                                     # 命中缓存时不打开 PDF
+        pages = doc.read(page_nums, tables=False, images=False)  # [PdfPage(text, tables, images)], 与 page_nums 对齐
+        fb = doc.read_fitz(page_nums, tables, images)            # 乱码回退(PyMuPDF)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.tools.tool_constants import (
+    READ_PDF_CACHE_MAX_CHARS, READ_PDF_PARALLEL_MIN_PAGES, READ_PDF_PARALLEL_CHUNK_PAGES,
+)
+from app.tools.toolhelper.cpu_pool import cpu_workers, get_cpu_pool, discard_cpu_pool
+from app.logger import logger
+
+
+class PdfPage(NamedTuple):
+    """单页提取结果; 未请求的表格/图片为空列表"""
+    text: str
+    tables: List[dict]
+    images: List[dict]
+
+
+# 文档键: (realpath, size, mtime_ns)
+_DocKey = Tuple[str, int, int]
+
+
+# ============================================================
+# 页级缓存
+# ============================================================
+
+class _PageCache:
+    """(文档键, 页号, 模式) → 值; 按字符量 LRU 淘汰 — 小欧 2026-10-17"""
+
+    def __init__(self, max_chars: int):
+        self._max_chars = max_chars
+        self._chars = 0
+        self._items: "OrderedDict[tuple, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: tuple, value: Any, cost: int) -> None:
+        if cost > self._max_chars:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._chars -= old[1]
+            self._items[key] = (value, cost)
+            self._chars += cost
+            while self._chars > self._max_chars:
+                _k, (_v, c) = self._items.popitem(last=False)
+                self._chars -= c
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._chars = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._items), "chars": self._chars, "max_chars": self._max_chars,
+                    "hits": self.hits, "misses": self.misses}
+
+
+_cache = _PageCache(READ_PDF_CACHE_MAX_CHARS)
+
+
+def _cost(mode: str, value: Any) -> int:
+    """缓存计量(近似字符数)"""
+    if mode in ("text", "fitz_text"):
+        return len(value) + 64
+    if mode == "tables":
+        return 64 + sum(len(str(cell or "")) for t in value for row in (t.get("rows") or []) for cell in row)
+    return 64 + 64 * len(value)
+
+
+def cache_stats() -> Dict[str, int]:
+    """页级缓存统计(条目/字符量/命中/未命中)"""
+    return _cache.stats()
+
+
+# ============================================================
+# 单页提取(pdfplumber / fitz)
+# ============================================================
+
+def _plumber_page(page, page_num: int, modes: Iterable[str]) -> Dict[str, Any]:
+    """pdfplumber 单页按模式提取 — 原 read_pdf._process_page(小欧 2026-07-07), 2026-10-17 改为按需模式"""
+    out: Dict[str, Any] = {}
+    for mode in modes:
+        if mode == "text":
+            out["text"] = page.extract_text() or ""
+        elif mode == "tables":
+            out["tables"] = [{"page": page_num, "rows": table.extract()} for table in page.find_tables()]
+        elif mode == "images":
+            out["images"] = [{
+                "page": page_num,
+                "width": img.get("width", 0),
+                "height": img.get("height", 0),
+                "x0": img.get("x0", 0),
+                "top": img.get("top", 0),
+            } for img in page.images]
+    page.close()  # 释放该页布局缓存(pdf.pages 常驻 Page 对象)
+    return out
+
+
+def _fitz_page(page, page_num: int, modes: Iterable[str]) -> Dict[str, Any]:
+    """PyMuPDF 单页按模式提取 — 原 read_pdf._extract_with_fitz(小欧 2026-07-08/07-31), 2026-10-17 改为按页"""
+    out: Dict[str, Any] = {}
+    for mode in modes:
+        if mode == "fitz_text":
+            out["fitz_text"] = page.get_text() or ""
+        elif mode == "fitz_tables":
+            out["fitz_tables"] = [{"page": page_num, "note": "PyMuPDF不提供表格提取"}]
+        elif mode == "fitz_images":
+            out["fitz_images"] = [{
+                "page": page_num,
+                "width": 0, "height": 0,
+                "note": "图片引用索引, 实际尺寸需渲染后获取",
+            } for _img in page.get_images()]
+    return out
+
+
+def _extract_chunk(path: str, wanted: List[Tuple[int, Tuple[str, ...]]]) -> List[Dict[str, Any]]:
+    """并行工作进程内: 打开一次 PDF, 按 [(页号, 模式)] 提取"""
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return [_plumber_page(pdf.pages[pn - 1], pn, modes) for pn, modes in wanted]
+
+
+# ============================================================
+# 文档
+# ============================================================
+
+class PdfDocument:
+    """一次 read_pdf 调用内的 PDF 句柄: 懒打开 pdfplumber, 页内容走页级缓存 — 小欧 2026-10-17"""
+
+    def __init__(self, path: str):
+        st = os.stat(path)
+        self.path = str(path)
+        self.key: _DocKey = (os.path.realpath(path), st.st_size, st.st_mtime_ns)
+        self._pdf = None
+        self._page_count: Optional[int] = None
+
+    def __enter__(self) -> "PdfDocument":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    def _open(self):
+        if self._pdf is None:
+            import pdfplumber
+            self._pdf = pdfplumber.open(self.path)
+        return self._pdf
+
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            cached = _cache.get((self.key, 0, "count"))
+            if cached is None:
+                cached = len(self._open().pages)
+                _cache.put((self.key, 0, "count"), cached, 16)
+            self._page_count = cached
+        return self._page_count
+
+    def _fill(self, page_nums: List[int], modes: Tuple[str, ...], extractor) -> Dict[Tuple[int, str], Any]:
+        """取 page_nums x modes 的缓存值, 未命中的交给 extractor([(页号, 缺失模式)]) 提取并回填"""
+        found: Dict[Tuple[int, str], Any] = {}
+        wanted: List[Tuple[int, Tuple[str, ...]]] = []
+        for pn in page_nums:
+            missing = []
+            for mode in modes:
+                value = _cache.get((self.key, pn, mode))
+                if value is None:
+                    missing.append(mode)
+                else:
+                    found[(pn, mode)] = value
+            if missing:
+                wanted.append((pn, tuple(missing)))
+        if wanted:
+            for (pn, _modes), extracted in zip(wanted, extractor(wanted)):
+                for mode, value in extracted.items():
+                    _cache.put((self.key, pn, mode), value, _cost(mode, value))
+                    found[(pn, mode)] = value
+        return found
+
+    def _extract_plumber(self, wanted: List[Tuple[int, Tuple[str, ...]]]) -> List[Dict[str, Any]]:
+        if len(wanted) >= READ_PDF_PARALLEL_MIN_PAGES and cpu_workers() > 1:
+            ex = get_cpu_pool()
+            step = READ_PDF_PARALLEL_CHUNK_PAGES
+            try:
+                futures = [ex.submit(_extract_chunk, self.path, wanted[i:i + step])
+                           for i in range(0, len(wanted), step)]
+                return [item for fut in futures for item in fut.result()]
+            except BrokenProcessPool:
+                logger.warning("[read_pdf] 并行提取进程池异常退出, 本次改为顺序提取")
+                discard_cpu_pool(ex)
+        pdf = self._open()
+        return [_plumber_page(pdf.pages[pn - 1], pn, modes) for pn, modes in wanted]
+
+    def read(self, page_nums: List[int], tables: bool = False, images: bool = False) -> List[PdfPage]:
+        """pdfplumber 提取所选页(1-based), 结果与 page_nums 对齐"""
+        modes = ("text",) + (("tables",) if tables else ()) + (("images",) if images else ())
+        found = self._fill(page_nums, modes, self._extract_plumber)
+        return [PdfPage(found[(pn, "text")], found.get((pn, "tables"), []), found.get((pn, "images"), []))
+                for pn in page_nums]
+
+    def read_fitz(self, page_nums: List[int], tables: bool = False, images: bool = False) -> List[PdfPage]:
+        """PyMuPDF 后备提取所选页(乱码回退), 结果与 page_nums 对齐"""
+        modes = ("fitz_text",) + (("fitz_tables",) if tables else ()) + (("fitz_images",) if images else ())
+
+        def _extract(wanted):
+            import fitz
+            doc = fitz.open(self.path)
+            try:
+                return [_fitz_page(doc[pn - 1], pn, m) for pn, m in wanted]
+            finally:
+                doc.close()
+
+        found = self._fill(page_nums, modes, _extract)
+        return [PdfPage(found[(pn, "fitz_text")], found.get((pn, "fitz_tables"), []),
+                        found.get((pn, "fitz_images"), []))
+                for pn in page_nums]
@@ -21,6 +21,9 @@
 # 2026-07-26 - 小沈 - BugFix #3: path参数不覆盖
 # 2026-07-31 - 小欧 - Bug⑦修复: _is_garbled_text 仅统计 \ufffd 替换字符, 不再统计普通'?'(正文合法问号占比高时误触发fitz后备); Bug⑮修复: _extract_with_fitz 返回按页对齐文本列表, 防页内含空行 split("\n\n") 页码错位 | py_compile ✓
 # 2026-08-13 - 小欧 - A5职责拆分: hint_* 错误提示函数/导入源改 app.tools.toolhelper.error_hints
+# 2026-10-17 - 小欧 - 页定向提取: 先定页再提取(只处理所选页), 表格/图片改为 tables/images 参数按需提取;
+#   页内容走 pdf_page_extractor 页级缓存(键含 size/mtime_ns), 连续翻页不再整本重解析; fitz 回退只读所选页;
+#   _process_page/_extract_with_fitz 迁入 pdf_page_extractor(按页、按模式)
 """
 D1: read_pdf — 读取PDF文档
 
@@ -33,7 +36,7 @@ D1: read_pdf — 读取PDF文档
 
 import time as _time_mod
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional
 
 from app.tools.tool_response import build_success, build_error
 from app.tools.tool_fc_helper import _check_module
@@ -41,6 +44,7 @@ from app.tools.validate.file_type_checker import check_for_document_tool
 from app.tools.toolhelper.error_hints import hint_for_read_error
 from app.tools.tool_constants import ERR_DOC_READ_PDF, READ_PDF_OUTLIMIT_DEFAULT_PAGES
 from app.utils.text_utils import truncate_summary
+from app.tools.document.pdf_page_extractor import PdfDocument
 
 
 def _is_garbled_text(text: str, threshold: float = 0.30) -> bool:
@@ -101,28 +105,6 @@ def _parse_pdf_pages(page, pages, page_count: int):
     return out
 
 
-def _extract_with_fitz(file_path: str) -> Tuple[list, list, list]:
-    """PyMuPDF后备提取文本+表格+图片 — 小欧 2026-07-08
-       2026-07-31 小欧: Bug⑮修复 — 返回按页对齐的文本列表(每页一个元素, 含---第N页---标记), 不再join后split("\n\n")造成页内含空行时页码错位; 移除未使用page_count参数
-    """
-    import fitz
-    all_text, tables_data, images_data = [], [], []
-    doc = fitz.open(file_path)
-    for pn in range(doc.page_count):
-        page = doc[pn]
-        text = page.get_text() or ""
-        all_text.append(f"--- 第 {pn + 1} 页 ---\n{text}")
-        tables_data.append({"page": pn + 1, "note": "PyMuPDF不提供表格提取"})
-        for img in page.get_images():
-            images_data.append({
-                "page": pn + 1,
-                "width": 0, "height": 0,
-                "note": "图片引用索引, 实际尺寸需渲染后获取",
-            })
-    doc.close()
-    return all_text, tables_data, images_data
-
-
 def _build_read_pdf_llm_data(
     exec_code: str, duration_ms: int,
     file_path: str = "", page_count: int = 0, pages_read: int = 0,
@@ -160,35 +142,13 @@ def _build_read_pdf_llm_data(
     }
 
 
-def _process_page(page, page_num: int, extract_tables: bool = True, extract_images: bool = True) -> Tuple[str, List, List]:
-    """提取单页PDF的文本、表格和图片 — 小欧 2026-07-07
-
-    pdfplumber从document_tools.py拆分出来时遗漏了此函数
-    """
-    text = page.extract_text() or ""
-    tables = []
-    if extract_tables:
-        for table in page.find_tables():
-            tables.append({
-                "page": page_num,
-                "rows": table.extract(),
-            })
-    images = []
-    if extract_images:
-        for img in page.images:
-            images.append({
-                "page": page_num,
-                "width": img.get("width", 0),
-                "height": img.get("height", 0),
-                "x0": img.get("x0", 0),
-                "top": img.get("top", 0),
-            })
-    return text, tables, images
-
-
-def read_pdf(path: str, page: Optional[int] = None, pages: Optional[Any] = None) -> Dict[str, Any]:
+def read_pdf(
+    path: str, page: Optional[int] = None, pages: Optional[Any] = None,
+    tables: bool = False, images: bool = False,
+) -> Dict[str, Any]:
     """读取PDF文件 — 小沈 2026-06-19 — 小欧 2026-06-22 独立文件 — 小欧 2026-06-24 增加文件类型前置检查
-    2026-07-21 默认值+字节安全双治理(小欧): READ_PDF_OUTLIMIT_DEFAULT_PAGES=200 作为未传参时的默认读取页数, READ_PDF_INPUT_MAX_BYTES=50MB 作为硬安全字节上限"""
+    2026-07-21 默认值+字节安全双治理(小欧): READ_PDF_OUTLIMIT_DEFAULT_PAGES=200 作为未传参时的默认读取页数, READ_PDF_INPUT_MAX_BYTES=50MB 作为硬安全字节上限
+    2026-10-17 小欧: 只提取所选页; tables/images 为 True 时才提取表格/图片信息; 页内容走页级缓存"""
     t0 = _time_mod.perf_counter()
     file_path = path
 
@@ -211,8 +171,6 @@ def read_pdf(path: str, page: Optional[int] = None, pages: Optional[Any] = None)
         return build_error(data={}, llm_data=llm_data)
 
     try:
-        import pdfplumber
-
         _p = Path(file_path)
         # 校验PDF文件头（前5字节应为%PDF），提前拦截非PDF文件 — 小欧 2026-07-07
         with open(_p, 'rb') as fh:
@@ -222,61 +180,40 @@ def read_pdf(path: str, page: Optional[int] = None, pages: Optional[Any] = None)
             llm_data = _build_read_pdf_llm_data("error", duration_ms, file_path, detail="文件不是有效的PDF格式（缺少%PDF头）", hint="请确认文件是PDF格式")
             return build_error(data={}, llm_data=llm_data)
 
-        pages_text: List[str] = []
-        read_page_nums: List[int] = []
-        tables_data: List[dict] = []
-        images_data: List[dict] = []
-        with pdfplumber.open(_p) as pdf:
-            page_count = len(pdf.pages)
-            for pn in range(1, page_count + 1):
-                pdf_page = pdf.pages[pn - 1]
-                text, tables, images = _process_page(pdf_page, pn, extract_tables=True, extract_images=True)
-                pages_text.append(f"--- 第 {pn} 页 ---\n{text}")
-                read_page_nums.append(pn)
-                tables_data.extend(tables)
-                images_data.extend(images)
-
-        full_text = "\n\n".join(pages_text)
+        # —— 先定页再提取: 传参读指定页, 否则默认前 READ_PDF_OUTLIMIT_DEFAULT_PAGES 页 — 小欧 2026-10-17 ——
+        truncated_hint = ""
+        with PdfDocument(file_path) as doc:
+            page_count = doc.page_count
+            if page is not None or pages is not None:
+                selected_pages = _parse_pdf_pages(page, pages, page_count)
+                if selected_pages is None:
+                    duration_ms = int((_time_mod.perf_counter() - t0) * 1000)
+                    llm_data = _build_read_pdf_llm_data("error", duration_ms, file_path,
+                                                        detail="page/pages 参数无效(超出范围或非数字)", hint="page 为 1..总页数 的整数; pages 可为整数/列表/'a-b'", page_count=page_count)
+                    return build_error(data={}, llm_data=llm_data)
+            else:
+                selected_pages = list(range(1, min(page_count, READ_PDF_OUTLIMIT_DEFAULT_PAGES) + 1))
+                if page_count > READ_PDF_OUTLIMIT_DEFAULT_PAGES:
+                    truncated_hint = f"文档共 {page_count} 页, 默认仅读前 {READ_PDF_OUTLIMIT_DEFAULT_PAGES} 页, 用 page=N 读取指定页"
 
-        # CJK乱码检测: 当U+FFFD占比>30%时，尝试PyMuPDF后备提取 — 小欧 2026-07-08 — 小欧 2026-07-31 Bug⑮ 按页对齐
-        fitz_used = False
-        if _is_garbled_text(full_text):
-            try:
-                if _check_module("fitz"):
-                    fitz_pages, fitz_tables, fitz_images = _extract_with_fitz(file_path)
-                    if not _is_garbled_text("\n\n".join(fitz_pages)):
-                        pages_text = fitz_pages
-                        tables_data = fitz_tables
-                        images_data = fitz_images
-                        fitz_used = True
-            except Exception:
-                pass
+            extracted = doc.read(selected_pages, tables=tables, images=images)
+            full_text = "\n\n".join(f"--- 第 {pn} 页 ---\n{pg.text}" for pn, pg in zip(selected_pages, extracted))
 
-        # —— 按页选取: 传参读指定页, 否则默认前 READ_PDF_OUTLIMIT_DEFAULT_PAGES 页; 字节检查兜底OOM ——
-        selected: List[str] = []
-        selected_pages: List[int] = []
-        truncated_hint = ""
-        if page is not None or pages is not None:
-            want = _parse_pdf_pages(page, pages, page_count)
-            if want is None:
-                duration_ms = int((_time_mod.perf_counter() - t0) * 1000)
-                llm_data = _build_read_pdf_llm_data("error", duration_ms, file_path,
-                                                    detail="page/pages 参数无效(超出范围或非数字)", hint="page 为 1..总页数 的整数; pages 可为整数/列表/'a-b'", page_count=page_count)
-                return build_error(data={}, llm_data=llm_data)
-            selected_pages = want
-            selected = [pages_text[i - 1] for i in want if 1 <= i <= len(pages_text)]
-        else:
-            selected = pages_text[:READ_PDF_OUTLIMIT_DEFAULT_PAGES]
-            selected_pages = read_page_nums[:READ_PDF_OUTLIMIT_DEFAULT_PAGES]
-            if page_count > READ_PDF_OUTLIMIT_DEFAULT_PAGES:
-                truncated_hint = f"文档共 {page_count} 页, 默认仅读前 {READ_PDF_OUTLIMIT_DEFAULT_PAGES} 页, 用 page=N 读取指定页"
+            # CJK乱码检测: 当U+FFFD占比>30%时，尝试PyMuPDF后备提取(仅所选页) — 小欧 2026-07-08 — 小欧 2026-07-31 Bug⑮ 按页对齐
+            fitz_used = False
+            if _is_garbled_text(full_text):
+                try:
+                    if _check_module("fitz"):
+                        fitz_pages = doc.read_fitz(selected_pages, tables=tables, images=images)
+                        fitz_text = "\n\n".join(f"--- 第 {pn} 页 ---\n{pg.text}" for pn, pg in zip(selected_pages, fitz_pages))
+                        if not _is_garbled_text(fitz_text):
+                            extracted, full_text = fitz_pages, fitz_text
+                            fitz_used = True
+                except Exception:
+                    pass
 
-        full_text = "\n\n".join(selected)
-        # tables/images 仅保留所选页(按 page 号过滤; fitz 路径无 page 号则整体保留)
-        if selected_pages and not fitz_used:
-            sel_set = set(selected_pages)
-            tables_data = [t for t in tables_data if t.get("page") in sel_set]
-            images_data = [i for i in images_data if i.get("page") in sel_set]
+        tables_data: List[dict] = [t for pg in extracted for t in pg.tables]
+        images_data: List[dict] = [i for pg in extracted for i in pg.images]
 
         result = {"text": full_text}
         if tables_data:
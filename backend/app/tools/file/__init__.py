@@ -1,23 +1,4 @@
 # -*- coding: utf-8 -*-
 """Tools/File 模块 - 文件操作工具集"""
-
-from app.tools.file.file_register import *  # 2026-07-31 小欧: 移除未使用 ALLOWED_PATHS, get_default_allowed_paths
-
-
-__all__ = [
-
-    "ReadtextInput",
-    "WritetextInput",
-    "ReadmediaInput",
-    "EdittextInput",
-    "ListdirInput",
-    "TreeInput",
-    "FindInput",
-    "GrepInput",
-    "CompressInput",
-    "ExtractInput",
-    "MoveInput",
-    "CopyInput",
-    "DeleteInput",
-    "RenameInput",
-]
+# 2026-10-17 - 小欧 - 包初始化不再导入 file_register(连带本分类全部工具实现): 导入本包任一子模块不再拖入整个分类;
+#   注册入口由 tool_constants.CATEGORY_MODULES 直指 app.tools.file.file_register
@@ -2,18 +2,21 @@
 file_encoding — 文件编码检测公用函数
 DRY: 从write_text_file/read_text_file/edit_text_file提取 — 小欧 2026-06-30
       新增 safe_read_lines — 小沈 2026-07-05
+      2026-10-17 - 小欧 - safe_read_lines → decode_text_bytes(整块字节解码, 编码只采样前缀探测; 唯一调用方 grep 改走 grep_engine)
       2026-08-09 - 小欧 - 新增 read_file_with_encodings(合并 read_text_file/edit_text_file 两份 _try_read_file_with_encodings
       私有实现为公共版, 统一替换符阈值+mojibake检查); _looks_like_mojibake 迁入本模块
 """
 
 import asyncio
+import codecs
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 from app.tools.tool_fc_helper import _detect_encoding
 from app.logger import logger
 from app.tools.tool_constants import READTEXT_INER_CJK_SAMPLE  # 小欧 2026-08-09: mojibake检测迁入公共
+from app.tools.tool_constants import GREP_ENGINE_ENCODING_SAMPLE_BYTES
 
 
 _ENCODING_PRIORITY = [
@@ -23,35 +26,38 @@ _ENCODING_PRIORITY = [
 ]
 
 
-def safe_read_lines(file_path: Path, max_size: int = 0) -> Optional[List[str]]:
-    """安全读取文件行,自动编码检测+多编码尝试+replace兜底 — 小沈 2026-07-05
-    Args:
-        file_path: 文件路径
-        max_size: 最大文件字节数(0=不限制)
-    Returns:
-        文件行列表,读取失败返回 None
+def detect_sample_encoding(sample: bytes) -> Optional[str]:
+    """按文件首块样本探测编码(grep_engine 用) — 小欧 2026-10-17
+    BOM → utf-8-sig; 样本可按 UTF-8 解码(容忍样本尾部截断的半个多字节字符)→ utf-8 不跑 chardet;
+    否则 chardet 只对样本检测(置信度 >0.5 才采纳)。返回 None 表示无可信结果, 由调用方走优先级列表。
     """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
     try:
-        if max_size and file_path.stat().st_size > max_size:
-            return None
-    except OSError:
-        return None
-
-    # chardet 自动检测
-    detected_enc = None
+        sample.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        if e.reason == "unexpected end of data" and e.start >= len(sample) - 3:
+            return "utf-8"
     try:
         import chardet as _chardet
-        raw = file_path.read_bytes()
-        det = _chardet.detect(raw)
+        det = _chardet.detect(sample)
         if det and det.get("encoding") and det.get("confidence", 0) > 0.5:
-            detected_enc = det["encoding"]
+            return det["encoding"]
     except Exception:
         pass
+    return None
+
 
-    # 构建编码列表: chardet 结果优先
-    enc_list = []
-    if detected_enc:
-        enc_list.append(detected_enc)
+def decode_text_bytes(raw, sample_bytes: int = GREP_ENGINE_ENCODING_SAMPLE_BYTES) -> Optional[str]:
+    """整块字节(bytes/mmap)解码为文本, 换行统一为 \\n(同文本模式 universal newlines) — 小欧 2026-10-17
+    取代 safe_read_lines(chardet 跑全文 + 逐编码重新 open 读文件): 编码只按前 sample_bytes 字节探测,
+    探测结果优先 + _ENCODING_PRIORITY 依次精确解码; 全部失败走 replace 兜底, 替换率 >5% 的编码跳过。
+    Returns:
+        文本; 无可用编码返回 None
+    """
+    detected_enc = detect_sample_encoding(raw[:sample_bytes])
+    enc_list = [detected_enc] if detected_enc else []
     for enc in _ENCODING_PRIORITY:
         if enc not in enc_list:
             enc_list.append(enc)
@@ -59,27 +65,29 @@ def safe_read_lines(file_path: Path, max_size: int = 0) -> Optional[List[str]]:
     # 精确解码
     for enc in enc_list:
         try:
-            with file_path.open("r", encoding=enc) as f:
-                return f.readlines()
+            return _universal_newlines(str(raw, enc))
         except (UnicodeDecodeError, LookupError):
             continue
 
     # replace 兜底 + 质量检查(替换率 >5% 则跳过)
     for enc in enc_list:
         try:
-            with file_path.open("r", encoding=enc, errors="replace") as f:
-                lines = f.readlines()
-            total_chars = sum(len(line) for line in lines)
-            if total_chars > 0:
-                replace_count = sum(line.count("\ufffd") for line in lines)
-                if replace_count / total_chars > 0.05:
-                    continue
-            return lines
-        except (UnicodeDecodeError, LookupError):
+            text = _universal_newlines(str(raw, enc, "replace"))
+        except LookupError:
             continue
+        if text and text.count("\ufffd") / len(text) > 0.05:
+            continue
+        return text
     return None
 
 
+def _universal_newlines(text: str) -> str:
+    """\\r\\n / \\r → \\n, 与 open(..., "r") 文本模式读取结果一致"""
+    if "\r" not in text:
+        return text
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
 def get_file_encoding(file_path: str) -> Dict[str, Any]:
     """统一编码检测 — 返回 {"data": {"encoding": str, "confidence": float}} — 小欧 2026-06-30"""
     try:
@@ -0,0 +1,548 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: grep 搜索引擎(遍历/扫描/并行/索引编排), grep_file_content._grep_files_sync 改为调用本模块
+#   【病根】旧 _grep_files_sync 单线程 os.walk; 每个文件经 safe_read_lines 读全文 + chardet 跑全部字节 + 逐编码重开文件,
+#          再逐行跑正则; 排序时 _sort_grep_results_by_mtime 对每条命中再 stat 一次。大目录下 chardet 与逐行正则占满耗时
+#   【改法】①scandir 遍历(顺序同 os.walk 自顶向下), 扩展名级二进制跳过在遍历时完成, 带出 stat(mtime/size)供排序复用
+#          ②>= GREP_ENGINE_MMAP_MIN_BYTES 的文件 mmap, 小文件一次 read; 灰区二进制探测直接看缓冲首块
+#          ③编码只采样前缀探测(file_encoding.decode_text_bytes, 解码仍整段拷贝为 str); 整段文本跑一次 MULTILINE 正则定位候选行,
+#            候选行再用原正则逐行 finditer 生成结果 → 输出与逐行扫描逐字节一致; 可能跨行匹配的正则退回逐行扫描
+#          ④待扫文件数 >= GREP_ENGINE_PARALLEL_MIN_FILES 且 CPU>1 时按批派到 spawn 进程池(复用, 懒创建)
+# 2026-10-17 - 小欧 - 并行进程池抽到 toolhelper/cpu_pool(与 read_pdf 整本并行提取共用), 删本模块 shutdown
+#          ⑤可选三元组索引(grep_index): 正则必含字面量的三元组不在文件签名中 → 文件未变则不读
+#   【合规】SRP(只负责"搜出匹配"; 截断/排序/llm_data 仍在 grep_file_content) + 结果契约不变
+# 2026-10-17 - 小欧 - 字节级字面量门控直接跑在 mmap 上 + re 内部模块失效时降级
+#   【病根】①原说"正则跑在 mmap 上"名不副实: decode_text_bytes 用 str(raw, enc) 把整个 mmap 解码成新字符串, 每个文件都全量拷贝,
+#            mmap 只省了编码探测的前缀采样; ②字面量/换行分析依赖私有 re._parser/re._constants, CPython 内部变动会让 grep 整体不可用
+#   【改法】①正则必含的 ASCII 字面量(不含 \r/\n; 忽略大小写时在 i/k/s 处切断)编成 bytes 正则门控, 直接在 mmap/缓冲上 search(不拷贝);
+#            任一字面量缺失且编码与 ASCII 兼容(utf-8/gbk/latin-1 等, ASCII 字节即原字符)→ 判无匹配, 不解码;
+#            门控通过的文件仍整段解码后跑 str 正则(Unicode 语义与逐行扫描一致); utf-16 等非 ASCII 兼容编码不门控
+#          ②re._parser/re._constants 导入与整段分析包在 try 内, 失败只关闭整段扫描/字面量预过滤(逐行扫描, 结果不变)
+"""
+grep_engine — grep 内容搜索引擎
+
+调用约定(同步, 由 grep_file_content 经 asyncio.to_thread 调用):
+    scan = search(path, regex, glob_filter, deadline, context, use_index=False)
+    scan.results / scan.total_files / scan.total_matches / scan.deadline_exceeded
+    scan.skipped_binaries / scan.mtimes  # mtimes: {文件路径: 遍历时的 st_mtime}, 供结果排序, 不再二次 stat
+
+单条匹配结构与旧实现一致: {file, line, matched, content[, before, after]}。
+"""
+
+import bisect
+import fnmatch as fnm
+import functools
+import itertools
+import mmap
+import os
+import re
+import time
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.tools.tool_constants import (
+    BINARY_EXTENSIONS, SKIP_DIRS, GREP_ENGINE_ENCODING_SAMPLE_BYTES,
+    GREP_ENGINE_MMAP_MIN_BYTES, GREP_ENGINE_PARALLEL_MIN_FILES,
+    GREP_ENGINE_PARALLEL_BATCH_FILES, GREP_INDEX_MIN_FILES,
+)
+from app.tools.validate.file_type_checker import (
+    TEXT_EXTENSIONS, BINARY_PROBE_BYTES, is_binary_file, _detect_binary_bytes,
+)
+from app.tools.file.file_encoding import decode_text_bytes, detect_sample_encoding
+from app.tools.file import grep_index
+from app.tools.toolhelper.cpu_pool import cpu_workers, get_cpu_pool, discard_cpu_pool
+from app.logger import logger
+
+try:  # 私有模块: CPython 内部变动时只关闭整段扫描/字面量预过滤, 不影响 grep 本身
+    import re._constants as _sre_c
+    import re._parser as _sre_p
+except ImportError:  # pragma: no cover
+    _sre_c = _sre_p = None
+
+
+class GrepFile(NamedTuple):
+    """遍历产出的待扫描文件(stat 随遍历带出) — 小欧 2026-10-17"""
+    path: str
+    mtime: float
+    mtime_ns: int
+    size: int
+    probe: bool  # 灰区后缀: 需内容级二进制探测
+    reindex: bool = False  # 三元组索引中无有效条目: 扫描时顺带计算签名
+
+
+class GrepScanResult(NamedTuple):
+    """search 返回值 — 小欧 2026-10-17"""
+    results: List[Dict]
+    total_files: int
+    total_matches: int
+    deadline_exceeded: bool
+    skipped_binaries: List[str]
+    mtimes: Dict[str, float]
+
+
+# 单文件扫描结果: (匹配条目 | None=二进制跳过, 三元组签名 | None)
+_FileHit = Tuple[Optional[List[Dict]], Optional[Tuple[int, bytes]]]
+
+
+# ============================================================
+# 正则分析: 能否整段扫描 / 必含字面量
+# ============================================================
+
+try:
+    _REPEATS = (_sre_c.MAX_REPEAT, _sre_c.MIN_REPEAT, _sre_c.POSSESSIVE_REPEAT)
+    # 字符类中可匹配 "\n" 的类别
+    _NEWLINE_CATEGORIES = frozenset({
+        _sre_c.CATEGORY_SPACE, _sre_c.CATEGORY_NOT_DIGIT,
+        _sre_c.CATEGORY_NOT_WORD, _sre_c.CATEGORY_LINEBREAK,
+    })
+    _NO_NEWLINE_CATEGORIES = frozenset({
+        _sre_c.CATEGORY_DIGIT, _sre_c.CATEGORY_NOT_SPACE,
+        _sre_c.CATEGORY_WORD, _sre_c.CATEGORY_NOT_LINEBREAK,
+    })
+except AttributeError:  # pragma: no cover
+    _sre_p = None
+
+
+class _Unsafe(Exception):
+    """正则含整段扫描无法等价处理的结构"""
+
+
+def _set_may_match_newline(items) -> bool:
+    negate = bool(items) and items[0][0] is _sre_c.NEGATE
+    hit = False
+    for op, av in items:
+        if op is _sre_c.NEGATE:
+            continue
+        if op is _sre_c.LITERAL:
+            hit = hit or av == 10
+        elif op is _sre_c.RANGE:
+            hit = hit or av[0] <= 10 <= av[1]
+        elif op is _sre_c.CATEGORY:
+            if av in _NEWLINE_CATEGORIES:
+                hit = True
+            elif av not in _NO_NEWLINE_CATEGORIES:
+                raise _Unsafe
+        else:
+            raise _Unsafe
+    return hit != negate
+
+
+def _may_match_newline(sub, dotall: bool) -> bool:
+    """解析树中是否存在可匹配 "\\n" 的原子; 后顾断言/\\A/\\Z 等整段语义不同于逐行的结构直接判不安全"""
+    for op, av in sub:
+        if op is _sre_c.LITERAL:
+            if av == 10:
+                return True
+        elif op is _sre_c.NOT_LITERAL:
+            if av != 10:
+                return True
+        elif op is _sre_c.ANY:
+            if dotall:
+                return True
+        elif op is _sre_c.IN:
+            if _set_may_match_newline(av):
+                return True
+        elif op in _REPEATS:
+            if _may_match_newline(av[2], dotall):
+                return True
+        elif op is _sre_c.SUBPATTERN:
+            _group, add_flags, del_flags, p = av
+            scoped = (dotall or bool(add_flags & re.DOTALL)) and not del_flags & re.DOTALL
+            if _may_match_newline(p, scoped):
+                return True
+        elif op is _sre_c.ATOMIC_GROUP:
+            if _may_match_newline(av, dotall):
+                return True
+        elif op is _sre_c.BRANCH:
+            if any(_may_match_newline(alt, dotall) for alt in av[1]):
+                return True
+        elif op in (_sre_c.ASSERT, _sre_c.ASSERT_NOT):
+            direction, p = av
+            if direction < 0:
+                raise _Unsafe
+            if _may_match_newline(p, dotall):
+                return True
+        elif op is _sre_c.AT:
+            if av in (_sre_c.AT_BEGINNING_STRING, _sre_c.AT_END_STRING):
+                raise _Unsafe
+        elif op is _sre_c.GROUPREF_EXISTS:
+            _group, yes, no = av
+            if _may_match_newline(yes, dotall) or (no is not None and _may_match_newline(no, dotall)):
+                return True
+        elif op is _sre_c.GROUPREF:
+            continue  # 引用组内容已在组定义处检查
+        else:
+            raise _Unsafe
+    return False
+
+
+def _required_literals(sub, exact: bool = False) -> List[str]:
+    """匹配必含的字面量片段(仅取顺序结构上的连续 LITERAL; 分支/字符类/可选重复不贡献)
+
+    exact=True 时跳过 (?i:...) 局部忽略大小写的组(字节门控按原样比较, 不能用大小写不定的片段)。
+    """
+    runs: List[str] = []
+    cur: List[str] = []
+    for op, av in sub:
+        if op is _sre_c.LITERAL:
+            cur.append(chr(av))
+            continue
+        if cur:
+            runs.append("".join(cur))
+            cur = []
+        if op is _sre_c.SUBPATTERN:
+            if not (exact and av[1] & re.IGNORECASE):
+                runs.extend(_required_literals(av[3], exact))
+        elif op is _sre_c.ATOMIC_GROUP:
+            runs.extend(_required_literals(av, exact))
+        elif op in _REPEATS and av[0] >= 1:
+            runs.extend(_required_literals(av[2], exact))
+    if cur:
+        runs.append("".join(cur))
+    return runs
+
+
+# IGNORECASE 下可与非 ASCII 字符互配的 ASCII 字母(İ/ı、K 开尔文符号、ſ), 字节门控在此处切断片段
+_NON_ASCII_FOLD = re.compile(r"[iksIKS]")
+
+
+def _byte_gate(tree) -> Tuple[re.Pattern, ...]:
+    """必含字面量 → 字节门控正则(跑在 mmap/bytes 上)
+
+    仅取 ASCII 片段, 且不含 \\r/\\n(文本经换行归一, 字节里未必原样出现);
+    IGNORECASE 时按 ASCII 忽略大小写匹配, 并在 i/k/s 处切断(这几个字母可配非 ASCII 字符)。
+    """
+    ignore_case = bool(tree.state.flags & re.IGNORECASE)
+    pieces = set()
+    for lit in _required_literals(tree, exact=True):
+        if not lit.isascii() or "\r" in lit or "\n" in lit:
+            continue
+        pieces.update(_NON_ASCII_FOLD.split(lit) if ignore_case else (lit,))
+    flags = re.IGNORECASE if ignore_case else 0
+    return tuple(re.compile(re.escape(piece.encode("ascii")), flags)
+                 for piece in sorted(pieces, key=len, reverse=True) if len(piece) >= 2)
+
+
+def analyze_pattern(regex: re.Pattern) -> Tuple[Optional[re.Pattern], List[str], Tuple[re.Pattern, ...]]:
+    """→ (整段扫描用正则 | None=须逐行扫描, 必含字面量片段, 字节门控片段)
+
+    整段正则 = 原正则 + MULTILINE(^/$ 按行生效); 仅当正则任何部分都不可能匹配 "\\n" 时启用,
+    此时整段命中必落在单行内, 逐行 finditer 复核候选行后结果与逐行扫描一致。
+    分析依赖私有 re._parser, 任何异常都退回"逐行扫描 + 无必含字面量"(只少了预过滤, 结果不变)。
+    """
+    if _sre_p is None:
+        return None, [], ()
+    try:
+        tree = _sre_p.parse(regex.pattern, regex.flags)
+        literals = _required_literals(tree)
+        gate = _byte_gate(tree)
+    except Exception:
+        return None, [], ()
+    try:
+        if _may_match_newline(tree, bool(tree.state.flags & re.DOTALL)):
+            return None, literals, gate
+    except _Unsafe:
+        return None, literals, gate
+    except Exception:
+        logger.debug("[grep_engine] 正则结构分析异常, 退回逐行扫描")
+        return None, literals, gate
+    return re.compile(regex.pattern, regex.flags | re.MULTILINE), literals, gate
+
+
+# ============================================================
+# 遍历
+# ============================================================
+
+def _suffix(name: str) -> str:
+    """同 Path(name).suffix.lower()"""
+    i = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return name[i:].lower()
+    return ""
+
+
+def _classify(path: str, name: str, st: os.stat_result, skipped: List[str]) -> Optional[GrepFile]:
+    """扩展名级二进制跳过(记 skipped) → GrepFile; 灰区后缀标记 probe 待内容探测"""
+    suffix = _suffix(name)
+    if suffix in BINARY_EXTENSIONS:
+        skipped.append(path)
+        return None
+    if not suffix or suffix not in TEXT_EXTENSIONS:
+        if is_binary_file(path):
+            skipped.append(path)
+            return None
+    probe = bool(suffix) and suffix not in TEXT_EXTENSIONS
+    return GrepFile(path, st.st_mtime, st.st_mtime_ns, st.st_size, probe)
+
+
+def walk_files(
+    root: Path, glob_filter: Optional[str], deadline: float, skipped: List[str],
+) -> Tuple[List[GrepFile], bool]:
+    """scandir 遍历目录 → (待扫描文件, 是否超时)
+
+    顺序同 os.walk(自顶向下: 先本目录文件, 再依次深入子目录); 跳过 SKIP_DIRS, 不进入符号链接目录。
+    """
+    files: List[GrepFile] = []
+    stack = [str(root)]
+    while stack:
+        if time.monotonic() > deadline:
+            return files, True
+        top = stack.pop()
+        try:
+            it = os.scandir(top)
+        except OSError:
+            continue
+        subdirs = []
+        with it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    if entry.name not in SKIP_DIRS and not entry.is_symlink():
+                        subdirs.append(entry.path)
+                    continue
+                if glob_filter and not fnm.fnmatch(entry.name, glob_filter):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                item = _classify(entry.path, entry.name, st, skipped)
+                if item is not None:
+                    files.append(item)
+        stack.extend(reversed(subdirs))
+    return files, False
+
+
+# ============================================================
+# 单文件扫描
+# ============================================================
+
+def _split_lines(text: str) -> List[str]:
+    """同文本模式 readlines(): 保留行尾 \\n, 末行无换行时不补"""
+    lines = text.split("\n")
+    last = lines.pop()
+    lines = [line + "\n" for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+
+def _candidate_lines(text: str, lines: List[str], buffer_regex: re.Pattern) -> List[int]:
+    """整段命中 → 命中所在行号(0 基, 升序); 无命中返回空"""
+    ends = list(itertools.accumulate(map(len, lines)))
+    last = len(lines) - 1
+    cand = set()
+    for m in buffer_regex.finditer(text):
+        first = bisect.bisect_right(ends, m.start())
+        tail = bisect.bisect_right(ends, max(m.start(), m.end() - 1))
+        cand.update(range(min(first, last), min(tail, last) + 1))
+    return sorted(cand)
+
+
+def _match_text(
+    text: str, path: str, regex: re.Pattern, buffer_regex: Optional[re.Pattern], context: int,
+) -> List[Dict]:
+    if buffer_regex is not None and buffer_regex.search(text) is None:
+        return []
+    lines = _split_lines(text)
+    if not lines:
+        return []
+    rows = range(len(lines)) if buffer_regex is None else _candidate_lines(text, lines, buffer_regex)
+    out = []
+    for idx in rows:
+        line = lines[idx]
+        matches_in_line = list(regex.finditer(line))
+        if not matches_in_line:
+            continue
+        line_no = idx + 1
+        match_item = {
+            "file": path,
+            "line": line_no,
+            "matched": [m.group(0) for m in matches_in_line],
+            "content": line.rstrip('\n\r'),
+        }
+        if context > 0:
+            lo = max(0, line_no - 1 - context)
+            match_item["before"] = [
+                {"line": i + 1, "text": lines[i].rstrip('\n\r')}
+                for i in range(lo, line_no - 1)
+            ]
+            hi = min(len(lines), line_no + context)
+            match_item["after"] = [
+                {"line": i + 1, "text": lines[i].rstrip('\n\r')}
+                for i in range(line_no, hi)
+            ]
+        out.append(match_item)
+    return out
+
+
+@functools.lru_cache(maxsize=32)
+def _ascii_compatible(encoding: str) -> bool:
+    """该编码下 ASCII 字符是否就编码为同值单字节(utf-8/gbk/latin-1 等是, utf-16/utf-7 等否)"""
+    probe = bytes(range(1, 128))
+    try:
+        return probe.decode(encoding) == probe.decode("ascii")
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+
+def _gate_rejects(buf, gate: Tuple[re.Pattern, ...]) -> bool:
+    """字节门控(直接在 mmap/缓冲上 search, 不拷贝): 有必含片段缺失且编码与 ASCII 兼容 → 文件不可能命中"""
+    if all(piece.search(buf) for piece in gate):
+        return False
+    enc = detect_sample_encoding(buf[:GREP_ENGINE_ENCODING_SAMPLE_BYTES])
+    return enc is None or _ascii_compatible(enc)  # None: decode_text_bytes 走的优先级编码均与 ASCII 兼容
+
+
+def _scan_buffer(
+    buf, f: GrepFile, regex: re.Pattern, buffer_regex: Optional[re.Pattern], context: int,
+    gate: Tuple[re.Pattern, ...] = (),
+) -> _FileHit:
+    if f.probe and _detect_binary_bytes(buf[:BINARY_PROBE_BYTES])[0]:
+        return None, None
+    if gate and not f.reindex and _gate_rejects(buf, gate):
+        return [], None
+    text = decode_text_bytes(buf)
+    sig = grep_index.trigram_signature(text) if f.reindex and text is not None else None
+    if not text:
+        return [], sig
+    return _match_text(text, f.path, regex, buffer_regex, context), sig
+
+
+def scan_file(
+    f: GrepFile, regex: re.Pattern, buffer_regex: Optional[re.Pattern], context: int,
+    gate: Tuple[re.Pattern, ...] = (),
+) -> _FileHit:
+    """扫描单个文件 → (匹配条目 | None=二进制, 三元组签名); 读取失败按无匹配处理
+
+    大文件 mmap: 二进制探测/字节门控/编码采样直接读映射; 门控通过才整段解码(一次拷贝)跑正则。
+    """
+    try:
+        with open(f.path, "rb") as fh:
+            if f.size >= GREP_ENGINE_MMAP_MIN_BYTES:
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return _scan_buffer(mm, f, regex, buffer_regex, context, gate)
+            return _scan_buffer(fh.read(), f, regex, buffer_regex, context, gate)
+    except (OSError, ValueError):  # ValueError: 遍历后文件被截断为空, mmap 长度 0
+        return [], None
+
+
+def _scan_batch(
+    files: List[GrepFile], pattern: str, flags: int, buffer_ok: bool, context: int, deadline: float,
+    gate: Tuple[re.Pattern, ...] = (),
+) -> Tuple[List[_FileHit], bool]:
+    """顺序扫描一批文件(当前线程或并行工作进程内执行) → (逐文件结果, 是否超时)
+
+    deadline 为 time.monotonic() 时间点; spawn 工作进程与主进程同机共享单调时钟。
+    """
+    regex = re.compile(pattern, flags)
+    buffer_regex = re.compile(pattern, flags | re.MULTILINE) if buffer_ok else None
+    hits: List[_FileHit] = []
+    for f in files:
+        if time.monotonic() > deadline:
+            return hits, True
+        hits.append(scan_file(f, regex, buffer_regex, context, gate))
+    return hits, False
+
+
+# ============================================================
+# 并行扫描
+# ============================================================
+
+def _scan_all(
+    files: List[GrepFile], regex: re.Pattern, buffer_ok: bool, context: int, deadline: float,
+    gate: Tuple[re.Pattern, ...] = (),
+) -> Tuple[List[_FileHit], bool]:
+    """扫描全部文件, 结果与 files 一一对应(超时时为前缀) → (结果, 是否超时)"""
+    args = (regex.pattern, regex.flags, buffer_ok, context, deadline, gate)
+    if cpu_workers() <= 1 or len(files) < GREP_ENGINE_PARALLEL_MIN_FILES:
+        return _scan_batch(files, *args)
+
+    ex = get_cpu_pool()
+    step = GREP_ENGINE_PARALLEL_BATCH_FILES
+    try:
+        futures = [ex.submit(_scan_batch, files[i:i + step], *args) for i in range(0, len(files), step)]
+        hits: List[_FileHit] = []
+        for fut in futures:
+            batch_hits, exceeded = fut.result()
+            hits.extend(batch_hits)
+            if exceeded:
+                for rest in futures:
+                    rest.cancel()
+                return hits, True
+        return hits, False
+    except BrokenProcessPool:
+        logger.warning("[grep_engine] 并行进程池异常退出, 本次改为顺序扫描")
+        discard_cpu_pool(ex)
+        return _scan_batch(files, *args)
+
+
+# ============================================================
+# 入口
+# ============================================================
+
+def search(
+    path: Path,
+    regex: re.Pattern,
+    glob_filter: Optional[str],
+    deadline: float,
+    context: int = 0,
+    use_index: bool = False,
+) -> GrepScanResult:
+    """搜索文件或目录(同步) — 小欧 2026-10-17
+
+    glob_filter 仅对目录递归生效; use_index 为 True 且目录足够大时启用三元组索引(grep_index)。
+    """
+    skipped: List[str] = []
+    exceeded = False
+    if path.is_file():
+        if time.monotonic() > deadline:
+            return GrepScanResult([], 0, 0, True, skipped, {})
+        try:
+            item = _classify(str(path), path.name, path.stat(), skipped)
+        except OSError:
+            item = None
+        files = [item] if item is not None else []
+    elif path.is_dir():
+        files, exceeded = walk_files(path, glob_filter, deadline, skipped)
+    else:
+        files = []
+
+    buffer_regex, literals, gate = analyze_pattern(regex)
+    index = None
+    grams = grep_index.query_trigrams(literals) if use_index else []
+    if grams and path.is_dir() and not exceeded and len(files) >= GREP_INDEX_MIN_FILES:
+        index = grep_index.open_index(path)
+
+    to_scan = files
+    if index is not None:
+        to_scan = index.prefilter(files, grams, skipped)
+
+    hits, scan_exceeded = _scan_all(to_scan, regex, buffer_regex is not None, context, deadline, gate)
+    exceeded = exceeded or scan_exceeded
+
+    if index is not None:
+        index.update(to_scan, hits)
+        if not glob_filter and not exceeded:
+            index.retain(files)
+        index.save()
+
+    results: List[Dict] = []
+    total_files = 0
+    total_matches = 0
+    mtimes: Dict[str, float] = {}
+    for f, (items, _sig) in zip(to_scan, hits):
+        if items is None:
+            skipped.append(f.path)
+            continue
+        if items:
+            results.extend(items)
+            total_files += 1
+            total_matches += sum(len(m["matched"]) for m in items)
+            mtimes[f.path] = f.mtime
+    return GrepScanResult(results, total_files, total_matches, exceeded, skipped, mtimes)
+
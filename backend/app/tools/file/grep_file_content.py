@@ -20,6 +20,9 @@
 #    summary.total_files 与实际匹配文件数一致, 避免误导 LLM 搜索范围判断
 # 2026-08-07 - 小欧 - P06优化(北京老陈驱动 task001): 返回前过滤已被删除/重命名的文件(_apply_grep_outlim后最终结果上做, 条件重建GrepSyncResult重算files/matches, 避免双重重建) | py_compile ✓
 # 2026-08-13 - 小欧 - A5职责拆分: hint_* 错误提示函数/导入源改 app.tools.toolhelper.error_hints
+# 2026-10-17 - 小欧 - 搜索执行迁入 grep_engine(scandir 遍历/mmap/整段正则定位候选行/前缀采样编码/并行批扫描/可选三元组索引)
+#   _grep_files_sync 改为薄封装; 排序改用遍历时带出的 mtime(不再逐条 stat); 删除文件过滤按文件去重后 exists
+#   三元组索引 opt-in: config tools.grep.trigram_index
 """
 F7: grep_file_content — 搜索文件内容
 
@@ -31,7 +34,6 @@ F7: grep_file_content — 搜索文件内容
 # 【铁规3】计时(duration_ms计算)只能在tool的主函数中，严禁在子函数/helper中计时。
 
 import asyncio
-import fnmatch as fnm
 import os
 import re as re_mod
 import time as _time_mod
@@ -40,14 +42,14 @@ from typing import Any, Dict, List, NamedTuple, Optional
 
 from app.tools.tool_response import build_success, build_error, build_warning
 from app.tools.tool_constants import (
-    TOOL_TIMEOUTS, ERR_FILE_CONTENT_SEARCH_FAILED, BINARY_EXTENSIONS, SKIP_DIRS,
+    TOOL_TIMEOUTS, ERR_FILE_CONTENT_SEARCH_FAILED,
     GREP_OUTLIMIT_MATCHES_MAX, GREP_OUTLIMIT_MATCH_CONTENT_CHARS,
 )
 
 from app.tools.validate.file_path_checker import validate_path, OpCategory  # 统一错误提示 - 小欧 2026-07-12
 from app.tools.toolhelper.error_hints import hint_for_read_error
-from app.tools.validate.file_type_checker import TEXT_EXTENSIONS, is_binary_file, _detect_binary_content
-from app.tools.file.file_encoding import safe_read_lines
+from app.tools.file import grep_engine
+from app.config import get_config
 from app.logger import logger
 
 
@@ -68,6 +70,7 @@ class GrepSyncResult(NamedTuple):
     truncated: bool
     truncated_by_deadline: bool
     skipped_binaries: List[str]
+    mtimes: Dict[str, float] = {}  # 文件路径 → 遍历时的 st_mtime(排序用) — 小欧 2026-10-17
 
 
 def _build_grep_file_content_llm_data(
@@ -139,98 +142,18 @@ def _grep_files_sync(
     deadline: float,
     context: int = 0,
 ) -> GrepSyncResult:
-    """同步搜索文件内容 — 小欧 2026-06-22 — 小健 2026-06-24 增加二进制文件检测和提示 — 小沈 2026-07-05 接收已编译regex — 小欧 2026-07-11 支持context上下文行 — 小欧 2026-07-20 去 output_mode/only_files(默认content返回带file路径),支持单文件与目录"""
-    results = []
-    total_matches = 0
-    total_files = 0
-    skipped_binary_files = []  # 记录跳过的二进制文件
-    _deadline_exceeded = False
-
-    def _search_one_file(fpath: Path) -> None:
-        nonlocal total_matches, total_files
-        # 检查是否为二进制文件 — 小健 2026-06-24 — 小欧 2026-06-24 扩展名已知直接跳过，未知才读内容
-        # — 小欧 2026-07-12 灰区后缀与无后缀二进制也计入skipped_binary_files,消除静默跳过无提示
-        suffix = fpath.suffix.lower()
-        if suffix in BINARY_EXTENSIONS:
-            skipped_binary_files.append(str(fpath))
-            return
-        # 无后缀或未知后缀:内容探测是否二进制(覆盖Makefile/README等无后缀二进制文件)
-        if (not suffix or suffix not in TEXT_EXTENSIONS) and is_binary_file(str(fpath)):
-            skipped_binary_files.append(str(fpath))
-            return
-        # 灰区后缀(未知扩展名):复用_detect_binary_content做内容级探测 — 小沈 2026-07-18
-        # (仅判断后缀会误判日志轮转文件如 .log.1 等常见文本)
-        if suffix and suffix not in TEXT_EXTENSIONS:
-            is_bin, _ = _detect_binary_content(fpath)
-            if is_bin:
-                skipped_binary_files.append(str(fpath))
-                return
-
-        lines = safe_read_lines(fpath)
-        if not lines:
-            return
-        file_matched = False
-        for line_no, line in enumerate(lines, 1):
-            matches_in_line = list(regex.finditer(line))
-            if not matches_in_line:
-                continue
-            matched_texts = [m.group(0) for m in matches_in_line]
-            match_item = {
-                "file": str(fpath),
-                "line": line_no,
-                "matched": matched_texts,
-                "content": line.rstrip('\n\r'),
-            }
-            # context上下文行:前后各context行 — 小欧 2026-07-11
-            if context > 0:
-                lo = max(0, line_no - 1 - context)
-                match_item["before"] = [
-                    {"line": i + 1, "text": lines[i].rstrip('\n\r')}
-                    for i in range(lo, line_no - 1)
-                ]
-                hi = min(len(lines), line_no + context)
-                match_item["after"] = [
-                    {"line": i + 1, "text": lines[i].rstrip('\n\r')}
-                    for i in range(line_no, hi)
-                ]
-            results.append(match_item)
-            total_matches += len(matched_texts)
-            file_matched = True
-        if file_matched:
-            total_files += 1
-
-    if path.is_file():
-        if _time_mod.monotonic() <= deadline:
-            _search_one_file(path)
-        else:
-            _deadline_exceeded = True
-    elif path.is_dir():
-        for root, dirs, files in os.walk(path):
-            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-            if _time_mod.monotonic() > deadline:
-                _deadline_exceeded = True
-                break
-            for fname in files:
-                if _time_mod.monotonic() > deadline:
-                    _deadline_exceeded = True
-                    break
-                fpath = Path(root) / fname
-                if glob_filter and not fnm.fnmatch(fname, glob_filter):
-                    continue
-                _search_one_file(fpath)
-
-    truncated = _deadline_exceeded
-    return GrepSyncResult(results, total_files, total_matches, truncated, _deadline_exceeded, skipped_binary_files)
-
-
-def _sort_grep_results_by_mtime(results: List[Dict]) -> None:
-    """按文件修改时间降序排序 grep 结果 — 小欧 2026-07-05"""
-    def _mtime(item: Dict) -> float:
-        try:
-            return Path(item["file"]).stat().st_mtime
-        except OSError:
-            return -1.0
-    results.sort(key=_mtime, reverse=True)
+    """同步搜索文件内容 — 小欧 2026-06-22 — 小健 2026-06-24 增加二进制文件检测和提示 — 小沈 2026-07-05 接收已编译regex — 小欧 2026-07-11 支持context上下文行 — 小欧 2026-07-20 去 output_mode/only_files(默认content返回带file路径),支持单文件与目录 — 小欧 2026-10-17 执行迁入 grep_engine"""
+    use_index = bool(get_config().get("tools.grep.trigram_index", False))
+    scan = grep_engine.search(path, regex, glob_filter, deadline, context, use_index=use_index)
+    return GrepSyncResult(
+        scan.results, scan.total_files, scan.total_matches,
+        scan.deadline_exceeded, scan.deadline_exceeded, scan.skipped_binaries, scan.mtimes,
+    )
+
+
+def _sort_grep_results_by_mtime(results: List[Dict], mtimes: Dict[str, float]) -> None:
+    """按文件修改时间降序排序 grep 结果(稳定排序) — 小欧 2026-07-05 — 小欧 2026-10-17 用遍历带出的 mtime, 不再逐条 stat"""
+    results.sort(key=lambda item: mtimes.get(item["file"], -1.0), reverse=True)
 
 
 async def grep(
@@ -311,7 +234,7 @@ async def grep(
 
     # 按 mtime 降序排序 — 小欧 2026-07-05
     if gr.results:
-        _sort_grep_results_by_mtime(gr.results)
+        _sort_grep_results_by_mtime(gr.results, gr.mtimes)
 
     # ── Tool 层输出截断 — 小欧 2026-07-23 ──
     # 匹配条目数截断: 超 GREP_OUTLIMIT_MATCHES_MAX 截断 + _truncated=True
@@ -361,7 +284,8 @@ async def grep(
 
     # P06优化: 过滤已被删除/重命名的文件(截断后最终结果上做,避免双重GrepSyncResult重建), 重算files/matches — 小欧 2026-08-07
     if gr.results:
-        _alive = [m for m in gr.results if Path(m.get("file", "")).exists()]
+        _alive_files = {f for f in {m.get("file", "") for m in gr.results} if Path(f).exists()}  # 按文件去重后 exists — 小欧 2026-10-17
+        _alive = [m for m in gr.results if m.get("file", "") in _alive_files]
         if len(_alive) < len(gr.results):
             gr = GrepSyncResult(
                 _alive,
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: grep 持久化三元组索引(按搜索根目录一份, opt-in: config tools.grep.trigram_index)
+#   【病根】大目录重复 grep 每次都要把全部文件读一遍解码跑正则, 绝大多数文件根本不含搜索词
+#   【改法】①每个文件记一个字节三元组 bloom 签名(大小写折叠后的 UTF-8 文本) + mtime_ns/size/是否二进制
+#          ②查询取正则必含字面量的三元组, 签名未全部命中且文件未变(mtime_ns/size 同遍历 stat)→ 不读该文件
+#          ③变更/新增文件照常扫描, 扫描时顺带重算签名; 全量遍历(无 glob、未超时)后剔除已删除文件
+#          ④落盘 ~/.omniagent/grep_index/<根目录哈希>.sqlite3, 进程内 LRU 常驻 GREP_INDEX_CACHE_ROOTS 个根目录
+#   【合规】索引只做"排除不可能命中的文件", 候选文件仍由正则逐字节确认 → 有无索引结果一致; numpy 不可用则索引不启用
+"""
+grep_index — grep 三元组预过滤索引
+
+签名: 文本先把 "İ" 换成 "i" 再 casefold(与 re.IGNORECASE 的等价字符折叠到同一形式), 编码 UTF-8 后取全部字节三元组,
+哈希到 GREP_INDEX_MAX_BITS 位, 再按去重三元组数 x GREP_INDEX_BITS_PER_TRIGRAM 折叠到 2 的幂位数(>=64)。
+查询三元组按同一变换处理正则必含字面量; 折叠保持 "h & (nbits-1)", 任意位数签名都可直接比对。
+"""
+
+import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.tools.tool_constants import (
+    GREP_INDEX_BITS_PER_TRIGRAM, GREP_INDEX_MAX_BITS, GREP_INDEX_CACHE_ROOTS,
+)
+from app.logger import logger
+
+_INDEX_DIR = Path.home() / ".omniagent" / "grep_index"
+_INDEX_VERSION = "1"  # 签名算法变更时递增, 旧索引整体作废
+_MIN_BITS = 64
+
+# 索引条目: (mtime_ns, size, is_binary, nbits, sig); nbits=0 表示无签名(总是候选)
+_Entry = Tuple[int, int, int, int, bytes]
+
+_np = None
+_np_checked = False
+
+
+def _numpy():
+    """懒加载 numpy; 不可用返回 None(索引不启用)"""
+    global _np, _np_checked
+    if not _np_checked:
+        _np_checked = True
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            logger.info("[grep_index] numpy 不可用, 三元组索引不启用")
+    return _np
+
+
+def _fold(text: str) -> bytes:
+    return text.replace("\u0130", "i").casefold().encode("utf-8", "surrogatepass")
+
+
+def _positions(np, keys, nbits: int):
+    """三元组键 → 签名位下标(nbits 为 2 的幂)"""
+    h = keys.astype(np.uint64) * np.uint64(0x9E3779B1)
+    h ^= h >> np.uint64(15)
+    return (h & np.uint64(nbits - 1)).astype(np.intp)
+
+
+def trigram_signature(text: str) -> Optional[Tuple[int, bytes]]:
+    """文本 → (签名位数, 签名字节); numpy 不可用返回 None"""
+    np = _numpy()
+    if np is None:
+        return None
+    data = _fold(text)
+    full = np.zeros(GREP_INDEX_MAX_BITS, dtype=bool)
+    if len(data) >= 3:
+        arr = np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+        full[_positions(np, (arr[:-2] << 16) | (arr[1:-1] << 8) | arr[2:], GREP_INDEX_MAX_BITS)] = True
+    distinct = int(np.count_nonzero(full))
+    nbits = 1 << max(0, distinct * GREP_INDEX_BITS_PER_TRIGRAM - 1).bit_length()
+    nbits = min(GREP_INDEX_MAX_BITS, max(_MIN_BITS, nbits))
+    if nbits < GREP_INDEX_MAX_BITS:
+        full = full.reshape(-1, nbits).any(axis=0)
+    return nbits, np.packbits(full, bitorder="little").tobytes()
+
+
+def query_trigrams(literals: Sequence[str]) -> List[int]:
+    """正则必含字面量 → 去重三元组键(为空表示索引帮不上忙)"""
+    grams = set()
+    for lit in literals:
+        data = _fold(lit)
+        for i in range(len(data) - 2):
+            grams.add((data[i] << 16) | (data[i + 1] << 8) | data[i + 2])
+    return sorted(grams)
+
+
+class TrigramIndex:
+    """单个根目录的三元组索引(内存常驻 + sqlite 落盘) — 小欧 2026-10-17"""
+
+    def __init__(self, root: str, db_path: Path):
+        self.root = root
+        self._db_path = db_path
+        self._entries: Dict[str, _Entry] = {}
+        self._dirty: Dict[str, _Entry] = {}
+        self._removed: set = set()
+        self._matrices: Optional[Dict[int, Tuple[List[str], object]]] = None
+        self._lock = threading.Lock()
+
+    # ── 持久化 ───────────────────────────────────────────────
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS files(path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, "
+            "is_binary INTEGER, nbits INTEGER, sig BLOB)")
+        return conn
+
+    def load(self) -> None:
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            logger.warning(f"[grep_index] 打开索引失败({self._db_path}): {e}")
+            return
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            if meta.get("version") != _INDEX_VERSION or meta.get("root") != self.root:
+                with conn:
+                    conn.execute("DELETE FROM files")
+                    conn.executemany("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+                                     [("version", _INDEX_VERSION), ("root", self.root)])
+                return
+            for path, mtime_ns, size, is_binary, nbits, sig in conn.execute(
+                    "SELECT path, mtime_ns, size, is_binary, nbits, sig FROM files"):
+                self._entries[path] = (mtime_ns, size, is_binary, nbits, sig)
+        except sqlite3.Error as e:
+            logger.warning(f"[grep_index] 读取索引失败({self._db_path}): {e}")
+        finally:
+            conn.close()
+
+    def save(self) -> None:
+        """把本次变更(新增/更新/删除)写回 sqlite, 一次事务"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            removed, self._removed = self._removed, set()
+        if not dirty and not removed:
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany("DELETE FROM files WHERE path=?", [(p,) for p in removed])
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO files(path, mtime_ns, size, is_binary, nbits, sig) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        [(p,) + e for p, e in dirty.items()])
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"[grep_index] 写入索引失败({self._db_path}): {e}")
+
+    # ── 查询/更新 ─────────────────────────────────────────────
+
+    def _build_matrices(self) -> Dict[int, Tuple[List[str], object]]:
+        """按签名位数分组 → {nbits: (路径列表, uint8 矩阵)}; 仅非二进制且有签名的条目"""
+        np = _numpy()
+        groups: Dict[int, List[str]] = {}
+        for path, e in self._entries.items():
+            if not e[2] and e[3]:
+                groups.setdefault(e[3], []).append(path)
+        out = {}
+        for nbits, paths in groups.items():
+            blob = b"".join(self._entries[p][4] for p in paths)
+            out[nbits] = (paths, np.frombuffer(blob, dtype=np.uint8).reshape(len(paths), nbits // 8))
+        return out
+
+    def _excluded(self, grams: List[int]) -> set:
+        """签名证明不含全部查询三元组的路径"""
+        np = _numpy()
+        if self._matrices is None:
+            self._matrices = self._build_matrices()
+        keys = np.asarray(grams, dtype=np.uint32)
+        out = set()
+        for nbits, (paths, matrix) in self._matrices.items():
+            bits = np.zeros(nbits, dtype=bool)
+            bits[_positions(np, keys, nbits)] = True
+            mask = np.packbits(bits, bitorder="little")
+            ok = ((matrix & mask) == mask).all(axis=1)
+            out.update(itertools.compress(paths, (~ok).tolist()))
+        return out
+
+    def prefilter(self, files: list, grams: List[int], skipped: List[str]) -> list:
+        """遍历结果 → 仍需扫描的文件(无有效条目的标记 reindex); 未变更的二进制文件直接记入 skipped"""
+        with self._lock:
+            excluded = self._excluded(grams)
+            out = []
+            for f in files:
+                e = self._entries.get(f.path)
+                if e is None or e[0] != f.mtime_ns or e[1] != f.size:
+                    out.append(f._replace(reindex=True))
+                elif e[2]:
+                    skipped.append(f.path)
+                elif f.path not in excluded:
+                    out.append(f)
+            return out
+
+    def update(self, files: list, hits: list) -> None:
+        """reindex 文件的扫描结果回写: 二进制记标记, 有签名的记签名; 读失败/无签名的条目删除(下次重扫)"""
+        with self._lock:
+            for f, (items, sig) in zip(files, hits):
+                if not f.reindex:
+                    continue
+                if items is None:
+                    entry = (f.mtime_ns, f.size, 1, 0, b"")
+                elif sig is None:
+                    if self._entries.pop(f.path, None) is not None:
+                        self._removed.add(f.path)
+                        self._dirty.pop(f.path, None)
+                        self._matrices = None
+                    continue
+                else:
+                    entry = (f.mtime_ns, f.size, 0, sig[0], sig[1])
+                if self._entries.get(f.path) != entry:
+                    self._entries[f.path] = entry
+                    self._dirty[f.path] = entry
+                    self._removed.discard(f.path)
+                    self._matrices = None
+
+    def retain(self, files: list) -> None:
+        """完整遍历后剔除已不存在(或已被扩展名规则排除)的文件"""
+        with self._lock:
+            alive = {f.path for f in files}
+            gone = [p for p in self._entries if p not in alive]
+            for p in gone:
+                del self._entries[p]
+                self._dirty.pop(p, None)
+                self._removed.add(p)
+            if gone:
+                self._matrices = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache: "OrderedDict[str, TrigramIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def open_index(root: Path) -> Optional[TrigramIndex]:
+    """取根目录索引(进程内 LRU; 首次从磁盘加载); numpy 不可用或索引目录不可写返回 None"""
+    if _numpy() is None:
+        return None
+    key = os.path.realpath(root)
+    with _cache_lock:
+        idx = _cache.get(key)
+        if idx is not None:
+            _cache.move_to_end(key)
+            return idx
+    try:
+        _INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"[grep_index] 索引目录不可用({_INDEX_DIR}): {e}")
+        return None
+    name = hashlib.sha1(key.encode("utf-8", "surrogatepass")).hexdigest()[:16]
+    idx = TrigramIndex(key, _INDEX_DIR / f"{name}.sqlite3")
+    idx.load()
+    with _cache_lock:
+        idx = _cache.setdefault(key, idx)
+        _cache.move_to_end(key)
+        while len(_cache) > GREP_INDEX_CACHE_ROOTS:
+            _cache.popitem(last=False)
+    return idx
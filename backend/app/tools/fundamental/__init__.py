@@ -3,20 +3,5 @@
 【2026-06-18 小欧】从 meta/ 迁入,匹配 ToolCategory.FUNDAMENTAL
 【2026-07-28 北京老陈】timeadd/timediff/calendar 迁至 TIMER 分类; shell 从 SHELL 迁入
 """
-
-from app.tools.fundamental.fundamental_register import _register_fundamental_tools
-
-from app.tools.fundamental.tool_search import searchtool
-from app.tools.fundamental.time_now import timenow
-from app.tools.fundamental.execute_shell_command import shell
-from app.tools.fundamental.get_system_info import sysinfo
-from app.tools.fundamental.send_notification import notify
-
-__all__ = [
-    "_register_fundamental_tools",
-    "searchtool",
-    "timenow",
-    "shell",
-    "sysinfo",
-    "notify",
-]
+# 2026-10-17 - 小欧 - 包初始化不再导入 fundamental_register(连带本分类全部工具实现): 导入本包任一子模块不再拖入整个分类;
+#   注册入口由 tool_constants.CATEGORY_MODULES 直指 app.tools.fundamental.fundamental_register
@@ -132,6 +132,9 @@
 #   白名单方案(8004/8007/C000列表)漏0x80004005(E_FAIL)等真实错误码, 故用段匹配; 实测用例全过 — 小欧 2026-08-09
 # 2026-08-12 - 小欧 - A1下沉: task_id ContextVar 迁至 app.tools.context, get_current_task_id import 由 app.services.task.task_context 改 app.tools.context,
 #   消除 tools 层对 app.services 越层依赖(守护测试 tools 禁 app.services 规则), 行为零变化(同一 ContextVar 对象)
+# 2026-10-17 - 小欧 - 非 Windows bash 分支入池: 每命令 Popen `bash -l -c` 改 shell_pool 持久 bash 会话(PersistentBash),
+#   cd/export 跨命令保留、profile 只在会话启动时读一次; ps7/ps5 与 bash 池化执行收敛为 _exec_in_pool(acquire/exec/release 一处),
+#   exec 透传 cwd(显式目录优先, 否则沿用会话目录); Windows Git Bash/WSL 仍走每命令登录 shell
 """
 S1: execute_shell_command — 执行Shell命令（v2 引擎版）— 小欧 2026-07-05
 
@@ -158,14 +161,13 @@ S1: execute_shell_command — 执行Shell命令（v2 引擎版）— 小欧 2026
        │   │   │   │   PYTHONIOENCODING: print()输出中文不抛异常
        │   │   │   │   PYTHONUTF8=1: open()默认用UTF-8避免gbk误读
        │   │   │   │
-       │   │   ├── [出] > 替换为 Out-File -Encoding utf8
+       │   │   ├── [出] [Console]::OutputEncoding=UTF-8(无BOM) → stdout/stderr 管道
        │   │   │   │   2026-07-07 小欧 修复
        │   │   │   │   PS5.1用>写UTF-16LE导致中文乱码 → 统一UTF-8
+       │   │   │   │   2026-10-17 小欧: 结果文件改管道, 命令末尾写哨兵行(rc + cwd)
        │   │   │   │
-       │   │   └── [读] safe_read_file + .lstrip('\ufeff')
-       │   │       2026-07-07 小欧 修复
-       │   │       PS5.1 Out-File写BOM头 → 去掉ZWNBSP
-       │   │       out/err/code/cwd 全部处理
+       │   │   └── [读] _SentinelReader 读线程 + .lstrip('\ufeff')
+       │   │       2026-10-17 小欧: 按哨兵行切出 stdout/stderr/rc/cwd, 完成即事件通知(无文件轮询)
        │   │
        │   └── PersistentShell 启动: -NoProfile -Command -
        │       (持久进程, 复用避免反复启动开销)
@@ -188,15 +190,18 @@ S1: execute_shell_command — 执行Shell命令（v2 引擎版）— 小欧 2026
        │
        └── shell_type="bash" ────────────────────────────────────
            │
-           ├── [入] subprocess.Popen 直接传递命令字符串
-           │    使用 -l 登录 shell, 自动加载 .bashrc
+           ├── 非 Windows: PersistentBash(shell_pool 持久会话, `bash -l -s`) — 2026-10-17 小欧
+           │    [入] 命令写 .sh 脚本, stdin 投递单行 dot-source(命令 stdin 接 /dev/null)
+           │    [出] 同 PS: stdout/stderr 管道 + 哨兵行(rc + cwd), _SentinelReader UTF-8 解码
+           │    会话保留 cd/export/函数; profile 只在会话启动时读一次
            │
-           ├── [子进程] env 同主进程(无需设置PYTHONIOENCODING)
-           │    Git Bash: /usr/bin/bash.exe
-           │    WSL: /bin/bash (通过 WindowsApps 代理)
-           │
-           └── [出] proc.communicate() → _decode_bytes_safe()
-               stdout/stderr 以 UTF-8 解码
+           └── Windows(Git Bash/WSL): 每命令 subprocess.Popen
+               ├── [入] 直接传递命令字符串, 使用 -l 登录 shell, 自动加载 .bashrc
+               │    Git Bash: /usr/bin/bash.exe
+               │    WSL: /bin/bash (通过 WindowsApps 代理)
+               │
+               └── [出] proc.communicate() → _decode_bytes_safe()
+                   stdout/stderr 以 UTF-8 解码
 
 
 ┌────────────────────────────────────────────────────────────────┐
@@ -771,6 +776,29 @@ def _find_bash() -> Optional[str]:
     return None
 
 
+# ═══════════════════════════════════════════════════════
+#  _exec_in_pool — 持久 shell 池执行(ps7/ps5/非 Windows bash 共用)
+# ═══════════════════════════════════════════════════════
+
+def _exec_in_pool(shell_type: str, command: str, timeout: int,
+                  cwd: Optional[str]) -> tuple[str, str, int, bool]:
+    """acquire → exec → release, 返回 (stdout, stderr, returncode, timed_out) — 小欧 2026-10-17 自 ps7/ps5 分支抽取
+
+    池槽位耗尽抛 ShellPoolBusyError, 由 shell() 外层 except 转 build_error。
+    """
+    task_id = get_current_task_id()
+    # v2.7 BugFix(小欧 2026-08-06): acquire 传入 _sanitize_env(), 修复持久进程启动时
+    # 直接 copy os.environ(含 API key) 泄漏给子进程的问题(此前仅 exec 时传 env, 进程存活时被忽略)。
+    env = _sanitize_env()
+    engine = shell_pool.acquire(task_id, shell_type, workdir=cwd, env=env)
+    try:
+        result = engine.exec(command, timeout, env=env, cwd=cwd)
+    finally:
+        shell_pool.release(engine)
+    return (_fix_encoding(result.get("stdout", "")), _fix_encoding(result.get("stderr", "")),
+            result.get("exit_code", -1), result.get("timed_out", False))
+
+
 # ═══════════════════════════════════════════════════════
 #  _kill_and_read_output — 超时后杀进程+读残存输出 (DRY抽取)
 # ═══════════════════════════════════════════════════════
@@ -1042,7 +1070,7 @@ def shell(
     #                - bash    → _auto_fix_bash_syntax
     #                - ps7/ps5 → _auto_fix_powershell_syntax（保留，优于文档）
     #   stage 2    安全检查
-    #   stage 3    执行（ps7/ps5引擎 / cmd.bat / bash登录shell，三路无嵌套检测）
+    #   stage 3    执行（ps7/ps5引擎 / cmd.bat / bash持久会话(Windows为登录shell)，三路无嵌套检测）
     #   stage 4    后处理
     #
     # ── 阶段 1.1【通用】: 三路类型检测 + 路由 ── 小欧 2026-07-29 v2.0; 2026-08-06 位置修正 ──
@@ -1120,18 +1148,7 @@ def shell(
             # _exec_locked 的 B6 管道层根治取代(命令名盲区fl/ft/fw全部覆盖), 此处移除, 单一根治点(KISS)
             # (B6管道末端统一| Out-String -Width 4096, 等效解决80列截断, 比命令层追加更彻底) — 小欧 2026-08-07
 
-            task_id = get_current_task_id()
-            # v2.7 BugFix(小欧 2026-08-06): acquire 传入 _sanitize_env(), 修复持久进程启动时
-            # 直接 copy os.environ(含 API key) 泄漏给子进程的问题(此前仅 exec 时传 env, 进程存活时被忽略)。
-            engine = shell_pool.acquire(task_id, shell_type, workdir=cwd, env=_sanitize_env())
-            try:
-                result = engine.exec(processed_command, timeout, env=_sanitize_env())
-            finally:
-                shell_pool.release(engine)
-            stdout_str = _fix_encoding(result.get("stdout", ""))
-            stderr_str = _fix_encoding(result.get("stderr", ""))
-            returncode = result.get("exit_code", -1)
-            timed_out = result.get("timed_out", False)
+            stdout_str, stderr_str, returncode, timed_out = _exec_in_pool(shell_type, processed_command, timeout, cwd)
 
         elif shell_type == "cmd":  # ── 【CMD专属】: .bat + subprocess ──
             # 写入 temp .bat 执行，绕过 cmd.exe /c 的引号解析 bug — 小欧 2026-07-05
@@ -1207,7 +1224,16 @@ def shell(
             stderr_str = _fix_encoding(_decode_bytes_safe(stderr_b))
             returncode = proc.returncode if proc.returncode is not None else -1
 
-        else:  # ── 【bash专属】: subprocess + 登录shell ──
+        elif sys.platform != "win32":  # ── 【bash专属·非Windows】: 持久 bash 会话池 — 小欧 2026-10-17 ──
+            if not _find_bash():
+                d = int((_time_mod.perf_counter() - t0) * 1000)
+                llm = _build_execute_shell_command_llm_data("error", d, processed_command, -1,
+                    shell_type, ERR_SHELL_EXCEPTION, "bash解释器未找到",
+                    timeout=timeout, cwd=cwd or "", hint="请检查bash是否安装", cmd_short=cmd_short)
+                return build_error(data={}, llm_data=llm)
+            stdout_str, stderr_str, returncode, timed_out = _exec_in_pool("bash", processed_command, timeout, cwd)
+
+        else:  # ── 【bash专属·Windows】: subprocess + 登录shell(Git Bash/WSL) ──
             bash_exe = _find_bash()
             if not bash_exe:
                 d = int((_time_mod.perf_counter() - t0) * 1000)
@@ -17,6 +17,14 @@
 #   【病根】PS HIGH规则(原L37-38)要求字面Recurse/Force词, MEDIUM L67也需Force词, `rm -rf`字母flag在ps7下无规则命中(bash规则L57被shell_type过滤)
 #   【改法】PS HIGH新增两条字母flag规则: `-[rR][fF]`合并形态与`-[rR]\b.*?-[fF]\b`分离形态; desc含"递归"故临时目录降级逻辑同样生效; 与bash L57口径对齐
 #   【说明】文档方案第二条正则(?:Remove-Item|rm|ri|erase|del)\s+.*?\brm\s+-rf\b 需再次rm不成立(首rm已消费), 修正为`-[rR][fF]`合并flag形态
+# 2026-10-17 - 小欧 - 单遍预筛 + 命中缓存(判定逐条不变, scripts/check_shell_risk_scanner.py 差分校验)
+#   【病根】check_shell_command_risk 每条命令对 SHELL_DANGEROUS_PATTERNS 逐条 re.search(40+ 次, 每次整串扫描), 绝大多数命令一条都不命中;
+#          agent 重试/多步任务中同一命令反复检查
+#   【改法】①导入时从每条规则提取必要字面量(前导 \b/(?<!\w) 后的字面前缀, 或 (?:a|b|c) 的各分支; 提不出则每次都跑),
+#            全部字面量合成一个忽略大小写的交替正则, 单遍找出命令里出现的字面量 → 只对这些候选规则跑原正则(预编译)
+#          ②match_shell_rules 返回命中规则下标(原顺序, 已按 shell_type 过滤), 按 (归一化命令, shell_type) LRU 缓存;
+#            check_shell_command_risk 按命中下标走原有 HIGH/MEDIUM/临时目录降级/保护 PID 流程, 返回值不变
+#   【合规】规则表/判定流程不动, 只换"哪些规则命中"的求法; 字面量是命中的必要条件, 漏筛不可能(差分校验覆盖)
 """
 execute_shell_command 分级安全检查 — 独立safety模块
 
@@ -29,9 +37,12 @@ MEDIUM: requires_confirmation=True, 需用户确认（action_handler.py:70处理
 — 小健 2026-06-27 迁出到独立safety文件
 """
 import re
-from typing import Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
 from app.tools.security.safety_result import SafetyResult  # A1盲点四 — 小欧 2026-08-12
+from app.tools.tool_constants import SHELL_RISK_CACHE_MAX_COMMAND_CHARS, SHELL_RISK_CACHE_MAX_ENTRIES
 from app.logger import logger
 
 
@@ -113,6 +124,156 @@ _TEMP_SAFE_PATTERNS = re.compile(
 )
 
 
+# ── 规则单遍预筛 + 命中缓存 — 小欧 2026-10-17 ──
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    """正则最外层是否有 |(有则前缀字面量不再是必要条件)"""
+    depth, i, in_class = 0, 0, False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def _rule_anchors(pattern: str) -> Optional[Tuple[str, ...]]:
+    """规则命中的必要字面量(命令里至少出现其一才可能命中); 提不出返回 None(该规则每次都跑)
+
+    只认两种开头: 前导零宽断言(\\b / (?<!\\w))之后 ①(?:a|b|c) 纯字面分支组 ②连续字面字符(含转义的 . - / :);
+    字面量后紧跟 ? * { 时末字符可选, 去掉。
+    """
+    s = pattern
+    while True:
+        if s.startswith("\\b"):
+            s = s[2:]
+        elif s.startswith("(?<!\\w)"):
+            s = s[7:]
+        else:
+            break
+    if _has_top_level_alternation(s):
+        return None
+    m = re.match(r"\(\?:([\w-]+(?:\|[\w-]+)*)\)", s)
+    if m:
+        if s[m.end():m.end() + 1] in ("?", "*", "{"):
+            return None
+        return tuple(m.group(1).split("|"))
+    lit, i = "", 0
+    while i < len(s):
+        c = s[i]
+        if c == "\\" and s[i + 1:i + 2] in (".", "-", "/", ":"):
+            lit += s[i + 1]
+            i += 2
+        elif c.isascii() and (c.isalnum() or c in "-_"):
+            lit += c
+            i += 1
+        else:
+            break
+    if s[i:i + 1] in ("?", "*", "{"):
+        lit = lit[:-1]
+    return (lit,) if len(lit) >= 2 else None
+
+
+def _compile_rules():
+    """导入时编译: 各规则正则 + 必要字面量交替正则(长者在前) + 字面量→候选规则下标"""
+    compiled = [re.compile(p, re.IGNORECASE) for p, _, _, _ in SHELL_DANGEROUS_PATTERNS]
+    always: List[int] = []
+    by_anchor: Dict[str, set] = {}
+    for idx, (pattern_str, _, _, _) in enumerate(SHELL_DANGEROUS_PATTERNS):
+        anchors = _rule_anchors(pattern_str)
+        if anchors is None:
+            always.append(idx)
+            continue
+        for a in anchors:
+            by_anchor.setdefault(a.lower(), set()).add(idx)
+    ordered = sorted(by_anchor, key=lambda a: (-len(a), a))
+    # 同一起点只报最长的字面量, 它的前缀字面量也必然出现 → 命中某字面量即并入其所有前缀字面量的规则
+    group_rules = {}
+    for n, a in enumerate(ordered):
+        group_rules[f"a{n}"] = frozenset().union(*(rules for b, rules in by_anchor.items() if a.startswith(b)))
+    anchor_rx = re.compile("|".join(f"(?P<a{n}>{re.escape(a)})" for n, a in enumerate(ordered)), re.IGNORECASE)
+    return compiled, frozenset(always), group_rules, anchor_rx
+
+
+_COMPILED_RULES, _ALWAYS_RULES, _ANCHOR_GROUP_RULES, _ANCHOR_RX = _compile_rules()
+_applicable_cache: Dict[Optional[str], frozenset] = {}
+_scan_cache: "OrderedDict[Tuple[str, Optional[str]], Tuple[int, ...]]" = OrderedDict()
+_scan_lock = threading.Lock()
+_scan_stats = {"hits": 0, "misses": 0, "uncached": 0}
+
+
+def _applicable_rules(shell_type: Optional[str]) -> frozenset:
+    """按 shell_type 过滤后仍生效的规则下标(ps 规则仅 ps7/ps5, cmd 仅 cmd, bash 仅 bash, 无标签全适用)"""
+    rules = _applicable_cache.get(shell_type)
+    if rules is None:
+        keep = []
+        for idx, (_, _, _, st_tag) in enumerate(SHELL_DANGEROUS_PATTERNS):
+            if st_tag == "ps" and shell_type not in ("ps7", "ps5"):
+                continue
+            if st_tag == "cmd" and shell_type != "cmd":
+                continue
+            if st_tag == "bash" and shell_type != "bash":
+                continue
+            keep.append(idx)
+        rules = _applicable_cache[shell_type] = frozenset(keep)
+    return rules
+
+
+def match_shell_rules(normalized: str, shell_type: Optional[str] = "ps7") -> Tuple[int, ...]:
+    """命中的规则下标(SHELL_DANGEROUS_PATTERNS 顺序, 已按 shell_type 过滤)
+
+    normalized: 换行已替换为空格的命令(同 check_shell_command_risk); 不超过 SHELL_RISK_CACHE_MAX_COMMAND_CHARS 的按
+    (normalized, shell_type) 缓存。单遍找出命令中出现的必要字面量, 只对其候选规则跑原正则。
+    """
+    key = (normalized, shell_type)
+    cacheable = len(normalized) <= SHELL_RISK_CACHE_MAX_COMMAND_CHARS
+    if cacheable:
+        with _scan_lock:
+            hits = _scan_cache.get(key)
+            if hits is not None:
+                _scan_cache.move_to_end(key)
+                _scan_stats["hits"] += 1
+                return hits
+
+    candidates = set(_ALWAYS_RULES)
+    pos, search = 0, _ANCHOR_RX.search
+    while True:
+        m = search(normalized, pos)
+        if m is None:
+            break
+        candidates |= _ANCHOR_GROUP_RULES[m.lastgroup]
+        pos = m.start() + 1  # 只前进一个字符: 与本次命中重叠的其他字面量不漏
+    candidates &= _applicable_rules(shell_type)
+    hits = tuple(idx for idx in sorted(candidates) if _COMPILED_RULES[idx].search(normalized))
+
+    with _scan_lock:
+        if not cacheable:
+            _scan_stats["uncached"] += 1
+            return hits
+        _scan_stats["misses"] += 1
+        _scan_cache[key] = hits
+        while len(_scan_cache) > SHELL_RISK_CACHE_MAX_ENTRIES:
+            _scan_cache.popitem(last=False)
+    return hits
+
+
+def shell_scan_stats() -> Dict[str, int]:
+    """命中结果缓存 命中/未命中/超长不缓存 次数 + 当前条目数"""
+    with _scan_lock:
+        return {**_scan_stats, "entries": len(_scan_cache)}
+
+
 def _is_temp_cleanup(command: str) -> bool:
     """检查命令是否目标为已知安全临时目录"""
     return bool(_TEMP_SAFE_PATTERNS.search(command))
@@ -152,67 +313,62 @@ def check_shell_command_risk(command: str, shell_type: str = "ps7", protected_pi
     """
     medium_hits = []
     normalized = command.replace('\r\n', ' ').replace('\n', ' ')
-    for pattern_str, desc, level, st_tag in SHELL_DANGEROUS_PATTERNS:
-        if st_tag == "ps" and shell_type not in ("ps7", "ps5"):
-            continue
-        if st_tag == "cmd" and shell_type != "cmd":
-            continue
-        if st_tag == "bash" and shell_type != "bash":
-            continue
-        if re.search(pattern_str, normalized, re.IGNORECASE):
-            if level == "HIGH":
-                # 临时目录清理降级: 递归删除命令(PS Remove-Item / CMD del/rd/rmdir)目标为已知安全临时目录时降为MEDIUM
-                # 其他HIGH操作(Format-Volume等)即使命令中包含临时路径也依然拦截 — 小欧 2026-07-28
-                if _is_temp_cleanup(normalized) and ('递归' in desc or 'rm -rf' in desc):
-                    # 2026-08-13 小欧 三堂会审修复#20: 命令含`..`路径穿越标记时实际解析目标可能逃出临时根
-                    #   (如 ...\Temp\..\important 匹配_TEMP_SAFE_PATTERNS被降级, 实际删除临时根外文件), 不予降危维持HIGH拦截
-                    if '..' in normalized:
+    # 命中规则(按原顺序, shell_type 已过滤)由单遍预筛 + 缓存求出, 之后流程不变 — 小欧 2026-10-17
+    for idx in match_shell_rules(normalized, shell_type):
+        _, desc, level, _ = SHELL_DANGEROUS_PATTERNS[idx]
+        if level == "HIGH":
+            # 临时目录清理降级: 递归删除命令(PS Remove-Item / CMD del/rd/rmdir)目标为已知安全临时目录时降为MEDIUM
+            # 其他HIGH操作(Format-Volume等)即使命令中包含临时路径也依然拦截 — 小欧 2026-07-28
+            if _is_temp_cleanup(normalized) and ('递归' in desc or 'rm -rf' in desc):
+                # 2026-08-13 小欧 三堂会审修复#20: 命令含`..`路径穿越标记时实际解析目标可能逃出临时根
+                #   (如 ...\Temp\..\important 匹配_TEMP_SAFE_PATTERNS被降级, 实际删除临时根外文件), 不予降危维持HIGH拦截
+                if '..' in normalized:
+                    return SafetyResult(
+                        blocked=True,
+                        message=f"高风险Shell操作: {desc}(临时目录清理含..路径穿越,不予降危)",
+                        safety_level="dangerous",
+                    )
+                medium_hits.append(desc)
+                continue
+            return SafetyResult(
+                blocked=True,
+                message=f"高风险Shell操作: {desc}",
+                safety_level="dangerous",
+            )
+        elif level == "MEDIUM" and desc not in medium_hits:
+            # Shell池进程保护: Stop-Process/taskkill命中受保护PID时BLOCKED — 小欧 2026-07-31
+            if protected_pids:
+                if "强制停止进程" in desc:
+                    target_pids = _extract_stop_process_pids(normalized)
+                    if target_pids & protected_pids:
+                        blocked_pids = target_pids & protected_pids
+                        logger.warning(f"[Shell安全] 安全拦截: Stop-Process 目标PID {blocked_pids} 为系统保护进程, 禁止杀死")
                         return SafetyResult(
                             blocked=True,
-                            message=f"高风险Shell操作: {desc}(临时目录清理含..路径穿越,不予降危)",
+                            message=f"安全拦截: 目标PID {blocked_pids} 为系统保护进程, 禁止杀死",
                             safety_level="dangerous",
                         )
-                    medium_hits.append(desc)
-                    continue
-                return SafetyResult(
-                    blocked=True,
-                    message=f"高风险Shell操作: {desc}",
-                    safety_level="dangerous",
-                )
-            elif level == "MEDIUM" and desc not in medium_hits:
-                # Shell池进程保护: Stop-Process/taskkill命中受保护PID时BLOCKED — 小欧 2026-07-31
-                if protected_pids:
-                    if "强制停止进程" in desc:
-                        target_pids = _extract_stop_process_pids(normalized)
-                        if target_pids & protected_pids:
-                            blocked_pids = target_pids & protected_pids
-                            logger.warning(f"[Shell安全] 安全拦截: Stop-Process 目标PID {blocked_pids} 为系统保护进程, 禁止杀死")
-                            return SafetyResult(
-                                blocked=True,
-                                message=f"安全拦截: 目标PID {blocked_pids} 为系统保护进程, 禁止杀死",
-                                safety_level="dangerous",
-                            )
-                    if "强制杀进程" in desc:
-                        target_pids = _extract_taskkill_pids(normalized)
-                        if target_pids & protected_pids:
-                            blocked_pids = target_pids & protected_pids
-                            logger.warning(f"[Shell安全] 安全拦截: taskkill 目标PID {blocked_pids} 为系统保护进程, 禁止杀死")
-                            return SafetyResult(
-                                blocked=True,
-                                message=f"安全拦截: 目标PID {blocked_pids} 为系统保护进程, 禁止杀死",
-                                safety_level="dangerous",
-                            )
-                    if "kill进程" in desc:
-                        target_pids = _extract_bash_kill_pids(normalized)
-                        if target_pids & protected_pids:
-                            blocked_pids = target_pids & protected_pids
-                            logger.warning(f"[Shell安全] 安全拦截: kill 目标PID {blocked_pids} 为系统保护进程, 禁止杀死")
-                            return SafetyResult(
-                                blocked=True,
-                                message=f"安全拦截: 目标PID {blocked_pids} 为系统保护进程, 禁止杀死",
-                                safety_level="dangerous",
-                            )
-                medium_hits.append(desc)
+                if "强制杀进程" in desc:
+                    target_pids = _extract_taskkill_pids(normalized)
+                    if target_pids & protected_pids:
+                        blocked_pids = target_pids & protected_pids
+                        logger.warning(f"[Shell安全] 安全拦截: taskkill 目标PID {blocked_pids} 为系统保护进程, 禁止杀死")
+                        return SafetyResult(
+                            blocked=True,
+                            message=f"安全拦截: 目标PID {blocked_pids} 为系统保护进程, 禁止杀死",
+                            safety_level="dangerous",
+                        )
+                if "kill进程" in desc:
+                    target_pids = _extract_bash_kill_pids(normalized)
+                    if target_pids & protected_pids:
+                        blocked_pids = target_pids & protected_pids
+                        logger.warning(f"[Shell安全] 安全拦截: kill 目标PID {blocked_pids} 为系统保护进程, 禁止杀死")
+                        return SafetyResult(
+                            blocked=True,
+                            message=f"安全拦截: 目标PID {blocked_pids} 为系统保护进程, 禁止杀死",
+                            safety_level="dangerous",
+                        )
+            medium_hits.append(desc)
     if medium_hits:
         combined = "、".join(medium_hits)
         logger.warning(f"[Shell安全] 中风险操作: {combined}")
@@ -68,8 +68,33 @@
 #        与_close()(引擎级stderr文件, 原静默pass升级为重试+留痕)统一走此函数, 一处逻辑两处受益(DRY+复用优先).
 #        验证: 修复前整批51测试必现tmpXXX.cwd泄漏→修复后51 passed零新增残留; 泄漏测试连跑3轮全过; 全shell套件
 #        200 passed, 1 skipped零回归. 命名: _CWD_UNLINK_RETRY→_UNLINK_RETRY(作用于全部6文件, 去误导前缀, 三堂会审修正).
+# 2026-10-17 - 小欧 - 命令完成改事件驱动(哨兵行协议), 删 _poll_for_file 文件轮询:
+#   【病根】每条命令 out/err/code/cwd 4 个结果文件落盘, Python 侧 _poll_for_file 100ms→1s 指数退避轮询 .code 再补等 .cwd;
+#          极简命令也要付至少一个 100ms 轮询间隔 + 6 个临时文件的创建/读/删(.cwd 竞态残留即由此而来)
+#   【改法】①进程 stdout/stderr 改管道, _SentinelReader 两个读线程持续读; 每条命令一个随机 nonce,
+#            ps_cmd 末尾向 stderr 写 "__OMNI_<nonce>__ERR" 行、向 stdout 写 "__OMNI_<nonce>__DONE <rc> <cwd>" 行,
+#            两路哨兵都到齐即 Condition 通知完成; 命令输出随到随收(exec 可传 on_output 增量回调)
+#          ②stdout 用 Out-String -Stream 逐行写 [Console]::Out(与原 Out-String|Out-File 文本一致, 且不再攒到管道末端才落盘),
+#            错误仍由 $errs 收集后整体渲染写 [Console]::Error; rc 判定(B6.1)/dot-source 包裹(B6.3)不变
+#          ③临时文件只剩 ps1/cmd 两个(C4 单行投递 + B6.3 ParserError 捕获仍需要); 进程级 stderr 临时文件改为读线程的窗口外尾部缓冲(C12 可观测性不变)
+#          ④命令执行中进程退出(命令内 exit/崩溃): 管道 EOF 立即返回已收输出 + 进程退出码, 不再空等满 timeout, 也不重跑命令
+#          ⑤safe_read_file 随结果文件一并删除(无其他调用方)
+#   【合规】协议与 bash 替身的 1000 条极简命令基准/差分见 scripts/bench_shell_sentinel.py
+# 2026-10-17 - 小欧 - 新增 PersistentBash 持久 bash 会话(Linux/macOS bash 分支入池) + 池健康指标:
+#   【病根】非 Windows 的 bash 分支每条命令 Popen 一个 `bash -l -c`: 每次重读 profile、fork/exec 整个登录 shell,
+#          且 cd/export/函数定义随进程结束丢失; PowerShell 早已有 ShellPoolManager 持久池, bash 没有
+#   【改法】①PersistentBash 继承 PersistentShell: 进程生命周期/探活/超时/哨兵切帧全复用, 只覆盖
+#            启动命令行(_spawn_argv: bash -l -s)/投递框架(_frame_command: dot-source 命令脚本 + printf 哨兵)/进程组击杀
+#          ②PersistentShell 拆出 _spawn_argv/_frame_command/_encode_feed 钩子(原 _start/_exec_locked 内联 PS 专属代码原样迁入)
+#          ③exec 新增 cwd: 调用方显式目录与会话当前目录不同则先切换(bash cd / PS Set-Location), 否则沿用会话 cwd
+#          ④超时/命令内退出返回已收到的部分输出(原 PS 分支超时丢弃输出; bash 原 _kill_and_read_output 亦返回残存)
+#          ⑤ShellPoolManager: _make_shell 按 shell_type 分派; 复用前比对环境指纹(env 变更则淘汰重建);
+#            新增 stats() 池健康指标(实例/占用/新建/复用/排队等待/槽位耗尽/按原因淘汰), GET /metrics/shell_pool
+#          ⑥_SentinelReader 按路记 EOF: 命令内 exit 时 stderr 可能先 EOF, 原实现即判帧 died, stdout 在途输出被丢入残余
+#   【合规】OCP(子类覆盖钩子, 池/协议零分叉) + 基准见 scripts/bench_bash_pool.py(每命令登录 shell vs 池化会话)
 """
 PersistentShell — 持久 PowerShell 进程引擎(ps7/ps5) — 小欧 2026-07-05
+PersistentBash  — 持久 bash 进程引擎(Linux/macOS, 同池同协议) — 小欧 2026-10-17
 
 【编码链路】PS分支编码修复 (2026-07-07 小欧):
   ┌─ [入] stdin.write(cmd.encode(locale.getpreferredencoding()))
@@ -81,12 +106,11 @@ PersistentShell — 持久 PowerShell 进程引擎(ps7/ps5) — 小欧 2026-07-0
   │    PYTHONIOENCODING: print()输出中文不抛UnicodeEncodeError
   │    PYTHONUTF8=1: open()默认用UTF-8,避免gbk误读UTF-8代码文件
   │
-  ├─ [出] > 替换为 Out-File -Encoding utf8
-  │    PS5.1默认>写UTF-16LE导致中文乱码 → 统一UTF-8
+  ├─ [出] [Console]::OutputEncoding = UTF-8(无BOM), 输出写 [Console]::Out/Error 管道
+  │    PS5.1默认>写UTF-16LE导致中文乱码 → 统一UTF-8 (2026-10-17 小欧: 结果文件改管道)
   │
-  └─ [读] safe_read_file + .lstrip('\ufeff')
-       PS5.1 Out-File写BOM头 → 去掉ZWNBSP
-       (out/err/code/cwd 全部处理)
+  └─ [读] _SentinelReader 增量 UTF-8 解码(errors=replace, 换行统一 \n) + .lstrip('\ufeff')
+       按哨兵行切出本命令 stdout/stderr/rc/cwd
 
   全景图见 execute_shell_command.py 头部注释
 
@@ -102,18 +126,23 @@ PersistentShell — 持久 PowerShell 进程引擎(ps7/ps5) — 小欧 2026-07-0
 """
 
 import atexit
+import codecs
 import contextlib
+import io
 import locale
 import os
 import re as re_mod
+import secrets
+import shlex
 import shutil
+import signal
 import subprocess
 import sys
 import tempfile
 import threading
 import time
-from collections import defaultdict
-from typing import Any, Dict, List, Optional
+from collections import Counter, defaultdict, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from app.logger import logger
 from app.tools.tool_constants import DEFAULT_TIMEOUT_SEC, SHELL_POOL_IDLE_TIMEOUT, SUBPROCESS_TIMEOUT_SHORT
@@ -137,15 +166,16 @@ from app.tools.tool_constants import DEFAULT_TIMEOUT_SEC, SHELL_POOL_IDLE_TIMEOU
 #   C7  池锁↔实例锁交叉死锁
 #       → 锁序固定「先池锁释放→再拿实例锁」, 从不嵌套持有(无环可成)
 #   C8  半死进程(假活)复用→exec挂起
-#       → _probe()响应性探活 + _start()就绪握手(_READY_PROBE_TIMEOUT=10s) + _poll_for_file超时兜底kill
+#       → _probe()响应性探活 + _start()就绪握手(_READY_PROBE_TIMEOUT=10s) + _SentinelReader.wait超时兜底kill
 #   C9  清理打断in-flight exec
-#       → close() acquire(timeout=5)未获锁也force-kill进程; exec侧_poll_for_file有界返回
+#       → close() acquire(timeout=5)未获锁也force-kill进程; exec侧管道EOF立即返回(进程已死)
 #   C10 子进程持管道→communicate挂满(仅cmd/bash分支)
-#       → execute_shell_command.py: cmd poll-loop代替communicate; bash捕获TimeoutExpired→_kill_and_read_output
+#       → execute_shell_command.py: cmd poll-loop代替communicate; bash(Windows Git Bash)捕获TimeoutExpired→_kill_and_read_output
+#         (2026-10-17 小欧: 非 Windows bash 入池, 哨兵到齐即完成, 后台子进程持管道不再阻塞; 关闭时 killpg 连同进程组)
 #   C11 kill/wait自身阻塞
 #       → _kill_tree/_close/proc.wait/taskkill 全部带SUBPROCESS_TIMEOUT_SHORT有界
 #   C12 临时文件/句柄泄漏→耗尽资源
-#       → _TempFiles上下文finally unlink + _close显式关闭stderr句柄
+#       → _TempFiles上下文finally unlink + 读线程EOF关管道(stdout/stderr不再落临时文件)
 #   C13 acquire Phase2与cleanup并发竞态
 #       → 槽位守恒(cleanup只归还在_inst_map的实例)+_inst_map防超归; 后果仅偶发进程重启(非卡死), lock+timeout双兜底
 #   C14 exec长命令(≤timeout)锁被hold
@@ -158,15 +188,19 @@ from app.tools.tool_constants import DEFAULT_TIMEOUT_SEC, SHELL_POOL_IDLE_TIMEOU
 # ═══════════════════════════════════════════════════════
 
 _ERROR_NO_SHELL = {"stdout": "", "stderr": "PowerShell不可用", "exit_code": -1}
+_ERROR_NO_BASH = {"stdout": "", "stderr": "bash不可用", "exit_code": -1}
 _ERROR_TIMEOUT  = {"stdout": "", "stderr": "timeout", "exit_code": -1, "timed_out": True}
 _EXIT_PROCESS_DIED = -2          # 进程死亡 sentinel，外部重试用
 _PROBE_TIMEOUT = 3               # 响应性探活超时(秒)：半死进程3秒内无回执即判死 — 小欧 2026-08-06
 _READY_PROBE_TIMEOUT = 10        # 就绪握手超时(秒)：首次启动慢(profile/杀软/慢盘)放宽到10s, 防误杀刚拉起进程 — 小欧 2026-08-06
 _PROBE_CMD = "Write-Output __OMNI_PROBE__"   # 探活命令：轻量、无副作用、输出唯一标记 — 小欧 2026-08-06
+_BASH_PROBE_CMD = "echo __OMNI_PROBE__"       # bash 探活命令(同上) — 小欧 2026-10-17
 ACQUIRE_WAIT_TIMEOUT = 2        # acquire 并发限流等待超时(秒)：有界排队, 超时明确抛ShellPoolBusyError(不temp不卡死) — v2.8 小欧 2026-08-06
-_CWD_WAIT_TIMEOUT = 3           # .cwd落地等待超时(秒)：ps_cmd最后一行才写.cwd, code有内容≠PS执行完, 等.cwd非空=PS已完成最后Out-File(句柄已释放) — v2.11 小欧 2026-08-08
-_UNLINK_RETRY = 3               # 临时文件unlink失败重试次数：覆盖Out-File句柄延迟释放竞态窗口(作用于全部6个临时文件) — v2.11 小欧 2026-08-08
+_UNLINK_RETRY = 3               # 临时文件unlink失败重试次数：覆盖句柄延迟释放竞态窗口 — v2.11 小欧 2026-08-08
 _UNLINK_RETRY_DELAY = 0.05      # unlink重试间隔(秒)：50ms×3≈150ms, 覆盖PS进程写完文件到句柄释放的毫秒级窗口 — v2.11 小欧 2026-08-08
+_SENTINEL_PREFIX = "__OMNI_"     # 哨兵行前缀：完整哨兵 = 前缀 + 每条命令随机 nonce + __DONE/__ERR, 命令输出不可能撞上 — 小欧 2026-10-17
+_PIPE_READ_CHUNK = 65536        # 读线程单次 os.read 字节数 — 小欧 2026-10-17
+_STRAY_TAIL_CHUNKS = 64         # 命令窗口外输出(启动噪音/进程级stderr)保留的最近片段数, _close 时落日志(半死证据) — 小欧 2026-10-17
 
 # ═══════════════════════════════════════════════════════
 #  _TempFiles — 临时文件 contextmanager
@@ -177,7 +211,7 @@ def _safe_unlink(path: str) -> bool:
 
     背景: PS进程Out-File写完文件后句柄尚有毫秒级释放窗口, Python侧立即unlink会OSError→文件残留
     (实测整批shell测试触发tmpXXX.cwd残留)。重试仍失败才warning留痕(R4语义), 返回False供调用方感知。
-    复用点: _TempFiles.finally(命令级6文件) 与 _close()(引擎级stderr文件) 统一走此函数, 一处逻辑两处受益。
+    复用点: _TempFiles.finally(命令级 ps1/cmd 文件; 2026-10-17 起结果走管道, 不再有 out/err/code/cwd 文件)。
     """
     for attempt in range(_UNLINK_RETRY):
         try:
@@ -194,19 +228,12 @@ def _safe_unlink(path: str) -> bool:
 
 
 @contextlib.contextmanager
-def _TempFiles():
-    """安全创建 6 个临时文件并自动清理 — out/err/code/cwd/ps1/cmd  — [卡死场景C12] 小欧 2026-08-06"""
+def _TempFiles(specs):
+    """安全创建临时脚本文件并自动清理 — specs=((名, 后缀), ...) 由引擎类 _TEMP_FILES 给定  — [卡死场景C12] 小欧 2026-08-06
+    2026-10-17 小欧: out/err/code/cwd 结果文件删除, 结果经管道 + 哨兵行返回(_SentinelReader)"""
     paths = {}
     try:
-        # ps1: 2026-07-18 小沈 新增, 存多行命令脚本(避免直接经stdin喂入导致PS卡死)
-        # cmd: 2026-08-08 小欧 新增, 存LLM原始命令(独立文件), 供framework dot-source —
-        #   解析期错误(ParserError)在dot-source运行时抛出, 可被外层try/catch捕获(内联则catch接不住→假超时)
-        #   ⚠ 后缀必须.ps1(非.cmd): PowerShell dot-source对.cmd文件走cmd.exe批处理而非PS解析器,
-        #     ParserError捕获失效(回归测试10用例当场抓出, tmpXXX.cmd→"not recognized") — 小欧 2026-08-08
-        for name, suffix in (
-            ("out", ".out"), ("err", ".err"), ("code", ".code"),
-            ("cwd", ".cwd"), ("ps1", ".ps1"), ("cmd", ".ps1"),
-        ):
+        for name, suffix in specs:
             f = tempfile.NamedTemporaryFile(delete=False, suffix=suffix,
                                              mode="w", encoding="utf-8")
             f.close()
@@ -220,35 +247,166 @@ def _TempFiles():
             _safe_unlink(p)
 
 
-def safe_read_file(path: str) -> str:
-    """读取文件内容(utf-8), OSError返回空串 — 小欧 2026-07-23"""
-    try:
-        with open(path, "r", encoding="utf-8", errors="replace") as f:
-            return f.read()
-    except OSError:
-        return ""
-
-
 # ═══════════════════════════════════════════════════════
-#  _poll_for_file — 指数退避轮询
+#  _SentinelReader — 管道读线程 + 哨兵行切帧(命令完成事件)
 # ═══════════════════════════════════════════════════════
 
-def _poll_for_file(path: str, timeout: int) -> bool:
-    """轮询直到文件非空或超时 — 指数退避 100ms→1s"""
-    deadline = time.time() + timeout
-    delay = 0.1
-    while time.time() < deadline:
-        try:
-            if os.path.getsize(path) > 0:
-                return True
-        except OSError:
-            pass
-        remaining = deadline - time.time()
-        if remaining <= 0:
-            break
-        time.sleep(min(delay, remaining))
-        delay = min(delay * 2, 1.0)
-    return False
+class _CommandFrame:
+    """单条命令的输出帧: stdout/stderr 分路收集, 两路哨兵都到齐即完成 — 小欧 2026-10-17
+
+    shell 端在命令输出之后写:
+        stderr: "\\n__OMNI_<nonce>__ERR\\n"
+        stdout: "\\n__OMNI_<nonce>__DONE <rc> <cwd>\\n"        (cwd 为该行剩余部分, 可含空格)
+    哨兵前紧邻的一个 "\\n" 由 shell 端补写(保证哨兵在行首), 切帧时去掉, 命令输出原样保留。
+    """
+
+    __slots__ = ("nonce", "markers", "pending", "parts", "closed", "exit_code", "cwd", "died", "on_output")
+
+    def __init__(self, nonce: str, on_output: Optional[Callable[[str, str], None]] = None):
+        self.nonce = nonce
+        self.markers = {"stdout": f"\n{_SENTINEL_PREFIX}{nonce}__DONE", "stderr": f"\n{_SENTINEL_PREFIX}{nonce}__ERR"}
+        self.pending = {"stdout": "", "stderr": ""}   # 末尾可能是被切开的哨兵前缀, 等下一段再判
+        self.parts: Dict[str, List[str]] = {"stdout": [], "stderr": []}
+        self.closed = {"stdout": False, "stderr": False}
+        self.exit_code = 0
+        self.cwd = ""
+        self.died = False   # 哨兵到齐前管道 EOF(进程退出)
+        self.on_output = on_output
+
+    @property
+    def done(self) -> bool:
+        return self.closed["stdout"] and self.closed["stderr"]
+
+    def text(self, stream: str) -> str:
+        # 未完成的帧(超时)连同扣住待判的尾巴一起返回
+        return ("".join(self.parts[stream]) + self.pending[stream]).lstrip('\ufeff')
+
+    def feed(self, stream: str, text: str) -> Tuple[str, str]:
+        """喂入一段已解码文本(持读线程锁调用), 返回 (本命令输出, 哨兵行之后的帧外残余)"""
+        buf = self.pending[stream] + text
+        marker = self.markers[stream]
+        i = buf.find(marker)
+        if i < 0:
+            # 哨兵以 "\n" 开头: 只需扣住末尾可能是哨兵前缀的那段, 其余立即交付(增量输出)
+            cut = buf.rfind("\n", max(0, len(buf) - len(marker) + 1))
+            if cut < 0 or not marker.startswith(buf[cut:]):
+                cut = len(buf)
+            self.pending[stream] = buf[cut:]
+            out = buf[:cut]
+        else:
+            j = buf.find("\n", i + len(marker))
+            if j < 0:   # 哨兵行未收全
+                self.pending[stream] = buf[i:]
+                out = buf[:i]
+            else:
+                if stream == "stdout":
+                    rc, _, cwd = buf[i + len(marker):j].lstrip(" ").partition(" ")
+                    try:
+                        self.exit_code = int(rc)
+                    except ValueError:
+                        self.exit_code = 0
+                    self.cwd = cwd
+                self.closed[stream] = True
+                self.pending[stream] = ""
+                if out := buf[:i]:
+                    self.parts[stream].append(out)
+                return out, buf[j + 1:]
+        if out:
+            self.parts[stream].append(out)
+        return out, ""
+
+    def mark_died(self) -> None:
+        """管道 EOF: 未切出的尾巴也算本命令输出"""
+        self.died = True
+        for stream in ("stdout", "stderr"):
+            if self.pending[stream]:
+                self.parts[stream].append(self.pending[stream])
+                self.pending[stream] = ""
+
+
+class _SentinelReader:
+    """子进程 stdout/stderr 管道读线程: 按当前命令 nonce 切帧, 命令完成/进程退出经 Condition 通知 — 小欧 2026-10-17
+
+    用法(持实例锁, 同一时刻至多一个命令窗口):
+        frame = reader.begin(on_output)      # 生成 nonce, 之后到达的输出归该命令
+        ...向 stdin 投递带哨兵的命令...
+        if not reader.wait(frame, timeout):  # 超时
+        frame.died / frame.text("stdout") / frame.exit_code / frame.cwd
+    命令窗口外的输出(启动噪音、进程级 stderr、哨兵之后的残余)进尾部缓冲, stray_tail() 取出落日志。
+    """
+
+    def __init__(self, proc: subprocess.Popen, label: str):
+        self._cond = threading.Condition()
+        self._frame: Optional[_CommandFrame] = None
+        self._eof: set = set()   # 已 EOF 的管道
+        self._stray: deque = deque(maxlen=_STRAY_TAIL_CHUNKS)
+        for stream in ("stdout", "stderr"):
+            threading.Thread(target=self._pump, args=(stream, getattr(proc, stream)),
+                             name=f"{label}-{stream}", daemon=True).start()
+
+    def begin(self, on_output: Optional[Callable[[str, str], None]] = None) -> _CommandFrame:
+        frame = _CommandFrame(secrets.token_hex(8), on_output)
+        with self._cond:
+            self._frame = frame
+            if self._eof:
+                frame.mark_died()
+        return frame
+
+    def wait(self, frame: _CommandFrame, timeout: float) -> bool:
+        """等命令完成或管道关闭(进程退出); 超时返回 False。返回后该帧不再接收输出"""
+        with self._cond:
+            finished = self._cond.wait_for(lambda: frame.done or frame.died, timeout)
+            if self._frame is frame:
+                self._frame = None
+            return finished
+
+    def stray_tail(self) -> str:
+        with self._cond:
+            return "".join(self._stray)
+
+    def _pump(self, stream: str, pipe) -> None:
+        # 换行统一为 \n(同旧实现文本模式读结果文件), 跨块的 \r\n 由 IncrementalNewlineDecoder 拼回
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True)
+        fd = pipe.fileno()
+        while True:
+            try:
+                data = os.read(fd, _PIPE_READ_CHUNK)
+            except OSError:
+                data = b""
+            text = decoder.decode(data, final=not data)
+            out, frame = "", None
+            with self._cond:
+                frame = self._frame
+                if text:
+                    if frame is None or frame.closed[stream] or frame.died:
+                        self._stray.append(text)
+                    else:
+                        out, rest = frame.feed(stream, text)
+                        if rest:
+                            self._stray.append(rest)
+                if not data:
+                    # 两路管道 EOF 先后到达: 帧内未关闭的各路都 EOF 才判进程退出, 免另一路在途输出(如 exit 前的 echo)被丢进残余
+                    self._eof.add(stream)
+                    if frame is not None and not frame.done and all(
+                            frame.closed[s] or s in self._eof for s in frame.closed):
+                        frame.mark_died()
+                self._cond.notify_all()
+            if out and frame.on_output is not None:
+                try:
+                    frame.on_output(stream, out)
+                except Exception as e:
+                    logger.debug(f"[PersistentShell] on_output 回调异常(忽略): {e}")
+            if not data:
+                try:
+                    pipe.close()
+                except OSError:
+                    pass
+                return
+
+
+def _env_fingerprint(env) -> int:
+    """环境变量指纹(池复用前比对启动环境是否已变) — 小欧 2026-10-17"""
+    return hash(frozenset(env.items()))
 
 
 # ═══════════════════════════════════════════════════════
@@ -304,34 +462,52 @@ class PersistentShell:
         result = engine.exec("Get-ChildItem", timeout=DEFAULT_TIMEOUT_SEC)
         shell_pool.release(engine)
         # result = {"stdout": ..., "stderr": ..., "exit_code": 0}
+        # on_output=lambda stream, text: ... 可增量接收 stdout/stderr 片段(读线程回调) — 小欧 2026-10-17
+        # cwd="..." 显式工作目录(与会话当前目录不同才切换), 不传则沿用会话 cwd — 小欧 2026-10-17
+
+    子类(PersistentBash)覆盖以下类属性与 _spawn_argv/_frame_command/_encode_feed 钩子 — 小欧 2026-10-17
     """
 
+    _SHELL_TYPES = ("ps7", "ps5")
+    # ps1: 2026-07-18 小沈 新增, 存多行命令脚本(避免直接经stdin喂入导致PS卡死)
+    # cmd: 2026-08-08 小欧 新增, 存LLM原始命令(独立文件), 供framework dot-source —
+    #   解析期错误(ParserError)在dot-source运行时抛出, 可被外层try/catch捕获(内联则catch接不住→假超时)
+    #   ⚠ 后缀必须.ps1(非.cmd): PowerShell dot-source对.cmd文件走cmd.exe批处理而非PS解析器,
+    #     ParserError捕获失效(回归测试10用例当场抓出, tmpXXX.cmd→"not recognized") — 小欧 2026-08-08
+    _TEMP_FILES = (("ps1", ".ps1"), ("cmd", ".ps1"))
+    _PROBE = _PROBE_CMD
+    _NO_SHELL_ERROR = _ERROR_NO_SHELL
+    _NEW_SESSION = False   # True: 子进程独立进程组(POSIX, 超时/关闭按组击杀)
+
     def __init__(self, workdir: str, shell_type: str = "ps7"):
-        if shell_type not in ("ps7", "ps5"):
-            raise ValueError(f"PersistentShell 仅支持 ps7/ps5, 收到: {shell_type}")
+        if shell_type not in self._SHELL_TYPES:
+            raise ValueError(f"{type(self).__name__} 仅支持 {'/'.join(self._SHELL_TYPES)}, 收到: {shell_type}")
         self._proc: Optional[subprocess.Popen] = None
         self._alive = False
         self._lock = threading.RLock()   # [卡死场景C3] v2.7 BugFix(小欧 2026-08-06): Lock→RLock, 使 _exec(含probe/start就绪握手)可重入统一持锁, 修 _probe 脱锁与 exec 并发写 stdin → 杜绝多shell并行时命令串扰/挂起
         self._cwd = workdir or os.getcwd()
         self._shell_type = shell_type
-        self._stderr_path: Optional[str] = None   # stderr 日志文件路径(半死可观测) — 小欧 2026-08-06
-        self._stderr_handle = None                # v2.10 BugFix(小健 2026-08-06): 持stderr句柄引用, Popen异常时显式关闭防句柄泄漏(详见_start)
+        self._reader: Optional[_SentinelReader] = None   # stdout/stderr 管道读线程 + 哨兵切帧(取代结果文件轮询) — 小欧 2026-10-17
+        self._env_key: Optional[int] = None   # 启动环境指纹: 池复用前比对, env 变更则淘汰重建 — 小欧 2026-10-17
+        self._last_fault: Optional[str] = None   # 最近一次致进程销毁的原因(timeout/exited), 池淘汰计数用 — 小欧 2026-10-17
 
     # ── 公共方法 ────────────────────────────────
 
-    def exec(self, command: str, timeout: int = 60, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    def exec(self, command: str, timeout: int = 60, env: Optional[Dict[str, str]] = None,
+             on_output: Optional[Callable[[str, str], None]] = None,
+             cwd: Optional[str] = None) -> Dict[str, Any]:
         with self._lock:
             for attempt in range(2):
                 if not self._ensure_alive(env):
                     if attempt == 0:
                         self._close()
                         continue
-                    return dict(_ERROR_NO_SHELL)
-                result = self._exec(command, timeout)
+                    return dict(self._NO_SHELL_ERROR)
+                result = self._exec(command, timeout, on_output, cwd)
                 if result.get("exit_code") != _EXIT_PROCESS_DIED:
                     return result
                 self._close()
-            return dict(_ERROR_NO_SHELL)
+            return dict(self._NO_SHELL_ERROR)
 
     def close(self):
         """关闭实例并终止进程。先尝试获取 self._lock（最多等5秒），超时也 force-kill。— [卡死场景C9/C14] 小欧 2026-08-06"""
@@ -357,62 +533,55 @@ class PersistentShell:
 
     def _probe(self, env: Optional[Dict[str, str]] = None, timeout: Optional[int] = None) -> bool:
         """响应性探活(纯探测, 不重建)：进程死或半死返回 False, 由调用方决定重建。— [卡死场景C8] 小欧 2026-08-06
-        复用 _exec 机制(DRY)：半死时 _exec 内部 _poll_for_file 超时 → 自动 _kill_tree+_close。
+        复用 _exec 机制(DRY)：半死时 _exec 内部等哨兵超时 → 自动 _kill_tree+_close。
         timeout 可选: 就绪握手传 _READY_PROBE_TIMEOUT(首次启动慢), 探活默认 _PROBE_TIMEOUT。 — 小欧 2026-08-06
         返回 True=健康可复用; False=进程不可用(可能已被 _exec 销毁)。 — 小欧 2026-08-06"""
         if self._proc is None or self._proc.poll() is not None:
             return False                      # 进程已死/未启动 → 不可复用
-        result = self._exec(_PROBE_CMD, timeout=timeout or _PROBE_TIMEOUT)   # 复用现有执行机制
+        result = self._exec(self._PROBE, timeout=timeout or _PROBE_TIMEOUT)   # 复用现有执行机制
         if result.get("timed_out"):
             logger.warning(f"[卡死C8] 探活失败(半死)→已销毁 (pid={getattr(self._proc, 'pid', None)})")
             self._close()                     # 半死销毁(重建由调用方负责)
             return False
         return "__OMNI_PROBE__" in result.get("stdout", "")
 
-    def _start(self, env: Optional[Dict[str, str]] = None) -> bool:
-        self._close()
+    def _spawn_argv(self) -> Optional[List[str]]:
+        """子进程命令行; shell 不可用返回 None — 小欧 2026-10-17 自 _start 拆出(子类覆盖)"""
         if self._shell_type == "ps7":
             pwsh = shutil.which("pwsh.exe")
         else:  # "ps5"
             pwsh = shutil.which("powershell.exe")
         if not pwsh:
             logger.error(f"[PersistentShell] {self._shell_type}(pwsh.exe/powershell.exe) 未找到")
+            return None
+        return [pwsh, "-NoProfile", "-Command", "-"]
+
+    def _start(self, env: Optional[Dict[str, str]] = None) -> bool:
+        self._close()
+        argv = self._spawn_argv()
+        if not argv:
             return False
         try:
             # 设PYTHONIOENCODING保证子Python进程输出中文时不抛UnicodeEncodeError — 小欧 2026-07-07
             # PYTHONUTF8=1让open()默认用UTF-8而非gbk,避免读UTF-8代码文件乱码 — 小欧 2026-07-07
             base_env = env if env is not None else os.environ
             child_env = {**base_env, "PYTHONIOENCODING": "utf-8", "PYTHONUTF8": "1"}
-            # ① stderr: DEVNULL → 日志文件(可观测半死原因) — 治#2 小欧 2026-08-06
-            fd, self._stderr_path = tempfile.mkstemp(suffix=".err", prefix="ps_", text=True)
-            os.close(fd)
-            # [卡死C12] v2.10 BugFix(小健 2026-08-06): stderr句柄不再内联给Popen(否则Popen异常时句柄泄漏,
-            # Windows下已占用文件不可unlink → 临时文件泄漏累积); 存局部句柄供 _start 失败路径显式关闭
-            stderr_handle = open(self._stderr_path, "w", encoding="utf-8", errors="replace")
-            self._stderr_handle = stderr_handle
-            try:
-                self._proc = subprocess.Popen(
-                    [pwsh, "-NoProfile", "-Command", "-"],
-                    stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
-                    stderr=stderr_handle,
-                    cwd=self._cwd, env=child_env,
-                )
-            except Exception:
-                # Popen异常: 句柄尚在父进程未移交 → 显式关闭再抛出, 供外层except清理临时文件
-                try:
-                    stderr_handle.close()
-                except Exception:
-                    pass
-                self._stderr_handle = None
-                raise
-            self._stderr_handle = None   # 移交子进程后由 _close/进程代管
+            self._env_key = _env_fingerprint(base_env)
+            self._last_fault = None
+            # ① stdout/stderr: 管道 + _SentinelReader 读线程(命令结果/完成事件/进程级stderr尾部均经此) — 小欧 2026-10-17
+            #   (原 stderr→ps_*.err 临时文件 + v2.10 句柄泄漏防护随临时文件一并删除; 半死可观测改读线程窗口外尾部缓冲)
+            self._proc = subprocess.Popen(
+                argv,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                cwd=self._cwd, env=child_env, start_new_session=self._NEW_SESSION,
+            )
+            self._reader = _SentinelReader(self._proc, f"{self._shell_type}-{self._proc.pid}")
             for _ in range(40):
                 if self._proc.poll() is None:
                     break
                 time.sleep(0.025)
             else:
-                # [卡死C12] v2.10 BugFix(小健 2026-08-06): 进程启动后立即退出 → _close() 清理已mkstemp的_stderr_path临时文件, 防泄漏
-                logger.error("[PersistentShell] 进程启动后立即退出, 已清理临时stderr文件")
+                logger.error("[PersistentShell] 进程启动后立即退出")
                 self._alive = False
                 self._close()
                 return False
@@ -424,12 +593,11 @@ class PersistentShell:
                 logger.error("[PersistentShell] 就绪握手失败，进程未就绪")
                 self._close()
                 return False
-            logger.info(f"[PersistentShell] 进程就绪 (pid={self._proc.pid}, stderr={self._stderr_path}, cwd={self._cwd}, shell_type={self._shell_type})")
+            logger.info(f"[PersistentShell] 进程就绪 (pid={self._proc.pid}, cwd={self._cwd}, shell_type={self._shell_type})")
             return True
         except Exception as e:
             logger.error(f"[PersistentShell] 启动失败: {e}")
             self._alive = False
-            # [卡死C12] v2.10 BugFix(小健 2026-08-06): Popen异常时 _stderr_path 已在mkstemp创建但未清理 → _close() 清理临时文件, 防temp目录累积泄漏
             self._close()
             return False
 
@@ -447,89 +615,121 @@ class PersistentShell:
 
     # ── 命令执行 ────────────────────────────────
 
-    def _exec(self, command: str, timeout: int) -> Dict[str, Any]:
+    def _exec(self, command: str, timeout: int,
+              on_output: Optional[Callable[[str, str], None]] = None,
+              cwd: Optional[str] = None) -> Dict[str, Any]:
         # [卡死场景C3] v2.7 BugFix(小欧 2026-08-06): _exec 统一持锁(RLock可重入)。
         # 原 exec() 持锁调 _exec、而 acquire 复用路径 _probe() 脱锁调 _exec →
         # 两处可并发写同一 stdin → 命令交错/串扰。收敛为所有 _exec 调用统一持锁。
         with self._lock:
-            return self._exec_locked(command, timeout)
-
-    def _exec_locked(self, command: str, timeout: int) -> Dict[str, Any]:
+            return self._exec_locked(command, timeout, on_output, cwd)
+
+    def _frame_command(self, paths, command: str, nonce: str, cwd: Optional[str]) -> str:
+        """写命令脚本 + 执行框架(末尾写哨兵行), 返回喂给 stdin 的单行投递 — 小欧 2026-10-17 自 _exec_locked 拆出(子类覆盖)"""
+        # 用Out-File -Encoding utf8取代>避免PS5.1写UTF-16LE导致中文乱码 — 小欧 2026-07-07
+        # 设置$OutputEncoding为UTF8避免PS5.1用GBK解读子进程UTF-8输出导致乱码 — 小欧 2026-07-07
+        # $OutputEncoding+Out-File -Width 4096解决PS5.1 Format-Table因控制台宽度不足(默认80列)输出空白 — 小欧 2026-07-08
+        # [卡死C12] 2026-08-07 小欧 G2普遍性根治(B6): ForEach内成功分支直接Out-File落盘,
+        # Out-File渲染FormatEntryData触发out-lineoutput→进程stderr残留→误报C12(别名fl/ft/fw亦触发)。
+        # B6: 错误对象[void]$errs.Add($_)(不落盘), 成功对象原样下传→管道末端统一
+        # | Out-String -Width 4096 | Out-File(Out-String正确渲染Format对象), 错误最后单独
+        # Out-File -Encoding utf8(编码可控, 规避PS5 2>写UTF-16LE乱码)。分流语义等价旧结构。
+        # [B6.1] 2026-08-07 小欧 回归测试挖出B6四缺陷并根治(三堂会审定稿):
+        #   BUG#1: `;`复合命令前段出错,$?只反映最后一条→rc漏报0(错误进err但业务层判success)
+        #   BUG#2: PS5 native写stderr使$?变False→成功命令误报rc=1(PS7/PS5行为不一致)
+        #   BUG#3: $LASTEXITCODE跨命令残留污染(先native exit3再跑cmdlet→rc误报3)
+        #   BUG#4: throw终止性错误中断ps_cmd→rc文件不写→假超时(C8/C14)30s+杀进程+引擎重建
+        # 修复: ①前置$global:LASTEXITCODE=0清残留(BUG#3) ②rc判定改errs分类:
+        #   LASTEXITCODE非0→取其值(native真失败); errs含非NativeCommandError错误→1(cmdlet真错);
+        #   NativeCommandError(native stderr)不计错(BUG#1/2) ③try/catch移入& {}块内兜底
+        #   终止性错误, catch记录文本到errs+rc=1, 块内catch后管道不中断→throw前的stdout完整
+        #   落盘不丢失(BUG#4, 实测Write-Output before; throw→out保留before)
+        # ① LLM原始命令(含可能语法错误) → 独立 cmd.ps1 (UTF-8-BOM, 与ps_cmd同)
+        #    解析期错误(ParserError)发生时, 错误属于cmd.ps1 → dot-source运行时抛出 → 外层catch可捕获
+        with open(paths.cmd, "w", encoding="utf-8-sig") as _cmd:
+            _cmd.write(command)
+        # ② 执行框架 ps_cmd: dot-source cmd.ps1 + try/catch在dot-source外层(B6.3)
+        #   2026-10-17 小欧: 结果不再 Out-File 落 out/err/code/cwd 文件, 改写管道 + 哨兵行(_SentinelReader 切帧):
+        #   stdout 逐行 Out-String -Stream → [Console]::Out.WriteLine(每行+换行, 末尾补一空行 = 原 Out-String|Out-File 文本),
+        #   $errs 渲染 → [Console]::Error, 随后 stderr 写 ERR 哨兵、stdout 写 DONE 哨兵(rc + cwd), 哨兵前补 `n 保证行首
+        #   [Console]::OutputEncoding 用无 BOM 的 UTF-8, 免管道开头带 BOM
+        # cwd: 显式目录与会话当前目录不同 → 先 Set-Location(失败抛出走 catch: rc=1 且不执行命令) — 小欧 2026-10-17
+        enter = (f"Set-Location -LiteralPath '{cwd.replace(chr(39), chr(39) * 2)}' -ErrorAction Stop; "
+                 if cwd and cwd != self._cwd else "")
+        ps_cmd = (
+            f'[Console]::OutputEncoding=(New-Object System.Text.UTF8Encoding $false); $OutputEncoding=[System.Text.Encoding]::UTF8; '
+            f'$global:rc=0; $errs = New-Object System.Collections.ArrayList; $global:LASTEXITCODE = 0; '
+            f'& {{ try {{ {enter}. "{paths.cmd}" }} catch {{ $global:rc = 1; [void]$errs.Add($_) }} }} 2>&1 | '
+            f'ForEach-Object {{ if ($_ -is [System.Management.Automation.ErrorRecord]) {{ [void]$errs.Add($_) }} else {{ $_ }} }} | '
+            f'Out-String -Stream -Width 4096 | ForEach-Object {{ [Console]::Out.WriteLine($_) }}; [Console]::Out.WriteLine(); '
+            f'if ($global:LASTEXITCODE -ne 0) {{ $global:rc = $global:LASTEXITCODE }} '
+            f'else {{ foreach ($ee in $errs) {{ if ($ee.FullyQualifiedErrorId -notlike "NativeCommandError") '
+            f'{{ $global:rc = 1; break }} }} }}; '
+            f'if ($errs.Count) {{ [Console]::Error.Write(($errs | Out-String -Width 4096) + [Environment]::NewLine) }}; '
+            f'[Console]::Error.Write("`n{_SENTINEL_PREFIX}{nonce}__ERR`n"); [Console]::Error.Flush(); '
+            f'[Console]::Out.Write("`n{_SENTINEL_PREFIX}{nonce}__DONE $($global:rc) " + (Get-Location).Path + "`n"); [Console]::Out.Flush()'
+        )
+        # [卡死场景C4] 修复(小沈 2026-07-18): 多行命令(如 python -c "..." 含换行)直接经 -Command - 从stdin喂入时,
+        # PowerShell解析器会卡死等待输入, 导致命令跑满timeout(见 logs 2026-07-18 step=15 跑满600s)。
+        # 改为: 将ps_cmd(含多行内容)以UTF-8-BOM写入.ps1文件, 再向持久pwsh喂一句【单行】dot-source
+        # (& { . "path.ps1" }), 多行内容留在文件内不再经stdin流 → 死锁消除。单行命令亦正常。
+        with open(paths.ps1, "w", encoding="utf-8-sig") as _ps1:
+            _ps1.write(ps_cmd)
+        return f'& {{ . "{paths.ps1}" }}\n'
+
+    def _encode_feed(self, feed: str) -> bytes:
+        """投递行编码: PS `-Command -` stdin 按系统 locale 编码读取(见【编码链路】[入]) — 小欧 2026-10-17 自 _exec_locked 拆出"""
+        return feed.encode(locale.getpreferredencoding(), errors="replace")
+
+    def _exec_locked(self, command: str, timeout: int,
+                     on_output: Optional[Callable[[str, str], None]] = None,
+                     cwd: Optional[str] = None) -> Dict[str, Any]:
         command = self._preprocess_command(command)
-        with _TempFiles() as paths:
-            # 用Out-File -Encoding utf8取代>避免PS5.1写UTF-16LE导致中文乱码 — 小欧 2026-07-07
-            # 设置$OutputEncoding为UTF8避免PS5.1用GBK解读子进程UTF-8输出导致乱码 — 小欧 2026-07-07
-            # $OutputEncoding+Out-File -Width 4096解决PS5.1 Format-Table因控制台宽度不足(默认80列)输出空白 — 小欧 2026-07-08
-            # [卡死C12] 2026-08-07 小欧 G2普遍性根治(B6): ForEach内成功分支直接Out-File落盘,
-            # Out-File渲染FormatEntryData触发out-lineoutput→进程stderr残留→误报C12(别名fl/ft/fw亦触发)。
-            # B6: 错误对象[void]$errs.Add($_)(不落盘), 成功对象原样下传→管道末端统一
-            # | Out-String -Width 4096 | Out-File(Out-String正确渲染Format对象), 错误最后单独
-            # Out-File -Encoding utf8(编码可控, 规避PS5 2>写UTF-16LE乱码)。分流语义等价旧结构。
-            # [B6.1] 2026-08-07 小欧 回归测试挖出B6四缺陷并根治(三堂会审定稿):
-            #   BUG#1: `;`复合命令前段出错,$?只反映最后一条→rc漏报0(错误进err但业务层判success)
-            #   BUG#2: PS5 native写stderr使$?变False→成功命令误报rc=1(PS7/PS5行为不一致)
-            #   BUG#3: $LASTEXITCODE跨命令残留污染(先native exit3再跑cmdlet→rc误报3)
-            #   BUG#4: throw终止性错误中断ps_cmd→rc文件不写→假超时(C8/C14)30s+杀进程+引擎重建
-            # 修复: ①前置$global:LASTEXITCODE=0清残留(BUG#3) ②rc判定改errs分类:
-            #   LASTEXITCODE非0→取其值(native真失败); errs含非NativeCommandError错误→1(cmdlet真错);
-            #   NativeCommandError(native stderr)不计错(BUG#1/2) ③try/catch移入& {}块内兜底
-            #   终止性错误, catch记录文本到errs+rc=1, 块内catch后管道不中断→throw前的stdout完整
-            #   落盘不丢失(BUG#4, 实测Write-Output before; throw→out保留before)
-            # ① LLM原始命令(含可能语法错误) → 独立 cmd.ps1 (UTF-8-BOM, 与ps_cmd同)
-            #    解析期错误(ParserError)发生时, 错误属于cmd.ps1 → dot-source运行时抛出 → 外层catch可捕获
-            with open(paths.cmd, "w", encoding="utf-8-sig") as _cmd:
-                _cmd.write(command)
-            # ② 执行框架 ps_cmd: dot-source cmd.ps1 + try/catch在dot-source外层(B6.3)
-            ps_cmd = (
-                f'[Console]::OutputEncoding=[System.Text.Encoding]::UTF8; $OutputEncoding=[System.Text.Encoding]::UTF8; '
-                f'$global:rc=0; $errs = New-Object System.Collections.ArrayList; $global:LASTEXITCODE = 0; '
-                f'& {{ try {{ . "{paths.cmd}" }} catch {{ $global:rc = 1; [void]$errs.Add($_) }} }} 2>&1 | '
-                f'ForEach-Object {{ if ($_ -is [System.Management.Automation.ErrorRecord]) {{ [void]$errs.Add($_) }} else {{ $_ }} }} | '
-                f'Out-String -Width 4096 | Out-File -FilePath "{paths.out}" -Encoding utf8 -Width 4096; '
-                f'if ($global:LASTEXITCODE -ne 0) {{ $global:rc = $global:LASTEXITCODE }} '
-                f'else {{ foreach ($ee in $errs) {{ if ($ee.FullyQualifiedErrorId -notlike "NativeCommandError") '
-                f'{{ $global:rc = 1; break }} }} }}; '
-                f'if ($errs.Count) {{ $errs | Out-String -Width 4096 | Out-File -FilePath "{paths.err}" -Encoding utf8 -Width 4096 }}; '
-                f'$global:rc | Out-File -FilePath "{paths.code}" -Encoding utf8; '
-                f'(Get-Location).Path | Out-File -FilePath "{paths.cwd}" -Encoding utf8'
-            )
+        with _TempFiles(self._TEMP_FILES) as paths:
+            frame = self._reader.begin(on_output) if self._reader is not None else None
+            feed = self._frame_command(paths, command, frame.nonce if frame is not None else "", cwd)
             try:
-                # [卡死场景C4] 修复(小沈 2026-07-18): 多行命令(如 python -c "..." 含换行)直接经 -Command - 从stdin喂入时,
-                # PowerShell解析器会卡死等待输入, 导致命令跑满timeout(见 logs 2026-07-18 step=15 跑满600s)。
-                # 改为: 将ps_cmd(含多行内容)以UTF-8-BOM写入.ps1文件, 再向持久pwsh喂一句【单行】dot-source
-                # (& { . "path.ps1" }), 多行内容留在文件内不再经stdin流 → 死锁消除。单行命令亦正常。
-                with open(paths.ps1, "w", encoding="utf-8-sig") as _ps1:
-                    _ps1.write(ps_cmd)
-                feed = f'& {{ . "{paths.ps1}" }}\n'
                 # [卡死场景C5] v2.7 BugFix(小欧 2026-08-06): 写 stdin 前 poll 探活, 防向已死进程写管道被阻塞。
                 # 进程已死时 pipe 写端会阻塞/报错, 提前返回 _EXIT_PROCESS_DIED 让 exec() 走重启分支。
-                if self._proc is None or self._proc.poll() is not None:
+                if frame is None or self._proc is None or self._proc.poll() is not None:
                     logger.warning(f"[卡死C5] 写stdin前探活: 进程已死, 返回_EXIT_PROCESS_DIED → 走重启分支 (pid={self._proc.pid if self._proc else None})")
                     return {"stdout": "", "stderr": "", "exit_code": _EXIT_PROCESS_DIED}
-                self._proc.stdin.write(feed.encode(locale.getpreferredencoding(), errors="replace"))
+                self._proc.stdin.write(self._encode_feed(feed))
                 self._proc.stdin.flush()
             except (BrokenPipeError, OSError, ValueError):
                 logger.warning(f"[卡死C5] 向死进程写stdin触发管道异常(BrokenPipe/OSError/ValueError) → 返回_EXIT_PROCESS_DIED, 走重启分支")
                 return {"stdout": "", "stderr": "", "exit_code": _EXIT_PROCESS_DIED}
 
             # [卡死场景C8/C14] 有界兜底: 命令超时(含半死/死循环/锁被hold) → 杀进程树+close, 返回timeout(非永久阻塞) — 小欧 2026-08-06
-            if not _poll_for_file(paths.code, timeout):
+            #   2026-10-17 小欧: 等哨兵事件(Condition)取代 _poll_for_file 文件轮询, 命令结束即返回, 无轮询间隔
+            #   2026-10-17 小欧: 超时返回已收到的部分输出(stderr 为空时仍为 "timeout")
+            if not self._reader.wait(frame, timeout):
                 logger.warning(f"[卡死C8/C14] 命令超时{timeout}s未出结果(半死/死循环/锁被hold) → 杀进程树+close, 返回timeout(非永久阻塞)")
                 self._kill_tree()
                 self._close()
-                return dict(_ERROR_TIMEOUT)
-            # [卡死场景C12] v2.11 小欧 2026-08-08: .code有内容≠PS命令执行完 — ps_cmd最后一行才写.cwd,
-            #   此时立即读/unlink存在竞态: Out-File写.cwd中句柄未释放→unlink失败→文件残留(实测tmpXXX.cwd)。
-            #   等.cwd非空=PS已执行完最后一条Out-File(句柄必已释放), 再读/清理才安全; 超时仅3s不拖慢成功路径
-            _poll_for_file(paths.cwd, timeout=_CWD_WAIT_TIMEOUT)
-
-            # .lstrip('\ufeff') 去掉PS5.1 Out-File -Encoding utf8写的BOM — 小欧 2026-07-07
-            stdout = safe_read_file(paths.out).lstrip('\ufeff')
-            stderr = safe_read_file(paths.err).lstrip('\ufeff')
-            code_raw = safe_read_file(paths.code).strip().lstrip('\ufeff')
-            cwd_raw = safe_read_file(paths.cwd).strip().lstrip('\ufeff')
-            if cwd_raw:
-                self._cwd = cwd_raw
+                self._last_fault = "timeout"
+                return {**_ERROR_TIMEOUT, "stdout": frame.text("stdout"),
+                        "stderr": frame.text("stderr") or _ERROR_TIMEOUT["stderr"]}
+
+            stdout = frame.text("stdout")
+            stderr = frame.text("stderr")
+            if frame.died and not frame.done:
+                # 哨兵到齐前管道 EOF = 命令执行中进程退出(命令内 exit / 崩溃): 已执行过, 不走 _EXIT_PROCESS_DIED 重跑,
+                # 返回已收输出 + 进程退出码; 下次 exec 由 _ensure_alive 重建进程 — 小欧 2026-10-17
+                try:
+                    exit_code = self._proc.wait(timeout=SUBPROCESS_TIMEOUT_SHORT)
+                except Exception:
+                    exit_code = -1
+                logger.warning(f"[PersistentShell] 命令执行中进程退出(exit_code={exit_code}), 下次执行重建进程 cmd={command[:100]!r}")
+                self._close()
+                self._last_fault = "exited"
+                return {
+                    "stdout": stdout,
+                    "stderr": stderr,
+                    "exit_code": exit_code,
+                }
+            if frame.cwd:
+                self._cwd = frame.cwd
             # [B6.3] ParserError快速失败留痕(北京老陈指示"纠偏容错必须可见"): 解析期语法错误经dot-source
             #   由外层catch捕获后rc=1+err落盘, 此处打warning标记"LLM命令语法错误快速失败", 供日志统计/
             #   回溯(对齐C8/C14超时可见性; 正常命令与运行期错误不触发此日志, 不污染常规路径) — 小欧 2026-08-08
@@ -538,7 +738,7 @@ class PersistentShell:
             return {
                 "stdout": stdout,
                 "stderr": stderr,
-                "exit_code": int(code_raw) if code_raw else 0,
+                "exit_code": frame.exit_code,
             }
 
     # ── 清理 ────────────────────────────────────
@@ -567,30 +767,78 @@ class PersistentShell:
                     self._proc.wait(timeout=SUBPROCESS_TIMEOUT_SHORT)   # [卡死场景C11] wait有界, 防kill后阻塞 — 小欧 2026-08-06
             except Exception as e:
                 logger.warning(f"[卡死C11] 关闭进程失败(pid={self._proc.pid}): {e}")
-            # [卡死场景C12] v2.7 修复(问题3): 显式关闭 stderr 句柄(在置 None 前), 防半死场景 wait 超时后句柄残留→unlink 失败 — 小欧 2026-08-06
-            try:
-                if self._proc.stderr is not None:
-                    self._proc.stderr.close()
-            except Exception:
-                pass
+            # 管道由读线程在 EOF 时自行关闭(此处关会与阻塞中的 os.read 竞争 fd) — 小欧 2026-10-17
             self._proc = None
             self._alive = False
-        # [卡死场景C12] v2.10 BugFix(小健 2026-08-06): Popen异常未移交句柄时 _stderr_handle 残留 → 显式关闭, 防Windows下临时文件被占用无法unlink
-        if self._stderr_handle is not None:
-            try:
-                self._stderr_handle.close()
-            except Exception:
-                pass
-            self._stderr_handle = None
-        # [卡死场景C12] 半死可观测：close 前读取 stderr 残留并记录，随后清理临时文件 — 小欧 2026-08-06
-        if self._stderr_path:
-            tail = safe_read_file(self._stderr_path).strip()
+        # [卡死场景C12] 半死可观测：close 时记录命令窗口外的输出残留(进程级 stderr 等) — 小欧 2026-08-06
+        #   2026-10-17 小欧: 来源由 ps_*.err 临时文件改为读线程尾部缓冲, 无临时文件可泄漏
+        if self._reader is not None:
+            tail = self._reader.stray_tail().strip()
             if tail:
-                logger.warning(f"[卡死C12] 关闭时 stderr 残留(半死证据): {tail[:200]}")
-            # v2.11 小欧 2026-08-08: 静默pass→_safe_unlink统一重试+留痕(引擎级stderr文件同样存在句柄延迟释放竞态,
-            # 升级为与命令级临时文件一致的健壮清理, 残留可见可溯源)
-            _safe_unlink(self._stderr_path)
-            self._stderr_path = None
+                logger.warning(f"[卡死C12] 关闭时 stderr 残留(半死证据): {tail[-200:]}")
+            self._reader = None
+
+
+# ═══════════════════════════════════════════════════════
+#  PersistentBash — 持久 bash 会话(Linux/macOS)
+# ═══════════════════════════════════════════════════════
+
+class PersistentBash(PersistentShell):
+    """持久 bash 进程 — 进程生命周期/探活/超时/哨兵切帧全部复用 PersistentShell — 小欧 2026-10-17
+
+    会话状态(cd/export/函数/别名/set 选项)跨命令保留; 命令内 exit 或 set -e 失败 → 进程退出, 返回已收输出, 下次 exec 重建。
+    用法同 PersistentShell: engine = shell_pool.acquire(task_id, "bash", workdir=..., env=...)
+    """
+
+    _SHELL_TYPES = ("bash",)
+    _TEMP_FILES = (("cmd", ".sh"),)
+    _PROBE = _BASH_PROBE_CMD
+    _NO_SHELL_ERROR = _ERROR_NO_BASH
+    _NEW_SESSION = True   # 独立进程组: 超时/关闭时 killpg 连同命令拉起的子进程/后台任务
+
+    def __init__(self, workdir: str, shell_type: str = "bash"):
+        super().__init__(workdir, shell_type)
+
+    def _spawn_argv(self) -> Optional[List[str]]:
+        bash = shutil.which("bash")
+        if not bash:
+            logger.error("[PersistentBash] bash 未找到")
+            return None
+        # -l: 启动时读一次 profile(环境等价原每命令 `bash -l -c`); -s: 从 stdin 读投递行
+        return [bash, "-l", "-s"]
+
+    def _frame_command(self, paths, command: str, nonce: str, cwd: Optional[str]) -> str:
+        # 命令写独立脚本再 dot-source(同 PS 的 C4/B6.3: 多行/语法错误留在脚本内, 投递行始终单行且可解析)
+        # 命令 stdin 接 /dev/null: 读 stdin 的命令(cat/read/交互程序)不能吞掉后续投递行
+        # 显式 cwd 与会话当前目录不同 → 先 cd, 失败则 rc=1 且不执行命令
+        with open(paths.cmd, "w", encoding="utf-8") as _cmd:
+            _cmd.write(command)
+        enter = f"cd -- {shlex.quote(cwd)} && " if cwd and cwd != self._cwd else ""
+        mark = f"{_SENTINEL_PREFIX}{nonce}"
+        return (f"{{ {enter}. {shlex.quote(paths.cmd)}; }} </dev/null; __omni_rc=$?; "
+                f"printf '\\n{mark}__ERR\\n' >&2; printf '\\n{mark}__DONE %s %s\\n' \"$__omni_rc\" \"$PWD\"\n")
+
+    def _encode_feed(self, feed: str) -> bytes:
+        return os.fsencode(feed)   # 路径按文件系统编码(含 surrogateescape), 与 bash 看到的字节一致
+
+    def _kill_tree(self):
+        # [卡死场景C11] 进程组整体 SIGKILL(bash + 命令子进程), 失败退回 proc.kill()
+        if self._proc and self._proc.poll() is None:
+            try:
+                os.killpg(self._proc.pid, signal.SIGKILL)
+            except OSError as e:
+                logger.warning(f"[卡死C11] killpg异常 → proc.kill()兜底 (pid={self._proc.pid}): {e}")
+                try:
+                    self._proc.kill()
+                except Exception:
+                    pass
+
+    def _close(self):
+        # 连同进程组内残留后台任务一起结束(其持有的 stdout/stderr 管道会让读线程等不到 EOF)
+        if self._proc is not None:
+            with contextlib.suppress(OSError):
+                os.killpg(self._proc.pid, signal.SIGKILL)
+        super()._close()
 
 
 # ═══════════════════════════════════════════════════════
@@ -615,12 +863,17 @@ class ShellPoolManager:
         # 空闲超时兜底: 实例放回池后超过 idle_timeout 秒无人 acquire 则 close（防孤魂野鬼）
         self._idle_timeout = idle_timeout
         self._last_used: Dict[int, float] = {}  # id(inst) → release 时间戳
+        # 池健康指标(stats() 读取): 按 shell_type 计 — 小欧 2026-10-17
+        self._counters: Dict[str, Counter] = defaultdict(Counter)
+        self._evictions: Dict[str, Counter] = defaultdict(Counter)
 
     def _pool_key(self, task_id: str, shell_type: str) -> tuple:
         return (task_id, shell_type)
 
     def _make_shell(self, shell_type: str, workdir: str = None) -> PersistentShell:
-        """创建 PersistentShell 实例（解锁执行，不持池锁）"""
+        """创建 PersistentShell/PersistentBash 实例（解锁执行，不持池锁）"""
+        if shell_type == "bash":
+            return PersistentBash(workdir)
         return PersistentShell(workdir, shell_type)
 
     def acquire(self, task_id: str, shell_type: str, workdir: str = None,
@@ -638,9 +891,18 @@ class ShellPoolManager:
         """  # 小欧 2026-08-06 v2.8
         key = self._pool_key(task_id, shell_type)
         sem = self._sem[key]
+        counters = self._counters[shell_type]
+        want_env = _env_fingerprint(env) if env is not None else None
         # [卡死场景C2] Phase0: 拿不到槽位 → 明确失败, 绝不temp绕过限流、绝不无限等待 — 小欧 2026-08-06
         # 有界等待: 同key并发排队最多 ACQUIRE_WAIT_TIMEOUT(2s), 超时抛ShellPoolBusyError → 调用方except转build_error(非卡死非500)
-        if not sem.acquire(timeout=ACQUIRE_WAIT_TIMEOUT):
+        t_wait = time.perf_counter()
+        got_slot = sem.acquire(timeout=ACQUIRE_WAIT_TIMEOUT)
+        with self._lock:
+            counters["acquires"] += 1
+            counters["wait_ms"] += (time.perf_counter() - t_wait) * 1000
+            if not got_slot:
+                counters["busy_rejected"] += 1
+        if not got_slot:
             logger.warning(f"[卡死C2] 池槽位耗尽, 同key并发排队超{ACQUIRE_WAIT_TIMEOUT}s → 明确失败(key={key}, 上限={self._max_per_type}), 拒temp绕过/无限等")
             raise ShellPoolBusyError(
                 f"[ShellPool] 同key并发槽位耗尽(key={key}, 上限={self._max_per_type}): "
@@ -663,19 +925,27 @@ class ShellPoolManager:
                     inst = None
                     for it in list(pool):
                         if id(it) not in busy:
+                            reason = None
                             if self._idle_timeout is not None:
                                 last = self._last_used.get(id(it), 0)
                                 if time.time() - last > self._idle_timeout:
-                                    pool.remove(it)
-                                    self._inst_map.pop(id(it), None)
-                                    self._last_used.pop(id(it), None)
-                                    evict_to_close.append(it)
-                                    logger.debug(f"[卡死C6] 空闲超时淘汰实例(锁外close不阻塞全池) (pid={getattr(getattr(it, '_proc', None), 'pid', None)}, idle={self._idle_timeout}s)")
-                                    continue
+                                    reason = "idle"
+                            # 启动环境已变(调用方 env 指纹不同) → 淘汰重建, 不让会话沿用旧环境 — 小欧 2026-10-17
+                            if reason is None and want_env is not None and getattr(it, "_env_key", None) not in (None, want_env):
+                                reason = "env_changed"
+                            if reason is not None:
+                                pool.remove(it)
+                                self._inst_map.pop(id(it), None)
+                                self._last_used.pop(id(it), None)
+                                self._evictions[shell_type][reason] += 1
+                                evict_to_close.append(it)
+                                logger.debug(f"[卡死C6] {reason}淘汰实例(锁外close不阻塞全池) (pid={getattr(getattr(it, '_proc', None), 'pid', None)}, idle={self._idle_timeout}s)")
+                                continue
                             busy.add(id(it))
                             self._inst_map[id(it)] = key
                             inst = it
                             fresh = False
+                            counters["reused"] += 1
                             break
                     if inst is None:
                         inst = self._make_shell(shell_type, workdir)
@@ -685,6 +955,7 @@ class ShellPoolManager:
                             self._inst_map[id(inst)] = key
                             self._last_used[id(inst)] = time.time()
                             fresh = True
+                            counters["created"] += 1
                         else:
                             # v2.8: 拿到槽位⇒活跃acquire<max⇒池满必有空闲复用, 此分支不可达(防御)
                             raise RuntimeError(f"[ShellPool] 内部不一致: 池满且无空闲(key={key}), 应不可达")
@@ -709,6 +980,7 @@ class ShellPoolManager:
                     busy.discard(id(inst))
                     lost_slot = self._inst_map.pop(id(inst), None) is None
                     self._last_used.pop(id(inst), None)
+                    self._evictions[shell_type]["start_failed" if fresh else "probe_failed"] += 1
                 inst.close()
                 if lost_slot:
                     # 槽已由外部(cleanup)归还 → 重新取得一槽, 供重试的新实例占用(不额外超归/泄漏)
@@ -749,6 +1021,8 @@ class ShellPoolManager:
                         pool.remove(inst)
                         self._last_used.pop(id(inst), None)
                         should_close = True
+                        # 淘汰原因: 命令超时被杀(timeout) / 命令内退出(exited) / 其他死亡(dead) — 下次 acquire 新建替补 — 小欧 2026-10-17
+                        self._evictions[key[1]][getattr(inst, "_last_fault", None) or "dead"] += 1
                     else:
                         # 池实例放回: 记录时间戳供空闲超时兜底
                         self._last_used[id(inst)] = time.time()
@@ -813,6 +1087,31 @@ class ShellPoolManager:
                 logger.debug(f"atexit清理Shell实例失败: {e}")
         return len(close_list)
 
+    def stats(self) -> Dict[str, Any]:
+        """池健康指标(GET /metrics/shell_pool), 按 shell_type: 池数/实例/占用/空闲/存活、acquire 次数与平均等待、
+        新建/复用、槽位耗尽拒绝、按原因淘汰(idle/env_changed/probe_failed/start_failed/timeout/exited/dead) — 小欧 2026-10-17"""
+        with self._lock:
+            out: Dict[str, Any] = {}
+            for shell_type in sorted({k[1] for k in self._pool} | set(self._counters)):
+                keys = [k for k in self._pool if k[1] == shell_type]
+                insts = [inst for k in keys for inst in self._pool[k]]
+                busy = sum(len(self._busy.get(k, ())) for k in keys)
+                c = self._counters[shell_type]
+                out[shell_type] = {
+                    "pools": sum(1 for k in keys if self._pool[k]),
+                    "instances": len(insts),
+                    "busy": busy,
+                    "idle": len(insts) - busy,
+                    "alive": sum(1 for inst in insts if inst._proc is not None and inst._proc.poll() is None),
+                    "acquires": c["acquires"],
+                    "avg_wait_ms": round(c["wait_ms"] / c["acquires"], 2) if c["acquires"] else 0.0,
+                    "created": c["created"],
+                    "reused": c["reused"],
+                    "busy_rejected": c["busy_rejected"],
+                    "evictions": dict(self._evictions[shell_type]),
+                }
+            return {"max_per_type": self._max_per_type, "idle_timeout": self._idle_timeout, "shells": out}
+
     def get_all_pids(self) -> set:
         """返回所有活跃shell实例的PID集合(供安全检查保护自身进程) — 小欧 2026-07-31"""
         pids = set()
@@ -13,6 +13,8 @@
 #   4. searchtool 空token分支(纯符号)不再返回全部工具top10, 返回空matches+warning
 # 2026-08-07 - 小欧 - searchtool结果选取增加"分类级名额保底"(_apply_category_floor):
 #   修复多类型混合搜索时高分类霸占top10名额, 低分分类被挤出导致一次搜索注不全分类(实测7类型混合仅命中4类)
+# 2026-10-17 - 小欧 - BM25 改走注册表增量维护的倒排索引(tool_registry.search_scores), 删除每次查询全量重建的 _build_bm25/_bm25_scores;
+#   _tokenize 迁至 app/tools/tool_search_index.tokenize; 只有命中工具参与排序(未命中工具分数为0, 本就过不了阈值), 排序/阈值/返回不变
 """
 searchtool — BM25 全文检索搜索工具
 【2026-06-22 小健】从 fundamental_tools.py 拆分为独立文件
@@ -21,117 +23,15 @@ searchtool — BM25 全文检索搜索工具
 # build3+llm_data只能在tool的main函数(对外公开的函数)中包装。违反此规则的代码视为不合规。
 # 【铁规2】工具返回原始data，禁止调用truncate_data_for_frontend。截断只能在前端yield层。
 # 【铁规3】计时(duration_ms计算)只能在tool的主函数中，严禁在子函数/helper中计时。
-import math
 import time
-from collections import Counter
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List
 
 from app.tools.registry import tool_registry
+from app.tools.tool_search_index import tokenize
 from app.tools.tool_response import build_success, build_error
 from app.tools.tool_constants import ERR_DOC_QUERY_EMPTY, TOOL_SEARCH_INER_RESULTS_TOP
 
 
-def _tokenize(text: str) -> List[str]:
-    """中英混合分词：中文按词组切分，英文按词切分，统一小写 — 小沈 2026-06-14
-    小欧 2026-08-05 修复: 中文≥2字只生成bigram去单字; =1字保留单字(词不拆字)
-    """
-    tokens: List[str] = []
-    buf: List[str] = []
-    chinese_buf: List[str] = []
-    for ch in text.lower():
-        if '\u4e00' <= ch <= '\u9fff':
-            if buf:
-                tokens.append("".join(buf))
-                buf.clear()
-            chinese_buf.append(ch)
-        else:
-            if chinese_buf:
-                # 中文片段收尾: ≥2字生成bigram, =1字保留单字 — 小欧 2026-08-05
-                if len(chinese_buf) >= 2:
-                    for i in range(len(chinese_buf) - 1):
-                        tokens.append(chinese_buf[i] + chinese_buf[i + 1])
-                else:
-                    tokens.append(chinese_buf[0])
-                chinese_buf.clear()
-            if ch == '_':
-                if buf:
-                    tokens.append("".join(buf))
-                    buf.clear()
-            elif ch.isalnum():
-                buf.append(ch)
-            else:
-                if buf:
-                    tokens.append("".join(buf))
-                    buf.clear()
-    if chinese_buf:
-        # 中文片段收尾: ≥2字生成bigram, =1字保留单字 — 小欧 2026-08-05
-        if len(chinese_buf) >= 2:
-            for i in range(len(chinese_buf) - 1):
-                tokens.append(chinese_buf[i] + chinese_buf[i + 1])
-        else:
-            tokens.append(chinese_buf[0])
-    if buf:
-        tokens.append("".join(buf))
-    return tokens
-
-
-def _build_bm25() -> Tuple[List[List[str]], List[str], float, Counter]:
-    """从工具注册表构建 BM25 语料库 — 小沈 2026-06-14"""
-    docs: List[List[str]] = []
-    tool_names: List[str] = []
-    for name, metadata in tool_registry._tools.items():
-        text = " ".join([name] * 3) + " " + metadata.description
-        docs.append(_tokenize(text))
-        tool_names.append(name)
-
-    N = len(docs)
-    avgdl = sum(len(d) for d in docs) / max(N, 1)
-
-    df: Counter = Counter()
-    for doc in docs:
-        for term in set(doc):
-            df[term] += 1
-
-    return docs, tool_names, avgdl, df
-
-
-def _bm25_scores(
-    query_tokens: List[str],
-    docs: List[List[str]],
-    avgdl: float,
-    df: Counter,
-    k1: float = 1.5,
-    b: float = 0.75,
-) -> List[float]:
-    """计算 BM25 分数（Okapi BM25） — 小沈 2026-06-14"""
-    N = len(docs)
-    if N == 0:
-        return []
-
-    doc_tfs = [Counter(d) for d in docs]
-    scores = [0.0] * N
-
-    unique_terms = []
-    seen_terms = set()
-    for term in query_tokens:
-        if term not in seen_terms:
-            seen_terms.add(term)
-            unique_terms.append(term)
-    for term in unique_terms:
-        n = df.get(term, 0)
-        if n == 0:
-            continue
-        idf = math.log((N - n + 0.5) / (n + 0.5) + 1.0)
-        for i in range(N):
-            tf = doc_tfs[i].get(term, 0)
-            if tf == 0:
-                continue
-            doc_len = len(docs[i])
-            scores[i] += idf * (tf * (k1 + 1)) / (tf + k1 * (1 - b + b * doc_len / avgdl))
-
-    return scores
-
-
 def _build_tool_search_llm_data(exec_code: str, duration_ms: int, query: str,
                                  total_matched: int, total_tools: int,
                                  matches: list) -> dict:
@@ -206,7 +106,7 @@ def searchtool(query: str) -> Dict[str, Any]:
         llm_data = _build_tool_search_llm_data("success", duration_ms, query, 0, 0, [])
         return build_success(data=data, llm_data=llm_data)
 
-    query_tokens = _tokenize(query.strip())
+    query_tokens = tokenize(query.strip())
     if not query_tokens:
         # 纯符号/空分词(如 '?'/'？？？'/'___'): token为空无查询语义, 不再返回全部工具top10,
         # 返回空matches + warning(detail+hint), 不注入任何分类 — 小欧 2026-08-05
@@ -217,18 +117,18 @@ def searchtool(query: str) -> Dict[str, Any]:
         llm_data = _build_tool_search_llm_data("warning", duration_ms, query, 0, len(all_tools), [])
         return build_success(data=data, llm_data=llm_data)
 
-    docs, tool_names, avgdl, df = _build_bm25()
-    scores = _bm25_scores(query_tokens, docs, avgdl, df)
+    # 倒排索引只返回命中工具(按注册顺序), 稳定排序后同分次序与旧的全量打分一致 — 小欧 2026-10-17
+    scores = tool_registry.search_scores(query_tokens)
 
     scored: List[Dict[str, Any]] = []
-    for i, name in enumerate(tool_names):
+    for name, score in scores.items():
         metadata = all_tools.get(name)
         if not metadata:
             continue
         scored.append({
             "name": metadata.name,
             "category": metadata.category.value,
-            "_score": round(scores[i], 4),
+            "_score": round(score, 4),
         })
 
     scored.sort(key=lambda x: x["_score"], reverse=True)
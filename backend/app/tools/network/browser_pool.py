@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: fetchpage JS 渲染常驻浏览器池(取代每次调用独立子循环 + 新启 Chromium)
+#   【病根】_pw_run 每次回退 Playwright 都新建事件循环、启动 Playwright 驱动、launch 一个 Chromium, 渲染完即关:
+#          每次数秒启动开销 + 数百 MB 内存; 并发回退时各自 launch, 峰值内存按并发数翻倍
+#   【改法】①BrowserPool: 专用线程内常驻事件循环(Windows 用 Proactor, 同原子循环隔离理由), 懒启动一个 Chromium,
+#            最多 BROWSER_POOL_SIZE 个 (context, page) 槽位复用
+#          ②槽位不足时按到达顺序(FIFO)排队等待, 不再各自 launch
+#          ③槽位用满 BROWSER_POOL_MAX_USES 次 / 页面 JS 堆超 BROWSER_POOL_MAX_HEAP_MB / 渲染后复位失败 即回收重建;
+#            浏览器断连(崩溃)时整体重启; 空闲 BROWSER_POOL_IDLE_TIMEOUT 秒后关闭浏览器释放内存
+#          ④每次用后清 Cookie 并回到 about:blank; 带代理的请求在共享浏览器上临时建独立 context(用完即关)
+#          ⑤排队等待/渲染耗时/回收次数: browser_pool_* 指标 + GET /metrics/browser_pool
+#   【合规】SRP(只管"拿页面渲染出 HTML", 重定向 SSRF 校验/正文提取仍在 fetch_webpage) + 未装 Playwright 时抛 ImportError 由调用方转错误
+# 2026-10-17 - 小欧 - 启动/重启浏览器加锁 + 排队等待限时:
+#   【病根】_ensure_browser 无互斥, 冷启动或崩溃后最多 size 个 _new_slot 同时进入, 各自 start 驱动 + launch Chromium(实测 4 并发 2 驱动 2 浏览器),
+#          先起的被后起的覆盖、_close_all 只关当前那个, 泄漏驱动与浏览器进程; 排队者 await waiter 无超时, 槽位被长渲染占住时无限等待
+#   【改法】①启动/重启在服务循环内的 asyncio.Lock 下进行, 锁内复查, 并发者等同一次启动的结果 ②排队等待以本次 render 的 timeout 为上限, 超时抛 asyncio.TimeoutError
+"""
+browser_pool — fetchpage JS 渲染常驻浏览器池
+
+调用约定(任意事件循环内):
+    html, final_url = await browser_pool.render(url, proxy, timeout)
+应用 shutdown 时 browser_pool.shutdown() 关闭浏览器与服务线程。
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from app.config import get_config
+from app.monitoring import record_metric
+from app.tools.tool_constants import (
+    BROWSER_POOL_SIZE, BROWSER_POOL_MAX_USES, BROWSER_POOL_MAX_HEAP_MB, BROWSER_POOL_IDLE_TIMEOUT,
+)
+from app.logger import logger
+
+_HEAP_JS = "() => (performance.memory ? performance.memory.usedJSHeapSize : 0)"
+
+
+class _Slot:
+    """一个可复用的渲染槽位: 浏览器代次 + context + page + 已用次数"""
+
+    __slots__ = ("generation", "context", "page", "uses")
+
+    def __init__(self, generation: int, context, page):
+        self.generation = generation
+        self.context = context
+        self.page = page
+        self.uses = 0
+
+
+class BrowserPool:
+    """常驻浏览器池(单例 browser_pool) — 小欧 2026-10-17
+
+    线程模型: 以下划线开头的协程/状态只在服务线程的事件循环内访问; render()/shutdown()/stats() 可在任意线程调用。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        # ---- 以下仅服务循环内访问 ----
+        self._playwright = None
+        self._browser = None
+        self._generation = 0
+        self._idle: Deque[_Slot] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._live = 0
+        self._busy = 0
+        self._idle_handle: Optional[asyncio.TimerHandle] = None
+        self._launch_lock: Optional[asyncio.Lock] = None  # 浏览器启动/重启互斥, 随服务循环创建
+        # ---- 计数(stats 跨线程读, 仅服务循环写) ----
+        self._counters: Dict[str, Any] = {"renders": 0, "errors": 0, "launches": 0, "peak_waiting": 0,
+                                          "wait_seconds": 0.0, "render_seconds": 0.0, "recycles": {}}
+
+    # ============================================================
+    # 服务线程
+    # ============================================================
+
+    def _size(self) -> int:
+        return max(1, int(get_config().get("tools.browser_pool.size", BROWSER_POOL_SIZE)))
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                if sys.platform == "win32" and hasattr(asyncio, "ProactorEventLoop"):
+                    loop = asyncio.ProactorEventLoop()  # Playwright 驱动需子进程支持, Windows Selector 循环不支持
+                else:
+                    loop = asyncio.new_event_loop()
+                loop.set_exception_handler(lambda _loop, _ctx: None)  # 吞掉 transport 后台 Task 泄漏(红字), 同原 _pw_run
+                ready = threading.Event()
+
+                def _serve():
+                    asyncio.set_event_loop(loop)
+                    self._launch_lock = asyncio.Lock()
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=_serve, name="browser-pool", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    async def _ensure_browser(self):
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+        async with self._launch_lock:  # 并发的 _new_slot 只启动一次, 其余等锁后复查直接复用
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._browser is not None:
+                self._recycled("crash")
+                logger.warning("[browser_pool] 浏览器已断连, 重启")
+            from playwright.async_api import async_playwright  # 未安装时 ImportError 交给调用方
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._generation += 1
+            self._counters["launches"] += 1
+            return self._browser
+
+    async def _new_slot(self) -> _Slot:
+        browser = await self._ensure_browser()
+        context = await browser.new_context()
+        return _Slot(self._generation, context, await context.new_page())
+
+    # ============================================================
+    # 槽位获取/归还(FIFO 公平排队)
+    # ============================================================
+
+    async def _acquire(self, timeout: float) -> _Slot:
+        """取槽位: 空闲复用 → 未满新建 → 排队(最多等 timeout 秒, 超时抛 asyncio.TimeoutError)"""
+        self._cancel_idle_close()
+        while self._idle:
+            slot = self._idle.popleft()
+            if slot.generation == self._generation:
+                return slot
+            self._live -= 1  # 旧浏览器代次的槽位随浏览器重启作废
+        if self._live < self._size() and not self._waiters:
+            self._live += 1
+            try:
+                return await self._new_slot()
+            except BaseException:
+                self._live -= 1
+                raise
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._counters["peak_waiting"] = max(self._counters["peak_waiting"], len(self._waiters))
+        try:
+            await asyncio.wait((waiter,), timeout=timeout)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self._release(waiter.result())  # 已交接但调用方取消: 转交下一位
+            else:
+                self._drop_waiter(waiter)
+            raise
+        if not waiter.done():
+            self._drop_waiter(waiter)
+            raise asyncio.TimeoutError(f"浏览器池排队超时({timeout}s), {self._live} 个槽位均在使用")
+        return waiter.result()
+
+    def _drop_waiter(self, waiter: asyncio.Future) -> None:
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self, slot: _Slot) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(slot)
+                return
+        self._idle.append(slot)
+        if not self._busy and not self._waiters:
+            self._schedule_idle_close()
+
+    async def _recycle(self, slot: _Slot, reason: str) -> None:
+        """关闭槽位; 有人排队则为队首补建新槽位"""
+        self._recycled(reason)
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+        self._live -= 1
+        while self._waiters and self._waiters[0].done():
+            self._waiters.popleft()
+        if self._waiters:
+            self._live += 1
+            try:
+                self._release(await self._new_slot())
+            except Exception as e:
+                self._live -= 1
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_exception(e)
+
+    def _recycled(self, reason: str) -> None:
+        recycles = self._counters["recycles"]
+        recycles[reason] = recycles.get(reason, 0) + 1
+        record_metric("browser_pool_recycles_total", 1, {"reason": reason})
+
+    # ============================================================
+    # 空闲关闭
+    # ============================================================
+
+    def _schedule_idle_close(self) -> None:
+        self._cancel_idle_close()
+        self._idle_handle = asyncio.get_running_loop().call_later(
+            BROWSER_POOL_IDLE_TIMEOUT, lambda: asyncio.ensure_future(self._close_idle()))
+
+    def _cancel_idle_close(self) -> None:
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+
+    async def _close_idle(self) -> None:
+        if self._busy or self._waiters:
+            return
+        logger.info(f"[browser_pool] 空闲 {BROWSER_POOL_IDLE_TIMEOUT}s, 关闭浏览器")
+        await self._close_all()
+
+    async def _close_all(self) -> None:
+        self._cancel_idle_close()
+        self._idle.clear()
+        self._live = 0
+        browser, self._browser = self._browser, None
+        playwright, self._playwright = self._playwright, None
+        try:
+            if browser is not None:
+                await browser.close()
+            if playwright is not None:
+                await playwright.stop()
+        except Exception as e:
+            logger.warning(f"[browser_pool] 关闭浏览器异常: {e}")
+
+    # ============================================================
+    # 渲染
+    # ============================================================
+
+    @staticmethod
+    async def _heap_bytes(page) -> int:
+        """页面 JS 堆占用(Chromium performance.memory); 取不到按 0"""
+        try:
+            return int(await page.evaluate(_HEAP_JS) or 0)
+        except Exception:
+            return 0
+
+    async def _render(self, url: str, proxy: Optional[str], timeout: float) -> Tuple[str, str]:
+        t0 = time.monotonic()
+        slot = await self._acquire(timeout)
+        waited = time.monotonic() - t0
+        self._counters["wait_seconds"] += waited
+        record_metric("browser_pool_wait_seconds", waited)
+        self._busy += 1
+        t1 = time.monotonic()
+        reason = None
+        temp_context = None
+        try:
+            if proxy:
+                temp_context = await self._browser.new_context(proxy={"server": proxy})
+                page = await temp_context.new_page()
+            else:
+                page = slot.page
+            page.set_default_timeout(timeout * 1000)  # 同步方法, 勿 await
+            await page.goto(url, wait_until="networkidle", timeout=timeout * 1000)
+            final_url = page.url
+            html = await page.content()
+            if not proxy and await self._heap_bytes(page) > BROWSER_POOL_MAX_HEAP_MB * 1024 * 1024:
+                reason = "memory"
+            return html, final_url
+        except BaseException:
+            self._counters["errors"] += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - t1
+            self._counters["renders"] += 1
+            self._counters["render_seconds"] += elapsed
+            record_metric("browser_pool_render_seconds", elapsed)
+            if temp_context is not None:
+                try:
+                    await temp_context.close()
+                except Exception:
+                    pass
+            slot.uses += 1
+            if reason is None and slot.uses >= BROWSER_POOL_MAX_USES:
+                reason = "uses"
+            if reason is None:
+                try:  # 复位: 清 Cookie + 离开页面(停止残余脚本/请求)
+                    await slot.context.clear_cookies()
+                    await slot.page.goto("about:blank")
+                except Exception:
+                    reason = "reset_failed"
+            self._busy -= 1
+            if reason is None:
+                self._release(slot)
+            else:
+                await self._recycle(slot, reason)
+
+    async def render(self, url: str, proxy: Optional[str], timeout: float) -> Tuple[str, str]:
+        """在池内页面渲染 url, 返回 (HTML, 最终 URL); 调用方取消时服务循环内的渲染随之取消并归还槽位"""
+        loop = self._ensure_loop()
+        fut = asyncio.run_coroutine_threadsafe(self._render(url, proxy, timeout), loop)
+        return await asyncio.wrap_future(fut)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """关闭浏览器并停止服务线程(应用 shutdown 调用); 未启动过则无操作"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_all(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"[browser_pool] 关闭超时/异常: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """池观测: 容量/存活槽位/占用/排队/渲染次数与平均耗时/平均排队/浏览器启动次数/回收(按原因)"""
+        c = self._counters
+        renders = c["renders"]
+        return {
+            "started": self._loop is not None,
+            "size": self._size(),
+            "live": self._live,
+            "busy": self._busy,
+            "idle": len(self._idle),
+            "waiting": len(self._waiters),
+            "peak_waiting": c["peak_waiting"],
+            "renders": renders,
+            "errors": c["errors"],
+            "avg_render_ms": round(c["render_seconds"] / renders * 1000, 1) if renders else 0.0,
+            "avg_wait_ms": round(c["wait_seconds"] / renders * 1000, 1) if renders else 0.0,
+            "browser_launches": c["launches"],
+            "recycles": dict(c["recycles"]),
+        }
+
+
+browser_pool = BrowserPool()
@@ -21,6 +21,17 @@
 # 2026-08-13 - 小欧 - 三堂会审修复#32: js_render成功后L728仍重判_needs_browser可能二次Playwright渲染
 #   【病根】SPA空壳自检(原L726-728)对静态GET产物设计, 但js_render成功时html_content已是渲染产物, 无条件重判会对已渲染产物再渲染一次(浪费+可能发散)
 #   【改法】新增js_render_ok标志(js_render且playwright无error), 静态GET门控与SPA回退均以`not js_render_ok`为前提; js_render失败回落静态的路径仍保留自动回退, 无退化
+# 2026-10-17 - 小欧 - 静态抓取路径接入本地页面缓存(page_cache)
+#   【病根】同一会话内反复 fetchpage 同一 URL, 每次都重新下载+重跑 SPA 检测/Playwright 回退/正文提取
+#   【改法】新鲜期内直接返回已提取正文(不发请求); 过期带 If-None-Match/If-Modified-Since 条件请求, 304 复用缓存正文与已提取结果;
+#          200 成功(正文>=100字)后写缓存。js_render=true、图片/PDF、403/Cloudflare 降级结果不缓存
+# 2026-10-17 - 小欧 - Playwright 渲染改走常驻浏览器池(browser_pool), 删除 _pw_run
+#   【病根】_pw_run 每次 JS 渲染/SPA 回退都新建子循环 + 启动 Playwright 驱动 + launch Chromium, 渲染完即关, 每次数秒且并发时内存按并发数翻倍
+#   【改法】_fetch_via_playwright 调 browser_pool.render 取 (HTML, 最终 URL); 重定向 SSRF 校验与返回结构不变, 正文提取移到线程池避免阻塞事件循环
+# 2026-10-17 - 小欧 - SPA 自动回退(Playwright/Jina)结果不写页面缓存
+#   【病根】静态 GET 已备好 cache_store, 触发 SPA 空壳回退后仍按回退产物写缓存, 与"降级结果不缓存"的设计不符;
+#          回退正文取决于渲染时机/第三方服务, 不能凭静态正文的 ETag/Last-Modified 304 复用
+#   【改法】进入自动回退分支即清空 cache_store, 本次结果照常返回、不落缓存, 下次仍全量抓取后重判
 """
 N3: fetchpage — 获取和处理网页内容
 
@@ -43,8 +54,6 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 
-import sys
-
 try:
     import trafilatura as _TRAFILATURA
 except ImportError:
@@ -52,6 +61,8 @@ except ImportError:
 
 from app.tools.tool_response import build_success, build_error, build_warning
 from app.tools.network.http_client_sdk import create_http_client, is_ssrf_blocked_error
+from app.tools.network import page_cache
+from app.tools.network.browser_pool import browser_pool
 from app.tools.network.network_register import check_network
 from app.tools.validate.url_validator import validate_url, validate_proxy, transcode_url
 from app.tools.validate.timeout_validator import validate_timeout
@@ -502,63 +513,28 @@ def _build_media_result(url: str, mime: str, raw_bytes: bytes) -> Dict[str, Any]
     return {"data": data, "other_data": other_data}
 
 
-def _pw_run(url: str, proxy: Optional[str], timeout: float,
-            extract_format: str) -> Dict[str, Any]:
-    """Playwright同步内核: 独立Proactor子循环跑, 规避主循环Selector约束 — 小欧 2026-07-17 — 小欧 2026-07-20 去除 max_tokens(正文零截断)"""
-    async def _go() -> Dict[str, Any]:
-        loop = asyncio.get_event_loop()
-        loop.set_exception_handler(lambda loop, ctx: None)   # 吞掉transport后台Task泄漏(红字)
-        try:
-            from playwright.async_api import async_playwright
-        except ImportError:
-            return {"error": True, "error_detail": "js_render需要安装Playwright", "params": {"url": url}, "err_code": ERR_NETWORK_JS_RENDER, "detail": "js_render需要安装Playwright"}
-        try:
-            browser_config = {
-                "headless": True,
-                "proxy": {"server": proxy} if proxy else None,
-            }
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(**browser_config)
-                try:
-                    page = await browser.new_page()
-                    page.set_default_timeout(timeout * 1000)  # 小欧 2026-07-18: 同步方法, 误加await会TypeError
-                    await page.goto(url, wait_until="networkidle", timeout=timeout * 1000)
-                    current_url = page.url
-                    if current_url and current_url != url:
-                        is_valid, err, _ = validate_url(current_url)
-                        if not is_valid:
-                            return {"error": True, "error_detail": f"重定向到不安全地址: {err or 'URL无效'}", "params": {"url": url}, "err_code": ERR_INVALID_URL, "detail": err}
-                    html_content = await page.content()
-                finally:
-                    await browser.close()
-            content, truncated = _extract_html_content(html_content, extract_format)
-            return {
-                "html_content": html_content,
-                "extracted_content": content,
-                "truncated": truncated,
-                "content_type": "text/html",
-                "status_code": 200,
-            }
-        except Exception as e:
-            return {"error": True, "error_detail": str(e), "params": {"url": url}, "err_code": ERR_NETWORK_JS_RENDER, "detail": str(e)}
-
-    if sys.platform == "win32" and hasattr(asyncio, "ProactorEventLoop"):
-        loop = asyncio.ProactorEventLoop()
-        try:
-            return loop.run_until_complete(_go())
-        finally:
-            loop.close()
-    return asyncio.run(_go())
-
-
 async def _fetch_via_playwright(url: str, proxy: Optional[str], timeout: float,
                                  extract_format: str) -> Dict[str, Any]:
-    """Playwright路径封装(隔离执行) — 小欧 2026-07-17 改为子循环隔离 — 小欧 2026-07-20 去除 max_tokens(正文零截断)"""
+    """Playwright路径封装 — 小欧 2026-07-17 — 小欧 2026-07-20 去除 max_tokens(正文零截断) — 小欧 2026-10-17 改走常驻浏览器池 browser_pool"""
     try:
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, lambda: _pw_run(url, proxy, timeout, extract_format))
+        html_content, current_url = await browser_pool.render(url, proxy, timeout)
+    except ImportError:
+        return {"error": True, "error_detail": "js_render需要安装Playwright", "params": {"url": url}, "err_code": ERR_NETWORK_JS_RENDER, "detail": "js_render需要安装Playwright"}
     except Exception as e:
         return {"error": True, "error_detail": str(e), "params": {"url": url}, "err_code": ERR_NETWORK_JS_RENDER, "detail": str(e)}
+    if current_url and current_url != url:
+        is_valid, err, _ = validate_url(current_url)
+        if not is_valid:
+            return {"error": True, "error_detail": f"重定向到不安全地址: {err or 'URL无效'}", "params": {"url": url}, "err_code": ERR_INVALID_URL, "detail": err}
+    loop = asyncio.get_running_loop()
+    content, truncated = await loop.run_in_executor(None, _extract_html_content, html_content, extract_format)
+    return {
+        "html_content": html_content,
+        "extracted_content": content,
+        "truncated": truncated,
+        "content_type": "text/html",
+        "status_code": 200,
+    }
 
 
 # 外部抓取API兜底(免费第三方Jina Reader,无需API key,零本地依赖)
@@ -642,6 +618,18 @@ async def fetchpage(
 
         headers = _build_browser_headers()
 
+        # 本地页面缓存: 仅静态抓取路径(js_render 走浏览器, 不查不写) — 小欧 2026-10-17
+        use_cache = not js_render and page_cache.enabled()
+        cache_entry = page_cache.lookup(url) if use_cache else None
+        cache_served = False        # 新鲜期内直接命中, 不发请求
+        cache_reused = None         # 304 后复用的已提取结果 (content, truncated)
+        cache_store = None          # 待写缓存: (原始正文, 响应头, 304 复用的旧条目|None)
+        fresh = page_cache.fresh_content(cache_entry, extract_format)
+        if fresh is not None:
+            extracted_content, truncated = fresh
+            status_code = cache_entry["status_code"]
+            cache_served = True
+
         playwright_result = None
         js_render_ok = False
         if js_render:
@@ -672,16 +660,26 @@ async def fetchpage(
         #   L3. 以上全失败 → raise_for_status → ERR_NETWORK_HTTP_ERROR
         # JS渲染走独立Playwright子循环,不在此链中
         # =============================================================================
-        if not js_render_ok:
+        if not js_render_ok and not cache_served:
             async with create_http_client(timeout_sec=timeout, proxy=proxy) as client:
                 actual_headers = dict(headers)
+                actual_headers.update(page_cache.conditional_headers(cache_entry))
 
                 # 流式请求 + 读取硬截断5MB防OOM — 小沈 2026-07-05
                 async with client.stream("GET", url, headers=actual_headers) as resp:
                     content_type = resp.headers.get("content-type", "")
                     mime = content_type.split(";")[0].strip().lower() if content_type else ""
 
-                    if resp.status_code == 403:
+                    if resp.status_code == 304 and cache_entry is not None:
+                        # 条件请求命中: 复用缓存正文, 该格式已提取则直接复用提取结果 — 小欧 2026-10-17
+                        page_cache.revalidated(cache_entry, resp.headers)
+                        html_content = page_cache.read_body(cache_entry).decode('utf-8', errors='replace')
+                        status_code = cache_entry["status_code"]
+                        mime = cache_entry["mime"]
+                        cache_reused = page_cache.cached_content(cache_entry, extract_format)
+                        if cache_reused is None:
+                            cache_store = (b"", resp.headers, cache_entry)
+                    elif resp.status_code == 403:
                         # [L1] 403 → 优先Jina Reader降级(免费第三方API,绕Cloudflare反爬) — 小欧 2026-07-29
                         _jina_md = await _fetch_via_external_reader(url, timeout)
                         if _jina_md and len(_jina_md) >= 200:
@@ -729,13 +727,21 @@ async def fetchpage(
                                 break
                             chunks.append(chunk[:remaining] if len(chunk) > remaining else chunk)
                             total += len(chunk)
-                        html_content = b''.join(chunks).decode('utf-8', errors='replace')
+                        raw_body = b''.join(chunks)
+                        html_content = raw_body.decode('utf-8', errors='replace')
                         status_code = resp.status_code
+                        if use_cache:
+                            page_cache.miss()
+                            cache_store = (raw_body, resp.headers, None)
 
             # 自动Playwright回退 — 小沈 2026-07-08 (从rolling-reader needs_browser() V4借鉴)
+            # 304 复用已提取结果时跳过(缓存的即是当时回退/提取后的最终正文) — 小欧 2026-10-17
             pw_content = None
-            if not js_render_ok and _needs_browser(html_content, status_code, mime)[0]:
+            if cache_reused is not None:
+                extracted_content, truncated = cache_reused
+            elif not js_render_ok and _needs_browser(html_content, status_code, mime)[0]:
                 logger.info(f"[fetchpage] SPA空壳检测,自动回退Playwright: {url}")
+                cache_store = None  # 回退结果不缓存(与 js_render/403 降级同口径) — 小欧 2026-10-17
                 pw_res = await _fetch_via_playwright(url, proxy, timeout, extract_format)
                 if not pw_res.get("error"):
                     pw_content = pw_res
@@ -756,9 +762,14 @@ async def fetchpage(
                     status_code = pw_content.get("status_code", status_code)
                 else:
                     extracted_content, truncated = http_extracted, http_truncated
-            else:
+            elif cache_reused is None:
                 extracted_content, truncated = _extract_html_content(html_content, extract_format)
 
+            if cache_store is not None and len(extracted_content) >= 100:
+                _body, _headers, _base = cache_store
+                page_cache.store(url, _body, _headers, status_code, mime, extract_format,
+                                 extracted_content, truncated, base=_base)
+
         # =============================================================================
         # 数据设计：data仅保留content纯数据，format/content_type/truncated通过summary传递
         # summary 示例: "成功获取网页内容(markdown格式, HTTP 200，已截断)"
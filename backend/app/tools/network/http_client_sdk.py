@@ -14,18 +14,32 @@ Author: 小沈 - 2026-05-29
 # 2026-08-12 - 小欧 - 新增公用函数 is_ssrf_blocked_error: 识别httpx.InvalidURL(SSRF重定向拦截)并返回统一结构化错误信息,
 #   供 httpget/fetch_webpage/download 三个网络工具复用(原各自手写isinstance分支, DRY统一)
 # 2026-08-12 - 小欧 - _validate_redirect 新增 InvalidURL 抛出的文案标识前缀 "重定向目标被拦截", 供 is_ssrf_blocked_error 语义识别
-
+# 2026-10-17 - 小欧 - 连接复用: 按事件循环共用传输层连接池(键 proxy/verify/http2), HTTPClient 改为轻量外壳
+#   【病根】每次工具调用 __aenter__ 新建 httpx.AsyncClient(新 SSL 上下文+新连接池), __aexit__ 即关闭,
+#          http_request/fetchpage/download 每次都重新 DNS+TCP+TLS 握手, keep-alive 连接从不复用
+#   【改法】①_TransportPool: 每个事件循环一份 {(proxy, verify, http2): AsyncHTTPTransport}, 连接上限/keep-alive 可配(config tools.http)
+#          ②HTTPClient 每次仍建独立 AsyncClient 外壳(超时/重定向/SSRF 重定向校验钩子/Cookie 照旧按次隔离), 只把传输层指向共用池;
+#            __aexit__ 不关共用传输层
+#          ③close_http_pools() 在应用 shutdown 时关闭当前循环的连接池; 已关闭事件循环(工作进程 asyncio.run)的池在下次取用时丢弃
+#   【合规】对外接口 create_http_client/HTTPClient 不变 + SSRF 重定向拦截不变
+
+import asyncio
 import os
-from typing import Optional
+import threading
+import weakref
+from typing import Dict, Optional, Tuple
 
 from urllib.parse import urljoin
 
 import httpx
+from app.config import get_config
 from app.tools.validate.url_validator import validate_url
+from app.tools.tool_fc_helper import _check_module
 
 
 # 常量已迁移到 tool_constants.py — 北京老陈 2026-05-30
 from app.tools.tool_constants import DEFAULT_TIMEOUT_SEC, NETWORK_MAX_CONNECTIONS, NETWORK_MAX_KEEPALIVE
+from app.tools.tool_constants import NETWORK_KEEPALIVE_EXPIRY
 from app.tools.tool_constants import ERR_INVALID_URL
 
 # SSRF重定向拦截文案标识 — 小欧 2026-08-12 (_validate_redirect 抛出的 InvalidURL 统一带此前缀)
@@ -64,8 +78,67 @@ def resolve_proxy(proxy: Optional[str] = None) -> Optional[str]:
     return proxy or os.environ.get("HTTPS_PROXY") or os.environ.get("HTTP_PROXY")
 
 
+# 传输层池键: (代理地址, 是否校验证书, 是否 HTTP/2)
+_PoolKey = Tuple[Optional[str], bool, bool]
+
+
+class _TransportPool:
+    """按事件循环共用的 httpx 传输层(连接池) — 小欧 2026-10-17
+
+    连接绑定创建它的事件循环, 故每个循环一份; 循环对象被回收时其条目随 WeakKeyDictionary 自动消失。
+    """
+
+    def __init__(self):
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[_PoolKey, httpx.AsyncHTTPTransport]]" = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _new_transport(key: _PoolKey) -> httpx.AsyncHTTPTransport:
+        proxy_url, verify, http2 = key
+        cfg = get_config()
+        limits = httpx.Limits(
+            max_connections=int(cfg.get("tools.http.max_connections", NETWORK_MAX_CONNECTIONS)),
+            max_keepalive_connections=int(cfg.get("tools.http.max_keepalive_connections", NETWORK_MAX_KEEPALIVE)),
+            keepalive_expiry=float(cfg.get("tools.http.keepalive_expiry", NETWORK_KEEPALIVE_EXPIRY)),
+        )
+        return httpx.AsyncHTTPTransport(verify=verify, http2=http2, limits=limits, proxy=proxy_url)
+
+    def get(self, key: _PoolKey) -> httpx.AsyncHTTPTransport:
+        """取当前事件循环下 key 对应的传输层(首次创建)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for dead in [lp for lp in self._pools if lp.is_closed()]:
+                del self._pools[dead]  # 已关闭循环上的连接无法再用, 也无法 await 关闭, 交给 GC
+            transports = self._pools.setdefault(loop, {})
+            transport = transports.get(key)
+            if transport is None:
+                transport = transports[key] = self._new_transport(key)
+            return transport
+
+    async def close_current(self) -> None:
+        """关闭当前事件循环下的全部传输层"""
+        with self._lock:
+            transports = self._pools.pop(asyncio.get_running_loop(), {})
+        for transport in transports.values():
+            await transport.aclose()
+
+
+_transport_pool = _TransportPool()
+
+
+def _http2_enabled() -> bool:
+    """config tools.http.http2=true 且已装 h2 才启用 HTTP/2"""
+    return bool(get_config().get("tools.http.http2", False)) and _check_module("h2")
+
+
+async def close_http_pools() -> None:
+    """关闭当前事件循环的共用连接池(应用 shutdown 时调用) — 小欧 2026-10-17"""
+    await _transport_pool.close_current()
+
+
 class HTTPClient:
-    """HTTP 客户端实例(上下文管理器)"""
+    """HTTP 客户端实例(上下文管理器); 连接走当前事件循环的共用传输层, Cookie/超时/重定向按实例隔离"""
 
     def __init__(
         self,
@@ -92,25 +165,21 @@ class HTTPClient:
                     raise httpx.InvalidURL(f"重定向目标被拦截: {err or 'URL无效'}")
 
     async def __aenter__(self):
-        proxy_url = resolve_proxy(self._proxy)
-        limits = httpx.Limits(
-            max_connections=NETWORK_MAX_CONNECTIONS,
-            max_keepalive_connections=NETWORK_MAX_KEEPALIVE,
-        )
+        proxy_url = resolve_proxy(self._proxy) or None
+        transport = _transport_pool.get((proxy_url, self._verify_ssl, _http2_enabled()))
         timeout = httpx.Timeout(self._timeout_sec, connect=min(self._timeout_sec, 10.0))
+        # 外壳只持有 Cookie/超时/重定向/钩子; 代理与证书校验已在共用传输层上, 此处不再传 proxy/verify
         self._client = httpx.AsyncClient(
-            verify=self._verify_ssl,
+            transport=transport,
             timeout=timeout,
-            limits=limits,
             follow_redirects=self._follow_redirects,
-            proxy=proxy_url if proxy_url else None,
             event_hooks={"response": [self._validate_redirect]},
         )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._client:
-            await self._client.aclose()
+        # 不 aclose: AsyncClient.aclose 会关闭共用传输层; 未读完的响应由调用方 async with stream 关闭并归还连接
+        self._client = None
 
     async def get(self, url: str, **kwargs) -> httpx.Response:
         """发送 GET 请求"""
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: fetchpage 本地页面缓存(原始正文 + 已提取正文 + 校验器 ETag/Last-Modified)
+#   【病根】同一会话内对同一 URL 多次 fetchpage, 每次都重新下载并重跑 HTTP→Playwright→trafilatura/html2text 整条链
+#   【改法】①~/.omniagent/page_cache 下每个 URL 一份 <sha1>.json(校验器/新鲜期/各格式已提取正文) + <sha1>.body(原始正文)
+#          ②新鲜期内(Cache-Control max-age, 缺省 FETCHPAGE_CACHE_DEFAULT_TTL)直接返回已提取正文, 不发请求
+#          ③过期后带 If-None-Match/If-Modified-Since 条件请求, 304 即复用缓存正文(已提取的格式不再提取)
+#          ④no-store / Vary:* 不缓存, no-cache 每次都条件请求; 总字节/条目数超限按抓取时间淘汰最旧
+#          ⑤命中/条件命中/未命中/省下字节计数, 经 GET /metrics/fetchpage_cache 与 fetchpage_cache_* 指标暴露
+#   【合规】SRP(只管"页面缓存存取", 抓取/提取/降级链仍在 fetch_webpage) + opt-out: config tools.fetchpage.cache=false
+"""
+page_cache — fetchpage 本地页面缓存
+
+调用约定(fetch_webpage.fetchpage 内, 仅静态抓取路径):
+    entry = page_cache.lookup(url)                      # 无缓存返回 None
+    cached = page_cache.fresh_content(entry, fmt)       # 新鲜期内且有该格式 → (content, truncated), 否则 None
+    headers.update(page_cache.conditional_headers(entry))
+    304 → page_cache.revalidated(entry, resp.headers); html = page_cache.read_body(entry)
+    200 → page_cache.store(url, body, resp.headers, status_code, mime, fmt, content, truncated, base=entry)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import get_config
+from app.monitoring import record_metric
+from app.tools.tool_constants import (
+    FETCHPAGE_CACHE_DEFAULT_TTL, FETCHPAGE_CACHE_MAX_BYTES, FETCHPAGE_CACHE_MAX_ENTRIES,
+)
+from app.logger import logger
+
+_CACHE_DIR = Path.home() / ".omniagent" / "page_cache"
+
+_stats_lock = threading.Lock()
+_stats = {"lookups": 0, "fresh_hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "bytes_saved": 0}
+
+
+def enabled() -> bool:
+    return bool(get_config().get("tools.fetchpage.cache", True))
+
+
+def _count(event: str, saved_bytes: int = 0) -> None:
+    with _stats_lock:
+        _stats[event] += 1
+        _stats["bytes_saved"] += saved_bytes
+    record_metric("fetchpage_cache_events_total", 1, {"event": event})
+    if saved_bytes:
+        record_metric("fetchpage_cache_bytes_saved_total", saved_bytes)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """页面缓存统计(查找/新鲜命中/304 条件命中/未命中/写入/省下字节/命中率 + 磁盘条目与字节)"""
+    with _stats_lock:
+        stats: Dict[str, Any] = dict(_stats)
+    hits = stats["fresh_hits"] + stats["revalidated"]
+    stats["hit_rate"] = round(hits / stats["lookups"], 4) if stats["lookups"] else 0.0
+    metas = list(_CACHE_DIR.glob("*.json")) if _CACHE_DIR.is_dir() else []
+    stats["entries"] = len(metas)
+    stats["disk_bytes"] = sum(_entry_bytes(m) for m in metas)
+    stats["enabled"] = enabled()
+    return stats
+
+
+# ============================================================
+# 存储
+# ============================================================
+
+def _paths(url: str) -> Tuple[Path, Path]:
+    name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return _CACHE_DIR / f"{name}.json", _CACHE_DIR / f"{name}.body"
+
+
+def _entry_bytes(meta_path: Path) -> int:
+    size = 0
+    for p in (meta_path, meta_path.with_suffix(".body")):
+        try:
+            size += p.stat().st_size
+        except OSError:
+            pass
+    return size
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp = path.with_suffix(f"{path.suffix}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _freshness(headers) -> Optional[float]:
+    """按 Cache-Control 取新鲜期秒数; None 表示不可缓存(no-store / Vary:*)"""
+    if headers.get("vary", "").strip() == "*":
+        return None
+    directives = {}
+    for part in headers.get("cache-control", "").lower().split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name] = value.strip().strip('"')
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    if "max-age" in directives:
+        try:
+            return max(0.0, float(directives["max-age"]))
+        except ValueError:
+            pass
+    return float(get_config().get("tools.fetchpage.cache_ttl", FETCHPAGE_CACHE_DEFAULT_TTL))
+
+
+def lookup(url: str) -> Optional[Dict[str, Any]]:
+    """取 URL 的缓存条目(元数据 dict), 无缓存/损坏返回 None"""
+    meta_path, body_path = _paths(url)
+    entry = None
+    try:
+        entry = json.loads(meta_path.read_text(encoding="utf-8"))
+        if entry.get("url") != url or not body_path.is_file():
+            entry = None
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"[page_cache] 缓存条目损坏, 忽略: {meta_path}: {e}")
+    with _stats_lock:
+        _stats["lookups"] += 1
+    return entry
+
+
+def fresh_content(entry: Optional[Dict[str, Any]], extract_format: str) -> Optional[Tuple[str, bool]]:
+    """新鲜期内且已有该格式提取结果 → (content, truncated) 并计一次新鲜命中; 否则 None"""
+    if not entry or time.time() >= entry.get("expires_at", 0):
+        return None
+    extracted = entry.get("extracted", {}).get(extract_format)
+    if extracted is None:
+        return None
+    _count("fresh_hits", entry.get("body_size", 0))
+    return extracted["content"], extracted["truncated"]
+
+
+def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """条件请求头(If-None-Match / If-Modified-Since); 无校验器时为空, 不计命中"""
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def read_body(entry: Dict[str, Any]) -> bytes:
+    return _paths(entry["url"])[1].read_bytes()
+
+
+def cached_content(entry: Dict[str, Any], extract_format: str) -> Optional[Tuple[str, bool]]:
+    """304 后复用: 该格式已提取 → (content, truncated), 否则 None(由调用方对缓存正文重新提取)"""
+    extracted = entry.get("extracted", {}).get(extract_format)
+    return (extracted["content"], extracted["truncated"]) if extracted is not None else None
+
+
+def revalidated(entry: Dict[str, Any], headers) -> None:
+    """304: 按响应头刷新新鲜期与校验器并落盘, 计一次条件命中"""
+    ttl = _freshness(headers)
+    entry["expires_at"] = time.time() + (ttl or 0.0)
+    entry["etag"] = headers.get("etag") or entry.get("etag")
+    entry["last_modified"] = headers.get("last-modified") or entry.get("last_modified")
+    try:
+        _atomic_write(_paths(entry["url"])[0], json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+    except OSError as e:
+        logger.warning(f"[page_cache] 刷新缓存条目失败: {e}")
+    _count("revalidated", entry.get("body_size", 0))
+
+
+def miss() -> None:
+    _count("misses")
+
+
+def store(url: str, body: bytes, headers, status_code: int, mime: str, extract_format: str,
+          content: str, truncated: bool, base: Optional[Dict[str, Any]] = None) -> None:
+    """写入/更新缓存条目; base 为 304 复用的旧条目时只补该格式的提取结果(正文不重写)"""
+    ttl = _freshness(headers)
+    if ttl is None:
+        return
+    meta_path, body_path = _paths(url)
+    if base is not None:
+        entry = base
+    else:
+        entry = {
+            "url": url,
+            "status_code": status_code,
+            "mime": mime,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "fetched_at": time.time(),
+            "expires_at": time.time() + ttl,
+            "body_size": len(body),
+            "extracted": {},
+        }
+    entry["extracted"][extract_format] = {"content": content, "truncated": truncated}
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        if base is None:
+            _atomic_write(body_path, body)
+        _atomic_write(meta_path, json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+    except OSError as e:
+        logger.warning(f"[page_cache] 写入缓存失败({_CACHE_DIR}): {e}")
+        return
+    _count("stores")
+    _prune()
+
+
+def _prune() -> None:
+    """总字节或条目数超限时按元数据 mtime(最近写入/刷新)删最旧条目"""
+    try:
+        metas = sorted(_CACHE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    except OSError:
+        return
+    sizes = [_entry_bytes(m) for m in metas]
+    total, remaining = sum(sizes), len(metas)
+    for meta, size in zip(metas, sizes):
+        if total <= FETCHPAGE_CACHE_MAX_BYTES and remaining <= FETCHPAGE_CACHE_MAX_ENTRIES:
+            break
+        meta.with_suffix(".body").unlink(missing_ok=True)
+        meta.unlink(missing_ok=True)
+        total -= size
+        remaining -= 1
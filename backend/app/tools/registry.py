@@ -4,6 +4,13 @@
 # 2026-07-25 - 小欧 - ensure_tools_registered加即时重试(3次,500ms间隔),应对并发写导致的瞬态文件损坏
 # 2026-07-25 - 小欧 - 错误日志加filename:lineno上下文(欧阳建议)
 # 2026-08-07 - 小欧 - get_tool工具名别名归一化: LLM常生成变体名(write_text等), 经tools_alias_mapper.normalize_tool_name映射到注册名(writetext), 防"工具未注册"误拦截(com-test 03暴露)
+# 2026-10-17 - 小欧 - 持有 searchtool 的 BM25 倒排索引(tool_search_index.ToolSearchIndex): 注册/更新/注销时增量维护, 查询经 search_scores 只碰查询词的 postings
+# 2026-10-17 - 小欧 - 懒注册模式(config tools.lazy_registration, 默认关闭):
+#   【病根】启动全量导入各分类注册模块(连带 pandas/openpyxl/pdfplumber 等全部工具实现), 注册时逐工具同步检查依赖/pip install
+#   【改法】①ensure_tools_registered 先按 tool_manifest 清单(源码指纹匹配)注册 schema, 实现登记为桩(_lazy_implementation),
+#            首次调用才导入实现模块, 注册表内的桩随即换成真实实现; 清单缺失/失配的分类照旧导入注册, 结束后重写清单
+#          ②依赖检查延后: 注册只登记待检查依赖, start_dependency_checks 后台线程逐个补做; 工具首次执行前先补做自己的检查
+#   【合规】OCP(实现桩与真实实现同为 sync/async 可调用, ToolLoader/ToolRetryEngine/tool_process_pool 无感) + 默认关闭, 行为照旧
 """
 工具注册表模块 - 统一入口
 
@@ -14,12 +21,17 @@
          查询函数 → tool_queries.py, 格式转换 → tool_description.py
 """
 
-from typing import Dict, List, Optional, Callable, Any, Type, Set, Union
+import threading
+import time
+from typing import Dict, List, Optional, Callable, Any, Type, Set, Tuple, Union
 from pydantic import BaseModel
+from app.config import get_config
 from app.tools.tool_types import ToolCategory, ToolMetadata
 from app.tools.schema_utils import _generate_input_schema
 from app.tools.tool_description import to_openai_tools, generate_param_reminder
 from app.tools.tools_alias_mapper import normalize_tool_name
+from app.tools.tool_search_index import ToolSearchIndex
+from app.tools import tool_manifest
 from app.logger import setup_logger
 from app.utils.dependency import ensure_dependency
 from app.tools.tool_constants import CATEGORY_MODULES
@@ -28,6 +40,7 @@ logger = setup_logger(__name__)
 
 # 懒加载注册状态跟踪（从 lazy_loader.py 迁入）
 _registered_categories: set = set()
+_category_tools: Dict[str, List[str]] = {}   # 分类 → 其注册模块注册的工具名(写清单用) — 小欧 2026-10-17
 
 
 def _update_tool_metadata(metadata: ToolMetadata, **kwargs) -> None:
@@ -56,6 +69,12 @@ class ToolRegistry:
         self._tools: Dict[str, ToolMetadata] = {}
         self._categories: Dict[ToolCategory, List[str]] = {}
         self._implementations: Dict[str, Callable] = {}
+        self._search_index = ToolSearchIndex()  # searchtool BM25 倒排索引, 随注册/注销增量维护 — 小欧 2026-10-17
+        # 懒注册模式: 待检查依赖(后台线程/首次执行前补做) + 已导入的实现(按 模块.限定名) — 小欧 2026-10-17
+        self._defer_dependencies = False
+        self._pending_dependencies: Dict[str, List[Union[str, Dict[str, Any]]]] = {}
+        self._dependency_lock = threading.Lock()
+        self._resolved: Dict[Tuple[str, str], Callable] = {}
     
     def _check_dependencies(self, dependencies: List[Union[str, Dict[str, Any]]], tool_name: str) -> bool:
         """检查并安装工具依赖 — 小健 2026-06-18
@@ -145,9 +164,14 @@ class ToolRegistry:
         """
         input_schema = _generate_input_schema(input_model, input_schema)
         
-        # 检查并安装依赖
+        # 检查并安装依赖(懒注册模式只登记, 后台/首次执行前补做 — 小欧 2026-10-17)
         deps = dependencies or []
-        self._check_dependencies(deps, name)
+        if self._defer_dependencies:
+            if deps:
+                with self._dependency_lock:
+                    self._pending_dependencies[name] = deps
+        else:
+            self._check_dependencies(deps, name)
         
         # 职责1：更新已存在工具
         if name in self._tools:
@@ -198,6 +222,7 @@ class ToolRegistry:
             check_fn=check_fn,
         )
         self._implementations[name] = implementation
+        self._search_index.upsert(name, self._tools[name].description)
         # 【P1-26修复】更新分类索引(类别可能变更) — chendyg 2026-06-26
         self._update_category_index(category, name)
         return {"status": "success"}
@@ -236,6 +261,7 @@ class ToolRegistry:
         self._tools[name] = metadata
         self._implementations[name] = implementation
         self._update_category_index(category, name)
+        self._search_index.upsert(name, description)
         logger.debug(f"Tool registered: {name} (category: {category.value}, needs_confirmation: {needs_confirmation}, dependencies: {dependencies})")
         return {"status": "success"}
     
@@ -262,6 +288,44 @@ class ToolRegistry:
     def get_implementation(self, name: str) -> Optional[Callable]:
         """获取工具实现函数"""
         return self._implementations.get(name)
+
+    def load_implementation(self, name: str, ref: Tuple[str, str]) -> Callable:
+        """懒注册实现桩调用入口: 首次先补做该工具依赖检查, 再导入实现模块取回实现; 注册表中的桩换成真实实现 — 小欧 2026-10-17"""
+        func = self._resolved.get(ref)
+        if func is None:
+            self.check_pending_dependencies(name)
+            t0 = time.time()
+            func = self._resolved[ref] = tool_manifest.resolve_ref(*ref)
+            if getattr(self._implementations.get(name), "__tool_ref__", None) == ref:
+                self._implementations[name] = func
+            logger.info(f"[ToolRegistry] 懒加载工具实现: {name} ← {ref[0]} ({time.time()-t0:.3f}s)")
+        return func
+
+    def defer_dependency_checks(self) -> None:
+        """之后注册的工具不在注册时检查依赖, 改由 start_dependency_checks/首次执行前补做 — 小欧 2026-10-17"""
+        self._defer_dependencies = True
+
+    def check_pending_dependencies(self, name: str) -> bool:
+        """补做该工具的待检查依赖(后台线程与首次执行共用; 持锁, 每个工具只检查一次); 返回是否做了检查"""
+        with self._dependency_lock:
+            deps = self._pending_dependencies.pop(name, None)
+            if deps:
+                self._check_dependencies(deps, name)
+        return deps is not None
+
+    def start_dependency_checks(self) -> Optional[threading.Thread]:
+        """后台 daemon 线程逐个补做待检查依赖; 无待检查项返回 None。之后注册的工具恢复注册时检查"""
+        self._defer_dependencies = False
+        if not self._pending_dependencies:
+            return None
+        thread = threading.Thread(target=self._drain_dependency_checks, name="tool-dependency-check", daemon=True)
+        thread.start()
+        return thread
+
+    def _drain_dependency_checks(self) -> None:
+        t0 = time.time()
+        checked = sum(self.check_pending_dependencies(name) for name in list(self._pending_dependencies))
+        logger.info(f"[ToolRegistry] 后台依赖检查完成: {checked}个工具, {time.time()-t0:.3f}s")
     
     def list_tools(
         self,
@@ -300,10 +364,15 @@ class ToolRegistry:
         
         del self._tools[name]
         del self._implementations[name]
+        self._search_index.remove(name)
         
         logger.info(f"Tool unregistered: {name}")
         return {"status": "success"}
     
+    def search_scores(self, query_tokens: List[str]) -> Dict[str, float]:
+        """searchtool BM25 打分 — 委托给tool_search_index.ToolSearchIndex: {工具名: 分数}, 只含命中工具, 按注册顺序 — 小欧 2026-10-17"""
+        return self._search_index.scores(query_tokens)
+    
     def get_implementations_by_category(self, category: ToolCategory) -> Dict[str, Callable]:
         """按分类一次遍历获取 {name: implementation}，消除N+1查询 — 小沈 2026-06-08"""
         tool_names = self._categories.get(category, [])
@@ -392,40 +461,134 @@ def _import_and_register(module_path: str, register_func_name: str) -> None:
     register_func()
 
 
+def _lazy_implementation(name: str, ref: Tuple[str, str], is_async: bool) -> Callable:
+    """清单注册的实现桩: 经 tool_registry.load_implementation 取真实实现转调(首次调用才导入实现模块) — 小欧 2026-10-17
+    与真实实现同为 async/sync(ToolRetryEngine 按 iscoroutinefunction 分派); __tool_ref__ 供清单/工具进程池按引用识别"""
+    if is_async:
+        async def stub(*args, **kwargs):
+            return await tool_registry.load_implementation(name, ref)(*args, **kwargs)
+    else:
+        def stub(*args, **kwargs):
+            return tool_registry.load_implementation(name, ref)(*args, **kwargs)
+    stub.__tool_ref__ = ref
+    return stub
+
+
+def _lazy_hook(ref: Optional[List[str]]) -> Optional[Callable]:
+    """清单中的 failure_hint_fn/check_fn 引用 → 调用时才导入所在模块的同步桩 — 小欧 2026-10-17"""
+    if ref is None:
+        return None
+    ref = tuple(ref)
+
+    def hook(*args, **kwargs):
+        return tool_manifest.resolve_ref(*ref)(*args, **kwargs)
+    hook.__tool_ref__ = ref
+    return hook
+
+
+def _register_from_manifest(entries: List[Dict[str, Any]]) -> None:
+    """按清单条目注册(不导入工具模块) — 小欧 2026-10-17"""
+    for entry in entries:
+        tool_registry.register(
+            name=entry["name"],
+            description=entry["description"],
+            category=ToolCategory(entry["category"]),
+            implementation=_lazy_implementation(entry["name"], tuple(entry["implementation"]), entry["is_async"]),
+            version=entry["version"],
+            input_schema=entry["input_schema"],
+            examples=entry["examples"],
+            expose_to_llm=entry["expose_to_llm"],
+            failure_hint_fn=_lazy_hook(entry["failure_hint_fn"]),
+            needs_confirmation=entry["needs_confirmation"],
+            action_confirmation=entry["action_confirmation"],
+            check_fn=_lazy_hook(entry["check_fn"]),
+            dependencies=entry["dependencies"],
+        )
+
+
+def _save_manifest(fingerprint: str, unavailable: Dict[str, str]) -> None:
+    """按当前注册表写清单; 含不可入清单工具的分类整类不写(下次启动照旧导入注册) — 小欧 2026-10-17"""
+    categories: Dict[str, List[Dict[str, Any]]] = {}
+    for cat_name, names in _category_tools.items():
+        entries = [tool_manifest.tool_entry(tool_registry._tools[n], tool_registry._implementations[n])
+                   for n in names if n in tool_registry._tools]
+        if all(entries):
+            categories[cat_name] = entries
+    tool_manifest.save(fingerprint, categories, unavailable)
+
+
+def _lazy_registration_enabled() -> bool:
+    """config tools.lazy_registration(默认关闭); 配置不可用视为关闭 — 小欧 2026-10-17"""
+    try:
+        return bool(get_config().get("tools.lazy_registration", False))
+    except Exception:
+        return False
+
+
 def ensure_tools_registered() -> None:
-    """确保所有工具已注册(全量注册) - 小沈 2026-05-15; 小欧 2026-07-25 加即时重试应对瞬态文件损坏"""
-    import time as _time
+    """确保所有工具已注册(全量注册) - 小沈 2026-05-15; 小欧 2026-07-25 加即时重试应对瞬态文件损坏
+    小欧 2026-10-17: 懒注册模式下清单命中的分类按清单注册(不导入工具模块), 依赖检查转后台线程"""
     global _registered_categories
 
+    lazy = _lazy_registration_enabled()
+    manifest: Dict[str, Any] = {}
+    fingerprint = ""
+    if lazy:
+        tool_registry.defer_dependency_checks()
+        fingerprint = tool_manifest.source_fingerprint()
+        manifest = tool_manifest.load(fingerprint) or {}
+    cached = manifest.get("categories", {})
+    unavailable: Dict[str, str] = {}
+    stale = lazy and not manifest  # 有分类走导入注册 → 结束后重写清单
+
     _failed = False
-    _t_all = _time.time()
+    _t_all = time.time()
     for cat_name, (module_path, register_func) in CATEGORY_MODULES.items():
-        if cat_name not in _registered_categories:
-            _t_cat = _time.time()
-            for _attempt in range(1, 4):
-                try:
-                    count_before = len(tool_registry._tools)
-                    _import_and_register(module_path, register_func)
-                    count_after = len(tool_registry._tools)
-                    _registered_categories.add(cat_name)
-                    if _attempt > 1:
-                        logger.info(f"[启动耗时] 工具分类 {cat_name} 注册成功(第{_attempt}次): {_time.time()-_t_cat:.3f}s, {count_after - count_before}个工具")
-                    else:
-                        logger.info(f"[启动耗时] 工具分类 {cat_name} 注册: {_time.time()-_t_cat:.3f}s, {count_after - count_before}个工具")
-                    break
-                except Exception as e:
-                    _ctx = getattr(e, 'filename', None)
-                    if _ctx:
-                        _ctx = f"{_ctx}:{getattr(e, 'lineno', '?')} - {e}"
-                    else:
-                        _ctx = f"{e}"
-                    if _attempt < 3:
-                        logger.warning(f"[Tools] 注册分类{cat_name}失败(第{_attempt}次),500ms后重试: {_ctx}")
-                        _time.sleep(0.5)
-                    else:
-                        logger.error(f"[Tools] 注册分类{cat_name}失败(已重试3次): {_ctx}")
-                        _failed = True
-    logger.info(f"[启动耗时] ensure_tools_registered 合计: {_time.time()-_t_all:.3f}s")
+        if cat_name in _registered_categories:
+            continue
+        _t_cat = time.time()
+        if cat_name in cached:
+            _register_from_manifest(cached[cat_name])
+            _category_tools[cat_name] = [entry["name"] for entry in cached[cat_name]]
+            _registered_categories.add(cat_name)
+            logger.info(f"[启动耗时] 工具分类 {cat_name} 清单注册: {time.time()-_t_cat:.3f}s, {len(cached[cat_name])}个工具")
+            continue
+        missing = manifest.get("unavailable", {}).get(cat_name)
+        if missing and tool_manifest.module_missing(missing):
+            unavailable[cat_name] = missing
+            logger.info(f"[Tools] 分类{cat_name}缺少模块{missing}(清单记录, 仍未安装), 跳过注册")
+            continue
+        stale = lazy
+        for _attempt in range(1, 4):
+            try:
+                names_before = set(tool_registry._tools)
+                _import_and_register(module_path, register_func)
+                _category_tools[cat_name] = [n for n in tool_registry._tools if n not in names_before]
+                _registered_categories.add(cat_name)
+                if _attempt > 1:
+                    logger.info(f"[启动耗时] 工具分类 {cat_name} 注册成功(第{_attempt}次): {time.time()-_t_cat:.3f}s, {len(_category_tools[cat_name])}个工具")
+                else:
+                    logger.info(f"[启动耗时] 工具分类 {cat_name} 注册: {time.time()-_t_cat:.3f}s, {len(_category_tools[cat_name])}个工具")
+                break
+            except Exception as e:
+                _ctx = getattr(e, 'filename', None)
+                if _ctx:
+                    _ctx = f"{_ctx}:{getattr(e, 'lineno', '?')} - {e}"
+                else:
+                    _ctx = f"{e}"
+                if _attempt < 3:
+                    logger.warning(f"[Tools] 注册分类{cat_name}失败(第{_attempt}次),500ms后重试: {_ctx}")
+                    time.sleep(0.5)
+                else:
+                    logger.error(f"[Tools] 注册分类{cat_name}失败(已重试3次): {_ctx}")
+                    _failed = True
+                    if isinstance(e, ModuleNotFoundError) and e.name and not e.name.startswith("app."):
+                        unavailable[cat_name] = e.name  # 缺第三方/平台模块: 记入清单, 仍缺失时下次懒注册启动直接跳过
+    logger.info(f"[启动耗时] ensure_tools_registered 合计: {time.time()-_t_all:.3f}s")
+    if stale:
+        _save_manifest(fingerprint, unavailable)
+    if lazy:
+        tool_registry.start_dependency_checks()
     if _failed:
         logger.warning(f"[Tools] 部分分类注册失败,已注册{len(_registered_categories)}个分类,下次调用将重试")
     elif _registered_categories:
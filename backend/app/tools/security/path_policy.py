@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: 编译后的路径策略(path_safe_check 消费)
+#   【病根】validate_path 每次调用: get_default_allowed_paths 重建白名单(get_allowed_dirs 逐条 resolve + 代码库根 resolve),
+#          对目标路径 realpath 3~4 次、对每个白名单项再 realpath 一次, 代码库根也 realpath 一次; 每次 realpath 逐级 lstat 整条路径,
+#          find/grep/copy/delete 整树时成千上万个路径反复付这笔
+#   【改法】①PathPolicy: 白名单 realpath 后按 Path.parts 建前缀树(任一白名单是目标前缀即命中), 代码库根/Windows 禁区(系统盘符已替换)预先小写;
+#            按 (配置实例, 配置文件 mtime, 主目录, cwd) 编译一次, 配置变更或超 PATH_POLICY_TTL 重编译
+#          ②禁区前缀(/proc, /sys)保持原字符串 startswith 语义(/procfoo 也命中), 不并入按路径分段的前缀树, 判定不变
+#   【合规】SRP(只管"编译策略", 判定顺序/返回文案仍在 path_safe_check) + 判定与旧实现逐条一致(scripts/check_path_policy.py 差分校验)
+# 2026-10-17 - 小欧 - 撤掉 realpath 目录缓存(cached_realpath):
+#   【病根】已缓存的祖先目录在 PATH_POLICY_TTL 内不再复查, 期间把白名单内目录换成指向 /etc 的符号链接,
+#          其下路径仍按旧解析结果判在白名单内(旧实现现查 realpath 会拒绝); agent 自己的 shell/文件工具就能做这个替换, 无人清缓存
+#   【改法】只缓存编译后的白名单/禁区, 目标路径由 path_safe_check 每次 os.path.realpath 现查(一次 validate_path 内复用同一结果)
+# 2026-10-17 - 小欧 - 配置戳改为直接 os.stat 配置文件
+#   【病根】_config_stamp 经 get_config() 取 mtime: 每次 Path 构造 + exists + stat, 约占 current_policy 的八成,
+#          单独调用 _is_forbidden_path(temp_auth)比旧实现(get_code_root + realpath)还慢
+#   【改法】配置文件路径同 Config._get_config_path(OMNIAGENT_CONFIG_PATH 优先), 一次 os.stat 取 mtime 作戳;
+#          mtime 变化 → 未命中重编译, _build 内 get_default_allowed_paths 经 get_config 照常重读配置
+"""
+path_policy — 白名单/禁区编译为只读策略, 按配置与 cwd 变更重编译
+
+调用约定:
+    policy = current_policy(allowed_paths)   # allowed_paths 为 None 取默认白名单(配置变更自动重编译)
+    policy.allows(Path(real).parts)          # 任一白名单是其前缀 → True(白名单项 realpath 失败时按原逐项顺序抛出)
+    clear_path_policy_cache()                # 白名单项/代码库根自身被换成符号链接后立即重编译, 否则最迟 PATH_POLICY_TTL 秒
+目标路径不在此缓存: 其祖先目录随时可能被换成符号链接, 每次判定都须现查 realpath。
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+from app.tools.tool_constants import (
+    FORBIDDEN_PATHS_WINDOWS_EXACT,
+    FORBIDDEN_PATHS_WINDOWS_PREFIX,
+    PATH_POLICY_TTL,
+)
+
+_END = object()  # 前缀树终止标记: 值为该白名单在原列表中的最小下标
+_POLICY_MAX = 32  # 显式白名单(测试/脚本传入)各编一份, 数量很少
+
+_lock = threading.Lock()
+_policies: "OrderedDict[Hashable, Tuple[PathPolicy, float]]" = OrderedDict()
+_counters = {"policy_hits": 0, "policy_builds": 0}
+
+
+class PathPolicy:
+    """一次编译的白名单/禁区判定数据, 编译后只读"""
+
+    __slots__ = ("allowed_paths", "allowed_message", "code_root_lower", "win_exact", "win_prefix", "_trie", "_error")
+
+    def __init__(self, allowed_paths: Sequence[Any], system_drive: Optional[str]):
+        self.allowed_paths = list(allowed_paths)
+        self.allowed_message = ", ".join(str(p) for p in self.allowed_paths[:5])
+        # 旧实现逐项 realpath 白名单, 第 i 项抛异常时只有前 i 项能命中 → 记下 (i, 异常) 按同样顺序抛出
+        self._error: Optional[Tuple[int, Exception]] = None
+        self._trie: Dict[Any, Any] = {}
+        for i, allowed in enumerate(self.allowed_paths):
+            try:
+                parts = Path(os.path.realpath(allowed)).parts
+            except Exception as e:
+                self._error = (i, e)
+                break
+            node = self._trie
+            for part in parts:
+                node = node.setdefault(part, {})
+            node.setdefault(_END, i)
+
+        self.code_root_lower: Optional[str] = None
+        try:
+            from app.config import get_code_root
+            code_root = get_code_root()
+            if code_root:
+                self.code_root_lower = str(Path(os.path.realpath(code_root))).lower()
+        except Exception:
+            pass
+
+        self.win_exact: frozenset = frozenset()
+        self.win_prefix: Tuple[str, ...] = ()
+        if system_drive is not None:
+            def _sub(f: str) -> str:
+                return (f.replace("C:", system_drive, 1) if f.upper().startswith("C:") else f).lower()
+            self.win_exact = frozenset(_sub(f) for f in FORBIDDEN_PATHS_WINDOWS_EXACT)
+            self.win_prefix = tuple(_sub(f) for f in FORBIDDEN_PATHS_WINDOWS_PREFIX)
+
+    def allows(self, parts: Sequence[str]) -> bool:
+        """parts(已 realpath 的 Path.parts)以任一白名单为前缀 → True"""
+        best = None
+        node = self._trie
+        for part in parts:
+            node = node.get(part)
+            if node is None:
+                break
+            idx = node.get(_END)
+            if idx is not None and (best is None or idx < best):
+                best = idx
+        if self._error is not None and (best is None or best > self._error[0]):
+            raise self._error[1]
+        return best is not None
+
+
+def _build(allowed_paths: Optional[Sequence[Any]]) -> PathPolicy:
+    from app.tools.security.path_safe_check import get_default_allowed_paths, get_system_drive  # 惰性导入避免循环依赖
+    if allowed_paths is None:
+        allowed_paths = get_default_allowed_paths()
+    system_drive = None
+    if os.name == "nt":
+        try:
+            system_drive = get_system_drive()
+        except Exception:
+            pass
+    return PathPolicy(allowed_paths, system_drive)
+
+
+def _config_stamp() -> Any:
+    """配置文件路径 + mtime(与 get_config 重读判据相同; 只 stat 一次, 不经 get_config)"""
+    try:
+        from app.config import get_config_path
+        path = os.getenv("OMNIAGENT_CONFIG_PATH") or get_config_path()
+        return path, os.stat(path).st_mtime
+    except Exception:
+        return None
+
+
+def current_policy(allowed_paths: Optional[Sequence[Any]] = None) -> PathPolicy:
+    """取编译好的策略: 默认白名单按配置/主目录/cwd 变更重编译, 显式白名单按内容缓存; 均不超过 PATH_POLICY_TTL"""
+    try:
+        cwd = os.getcwd()  # 相对项目根/授权目录的 resolve 依赖 cwd
+    except OSError:
+        cwd = None
+    if allowed_paths is None:
+        key: Hashable = ("default", _config_stamp(), os.path.expanduser("~"), cwd)
+    else:
+        key = ("explicit", tuple(allowed_paths), cwd)
+        try:
+            hash(key)
+        except TypeError:
+            return _build(allowed_paths)
+    now = time.monotonic()
+    with _lock:
+        hit = _policies.get(key)
+        if hit is not None and now - hit[1] < PATH_POLICY_TTL:
+            _policies.move_to_end(key)
+            _counters["policy_hits"] += 1
+            return hit[0]
+    policy = _build(allowed_paths)
+    with _lock:
+        _counters["policy_builds"] += 1
+        _policies[key] = (policy, now)
+        _policies.move_to_end(key)
+        while len(_policies) > _POLICY_MAX:
+            _policies.popitem(last=False)
+    return policy
+
+
+def clear_path_policy_cache() -> None:
+    """清空编译策略"""
+    with _lock:
+        _policies.clear()
+
+
+def path_policy_stats() -> Dict[str, Any]:
+    """策略命中/编译次数与在册策略数"""
+    with _lock:
+        return {**_counters, "policies": len(_policies)}
+
+
+__all__ = ["PathPolicy", "current_policy", "clear_path_policy_cache", "path_policy_stats"]
@@ -39,6 +39,15 @@
 #   【病根】ALLOWED_PATHS=get_default_allowed_paths() 模块级导入时计算, 仅被__all__导出(L458), 逻辑层从未引用(validate_path每次重调函数),
 #     既死代码又有"配置变更后陈旧白名单"潜在风险(file_register.py:4注释亦证移除意图)
 #   【改法】删除L129常量定义及__all__导出; get_default_allowed_paths 函数保留(逻辑在用), 无任何引用方依赖该常量(grep全仓仅注释/__all__)
+# 2026-10-17 - 小欧 - 路径判定提速(判定逐条不变, scripts/check_path_policy.py 差分校验):
+#   【病根】validate_path 每次重建白名单(get_allowed_dirs 逐条 resolve), 目标路径 realpath 3~4 次, 每个白名单项/代码库根再各 realpath 一次,
+#     整树 find/grep/copy/delete 的成千上万个路径反复逐级 lstat
+#   【改法】白名单/代码库根/Windows 禁区改取 path_policy.current_policy() 编译好的策略(配置变更重编译), 白名单前缀树一次匹配;
+#     realpath 改 path_policy.cached_realpath(祖先目录结果复用, 末级现查); _is_forbidden_path 增可选 policy 参数, validate_path 编译一次传入
+# 2026-10-17 - 小欧 - 撤掉 cached_realpath: 祖先目录缓存期内被换成符号链接(如白名单内目录 → /etc)仍按旧解析放行, 可绕过白名单;
+#   目标路径改回每次 os.path.realpath 现查, validate_path 内只解析一次, 禁区/白名单两段共用(_is_forbidden_path 增可选 real_path 参数)
+# 2026-10-17 - 小欧 - validate_path 总是把 real_path 传给 _is_forbidden_path: realpath 失败时就地按其异常分支归类(同文案),
+#   不再传 None 让其再 realpath 一次; 禁区判定之后 real 必有值, 穿越/白名单两段去掉 None 兜底
 """
 path_safe_check — 文件路径越权校验（Safety层）
 
@@ -68,10 +77,9 @@ from app.tools.tool_types import ToolCategory
 from app.tools.tool_constants import (
     FORBIDDEN_PATHS_EXACT,
     FORBIDDEN_PATHS_PREFIX,
-    FORBIDDEN_PATHS_WINDOWS_EXACT,
-    FORBIDDEN_PATHS_WINDOWS_PREFIX,
 )
 from app.tools.tools_alias_mapper import normalize_tool_name, normalize_params  # P2/三堂会审BUG-3: 工具名+参数名别名归一防漏检 — 小欧 2026-08-10
+from app.tools.security.path_policy import PathPolicy, current_policy  # 编译策略 — 小欧 2026-10-17
 from app.logger import logger
 
 
@@ -145,12 +153,15 @@ def _get_project_root_safety() -> Path:
     return Path.home()
 
 
-def _is_forbidden_path(file_path: str) -> Tuple[Optional[str], Optional[str]]:
+def _is_forbidden_path(file_path: str, policy: Optional[PathPolicy] = None,
+                       real_path: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
     """检查路径是否在系统敏感路径黑名单中 — 小健 2026-06-23
     P1 (v1.43 修正): 返回值扩展为禁区类别(category, msg)
     
     Args:
         file_path: 待检查路径
+        policy: 编译好的路径策略(validate_path 传入复用; None 取当前默认策略) — 小欧 2026-10-17
+        real_path: 已现查的 os.path.realpath(expanduser(file_path))(validate_path 传入复用; None 在此现查) — 小欧 2026-10-17
         
     Returns:
         (category, error_message) — category ∈ {"system", "non_system", None}:
@@ -159,7 +170,9 @@ def _is_forbidden_path(file_path: str) -> Tuple[Optional[str], Optional[str]]:
             None = 非禁区(白名单外·非禁区)
     """
     try:
-        real_path = Path(os.path.realpath(os.path.expanduser(file_path)))
+        if policy is None:
+            policy = current_policy()
+        real_path = Path(real_path if real_path is not None else os.path.realpath(os.path.expanduser(file_path)))
         real_path_str = str(real_path)
         real_path_lower = real_path_str.lower()
         
@@ -173,30 +186,20 @@ def _is_forbidden_path(file_path: str) -> Tuple[Optional[str], Optional[str]]:
             pass
         
         if os.name == 'nt':
-            sys_drive = get_system_drive()  # 真实系统盘符(写死C:模板作默认, 运行时动态替换) — 小欧 2026-08-04
-            for forbidden in FORBIDDEN_PATHS_WINDOWS_EXACT:
-                _f = forbidden.replace("C:", sys_drive, 1) if forbidden.upper().startswith("C:") else forbidden
-                if real_path_lower == _f.lower():
-                    return "system", f"禁止访问系统敏感文件: {file_path}"
-            for forbidden_prefix in FORBIDDEN_PATHS_WINDOWS_PREFIX:
-                _f = forbidden_prefix.replace("C:", sys_drive, 1) if forbidden_prefix.upper().startswith("C:") else forbidden_prefix
-                if real_path_lower.startswith(_f.lower()):
-                    return "system", f"禁止访问系统敏感目录: {file_path}"
+            # 真实系统盘符(写死C:模板作默认, 运行时动态替换) — 小欧 2026-08-04; 替换+小写在策略编译时完成 — 小欧 2026-10-17
+            if real_path_lower in policy.win_exact:
+                return "system", f"禁止访问系统敏感文件: {file_path}"
+            if real_path_lower.startswith(policy.win_prefix):
+                return "system", f"禁止访问系统敏感目录: {file_path}"
 
         # ⑦ 代码库根禁区(tool禁区, 开关无关硬拦截): 代码库根及其子/父级全部禁止 — 小欧 2026-08-10
         # P1: 代码库根属非系统禁区(non_system)
-        try:
-            from app.config import get_code_root
-            code_root = get_code_root()
-            if code_root:
-                _cr = Path(os.path.realpath(code_root))
-                cr_lower = str(_cr).lower()
-                if (real_path_lower == cr_lower
-                        or real_path_lower.startswith(cr_lower + os.sep)
-                        or real_path_lower.startswith(cr_lower + "/")):
-                    return "non_system", f"禁止访问代码库(tool禁区): {file_path}"
-        except Exception:
-            pass
+        # 代码库根 realpath 在策略编译时完成(取不到为 None, 同原异常跳过) — 小欧 2026-10-17
+        cr_lower = policy.code_root_lower
+        if cr_lower is not None and (real_path_lower == cr_lower
+                                     or real_path_lower.startswith(cr_lower + os.sep)
+                                     or real_path_lower.startswith(cr_lower + "/")):
+            return "non_system", f"禁止访问代码库(tool禁区): {file_path}"
 
         for forbidden in FORBIDDEN_PATHS_EXACT:
             if real_path_str == forbidden:
@@ -242,7 +245,17 @@ def validate_path(file_path: str, allowed_paths: Optional[List[Path]] = None,
         #   与 test_bug_empty_path_not_validated 断言(空路径应 blocked)对齐 — 小欧 2026-08-10
         return False, "路径为空", "system"
 
-    is_forbidden, forbidden_msg = _is_forbidden_path(file_path)
+    policy = current_policy(allowed_paths)  # 白名单/禁区编译一次, 禁区与白名单两段共用 — 小欧 2026-10-17
+    # 目标路径每次现查不缓存(祖先目录随时可能被换成符号链接), 本次判定内禁区/穿越/白名单三段共用 — 小欧 2026-10-17
+    expanded = os.path.expanduser(file_path)
+    try:
+        real = os.path.realpath(expanded)
+    except Exception as e:
+        real = None
+        # 与 _is_forbidden_path 现查失败同一归类/文案, 不再让其重复 realpath
+        is_forbidden, forbidden_msg = "system", f"路径安全检查异常,拒绝访问: {file_path} ({e})"
+    else:
+        is_forbidden, forbidden_msg = _is_forbidden_path(file_path, policy, real)
     if is_forbidden:
         # P3: 读放行 — 禁区读✅放行(内容敏感性 contentFilter 兜底)
         if mode == "read":
@@ -271,7 +284,7 @@ def validate_path(file_path: str, allowed_paths: Optional[List[Path]] = None,
         if ".." in path_parts:
             return False, f"路径包含..,禁止路径穿越: {file_path}", "system"
         # 也检查规范化解析后的路径（处理绝对路径中的..）
-        resolved = os.path.realpath(file_path)
+        resolved = real if expanded == file_path else os.path.realpath(file_path)
         original_resolved = os.path.realpath(os.path.dirname(file_path))
         if not resolved.startswith(original_resolved) and file_path != resolved:
             return False, f"路径穿越检测: {file_path} 解析为 {resolved}", "system"
@@ -280,11 +293,10 @@ def validate_path(file_path: str, allowed_paths: Optional[List[Path]] = None,
         return False, f"路径校验异常: {file_path}", "system"
 
     # P3: 白名单判定 — 白名单内读/写/删都放行(删受 R3-R6)
-    # 补B(2026-08-10): 白名单懒加载——每次调用动态计算(主目录+tmp+项目根+授权目录),
-    # 避免模块导入时 config 未就绪取错值; allowed_paths 显式传入时优先使用
-    paths = allowed_paths if allowed_paths is not None else get_default_allowed_paths()
+    # 补B(2026-08-10): 白名单懒加载(主目录+tmp+项目根+授权目录), 避免模块导入时 config 未就绪取错值; allowed_paths 显式传入时优先使用
+    # 2026-10-17 小欧: 白名单取 policy(配置变更重编译), 各项 realpath 后建前缀树, 一次匹配替代逐项 realpath + 逐段比对
     try:
-        real_path = Path(os.path.realpath(os.path.expanduser(file_path)))
+        real_path = Path(real)
 
         # 白名单盘符下仍拒绝系统保护目录（收紧范围）— 小欧 2026-07-18 #3 fix
         _SYSTEM_PROTECTED = frozenset({
@@ -300,25 +312,9 @@ def validate_path(file_path: str, allowed_paths: Optional[List[Path]] = None,
                 return True, None, "system"
             return False, f"路径位于系统保护目录,禁止操作: {file_path}", "system"
 
-        for allowed in paths:
-            allowed_real = Path(os.path.realpath(allowed))
-            try:
-                real_parts = Path(real_path).parts
-                allowed_parts = Path(allowed_real).parts
-
-                if len(real_parts) >= len(allowed_parts):
-                    prefix_match = all(real_parts[i] == allowed_parts[i] for i in range(len(allowed_parts)))
-                    if not prefix_match:
-                        continue
-
-                    if len(allowed_parts) == 1 and (allowed_parts[0].endswith(':') or allowed_parts[0].endswith(':\\') or allowed_parts[0].endswith(':/')):
-                        if str(real_path) == str(allowed_real) or real_path.parts[0] == allowed_parts[0]:
-                            return True, None, None
-                    else:
-                        if len(real_parts) >= len(allowed_parts):
-                            return True, None, None
-            except (ValueError, OSError):
-                pass
+        # 白名单项 parts 是目标 parts 前缀即放行(原盘符根特例 parts[0] 相同即放行, 同属前缀命中)
+        if policy.allows(real_path.parts):
+            return True, None, None
 
         # P3: 白名单外判定 — temp_auth(3.2.12) 仅在非禁区生效(禁区已在_is_forbidden_path拦截)
         # P3: 读 — 白名单外非禁区/禁区全部放行(contentFilter 兜底); 所以这里不用判mode, 直接放行
@@ -331,7 +327,7 @@ def validate_path(file_path: str, allowed_paths: Optional[List[Path]] = None,
         # P3: 写/删 — 白名单外非禁区走临时授权
         if is_temp_authorized(file_path):
             return True, None, None
-        return False, f"路径 '{file_path}' 不在允许的操作范围内(仅允许:{', '.join(str(p) for p in paths[:5])}...)", None
+        return False, f"路径 '{file_path}' 不在允许的操作范围内(仅允许:{policy.allowed_message}...)", None
 
     except Exception as e:
         # 2026-08-11 小欧 fix D1: 异常路径归类为system(永不授权硬拦), 与_is_forbidden_path异常处理(L197-199)一致;
@@ -2,11 +2,5 @@
 """Shell 模块 - Shell命令查找工具 — 小欧 2026-06-17
 【2026-07-28 北京老陈】shell 迁至 FUNDAMENTAL 分类
 """
-
-from app.tools.shell.shell_register import _register_shell_tools
-from app.tools.shell.find_command import which
-
-__all__ = [
-    "_register_shell_tools",
-    "which",
-]
+# 2026-10-17 - 小欧 - 包初始化不再导入 shell_register(连带本分类全部工具实现): 导入本包任一子模块不再拖入整个分类;
+#   注册入口由 tool_constants.CATEGORY_MODULES 直指 app.tools.shell.shell_register
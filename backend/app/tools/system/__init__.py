@@ -3,16 +3,5 @@
 
 【2026-06-22 小健】拆分为独立tool文件
 """
-
-from app.tools.system.system_register import *
-from app.tools.system.event_log import event_log
-from app.tools.system.create_task import create_task
-from app.tools.system.delete_task import delete_task
-from app.tools.system.list_tasks import list_tasks
-
-__all__ = [
-    "event_log",
-    "create_task",
-    "delete_task",
-    "list_tasks",
-]
+# 2026-10-17 - 小欧 - 包初始化不再导入 system_register(连带本分类全部工具实现): 导入本包任一子模块不再拖入整个分类;
+#   注册入口由 tool_constants.CATEGORY_MODULES 直指 app.tools.system.system_register
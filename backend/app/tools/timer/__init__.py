@@ -1,19 +1,7 @@
-
+
 # -*- coding: utf-8 -*-
 """Timer 模块 - 定时器+时间工具 — 小欧 2026-06-17
 【2026-07-28 北京老陈】timeadd/timediff/calendar 从 FUNDAMENTAL 迁入
 """
-
-from app.tools.timer.timer_register import _register_timer_tools
-
-from app.tools.timer.time_add import timeadd
-from app.tools.timer.time_diff import timediff
-from app.tools.timer.query_calendar import calendar
-
-__all__ = [
-    "_register_timer_tools",
-    "timeadd",
-    "timediff",
-    "calendar",
-]
-
+# 2026-10-17 - 小欧 - 包初始化不再导入 timer_register(连带本分类全部工具实现): 导入本包任一子模块不再拖入整个分类;
+#   注册入口由 tool_constants.CATEGORY_MODULES 直指 app.tools.timer.timer_register
@@ -54,7 +54,7 @@ async def timer_list() -> Dict[str, Any]:
                     "status": "active",
                 })
         try:
-            with db.get_conn("operations") as conn:
+            with db.get_read_conn("operations") as conn:
                 rows = conn.execute("SELECT timer_id, callback, created_at, trigger_at, triggered_at, status FROM timers ORDER BY created_at DESC LIMIT 50").fetchall()
                 for r in rows:
                     d = dict(r)
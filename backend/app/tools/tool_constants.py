@@ -103,6 +103,19 @@
 #   删除后py_compile通过, 全部工具ensure_tools_registered()注册成功, 活常量均有工具真实引用(REF>=1),
 #   唯一含已删常量名的backend/scripts/fix_error_codes.py为一次性迁移脚本(FIXES字符串对照表,纯文本替换,不依赖本文件常量)
 # 2026-08-13 - 小沈 - P2: SUPPORTED_ALGORITHMS 迁入 constants.py(系统级常量), 本文件 re-export 保持下游兼容
+# 2026-10-17 - 小欧 - 新增第15节 工具进程池(TOOL_PROCESS_POOL_*): 默认路由表/常驻进程数/退役阈值/击杀宽限/排队轮询间隔
+# 2026-10-17 - 小欧 - 新增第16节 grep 搜索引擎(GREP_ENGINE_* / GREP_INDEX_*): mmap门限/编码采样/并行门限与批大小/三元组索引参数
+# 2026-10-17 - 小欧 - 新增第17节 共用 CPU 进程池(TOOL_CPU_POOL_MAX_WORKERS, 原 GREP_ENGINE_PARALLEL_MAX_WORKERS) + read_pdf 页级缓存/整本并行提取(READ_PDF_CACHE_* / READ_PDF_PARALLEL_*)
+# 2026-10-17 - 小欧 - 新增第18节 数据分析 DataFrame 缓存(DATAFRAME_CACHE_MAX_BYTES / DATAFRAME_SIDECAR_*): 内存预算/Parquet 旁路文件门限与保留数
+# 2026-10-17 - 小欧 - 新增 NETWORK_KEEPALIVE_EXPIRY(network 工具按事件循环共用连接池的 keep-alive 保留秒数); NETWORK_MAX_* 改为共用池上限
+# 2026-10-17 - 小欧 - 新增第19节 fetchpage 本地页面缓存(FETCHPAGE_CACHE_*): 缺省新鲜期/总字节上限/条目上限
+# 2026-10-17 - 小欧 - 新增第20节 fetchpage JS 渲染常驻浏览器池(BROWSER_POOL_*): 槽位数/单槽复用次数/JS 堆上限/空闲关闭秒数
+# 2026-10-17 - 小欧 - 新增第21节 数据库引擎注册表与表结构缓存(DB_ENGINE_* / DB_SCHEMA_CACHE_*): 连接池大小/溢出/借出超时/连接回收/引擎空闲淘汰与上限/表结构缓存有效期与条目上限
+# 2026-10-17 - 小欧 - 新增第22节 query_sql 分批拉取与分页游标(QUERY_SQL_FETCH_BATCH / QUERY_SQL_CURSOR_*): fetchmany 批大小/游标缓冲行数上限/有效期/并存游标数
+# 2026-10-17 - 小欧 - 新增第23节 路径策略编译与 realpath 目录缓存(PATH_POLICY_TTL / PATH_REALPATH_CACHE_MAX_ENTRIES): 有效期/缓存目录数上限
+# 2026-10-17 - 小欧 - 第23节撤掉 PATH_REALPATH_CACHE_MAX_ENTRIES: realpath 目录缓存会在有效期内信任已被换成符号链接的祖先目录(可绕过白名单), 目标路径改回每次 os.path.realpath
+# 2026-10-17 - 小欧 - 新增第24节 Shell 风险规则扫描缓存(SHELL_RISK_CACHE_*): 缓存命令数上限/可缓存命令长度上限
+# 2026-10-17 - 小欧 - 新增第25节 工具懒注册清单(TOOL_MANIFEST_*): 清单文件名/格式版本; 第7节 CATEGORY_MODULES 改指各分类 *_register 模块
 """
 【工具层常量】— 工具函数运行时常量集中管理 — 北京老陈 2026-05-30
 
@@ -214,6 +227,7 @@ HTTPX_TIMEOUT_DEFAULT: float = 5.0        # 【tool 级】使用对象: 工具
 DEFAULT_TIMEOUT_SEC: float = 30.0             # 【tool 级】使用对象: 工具函数 timeout 参数的默认值(秒), 如 shell/network/数据库等
 NETWORK_MAX_CONNECTIONS: int = 100             # 【tool 级】使用对象: network 工具 httpx 连接池最大连接
 NETWORK_MAX_KEEPALIVE: int = 20                # 【tool 级】使用对象: network 工具 httpx 连接池 keepalive 连接数
+NETWORK_KEEPALIVE_EXPIRY: float = 30.0         # 【tool 级】使用对象: network 工具共用连接池空闲 keep-alive 连接保留秒数(config tools.http.keepalive_expiry 覆盖)
 
 # ============================================================
 # 🕐 4. 系统级观察截断（OBS_*）— 【系统级】
@@ -396,17 +410,18 @@ SKIP_DIRS: frozenset[str] = frozenset({
 # 🕐 7. 工具注册模块映射(从 lazy_loader.py 迁移) — 【工具层】
 # ============================================================
 
+# 2026-10-17 小欧: 直指各分类 *_register 模块(分类包 __init__ 不再导入注册模块)
 CATEGORY_MODULES: dict[str, tuple[str, str]] = {  # 【tool 级】使用对象: ToolRegistry 各分类→注册函数模块映射
-    "file": ("app.tools.file", "_register_file_tools"),
-    "shell": ("app.tools.shell", "_register_shell_tools"),
-    "network": ("app.tools.network", "_register_network_tools"),
-    "system": ("app.tools.system", "_register_system_tools"),
-    "desktop": ("app.tools.desktop", "_register_desktop_tools"),
-    "document": ("app.tools.document", "_register_document_tools"),
-    "dataanalysis": ("app.tools.dataanalysis", "_register_dataanalysis_tools"),
-    "fundamental": ("app.tools.fundamental", "_register_fundamental_tools"),
-    "win_registry": ("app.tools.win_registry", "_register_registry_tools"),
-    "timer": ("app.tools.timer", "_register_timer_tools"),
+    "file": ("app.tools.file.file_register", "_register_file_tools"),
+    "shell": ("app.tools.shell.shell_register", "_register_shell_tools"),
+    "network": ("app.tools.network.network_register", "_register_network_tools"),
+    "system": ("app.tools.system.system_register", "_register_system_tools"),
+    "desktop": ("app.tools.desktop.desktop_register", "_register_desktop_tools"),
+    "document": ("app.tools.document.document_register", "_register_document_tools"),
+    "dataanalysis": ("app.tools.dataanalysis.dataanalysis_register", "_register_dataanalysis_tools"),
+    "fundamental": ("app.tools.fundamental.fundamental_register", "_register_fundamental_tools"),
+    "win_registry": ("app.tools.win_registry.win_registry_register", "_register_registry_tools"),
+    "timer": ("app.tools.timer.timer_register", "_register_timer_tools"),
 }
 
 # ============================================================
@@ -656,4 +671,127 @@ ERR_NO_WIN32GUI = "ERR_NO_WIN32GUI"
 
 TOOL_BROWSER_UA: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"  # 【tool 级】使用对象: network 工具(fetch_webpage 等) HTTP 请求 User-Agent
 
+# ============================================================
+# 🕐 15. 工具进程池(隔离执行) — 【工具层】
+#     opt-in: config tools.isolated_execution.enabled=true 时生效, 默认关闭(全部工具照旧走线程)。
+#     路由表内工具在可终止的常驻工作进程中执行, 保险丝超时/取消即杀进程(线程无法被杀)。
+#     config tools.isolated_execution.routes 可逐工具覆盖(process/thread)。
+#     compress 等经入口注入的安全 hooks 记录操作的工具不入默认路由(hooks 不跨进程)。
+# ============================================================
+
+TOOL_PROCESS_POOL_DEFAULT_ROUTES: frozenset[str] = frozenset({  # 【tool 级】使用对象: ToolProcessPool 默认走进程池的工具(CPU 重型/易卡死)
+    "grep", "find", "extract",
+    "analyze_data", "filter_data", "generate_chart",
+    "read_pdf", "read_docx", "read_pptx", "read_xlsx",
+})
+TOOL_PROCESS_POOL_WORKERS: int = 2  # 【tool 级】使用对象: ToolProcessPool 常驻工作进程数(config tools.isolated_execution.workers 覆盖)
+TOOL_PROCESS_POOL_MAX_TASKS_PER_WORKER: int = 100  # 【tool 级】使用对象: ToolProcessPool 单进程执行满此次数退役重建(防解析库内存只涨不降)
+TOOL_PROCESS_POOL_KILL_GRACE: float = 2.0  # 【tool 级】使用对象: ToolProcessPool terminate 后等待退出秒数, 仍存活升级 kill
+TOOL_PROCESS_POOL_ACQUIRE_POLL: float = 0.05  # 【tool 级】使用对象: ToolProcessPool 池满时轮询空闲槽位间隔(秒)
+
+# ============================================================
+# 🕐 16. grep 搜索引擎(并行扫描 / mmap / 三元组索引) — 【工具层】
+#     并行: 待扫描文件数 >= GREP_ENGINE_PARALLEL_MIN_FILES 且 CPU>1 时分批派到 spawn 进程池, 否则当前线程顺序扫描。
+#     三元组索引 opt-in: config tools.grep.trigram_index=true, 且目录文件数 >= GREP_INDEX_MIN_FILES 才建/用索引。
+# ============================================================
+
+GREP_ENGINE_MMAP_MIN_BYTES: int = 64 * 1024  # 【tool 级】使用对象: grep_engine 文件字节数 >= 此值走 mmap, 否则一次 read
+GREP_ENGINE_ENCODING_SAMPLE_BYTES: int = 64 * 1024  # 【tool 级】使用对象: grep_engine/file_encoding 编码探测只采样文件前 N 字节(旧: chardet 全文)
+GREP_ENGINE_PARALLEL_MIN_FILES: int = 2000  # 【tool 级】使用对象: grep_engine 待扫描文件数达到此值才启用并行进程池
+GREP_ENGINE_PARALLEL_BATCH_FILES: int = 256  # 【tool 级】使用对象: grep_engine 每批派给工作进程的文件数
+GREP_INDEX_MIN_FILES: int = 5000  # 【tool 级】使用对象: grep_index 目录文件数达到此值才建/用三元组索引(小目录直接扫更快)
+GREP_INDEX_BITS_PER_TRIGRAM: int = 2  # 【tool 级】使用对象: grep_index 每文件 bloom 签名按"去重三元组数 x 本值"取整到 2 的幂
+GREP_INDEX_MAX_BITS: int = 1 << 16  # 【tool 级】使用对象: grep_index 单文件 bloom 签名位数上限(大文件签名饱和即近似"总是候选")
+GREP_INDEX_CACHE_ROOTS: int = 4  # 【tool 级】使用对象: grep_index 进程内常驻内存的索引根目录数(LRU)
+
+# ============================================================
+# 🕐 17. 共用 CPU 进程池 / read_pdf 页级提取 — 【工具层】
+#     共用池: toolhelper/cpu_pool(grep 并行扫描、read_pdf 整本并行提取), 单核或已在工具工作进程内时顺序执行。
+#     read_pdf 页级缓存: 键 (路径, 大小, mtime_ns, 页号, 模式), 文件变化即失效; 按字符量 LRU 淘汰。
+# ============================================================
+
+TOOL_CPU_POOL_MAX_WORKERS: int = 8  # 【tool 级】使用对象: toolhelper/cpu_pool 共用进程池进程数上限(实际取 min(CPU数, 本值))
+READ_PDF_CACHE_MAX_CHARS: int = 20_000_000  # 【tool 级】使用对象: pdf_page_extractor 页级缓存总字符量上限(文本+表格单元格, 超出按 LRU 淘汰)
+READ_PDF_PARALLEL_MIN_PAGES: int = 24  # 【tool 级】使用对象: pdf_page_extractor 未命中缓存页数达到此值且 CPU>1 时分块并行提取
+READ_PDF_PARALLEL_CHUNK_PAGES: int = 8  # 【tool 级】使用对象: pdf_page_extractor 每个并行任务提取的页数
+
+# ============================================================
+# 🕐 18. 数据分析 DataFrame 缓存 — 【工具层】
+#     键 (路径, 大小, mtime_ns, 读取器, 读取参数含 sheet), 文件变化即失效; 按 DataFrame 内存字节 LRU 淘汰。
+#     Parquet 旁路文件 opt-in: config tools.dataanalysis.parquet_sidecar=true 且已装 pyarrow, 仅大 Excel 写旁路文件。
+# ============================================================
+
+DATAFRAME_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 【tool 级】使用对象: df_cache 进程内缓存 DataFrame 内存总量上限(memory_usage(deep=True), 超出按 LRU 淘汰)
+DATAFRAME_SIDECAR_MIN_BYTES: int = 1024 * 1024  # 【tool 级】使用对象: df_cache Excel 源文件字节数 >= 此值才写/读 Parquet 旁路文件(小文件直接解析更快)
+DATAFRAME_SIDECAR_MAX_FILES: int = 64  # 【tool 级】使用对象: df_cache 旁路文件目录(~/.omniagent/df_sidecar)保留文件数上限, 超出按 mtime 删最旧
+
+# ============================================================
+# 🕐 19. fetchpage 本地页面缓存 — 【工具层】
+#     ~/.omniagent/page_cache: 原始正文 + 各格式已提取正文 + 校验器(ETag/Last-Modified); 仅静态抓取路径。
+#     新鲜期: 响应 Cache-Control max-age 优先, 缺省取 FETCHPAGE_CACHE_DEFAULT_TTL(config tools.fetchpage.cache_ttl 覆盖);
+#     过期后条件请求, 304 复用。config tools.fetchpage.cache=false 关闭。
+# ============================================================
+
+FETCHPAGE_CACHE_DEFAULT_TTL: float = 300.0  # 【tool 级】使用对象: page_cache 响应未给 max-age 时的新鲜期(秒), 期内同 URL 不发请求
+FETCHPAGE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # 【tool 级】使用对象: page_cache 缓存目录总字节上限, 超出按写入时间删最旧条目
+FETCHPAGE_CACHE_MAX_ENTRIES: int = 1000  # 【tool 级】使用对象: page_cache 缓存条目数(URL 数)上限
+
+# ============================================================
+# 🕐 20. fetchpage JS 渲染常驻浏览器池 — 【工具层】
+#     browser_pool: 专用线程常驻一个 Chromium, 最多 BROWSER_POOL_SIZE 个 (context, page) 槽位复用, 不足时 FIFO 排队;
+#     槽位超复用次数/JS 堆超限/复位失败即回收重建, 空闲超时关闭浏览器。config tools.browser_pool.size 覆盖槽位数。
+# ============================================================
+
+BROWSER_POOL_SIZE: int = 2  # 【tool 级】使用对象: browser_pool 并发渲染槽位数(每槽一个 context+page), 超出排队
+BROWSER_POOL_MAX_USES: int = 50  # 【tool 级】使用对象: browser_pool 单槽位渲染次数上限, 用满即关闭重建(防页面内存/状态累积)
+BROWSER_POOL_MAX_HEAP_MB: int = 256  # 【tool 级】使用对象: browser_pool 渲染后页面 JS 堆(performance.memory)超此值即回收槽位
+BROWSER_POOL_IDLE_TIMEOUT: float = 300.0  # 【tool 级】使用对象: browser_pool 无渲染持续秒数后关闭浏览器释放内存, 下次渲染懒启动
+
+# ============================================================
+# 🕐 21. 数据库引擎注册表 / 表结构缓存 — 【工具层】
+#     MySQL/PostgreSQL: 按 (connection_string, connect_args) 进程内复用 SQLAlchemy 引擎(连接池 + pool_pre_ping 健康检查),
+#     空闲超时/超上限按最久未用淘汰; get_db_schema 表结构按库缓存, execute_sql 执行 DDL 即失效(SQLite 另按 PRAGMA schema_version 校验)。
+# ============================================================
+
+DB_ENGINE_POOL_SIZE: int = 5  # 【tool 级】使用对象: db_engines 每个引擎常驻连接数(SQLAlchemy pool_size)
+DB_ENGINE_MAX_OVERFLOW: int = 5  # 【tool 级】使用对象: db_engines 每个引擎可临时超出 pool_size 的连接数(max_overflow)
+DB_ENGINE_POOL_RECYCLE: int = 1800  # 【tool 级】使用对象: db_engines 连接最长复用秒数, 超过即重连(防服务端 wait_timeout 断开)
+DB_ENGINE_IDLE_TIMEOUT: float = 600.0  # 【tool 级】使用对象: db_engines 引擎无借出且持续未用秒数, 超过即 dispose 并移出注册表
+DB_ENGINE_MAX_ENGINES: int = 16  # 【tool 级】使用对象: db_engines 注册表引擎数上限(不同连接串), 超出淘汰最久未用的空闲引擎
+DB_SCHEMA_CACHE_TTL: float = 300.0  # 【tool 级】使用对象: schema_cache MySQL/PostgreSQL 表结构缓存有效期(秒), 兜底库外 DDL
+DB_SCHEMA_CACHE_MAX_ENTRIES: int = 64  # 【tool 级】使用对象: schema_cache 缓存的库(连接+库名)数上限, 超出淘汰最久未用
+
+# ============================================================
+# 🕐 22. query_sql 分批拉取 / 分页游标 — 【工具层】
+#     结果按 fetchmany 分批拉取、逐列序列化; 首页之后的行缓冲进游标(列式), 再次调用传 cursor 续读后续页, 不重跑查询。
+# ============================================================
+
+QUERY_SQL_FETCH_BATCH: int = 1000  # 【tool 级】使用对象: query_sql 每次 fetchmany 行数
+QUERY_SQL_CURSOR_MAX_ROWS: int = 100_000  # 【tool 级】使用对象: sql_cursor 单个游标首页之后最多缓冲的行数, 超出部分不可续读(提示加 WHERE/LIMIT)
+QUERY_SQL_CURSOR_TTL: float = 600.0  # 【tool 级】使用对象: sql_cursor 游标自创建/上次续读起的有效期(秒)
+QUERY_SQL_CURSOR_MAX_OPEN: int = 16  # 【tool 级】使用对象: sql_cursor 进程内并存游标数上限, 超出淘汰最久未用
+
+# ============================================================
+# 🕐 23. 路径策略编译 — Safety层(path_safe_check / path_policy)消费
+#     白名单(主目录+tmp+项目根+授权目录)与禁区(代码库根/Windows 系统目录)按配置文件 mtime 编译一次, 超有效期重编译;
+#     目标路径不缓存, 每次 os.path.realpath 现查。
+# ============================================================
+
+PATH_POLICY_TTL: float = 2.0  # 【tool 级】使用对象: path_policy 编译策略有效期(秒), 期内白名单项/代码库根自身被换成符号链接的改动可能晚于本值生效
+
+# ============================================================
+# 🕐 24. Shell 风险规则扫描缓存 — 【工具层】
+#     execute_shell_command_safety: 规则按必要字面量单遍预筛, 命中规则下标按 (归一化命令, shell_type) 缓存, 同一命令重复检查不再扫描。
+# ============================================================
+
+SHELL_RISK_CACHE_MAX_ENTRIES: int = 1024  # 【tool 级】使用对象: execute_shell_command_safety 规则命中结果缓存条目数上限, 超出淘汰最久未用
+SHELL_RISK_CACHE_MAX_COMMAND_CHARS: int = 4096  # 【tool 级】使用对象: execute_shell_command_safety 超过此长度的命令(长脚本)不进缓存, 每次现扫
+
+# ============================================================
+# 🕐 25. 工具懒注册清单 — 【工具层】
+#     opt-in: config tools.lazy_registration=true 时生效, 默认关闭(启动时导入全部分类注册模块, 注册时同步检查依赖)。
+#     开启后按源码指纹匹配的清单注册 schema, 工具实现模块首次执行才导入; 依赖检查改后台线程, 首次执行前补做。
+# ============================================================
 
+TOOL_MANIFEST_FILENAME: str = "tool_manifest.json"  # 【tool 级】使用对象: tool_manifest 清单文件名(~/.omniagent 下)
+TOOL_MANIFEST_FORMAT: int = 1  # 【tool 级】使用对象: tool_manifest 清单条目格式版本, 字段变化时递增(旧清单自动失效)
@@ -16,12 +16,18 @@ Tool函数公共辅助代码 — 纯逻辑函数集合
 # 2026-07-21 - 小欧 - 删除死代码 validate_python_content(全仓0调用方), 语法校验统一迁至 app.tools.toolhelper.syntax_validator.validate_syntax
 # 2026-07-24 - 小欧 - 修复: 去掉 validate_csv/xml 的 str(e)[:100]截断(helper层不截断, 调用方自行决定) — 北京老陈驱动
 # 2026-08-13 - 小沈 - P5b: backup_file 迁移至 app/utils/file_utils.py(消除 services/model/persistence→tools 实现依赖), 本文件 re-export 保持下游兼容
+# 2026-10-17 - 小欧 - _get_connection MySQL/PostgreSQL 改从 toolhelper.db_engines 引擎注册表借连接(不再每次 create_engine); _close_connection 只归还连接, 不再 dispose 引擎
+# 2026-10-17 - 小欧 - _serialize_rows 改逐列按 dtype 转换(原逐行逐格); 新增 _serialize_column(数据库结果按列类型分派转换, query_sql 列式结果用) / _json_safe_value(逐值兜底)
+# 2026-10-17 - 小欧 - numpy/pandas 改函数内导入: 本文件被 http_client_sdk 等轻量模块引用, 模块级导入让应用启动即加载 pandas(~0.5s)
+# 2026-10-17 - 小欧 - _serialize_series 的字符串注解 "pd.Series" 补 TYPE_CHECKING 导入(pyflakes undefined name 'pd'), 运行时仍不加载 pandas
 
 # 【铁规】helper/被调函数(以下划线_开头的函数)只返回raw dict，严禁调用build_success/build_error/build_warning和构建llm_data。
 # build3+llm_data只能在tool的main函数(对外公开的函数)中包装。违反此规则的代码视为不合规。
 
+import base64
 import configparser
 import csv
+import decimal
 import importlib
 import locale
 import io
@@ -32,20 +38,22 @@ import shutil
 import sqlite3
 import subprocess
 import sys
+import uuid
 import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, time, timedelta, timezone
 from html.parser import HTMLParser
 from io import StringIO
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
-
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
 from app.tools.tool_constants import QINGMING_DATES, SUBPROCESS_TIMEOUT_SHORT, DEFAULT_TIMEOUT_SEC
 from app.constants import UTC_OFFSET_PATTERN
 
 from app.logger import logger
 
+if TYPE_CHECKING:  # 仅供注解; 运行时 numpy/pandas 在函数内按需导入
+    import pandas as pd
+
 
 # ═══════════════════════════════════════════════════════════════
 # 来自 common_helper.py
@@ -112,27 +120,102 @@ def _check_node_available() -> bool:
 # 来自 data_helper.py
 # ═══════════════════════════════════════════════════════════════
 
+def _json_safe_value(val: Any) -> Any:
+    """单个值 → JSON 安全值(逐值兜底): 缺失→None, numpy 标量→.item(), 日期时间→isoformat — 小沈 2026-05-22 原 _serialize_rows 逐格逻辑"""
+    if val is None:
+        return None
+    import pandas as pd
+    try:
+        if pd.isna(val):
+            return None
+    except (TypeError, ValueError):  # 数组/列表等非标量
+        pass
+    if hasattr(val, 'item'):
+        return val.item()
+    if hasattr(val, 'isoformat'):
+        return val.isoformat()
+    return val
+
+
+def _decimal_to_number(val: decimal.Decimal) -> Union[int, float, None]:
+    if not val.is_finite():
+        return None
+    return int(val) if val == val.to_integral_value() else float(val)
+
+
+def _float_or_none(val: float) -> Optional[float]:
+    return None if val != val else val  # NaN → None
+
+
+# 按 Python 类型的逐列转换器(数据库驱动返回值); 未列出的类型走 _json_safe_value
+_COLUMN_CONVERTERS = {
+    float: _float_or_none,
+    datetime: datetime.isoformat,
+    date: date.isoformat,
+    time: time.isoformat,
+    timedelta: str,
+    decimal.Decimal: _decimal_to_number,
+    bytes: lambda v: base64.b64encode(v).decode("ascii"),
+    bytearray: lambda v: base64.b64encode(bytes(v)).decode("ascii"),
+    memoryview: lambda v: base64.b64encode(v.tobytes()).decode("ascii"),
+    uuid.UUID: str,
+}
+_JSON_NATIVE_TYPES = frozenset((str, int, bool, type(None)))
+
+
+def _serialize_column(values: List[Any]) -> List[Any]:
+    """一列值 → JSON 安全值(列级按类型分派) — 小欧 2026-10-17
+       先取该列出现的类型集合(C 层 map(type)); 全是 str/int/bool/None 直接原样返回, 否则每个值只查一次类型转换表"""
+    types = set(map(type, values))
+    if types <= _JSON_NATIVE_TYPES:
+        return values
+    if types <= _JSON_NATIVE_TYPES | {float}:
+        return [v if v == v else None for v in values]  # 仅 NaN 需转 None
+    native = _JSON_NATIVE_TYPES
+    converters = _COLUMN_CONVERTERS
+    return [v if type(v) in native else converters.get(type(v), _json_safe_value)(v) for v in values]
+
+
+def _serialize_series(col: "pd.Series") -> List[Any]:
+    """DataFrame 一列 → JSON 安全值列表: numpy 数值列 tolist 直出, 日期/时长列 isoformat, 其余列按值类型分派"""
+    import numpy as np
+    dtype = col.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biu":
+        return col.tolist()
+    if isinstance(dtype, np.dtype) and dtype.kind == "f":
+        return [v if v == v else None for v in col.tolist()]
+    if isinstance(dtype, np.dtype) and dtype.kind == "M":
+        arr = col.to_numpy()
+        mask = np.isnat(arr)
+        valid = arr[~mask]
+        if (valid.astype("datetime64[s]") == valid).all():  # 无亚秒部分: 与 Timestamp.isoformat() 同为秒精度文本, 整列向量化
+            out = np.datetime_as_string(arr, unit="s").tolist()
+            for i in np.flatnonzero(mask):
+                out[i] = None
+            return out
+    if dtype.kind in "mM":
+        mask = col.isna().tolist()
+        return [None if m else v.isoformat() for v, m in zip(col, mask)]
+    values = col.tolist()
+    mask = col.isna().to_numpy()
+    if mask.any():
+        for i in np.flatnonzero(mask):
+            values[i] = None
+    return _serialize_column(values)
+
+
 def _serialize_rows(df) -> List[List[Any]]:
-    """将DataFrame行数据序列化为JSON安全格式 — 小沈 2026-05-22"""
-    rows = df.values.tolist()
-    serialized_rows = []
-    for row in rows:
-        serialized_row = []
-        for val in row:
-            if pd.isna(val):
-                serialized_row.append(None)
-            elif hasattr(val, 'item'):
-                serialized_row.append(val.item())
-            elif hasattr(val, 'isoformat'):
-                serialized_row.append(val.isoformat())
-            else:
-                serialized_row.append(val)
-        serialized_rows.append(serialized_row)
-    return serialized_rows
+    """将DataFrame行数据序列化为JSON安全格式 — 小沈 2026-05-22
+       — 小欧 2026-10-17 改为逐列按 dtype 转换后 zip 转置(原逐行逐格 Python 判断); 整型列不再因 df.values 整表升格而变成浮点"""
+    if df.shape[1] == 0:
+        return [[] for _ in range(len(df))]
+    columns = [_serialize_series(df.iloc[:, i]) for i in range(df.shape[1])]
+    return [list(row) for row in zip(*columns)]
 
 
 def _load_dataframe(source: Union[str, List[Dict[str, Any]]], **kwargs):
     """统一加载DataFrame — 小沈 2026-05-22"""
+    import pandas as pd
     if isinstance(source, str):
         path = Path(source)
         if not path.exists():
@@ -721,10 +804,12 @@ FORMAT_DISPATCH = {
 
 
 from app.utils.file_utils import backup_file  # P5b: 迁入 utils, 此处 re-export — 小沈 2026-08-13
+from app.tools.toolhelper.db_engines import connect as db_connect
 
 
 def _get_connection(connection_type, connection_string=None, db_path=None, timeout=int(DEFAULT_TIMEOUT_SEC * 1000)):
-    """获取数据库连接,返回 (conn, engine_or_none, error_message) — 小欧 2026-06-24 从dataanalysis提取到公共helper"""
+    """获取数据库连接,返回 (conn, engine_or_none, error_message) — 小欧 2026-06-24 从dataanalysis提取到公共helper
+       — 小欧 2026-10-17 MySQL/PostgreSQL 从引擎注册表借连接(引擎进程内复用, 连接池 + pool_pre_ping 健康检查)"""
     try:
         if connection_type == "sqlite":
             if not db_path:
@@ -734,9 +819,9 @@ def _get_connection(connection_type, connection_string=None, db_path=None, timeo
             if not connection_string:
                 return None, None, f"错误:{connection_type} 需要提供 connection_string"
             try:
-                from sqlalchemy import create_engine
-                engine = create_engine(connection_string, connect_args={"timeout": timeout / 1000} if connection_type == "mysql" else {})
-                return engine.connect(), engine, None
+                conn = db_connect(connection_string, connect_args={"timeout": timeout / 1000} if connection_type == "mysql" else {},
+                                  pool_timeout=timeout / 1000)
+                return conn, conn.engine, None
             except ImportError:
                 return None, None, f"错误:{connection_type} 需要安装 sqlalchemy 和对应驱动"
             except Exception as e:
@@ -747,13 +832,11 @@ def _get_connection(connection_type, connection_string=None, db_path=None, timeo
         return None, None, f"获取连接失败: {str(e)}"
 
 
-def _close_connection(conn, engine=None):
-    """关闭数据库连接 — 小欧 2026-06-24 从dataanalysis提取到公共helper — 小欧 2026-06-28 修复silent swallow"""
+def _close_connection(conn):
+    """关闭数据库连接 — 小欧 2026-06-24 从dataanalysis提取到公共helper — 小欧 2026-06-28 修复silent swallow
+       — 小欧 2026-10-17 SQLAlchemy 连接 close() 即归还注册表引擎的连接池, engine 不再 dispose(由 db_engines 空闲淘汰/shutdown 统一回收)"""
     try:
-        if engine:
-            conn.close()
-            engine.dispose()
-        elif conn:
+        if conn:
             conn.close()
     except Exception as e:
         logger.warning(f"关闭数据库连接时出错: {e}")
@@ -805,6 +888,8 @@ __all__ = [
     "_check_python_available",
     "_check_node_available",
     "_serialize_rows",
+    "_serialize_column",
+    "_json_safe_value",
     "_load_dataframe",
     "parse_datetime_any",
     "parse_datetime_string",
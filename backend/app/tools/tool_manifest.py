@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: 工具注册清单(懒注册模式启动时的 schema 快照)
+#   【病根】ensure_tools_registered 启动即导入全部 10 个分类的注册模块, 连带全部工具实现(pandas/openpyxl/pdfplumber/
+#          python-docx/matplotlib 等); 每个工具注册时 _check_dependencies 还逐个检查依赖、缺失即同步 pip install;
+#          首个请求前全部付清(本机实测 ensure_tools_registered 25s, 其中 pip 重试占大头)
+#   【改法】①全量注册后把每个工具的 schema/描述/示例/确认标记/依赖 + 实现的 模块.限定名 落 ~/.omniagent/tool_manifest.json
+#          ②清单键 = app/ 源码指纹(各 .py 相对路径/大小/mtime_ns) + Python/pydantic 版本 + 平台; 源码或环境变化即失效, 回退全量注册并重写
+#          ③实现(或 failure_hint_fn/check_fn)不能按 模块.限定名 取回同一对象、或条目不能 JSON 化的分类不进清单(照旧全量导入)
+#          ④注册模块因缺第三方/平台模块(如非 Windows 的 winreg)导入失败的分类记入 unavailable, 该模块仍缺失时跳过, 不再每次启动重试
+#   【合规】SRP(只管清单读写与引用解析; 实现桩/延后依赖检查在 registry) + 清单缺失/损坏/不匹配一律回退全量注册, 不影响正确性
+"""
+tool_manifest — 工具注册清单(懒注册模式)
+
+调用约定(registry.ensure_tools_registered 内):
+    fingerprint = source_fingerprint()
+    manifest = load(fingerprint)                  # None = 无清单/不匹配, 全量注册
+    entry = tool_entry(metadata, implementation)  # None = 该工具不可入清单
+    save(fingerprint, categories, unavailable)
+清单格式:
+    {"format": 1, "fingerprint": "...", "categories": {"file": [条目, ...], ...}, "unavailable": {"win_registry": "winreg"}}
+"""
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pydantic
+
+from app.logger import logger
+from app.tools.tool_constants import TOOL_MANIFEST_FILENAME, TOOL_MANIFEST_FORMAT
+from app.tools.tool_types import ToolMetadata
+
+_MANIFEST_PATH = Path.home() / ".omniagent" / TOOL_MANIFEST_FILENAME
+_APP_ROOT = Path(__file__).resolve().parent.parent
+
+
+def resolve_ref(module: str, qualname: str) -> Any:
+    """按 模块.限定名 取回对象(必要时导入模块)"""
+    obj: Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def callable_ref(fn: Callable) -> Optional[Tuple[str, str]]:
+    """可按 模块.限定名 取回同一对象的可调用 → (模块, 限定名); lambda/闭包/被装饰改名的返回 None
+    懒注册实现桩(registry._lazy_implementation)带 __tool_ref__, 直接返回其目标, 不导入实现模块"""
+    ref = getattr(fn, "__tool_ref__", None)
+    if ref is not None:
+        return ref
+    module, qualname = getattr(fn, "__module__", None), getattr(fn, "__qualname__", "")
+    if not module or not qualname or "<" in qualname:
+        return None
+    try:
+        return (module, qualname) if resolve_ref(module, qualname) is fn else None
+    except Exception:
+        return None
+
+
+def module_missing(name: str) -> bool:
+    """模块当前是否仍不可导入(只查找不执行)"""
+    try:
+        return importlib.util.find_spec(name) is None
+    except (ImportError, ValueError):
+        return True
+
+
+def source_fingerprint() -> str:
+    """app/ 下全部 .py 的 (相对路径, 大小, mtime_ns) + 清单格式/Python/pydantic 版本 + 平台 → sha1"""
+    h = hashlib.sha1(f"{TOOL_MANIFEST_FORMAT}|{sys.version}|{sys.platform}|{pydantic.VERSION}\n".encode("utf-8"))
+    for dirpath, dirnames, filenames in os.walk(_APP_ROOT):
+        dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+        rel = os.path.relpath(dirpath, _APP_ROOT)
+        for name in sorted(filenames):
+            if name.endswith(".py"):
+                st = os.stat(os.path.join(dirpath, name))
+                h.update(f"{rel}/{name}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def tool_entry(metadata: ToolMetadata, implementation: Callable) -> Optional[Dict[str, Any]]:
+    """已注册工具 → 清单条目; 实现/钩子不可按引用取回或字段不能 JSON 化时返回 None"""
+    refs = {}
+    for key, fn in (("implementation", implementation), ("failure_hint_fn", metadata.failure_hint_fn),
+                    ("check_fn", metadata.check_fn)):
+        refs[key] = callable_ref(fn) if fn is not None else None
+        if fn is not None and refs[key] is None:
+            logger.info(f"[tool_manifest] 工具 {metadata.name} 的 {key} 不可按 模块.限定名 引用, 所在分类不进清单")
+            return None
+    entry = {
+        "name": metadata.name,
+        "description": metadata.description,
+        "category": metadata.category.value,
+        "version": metadata.version,
+        "input_schema": metadata.input_schema,
+        "examples": metadata.examples,
+        "expose_to_llm": metadata.expose_to_llm,
+        "needs_confirmation": metadata.needs_confirmation,
+        "action_confirmation": metadata.action_confirmation,
+        "dependencies": metadata.dependencies,
+        "is_async": inspect.iscoroutinefunction(implementation),
+        **refs,
+    }
+    try:
+        json.dumps(entry, ensure_ascii=False)
+    except (TypeError, ValueError) as e:
+        logger.info(f"[tool_manifest] 工具 {metadata.name} 条目不能 JSON 化, 所在分类不进清单: {e}")
+        return None
+    return entry
+
+
+def load(fingerprint: str) -> Optional[Dict[str, Any]]:
+    """读清单; 不存在/损坏/格式或指纹不匹配返回 None"""
+    try:
+        with open(_MANIFEST_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"[tool_manifest] 清单读取失败, 全量注册: {_MANIFEST_PATH}: {e}")
+        return None
+    if not isinstance(data, dict) or data.get("format") != TOOL_MANIFEST_FORMAT or data.get("fingerprint") != fingerprint:
+        logger.info("[tool_manifest] 清单与当前源码/环境不匹配, 全量注册后重写")
+        return None
+    return data
+
+
+def save(fingerprint: str, categories: Dict[str, List[Dict[str, Any]]], unavailable: Dict[str, str]) -> None:
+    """写清单(先写临时文件再替换); 失败只记日志, 下次启动照旧全量注册"""
+    data = {"format": TOOL_MANIFEST_FORMAT, "fingerprint": fingerprint,
+            "categories": categories, "unavailable": unavailable}
+    tmp = _MANIFEST_PATH.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        _MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, _MANIFEST_PATH)
+    except OSError as e:
+        logger.warning(f"[tool_manifest] 清单写入失败: {_MANIFEST_PATH}: {e}")
+        tmp.unlink(missing_ok=True)
+        return
+    logger.info(f"[tool_manifest] 清单已写入: {sum(map(len, categories.values()))}个工具, "
+                f"{len(categories)}个分类, 不可用分类 {unavailable or '无'}")
@@ -0,0 +1,429 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: 可终止的工具进程池(ToolProcessPool) — 重型/易卡死工具隔离执行
+#   【病根】ToolRetryEngine._execute_tool_once 对同步工具走 asyncio.to_thread + wait_for, 保险丝超时只放弃了 await,
+#          线程里的 grep/PDF 解析/pandas 仍跑到结束(线程不可杀); 反复超时会累积忙线程与内存, 拖垮默认线程池
+#   【改法】①opt-in(config tools.isolated_execution.enabled), 按路由表把重型工具派到常驻 spawn 工作进程执行
+#          ②超时/取消 → terminate(宽限后 kill)该工作进程, 槽位立即归还, 后台补一个新进程保持预热
+#          ③工作进程执行满 TOOL_PROCESS_POOL_MAX_TASKS_PER_WORKER 次退役重建(防解析库内存只涨不降)
+#          ④指标: 饱和度/排队等待/击杀次数(原因 timeout/cancel/crash), stats() 供 GET /metrics/tool_process_pool
+#   【合规】SRP(只管工作进程生命周期与调用转发, 不碰重试/保险丝计算) + 默认关闭; 未命中路由或实现不可跨进程引用的工具原样走线程
+# 2026-10-17 - 小欧 - 模块.限定名 引用/解析改用 tool_manifest.callable_ref/resolve_ref(与懒注册清单共用);
+#   懒注册实现桩按其目标引用路由, 主进程不为判路由导入实现模块
+#   (补回 import importlib: 工作进程预导入仍按模块名 import_module, 缺失时预导入全部 NameError 被吞成警告; scripts/check_tool_process_pool.py)
+# 2026-10-17 - 小欧 - _acquire 冷启动补进程改在池线程执行
+#   【病根】空闲队列为空时 _acquire 在协程内直接 _new_worker(): spawn 起进程 + 管道握手同步阻塞事件循环(数十到数百毫秒),
+#          期间所有请求/流式输出停摆
+#   【改法】冷启动提交到池线程起进程, 协程 await wrap_future; 等待期间调用被取消则槽位立即归还,
+#          已起好的进程(挂在 concurrent Future 上, 不随 asyncio 侧取消丢失)按容量入空闲队列或回收
+"""
+tool_process_pool — 工具进程池(可终止的隔离执行)
+
+由 ToolRetryEngine._execute_tool_once 调用:
+    if tool_process_pool.routes(action, tool):
+        return await tool_process_pool.run(action, tool, params, timeout)
+
+路由: TOOL_PROCESS_POOL_DEFAULT_ROUTES 为默认走进程池的工具; config 可逐工具覆盖:
+    tools:
+      isolated_execution:
+        enabled: true
+        workers: 2                 # 常驻工作进程数(启动时读取, 修改需重启)
+        routes:
+          grep: process
+          read_xlsx: thread
+
+工作进程以 spawn 方式启动(与平台无关, 不继承主进程线程/锁状态), 按 模块+限定名 导入工具实现后执行;
+async 工具在工作进程内 asyncio.run。请求作用域的 task_id 随请求带入; 入口注入的安全 hooks 不跨进程,
+依赖 hooks 记录操作的工具(compress 等)不应路由到进程池。
+"""
+
+import asyncio
+import atexit
+import importlib
+import inspect
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import get_config
+from app.logger import logger
+from app.monitoring import record_metric
+from app.tools.context import get_current_task_id, set_current_task_id
+from app.tools.tool_manifest import callable_ref, resolve_ref
+from app.tools.tool_constants import (
+    TOOL_PROCESS_POOL_DEFAULT_ROUTES, TOOL_PROCESS_POOL_WORKERS,
+    TOOL_PROCESS_POOL_MAX_TASKS_PER_WORKER, TOOL_PROCESS_POOL_KILL_GRACE,
+    TOOL_PROCESS_POOL_ACQUIRE_POLL,
+)
+
+_KILL_REASONS = ("timeout", "cancel", "crash")
+
+
+# ── 工作进程侧(spawn 子进程内执行) ─────────────────────────
+
+def _worker_main(conn, preload: Tuple[str, ...]) -> None:
+    """工作进程主循环: 预导入工具模块 → 逐个执行请求; 收到 None 或管道断开(主进程退出)即退出"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C 由主进程统一收尾
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f"[ToolProcessPool] 工作进程预导入失败: {module}: {e}")
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        module, qualname, params, task_id = request
+        try:
+            if task_id:
+                set_current_task_id(task_id)
+            result = resolve_ref(module, qualname)(**params)
+            if inspect.iscoroutine(result):
+                result = asyncio.run(result)
+            reply = (True, result)
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # 结果/异常对象不可 pickle: send 先序列化后写管道, 失败不会写出半包
+            conn.send((False, RuntimeError(f"工具结果无法跨进程传回: {type(e).__name__}: {e}")))
+
+
+# ── 主进程侧 ───────────────────────────────────────────────
+
+class _Worker:
+    """单个常驻工作进程 + 主进程侧管道端 — 小欧 2026-10-17"""
+
+    __slots__ = ("process", "conn", "tasks")
+
+    def __init__(self, ctx, preload: Tuple[str, ...]):
+        parent_conn, child_conn = ctx.Pipe(duplex=True)
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, preload), name="omni-tool-worker")
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.tasks = 0
+
+    def call(self, request: tuple) -> Tuple[bool, Any]:
+        """发请求并阻塞等回复(在池的收发线程内执行); 进程被杀/崩溃时管道断开抛 EOFError/OSError"""
+        self.conn.send(request)
+        return self.conn.recv()
+
+    def kill(self) -> None:
+        """terminate, 宽限 TOOL_PROCESS_POOL_KILL_GRACE 秒仍未退出则 kill"""
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(TOOL_PROCESS_POOL_KILL_GRACE)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join(TOOL_PROCESS_POOL_KILL_GRACE)
+
+    def retire(self) -> None:
+        """正常退役: 通知退出并回收, 不退出则 kill"""
+        try:
+            self.conn.send(None)
+            self.process.join(TOOL_PROCESS_POOL_KILL_GRACE)
+        except (OSError, ValueError):
+            pass
+        self.kill()
+        self.conn.close()
+
+
+def _load_settings() -> Tuple[bool, int, Dict[str, bool]]:
+    """读 config tools.isolated_execution → (enabled, workers, {tool: 是否走进程池}); 配置不可用视为关闭"""
+    try:
+        section = get_config().get("tools.isolated_execution", None) or {}
+    except Exception:
+        return False, TOOL_PROCESS_POOL_WORKERS, {}
+    if not isinstance(section, dict):
+        return False, TOOL_PROCESS_POOL_WORKERS, {}
+    workers = section.get("workers", TOOL_PROCESS_POOL_WORKERS)
+    if not isinstance(workers, int) or workers < 1:
+        workers = TOOL_PROCESS_POOL_WORKERS
+    routes = section.get("routes") or {}
+    overrides = {str(k): str(v).lower() == "process" for k, v in routes.items()} if isinstance(routes, dict) else {}
+    return bool(section.get("enabled", False)), workers, overrides
+
+
+class ToolProcessPool:
+    """常驻工作进程池: 一个槽位同一时刻只服务一个工具调用, 超时/取消即杀进程 — 小欧 2026-10-17
+
+    状态由 threading.Lock 保护(与 ShellPoolManager 一致, 不绑定事件循环);
+    管道收发与杀进程在池自有线程池执行, 不占用 asyncio.to_thread 默认线程池。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ctx = multiprocessing.get_context("spawn")
+        self._size = 0  # 首次启动时按配置定容
+        self._idle: List[_Worker] = []
+        self._all: set = set()
+        self._busy = 0
+        self._spawning = 0
+        self._waiting = 0
+        self._closed = False
+        self._preload: set = set()  # 路由过的工具实现所在模块, 新工作进程预导入
+        self._refs: Dict[Callable, Optional[Tuple[str, str]]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._counters = {"tasks": 0, "spawned": 0, "recycled": 0, "peak_busy": 0,
+                          "kills": dict.fromkeys(_KILL_REASONS, 0)}
+
+    # ── 路由 ───────────────────────────────────────────────
+
+    def routes(self, action: str, tool: Callable) -> bool:
+        """该次调用是否走进程池: 开关打开 + 路由命中 + 实现可按 模块.限定名 跨进程引用"""
+        enabled, _workers, overrides = _load_settings()
+        if not enabled or not overrides.get(action, action in TOOL_PROCESS_POOL_DEFAULT_ROUTES):
+            return False
+        return self._ref_of(tool) is not None
+
+    def _ref_of(self, tool: Callable) -> Optional[Tuple[str, str]]:
+        if tool not in self._refs:
+            ref = callable_ref(tool)
+            if ref is None:
+                logger.info(f"[ToolProcessPool] 工具实现不可跨进程引用, 走线程执行: "
+                            f"{getattr(tool, '__module__', None)}.{getattr(tool, '__qualname__', '')}")
+            self._refs[tool] = ref
+        return self._refs[tool]
+
+    # ── 生命周期 ───────────────────────────────────────────
+
+    def warm_up(self) -> int:
+        """按配置定容并预启动全部工作进程(应用启动时调用; 未开启返回 0)"""
+        enabled, workers, _overrides = _load_settings()
+        if not enabled:
+            return 0
+        self._ensure_started(workers)
+        started = 0
+        while self._spawn_idle():
+            started += 1
+        logger.info(f"[ToolProcessPool] 预热完成: {started} 个工作进程, 容量={self._size}")
+        return started
+
+    def _ensure_started(self, workers: Optional[int] = None) -> None:
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._size = workers or _load_settings()[1]
+            self._closed = False
+            # 收发线程每槽一个 + 杀进程/补进程余量
+            self._executor = ThreadPoolExecutor(max_workers=self._size * 2 + 2,
+                                                thread_name_prefix="tool-proc-pool")
+
+    def _new_worker(self) -> _Worker:
+        worker = _Worker(self._ctx, tuple(sorted(self._preload)))
+        with self._lock:
+            self._all.add(worker)
+            self._counters["spawned"] += 1
+        return worker
+
+    def _spawn_idle(self) -> bool:
+        """有空余容量时补一个预热进程入空闲队列; 已满/已关闭返回 False"""
+        with self._lock:
+            if self._closed or self._busy + len(self._idle) + self._spawning >= self._size:
+                return False
+            self._spawning += 1
+        try:
+            worker = self._new_worker()
+        except Exception as e:
+            logger.error(f"[ToolProcessPool] 启动工作进程失败: {e}")
+            with self._lock:
+                self._spawning -= 1
+            return False
+        with self._lock:
+            self._spawning -= 1
+            if not self._closed:
+                self._idle.append(worker)
+                return True
+        self._drop(worker)
+        return False
+
+    def _drop(self, worker: _Worker, fut: Optional[Future] = None) -> None:
+        """杀掉并注销工作进程(池线程内执行); 收发线程结束后再关管道, 不在阻塞读期间关 fd"""
+        worker.kill()
+        with self._lock:
+            self._all.discard(worker)
+        if fut is None:
+            worker.conn.close()
+        else:
+            fut.add_done_callback(lambda _f: worker.conn.close())
+
+    def shutdown(self) -> None:
+        """关闭全部工作进程(应用 shutdown + atexit 安全网)"""
+        with self._lock:
+            self._closed = True
+            workers = list(self._all)
+            self._all.clear()
+            self._idle.clear()
+            executor, self._executor = self._executor, None
+        for worker in workers:
+            try:
+                worker.retire()
+            except Exception as e:
+                logger.debug(f"[ToolProcessPool] 关闭工作进程失败: {e}")
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ── 执行 ───────────────────────────────────────────────
+
+    async def _acquire(self, action: str, deadline: float) -> _Worker:
+        """占一个槽位并取工作进程; 池满则轮询等待到 deadline(超时抛 TimeoutError, 不杀任何进程)"""
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        waiting = False
+        try:
+            while True:
+                with self._lock:
+                    if self._busy < self._size:
+                        self._busy += 1
+                        busy = self._busy
+                        self._counters["peak_busy"] = max(self._counters["peak_busy"], busy)
+                        worker = self._idle.pop() if self._idle else None
+                        break
+                    if not waiting:
+                        waiting = True
+                        self._waiting += 1
+                if loop.time() >= deadline:
+                    raise asyncio.TimeoutError(f"工具进程池已满({self._size}), 等待空闲工作进程超时: {action}")
+                await asyncio.sleep(TOOL_PROCESS_POOL_ACQUIRE_POLL)
+        finally:
+            if waiting:
+                with self._lock:
+                    self._waiting -= 1
+        record_metric("tool_process_pool_saturation", busy / self._size, {"tool": action})
+        if waiting:
+            record_metric("tool_process_pool_wait_seconds", loop.time() - t0, {"tool": action})
+        if worker is not None and worker.process.is_alive():
+            return worker
+        if worker is not None:
+            self._executor.submit(self._drop, worker)
+        # 冷启动: 空闲队列为空(预热未完成/被击杀后补进程未就绪); spawn 阻塞, 放池线程执行
+        spawn = self._executor.submit(self._new_worker)
+        try:
+            return await asyncio.wrap_future(spawn)
+        except asyncio.CancelledError:
+            self._release_slot()
+            spawn.add_done_callback(self._adopt_spawned)
+            raise
+        except BaseException:
+            self._release_slot()
+            raise
+
+    def _adopt_spawned(self, spawn: Future) -> None:
+        """冷启动等待中调用被取消: 已起好的进程有空余容量则入空闲队列, 否则回收"""
+        if spawn.cancelled() or spawn.exception() is not None:
+            return
+        worker = spawn.result()
+        with self._lock:
+            if not self._closed and self._busy + len(self._idle) + self._spawning < self._size:
+                self._idle.append(worker)
+                return
+            executor = self._executor
+        if executor is not None:
+            executor.submit(self._drop, worker)
+        else:
+            self._drop(worker)
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self._busy -= 1
+
+    def _give_back(self, worker: _Worker) -> None:
+        """调用正常结束: 计数, 满额退役重建, 否则放回空闲队列"""
+        worker.tasks += 1
+        recycle = worker.tasks >= TOOL_PROCESS_POOL_MAX_TASKS_PER_WORKER
+        with self._lock:
+            self._busy -= 1
+            self._counters["tasks"] += 1
+            if recycle:
+                self._counters["recycled"] += 1
+                self._all.discard(worker)
+            elif not self._closed:
+                self._idle.append(worker)
+                return
+        if recycle:
+            self._executor.submit(self._recycle, worker)
+
+    def _recycle(self, worker: _Worker) -> None:
+        worker.retire()
+        self._spawn_idle()
+
+    def _kill(self, worker: _Worker, fut: Future, action: str, reason: str) -> None:
+        """超时/取消/崩溃: 归还槽位 + 记指标, 杀进程与补进程交给池线程(不阻塞事件循环)"""
+        with self._lock:
+            self._busy -= 1
+            self._counters["kills"][reason] += 1
+        record_metric("tool_process_pool_kills_total", 1, {"tool": action, "reason": reason})
+        logger.warning(f"[ToolProcessPool] 击杀工作进程: tool={action} reason={reason} pid={worker.process.pid}")
+
+        def _kill_and_replace():
+            self._drop(worker, fut)
+            self._spawn_idle()
+
+        if self._executor is not None:
+            self._executor.submit(_kill_and_replace)
+
+    async def run(self, action: str, tool: Callable, params: Dict[str, Any], timeout: float) -> Any:
+        """在工作进程中执行工具; timeout 覆盖排队+执行, 超时抛 asyncio.TimeoutError(与 wait_for 保险丝同型)
+
+        工具抛出的异常原样在主进程重抛(分类/重试逻辑不变)。
+        """
+        self._ensure_started()
+        module, qualname = self._ref_of(tool)
+        with self._lock:
+            self._preload.add(module)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        worker = await self._acquire(action, deadline)
+        fut = self._executor.submit(worker.call, (module, qualname, params, get_current_task_id()))
+        try:
+            ok, payload = await asyncio.wait_for(asyncio.wrap_future(fut), timeout=max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            self._kill(worker, fut, action, "timeout")
+            raise
+        except asyncio.CancelledError:
+            self._kill(worker, fut, action, "cancel")
+            raise
+        except (EOFError, OSError) as e:
+            self._kill(worker, fut, action, "crash")
+            raise RuntimeError(f"工具工作进程异常退出(进程崩溃或被外部终止): {type(e).__name__}") from e
+        self._give_back(worker)
+        if ok:
+            return payload
+        raise payload
+
+    def stats(self) -> Dict[str, Any]:
+        """池观测: 容量/空闲/占用/排队/饱和度/累计执行/进程启动/退役/击杀(按原因)"""
+        enabled, workers, overrides = _load_settings()
+        with self._lock:
+            size = self._size or workers
+            routed = sorted(n for n in set(TOOL_PROCESS_POOL_DEFAULT_ROUTES) | set(overrides)
+                            if overrides.get(n, n in TOOL_PROCESS_POOL_DEFAULT_ROUTES))
+            return {
+                "enabled": enabled,
+                "size": size,
+                "alive": sum(1 for w in self._all if w.process.is_alive()),
+                "idle": len(self._idle),
+                "busy": self._busy,
+                "waiting": self._waiting,
+                "saturation": round(self._busy / size, 3) if size else 0.0,
+                "tasks": self._counters["tasks"],
+                "spawned": self._counters["spawned"],
+                "recycled": self._counters["recycled"],
+                "peak_busy": self._counters["peak_busy"],
+                "kills": dict(self._counters["kills"]),
+                "routes": routed,
+            }
+
+
+tool_process_pool = ToolProcessPool()
+
+
+atexit.register(tool_process_pool.shutdown)
@@ -59,6 +59,8 @@
 #   首个含 min/max 的成员, 消除"anyOf[0] 恰为 null 分支则取不到边界"的顺序依赖;
 #   #3 clamp 门控废除顶层 type 判定(数组形式如 ["integer","null"] 时 if _t=="integer" 整段跳过,
 #   clamp 全程失效), 改为"能取到数值边界即钳制", 并补 isinstance(v,(int,float)) 防类型不可比较异常
+# 2026-10-17 - 小欧 - 隔离执行接入: _execute_tool_once 新增 action 参数, 命中 tool_process_pool 路由的工具
+#   派到可终止工作进程执行(保险丝超时/取消即杀进程, 不再遗留忙线程); 未开启/未命中路由行为不变
 """
 统一工具重试引擎 — 工具的外部重试机制
 
@@ -88,6 +90,7 @@ from app.tools.tool_constants import (
 from app.tools.tool_response import build_error
 from app.tools.tools_alias_mapper import normalize_params
 from app.tools.registry import tool_registry
+from app.tools.tool_process_pool import tool_process_pool
 
 # ============================================================
 # 保险丝超时策略 — 设计逻辑（北京老陈 2026-07-30）
@@ -162,7 +165,7 @@ class ToolRetryEngine:
         self._tools = tools
     
     async def _execute_tool_once(self, tool: Callable, normalized_input: Dict[str, Any], 
-                                timeout: float) -> Any:
+                                timeout: float, action: str = "") -> Any:
         """
         统一单次工具调用 — 小沈 2026-06-08 重构
         小健 2026-06-18 内联_is_async_tool/_execute_async_tool/_execute_sync_tool
@@ -171,7 +174,11 @@ class ToolRetryEngine:
         参数说明(两条超时线交汇点, 北京老陈 2026-08-06 10:05:21):
           normalized_input 是校验后参数, 内含 timeout 则随 tool(**normalized_input) 原样传给 tool(①线);
           timeout 参数是保险丝(②线), 仅用于 asyncio.wait_for 掐整个调用, 不传给 tool 本身。
+        隔离执行(小欧 2026-10-17): 命中 tool_process_pool 路由的工具在工作进程中执行, 保险丝由进程池
+          按同一 timeout 计时, 超时/取消杀掉工作进程(线程无法被杀), 同样抛 asyncio.TimeoutError。
         """
+        if tool_process_pool.routes(action, tool):
+            return await tool_process_pool.run(action, tool, normalized_input, timeout)
         if inspect.iscoroutinefunction(tool):
             return await asyncio.wait_for(tool(**normalized_input), timeout=timeout)
         result = await asyncio.wait_for(
@@ -316,7 +323,7 @@ class ToolRetryEngine:
         _, _, _, base_timeout = self._get_retry_config(action)
         timeout = self._compute_fuse(action, params_or_error, base_timeout, 0)
         try:
-            result = await self._execute_tool_once(tool, params_or_error, timeout)
+            result = await self._execute_tool_once(tool, params_or_error, timeout, action)
             if isinstance(result, dict):
                 result.setdefault("other_data", {})["retry_count"] = 0
             return result
@@ -540,7 +547,7 @@ class ToolRetryEngine:
                 except Exception as cb_err:
                     logger.warning(f"[Retry][L3] on_retry_started回调异常: {cb_err}")
             try:
-                result = await self._execute_tool_once(tool, params, timeout)
+                result = await self._execute_tool_once(tool, params, timeout, action)
                 if isinstance(result, dict):
                     other = result.get("other_data", {})
                     if not isinstance(other, dict):
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# 编辑历史:
+# 2026-10-17 - 小欧 - 新建: searchtool 的 BM25 倒排索引(随 ToolRegistry.register/unregister 增量维护)
+#   【病根】searchtool 每次查询 _build_bm25 把全部工具描述重新分词、重算文档频率, _bm25_scores 再给每个文档建 Counter,
+#          每个查询词遍历全部工具; 工具数上千时单次查询几十毫秒, 全花在与查询无关的文档上
+#   【改法】①倒排表 词 → {工具名: 词频}, 另存各文档长度与总长度; 注册/更新/注销时只重算该工具一条文档
+#          ②查询只遍历查询词自身的 postings; 打分公式、查询词去重顺序、累加顺序与旧实现逐项相同, 浮点结果逐位一致
+#          ③每个工具记首次注册序号: 同分时按注册顺序排(= 旧实现对全部工具稳定排序的结果), 更新描述不改序号
+#   【合规】SRP(只管"分词 + 倒排索引 + 打分", 阈值/分类保底/返回构建仍在 tool_search) + 排序与旧实现一致(scripts/check_tool_search_index.py 差分校验)
+"""
+tool_search_index — 工具检索分词与 BM25 倒排索引
+
+调用约定:
+    index.upsert(name, description)   # 注册/更新(ToolRegistry 内部调用)
+    index.remove(name)                # 注销
+    index.scores(tokenize(query))     # {工具名: BM25 分数}, 只含命中工具, 按注册顺序
+"""
+import math
+import threading
+from collections import Counter
+from typing import Dict, List
+
+
+def tokenize(text: str) -> List[str]:
+    """中英混合分词：中文按词组切分，英文按词切分，统一小写 — 小沈 2026-06-14
+    小欧 2026-08-05 修复: 中文≥2字只生成bigram去单字; =1字保留单字(词不拆字)
+    小欧 2026-10-17: 自 tool_search._tokenize 迁入(索引与查询共用)
+    """
+    tokens: List[str] = []
+    buf: List[str] = []
+    chinese_buf: List[str] = []
+    for ch in text.lower():
+        if '\u4e00' <= ch <= '\u9fff':
+            if buf:
+                tokens.append("".join(buf))
+                buf.clear()
+            chinese_buf.append(ch)
+        else:
+            if chinese_buf:
+                # 中文片段收尾: ≥2字生成bigram, =1字保留单字 — 小欧 2026-08-05
+                if len(chinese_buf) >= 2:
+                    for i in range(len(chinese_buf) - 1):
+                        tokens.append(chinese_buf[i] + chinese_buf[i + 1])
+                else:
+                    tokens.append(chinese_buf[0])
+                chinese_buf.clear()
+            if ch == '_':
+                if buf:
+                    tokens.append("".join(buf))
+                    buf.clear()
+            elif ch.isalnum():
+                buf.append(ch)
+            else:
+                if buf:
+                    tokens.append("".join(buf))
+                    buf.clear()
+    if chinese_buf:
+        # 中文片段收尾: ≥2字生成bigram, =1字保留单字 — 小欧 2026-08-05
+        if len(chinese_buf) >= 2:
+            for i in range(len(chinese_buf) - 1):
+                tokens.append(chinese_buf[i] + chinese_buf[i + 1])
+        else:
+            tokens.append(chinese_buf[0])
+    if buf:
+        tokens.append("".join(buf))
+    return tokens
+
+
+def tool_document(name: str, description: str) -> List[str]:
+    """工具的检索文档: 工具名重复 3 次加权 + 描述"""
+    return tokenize(" ".join([name] * 3) + " " + description)
+
+
+class ToolSearchIndex:
+    """BM25 倒排索引: 词 → {工具名: 词频}, 增量维护"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, List[str]] = {}  # 工具名 → 该文档的去重词表(注销/更新时按此删 postings)
+        self._doc_len: Dict[str, int] = {}
+        self._order: Dict[str, int] = {}  # 工具名 → 首次注册序号
+        self._total_len = 0
+        self._next_order = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def upsert(self, name: str, description: str) -> None:
+        """注册/更新工具文档; 已存在时保留注册序号"""
+        tf = Counter(tool_document(name, description))
+        with self._lock:
+            self._drop_locked(name)
+            for term, count in tf.items():
+                self._postings.setdefault(term, {})[name] = count
+            self._doc_terms[name] = list(tf)
+            doc_len = sum(tf.values())
+            self._doc_len[name] = doc_len
+            self._total_len += doc_len
+            if name not in self._order:
+                self._order[name] = self._next_order
+                self._next_order += 1
+
+    def remove(self, name: str) -> None:
+        """注销工具文档(不存在则忽略)"""
+        with self._lock:
+            if self._drop_locked(name):
+                del self._order[name]
+
+    def _drop_locked(self, name: str) -> bool:
+        terms = self._doc_terms.pop(name, None)
+        if terms is None:
+            return False
+        for term in terms:
+            posting = self._postings[term]
+            del posting[name]
+            if not posting:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(name)
+        return True
+
+    def scores(self, query_tokens: List[str], k1: float = 1.5, b: float = 0.75) -> Dict[str, float]:
+        """Okapi BM25: 只遍历查询词的 postings; 返回命中工具 {工具名: 分数}, 按注册顺序"""
+        with self._lock:
+            N = len(self._doc_len)
+            if N == 0:
+                return {}
+            avgdl = self._total_len / max(N, 1)
+            scores: Dict[str, float] = {}
+            for term in dict.fromkeys(query_tokens):  # 查询词去重保序(同旧实现累加顺序)
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                n = len(posting)
+                idf = math.log((N - n + 0.5) / (n + 0.5) + 1.0)
+                for name, tf in posting.items():
+                    doc_len = self._doc_len[name]
+                    scores[name] = scores.get(name, 0.0) + idf * (tf * (k1 + 1)) / (tf + k1 * (1 - b + b * doc_len / avgdl))
+            order = self._order
+            return {name: scores[name] for name in sorted(scores, key=order.__getitem__)}
+
+
+__all__ = ["tokenize", "tool_document", "ToolSearchIndex"]
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+编辑历史:
+- 2026-10-17 小欧 新建: 从 grep_engine 抽出并行进程池(DRY), grep 并行扫描与 read_pdf 整本并行提取共用
+CPU 密集型工具共用的 spawn 进程池 — 小欧 2026-10-17
+
+设计原则:
+- 懒创建、进程内复用一个 ProcessPoolExecutor(spawn: 不继承主进程线程/锁状态); 进程数 min(CPU数, TOOL_CPU_POOL_MAX_WORKERS)。
+- 单核机器, 或本身已在工具工作进程(tool_process_pool)内执行时 cpu_workers() 返回 1, 调用方应顺序执行, 不嵌套建池。
+- 提交的函数必须是模块级可导入函数, 参数/返回值可 pickle。
+- 池异常退出(BrokenProcessPool)由调用方 discard_cpu_pool() 丢弃, 下次自动重建。
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.tools.tool_constants import TOOL_CPU_POOL_MAX_WORKERS
+
+_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def cpu_workers() -> int:
+    """可用并行进程数; 1 表示应顺序执行"""
+    if multiprocessing.parent_process() is not None:
+        return 1
+    return max(1, min(os.cpu_count() or 1, TOOL_CPU_POOL_MAX_WORKERS))
+
+
+def get_cpu_pool() -> ProcessPoolExecutor:
+    """取共用进程池(首次调用时创建)"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=cpu_workers(), mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def discard_cpu_pool(broken: ProcessPoolExecutor) -> None:
+    """丢弃已损坏的进程池(仅当它仍是当前池时), 下次 get_cpu_pool 重建"""
+    global _executor
+    with _lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_cpu_pool() -> None:
+    """关闭共用进程池(进程退出时 concurrent.futures 亦会自行回收)"""
+    global _executor
+    with _lock:
+        ex, _executor = _executor, None
+    if ex is not None:
+        ex.shutdown(wait=False, cancel_futures=True)
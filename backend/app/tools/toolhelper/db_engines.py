@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+编辑历史:
+- 2026-10-17 小欧 新建: query_sql/execute_sql/get_db_schema 共用的 SQLAlchemy 引擎注册表
+- 2026-10-17 小欧 修复: 并发首建同一 key 时后来者的引擎未 dispose(注释称"随连接归还后回收", 实际引擎不入册也无人 dispose, 池与连接泄漏);
+  改为后来者归还自己的连接并 dispose 自己的引擎, 再从先入册的引擎借连接
+数据库工具 SQLAlchemy 引擎注册表 — 小欧 2026-10-17
+
+设计原则:
+- 原 _get_connection 每次 create_engine、_close_connection 随即 dispose, 连接池形同虚设, 每次调用都重新 TCP 握手 + 认证。
+- 现按 (connection_string, connect_args) 进程内复用一个引擎: QueuePool(DB_ENGINE_POOL_SIZE + DB_ENGINE_MAX_OVERFLOW),
+  pool_pre_ping 借出前探活(服务端重启/断连自动换新连接), pool_recycle 定期重连。
+- 连接 close() 即归还连接池(SQLAlchemy 归还时回滚未提交事务, 调用间不串事务状态)。
+- 每次借连接时顺带清理: 无借出且空闲超 DB_ENGINE_IDLE_TIMEOUT 的引擎 dispose; 引擎数超 DB_ENGINE_MAX_ENGINES 时淘汰最久未用的空闲引擎。
+- 建连失败的新引擎不入册(凭据错误/库不可达不占注册表)。
+- 并发首建同一 key: 先入册者胜, 后来者 dispose 自己的引擎并改从胜者借连接(每个 key 只留一个引擎)。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.monitoring import record_metric
+from app.tools.tool_constants import (
+    DB_ENGINE_POOL_SIZE, DB_ENGINE_MAX_OVERFLOW, DB_ENGINE_POOL_RECYCLE, DB_ENGINE_IDLE_TIMEOUT, DB_ENGINE_MAX_ENGINES,
+)
+from app.logger import logger
+
+_engines: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()  # key → {"engine", "last_used", "connects"}
+_lock = threading.Lock()
+_counters = {"created": 0, "reused": 0, "evicted": 0, "connect_failed": 0}
+
+
+def _event(event: str) -> None:
+    _counters[event] += 1
+    record_metric("db_engine_events_total", 1, {"event": event})
+
+
+def _in_use(engine) -> bool:
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return bool(checkedout()) if checkedout else False
+
+
+def _sweep(now: float, keep: tuple) -> List[Any]:
+    """持锁调用: 摘除空闲超时 / 超上限的空闲引擎(本次要用的 keep 除外), 返回待 dispose 的引擎(锁外 dispose)"""
+    doomed = []
+    for key in list(_engines):
+        if key == keep:
+            continue
+        item = _engines[key]
+        over_limit = len(_engines) > DB_ENGINE_MAX_ENGINES
+        if (over_limit or now - item["last_used"] > DB_ENGINE_IDLE_TIMEOUT) and not _in_use(item["engine"]):
+            doomed.append(_engines.pop(key)["engine"])
+    return doomed
+
+
+def _dispose(doomed: List[Any]) -> None:
+    for old in doomed:
+        _event("evicted")
+        old.dispose()
+
+
+def connect(connection_string: str, connect_args: Optional[Dict[str, Any]] = None, pool_timeout: float = 30.0):
+    """从注册表取(或新建)引擎并借出一个连接; 调用方 close() 即归还连接池。异常(ImportError/连接失败)原样抛出"""
+    from sqlalchemy import create_engine  # 未安装时 ImportError 交给调用方
+
+    connect_args = connect_args or {}
+    key = (connection_string, tuple(sorted(connect_args.items())))
+    now = time.monotonic()
+    with _lock:
+        item = _engines.get(key)
+        if item is not None:
+            _engines.move_to_end(key)
+            item["last_used"] = now
+        doomed = _sweep(now, key)
+    _dispose(doomed)
+
+    if item is not None:
+        _event("reused")
+        item["connects"] += 1
+        return item["engine"].connect()
+
+    engine = create_engine(
+        connection_string, connect_args=connect_args,
+        pool_size=DB_ENGINE_POOL_SIZE, max_overflow=DB_ENGINE_MAX_OVERFLOW,
+        pool_timeout=pool_timeout, pool_recycle=DB_ENGINE_POOL_RECYCLE, pool_pre_ping=True,
+    )
+    try:
+        conn = engine.connect()
+    except Exception:
+        _event("connect_failed")
+        engine.dispose()
+        raise
+    with _lock:
+        winner = _engines.get(key)
+        if winner is None:
+            _engines[key] = {"engine": engine, "last_used": now, "connects": 1}
+        else:  # 并发首建: 先入册者胜
+            _engines.move_to_end(key)
+            winner["last_used"] = now
+        doomed = _sweep(now, key)
+    _dispose(doomed)
+    if winner is None:
+        _event("created")
+        return conn
+
+    # 后来者: 归还连接并 dispose 自己的引擎(不计 evicted, 从未入册), 改从胜者借连接
+    conn.close()
+    engine.dispose()
+    _event("reused")
+    winner["connects"] += 1
+    return winner["engine"].connect()
+
+
+def dispose_engines() -> None:
+    """dispose 全部引擎(应用 shutdown 调用)"""
+    with _lock:
+        engines = [item["engine"] for item in _engines.values()]
+        _engines.clear()
+    for engine in engines:
+        try:
+            engine.dispose()
+        except Exception as e:
+            logger.warning(f"[db_engines] dispose 引擎异常: {e}")
+
+
+def engine_stats() -> Dict[str, Any]:
+    """注册表观测: 计数(新建/复用/淘汰/建连失败) + 每个引擎(隐藏密码的 URL/借出数/池内空闲数/借连接次数/空闲秒数)"""
+    now = time.monotonic()
+    with _lock:
+        items = list(_engines.values())
+    engines = []
+    for item in items:
+        engine, pool = item["engine"], item["engine"].pool
+        engines.append({
+            "url": engine.url.render_as_string(hide_password=True),
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "pooled": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "connects": item["connects"],
+            "idle_seconds": round(now - item["last_used"], 1),
+        })
+    return {**_counters, "engines": engines}
@@ -28,6 +28,8 @@ Safety层（services/safety/tool_safety_checker.py + path_safe_check.py）独立
    【病根】Path(file_path).suffix 对 "x.tar.gz" 仅返回 ".gz", 致 ARCHIVE_EXTENSIONS 里的 .tar.gz/.tar.bz2 永不可命中,
    get_file_category 返回 "unknown"、check_file_type(archive) 误判非法
    【解决】_check_archive_file 与 get_file_category 增加 endswith 全串匹配, 复合后缀优先
+2026-10-17 小欧 拆出 _detect_binary_bytes(对已读入的首块字节判定), _detect_binary_content 改为读首块后调用它;
+   grep_engine 已 mmap/读入整个文件, 直接对缓冲首 8KB 判定, 不再为探测单独 open 一次
 """
 from pathlib import Path
 from typing import Tuple, Optional, Literal
@@ -41,6 +43,9 @@ from app.tools.validate.file_safety_checker import check_tool_module
 # 文件类型分类定义
 # ============================================================
 
+# 二进制内容探测读取的首块字节数 — 小欧 2026-10-17 (原 _detect_binary_content 内联 8192)
+BINARY_PROBE_BYTES = 8192
+
 # 文本文件扩展名
 TEXT_EXTENSIONS = {
     '.txt', '.md', '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.go', '.c', '.cpp', '.h',
@@ -335,22 +340,26 @@ def _detect_binary_content(path: Path) -> Tuple[bool, str]:
     """
     try:
         with open(path, 'rb') as f:
-            chunk = f.read(8192)
-        
-        # 检查空字节
-        if b'\x00' in chunk:
-            return True, "文件包含空字节(0x00)，疑似二进制文件"
-        
-        # 检查BOM标记
-        null_count = chunk.count(b'\xff\xfe') + chunk.count(b'\xfe\xff')
-        if null_count > 0 and len(chunk) < 100:
-            return True, "文件包含BOM标记但内容过短，疑似二进制文件"
-        
-        return False, ""
+            chunk = f.read(BINARY_PROBE_BYTES)
+        return _detect_binary_bytes(chunk)
     except Exception:
         return False, ""
 
 
+def _detect_binary_bytes(chunk: bytes) -> Tuple[bool, str]:
+    """对文件首块字节(前 BINARY_PROBE_BYTES 字节)判定是否二进制 — 小欧 2026-10-17 从 _detect_binary_content 拆出"""
+    # 检查空字节
+    if b'\x00' in chunk:
+        return True, "文件包含空字节(0x00)，疑似二进制文件"
+
+    # 检查BOM标记
+    null_count = chunk.count(b'\xff\xfe') + chunk.count(b'\xfe\xff')
+    if null_count > 0 and len(chunk) < 100:
+        return True, "文件包含BOM标记但内容过短，疑似二进制文件"
+
+    return False, ""
+
+
 # ============================================================
 # 便捷检查函数（供各个tool直接调用）
 # ============================================================
@@ -1,6 +1,4 @@
 # -*- coding: utf-8 -*-
 """WIN_REGISTRY Tools - Windows注册表工具模块 — 小健 2026-06-17"""
-
-from app.tools.win_registry.win_registry_register import *
-
-__all__ = ["_register_registry_tools"]
\ No newline at end of file
+# 2026-10-17 - 小欧 - 包初始化不再导入 win_registry_register(连带本分类全部工具实现): 导入本包任一子模块不再拖入整个分类;
+#   注册入口由 tool_constants.CATEGORY_MODULES 直指 app.tools.win_registry.win_registry_register
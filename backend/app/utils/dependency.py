@@ -8,6 +8,8 @@
 
 【小欧 2026-06-16】新增：DRY原则从gui_tools.py send_notification抽取
 【小健 2026-06-18】增强：支持版本控制和前置依赖，集成到工具注册系统
+【小欧 2026-10-17】可用性检查改 importlib.util.find_spec(只查找不执行, 不再为检查而 import pandas/matplotlib 等);
+                  前置依赖只在主包缺失需安装时才装(原每次检查都 pip install 一遍前置依赖)
 
 ===============================================================================
                          依赖管理系统使用指南
@@ -84,13 +86,17 @@
    ```
 
 4. 注意事项
-   - 依赖检查在工具注册时进行，不在运行时
+   - 依赖检查默认在工具注册时进行; 懒注册模式(config tools.lazy_registration)下改由后台线程进行,
+     工具首次执行前补做未完成的检查
+   - 可用性按模块能否找到判断(find_spec), 不执行模块; 导入期才暴露的问题由工具内部运行时检查兜底
    - 安装失败会记录警告，但不阻止工具注册
    - 工具函数内部仍需进行运行时检查（使用 _check_module）
    - 版本锁定示例：httpx必须使用0.26.0版本（AGENTS.md要求）
 """
 
+import importlib
 import importlib.metadata
+import importlib.util
 import subprocess
 import sys
 from typing import Optional
@@ -140,25 +146,26 @@ def ensure_dependency(
     if pip_package is None:
         pip_package = import_name
 
-    if pre_install:
-        for pkg in pre_install:
-            _pip_install(pkg)
+    if _is_available(import_name, pip_package, version):
+        return True
+    for pkg in pre_install or []:
+        _pip_install(pkg)
+    if not _pip_install(pip_package, version):
+        return False
+    importlib.invalidate_caches()
+    return _is_available(import_name, pip_package, None)
+
 
+def _is_available(import_name: str, pip_package: str, version: Optional[str]) -> bool:
+    """模块可找到(find_spec 只查找不执行)且 ==版本 与已安装分发包一致"""
     try:
-        __import__(import_name)
-        if version and version.startswith("=="):
-            try:
-                installed = importlib.metadata.version(pip_package or import_name)
-                if installed != version[2:]:
-                    raise ImportError(f"版本不匹配: 已安装{installed}, 需要{version}")
-            except importlib.metadata.PackageNotFoundError:
-                raise ImportError(f"依赖{import_name}版本不可查")
-        return True
-    except ImportError:
-        if not _pip_install(pip_package, version):
+        if importlib.util.find_spec(import_name) is None:
             return False
+    except (ImportError, ValueError):  # 父包缺失 / __spec__ 为 None
+        return False
+    if version and version.startswith("=="):
         try:
-            __import__(import_name)
-            return True
-        except ImportError:
+            return importlib.metadata.version(pip_package) == version[2:]
+        except importlib.metadata.PackageNotFoundError:
             return False
+    return True
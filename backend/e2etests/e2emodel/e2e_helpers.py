@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
 # 编辑历史:
+# 2026-10-17 - 小欧 - Prompt日志默认改为流式 JSONL(logging.prompt_log_format=jsonl) 后的读取适配
+#   【病根】verify_prompt_log_consistency / check_logs 只 glob prompt_*.json 再 json.loads, 默认配置下找不到日志或解析失败
+#   【改法】_prompt_log_files 同时收 .jsonl(默认)与 .json(旧格式), 统一经 app.logger.prompt_logger.load_prompt_log 还原分区结构;
+#          进行中的 .jsonl.part 不参与匹配
 # 2026-08-12 - 小欧 - COM_03记录误判修复: write_test_record按error_type区分可恢复/不可恢复错误
 #   【病根】LLM幻觉调用未注册工具write被SafetyChecker blocked拦截, action_handler发ErrorStep(error_type=blocked)
 #          进SSE流致has_error=True; 但blocked/user_rejected属可恢复错误(拒绝≠失败, 与react_cycle._RECOVERABLE_ERRORS
@@ -169,6 +173,18 @@ LOG_DIR = Path(__file__).parent.parent.parent / "logs"
 PROMPT_LOG_DIR = LOG_DIR / "prompt-logs"
 
 
+def _prompt_log_files() -> List[Path]:
+    """已写完的 prompt 日志(新→旧): .jsonl(默认) + .json(prompt_log_format=json 旧格式) -- 小欧 2026-10-17"""
+    files = list(PROMPT_LOG_DIR.glob("prompt_*.jsonl")) + list(PROMPT_LOG_DIR.glob("prompt_*.json"))
+    return sorted(files, key=lambda p: p.stat().st_mtime, reverse=True)
+
+
+def _load_prompt_log(path: Path) -> Dict[str, Any]:
+    """读 prompt 日志为分区结构(jsonl 按哈希还原, json 原样) -- 小欧 2026-10-17"""
+    from app.logger.prompt_logger import load_prompt_log
+    return load_prompt_log(path)
+
+
 # ─── 后端检查 ────────────────────────────────────────────────
 
 def ensure_backend_ready() -> bool:
@@ -801,7 +817,7 @@ def verify_db_prompt_consistency(
     # 找到prompt日志文件
     prompt_log_file = None
     if user_msg_id is not None and PROMPT_LOG_DIR.exists():
-        for pf in sorted(PROMPT_LOG_DIR.glob("prompt_*.json"), key=lambda p: p.stat().st_mtime, reverse=True)[:50]:
+        for pf in _prompt_log_files()[:50]:
             try:
                 content = pf.read_text(encoding="utf-8", errors="ignore")
                 if str(user_msg_id) in content and session_id in content:
@@ -815,7 +831,7 @@ def verify_db_prompt_consistency(
         return issues
 
     try:
-        log_data = json.loads(prompt_log_file.read_text(encoding="utf-8", errors="ignore"))
+        log_data = _load_prompt_log(prompt_log_file)
     except Exception as e:
         issues.append(f"读取Prompt日志失败: {e}")
         return issues
@@ -1127,11 +1143,7 @@ def check_logs(
 
         # ── prompt-logs检查 ──
         if PROMPT_LOG_DIR.exists():
-            prompt_files = sorted(
-                PROMPT_LOG_DIR.glob("prompt_*.json"),
-                key=lambda p: p.stat().st_mtime,
-                reverse=True,
-            )
+            prompt_files = _prompt_log_files()
             if user_msg_id is not None:
                 # 按用户消息ID匹配，一轮对话只对应一个prompt日志
                 matched = []
@@ -1162,7 +1174,7 @@ def check_logs(
             result["prompt_log_files"] = [f.name for f in recent[:1]]
             for pf in recent[:1]:
                 try:
-                    pdata = json.loads(pf.read_text(encoding="utf-8", errors="ignore"))
+                    pdata = _load_prompt_log(pf)
                     result["llm_calls_found"] += pdata.get("llm_call_count", 0) or 1
                 except Exception:
                     pass
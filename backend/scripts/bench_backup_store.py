@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+回收站备份: 旧整份复制(copytree/copy2) vs backup_store 内容寻址去重 — 校验 + 微基准
+
+临时回收站下对同一源目录(若干小文件 + 一个大文件)连续备份 R 轮:
+  第 1 轮冷备份 / 之后每轮不变或只改一个小文件 / 最后模拟进程重启(摘要缓存关库后从盘重新打开)再备份一轮
+对比每轮耗时与回收站实际占用(硬链接按 inode 只计一次), 并校验:
+  - 每轮 restore 结果与同轮旧整份复制逐文件一致(内容/权限/mtime)
+  - 删除旧备份后 gc 只回收无引用 blob, 剩余备份仍可完整还原
+  - 单文件备份 snapshot_info 的 hash 与 compute_file_hash 一致
+  - 超限清理(_cleanup_by_size)跳过 .blobs 仓目录, 删除备份同时回收其独占 blob
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/bench_backup_store.py
+    python scripts/bench_backup_store.py --files 2000 --big-mb 256 --rounds 10
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.safety import backup_store, digest_cache, operation_maintenance  # noqa: E402
+from app.safety.hash_helper import compute_file_hash  # noqa: E402
+from app.safety.models import FileSafetyConfig  # noqa: E402
+
+_PAST = time.time() - 3600
+
+
+def _disk_usage(path: Path) -> int:
+    seen, total = set(), 0
+    for p in path.rglob("*"):
+        if p.is_file():
+            st = p.stat()
+            if (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                total += st.st_size
+    return total
+
+
+def _make_source(src: Path, files: int, big_mb: int) -> None:
+    for i in range(files):
+        d = src / f"pkg{i % 20}"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f"mod{i}.py").write_text(f"# module {i}\n" + "x = 1\n" * (i % 200), encoding="utf-8")
+    (src / "empty_dir").mkdir(exist_ok=True)
+    (src / "readonly.txt").write_text("只读文件", encoding="utf-8")
+    os.chmod(src / "readonly.txt", 0o444)
+    with open(src / "data.bin", "wb") as f:
+        for _ in range(big_mb):
+            f.write(os.urandom(1024 * 1024))
+    for p in [src, *src.rglob("*")]:  # mtime 置于过去(真实场景被改前的文件), 越过 stat 记忆的 racy 窗口
+        os.utime(p, (_PAST, _PAST))
+
+
+def _tree_state(root: Path) -> dict:
+    out = {}
+    for p in sorted(root.rglob("*")):
+        st = p.stat()
+        rel = p.relative_to(root).as_posix()
+        out[rel] = (p.is_dir(), None if p.is_dir() else p.read_bytes(), stat.S_IMODE(st.st_mode),
+                    None if p.is_dir() else st.st_mtime_ns)
+    return out
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def run(files: int, big_mb: int, rounds: int) -> None:
+    with tempfile.TemporaryDirectory(prefix="omni-bench-backup-") as tmp:
+        tmp = Path(tmp)
+        src = tmp / "project"
+        _make_source(src, files, big_mb)
+        legacy_bin, store_bin = tmp / "legacy_bin", tmp / "recycle_bin"
+        FileSafetyConfig.RECYCLE_BIN_PATH = store_bin
+        digest_cache.close()
+        digest_cache._DB_PATH = tmp / "digest_cache.sqlite3"
+        print(f"源目录: {files} 个小文件 + {big_mb}MB 大文件, 共 {_disk_usage(src) / 1024 ** 2:.1f}MB; 备份 {rounds} 轮")
+
+        snapshots = []
+        for r in range(rounds):
+            label = "冷备份"
+            if r == rounds - 1:
+                digest_cache.close()
+                label = "重启后(缓存落盘)"
+            elif r % 3 == 2:
+                target = src / "pkg0" / "mod0.py"
+                target.write_text(f"# round {r}\n", encoding="utf-8")
+                os.utime(target, (_PAST + r, _PAST + r))
+                os.utime(target.parent, (_PAST, _PAST))
+                label = "改 1 个文件"
+            elif r:
+                label = "未变"
+            legacy_dst = legacy_bin / f"r{r:03d}" / src.name
+            _, t_legacy = _timed(shutil.copytree, src, legacy_dst)
+            snap, t_store = _timed(backup_store.snapshot, src, store_bin / f"r{r:03d}")
+            snapshots.append((snap, legacy_dst))
+            print(f"  第 {r + 1:2d} 轮 [{label:<8}] 整份复制 {t_legacy * 1000:8.1f}ms  内容寻址 {t_store * 1000:8.1f}ms  "
+                  f"占用 旧 {_disk_usage(legacy_bin) / 1024 ** 2:8.1f}MB / 新 {_disk_usage(store_bin) / 1024 ** 2:7.1f}MB")
+
+        for i, (snap, legacy_dst) in enumerate(snapshots):
+            restored = tmp / f"restore{i}" / src.name
+            backup_store.restore(snap, restored)
+            assert _tree_state(restored) == _tree_state(legacy_dst), f"第 {i + 1} 轮还原与整份复制不一致"
+            shutil.rmtree(restored.parent, onerror=lambda f, p, e: (os.chmod(p, 0o700), f(p)))
+        print("  校验: 每轮 restore 与同轮整份复制逐文件一致(内容/权限/mtime) ✓")
+
+        before = backup_store.store_stats()["blobs"]
+        for snap, _legacy in snapshots[:-1]:
+            shutil.rmtree(snap.parent)
+        removed = backup_store.gc()
+        after = backup_store.store_stats()
+        last = snapshots[-1][0]
+        restored = tmp / "restore_last" / src.name
+        backup_store.restore(last, restored)
+        assert _tree_state(restored) == _tree_state(snapshots[-1][1])
+        assert after["blobs"] == before - removed == len(os.listdir(last / "objects"))
+        print(f"  校验: 删除前 {rounds - 1} 轮后 gc 回收 {removed} 个 blob, 剩 {after['blobs']} 个均被最后一轮引用, 仍可完整还原 ✓")
+
+        single = backup_store.snapshot(src / "data.bin", store_bin / "single")
+        info = backup_store.snapshot_info(single)
+        assert info["hash"] == compute_file_hash(str(src / "data.bin")) and info["size"] == big_mb * 1024 * 1024
+        print("  校验: 单文件备份 snapshot_info.hash == compute_file_hash ✓")
+
+        saved = FileSafetyConfig.RECYCLE_BIN_MAX_SIZE_GB
+        try:
+            FileSafetyConfig.RECYCLE_BIN_MAX_SIZE_GB = 1e-9
+            cleaned, _freed = operation_maintenance._cleanup_by_size()
+        finally:
+            FileSafetyConfig.RECYCLE_BIN_MAX_SIZE_GB = saved
+        assert (store_bin / backup_store.BACKUP_STORE_DIRNAME).is_dir(), ".blobs 仓目录被超限清理误删"
+        assert backup_store.store_stats()["blobs"] == 0, "超限清理后无引用 blob 未回收"
+        print(f"  校验: 超限清理删除 {cleaned} 个备份、保留 .blobs 仓并回收独占 blob ✓")
+        print(f"  仓计数: {backup_store.store_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="回收站内容寻址去重备份校验 + 微基准")
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--big-mb", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=6)
+    args = parser.parse_args()
+    run(args.files, args.big_mb, args.rounds)
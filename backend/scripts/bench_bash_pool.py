@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+bash 分支 — 每命令登录 shell(Popen `bash -l -c`) vs 持久 bash 会话池(shell_pool + PersistentBash): 校验 + 基准
+
+旧: 每条命令 Popen([bash, "-l", "-c", cmd], cwd=cwd) + communicate(timeout), 超时杀进程读残存(execute_shell_command 原 bash 分支)
+新: execute_shell_command._exec_in_pool("bash", ...) — acquire(复用会话先探活) → exec → release
+校验:
+  ①差分: 一组无状态命令(显式 cwd)两种方式 stdout/stderr/rc 一致
+  ②会话语义: 不传 cwd 时 cd/export/函数跨命令保留; 显式 cwd 优先; 读 stdin 的命令立即得 EOF; 后台任务不阻塞返回
+  ③超时杀会话并替补(新 pid, evictions.timeout 计数) / 命令内 exit 返回退出码并替补 / env 变更淘汰重建
+  ④并发: 同一任务多线程并发, 各会话输出不串扰, 会话数 ≤ max_per_type
+  ⑤增量输出: exec(on_output) 回调拼接 == 最终输出
+基准: N 条极简命令逐条执行的平均单命令耗时(含 acquire 探活 + release)
+
+使用方法:
+    python scripts/bench_bash_pool.py
+    python scripts/bench_bash_pool.py --commands 500
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.tools.fundamental.execute_shell_command import (  # noqa: E402
+    _decode_bytes_safe, _exec_in_pool, _fix_encoding, _kill_and_read_output, _sanitize_env,
+)
+from app.tools.fundamental.shell_engine import shell_pool  # noqa: E402
+
+_BASH = shutil.which("bash")
+
+
+# ---------------------------------------------------------------- 旧实现复刻(每命令登录 shell)
+
+def _legacy_exec(command: str, timeout: int, cwd: str) -> Tuple[str, str, int, bool]:
+    proc = subprocess.Popen([_BASH, "-l", "-c", command], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            cwd=cwd, env=_sanitize_env())
+    timed_out = False
+    try:
+        stdout_b, stderr_b = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        stdout_b, stderr_b = _kill_and_read_output(proc)
+    return (_fix_encoding(_decode_bytes_safe(stdout_b)), _fix_encoding(_decode_bytes_safe(stderr_b)),
+            proc.returncode if proc.returncode is not None else -1, timed_out)
+
+
+def _pooled_exec(command: str, timeout: int, cwd: Any) -> Tuple[str, str, int, bool]:
+    return _exec_in_pool("bash", command, timeout, cwd)
+
+
+# ---------------------------------------------------------------- 校验
+
+def _stateless_cases(root: str) -> List[str]:
+    sub = os.path.join(root, "子 目录")
+    os.makedirs(sub, exist_ok=True)
+    Path(sub, "a.txt").write_text("第一行\nsecond\n", encoding="utf-8")
+    return [
+        "true",
+        "echo hello",
+        "printf 'no newline'",
+        "pwd",
+        "ls",
+        "cat '子 目录/a.txt' | wc -l",
+        "echo 中文 ✓; echo 错误 >&2",
+        "for i in 1 2 3; do echo out$i; done; echo err >&2",
+        "false",
+        "exit 5",
+        "ls /nonexistent-path-xyz",
+        "x=3; y=4; echo $((x * y))",
+        "python3 -c \"print('y' * 200000)\"",
+        "seq 1 5000 | tail -n 2",
+        "echo __OMNI_fake__DONE 0 /nowhere",
+        "test -d '子 目录' && echo yes",
+    ]
+
+
+def _check_differential(root: str) -> None:
+    cases = _stateless_cases(root)
+    for command in cases:
+        want, got = _legacy_exec(command, 30, root), _pooled_exec(command, 30, root)
+        assert got == want, f"命令 {command!r} 结果不一致\n新 {str(got)[:300]}\n旧 {str(want)[:300]}"
+    print(f"  校验 [差分] {len(cases)} 条无状态命令(显式 cwd) stdout/stderr/rc 与每命令登录 shell 一致 ✓")
+
+
+def _check_session(root: str) -> None:
+    sub = os.path.join(root, "子 目录")
+    steps = [
+        ("cd '子 目录' && export OMNI_DEMO=42 && greet() { echo hi $1; }", root, ""),
+        ("pwd; echo $OMNI_DEMO; greet bob", None, f"{sub}\n42\nhi bob\n"),
+        ("pwd", root, f"{root}\n"),
+        ("cat; echo after-cat", None, "after-cat\n"),
+        ("sleep 30 & echo started", None, "started\n"),
+        ("cd /nonexistent-dir-xyz; pwd", None, f"{root}\n"),
+    ]
+    for command, cwd, expect in steps:
+        t0 = time.perf_counter()
+        stdout, _, _, timed_out = _pooled_exec(command, 10, cwd)
+        assert not timed_out and stdout == expect and time.perf_counter() - t0 < 2, (command, stdout)
+    print("  校验 [会话语义] cd/export/函数跨命令保留, 显式 cwd 优先, cat 读 /dev/null 立即返回, 后台任务不阻塞 ✓")
+
+
+def _session_pid() -> int:
+    inst = shell_pool.acquire(None, "bash", env=_sanitize_env())   # task_id None = 无任务上下文(同 _exec_in_pool)
+    try:
+        return inst._proc.pid
+    finally:
+        shell_pool.release(inst)
+
+
+def _check_replace() -> None:
+    shell_pool.cleanup_all()
+    before = shell_pool.stats()["shells"]["bash"]["evictions"]
+    pid0 = _session_pid()
+    t0 = time.perf_counter()
+    stdout, stderr, rc, timed_out = _pooled_exec("echo partial; sleep 30", 1, None)
+    took = time.perf_counter() - t0
+    assert timed_out and stdout == "partial\n" and rc == -1 and took < 2, (stdout, stderr, rc, took)
+    pid1 = _session_pid()
+    assert pid1 != pid0
+    stdout, _, rc, timed_out = _pooled_exec("echo bye; exit 7", 10, None)
+    assert (stdout, rc, timed_out) == ("bye\n", 7, False), (stdout, _, rc, timed_out)
+    pid2 = _session_pid()
+    assert pid2 != pid1
+    inst = shell_pool.acquire(None, "bash", env={**_sanitize_env(), "OMNI_CHANGED": "1"})
+    try:
+        assert inst._proc.pid != pid2 and inst.exec("echo $OMNI_CHANGED", 5)["stdout"] == "1\n"
+    finally:
+        shell_pool.release(inst)
+    after = shell_pool.stats()["shells"]["bash"]["evictions"]
+    evictions = {k: v - before.get(k, 0) for k, v in after.items() if v != before.get(k, 0)}
+    assert evictions == {"timeout": 1, "exited": 1, "env_changed": 1}, evictions
+    print(f"  校验 [替补] 超时 1s 返回({took * 1e3:.0f}ms, 部分输出保留)并换新会话 / exit 7 返回退出码并换新会话 / env 变更淘汰: {evictions} ✓")
+
+
+def _check_concurrency(threads: int, rounds: int) -> None:
+    shell_pool.cleanup_all()
+    errors: List[str] = []
+
+    def worker(n: int) -> None:
+        for i in range(rounds):
+            stdout, _, rc, _ = _pooled_exec(f"echo worker{n}-{i}", 10, None)
+            if stdout != f"worker{n}-{i}\n" or rc != 0:
+                errors.append(f"{n}-{i}: {stdout!r}")
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    stats = shell_pool.stats()["shells"]["bash"]
+    assert not errors, errors[:5]
+    assert stats["instances"] <= shell_pool._max_per_type and stats["busy"] == 0, stats
+    print(f"  校验 [并发] {threads} 线程 x {rounds} 条无串扰, 会话数 {stats['instances']}, "
+          f"复用 {stats['reused']} / 新建 {stats['created']}, 平均排队 {stats['avg_wait_ms']}ms ✓")
+
+
+def _check_streaming() -> None:
+    chunks: Dict[str, List[str]] = {"stdout": [], "stderr": []}
+    inst = shell_pool.acquire(None, "bash", env=_sanitize_env())
+    try:
+        result = inst.exec("for i in 1 2 3 4; do echo line$i; echo warn$i >&2; sleep 0.05; done", 10,
+                           on_output=lambda stream, text: chunks[stream].append(text))
+    finally:
+        shell_pool.release(inst)
+    assert "".join(chunks["stdout"]) == result["stdout"] and "".join(chunks["stderr"]) == result["stderr"]
+    assert len(chunks["stdout"]) >= 3, chunks
+    print(f"  校验 [增量输出] 回调 {len(chunks['stdout'])}+{len(chunks['stderr'])} 段, 拼接 == 最终输出 ✓")
+
+
+# ---------------------------------------------------------------- 基准
+
+def _bench(fn, n: int, cwd: Any) -> float:
+    fn("true", 30, cwd)  # 预热(池: 建会话)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        _, _, rc, _ = fn("true", 30, cwd)
+        assert rc == 0
+    return (time.perf_counter() - t0) / n
+
+
+def run(commands: int, threads: int) -> None:
+    if not _BASH or sys.platform == "win32":
+        print("  非 Linux/macOS 或未找到 bash, 跳过")
+        return
+    logging.disable(logging.WARNING)
+    root = tempfile.mkdtemp(prefix="bash_pool_bench_")
+    try:
+        _check_differential(root)
+        shell_pool.cleanup_all()
+        _check_session(root)
+        _check_replace()
+        _check_concurrency(threads, 30)
+        _check_streaming()
+        shell_pool.cleanup_all()
+        t_old = _bench(_legacy_exec, commands, root)
+        t_new = _bench(_pooled_exec, commands, root)
+        print(f"  基准 极简命令 `true` x {commands}: 每命令登录 shell {t_old * 1e3:6.2f}ms/条  "
+              f"池化会话 {t_new * 1e3:6.3f}ms/条(含 acquire 探活)  ({t_old / t_new:.1f}x)")
+        print(f"  池指标: {shell_pool.stats()['shells']['bash']}")
+    finally:
+        shell_pool.cleanup_all()
+        shutil.rmtree(root, ignore_errors=True)
+        logging.disable(logging.NOTSET)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bash 分支每命令登录 shell vs 持久会话池: 校验 + 基准")
+    parser.add_argument("--commands", type=int, default=300, help="基准命令数")
+    parser.add_argument("--threads", type=int, default=4, help="并发校验线程数")
+    args = parser.parse_args()
+    run(args.commands, args.threads)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量文件哈希: 旧串行 compute_batch_file_hash vs 并行 + 持久化摘要缓存 — 校验 + 微基准
+
+临时目录下生成 N 个文件(大多数几 KB~几十 KB, 每 100 个夹一个 1MB), 依次测:
+  - 旧: 逐个 compute_file_hash(64KB 块)串行
+  - 冷: hash_files 并行, 摘要缓存为空
+  - 热: 同进程再跑一次(缓存全命中)
+  - 重启: digest_cache.close() 后从盘重新打开再跑(模拟进程重启)
+  - 增量: 改写其中 1% 文件后再跑, 只应重算这 1%
+各轮摘要与旧串行结果逐个一致; 另测目录备份 backup_store.snapshot 冷/热(同一缓存)
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/bench_batch_hash.py
+    python scripts/bench_batch_hash.py --files 20000 --algorithm md5
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.constants import HASH_WORKERS  # noqa: E402
+from app.safety import backup_store, digest_cache  # noqa: E402
+from app.safety.hash_helper import compute_file_hash, hash_files  # noqa: E402
+from app.safety.models import FileSafetyConfig  # noqa: E402
+
+_PAST = time.time() - 3600
+
+
+def _make_tree(root: Path, files: int) -> list:
+    paths = []
+    for i in range(files):
+        d = root / f"dir{i % 50:02d}" / f"sub{i % 7}"
+        d.mkdir(parents=True, exist_ok=True)
+        p = d / f"file{i:05d}.dat"
+        size = 1024 * 1024 if i % 100 == 0 else 2048 + (i * 7919) % 30000
+        p.write_bytes(os.urandom(size))
+        os.utime(p, (_PAST, _PAST))  # mtime 置于过去, 越过摘要缓存的 racy 窗口
+        paths.append(str(p))
+    return paths
+
+
+def _legacy(paths: list, algorithm: str) -> dict:
+    """复刻旧 compute_batch_file_hash: 逐个串行 compute_file_hash(64KB 块)"""
+    return {p: compute_file_hash(p, algorithm, 65536) for p in paths}
+
+
+def _new(paths: list, algorithm: str) -> dict:
+    return {r["file_path"]: r["hash"] for r in hash_files(paths, algorithm)}
+
+
+def _round(label: str, fn, paths: list, algorithm: str, expected: dict) -> float:
+    before = digest_cache.cache_stats()
+    t0 = time.perf_counter()
+    got = fn(paths, algorithm)
+    elapsed = time.perf_counter() - t0
+    after = digest_cache.cache_stats()
+    assert got == expected, f"{label}: 摘要与旧串行结果不一致"
+    misses = after["misses"] - before["misses"]
+    hits = after["hits"] - before["hits"]
+    print(f"  [{label:<10}] {elapsed * 1000:9.1f}ms  缓存命中 {hits:6d} / 未命中(实际读文件) {misses:6d}  结果一致 ✓")
+    return elapsed
+
+
+def run(files: int, algorithm: str) -> None:
+    with tempfile.TemporaryDirectory(prefix="omni-bench-hash-") as tmp:
+        tmp = Path(tmp)
+        digest_cache.close()
+        digest_cache._DB_PATH = tmp / "digest_cache.sqlite3"
+        paths = _make_tree(tmp / "tree", files)
+        total = sum(os.path.getsize(p) for p in paths)
+        print(f"{files} 个文件, 共 {total / 1024 ** 2:.1f}MB, 算法 {algorithm}, 线程 {HASH_WORKERS}, CPU {os.cpu_count()}")
+
+        t0 = time.perf_counter()
+        expected = _legacy(paths, algorithm)
+        t_legacy = time.perf_counter() - t0
+        print(f"  [旧串行    ] {t_legacy * 1000:9.1f}ms")
+        t_cold = _round("冷(空缓存)", _new, paths, algorithm, expected)
+        t_warm = _round("热", _new, paths, algorithm, expected)
+        digest_cache.close()
+        t_restart = _round("重启后", _new, paths, algorithm, expected)
+
+        changed = paths[::100]
+        for p in changed:
+            with open(p, "r+b") as f:
+                f.write(os.urandom(16))
+            os.utime(p, (_PAST + 60, _PAST + 60))
+            expected[p] = compute_file_hash(p, algorithm)
+        t_incr = _round(f"改 {len(changed)} 个", _new, paths, algorithm, expected)
+        assert digest_cache.cache_stats()["persistent"], "摘要缓存未落盘"
+        print(f"  加速比: 冷 {t_legacy / t_cold:.1f}x  热 {t_legacy / t_warm:.1f}x  "
+              f"重启 {t_legacy / t_restart:.1f}x  增量 {t_legacy / t_incr:.1f}x")
+
+        FileSafetyConfig.RECYCLE_BIN_PATH = tmp / "recycle_bin"
+        sha = digest_cache.cache_stats()["misses"]
+        t0 = time.perf_counter()
+        backup_store.snapshot(tmp / "tree", tmp / "recycle_bin" / "b1")
+        t_b1 = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        backup_store.snapshot(tmp / "tree", tmp / "recycle_bin" / "b2")
+        t_b2 = time.perf_counter() - t0
+        print(f"  [目录备份  ] 冷 {t_b1 * 1000:.1f}ms  热 {t_b2 * 1000:.1f}ms  "
+              f"(sha256 未命中 {digest_cache.cache_stats()['misses'] - sha}, 仅首轮读文件)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="并行批量哈希 + 持久化摘要缓存校验 + 微基准")
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--algorithm", default="sha256")
+    args = parser.parse_args()
+    run(args.files, args.algorithm)
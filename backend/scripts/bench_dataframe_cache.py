@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+数据分析 DataFrame 缓存微基准: 旧路径(每次调用 pd.read_excel/read_csv) vs df_cache(内存 LRU + Parquet 旁路文件)
+
+在临时目录生成 N 行 x 10 列的 .xlsx 与 .csv(数值/文本/日期混合), 模拟 LLM 对同一文件连续调用 K 次分析工具:
+  - 旧路径: 每次 pd.read_excel(openpyxl) / pd.read_csv
+  - 内存缓存: load_data_to_df 首次解析(未命中), 之后 K-1 次命中
+  - Parquet 旁路文件(需 pyarrow): 清空内存缓存模拟进程重启/淘汰后, 从旁路文件加载
+  - 端到端: analyze_data(path) 连续 K 次
+每种加载结果都与 pd.read_excel/read_csv 直接读取逐值校验一致(assert_frame_equal)。
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/bench_dataframe_cache.py
+    python scripts/bench_dataframe_cache.py --rows 20000 --calls 12
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.tools.dataanalysis import df_cache  # noqa: E402
+from app.tools.dataanalysis.data_loader import load_data_to_df  # noqa: E402
+from app.tools.dataanalysis.analyze_data import analyze_data  # noqa: E402
+from app.tools.tool_fc_helper import _check_module  # noqa: E402
+
+
+def _generate(tmp: Path, rows: int) -> tuple:
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "region": rng.choice(["华东", "华南", "华北", "西南"], rows),
+        "product": rng.choice([f"P{i:03d}" for i in range(200)], rows),
+        "qty": rng.integers(1, 500, rows),
+        "price": rng.random(rows).round(4) * 100,
+        "discount": rng.random(rows).round(3),
+        "score": rng.normal(60, 15, rows).round(2),
+        "flag": rng.integers(0, 2, rows),
+        "note": [f"订单备注 {i % 977}" for i in range(rows)],
+        "day": pd.date_range("2024-01-01", periods=rows, freq="min"),
+    })
+    xlsx, csv = tmp / "sales.xlsx", tmp / "sales.csv"
+    df.to_excel(xlsx, index=False, engine="openpyxl")
+    df.to_csv(csv, index=False)
+    return xlsx, csv
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def _bench_file(path: Path, legacy_reader, calls: int, legacy_calls: int, sidecar: bool) -> None:
+    expected, _ = _timed(legacy_reader, path)
+    t_legacy = sum(_timed(legacy_reader, path)[1] for _ in range(legacy_calls)) / legacy_calls
+    print(f"[{path.name}] {path.stat().st_size // 1024}KB")
+    print(f"  {'旧路径(每次解析)':<22} {t_legacy * 1000:9.1f}ms/次")
+
+    df_cache._cache.clear()
+    first, t_first = _timed(load_data_to_df, str(path))
+    pd.testing.assert_frame_equal(first["df"], expected)
+    t_hits = 0.0
+    for _ in range(calls - 1):
+        hit, t = _timed(load_data_to_df, str(path))
+        t_hits += t
+    pd.testing.assert_frame_equal(hit["df"], expected)
+    per_call = (t_first + t_hits) / calls
+    print(f"  {'缓存(首次未命中)':<22} {t_first * 1000:9.1f}ms")
+    print(f"  {'缓存(命中)':<22} {t_hits / max(1, calls - 1) * 1000:9.3f}ms/次")
+    print(f"  {f'缓存 {calls} 次调用均摊':<22} {per_call * 1000:9.1f}ms/次  加速比 {t_legacy / per_call:6.1f}x")
+
+    if sidecar:
+        df_cache._cache.clear()
+        side, t_side = _timed(load_data_to_df, str(path))
+        pd.testing.assert_frame_equal(side["df"], expected)
+        print(f"  {'Parquet 旁路文件加载':<22} {t_side * 1000:9.1f}ms  加速比 {t_legacy / t_side:6.1f}x")
+
+    df_cache._cache.clear()
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        r = analyze_data(path=str(path), operations=["mean", "max"], group_by="region")
+        assert r["llm_data"]["status"]["exec_code"] == "success", r["llm_data"]
+    print(f"  {f'analyze_data x{calls}':<22} {(time.perf_counter() - t0) / calls * 1000:9.1f}ms/次  (结果一致 ✓)")
+
+
+def run(rows: int, calls: int, legacy_calls: int) -> None:
+    sidecar = _check_module("pyarrow")
+    with tempfile.TemporaryDirectory(prefix="omni-bench-df-") as tmp:
+        tmp = Path(tmp)
+        xlsx, csv = _generate(tmp, rows)
+        df_cache._SIDECAR_DIR = tmp / "df_sidecar"  # 旁路文件落临时目录, 不污染 ~/.omniagent
+        df_cache._sidecar_enabled = lambda: sidecar  # 基准内按 pyarrow 是否可用开启, 不读 config
+        print(f"{rows} 行 x 10 列, 连续调用 {calls} 次, Parquet 旁路文件={'开' if sidecar else '关(未装 pyarrow)'}")
+        _bench_file(xlsx, lambda p: pd.read_excel(p, engine="openpyxl"), calls, legacy_calls, sidecar)
+        _bench_file(csv, pd.read_csv, calls, legacy_calls, False)
+        print(f"缓存: {df_cache.cache_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="数据分析 DataFrame 缓存微基准")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--calls", type=int, default=12, help="对同一文件连续调用次数")
+    parser.add_argument("--legacy-calls", type=int, default=2, help="旧路径计时次数(每次整文件解析, 较慢)")
+    args = parser.parse_args()
+    run(args.rows, args.calls, args.legacy_calls)
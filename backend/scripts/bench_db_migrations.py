@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+数据库启动迁移 — 每次启动全量 init(建表脚本 + 逐列 _ensure_column + 同步 execution_steps 迁移) vs 版本化迁移 + 后台分批数据迁移:
+校验 + 启动基准(合成大库)
+
+合成库: chat_history.db 含 --messages 条消息(其中约 1/4 的 execution_steps 带旧表示) + --steps 行 chat_message_steps(默认 200 万),
+        建表为版本化之前的旧库形态(无 schema_version, 未跑过 execution_steps 迁移); operations/task_tracker 为空旧库
+旧: DatabaseManager.init 原实现复刻 — 三库建表/补列/索引 + migrate_execution_steps_status(schema_migrations 守卫, 首次同步 fetchall 全表改写)
+新: DatabaseManager.init — apply_migrations(一次版本查询) + DataMigrationRunner 后台分批
+校验:
+  ①差分: 新(后台分批跑完)与旧(启动内同步跑完)迁移后 chat_messages 全表(id/execution_steps/status)一致, 三库表/列/索引一致
+  ②快路径: 已是最新版本的库, init 期间每库只执行 1 条 SQL(trace 计数)
+  ③续跑: 后台迁移跑到中途 stop, 新 runner 从游标续跑, 结果仍与旧一致, 改写行数不重复累计
+  ④旧守卫: 跑过旧迁移(有 schema_migrations 登记)的库升级后, 数据迁移直接视为完成, 不再扫表
+基准: 升级首启 / 再次启动 的 init 耗时; 后台迁移总耗时与迁移期间前台单步写入延迟
+
+使用方法:
+    python scripts/bench_db_migrations.py
+    python scripts/bench_db_migrations.py --messages 50000 --steps 500000
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.db.database import DatabaseManager  # noqa: E402
+from app.db.db_initializer import (  # noqa: E402
+    _chat_baseline, _operations_baseline, _task_tracker_baseline, DATA_MIGRATIONS,
+)
+from app.db.db_migrations import DataMigrationRunner  # noqa: E402
+from app.services.chat.migrate_steps import _migrate_one_step, _needs_migration  # noqa: E402
+from app.services.chat.storage import derive_status_from_steps  # noqa: E402
+from app.utils.json_utils import parse_json, safe_json_dumps  # noqa: E402
+
+_DBS = ("chat", "operations", "task_tracker")
+
+
+# ---------------------------------------------------------------- 旧实现复刻(每次启动全量 init + 同步迁移)
+# 三库建表/补列/索引与现 v1 baseline 逐字相同(baseline 即原 init_* 函数体), 直接复用; 迁移函数按原实现复刻
+
+def _legacy_migrate_execution_steps_status(get_conn) -> int:
+    updated = 0
+    with get_conn("chat") as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS schema_migrations (name TEXT PRIMARY KEY, "
+                     "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        if conn.execute("SELECT 1 FROM schema_migrations WHERE name=?",
+                        ("migrate_execution_steps_status",)).fetchone() is not None:
+            return 0
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, execution_steps FROM chat_messages WHERE execution_steps IS NOT NULL")
+        for row in cursor.fetchall():
+            steps = parse_json(row["execution_steps"], label="execution_steps")
+            if not isinstance(steps, list) or not steps or not _needs_migration(steps):
+                continue
+            new_steps = [_migrate_one_step(s) for s in steps]
+            cursor.execute("UPDATE chat_messages SET execution_steps=?, status=? WHERE id=?",
+                           (safe_json_dumps(new_steps), derive_status_from_steps(new_steps), row["id"]))
+            updated += 1
+        conn.execute("INSERT OR IGNORE INTO schema_migrations(name) VALUES(?)", ("migrate_execution_steps_status",))
+    return updated
+
+
+def _legacy_init(manager: DatabaseManager) -> None:
+    with manager.get_conn("chat") as conn:
+        _chat_baseline(conn)
+    _legacy_migrate_execution_steps_status(manager.get_conn)
+    with manager.get_conn("operations") as conn:
+        _operations_baseline(conn)
+    with manager.get_conn("task_tracker") as conn:
+        _task_tracker_baseline(conn)
+
+
+# ---------------------------------------------------------------- 合成旧库
+
+_LEGACY_STEPS = [
+    [{"type": "thought", "content": "分析"}, {"type": "error", "content": "失败", "recoverable": True}],
+    [{"type": "incident", "incident_value": "cancelled", "value": "用户取消"}],
+    [{"type": "action", "tool_name": "writetext", "authorization_required": True, "confirm_data": {"confirm_id": "c1"}}],
+    [{"type": "final", "response": "任务已取消"}],
+]
+_CURRENT_STEPS = [{"type": "thought", "content": "分析"}, {"type": "final", "content": "完成"}]
+
+
+def _build_template(root: Path, messages: int, steps: int) -> Path:
+    manager = DatabaseManager(db_dir=root)
+    with manager.get_conn("chat") as conn:
+        _chat_baseline(conn)   # 版本化之前的旧库: 表齐全, 无 schema_version / 迁移登记
+        conn.executemany(
+            "INSERT INTO chat_sessions(id, title, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            [(f"s{i}", f"会话{i}", "2026-10-01T00:00:00", "2026-10-01T00:00:00") for i in range(messages // 20 + 1)])
+        conn.executemany(
+            "INSERT INTO chat_messages(id, session_id, role, content, timestamp, execution_steps) VALUES (?, ?, ?, ?, ?, ?)",
+            ((i, f"s{i // 20}", "assistant", "回复内容", "2026-10-01T00:00:00",
+              json.dumps(_LEGACY_STEPS[i % 16] if i % 16 < 4 else _CURRENT_STEPS, ensure_ascii=False))
+             for i in range(1, messages + 1)))
+        step_json = json.dumps({"type": "observation", "content": "ok" * 8})
+        conn.executemany(
+            "INSERT INTO chat_message_steps(message_id, session_id, step_index, step_json, created_at) VALUES (?, ?, ?, ?, ?)",
+            ((i % messages + 1, f"s{(i % messages) // 20}", i // messages, step_json, "2026-10-01T00:00:00")
+             for i in range(steps)))
+    manager.close_all()
+    return root
+
+
+def _copy(template: Path, dest: Path) -> Path:
+    shutil.copytree(template, dest)
+    return dest
+
+
+# ---------------------------------------------------------------- 校验工具
+
+def _fingerprint(manager: DatabaseManager) -> Dict[str, str]:
+    """三库 schema(表/列/索引, 不含迁移登记表) + chat_messages 全表内容摘要"""
+    out = {}
+    for name in _DBS:
+        with manager.get_read_conn(name) as conn:
+            objs = conn.execute("SELECT type, name, tbl_name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' "
+                                "AND tbl_name NOT IN ('schema_version', 'data_migrations', 'schema_migrations') "
+                                "ORDER BY type, name").fetchall()
+            cols = {r["name"]: [tuple(c)[1:3] for c in conn.execute(f"PRAGMA table_info({r['name']})")]
+                    for r in objs if r["type"] == "table"}
+            out[name] = json.dumps([[tuple(r) for r in objs], cols], sort_keys=True)
+    h = hashlib.sha1()
+    with manager.get_read_conn("chat") as conn:
+        for row in conn.execute("SELECT id, execution_steps, status FROM chat_messages ORDER BY id"):
+            h.update(repr(tuple(row)).encode("utf-8"))
+    out["chat_messages"] = h.hexdigest()
+    return out
+
+
+@contextmanager
+def _counting(manager: DatabaseManager, counts: Dict[str, int]):
+    """init 期间按库计 SQL 条数(trace 回调挂到本线程借出的连接上; 后台数据迁移线程不计)"""
+    original = manager.get_conn
+    caller = threading.get_ident()
+
+    @contextmanager
+    def get_conn(db_name: str = "chat", max_retries: int = 3):
+        with original(db_name, max_retries) as conn:
+            if threading.get_ident() != caller:
+                yield conn
+                return
+            conn.set_trace_callback(lambda sql: counts.__setitem__(db_name, counts.get(db_name, 0) + 1))
+            try:
+                yield conn
+            finally:
+                conn.set_trace_callback(None)
+
+    manager.get_conn = get_conn
+    try:
+        yield
+    finally:
+        del manager.get_conn
+
+
+def _timed_init(manager: DatabaseManager, legacy: bool) -> float:
+    t0 = time.perf_counter()
+    if legacy:
+        _legacy_init(manager)
+    else:
+        manager.init()
+    return time.perf_counter() - t0
+
+
+def _restart_init(db_dir: Path, legacy: bool, repeats: int) -> float:
+    """模拟进程重启: 每次新建 DatabaseManager(含建连)跑 init, 取中位数"""
+    samples = []
+    for _ in range(repeats):
+        manager = DatabaseManager(db_dir=db_dir)
+        samples.append(_timed_init(manager, legacy))
+        if manager._data_migrations is not None:
+            manager._data_migrations.stop()
+        manager.close_all()
+    return statistics.median(samples)
+
+
+def _data_migration_state(manager: DatabaseManager) -> Tuple:
+    with manager.get_read_conn("chat") as conn:
+        row = conn.execute("SELECT cursor, migrated_rows, completed_at FROM data_migrations WHERE name=?",
+                           (DATA_MIGRATIONS[0].name,)).fetchone()
+    return tuple(row) if row is not None else (0, 0, None)
+
+
+def _foreground_writes(manager: DatabaseManager, stop: threading.Event) -> List[float]:
+    """后台迁移期间前台逐条单步写入的延迟(ms)"""
+    samples = []
+    i = 0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        with manager.get_conn("chat") as conn:
+            conn.execute("INSERT INTO chat_message_steps(message_id, session_id, step_index, step_json, created_at) "
+                         "VALUES (1, 's0', ?, '{}', '2026-10-17T00:00:00')", (100000 + i,))
+        samples.append((time.perf_counter() - t0) * 1e3)
+        i += 1
+        time.sleep(0.005)
+    return samples
+
+
+# ---------------------------------------------------------------- 主流程
+
+def run(messages: int, steps: int, repeats: int) -> None:
+    logging.disable(logging.WARNING)
+    root = Path(tempfile.mkdtemp(prefix="db_migrations_bench_"))
+    try:
+        t0 = time.perf_counter()
+        template = _build_template(root / "template", messages, steps)
+        size_mb = sum(p.stat().st_size for p in template.iterdir()) / 1024 ** 2
+        print(f"  合成旧库: {messages} 条消息 + {steps} 行 chat_message_steps, {size_mb:.0f}MB ({time.perf_counter() - t0:.1f}s)")
+
+        # 旧: 首启(同步全表迁移) + 再启
+        old = DatabaseManager(db_dir=_copy(template, root / "legacy"))
+        t_old_first = _timed_init(old, legacy=True)
+        old.close_all()
+        t_old_again = _restart_init(root / "legacy", legacy=True, repeats=repeats)
+        old = DatabaseManager(db_dir=root / "legacy")
+        want = _fingerprint(old)
+        with old.get_read_conn("chat") as conn:
+            legacy_rows = conn.execute("SELECT COUNT(*) FROM chat_messages WHERE status IS NOT NULL").fetchone()[0]
+        old.close_all()
+
+        # 新: 升级首启(后台迁移) + 迁移期间前台写入 + 再启
+        new = DatabaseManager(db_dir=_copy(template, root / "new"))
+        stop_writes = threading.Event()
+        writes: List[float] = []
+        writer = threading.Thread(target=lambda: writes.extend(_foreground_writes(new, stop_writes)))
+        t_new_first = _timed_init(new, legacy=False)
+        t1 = time.perf_counter()
+        writer.start()
+        new._data_migrations._thread.join()
+        t_background = time.perf_counter() - t1
+        stop_writes.set()
+        writer.join()
+        new.close_all()
+        t_new_again = _restart_init(root / "new", legacy=False, repeats=repeats)
+        new = DatabaseManager(db_dir=root / "new")
+        counts: Dict[str, int] = {}
+        with _counting(new, counts):
+            new.init()
+        new._data_migrations.stop()
+        with new.get_conn("chat") as conn:   # 前台写入的步骤行不参与差分
+            conn.execute("DELETE FROM chat_message_steps WHERE step_index >= 100000")
+        got = _fingerprint(new)
+        state = _data_migration_state(new)
+        new.close_all()
+        assert got == want, f"新旧迁移结果不一致: {[k for k in want if got.get(k) != want[k]]}"
+        assert state[1] == legacy_rows and state[2], (state, legacy_rows)
+        print(f"  校验 [差分] 三库 schema + chat_messages 全表(id/execution_steps/status)与旧实现一致, 改写 {state[1]} 行 ✓")
+        assert counts == {name: 1 for name in _DBS}, counts
+        print(f"  校验 [快路径] 已是最新版本: init 期间每库 SQL 条数 {counts} ✓")
+
+        # 续跑: 中途 stop 后新 runner 接着跑
+        resumed = DatabaseManager(db_dir=_copy(template, root / "resume"))
+        resumed.init()
+        deadline = time.time() + 60
+        while _data_migration_state(resumed)[0] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        resumed._data_migrations.stop()
+        resumed._data_migrations = None
+        cursor_at_stop = _data_migration_state(resumed)
+        DataMigrationRunner(resumed.get_conn, DATA_MIGRATIONS).run_until_done()
+        state = _data_migration_state(resumed)
+        got = _fingerprint(resumed)
+        resumed.close_all()
+        assert got == want and state[1] == legacy_rows, (state, legacy_rows)
+        print(f"  校验 [续跑] 首个 runner 停于游标 {cursor_at_stop[0]}(已改写 {cursor_at_stop[1]} 行), "
+              f"续跑后结果一致, 累计改写 {state[1]} 行不重复 ✓")
+
+        # 旧守卫: 跑过旧迁移的库
+        adopted = DatabaseManager(db_dir=_copy(root / "legacy", root / "adopted"))
+        adopted.init()
+        adopted._data_migrations._thread.join()
+        state = _data_migration_state(adopted)
+        with adopted.get_read_conn("chat") as conn:
+            leftover = conn.execute("SELECT name FROM sqlite_master WHERE name='schema_migrations'").fetchone()
+        adopted.close_all()
+        assert state == (0, 0, state[2]) and state[2] and leftover is None, state
+        print("  校验 [旧守卫] schema_migrations 登记并入 data_migrations(已完成), 数据迁移未再扫表, 旧表已删 ✓")
+
+        print(f"  基准 init 耗时(含建连; 再启取 {repeats} 次中位数):")
+        print(f"    旧 升级首启 {t_old_first:7.3f}s(启动内同步全表迁移)  再启 {t_old_again * 1e3:6.1f}ms(建表脚本 + 逐列 PRAGMA + 守卫查询)")
+        print(f"    新 升级首启 {t_new_first:7.3f}s(数据迁移转后台)      再启 {t_new_again * 1e3:6.1f}ms(每库一次版本查询)")
+        print(f"  后台迁移 {t_background:.2f}s; 期间前台单步写入 {len(writes)} 次: "
+              f"p50 {statistics.median(writes):.2f}ms  max {max(writes):.1f}ms" if writes else
+              f"  后台迁移 {t_background:.2f}s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        logging.disable(logging.NOTSET)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="数据库启动迁移: 全量 init vs 版本化迁移 + 后台分批数据迁移 校验 + 基准")
+    parser.add_argument("--messages", type=int, default=200000, help="合成 chat_messages 行数")
+    parser.add_argument("--steps", type=int, default=2000000, help="合成 chat_message_steps 行数")
+    parser.add_argument("--repeats", type=int, default=7, help="再启计时次数(取中位数)")
+    args = parser.parse_args()
+    run(args.messages, args.steps, args.repeats)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+SQLite 连接池微基准: 逐次建连(旧 get_conn 行为) vs 连接池(get_conn / get_read_conn / db.run)
+
+在临时目录建 chat_history.db(真实 init_chat_db 建表), 灌入会话/消息/步骤数据后,
+对三类典型 chat 查询分别计时:
+  - session_list:  会话列表(首页)
+  - message_list:  单会话消息列表(打开会话)
+  - step_insert:   单步落库(运行期写入)
+
+使用方法:
+    python scripts/bench_db_pool.py                 # 默认每项 2000 次
+    python scripts/bench_db_pool.py --iterations 500 --sessions 200
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.db.database import DatabaseManager  # noqa: E402
+from app.db.db_initializer import init_chat_db  # noqa: E402
+
+SESSION_LIST_SQL = (
+    "SELECT id, title, updated_at, message_count FROM chat_sessions "
+    "WHERE is_deleted=FALSE ORDER BY updated_at DESC LIMIT 50"
+)
+MESSAGE_LIST_SQL = (
+    "SELECT id, role, content, timestamp FROM chat_messages WHERE session_id=? ORDER BY id ASC"
+)
+STEP_INSERT_SQL = (
+    "INSERT INTO chat_message_steps(message_id, session_id, step_index, step_json, created_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def _seed(manager: DatabaseManager, sessions: int, messages_per_session: int) -> list:
+    init_chat_db(manager.get_conn)
+    sids = []
+    with manager.get_conn("chat") as conn:
+        msg_id = 0
+        for i in range(sessions):
+            sid = f"bench-{i:05d}"
+            sids.append(sid)
+            conn.execute(
+                "INSERT INTO chat_sessions(id, title, created_at, updated_at, message_count) VALUES (?, ?, ?, ?, ?)",
+                (sid, f"会话{i}", "2026-10-17T00:00:00", f"2026-10-17T00:{i % 60:02d}:00", messages_per_session),
+            )
+            for j in range(messages_per_session):
+                msg_id += 1
+                conn.execute(
+                    "INSERT INTO chat_messages(id, session_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                    (msg_id, sid, "user" if j % 2 == 0 else "assistant", "内容" * 20, "2026-10-17T00:00:00"),
+                )
+    return sids
+
+
+def _open_per_call(db_path: str):
+    """复刻旧 get_conn: 每次 connect + 三条 PRAGMA, 结束 commit + close"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=500")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def _timeit(fn, iterations: int) -> list:
+    samples = []
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return samples
+
+
+def _report(name: str, samples: list) -> float:
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2]
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    mean = statistics.fmean(samples)
+    print(f"  {name:<28} mean={mean:9.1f}us  p50={p50:9.1f}us  p95={p95:9.1f}us")
+    return mean
+
+
+def run(iterations: int, sessions: int, messages_per_session: int) -> None:
+    with tempfile.TemporaryDirectory(prefix="omni-bench-db-") as tmp:
+        manager = DatabaseManager(db_dir=Path(tmp))
+        sids = _seed(manager, sessions, messages_per_session)
+        db_path = str(manager._db_paths["chat"])
+        with manager.get_conn("chat") as conn:
+            msg_id = conn.execute("SELECT MAX(id) FROM chat_messages").fetchone()[0]
+
+        def legacy_session_list(_i):
+            conn = _open_per_call(db_path)
+            try:
+                conn.execute(SESSION_LIST_SQL).fetchall()
+                conn.commit()
+            finally:
+                conn.close()
+
+        def legacy_message_list(i):
+            conn = _open_per_call(db_path)
+            try:
+                conn.execute(MESSAGE_LIST_SQL, (sids[i % len(sids)],)).fetchall()
+                conn.commit()
+            finally:
+                conn.close()
+
+        def legacy_step_insert(i):
+            conn = _open_per_call(db_path)
+            try:
+                conn.execute(STEP_INSERT_SQL, (msg_id, sids[0], i, '{"type":"chunk"}', "2026-10-17T00:00:00"))
+                conn.commit()
+            finally:
+                conn.close()
+
+        def pooled_session_list(_i):
+            with manager.get_read_conn("chat") as conn:
+                conn.execute(SESSION_LIST_SQL).fetchall()
+
+        def pooled_message_list(i):
+            with manager.get_read_conn("chat") as conn:
+                conn.execute(MESSAGE_LIST_SQL, (sids[i % len(sids)],)).fetchall()
+
+        def pooled_writer_message_list(i):
+            with manager.get_conn("chat") as conn:
+                conn.execute(MESSAGE_LIST_SQL, (sids[i % len(sids)],)).fetchall()
+
+        def pooled_step_insert(i):
+            with manager.get_conn("chat") as conn:
+                conn.execute(STEP_INSERT_SQL, (msg_id, sids[0], iterations + i, '{"type":"chunk"}', "2026-10-17T00:00:00"))
+
+        print(f"数据: {sessions} 会话 x {messages_per_session} 消息, 每项 {iterations} 次")
+        for label, legacy, pooled in (
+            ("session_list", legacy_session_list, pooled_session_list),
+            ("message_list", legacy_message_list, pooled_message_list),
+            ("step_insert", legacy_step_insert, pooled_step_insert),
+        ):
+            print(f"[{label}]")
+            a = _report("open-per-call(旧)", _timeit(legacy, iterations))
+            b = _report("pooled", _timeit(pooled, iterations))
+            print(f"  加速比 {a / b:.1f}x")
+        print("[message_list 走写连接 get_conn]")
+        _report("pooled get_conn", _timeit(pooled_writer_message_list, iterations))
+
+        async def _async_reads():
+            async def one(i):
+                return await manager.run(
+                    "chat", lambda conn: conn.execute(MESSAGE_LIST_SQL, (sids[i % len(sids)],)).fetchall(),
+                    readonly=True)
+            t0 = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(iterations)))
+            return (time.perf_counter() - t0) * 1e6 / iterations
+
+        per_call = asyncio.run(_async_reads())
+        print(f"[db.run 异步门面] {iterations} 并发 message_list 摊薄 {per_call:.1f}us/次")
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite 连接池微基准")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=40, help="每会话消息数")
+    args = parser.parse_args()
+    run(args.iterations, args.sessions, args.messages)
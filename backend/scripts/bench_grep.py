@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+grep 搜索微基准: 旧路径(os.walk + safe_read_lines 全文 chardet + 逐行正则 + 逐条 stat 排序) vs grep_engine
+
+在临时目录生成 N 个文件的源码树(默认 50000: .py/.md/.log/.txt 文本、GBK 文本、灰区后缀、二进制、>64KB 大文件),
+对几类典型模式分别计时:
+  - 稀有字面量(needle)      — 索引收益最大
+  - 常见标识符(def xxx()    — 整段正则定位候选行
+  - 可跨行模式(\\s+return)   — 退回逐行扫描
+grep_engine 分别测 无索引 / 三元组索引冷启动(首次建索引)/ 热索引 三种; 每个模式都校验结果与旧路径逐条一致。
+并行扫描仅在 CPU>1 时启用(本机 CPU 数见输出)。
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/bench_grep.py
+    python scripts/bench_grep.py --files 20000 --context 2
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import fnmatch as fnm
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.tools.file import grep_engine, grep_index  # noqa: E402
+from app.tools.tool_constants import BINARY_EXTENSIONS, SKIP_DIRS  # noqa: E402
+from app.tools.validate.file_type_checker import TEXT_EXTENSIONS, is_binary_file, _detect_binary_content  # noqa: E402
+from app.tools.file.file_encoding import _ENCODING_PRIORITY  # noqa: E402
+from app.tools.toolhelper.cpu_pool import shutdown_cpu_pool  # noqa: E402
+
+PATTERNS = [
+    ("稀有字面量", r"needle_4242"),
+    ("常见标识符", r"def \w+_7\("),
+    ("可跨行模式", r"\s+return total_9"),
+]
+
+_WORDS = ["alpha", "beta", "gamma", "delta", "total", "value", "result", "config", "handler", "buffer"]
+
+
+# ── 生成数据 ─────────────────────────────────────────────────
+
+def _py_source(rng: random.Random, i: int) -> str:
+    lines = [f"# module {i}", "import os", ""]
+    for j in range(rng.randint(5, 30)):
+        w = rng.choice(_WORDS)
+        lines += [f"def {w}_{j}(x):", f"    total_{j} = x * {j}  # {w} 计算",
+                  f"    return total_{j}", ""]
+    if i % 997 == 0:
+        lines.append(f"NEEDLE = 'needle_4242'  # {i}")
+    return "\n".join(lines) + "\n"
+
+
+def _generate(root: Path, files: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    per_dir = 200
+    for i in range(files):
+        d = root / f"pkg{i // (per_dir * 10)}" / f"sub{(i // per_dir) % 10}"
+        if i % per_dir == 0:
+            d.mkdir(parents=True, exist_ok=True)
+        kind = i % 50
+        if kind == 0:
+            (d / f"blob_{i}.bin").write_bytes(os.urandom(2048))
+        elif kind == 1:
+            (d / f"data_{i}.dat").write_bytes(b"\x00\x01" * 512)  # 灰区后缀, 内容级探测为二进制
+        elif kind == 2:
+            (d / f"notes_{i}.txt").write_bytes(("中文说明 total_9 配置项\n" * 40).encode("gbk"))
+        elif kind == 3:
+            (d / f"app_{i}.log.1").write_text(f"INFO run {i}\r\nreturn total_9 ok\r\n" * 30, encoding="utf-8")
+        elif kind == 4:
+            (d / f"big_{i}.py").write_text(_py_source(rng, i) * 40, encoding="utf-8")  # >64KB 走 mmap
+        elif kind < 15:
+            (d / f"doc_{i}.md").write_text(f"# 文档 {i}\n\n" + " ".join(rng.choices(_WORDS, k=200)) + "\n",
+                                           encoding="utf-8")
+        else:
+            (d / f"mod_{i}.py").write_text(_py_source(rng, i), encoding="utf-8")
+    (root / "node_modules").mkdir(exist_ok=True)
+    (root / "node_modules" / "skip.py").write_text("needle_4242\n", encoding="utf-8")
+
+
+# ── 旧路径复刻 ───────────────────────────────────────────────
+
+def _legacy_read_lines(file_path: Path):
+    """复刻旧 safe_read_lines: chardet 跑全文 + 逐编码重新 open"""
+    detected_enc = None
+    try:
+        import chardet as _chardet
+        det = _chardet.detect(file_path.read_bytes())
+        if det and det.get("encoding") and det.get("confidence", 0) > 0.5:
+            detected_enc = det["encoding"]
+    except Exception:
+        pass
+    enc_list = [detected_enc] if detected_enc else []
+    enc_list += [e for e in _ENCODING_PRIORITY if e not in enc_list]
+    for enc in enc_list:
+        try:
+            with file_path.open("r", encoding=enc) as f:
+                return f.readlines()
+        except (UnicodeDecodeError, LookupError):
+            continue
+    return None
+
+
+def _legacy_grep(path: Path, regex, glob_filter, context: int) -> list:
+    """复刻旧 _grep_files_sync + _sort_grep_results_by_mtime(无超时)"""
+    results = []
+
+    def _search_one_file(fpath: Path) -> None:
+        suffix = fpath.suffix.lower()
+        if suffix in BINARY_EXTENSIONS:
+            return
+        if (not suffix or suffix not in TEXT_EXTENSIONS) and is_binary_file(str(fpath)):
+            return
+        if suffix and suffix not in TEXT_EXTENSIONS and _detect_binary_content(fpath)[0]:
+            return
+        lines = _legacy_read_lines(fpath)
+        if not lines:
+            return
+        for line_no, line in enumerate(lines, 1):
+            ms = list(regex.finditer(line))
+            if not ms:
+                continue
+            item = {"file": str(fpath), "line": line_no, "matched": [m.group(0) for m in ms],
+                    "content": line.rstrip('\n\r')}
+            if context > 0:
+                lo = max(0, line_no - 1 - context)
+                item["before"] = [{"line": i + 1, "text": lines[i].rstrip('\n\r')} for i in range(lo, line_no - 1)]
+                hi = min(len(lines), line_no + context)
+                item["after"] = [{"line": i + 1, "text": lines[i].rstrip('\n\r')} for i in range(line_no, hi)]
+            results.append(item)
+
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for fname in files:
+            if glob_filter and not fnm.fnmatch(fname, glob_filter):
+                continue
+            _search_one_file(Path(root) / fname)
+
+    def _mtime(item):
+        try:
+            return Path(item["file"]).stat().st_mtime
+        except OSError:
+            return -1.0
+    results.sort(key=_mtime, reverse=True)
+    return results
+
+
+def _engine_grep(path: Path, regex, glob_filter, context: int, use_index: bool) -> list:
+    scan = grep_engine.search(path, regex, glob_filter, time.monotonic() + 3600, context, use_index=use_index)
+    results = list(scan.results)
+    results.sort(key=lambda item: scan.mtimes.get(item["file"], -1.0), reverse=True)
+    return results
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def run(files: int, context: int) -> None:
+    with tempfile.TemporaryDirectory(prefix="omni-bench-grep-") as tmp:
+        root = Path(tmp) / "tree"
+        t0 = time.perf_counter()
+        _generate(root, files)
+        print(f"生成 {files} 个文件 {time.perf_counter() - t0:.1f}s, CPU={os.cpu_count()}, context={context}")
+        grep_index._INDEX_DIR = Path(tmp) / "grep_index"  # 索引落临时目录, 不污染 ~/.omniagent
+
+        for label, pattern in PATTERNS:
+            regex = re.compile(pattern, re.IGNORECASE)
+            buffer_regex, literals, gate = grep_engine.analyze_pattern(regex)
+            print(f"[{label}] {pattern}  整段扫描={'是' if buffer_regex else '否(逐行)'}  必含字面量={literals}"
+                  f"  字节门控={[g.pattern for g in gate]}")
+            legacy, t_legacy = _timed(_legacy_grep, root, regex, None, context)
+            print(f"  {'旧路径':<16} {t_legacy * 1000:9.0f}ms  命中 {len(legacy)} 行")
+            grep_index._cache.clear()
+            shutil.rmtree(grep_index._INDEX_DIR, ignore_errors=True)
+            for name, use_index in (("engine", False), ("engine+索引(冷)", True), ("engine+索引(热)", True)):
+                got, t = _timed(_engine_grep, root, regex, None, context, use_index)
+                assert got == legacy, f"{name} 结果与旧路径不一致: {len(got)} vs {len(legacy)}"
+                print(f"  {name:<16} {t * 1000:9.0f}ms  加速比 {t_legacy / t:5.1f}x  (结果一致 ✓)")
+        shutdown_cpu_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="grep 搜索引擎微基准")
+    parser.add_argument("--files", type=int, default=50000)
+    parser.add_argument("--context", type=int, default=0)
+    args = parser.parse_args()
+    run(args.files, args.context)
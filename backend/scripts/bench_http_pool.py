@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+network 工具 HTTP 连接池微基准: 旧路径(每次调用新建 httpx.AsyncClient, 用完即关) vs 共用连接池(create_http_client)
+
+本地起一个 HTTPS 桩服务(自签证书, HTTP/1.1 keep-alive, 统计新建 TLS 连接数), 分别测:
+  - 顺序 200 次请求(模拟 LLM 一轮轮调用 http_request/fetchpage)
+  - 并发 50 个请求(asyncio.gather)
+另做行为校验: 共用池下 SSRF 重定向拦截钩子仍生效、Cookie 不跨调用泄漏、响应内容一致。
+
+使用方法(需配置文件, 同后端启动; 需 cryptography 生成自签证书):
+    python scripts/bench_http_pool.py
+    python scripts/bench_http_pool.py --sequential 500 --concurrent 100
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import ssl
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.tools.network.http_client_sdk import (  # noqa: E402
+    HTTPClient, create_http_client, close_http_pools, is_ssrf_blocked_error,
+)
+from app.tools.tool_constants import NETWORK_MAX_CONNECTIONS, NETWORK_MAX_KEEPALIVE  # noqa: E402
+
+_BODY = b'{"ok": true, "items": [' + b",".join(b'"item-%d"' % i for i in range(200)) + b"]}"
+
+
+# ── HTTPS 桩服务 ─────────────────────────────────────────────
+
+def _self_signed(tmp: Path) -> tuple:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1)).not_valid_after(now + datetime.timedelta(days=1))
+            .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+                           critical=False)
+            .sign(key, hashes.SHA256()))
+    cert_path, key_path = tmp / "cert.pem", tmp / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                           serialization.NoEncryption()))
+    return str(cert_path), str(key_path)
+
+
+class _StubServer:
+    """最小 HTTP/1.1 keep-alive 服务: / 返回 JSON, /redirect 302 到元数据地址, /set-cookie 下发 Cookie, /echo-cookie 回显"""
+
+    def __init__(self, cert: str, key: str):
+        self.connections = 0
+        self.port = 0
+        self._ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self._ctx.load_cert_chain(cert, key)
+        self._ready = threading.Event()
+        self._loop = None
+        threading.Thread(target=self._serve, daemon=True).start()
+        self._ready.wait()
+
+    def _serve(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, "127.0.0.1", 0, ssl=self._ctx, backlog=512))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _handle(self, reader, writer) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                path = head.split(b" ", 2)[1]
+                cookie = b""
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"cookie:"):
+                        cookie = line.split(b":", 1)[1].strip()
+                extra, body, status = b"", _BODY, b"200 OK"
+                if path == b"/redirect":
+                    status, body, extra = b"302 Found", b"", b"Location: http://169.254.169.254/latest/meta-data\r\n"
+                elif path == b"/set-cookie":
+                    extra = b"Set-Cookie: session=secret; Path=/\r\n"
+                elif path == b"/echo-cookie":
+                    body = cookie
+                writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Type: application/json\r\n" + extra +
+                             b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+
+# ── 客户端两种路径 ───────────────────────────────────────────
+
+async def _legacy_get(url: str) -> bytes:
+    """复刻旧 HTTPClient.__aenter__/__aexit__: 每次新建 AsyncClient(新 SSL 上下文+新连接池), 用完 aclose"""
+    client = httpx.AsyncClient(
+        verify=False, timeout=httpx.Timeout(30.0, connect=10.0),
+        limits=httpx.Limits(max_connections=NETWORK_MAX_CONNECTIONS, max_keepalive_connections=NETWORK_MAX_KEEPALIVE),
+        follow_redirects=True, event_hooks={"response": [HTTPClient._validate_redirect]},
+    )
+    try:
+        return (await client.get(url)).content
+    finally:
+        await client.aclose()
+
+
+async def _pooled_get(url: str) -> bytes:
+    async with create_http_client(timeout_sec=30.0, verify_ssl=False) as client:
+        return (await client.get(url)).content
+
+
+async def _measure(server: _StubServer, fn, sequential: int, concurrent: int) -> dict:
+    url = f"https://127.0.0.1:{server.port}/"
+    out = {}
+    base = server.connections
+    t0 = time.perf_counter()
+    for _ in range(sequential):
+        assert await fn(url) == _BODY
+    out["seq"] = (time.perf_counter() - t0, server.connections - base)
+    base = server.connections
+    t0 = time.perf_counter()
+    bodies = await asyncio.gather(*(fn(url) for _ in range(concurrent)))
+    assert all(b == _BODY for b in bodies)
+    out["conc"] = (time.perf_counter() - t0, server.connections - base)
+    return out
+
+
+async def _check_behaviour(server: _StubServer) -> None:
+    base = f"https://127.0.0.1:{server.port}"
+    async with create_http_client(verify_ssl=False) as client:
+        try:
+            await client.get(f"{base}/redirect")
+            raise AssertionError("SSRF 重定向未被拦截")
+        except httpx.InvalidURL as e:
+            assert is_ssrf_blocked_error(e) is not None
+        await client.get(f"{base}/set-cookie")
+        assert (await client.get(f"{base}/echo-cookie")).content == b"session=secret"  # 同一次调用内 Cookie 照旧
+    async with create_http_client(verify_ssl=False) as client:
+        assert (await client.get(f"{base}/echo-cookie")).content == b""  # 跨调用不泄漏
+
+
+async def _main(sequential: int, concurrent: int) -> None:
+    with tempfile.TemporaryDirectory(prefix="omni-bench-http-") as tmp:
+        server = _StubServer(*_self_signed(Path(tmp)))
+        print(f"HTTPS 桩服务 127.0.0.1:{server.port}; 顺序 {sequential} 次 / 并发 {concurrent} 个")
+        legacy = await _measure(server, _legacy_get, sequential, concurrent)
+        pooled = await _measure(server, _pooled_get, sequential, concurrent)
+        for label, key, n in (("顺序", "seq", sequential), ("并发", "conc", concurrent)):
+            (t_l, c_l), (t_p, c_p) = legacy[key], pooled[key]
+            print(f"  [{label}] 旧路径 {t_l * 1000:8.0f}ms ({t_l / n * 1000:6.2f}ms/次, 新建连接 {c_l:4d})"
+                  f"  共用池 {t_p * 1000:8.0f}ms ({t_p / n * 1000:6.2f}ms/次, 新建连接 {c_p:4d})"
+                  f"  加速比 {t_l / t_p:5.1f}x")
+        await _check_behaviour(server)
+        await close_http_pools()
+        print("  校验: 响应一致 / SSRF 重定向拦截生效 / Cookie 不跨调用 ✓")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="network 工具 HTTP 连接池微基准")
+    parser.add_argument("--sequential", type=int, default=200)
+    parser.add_argument("--concurrent", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(_main(args.sequential, args.concurrent))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+MessageBuilder 每轮上下文准备微基准: 全量重算(旧) vs 增量记账(_sync_ledger)
+
+按 react 单轮的真实调用序列计时(历史长度 500/1000/2000 条起步):
+  add_observation(查 tool_call_id 是否已有 assistant) → trim_history(未触发裁剪的早退路径)
+旧行为复刻为 _legacy_round: 全表扫描 tool_call_id + 对整个历史重算 _estimate_tokens(tool_calls 逐条 json.dumps)。
+另做一致性校验: 每轮 history_tokens() 必须等于对当前历史全量 _estimate_tokens 的结果。
+
+使用方法(需配置文件, 同后端启动; MessageBuilder 构造读取 max_rounds):
+    python scripts/bench_message_builder.py
+    python scripts/bench_message_builder.py --sizes 500 2000 --rounds 200
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.agent.message_builder import MessageBuilder  # noqa: E402
+
+
+def _fc_context(i: int) -> dict:
+    tid = f"call_{i}"
+    return {
+        "tool_call_id": tid,
+        "tool_calls": [{"id": tid, "type": "function",
+                        "function": {"name": "read_file", "arguments": f'{{"path": "/data/file_{i}.txt"}}'}}],
+        "llm_content": "",
+    }
+
+
+def _build(size: int) -> MessageBuilder:
+    """size 条消息的历史(system+user+每轮 assistant/tool 一对); 上下文/轮数上限放大, 只测早退路径"""
+    mb = MessageBuilder(max_context_tokens=10 ** 9)
+    mb._max_rounds = 10 ** 6
+    mb.init_history("system prompt " * 200, "task " * 50)
+    i = 0
+    while len(mb.conversation_history) < size:
+        mb.add_observation("[Observation] " + "结果行\n" * 40, _fc_context(i))
+        i += 1
+    return mb
+
+
+def _legacy_round(mb: MessageBuilder, i: int) -> None:
+    """复刻旧每轮开销: 全表扫描 tool_call_id + 全量 token 估算"""
+    tid = f"call_legacy_{i}"
+    any(msg.get("role") == "assistant" and any(tc.get("id") == tid for tc in (msg.get("tool_calls") or []))
+        for msg in mb.conversation_history)
+    MessageBuilder._estimate_tokens(mb.conversation_history)
+
+
+def _incremental_round(mb: MessageBuilder, i: int) -> None:
+    mb._append_observation("[Observation] ok", _fc_context(10 ** 6 + i))
+    mb.trim_history()
+
+
+def _timeit(fn, mb: MessageBuilder, rounds: int) -> list:
+    samples = []
+    for i in range(rounds):
+        t0 = time.perf_counter()
+        fn(mb, i)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return samples
+
+
+def _report(name: str, samples: list) -> float:
+    samples = sorted(samples)
+    mean = statistics.fmean(samples)
+    print(f"  {name:<22} mean={mean:10.1f}us  p50={samples[len(samples) // 2]:10.1f}us")
+    return mean
+
+
+def run(sizes: list, rounds: int) -> None:
+    for size in sizes:
+        print(f"[历史 {size} 条, {rounds} 轮]")
+        legacy = _report("全量重算(旧)", _timeit(_legacy_round, _build(size), rounds))
+        mb = _build(size)
+        mb.history_tokens()  # 首次建账(等同运行中已建好)
+        incremental = _report("增量记账", _timeit(_incremental_round, mb, rounds))
+        assert mb.history_tokens() == MessageBuilder._estimate_tokens(mb.conversation_history), "增量记账与全量估算不一致"
+        print(f"  加速比 {legacy / incremental:.1f}x  (校验: history_tokens == 全量估算 ✓)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MessageBuilder 增量记账微基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000])
+    parser.add_argument("--rounds", type=int, default=300)
+    args = parser.parse_args()
+    run(args.sizes, args.rounds)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+read_pdf 逐页翻阅微基准: 旧路径(每次调用整本 pdfplumber 文本+表格+图片) vs 页定向提取 + 页级缓存
+
+用 reportlab 在临时目录生成 N 页 PDF(默认 500 页, 每 10 页一张表格), 模拟 LLM 连续调用 read_pdf(page=1..K):
+  - 旧路径: 复刻旧 read_pdf 主循环(打开整本, 每页 extract_text + find_tables + images), 再取所选页
+  - 新路径: read_pdf(page=N) 真实调用; 冷缓存 → 同一批页再翻一遍(热缓存)
+另做一致性校验: 新路径每页文本与旧路径同页文本一致。
+
+使用方法:
+    python scripts/bench_read_pdf.py
+    python scripts/bench_read_pdf.py --pages 200 --reads 10
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.tools.document.read_pdf import read_pdf  # noqa: E402
+from app.tools.document import pdf_page_extractor  # noqa: E402
+
+
+def _generate(path: Path, pages: int) -> None:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    c = canvas.Canvas(str(path), pagesize=A4)
+    for pn in range(1, pages + 1):
+        y = 800
+        c.drawString(50, y, f"Chapter {pn // 10 + 1} - page {pn}")
+        for line in range(40):
+            y -= 18
+            c.drawString(50, y, f"line {line:02d} of page {pn}: lorem ipsum dolor sit amet value={pn * line}")
+        if pn % 10 == 0:
+            for r in range(5):
+                for col in range(4):
+                    c.rect(50 + col * 120, 60 + r * 20, 120, 20)
+                    c.drawString(55 + col * 120, 66 + r * 20, f"r{r}c{col}")
+        c.showPage()
+    c.save()
+
+
+def _legacy_read(path: str, page: int) -> str:
+    """复刻旧 read_pdf 主循环: 整本逐页文本+表格+图片, 再按所选页取文本"""
+    import pdfplumber
+    pages_text = []
+    with pdfplumber.open(path) as pdf:
+        for pn in range(1, len(pdf.pages) + 1):
+            p = pdf.pages[pn - 1]
+            text = p.extract_text() or ""
+            [t.extract() for t in p.find_tables()]
+            list(p.images)
+            pages_text.append(f"--- 第 {pn} 页 ---\n{text}")
+    return pages_text[page - 1]
+
+
+def run(pages: int, reads: int, legacy_reads: int) -> None:
+    with tempfile.TemporaryDirectory(prefix="omni-bench-pdf-") as tmp:
+        pdf_path = Path(tmp) / "book.pdf"
+        _generate(pdf_path, pages)
+        print(f"生成 {pages} 页 PDF, {pdf_path.stat().st_size // 1024}KB; 连续读取 page=1..{reads}")
+
+        legacy_texts = {}
+        t0 = time.perf_counter()
+        for pn in range(1, legacy_reads + 1):
+            legacy_texts[pn] = _legacy_read(str(pdf_path), pn)
+        legacy_per_call = (time.perf_counter() - t0) / legacy_reads
+        print(f"  {'旧路径(整本解析)':<20} {legacy_per_call * 1000:9.0f}ms/次  (测 {legacy_reads} 次)")
+
+        pdf_page_extractor._cache.clear()
+        for label in ("页定向(冷缓存)", "页定向(热缓存)"):
+            t0 = time.perf_counter()
+            for pn in range(1, reads + 1):
+                r = read_pdf(str(pdf_path), page=pn)
+                assert r["llm_data"]["status"]["exec_code"] == "success", r["llm_data"]
+                if pn in legacy_texts:
+                    assert r["data"]["text"] == legacy_texts[pn], f"第 {pn} 页文本与旧路径不一致"
+            per_call = (time.perf_counter() - t0) / reads
+            print(f"  {label:<20} {per_call * 1000:9.1f}ms/次  加速比 {legacy_per_call / per_call:7.1f}x")
+
+        t0 = time.perf_counter()
+        r = read_pdf(str(pdf_path), page=10, tables=True)
+        print(f"  page=10 tables=True       {(time.perf_counter() - t0) * 1000:9.1f}ms  表格 {len(r['data'].get('tables', []))} 张")
+        print(f"  缓存: {pdf_page_extractor.cache_stats()}  (校验: 前 {legacy_reads} 页文本与旧路径一致 ✓)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="read_pdf 页定向提取+页级缓存微基准")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--reads", type=int, default=20, help="连续翻页次数")
+    parser.add_argument("--legacy-reads", type=int, default=2, help="旧路径计时次数(每次整本解析, 较慢)")
+    args = parser.parse_args()
+    run(args.pages, args.reads, args.legacy_reads)
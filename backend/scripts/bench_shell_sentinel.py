@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+PersistentShell 命令完成信号 — 哨兵行管道协议 vs 结果文件轮询: 差分校验 + 单命令开销基准(bash 替身)
+
+本机无 pwsh 时用 bash 替身跑同一套协议(PersistentShell 的 ps_cmd 是 PowerShell 语法, 协议本身与 shell 无关):
+  旧: 持久 bash 从 stdin 收一句投递, 命令 stdout/stderr/退出码/cwd 分别落 .out/.err/.code/.cwd 文件,
+      Python 侧按 shell_engine 旧 _poll_for_file(100ms→1s 指数退避)轮询 .code、补等 .cwd, 读文件后删除
+  新: 持久 bash 的 stdout/stderr 为管道, shell_engine._SentinelReader 读线程切帧;
+      命令后向 stderr 写 ERR 哨兵、向 stdout 写 DONE 哨兵(rc + cwd), 等 Condition 事件
+  两边都先把命令写入临时脚本再 dot-source(同 PersistentShell 的 cmd.ps1)
+校验: 同一组命令(含多行/中文/无末尾换行/大输出/stdout·stderr 交错/cd/子 shell exit/伪哨兵文本/CRLF·裸 CR/非法 UTF-8)
+      两种协议 stdout/stderr/rc/cwd 完全一致; 增量回调拼接 == 最终输出; 超时; 命令内 exit 立即返回
+基准: N 条极简命令(默认 1000 条 `true`)逐条执行的平均单命令耗时
+
+使用方法:
+    python scripts/bench_shell_sentinel.py
+    python scripts/bench_shell_sentinel.py --commands 1000 --legacy-commands 200
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.tools.fundamental.shell_engine import _SENTINEL_PREFIX, _SentinelReader  # noqa: E402
+
+_BASH = shutil.which("bash")
+
+
+def _start_bash(stdout, stderr, cwd: str) -> subprocess.Popen:
+    return subprocess.Popen([_BASH, "--noprofile", "--norc", "-s"], stdin=subprocess.PIPE, stdout=stdout,
+                            stderr=stderr, cwd=cwd, env={**os.environ, "LC_ALL": "C.UTF-8"})
+
+
+def _write_script(command: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=".sh")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(command)
+    return path
+
+
+def _quote(path: str) -> str:
+    return "'" + path.replace("'", "'\\''") + "'"
+
+
+# ---------------------------------------------------------------- 旧实现复刻(结果文件 + _poll_for_file 轮询)
+
+def _legacy_poll_for_file(path: str, timeout: float) -> bool:
+    deadline = time.time() + timeout
+    delay = 0.1
+    while time.time() < deadline:
+        try:
+            if os.path.getsize(path) > 0:
+                return True
+        except OSError:
+            pass
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 1.0)
+    return False
+
+
+def _read(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+class _FileProtocolShell:
+    def __init__(self, cwd: str):
+        self.proc = _start_bash(subprocess.DEVNULL, subprocess.DEVNULL, cwd)
+        self.cwd = cwd
+
+    def exec(self, command: str, timeout: float = 30) -> Dict[str, Any]:
+        paths = {name: tempfile.mkstemp(suffix="." + name)[1] for name in ("out", "err", "code", "cwd")}
+        for p in paths.values():
+            open(p, "w").close()
+        script = _write_script(command)
+        try:
+            q = {k: _quote(v) for k, v in paths.items()}
+            feed = (f"{{ . {_quote(script)}; }} >{q['out']} 2>{q['err']}; echo $? >{q['code']}; pwd >{q['cwd']}\n")
+            self.proc.stdin.write(feed.encode("utf-8"))
+            self.proc.stdin.flush()
+            if not _legacy_poll_for_file(paths["code"], timeout):
+                self.proc.kill()
+                return {"stdout": "", "stderr": "timeout", "exit_code": -1, "timed_out": True}
+            _legacy_poll_for_file(paths["cwd"], 3)
+            cwd = _read(paths["cwd"]).strip()
+            if cwd:
+                self.cwd = cwd
+            code = _read(paths["code"]).strip()
+            return {"stdout": _read(paths["out"]), "stderr": _read(paths["err"]), "exit_code": int(code) if code else 0}
+        finally:
+            for p in (*paths.values(), script):
+                os.unlink(p)
+
+    def close(self) -> None:
+        self.proc.kill()
+        self.proc.wait()
+
+
+# ---------------------------------------------------------------- 新协议(bash 替身, 读线程/切帧用 shell_engine 实现)
+
+class _SentinelProtocolShell:
+    def __init__(self, cwd: str):
+        self.proc = _start_bash(subprocess.PIPE, subprocess.PIPE, cwd)
+        self.reader = _SentinelReader(self.proc, "bench-bash")
+        self.cwd = cwd
+
+    def exec(self, command: str, timeout: float = 30, on_output=None) -> Dict[str, Any]:
+        script = _write_script(command)
+        try:
+            frame = self.reader.begin(on_output)
+            m = f"{_SENTINEL_PREFIX}{frame.nonce}"
+            feed = (f"{{ . {_quote(script)}; }}; __rc=$?; printf '\\n{m}__ERR\\n' >&2; "
+                    f"printf '\\n{m}__DONE %s %s\\n' \"$__rc\" \"$PWD\"\n")
+            self.proc.stdin.write(feed.encode("utf-8"))
+            self.proc.stdin.flush()
+            if not self.reader.wait(frame, timeout):
+                self.proc.kill()
+                return {"stdout": "", "stderr": "timeout", "exit_code": -1, "timed_out": True}
+            if frame.died and not frame.done:
+                return {"stdout": frame.text("stdout"), "stderr": frame.text("stderr"),
+                        "exit_code": self.proc.wait(timeout=5), "died": True}
+            if frame.cwd:
+                self.cwd = frame.cwd
+            return {"stdout": frame.text("stdout"), "stderr": frame.text("stderr"), "exit_code": frame.exit_code}
+        finally:
+            os.unlink(script)
+
+    def close(self) -> None:
+        self.proc.kill()
+        self.proc.wait()
+
+
+# ---------------------------------------------------------------- 校验 / 基准
+
+def _cases(root: str) -> List[str]:
+    sub = os.path.join(root, "dir with space")
+    os.makedirs(sub, exist_ok=True)
+    return [
+        "true",
+        "echo hello",
+        "printf 'no trailing newline'",
+        "printf ''",
+        "echo 中文输出 ✓; echo 错误信息 >&2",
+        "for i in 1 2 3; do echo out$i; echo err$i >&2; done",
+        "false",
+        "(exit 7)",
+        "ls /nonexistent-path-xyz",
+        f"cd {_quote(sub)} && pwd",
+        "cd .. ; pwd",
+        "x=1\ny=2\necho $((x + y))\n",
+        "python3 -c \"print('x' * 1000000)\"",
+        "python3 -c \"import sys; sys.stderr.write('e' * 300000)\"",
+        f"echo '{_SENTINEL_PREFIX}deadbeef__DONE 0 /fake'; echo '__OMNI_ ERR' >&2",
+        "printf '\\n\\n\\n'",
+        "printf 'a\\r\\nb\\r\\n'",
+        "printf 'progress 50%%\\rprogress 100%%\\n'",
+        "printf '\\xff\\xfe bad utf8 \\xc3\\n'",
+        "seq 1 20000",
+        "echo $HOME | wc -c",
+    ]
+
+
+def _check(root: str) -> None:
+    old, new = _FileProtocolShell(root), _SentinelProtocolShell(root)
+    try:
+        for command in _cases(root):
+            want, got = old.exec(command), new.exec(command)
+            assert got == want, f"命令 {command[:60]!r} 结果不一致\n新 {str(got)[:300]}\n旧 {str(want)[:300]}"
+            assert new.cwd == old.cwd, f"命令 {command[:60]!r} cwd 不一致: 新 {new.cwd} 旧 {old.cwd}"
+        print(f"  校验 [差分] {len(_cases(root))} 条命令 stdout/stderr/rc/cwd 两协议一致 ✓")
+
+        chunks: Dict[str, List[str]] = {"stdout": [], "stderr": []}
+        result = new.exec("for i in $(seq 1 5); do echo line$i; echo warn$i >&2; sleep 0.05; done",
+                          on_output=lambda stream, text: chunks[stream].append(text))
+        assert "".join(chunks["stdout"]) == result["stdout"] and "".join(chunks["stderr"]) == result["stderr"]
+        assert len(chunks["stdout"]) >= 3, f"增量回调片段过少: {chunks['stdout']}"
+        print(f"  校验 [增量输出] 回调 {len(chunks['stdout'])}+{len(chunks['stderr'])} 段, 拼接 == 最终输出 ✓")
+
+        t0 = time.perf_counter()
+        result = new.exec("sleep 5", timeout=0.5)
+        assert result.get("timed_out") and time.perf_counter() - t0 < 2
+        new.close()
+        new = _SentinelProtocolShell(root)
+        t0 = time.perf_counter()
+        result = new.exec("echo before; exit 3")
+        took = time.perf_counter() - t0
+        assert result.get("died") and result["exit_code"] == 3 and result["stdout"] == "before\n" and took < 1, result
+        print(f"  校验 [超时 0.5s 返回 / 命令内 exit 3 经管道 EOF {took * 1e3:.1f}ms 返回(退出码 3, 已收输出保留)] ✓")
+    finally:
+        old.close()
+        new.close()
+
+
+def _bench(cls, n: int, root: str) -> float:
+    shell = cls(root)
+    try:
+        shell.exec("true")  # 预热
+        t0 = time.perf_counter()
+        for _ in range(n):
+            result = shell.exec("true")
+            assert result["exit_code"] == 0
+        return (time.perf_counter() - t0) / n
+    finally:
+        shell.close()
+
+
+def run(commands: int, legacy_commands: int) -> None:
+    if not _BASH:
+        print("  未找到 bash, 跳过")
+        return
+    logging.disable(logging.WARNING)
+    root = tempfile.mkdtemp(prefix="sentinel_bench_")
+    try:
+        _check(root)
+        t_new = _bench(_SentinelProtocolShell, commands, root)
+        t_old = _bench(_FileProtocolShell, legacy_commands, root)
+        print(f"  基准 极简命令 `true`: 旧(结果文件+轮询, {legacy_commands} 条) {t_old * 1e3:7.2f}ms/条  "
+              f"新(哨兵行管道, {commands} 条) {t_new * 1e3:6.3f}ms/条  ({t_old / t_new:.0f}x)")
+        print(f"         {commands} 条合计: 旧约 {t_old * commands:.1f}s  新 {t_new * commands:.2f}s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        logging.disable(logging.NOTSET)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PersistentShell 哨兵行管道协议 vs 结果文件轮询: 差分校验 + 单命令开销基准")
+    parser.add_argument("--commands", type=int, default=1000, help="新协议基准命令数")
+    parser.add_argument("--legacy-commands", type=int, default=100, help="旧协议基准命令数(每条约 100ms, 默认少跑)")
+    args = parser.parse_args()
+    run(args.commands, args.legacy_commands)
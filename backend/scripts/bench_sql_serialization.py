@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+query_sql / DataFrame 结果序列化微基准 + 分页游标校验(10 万行混合类型)
+
+三组对比:
+  - DataFrame 行序列化: 旧 _serialize_rows(逐行逐格 pd.isna/item/isoformat) vs 新逐列按 dtype 转换, 校验输出一致
+  - SQLite 结果拉取: 旧 query_sql 路径(sqlite3.Row 逐行 dict) vs sql_cursor.fetch_columns(fetchmany 分批 + 逐列转换 + to_records)
+  - 分页游标: query_sql 首页 + 按 next_cursor 续读至读完, 各页拼接与一次性全量查询一致, 且续读期间不再执行 SQL
+
+混合类型列: INTEGER / REAL(含 NULL) / TEXT / 日期字符串 / BLOB / NULL 列; DataFrame 另含 datetime64 / bool / object(None)
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/bench_sql_serialization.py
+    python scripts/bench_sql_serialization.py --rows 200000 --page 5000
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from app.tools.dataanalysis import sql_cursor  # noqa: E402
+from app.tools.dataanalysis.query_sql import query_sql  # noqa: E402
+from app.tools.tool_fc_helper import _serialize_rows  # noqa: E402
+
+
+def _legacy_serialize_rows(df) -> list:
+    """复刻旧 _serialize_rows: 逐行逐格判断"""
+    out = []
+    for row in df.values.tolist():
+        serialized = []
+        for val in row:
+            if pd.isna(val):
+                serialized.append(None)
+            elif hasattr(val, 'item'):
+                serialized.append(val.item())
+            elif hasattr(val, 'isoformat'):
+                serialized.append(val.isoformat())
+            else:
+                serialized.append(val)
+        out.append(serialized)
+    return out
+
+
+def _legacy_fetch(db: str, sql: str) -> list:
+    """复刻旧 query_sql SQLite 路径: row_factory=sqlite3.Row, 逐行 dict(row)"""
+    conn = sqlite3.connect(db)
+    try:
+        conn.row_factory = sqlite3.Row
+        return [dict(row) for row in conn.execute(sql)]
+    finally:
+        conn.close()
+
+
+def _columnar_fetch(db: str, sql: str) -> list:
+    conn = sqlite3.connect(db)
+    try:
+        cur = conn.execute(sql)
+        columns = [d[0] for d in cur.description]
+        data, _n, _exhausted = sql_cursor.fetch_columns(cur.fetchmany, len(columns), 10 ** 9)
+        return sql_cursor.to_records(columns, data)
+    finally:
+        conn.close()
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def _bench_dataframe(rows: int) -> None:
+    rng = np.random.default_rng(0)
+    price = rng.random(rows) * 100
+    price[::7] = np.nan
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "price": price,
+        "name": [f"item-{i}" if i % 11 else None for i in range(rows)],
+        "created": pd.date_range("2026-01-01", periods=rows, freq="min"),
+        "flag": rng.random(rows) > 0.5,
+    })
+    old, t_old = _timed(_legacy_serialize_rows, df)
+    new, t_new = _timed(_serialize_rows, df)
+    assert old == new, "逐列序列化与旧逐行结果不一致"
+    print(f"  [DataFrame {rows} 行 x {df.shape[1]} 列] 旧逐行 {t_old * 1000:8.1f}ms  新逐列 {t_new * 1000:8.1f}ms  "
+          f"加速比 {t_old / t_new:5.1f}x  结果一致 ✓")
+
+
+def _make_db(db: str, rows: int) -> None:
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, amount REAL, customer TEXT, "
+                     "created_at TEXT, payload BLOB, note TEXT)")
+        conn.executemany(
+            "INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?)",
+            ((i, None if i % 13 == 0 else i * 1.25, f"客户{i % 997}", f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+              bytes([i % 256]) * 8 if i % 5 == 0 else None, None) for i in range(rows)))
+
+
+def _bench_sqlite(db: str, rows: int) -> None:
+    sql = "SELECT id, amount, customer, created_at, note FROM orders"
+    old, t_old = _timed(_legacy_fetch, db, sql)
+    new, t_new = _timed(_columnar_fetch, db, sql)
+    assert old == new, "列式拉取与旧逐行 dict 结果不一致"
+    print(f"  [SQLite {rows} 行, 无 BLOB] 旧逐行 dict {t_old * 1000:8.1f}ms  fetchmany 列式 {t_new * 1000:8.1f}ms  "
+          f"比值 {t_old / t_new:5.2f}x  结果一致 ✓")
+    blob, t_blob = _timed(_columnar_fetch, db, "SELECT * FROM orders")
+    assert isinstance(blob[5]["payload"], str) and blob[1]["payload"] is None, "BLOB 未转 base64"
+    print(f"  [SQLite {rows} 行, 含 BLOB] fetchmany 列式 {t_blob * 1000:8.1f}ms (BLOB → base64, 旧路径返回 bytes 无法 JSON 序列化)")
+
+
+def _check_cursor(db: str, rows: int, page: int) -> None:
+    sql = "SELECT id, amount, customer FROM orders ORDER BY id"
+    full = _legacy_fetch(db, sql)
+    capped = min(rows, page + sql_cursor.QUERY_SQL_CURSOR_MAX_ROWS)
+
+    executed = []
+    real_connect = sqlite3.connect
+
+    def counting_connect(*args, **kwargs):
+        conn = real_connect(*args, **kwargs)
+        conn.set_trace_callback(lambda stmt: executed.append(stmt) if stmt.lstrip().upper().startswith("SELECT") else None)
+        return conn
+
+    sqlite3.connect = counting_connect
+    try:
+        t0 = time.perf_counter()
+        first = query_sql(sql, path=db, limit=page)["data"]
+        t_first = time.perf_counter() - t0
+        got, pages, cursor = list(first["rows"]), 1, first["next_cursor"]
+        t0 = time.perf_counter()
+        while cursor:
+            data = query_sql(sql, path=db, limit=page, cursor=cursor)["data"]
+            got.extend(data["rows"])
+            pages += 1
+            cursor = data["next_cursor"]
+        t_rest = time.perf_counter() - t0
+    finally:
+        sqlite3.connect = real_connect
+    assert got == full[:capped], "游标各页拼接与全量结果不一致"
+    assert len(executed) == 1, f"续读时重跑了查询: {executed}"
+    expired = query_sql(sql, path=db, limit=page, cursor="qc-000000000000")
+    assert expired["llm_data"]["status"]["exec_code"] == "error"
+    print(f"  [分页游标] {pages} 页 x {page} 行 = {len(got)} 行; 首页(含缓冲剩余行) {t_first * 1000:7.1f}ms, "
+          f"续读 {t_rest / max(pages - 1, 1) * 1000:6.2f}ms/页; SQL 仅执行 1 次 / 拼接一致 / 无效游标报错 ✓")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="结果序列化微基准 + 分页游标校验")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--page", type=int, default=1000, help="分页游标校验每页行数")
+    args = parser.parse_args()
+    _bench_dataframe(args.rows)
+    with tempfile.TemporaryDirectory(prefix="omni-bench-sql-") as tmp:
+        db = str(Path(tmp) / "bench.db")
+        _make_db(db, args.rows)
+        _bench_sqlite(db, args.rows)
+        _check_cursor(db, args.rows, args.page)
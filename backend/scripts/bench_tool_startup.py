@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+工具注册启动开销 — 全量注册 vs 懒注册(tool_manifest 清单 + 实现桩 + 后台依赖检查): 校验 + 冷启动基准
+
+每种模式起独立子进程(临时 HOME + 临时 config.yaml, 只改 tools.lazy_registration), 计 import app.main + ensure_tools_registered():
+  全量    : tools.lazy_registration=false, 导入全部分类注册模块(连带工具实现), 注册时同步检查依赖
+  懒/首启 : 清单不存在 → 全量导入注册 + 写清单, 依赖检查转后台线程
+  懒/热启 : 清单命中 → 按清单注册 schema, 不导入工具实现模块
+校验:
+  ①差分: 懒/热启与全量的逐工具元数据(描述/分类/schema/示例/确认标记/依赖/sync·async)及 to_openai_tools() 完全一致
+  ②懒/热启后未导入任何工具实现模块与 pandas/numpy; 实现桩与真实实现 iscoroutinefunction 一致
+  ③实现桩调用结果(sync: timediff/which, async: listdir/timer_list)与全量注册一致, 调用后注册表内的桩已换成真实实现
+基准: 启动耗时(取 --runs 次最小值)/ 峰值 RSS(ru_maxrss)/ 后台依赖检查线程耗时
+
+使用方法:
+    python scripts/bench_tool_startup.py
+    python scripts/bench_tool_startup.py --runs 5
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+_BACKEND = Path(__file__).resolve().parent.parent
+_HEAVY = ("pandas", "numpy", "openpyxl", "pdfplumber", "docx", "pptx", "matplotlib", "PIL")
+
+
+def _strip_volatile(value: Any) -> Any:
+    """去掉耗时字段(每次调用不同)"""
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k != "duration_ms"}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+# ---------------------------------------------------------------- 子进程(单次冷启动)
+
+def _child(calls_dir: str) -> None:
+    import asyncio
+    import importlib
+    import inspect
+    import resource
+    import threading
+    import time
+
+    t0 = time.perf_counter()
+    importlib.import_module("app.main")  # 被计时的冷启动本身(本函数即子进程), 不绑定名字
+    from app.tools.registry import ensure_tools_registered, tool_registry
+    ensure_tools_registered()
+    boot = time.perf_counter() - t0
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    impl_modules = {getattr(fn, "__tool_ref__", (fn.__module__,))[0] for fn in tool_registry._implementations.values()}
+    loaded = sorted(m for m in impl_modules if m in sys.modules)
+    heavy = [m for m in _HEAVY if m in sys.modules]
+
+    dep_thread = next((t for t in threading.enumerate() if t.name == "tool-dependency-check"), None)
+    t1 = time.perf_counter()
+    if dep_thread is not None:
+        dep_thread.join()
+    dep_wait = time.perf_counter() - t1 if dep_thread is not None else None
+
+    tools = {}
+    for name, meta in tool_registry._tools.items():
+        impl = tool_registry._implementations[name]
+        tools[name] = {
+            "description": meta.description, "category": meta.category.value, "version": meta.version,
+            "input_schema": meta.input_schema, "examples": meta.examples, "expose_to_llm": meta.expose_to_llm,
+            "needs_confirmation": meta.needs_confirmation, "action_confirmation": meta.action_confirmation,
+            "dependencies": meta.dependencies, "is_async": inspect.iscoroutinefunction(impl),
+            "failure_hint_fn": meta.failure_hint_fn is not None, "check_fn": meta.check_fn is not None,
+        }
+    stubs = [name for name, fn in tool_registry._implementations.items() if hasattr(fn, "__tool_ref__")]
+
+    calls = {}
+    first_call = {}
+    for name, kwargs in (("timediff", {"start": "2026-01-01 00:00:00", "end": "2026-03-01 12:30:00"}),
+                         ("which", {"command": "python3"}),
+                         ("listdir", {"path": calls_dir}),
+                         ("timer_list", {})):
+        fn = tool_registry.get_implementation(name)
+        t2 = time.perf_counter()
+        result = asyncio.run(fn(**kwargs)) if inspect.iscoroutinefunction(fn) else fn(**kwargs)
+        first_call[name] = round((time.perf_counter() - t2) * 1e3, 1)
+        real = tool_registry.get_implementation(name)
+        assert not hasattr(real, "__tool_ref__"), f"{name} 调用后注册表内仍是实现桩"
+        assert inspect.iscoroutinefunction(real) == inspect.iscoroutinefunction(fn), f"{name} 桩与真实实现 sync/async 不一致"
+        calls[name] = _strip_volatile(result)
+
+    print(json.dumps({
+        "boot": boot, "rss_mb": rss_mb, "dep_wait": dep_wait, "loaded_impl_modules": loaded, "heavy": heavy,
+        "stubs": len(stubs), "tools": tools, "openai_tools": tool_registry.to_openai_tools(), "calls": calls,
+        "first_call_ms": first_call,
+    }, ensure_ascii=False, default=str))
+
+
+# ---------------------------------------------------------------- 父进程
+
+def _write_config(path: Path, lazy: bool) -> None:
+    import yaml
+    from app.config import get_config_path
+
+    source = os.getenv("OMNIAGENT_CONFIG_PATH") or get_config_path()
+    with open(source, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    data.setdefault("tools", {})["lazy_registration"] = lazy
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, allow_unicode=True)
+
+
+def _boot(config: Path, home: Path, calls_dir: str) -> Dict[str, Any]:
+    env = {**os.environ, "HOME": str(home), "OMNIAGENT_CONFIG_PATH": str(config),
+           "PYTHONPATH": str(_BACKEND), "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run([sys.executable, str(Path(__file__).resolve()), "--child", calls_dir],
+                          cwd=str(_BACKEND), env=env, capture_output=True, text=True, encoding="utf-8", timeout=600)
+    if proc.returncode != 0:
+        raise RuntimeError(f"子进程失败(rc={proc.returncode}):\n{proc.stderr[-3000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _check(eager: Dict[str, Any], warm: Dict[str, Any]) -> None:
+    assert list(warm["tools"]) == list(eager["tools"]), "工具集合/注册顺序不一致"
+    for name, meta in eager["tools"].items():
+        assert warm["tools"][name] == meta, f"工具 {name} 元数据不一致\n懒 {warm['tools'][name]}\n全量 {meta}"
+    assert warm["openai_tools"] == eager["openai_tools"], "to_openai_tools() 不一致"
+    print(f"  校验 [差分] {len(eager['tools'])} 个工具元数据(含 sync/async) + to_openai_tools() 与全量注册一致 ✓")
+    assert not warm["loaded_impl_modules"] and not warm["heavy"], (warm["loaded_impl_modules"], warm["heavy"])
+    print(f"  校验 [懒加载] 热启后 {warm['stubs']} 个实现桩, 未导入任何工具实现模块与 {'/'.join(_HEAVY)} ✓")
+    assert warm["calls"] == eager["calls"], f"实现桩调用结果不一致\n懒 {warm['calls']}\n全量 {eager['calls']}"
+    print(f"  校验 [实现桩调用] {', '.join(warm['calls'])} 结果与全量一致, 调用后换成真实实现; "
+          f"首次调用耗时 {warm['first_call_ms']}ms ✓")
+
+
+def _row(label: str, runs: List[Dict[str, Any]]) -> str:
+    boot = min(r["boot"] for r in runs)
+    rss = min(r["rss_mb"] for r in runs)
+    dep = [r["dep_wait"] for r in runs if r["dep_wait"] is not None]
+    dep_txt = f"后台依赖检查收尾 {max(dep) * 1e3:6.0f}ms" if dep else "依赖检查在注册时同步完成"
+    return f"  {label:8s} 启动 {boot:6.2f}s  峰值 RSS {rss:6.0f}MB  {dep_txt}"
+
+
+def run(runs: int) -> None:
+    root = Path(tempfile.mkdtemp(prefix="tool_startup_bench_"))
+    try:
+        eager_cfg, lazy_cfg = root / "eager.yaml", root / "lazy.yaml"
+        _write_config(eager_cfg, False)
+        _write_config(lazy_cfg, True)
+        calls_dir = root / "calls"
+        calls_dir.mkdir()
+        (calls_dir / "a.txt").write_text("demo\n", encoding="utf-8")
+
+        eager, first, warm = [], [], []
+        for i in range(runs):
+            eager.append(_boot(eager_cfg, root / f"home-eager-{i}", str(calls_dir)))
+            home = root / f"home-lazy-{i}"
+            first.append(_boot(lazy_cfg, home, str(calls_dir)))
+            assert (home / ".omniagent" / "tool_manifest.json").is_file(), "懒注册首启未写清单"
+            warm.append(_boot(lazy_cfg, home, str(calls_dir)))
+        _check(eager[0], warm[0])
+        assert first[0]["tools"] == eager[0]["tools"], "懒注册首启(清单未命中)工具元数据与全量不一致"
+        print(f"  基准 冷启动 import app.main + ensure_tools_registered() ({runs} 次取最小值):")
+        print(_row("全量", eager))
+        print(_row("懒/首启", first))
+        print(_row("懒/热启", warm))
+        print(f"  热启提速 {min(r['boot'] for r in eager) / min(r['boot'] for r in warm):.1f}x, "
+              f"RSS 省 {min(r['rss_mb'] for r in eager) - min(r['rss_mb'] for r in warm):.0f}MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="工具注册启动开销: 全量注册 vs 懒注册 校验 + 冷启动基准")
+    parser.add_argument("--runs", type=int, default=3, help="每种模式冷启动次数")
+    parser.add_argument("--child", metavar="CALLS_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child)
+    else:
+        run(args.runs)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+fetchpage 常驻浏览器池校验 + 微基准(本地静态 HTML 夹具)
+
+本地起一个 HTTP 服务, 提供几类页面:
+  /static       纯静态文章
+  /spa          空壳 + 脚本渲染正文(需 JS 执行才有内容)
+  /cookie       脚本写 Cookie 并把渲染前已有的 Cookie 写进页面 — 校验槽位复用时 Cookie 不跨调用泄漏
+  /heavy        脚本分配大数组, 校验 JS 堆超限回收(需 --heap-mb 调小)
+  /slow         服务端延迟 _SLOW_SECONDS 秒才响应, 占住槽位校验排队限时
+分别用旧路径(每次调用 async_playwright + launch Chromium, 复刻原 _pw_run)与 browser_pool.render
+顺序渲染 N 次、并发渲染 M 个, 校验 HTML 一致并对比耗时, 最后打印池统计(排队/渲染耗时/回收次数)。
+另校验: 浏览器关闭后槽位数个并发渲染只启动一次浏览器; 槽位全被占住时排队者按本次 timeout 超时, 不无限等待。
+
+需已安装 Playwright 与 Chromium(playwright install chromium); 未安装时打印提示后退出。
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/check_browser_pool.py
+    python scripts/check_browser_pool.py --sequential 30 --concurrent 8 --max-uses 5
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.tools.network import browser_pool as browser_pool_mod  # noqa: E402
+from app.tools.network.browser_pool import browser_pool  # noqa: E402
+
+_PAGES = {
+    "/static": "<html><head><title>静态</title></head><body><article>"
+               + "".join(f"<p>第 {i} 段静态正文</p>" for i in range(200)) + "</article></body></html>",
+    "/spa": "<html><head><title>SPA</title></head><body><div id='app'></div><script>"
+            "setTimeout(function(){var a=document.getElementById('app');"
+            "for(var i=0;i<200;i++){var p=document.createElement('p');p.textContent='第 '+i+' 段渲染正文';a.appendChild(p);}}, 50);"
+            "</script></body></html>",
+    "/cookie": "<html><body><div id='seen'></div><script>"
+               "document.getElementById('seen').textContent='seen=['+document.cookie+']';"
+               "document.cookie='session=secret; path=/';</script></body></html>",
+    "/slow": "<html><body><p>slow</p></body></html>",
+    "/heavy": "<html><body><script>window.__hold=[];for(var i=0;i<200;i++){window.__hold.push(new Array(100000).fill(i));}"
+              "</script><p>heavy</p></body></html>",
+}
+
+
+_SLOW_SECONDS = 3.0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = _PAGES.get(self.path.split("?")[0])
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.path.startswith("/slow"):
+            time.sleep(_SLOW_SECONDS)
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+async def _legacy_render(url: str, timeout: float) -> str:
+    """复刻旧 _pw_run: 每次调用启动 Playwright 驱动 + launch Chromium, 渲染完即关"""
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            page = await browser.new_page()
+            page.set_default_timeout(timeout * 1000)
+            await page.goto(url, wait_until="networkidle", timeout=timeout * 1000)
+            return await page.content()
+        finally:
+            await browser.close()
+
+
+async def _pooled_render(url: str, timeout: float) -> str:
+    html, _final_url = await browser_pool.render(url, None, timeout)
+    return html
+
+
+async def _measure(fn, base: str, sequential: int, concurrent: int, timeout: float) -> dict:
+    urls = [f"{base}/static", f"{base}/spa"]
+    out = {}
+    t0 = time.perf_counter()
+    for i in range(sequential):
+        html = await fn(urls[i % 2], timeout)
+        assert "段" in html, html[:200]
+    out["seq"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    pages = await asyncio.gather(*(fn(urls[i % 2], timeout) for i in range(concurrent)))
+    assert all("段" in html for html in pages)
+    out["conc"] = time.perf_counter() - t0
+    return out
+
+
+async def _run(sequential: int, concurrent: int, timeout: float, skip_legacy: bool) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"本地 HTTP 服务 {base}; 顺序 {sequential} 次 / 并发 {concurrent} 个, 池槽位 {browser_pool.stats()['size']}")
+
+    # 一致性: JS 渲染结果与旧路径相同
+    spa_pool = await _pooled_render(f"{base}/spa", timeout)
+    assert spa_pool.count("渲染正文") == 200, "SPA 页面未执行脚本渲染"
+    if not skip_legacy:
+        assert await _legacy_render(f"{base}/spa", timeout) == spa_pool, "池渲染与旧路径 HTML 不一致"
+    # Cookie 不跨调用: 第二次渲染看不到第一次写入的 Cookie
+    for _ in range(2):
+        assert "seen=[]" in await _pooled_render(f"{base}/cookie", timeout), "槽位复用时 Cookie 泄漏"
+    print("  校验: SPA 渲染与旧路径一致 / Cookie 不跨调用 ✓")
+
+    pooled = await _measure(_pooled_render, base, sequential, concurrent, timeout)
+    legacy = None if skip_legacy else await _measure(_legacy_render, base, sequential, concurrent, timeout)
+    for label, key, n in (("顺序", "seq", sequential), ("并发", "conc", concurrent)):
+        line = f"  [{label}] 浏览器池 {pooled[key] * 1000:8.0f}ms ({pooled[key] / n * 1000:7.1f}ms/次)"
+        if legacy:
+            line += (f"  旧路径 {legacy[key] * 1000:8.0f}ms ({legacy[key] / n * 1000:7.1f}ms/次)"
+                     f"  加速比 {legacy[key] / pooled[key]:5.1f}x")
+        print(line)
+
+    # 冷启动并发: 浏览器关闭后槽位数个并发渲染只启动一次浏览器(其余等同一次启动)
+    browser_pool.shutdown()
+    size = browser_pool.stats()["size"]
+    before = browser_pool.stats()["browser_launches"]
+    await asyncio.gather(*(_pooled_render(f"{base}/static", timeout) for _ in range(size)))
+    launches = browser_pool.stats()["browser_launches"] - before
+    assert launches == 1, f"冷启动 {size} 个并发渲染启动了 {launches} 次浏览器"
+    print(f"  校验: 冷启动 {size} 个并发渲染只启动 1 次浏览器 ✓")
+
+    # 排队限时: 槽位全被慢页面占住, 排队者按自己的 timeout 超时
+    holders = [asyncio.ensure_future(_pooled_render(f"{base}/slow", timeout)) for _ in range(size)]
+    await asyncio.sleep(_SLOW_SECONDS / 3)
+    t0 = time.perf_counter()
+    try:
+        await _pooled_render(f"{base}/static", 0.5)
+        raise AssertionError("槽位全占时排队渲染未超时")
+    except asyncio.TimeoutError:
+        waited = time.perf_counter() - t0
+    assert waited < _SLOW_SECONDS / 2, f"排队超时耗时 {waited:.2f}s, 未按 timeout 限时"
+    await asyncio.gather(*holders)
+    assert browser_pool.stats()["waiting"] == 0
+    print(f"  校验: 槽位全占时排队者 {waited:.2f}s 超时(timeout=0.5s), 队列清空 ✓")
+
+    await _pooled_render(f"{base}/heavy", timeout)
+    print(f"  池统计: {browser_pool.stats()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="fetchpage 常驻浏览器池校验 + 微基准")
+    parser.add_argument("--sequential", type=int, default=20)
+    parser.add_argument("--concurrent", type=int, default=6)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--max-uses", type=int, default=None, help="覆盖 BROWSER_POOL_MAX_USES, 便于观察 uses 回收")
+    parser.add_argument("--heap-mb", type=int, default=None, help="覆盖 BROWSER_POOL_MAX_HEAP_MB, 调小可观察 memory 回收")
+    parser.add_argument("--skip-legacy", action="store_true", help="不跑旧路径对比(每次 launch 很慢)")
+    args = parser.parse_args()
+    if args.max_uses:
+        browser_pool_mod.BROWSER_POOL_MAX_USES = args.max_uses
+    if args.heap_mb:
+        browser_pool_mod.BROWSER_POOL_MAX_HEAP_MB = args.heap_mb
+    if importlib.util.find_spec("playwright") is None:
+        print("未安装 Playwright: pip install playwright && playwright install chromium")
+        sys.exit(2)
+    try:
+        asyncio.run(_run(args.sequential, args.concurrent, args.timeout, args.skip_legacy))
+    except Exception as e:
+        if "Executable doesn't exist" in str(e):
+            print(f"未安装 Chromium, 请先执行 playwright install chromium\n{e}")
+            sys.exit(2)
+        raise
+    finally:
+        browser_pool.shutdown()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+连接池借连接等待校验(临时库, 后台线程长时间占住写连接)
+
+  ①纯读调用方(list_sessions / TaskQueries / operation_queries)走读连接池: 写连接被占时在事件循环线程上照常立即返回
+  ②事件循环线程上同步 get_conn 借写连接: 最多等 DB_LOOP_WAIT_TIMEOUT 即按 locked 报错, 不陪写者等 DB_WRITER_WAIT_TIMEOUT
+  ③非事件循环线程(DB 线程池/后台线程)借连接仍按 DB_WRITER_WAIT_TIMEOUT 等待
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/check_db_pool_wait.py
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.constants import DB_LOOP_WAIT_TIMEOUT, DB_WRITER_WAIT_TIMEOUT  # noqa: E402
+from app.db import database as database_mod  # noqa: E402
+from app.db import operation_queries  # noqa: E402
+from app.db.database import DatabaseManager  # noqa: E402
+from app.services.chat import session_service  # noqa: E402
+from app.services.task import task_db  # noqa: E402
+
+
+def _hold_writer(manager: DatabaseManager, db_name: str, held: threading.Event, release: threading.Event) -> None:
+    with manager.get_conn(db_name) as conn:
+        conn.execute("SELECT 1")
+        held.set()
+        release.wait()
+
+
+def _readers_on_loop() -> None:
+    started = time.perf_counter()
+    session_service.list_sessions(page=1, page_size=20)
+    task_db.TaskQueries().get_recent_tasks(limit=5)
+    operation_queries.get_operation_task_id("no-such-operation")
+    elapsed = time.perf_counter() - started
+    assert elapsed < 1.0, f"纯读调用方在写连接被占时等待了 {elapsed:.2f}s"
+    print(f"  校验 [纯读调用方] 写连接被占时 list_sessions/TaskQueries/operation_queries 照常返回({elapsed * 1000:.0f}ms) ✓")
+
+
+def _writer_on_loop(manager: DatabaseManager) -> None:
+    started = time.perf_counter()
+    try:
+        with manager.get_conn("chat") as conn:
+            conn.execute("SELECT 1")
+        raise AssertionError("写连接被占时事件循环线程上 get_conn 未报错")
+    except sqlite3.OperationalError as e:
+        elapsed = time.perf_counter() - started
+        assert "locked" in str(e), e
+    assert elapsed < DB_LOOP_WAIT_TIMEOUT + 1.0, f"事件循环线程上等待了 {elapsed:.2f}s"
+    print(f"  校验 [事件循环线程] get_conn 等 {elapsed:.1f}s 即按 locked 报错"
+          f"(DB_LOOP_WAIT_TIMEOUT={DB_LOOP_WAIT_TIMEOUT}s, 非 {DB_WRITER_WAIT_TIMEOUT}s) ✓")
+
+
+async def _on_loop(manager: DatabaseManager) -> None:
+    assert database_mod._wait_timeout() == DB_LOOP_WAIT_TIMEOUT
+    _readers_on_loop()
+    _writer_on_loop(manager)
+    off_loop = await asyncio.get_running_loop().run_in_executor(None, database_mod._wait_timeout)
+    assert off_loop == DB_WRITER_WAIT_TIMEOUT, off_loop
+    print(f"  校验 [非事件循环线程] 借连接仍按 DB_WRITER_WAIT_TIMEOUT={DB_WRITER_WAIT_TIMEOUT}s 等待 ✓")
+
+
+def run() -> None:
+    with tempfile.TemporaryDirectory(prefix="omni-check-db-wait-") as tmp:
+        manager = DatabaseManager(db_dir=Path(tmp))
+        manager.init()
+        # 被测调用方走临时库
+        session_service.db = task_db.db = operation_queries.db = manager
+        release = threading.Event()
+        held = {name: threading.Event() for name in ("chat", "task_tracker", "operations")}
+        holders = [threading.Thread(target=_hold_writer, args=(manager, name, evt, release), daemon=True)
+                   for name, evt in held.items()]
+        try:
+            for holder in holders:
+                holder.start()
+            assert all(evt.wait(5) for evt in held.values()), "后台线程未能占住写连接"
+            asyncio.run(_on_loop(manager))
+        finally:
+            release.set()
+            for holder in holders:
+                holder.join(5)
+            manager.close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="连接池借连接等待校验")
+    parser.parse_args()
+    run()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+fetchpage 本地页面缓存校验 + 微基准(本地 HTTP 服务)
+
+本地起一个 HTTP 服务, 提供几类页面并统计收到的请求/回 304 次数:
+  /fresh        Cache-Control: max-age=3600 + ETag          — 第二次起新鲜命中, 不发请求
+  /etag         Cache-Control: no-cache + ETag              — 每次条件请求, 服务端回 304
+  /lastmod      仅 Last-Modified(无 max-age, 缺省新鲜期置 0) — If-Modified-Since 条件请求回 304
+  /nostore      Cache-Control: no-store                     — 不缓存, 每次全量下载
+  /changing     no-cache + 每次变化的 ETag                  — 304 不成立, 内容按最新返回
+  /spa          no-cache + ETag 的 SPA 空壳                 — 自动回退渲染(替换为本地假渲染)的结果不缓存, 每次全量下载
+每个 URL 连续调用 fetchpage N 次, 校验返回内容与首次(无缓存)一致、服务端请求/304 次数符合预期, 并对比无缓存耗时。
+回环地址本被 URL 安全校验拦截, 本脚本仅为本地测试放行(validate_url/check_network 替换为放行版本), 不影响工具本身。
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/check_fetchpage_cache.py
+    python scripts/check_fetchpage_cache.py --calls 20 --paragraphs 800
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import asyncio
+import importlib
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# 与应用启动同序: 先执行注册模块(导入副作用即完成注册), 否则直接导入 fetch_webpage 会与 network_register 循环导入
+importlib.import_module("app.tools.network.network_register")
+
+from app.tools.network import fetch_webpage, page_cache  # noqa: E402
+
+_LAST_MODIFIED = "Wed, 14 Oct 2026 08:00:00 GMT"
+
+
+def _article(paragraphs: int, tag: str) -> bytes:
+    body = "".join(f"<p>第 {i} 段 {tag}: 本地缓存测试正文, lorem ipsum dolor sit amet, consectetur adipiscing elit {i * 7}.</p>"
+                   for i in range(paragraphs))
+    return (f"<html><head><title>缓存测试 {tag}</title></head><body><nav>首页 | 关于</nav>"
+            f"<article><h1>标题 {tag}</h1>{body}</article><footer>版权</footer></body></html>").encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    pages = {}
+    requests = {}
+    not_modified = {}
+    version = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path
+        _Handler.requests[path] = _Handler.requests.get(path, 0) + 1
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        if path == "/fresh":
+            headers.update({"Cache-Control": "max-age=3600", "ETag": '"fresh-1"'})
+        elif path == "/etag":
+            headers.update({"Cache-Control": "no-cache", "ETag": '"etag-1"'})
+        elif path == "/lastmod":
+            headers.update({"Cache-Control": "max-age=0", "Last-Modified": _LAST_MODIFIED})
+        elif path == "/nostore":
+            headers.update({"Cache-Control": "no-store", "ETag": '"nostore-1"'})
+        elif path == "/spa":
+            headers.update({"Cache-Control": "no-cache", "ETag": '"spa-1"'})
+        elif path == "/changing":
+            _Handler.version += 1
+            headers.update({"Cache-Control": "no-cache", "ETag": f'"v{_Handler.version}"'})
+        etag = headers.get("ETag")
+        if (etag and self.headers.get("If-None-Match") == etag) or \
+                ("Last-Modified" in headers and self.headers.get("If-Modified-Since") == _LAST_MODIFIED):
+            _Handler.not_modified[path] = _Handler.not_modified.get(path, 0) + 1
+            self.send_response(304)
+            for k, v in headers.items():
+                if k != "Content-Type":
+                    self.send_header(k, v)
+            self.end_headers()
+            return
+        body = _Handler.pages[path] if path != "/changing" else _article(50, f"v{_Handler.version}")
+        self.send_response(200)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+async def _run(calls: int, paragraphs: int) -> None:
+    for path in ("/fresh", "/etag", "/lastmod", "/nostore"):
+        _Handler.pages[path] = _article(paragraphs, path.strip("/"))
+    _Handler.pages["/spa"] = b'<html><head><title></title></head><body><div id="app"></div><script src="/app.js"></script></body></html>'
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"本地 HTTP 服务 {base}, 每页 {len(_Handler.pages['/fresh']) // 1024}KB, 每个 URL 连续 fetchpage {calls} 次")
+
+    async def _fetch(path: str, fmt: str = "markdown") -> str:
+        r = await fetch_webpage.fetchpage(f"{base}{path}", extract_format=fmt)
+        assert r["llm_data"]["status"]["exec_code"] == "success", r["llm_data"]
+        return r["data"]["content"]
+
+    # 无缓存基线
+    orig_enabled = page_cache.enabled
+    page_cache.enabled = lambda: False
+    t0 = time.perf_counter()
+    baseline = {p: await _fetch(p) for p in ("/fresh", "/etag", "/lastmod", "/nostore")}
+    t_nocache = (time.perf_counter() - t0) / 4
+    page_cache.enabled = orig_enabled
+    _Handler.requests.clear()
+
+    expect = {  # (服务端收到请求数, 其中 304 数)
+        "/fresh": (1, 0),
+        "/etag": (calls, calls - 1),
+        "/lastmod": (calls, calls - 1),
+        "/nostore": (calls, 0),
+    }
+    for path, (want_req, want_304) in expect.items():
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            assert await _fetch(path) == baseline[path], f"{path} 缓存内容与无缓存不一致"
+        per_call = (time.perf_counter() - t0) / calls
+        got = (_Handler.requests.get(path, 0), _Handler.not_modified.get(path, 0))
+        assert got == (want_req, want_304), f"{path} 请求/304 次数 {got} != 预期 {(want_req, want_304)}"
+        print(f"  {path:<10} {per_call * 1000:7.1f}ms/次 (无缓存 {t_nocache * 1000:6.1f}ms)  服务端请求 {got[0]:3d} 次, 304 {got[1]:3d} 次 ✓")
+
+    # 同一 URL 换格式: 304 后对缓存正文重新提取并补写该格式
+    assert await _fetch("/etag", "text") and _Handler.not_modified["/etag"] == calls
+    # 内容变化: ETag 不匹配, 返回最新内容
+    first, second = await _fetch("/changing"), await _fetch("/changing")
+    assert "v1" in first and "v2" in second and _Handler.not_modified.get("/changing", 0) == 0
+    print("  换格式 304 后重新提取 ✓  内容变化返回最新 ✓")
+
+    # SPA 空壳: 自动回退渲染的结果照常返回, 但不写缓存(下次不发条件请求, 无 304)
+    renders = []
+
+    async def _fake_render(url, proxy, timeout, extract_format):
+        renders.append(url)
+        return {"html_content": "", "extracted_content": f"渲染正文 {len(renders)} " * 40, "truncated": False,
+                "content_type": "text/html", "status_code": 200}
+
+    orig_render = fetch_webpage._fetch_via_playwright
+    fetch_webpage._fetch_via_playwright = _fake_render
+    try:
+        contents = [await _fetch("/spa") for _ in range(3)]
+    finally:
+        fetch_webpage._fetch_via_playwright = orig_render
+    assert all(c.startswith("渲染正文") for c in contents) and len(renders) == 3, (contents, renders)
+    got = (_Handler.requests.get("/spa", 0), _Handler.not_modified.get("/spa", 0))
+    assert got == (3, 0) and page_cache.lookup(f"{base}/spa") is None, f"SPA 回退结果被缓存: 请求/304 {got}"
+    print("  SPA 空壳自动回退结果不缓存(3 次全量下载, 0 次 304) ✓")
+    print(f"  缓存: {page_cache.cache_stats()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="fetchpage 本地页面缓存校验 + 微基准")
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--paragraphs", type=int, default=400)
+    args = parser.parse_args()
+    tmp = tempfile.mkdtemp(prefix="omni-check-pagecache-")
+    page_cache._CACHE_DIR = Path(tmp) / "page_cache"  # 缓存落临时目录, 不污染 ~/.omniagent
+    fetch_webpage.validate_url = lambda url: (True, None, None)  # 仅本脚本: 放行回环地址
+    fetch_webpage.check_network = lambda: {"connected": True}
+    try:
+        asyncio.run(_run(args.calls, args.paragraphs))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
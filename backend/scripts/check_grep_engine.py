@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+grep_engine 字节门控与 re 内部模块降级校验(临时目录, 进程内扫描)
+
+  ①字节门控: 各类模式(区分/忽略大小写、(?i:...) 局部、含换行字面量)结果与关闭门控时逐条一致;
+    覆盖 utf-8/GBK/latin-1/utf-16(BOM) 与 mmap 大文件, 以及 忽略大小写时 K(开尔文)/ſ/İ 等非 ASCII 互配字符
+  ②不含必含字面量的文件(ASCII 兼容编码)不解码: decode_text_bytes 调用次数只计含字面量的文件
+  ③re._parser 解析异常 → analyze_pattern 退回 (None, [], ()), 搜索结果不变
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/check_grep_engine.py
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.tools.file import grep_engine  # noqa: E402
+from app.tools.tool_constants import GREP_ENGINE_MMAP_MIN_BYTES  # noqa: E402
+
+_FILLER = "alpha beta gamma delta value result\n"
+
+# (文件名, 文本, 编码)
+_FILES = [
+    ("plain.py", "def needle_ok():\n    return 1\n", "utf-8"),
+    ("upper.py", "NEEDLE_OK = 2\n", "utf-8"),
+    ("kelvin.txt", "marker: Kelvin\n", "utf-8"),      # 开尔文符号 K, 忽略大小写时匹配 kelvin
+    ("long_s.txt", "marker: claſs\n", "utf-8"),       # ſ, 忽略大小写时匹配 s
+    ("dotted.txt", "marker: İnit\n", "utf-8"),        # İ, 忽略大小写时匹配 init
+    ("gbk.txt", "中文行 needle_ok 结尾\n", "gbk"),
+    ("latin.txt", "café needle_ok\n", "latin-1"),
+    ("utf16.txt", "utf16 needle_ok here\n", "utf-16"),     # 非 ASCII 兼容编码, 不能门控
+    ("crlf.txt", "first\r\nneedle_ok\r\n", "utf-8"),
+    ("big.log", _FILLER * (GREP_ENGINE_MMAP_MIN_BYTES // len(_FILLER) + 10) + "tail needle_ok\n", "utf-8"),
+    ("big_miss.log", _FILLER * (GREP_ENGINE_MMAP_MIN_BYTES // len(_FILLER) + 10), "utf-8"),
+] + [(f"miss_{i}.py", _FILLER * 5, "utf-8") for i in range(20)]
+
+_PATTERNS = [
+    (r"needle_ok", 0),
+    (r"needle_ok", re.IGNORECASE),
+    (r"(?i:NEEDLE)_ok", 0),
+    (r"kelvin", re.IGNORECASE),
+    (r"class", re.IGNORECASE),
+    (r"init", re.IGNORECASE),
+    (r"first\nneedle", 0),
+    (r"def \w+_ok\(", 0),
+]
+
+
+def _generate(root: Path) -> None:
+    root.mkdir()
+    for name, text, enc in _FILES:
+        (root / name).write_bytes(text.encode(enc))
+
+
+def _search(root: Path, regex: re.Pattern) -> list:
+    scan = grep_engine.search(root, regex, None, time.monotonic() + 600, 0)
+    return sorted((item["file"], item["line"], item["content"]) for item in scan.results)
+
+
+def _gate_consistent(root: Path) -> None:
+    real_gate = grep_engine._byte_gate
+    for pattern, flags in _PATTERNS:
+        regex = re.compile(pattern, flags)
+        got = _search(root, regex)
+        grep_engine._byte_gate = lambda tree: ()
+        try:
+            expected = _search(root, regex)
+        finally:
+            grep_engine._byte_gate = real_gate
+        assert got == expected, f"{pattern!r} flags={flags}: 门控 {got} != 无门控 {expected}"
+        gate = [g.pattern for g in grep_engine.analyze_pattern(regex)[2]]
+        print(f"  校验 [门控一致] {pattern!r:<22} I={bool(flags)} 门控={gate} 命中 {len(got)} 行 ✓")
+
+
+def _skips_decode(root: Path) -> None:
+    real_decode = grep_engine.decode_text_bytes
+    calls = []
+
+    def counting(raw, *args, **kwargs):
+        calls.append(len(raw))
+        return real_decode(raw, *args, **kwargs)
+
+    grep_engine.decode_text_bytes = counting
+    try:
+        got = _search(root, re.compile(r"needle_ok", re.IGNORECASE))
+    finally:
+        grep_engine.decode_text_bytes = real_decode
+    holders = {Path(f).name for f, _, _ in got}
+    assert "utf16.txt" in holders, holders
+    assert len(calls) == len(holders), f"解码 {len(calls)} 个文件, 含字面量的只有 {len(holders)} 个"
+    print(f"  校验 [不解码] {len(_FILES)} 个文件仅解码含字面量的 {len(calls)} 个(含 utf-16 与 mmap 大文件) ✓")
+
+
+def _parser_failure(root: Path) -> None:
+    regex = re.compile(r"def \w+_ok\(", re.IGNORECASE)
+    expected = _search(root, regex)
+    real_parse = grep_engine._sre_p.parse
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("注入 re._parser 异常")
+
+    grep_engine._sre_p.parse = broken
+    try:
+        assert grep_engine.analyze_pattern(regex) == (None, [], ()), grep_engine.analyze_pattern(regex)
+        got = _search(root, regex)
+    finally:
+        grep_engine._sre_p.parse = real_parse
+    assert got == expected, (got, expected)
+    print(f"  校验 [re 内部降级] 解析异常时 analyze_pattern 退回 (None, [], ()), 结果不变({len(got)} 行) ✓")
+
+
+def run() -> None:
+    with tempfile.TemporaryDirectory(prefix="omni-check-grep-") as tmp:
+        root = Path(tmp) / "tree"
+        _generate(root)
+        _gate_consistent(root)
+        _skips_decode(root)
+        _parser_failure(root)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="grep_engine 字节门控与降级校验")
+    parser.parse_args()
+    run()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+路径策略编译 — 差分校验 + 微基准
+
+临时目录下搭一棵带各种符号链接的树(指向 /etc、/proc、代码库根、主目录、/、相对链接、链到链、
+环形链接、悬空链接、".." 链接、文件链接), 随机拼出路径语料(含 ".."/"."/空段/末尾斜杠/"~"/相对路径/不存在段),
+逐条比较 旧 validate_path/_is_forbidden_path(本脚本内复刻) 与 新实现 的返回值, 须逐字相同:
+  - 三种 mode(read/write/delete) × 默认白名单与多组显式白名单(含符号链接/不存在/非法项) × 有无临时授权
+  - 目标的祖先目录被换成符号链接(白名单内目录 → /etc、目录 → /proc)后: 不清缓存, 立即一致(目标路径不缓存)
+  - 白名单项自身换链接目标后: clear_path_policy_cache() 立即一致; 不清缓存则超 PATH_POLICY_TTL 后一致
+  - 改配置文件 app.allowed_dirs 后: 策略按 mtime 重编译, 新授权目录立即生效
+微基准: 深层目录下 N 个文件逐个 validate_path(write), 旧 vs 新 µs/次
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/check_path_policy.py
+    python scripts/check_path_policy.py --paths 50000 --files 20000 --seed 7
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import get_code_root, get_config  # noqa: E402
+from app.tools.security import path_policy  # noqa: E402
+from app.tools.security.path_safe_check import (  # noqa: E402
+    _is_forbidden_path, get_default_allowed_paths, get_system_drive, validate_path,
+)
+from app.tools.security.temp_auth import clear_temp_auth, grant_temp_auth  # noqa: E402
+from app.tools.tool_constants import (  # noqa: E402
+    FORBIDDEN_PATHS_EXACT, FORBIDDEN_PATHS_PREFIX, FORBIDDEN_PATHS_WINDOWS_EXACT, FORBIDDEN_PATHS_WINDOWS_PREFIX,
+)
+
+_MODES = ("read", "write", "delete")
+
+
+# ---------------------------------------------------------------- 旧实现复刻(2026-10-17 前 path_safe_check)
+
+def _legacy_is_forbidden(file_path: str) -> Tuple[Optional[str], Optional[str]]:
+    try:
+        real_path = Path(os.path.realpath(os.path.expanduser(file_path)))
+        real_path_str = str(real_path)
+        real_path_lower = real_path_str.lower()
+        try:
+            drive, rest = os.path.splitdrive(real_path_str)
+            if drive and not rest.strip("\\/"):
+                return "system", f"禁止访问磁盘根目录: {file_path}"
+        except Exception:
+            pass
+        if os.name == 'nt':
+            sys_drive = get_system_drive()
+            for forbidden in FORBIDDEN_PATHS_WINDOWS_EXACT:
+                _f = forbidden.replace("C:", sys_drive, 1) if forbidden.upper().startswith("C:") else forbidden
+                if real_path_lower == _f.lower():
+                    return "system", f"禁止访问系统敏感文件: {file_path}"
+            for forbidden_prefix in FORBIDDEN_PATHS_WINDOWS_PREFIX:
+                _f = forbidden_prefix.replace("C:", sys_drive, 1) if forbidden_prefix.upper().startswith("C:") else forbidden_prefix
+                if real_path_lower.startswith(_f.lower()):
+                    return "system", f"禁止访问系统敏感目录: {file_path}"
+        try:
+            code_root = get_code_root()
+            if code_root:
+                cr_lower = str(Path(os.path.realpath(code_root))).lower()
+                if (real_path_lower == cr_lower
+                        or real_path_lower.startswith(cr_lower + os.sep)
+                        or real_path_lower.startswith(cr_lower + "/")):
+                    return "non_system", f"禁止访问代码库(tool禁区): {file_path}"
+        except Exception:
+            pass
+        for forbidden in FORBIDDEN_PATHS_EXACT:
+            if real_path_str == forbidden:
+                return "system", f"禁止访问系统敏感文件: {file_path}"
+        for forbidden_prefix in FORBIDDEN_PATHS_PREFIX:
+            if real_path_str.startswith(forbidden_prefix):
+                return "system", f"禁止访问系统敏感目录: {file_path}"
+        return None, None
+    except Exception as e:
+        return "system", f"路径安全检查异常,拒绝访问: {file_path} ({e})"
+
+
+def _legacy_validate(file_path: str, allowed_paths=None, mode: str = "write"):
+    from app.tools.security.temp_auth import is_temp_authorized
+    if not file_path or not file_path.strip():
+        return False, "路径为空", "system"
+    is_forbidden, forbidden_msg = _legacy_is_forbidden(file_path)
+    if is_forbidden:
+        if mode == "read":
+            return True, None, is_forbidden
+        if is_forbidden == "system":
+            return False, forbidden_msg, "system"
+        if is_forbidden == "non_system":
+            if mode == "delete":
+                return False, forbidden_msg, "non_system"
+            if is_temp_authorized(file_path):
+                return True, None, "non_system"
+            return False, forbidden_msg, "non_system"
+        return False, forbidden_msg, is_forbidden
+    try:
+        if ".." in Path(file_path).parts:
+            return False, f"路径包含..,禁止路径穿越: {file_path}", "system"
+        resolved = os.path.realpath(file_path)
+        original_resolved = os.path.realpath(os.path.dirname(file_path))
+        if not resolved.startswith(original_resolved) and file_path != resolved:
+            return False, f"路径穿越检测: {file_path} 解析为 {resolved}", "system"
+    except Exception:
+        return False, f"路径校验异常: {file_path}", "system"
+    paths = allowed_paths if allowed_paths is not None else get_default_allowed_paths()
+    try:
+        real_path = Path(os.path.realpath(os.path.expanduser(file_path)))
+        protected = frozenset({"windows", "program files", "program files (x86)", "programdata", "boot", "recovery"})
+        if len(real_path.parts) > 1 and real_path.parts[1].lower() in protected:
+            if mode == "read":
+                return True, None, "system"
+            return False, f"路径位于系统保护目录,禁止操作: {file_path}", "system"
+        for allowed in paths:
+            allowed_real = Path(os.path.realpath(allowed))
+            try:
+                real_parts = Path(real_path).parts
+                allowed_parts = Path(allowed_real).parts
+                if len(real_parts) >= len(allowed_parts):
+                    if not all(real_parts[i] == allowed_parts[i] for i in range(len(allowed_parts))):
+                        continue
+                    if len(allowed_parts) == 1 and (allowed_parts[0].endswith(':') or allowed_parts[0].endswith(':\\') or allowed_parts[0].endswith(':/')):
+                        if str(real_path) == str(allowed_real) or real_path.parts[0] == allowed_parts[0]:
+                            return True, None, None
+                    else:
+                        return True, None, None
+            except (ValueError, OSError):
+                pass
+        if mode == "read":
+            return True, None, None
+        if is_temp_authorized(file_path):
+            return True, None, None
+        return False, f"路径 '{file_path}' 不在允许的操作范围内(仅允许:{', '.join(str(p) for p in paths[:5])}...)", None
+    except Exception as e:
+        return False, f"路径验证失败: {str(e)}", "system"
+
+
+# ---------------------------------------------------------------- 语料
+
+def _make_tree(root: Path) -> None:
+    (root / "real" / "a" / "b" / "c").mkdir(parents=True)
+    (root / "real" / "a" / "b" / "file.txt").write_text("x", encoding="utf-8")
+    (root / "real" / "x.txt").write_text("x", encoding="utf-8")
+    links = {
+        "ln_etc": "/etc", "ln_proc": "/proc", "ln_code": get_code_root(), "ln_code_parent": str(Path(get_code_root()).parent),
+        "ln_home": str(Path.home()), "ln_root": "/", "ln_shadow": "/etc/shadow", "ln_rel": "real/a", "ln_chain": str(root / "ln_rel"),
+        "ln_loop": str(root / "ln_loop"), "loop_a": str(root / "loop_b"), "loop_b": str(root / "loop_a"),
+        "dangling": str(root / "nope" / "zzz"), "ln_tmp": "/tmp", "ln_procfoo": "/procfoo",
+    }
+    for name, target in links.items():
+        os.symlink(target, root / name)
+    os.symlink("..", root / "real" / "a" / "up")
+    os.symlink("../../x.txt", root / "real" / "a" / "b" / "ln_file")
+    os.symlink("../../../ln_loop/deeper", root / "real" / "a" / "b" / "ln_via_loop")
+
+
+def _corpus(root: Path, count: int, rng: random.Random) -> List[str]:
+    code_root = get_code_root()
+    bases = [str(root), str(root), str(root / "real" / "a"), "/", "/etc", "/proc", "/procfoo", "/sys", code_root,
+             code_root + "/backend", str(Path(code_root).parent), code_root + "2", "/tmp", str(Path.home()), "~", "~/",
+             "/var/tmp", "/opt", "/usr/lib", "relative", ".", "..", "//tmp", "/Windows", "/boot"]
+    pool = ["real", "a", "b", "c", "file.txt", "x.txt", "ln_etc", "ln_proc", "ln_code", "ln_code_parent", "ln_home",
+            "ln_root", "ln_shadow", "ln_rel", "ln_chain", "ln_loop", "loop_a", "dangling", "ln_tmp", "ln_procfoo", "up",
+            "ln_file", "ln_via_loop", "nope", "..", ".", "", "passwd", "shadow", "sudoers", "backend", "app", "self",
+            "Program Files", "windows", "omni-extra"]
+    fixed = ["", "   ", "/", "//", "/etc/shadow", "/etc/sudoers", "/etc/shadow/", "/proc/self/environ", "/sys/kernel",
+             "~", "~/../etc", code_root, code_root + "/", str(root / "ln_code") + "/", "/srv/omni-extra/x",
+             str(root / "ln_loop"), str(root / "ln_loop") + "/x", "relative/../x", "./a", "a\x00b", "/tmp/a\x00b/c"]
+    out = list(fixed)
+    while len(out) < count:
+        names = rng.choices(pool, k=rng.randint(0, 7))
+        sep = rng.choice(["/", "/", "/", "//"])
+        path = rng.choice(bases) + ("/" if names else "") + sep.join(names)
+        if rng.random() < 0.1:
+            path += "/"
+        out.append(path)
+    return out
+
+
+# ---------------------------------------------------------------- 差分
+
+def _allowed_variants(root: Path) -> list:
+    return [None, None, None,
+            [root / "real"],
+            [root / "ln_rel", Path("/nonexistent-allowed")],
+            [root / "ln_loop", Path("/tmp")],
+            [root / "real" / "a", None, Path("/")],
+            ["relative", Path("/etc")],
+            []]
+
+
+def _diff(label: str, corpus: List[str], root: Path) -> int:
+    variants = _allowed_variants(root)
+    checked = 0
+    for i, path in enumerate(corpus):
+        got, want = _is_forbidden_path(path), _legacy_is_forbidden(path)
+        assert got == want, f"{label}: _is_forbidden_path({path!r}) 新 {got} != 旧 {want}"
+        allowed = variants[i % len(variants)]
+        for mode in _MODES:
+            got, want = validate_path(path, allowed, mode), _legacy_validate(path, allowed, mode)
+            assert got == want, f"{label}: validate_path({path!r}, {allowed}, {mode}) 新 {got} != 旧 {want}"
+            checked += 1
+    return checked
+
+
+def _check(root: Path, count: int, seed: int) -> None:
+    rng = random.Random(seed)
+    corpus = _corpus(root, count, rng)
+    before = path_policy.path_policy_stats()
+    n = _diff("初始", corpus, root)
+    stats = path_policy.path_policy_stats()
+    print(f"  校验 [初始语料] {len(corpus)} 条路径 × {len(_MODES)} mode = {n} 次判定, 新旧逐字一致 ✓  "
+          f"(策略命中 {stats['policy_hits'] - before['policy_hits']} / 编译 {stats['policy_builds'] - before['policy_builds']})")
+
+    grant_temp_auth(str(root / "real" / "a"))
+    grant_temp_auth(get_code_root())
+    try:
+        n = _diff("临时授权", corpus, root)
+    finally:
+        clear_temp_auth()
+    print(f"  校验 [临时授权] 授权 real/a + 代码库根后 {n} 次判定一致 ✓")
+
+    # 目标的祖先目录被换成符号链接: 不清缓存, 下一次判定即须与旧实现一致
+    victim = root / "real" / "x"
+    (victim / "ssh").mkdir(parents=True)
+    for allowed in (None, [root / "real"]):
+        for mode in _MODES:
+            path = str(victim / "ssh" / "f")
+            assert validate_path(path, allowed, mode) == _legacy_validate(path, allowed, mode)
+    shutil.rmtree(victim)
+    os.symlink("/etc", victim)
+    target = str(victim / "ssh" / "sshd_config")
+    for allowed in (None, [root / "real"]):
+        for mode in _MODES:
+            got, want = validate_path(target, allowed, mode), _legacy_validate(target, allowed, mode)
+            assert got == want, f"祖先目录换成 /etc 链接后 validate_path({target!r}, {allowed}, {mode}) 新 {got} != 旧 {want}"
+        assert validate_path(target, allowed, "write")[0] is False, "白名单内目录换成 /etc 链接后仍放行写入"
+    shutil.rmtree(root / "real" / "a" / "b" / "c")
+    os.symlink("/proc", root / "real" / "a" / "b" / "c")
+    os.remove(root / "ln_home")
+    os.symlink(get_code_root(), root / "ln_home")
+    n = _diff("祖先换链接", corpus, root)
+    print(f"  校验 [祖先换链接] 白名单内目录 x→/etc、目录 c→/proc、ln_home→代码库根, 不清缓存 {n} 次判定立即一致, "
+          f"{target} 写入被拒 ✓")
+
+    os.remove(root / "ln_rel")
+    os.symlink("/etc", root / "ln_rel")
+    path_policy.clear_path_policy_cache()
+    n = _diff("白名单项换链接+清缓存", corpus, root)
+    print(f"  校验 [白名单项换链接+清缓存] 白名单项 ln_rel→/etc 后 {n} 次判定一致 ✓")
+
+    saved = path_policy.PATH_POLICY_TTL
+    path_policy.PATH_POLICY_TTL = 0.05
+    try:
+        _diff("预热", corpus, root)
+        os.remove(root / "ln_rel")
+        os.symlink("real/a", root / "ln_rel")
+        time.sleep(0.1)
+        n = _diff("白名单项换链接+TTL过期", corpus, root)
+    finally:
+        path_policy.PATH_POLICY_TTL = saved
+    print(f"  校验 [白名单项换链接+TTL过期] 不清缓存, 超有效期后 {n} 次判定一致 ✓")
+
+    config_path = Path(os.environ["OMNIAGENT_CONFIG_PATH"])
+    extra = "/srv/omni-extra"
+    assert validate_path(extra + "/x")[0] is False
+    text = config_path.read_text(encoding="utf-8")
+    line = f'  allowed_dirs: ["{extra}"]'
+    text, hit = re.subn(r"(?m)^  allowed_dirs:.*$", line, text)
+    if not hit:
+        text = re.sub(r"(?m)^app:\s*$", "app:\n" + line, text, count=1)
+    config_path.write_text(text, encoding="utf-8")
+    mtime = config_path.stat().st_mtime + 10  # 保证 mtime 变化(同一时间戳粒度内改写不算变更)
+    os.utime(config_path, (mtime, mtime))
+    n = _diff("配置变更", corpus, root)
+    assert validate_path(extra + "/x") == (True, None, None), "授权目录变更后策略未重编译"
+    print(f"  校验 [配置变更] 配置文件 mtime 变化 → 策略重编译, 新授权目录 {extra} 立即生效, {n} 次判定一致 ✓")
+
+
+# ---------------------------------------------------------------- 微基准
+
+def _bench(root: Path, files: int) -> None:
+    paths = []
+    for i in range(files):
+        d = root / "bench" / "src" / f"pkg{i % 20:02d}" / f"mod{i % 7}" / "impl" / "detail"
+        paths.append(str(d / f"f{i:06d}.py"))
+    for p in {os.path.dirname(p) for p in paths}:
+        os.makedirs(p, exist_ok=True)
+    for p in paths:
+        open(p, "w").close()
+
+    path_policy.clear_path_policy_cache()
+    t0 = time.perf_counter()
+    want = [_legacy_validate(p) for p in paths]
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = [validate_path(p) for p in paths]
+    t_new = time.perf_counter() - t0
+    assert got == want
+    t0 = time.perf_counter()
+    for p in paths:
+        _legacy_is_forbidden(p)
+    t_old_f = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for p in paths:
+        _is_forbidden_path(p)
+    t_new_f = time.perf_counter() - t0
+    stats = path_policy.path_policy_stats()
+    print(f"  微基准 {files} 个文件(深度 {len(Path(paths[0]).parts) - 1}):")
+    print(f"    validate_path(write)  旧 {t_old / files * 1e6:7.1f}µs/次  新 {t_new / files * 1e6:7.1f}µs/次  ({t_old / t_new:.1f}x)")
+    print(f"    _is_forbidden_path    旧 {t_old_f / files * 1e6:7.1f}µs/次  新 {t_new_f / files * 1e6:7.1f}µs/次  ({t_old_f / t_new_f:.1f}x)")
+    print(f"    策略: 命中 {stats['policy_hits']} 次, 编译 {stats['policy_builds']} 次")
+
+
+def run(paths: int, files: int, seed: int) -> None:
+    with tempfile.TemporaryDirectory(prefix="omni-check-path-") as tmp:
+        tmp = Path(tmp)
+        # 配置文件复制一份再改(配置变更校验), 不动原文件
+        config_copy = tmp / "config.yaml"
+        shutil.copy2(os.environ.get("OMNIAGENT_CONFIG_PATH") or get_config()._get_config_path(), config_copy)
+        os.environ["OMNIAGENT_CONFIG_PATH"] = str(config_copy)
+        get_config().reload()
+        root = tmp / "tree"
+        root.mkdir()
+        _make_tree(root)
+        _check(root, paths, seed)
+        _bench(tmp, files)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="路径策略编译差分校验 + 微基准")
+    parser.add_argument("--paths", type=int, default=5_000, help="随机路径语料条数")
+    parser.add_argument("--files", type=int, default=10_000, help="微基准文件数")
+    parser.add_argument("--seed", type=int, default=20261017)
+    args = parser.parse_args()
+    run(args.paths, args.files, args.seed)
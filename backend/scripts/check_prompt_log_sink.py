@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Prompt 日志流式写出端收尾校验(临时日志目录)
+
+  ①任务在 save() 之前异常退出: 请求上下文回收后 fd 已关, .jsonl.part 定名为 .jsonl, 已写记录可还原
+  ②正常 save(): 写结束记录并改名为最终 .jsonl, 状态为终态
+  ③启动收尾 sweep_stale_parts: 闲置超阈值的遗留 .part 定名为 .jsonl, 近期仍在写的 .part 不动
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/check_prompt_log_sink.py
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.constants import PROMPT_LOG_PART_STALE_SECONDS  # noqa: E402
+from app.logger.config import LogConfig  # noqa: E402
+from app.logger.prompt_logger import PromptLogger, load_prompt_log  # noqa: E402
+
+
+def _names(log_dir: Path, pattern: str) -> list:
+    return sorted(p.name for p in log_dir.glob(pattern))
+
+
+async def _crashing_task(pl: PromptLogger, sinks: list) -> None:
+    pl.start_request("会在 save 之前崩溃的请求", "check-crash")
+    sinks.append(pl.get_current_log()["_sink"]._fh)
+    pl.log_step_yield({"type": "thought", "step": 1, "content": "t1"}, round_number=1)
+    raise RuntimeError("注入: save() 之前异常退出")
+
+
+async def _crash_before_save(pl: PromptLogger) -> None:
+    fhs: list = []
+    try:
+        await asyncio.create_task(_crashing_task(pl, fhs))
+        raise AssertionError("注入异常未抛出")
+    except RuntimeError:
+        pass
+    await asyncio.sleep(0)  # 让出一轮: 唤醒本协程的回调句柄(持有已结束任务)被释放, 同 runner 结束后的状态
+    gc.collect()
+    assert fhs and fhs[0].closed, "任务异常退出后日志 fd 未关闭"
+    assert not _names(pl.log_dir, "*.part"), _names(pl.log_dir, "*.part")
+    finished = _names(pl.log_dir, "*.jsonl")
+    assert len(finished) == 1, finished
+    log = load_prompt_log(pl.log_dir / finished[0])
+    assert log["基本信息"]["会话ID"] == "check-crash" and log["步骤产出"], log
+    print(f"  校验 [save 前异常退出] fd 已关, .part 定名为 {finished[0]}, 已写 {len(log['步骤产出'])} 条步骤可还原 ✓")
+
+
+async def _normal_task(pl: PromptLogger) -> None:
+    pl.start_request("正常结束的请求", "check-normal")
+    pl.log_step_yield({"type": "thought", "step": 1, "content": "t1"}, round_number=1)
+    pl.set_terminal_status("已完成")
+    pl.save()
+
+
+async def _normal_save(pl: PromptLogger) -> None:
+    before = set(_names(pl.log_dir, "*.jsonl"))
+    await asyncio.create_task(_normal_task(pl))
+    gc.collect()
+    added = sorted(set(_names(pl.log_dir, "*.jsonl")) - before)
+    assert len(added) == 1 and not _names(pl.log_dir, "*.part"), (added, _names(pl.log_dir, "*.part"))
+    assert load_prompt_log(pl.log_dir / added[0])["基本信息"]["状态"] == "已完成"
+    print(f"  校验 [正常 save] 改名为 {added[0]}, 状态=已完成 ✓")
+
+
+def _sweep(pl: PromptLogger) -> None:
+    stale = pl.log_dir / "prompt_stale+00000000+20261016_000000.jsonl.part"
+    fresh = pl.log_dir / "prompt_fresh+00000000+20261017_000000.jsonl.part"
+    for path in (stale, fresh):
+        path.write_text('{"记录": "基本信息", "会话ID": "check-sweep"}\n', encoding="utf-8")
+    old = time.time() - PROMPT_LOG_PART_STALE_SECONDS - 60
+    os.utime(stale, (old, old))
+    assert pl.sweep_stale_parts() == 1
+    assert not stale.exists() and stale.with_name(stale.name[:-len(".part")]).exists()
+    assert fresh.exists(), "近期仍在写的 .part 被误收"
+    print(f"  校验 [启动收尾] 闲置超 {PROMPT_LOG_PART_STALE_SECONDS:.0f}s 的 .part 定名为 .jsonl, 近期的不动 ✓")
+
+
+def run() -> None:
+    assert LogConfig.get_prompt_log_format() == "jsonl", "配置 logging.prompt_log_format 须为 jsonl"
+    with tempfile.TemporaryDirectory(prefix="omni-check-prompt-log-") as tmp:
+        pl = PromptLogger()
+        pl.log_dir = Path(tmp)  # 日志落临时目录, 不污染 logs/prompt-logs
+        asyncio.run(_crash_before_save(pl))
+        asyncio.run(_normal_save(pl))
+        _sweep(pl)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt 日志流式写出端收尾校验")
+    parser.parse_args()
+    run()
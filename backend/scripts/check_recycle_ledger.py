@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+回收站容量账本 + 后台清理调度 — 校验 + 微基准
+
+临时回收站下:
+  - 校验: 旧版整份复制备份(目录/单文件)在建账前就存在 → 首次 _cleanup_by_size 盘点建账;
+          之后 backup_store.snapshot 增量记账 / _remove_backup 删除记账 / 超限清理, 每步账面值 == 全量扫描(硬链接计一次)
+  - 校验: 连续 request_cleanup() 在 RECYCLE_CLEANUP_MIN_INTERVAL 窗口内合并为一次后台清理, cleanup_stats 暴露耗时/回收字节
+  - 微基准: 回收站积累 N 个备份过程中, 单次备份成本 旧(snapshot + 同步全量扫描求总量) vs 新(snapshot + request_cleanup)
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/check_recycle_ledger.py
+    python scripts/check_recycle_ledger.py --backups 200 --files 200
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.db import db  # noqa: E402
+import app.db.db_initializer as db_initializer  # noqa: E402
+from app.safety import backup_store, operation_maintenance, recycle_ledger  # noqa: E402
+from app.safety.models import FileSafetyConfig  # noqa: E402
+
+
+def _scan(root: Path) -> int:
+    return operation_maintenance._get_folder_size(root)
+
+
+def _assert_ledger(root: Path, step: str) -> None:
+    ledger, actual = recycle_ledger.total(), _scan(root)
+    assert ledger == actual, f"{step}: 账面 {ledger} != 实际 {actual}"
+    print(f"  校验 [{step}] 账面 == 全量扫描 == {actual / 1024 ** 2:.2f}MB ✓")
+
+
+def _make_project(src: Path, files: int, seed: int) -> None:
+    for i in range(files):
+        d = src / f"pkg{i % 10}"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f"mod{i}.py").write_text(f"# module {i}\n" + "y = 2\n" * (i % 150), encoding="utf-8")
+    (src / "seed.txt").write_text(f"variant {seed}\n" * 100, encoding="utf-8")
+
+
+def _check_ledger(tmp: Path, files: int) -> None:
+    root = FileSafetyConfig.RECYCLE_BIN_PATH
+    src = tmp / "project"
+    _make_project(src, files, 0)
+    shutil.copytree(src, root / "legacy_dir" / src.name)
+    (root / "legacy_file").mkdir(parents=True)
+    shutil.copy2(src / "seed.txt", root / "legacy_file" / "seed.txt")
+    assert recycle_ledger.total() is None
+
+    FileSafetyConfig.RECYCLE_BIN_MAX_SIZE_GB = 1024
+    operation_maintenance._cleanup_by_size()
+    _assert_ledger(root, "旧版备份首次盘点建账")
+
+    snaps = []
+    for r in range(6):
+        if r % 2:
+            _make_project(src, files, r)
+        snaps.append(backup_store.snapshot(src, root / f"s{r:02d}"))
+        snaps.append(backup_store.snapshot(src / "seed.txt", root / f"f{r:02d}"))
+    _assert_ledger(root, "12 个内容寻址备份增量记账")
+
+    for snap in snaps[:5]:
+        operation_maintenance._remove_backup(snap)
+    operation_maintenance._remove_backup(root / "legacy_dir" / src.name)
+    operation_maintenance._remove_backup(root / "legacy_file" / "seed.txt")
+    _assert_ledger(root, "删除 5 个清单备份 + 2 个旧版备份")
+
+    keep = recycle_ledger.total() // 3
+    FileSafetyConfig.RECYCLE_BIN_MAX_SIZE_GB = keep / 1024 ** 3
+    count, freed = operation_maintenance._cleanup_by_size()
+    assert recycle_ledger.total() <= keep, "超限清理后账面仍超上限"
+    _assert_ledger(root, f"超限清理删除 {count} 个时间戳目录、释放 {freed / 1024:.0f}KB")
+    FileSafetyConfig.RECYCLE_BIN_MAX_SIZE_GB = 1024
+
+
+def _check_scheduler() -> None:
+    runs_before = operation_maintenance.cleanup_stats()["runs"]
+    saved = operation_maintenance.RECYCLE_CLEANUP_MIN_INTERVAL
+    operation_maintenance.RECYCLE_CLEANUP_MIN_INTERVAL = 1.0
+    try:
+        operation_maintenance.request_cleanup()
+        time.sleep(0.3)  # 首个请求立即执行
+        t0 = time.perf_counter()
+        for _ in range(200):
+            operation_maintenance.request_cleanup()
+        t_request = (time.perf_counter() - t0) / 200
+        time.sleep(1.5)
+        stats = operation_maintenance.cleanup_stats()
+    finally:
+        operation_maintenance.stop_cleanup_scheduler()
+        operation_maintenance.RECYCLE_CLEANUP_MIN_INTERVAL = saved
+    runs = stats["runs"] - runs_before
+    assert runs == 2, f"201 次请求应合并为 2 轮清理, 实际 {runs} 轮"
+    assert stats["last_duration_ms"] is not None and stats["last_error"] is None
+    print(f"  校验 [调度限频] 201 次 request_cleanup({t_request * 1e6:.1f}µs/次) → 后台 {runs} 轮清理; "
+          f"上次耗时 {stats['last_duration_ms']}ms / 回收 {stats['last_reclaimed_bytes']}B / 账面 {stats['ledger_bytes']}B ✓")
+
+
+def _bench(tmp: Path, backups: int, files: int) -> None:
+    src = tmp / "bench_project"
+    _make_project(src, files, 0)
+    root = FileSafetyConfig.RECYCLE_BIN_PATH
+    marks = {backups // 10, backups // 2, backups}
+    t_old = t_new = 0.0
+    for i in range(1, backups + 1):
+        (src / "seed.txt").write_text(f"variant {i}\n", encoding="utf-8")
+        t0 = time.perf_counter()
+        backup_store.snapshot(src, root / f"b{i:05d}_old")
+        _scan(root)  # 旧: 每次备份末尾同步 _cleanup_by_size → rglob 全回收站求总量
+        t1 = time.perf_counter()
+        backup_store.snapshot(src, root / f"b{i:05d}_new")
+        operation_maintenance.request_cleanup()  # 新: 只唤醒后台调度(超限判断读账面)
+        t2 = time.perf_counter()
+        t_old, t_new = t_old + t1 - t0, t_new + t2 - t1
+        if i in marks:
+            print(f"  回收站 {2 * i:5d} 个备份时: 单次备份 旧 {(t1 - t0) * 1000:7.2f}ms  新 {(t2 - t1) * 1000:7.2f}ms")
+    operation_maintenance.stop_cleanup_scheduler()
+    _assert_ledger(root, f"微基准 {2 * backups} 个备份后")
+    print(f"  累计 {backups} 次备份: 旧 {t_old:.2f}s  新 {t_new:.2f}s  ({t_old / t_new:.1f}x)")
+
+
+def run(backups: int, files: int) -> None:
+    with tempfile.TemporaryDirectory(prefix="omni-check-ledger-") as tmp:
+        tmp = Path(tmp)
+        FileSafetyConfig.RECYCLE_BIN_PATH = tmp / "recycle_bin"
+        db_initializer.init_operations_db(db.get_conn)
+        _check_ledger(tmp, 200)
+        _check_scheduler()
+        _bench(tmp, backups, files)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="回收站容量账本 + 后台清理调度校验 + 微基准")
+    parser.add_argument("--backups", type=int, default=100, help="微基准备份次数")
+    parser.add_argument("--files", type=int, default=100, help="每个备份的源文件数")
+    args = parser.parse_args()
+    run(args.backups, args.files)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Shell 风险规则单遍预筛 + 命中缓存 — 差分校验 + 微基准
+
+语料: 仿 agent 生成的常见命令(git/python/pip/npm/docker/ls/Get-ChildItem/dir/find/grep/curl ...)
+      + 危险命令变体(rm -rf / Remove-Item -Recurse -Force / del /s / format C: / taskkill /f /PID ...)
+      + 随机拼接的模糊语料(规则关键词片段、随机大小写、ſ/K 等忽略大小写等价字符、临时目录、..、保护 PID、超长脚本)
+校验: 每条命令 × shell_type(ps7/ps5/cmd/bash/None/未知) × protected_pids(无/有):
+  - match_shell_rules 命中下标 == 旧逐条 re.search 命中下标
+  - check_shell_command_risk 返回值 == 旧实现(本脚本内复刻)返回值(SafetyResult 逐字段)
+  - 第二遍走缓存再比一次
+微基准: 旧逐条扫描 vs 新(冷缓存 / 热缓存), µs/条
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/check_shell_risk_scanner.py
+    python scripts/check_shell_risk_scanner.py --fuzz 50000 --bench 20000 --seed 7
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.tools.fundamental import execute_shell_command_safety as safety  # noqa: E402
+from app.tools.fundamental.execute_shell_command_safety import (  # noqa: E402
+    SHELL_DANGEROUS_PATTERNS, check_shell_command_risk, match_shell_rules, shell_scan_stats,
+)
+from app.tools.security.safety_result import SafetyResult  # noqa: E402
+
+_SHELL_TYPES = ("ps7", "ps5", "cmd", "bash", None, "zsh")
+_PROTECTED = {4242, 5092}
+
+
+# ---------------------------------------------------------------- 旧实现复刻(2026-10-17 前逐条 re.search)
+
+def _legacy_hits(normalized: str, shell_type: Optional[str]) -> List[int]:
+    hits = []
+    for idx, (pattern_str, _, _, st_tag) in enumerate(SHELL_DANGEROUS_PATTERNS):
+        if st_tag == "ps" and shell_type not in ("ps7", "ps5"):
+            continue
+        if st_tag == "cmd" and shell_type != "cmd":
+            continue
+        if st_tag == "bash" and shell_type != "bash":
+            continue
+        if re.search(pattern_str, normalized, re.IGNORECASE):
+            hits.append(idx)
+    return hits
+
+
+def _legacy_check(command: str, shell_type: Optional[str] = "ps7", protected_pids: Optional[set] = None) -> Optional[SafetyResult]:
+    medium_hits = []
+    normalized = command.replace('\r\n', ' ').replace('\n', ' ')
+    for pattern_str, desc, level, st_tag in SHELL_DANGEROUS_PATTERNS:
+        if st_tag == "ps" and shell_type not in ("ps7", "ps5"):
+            continue
+        if st_tag == "cmd" and shell_type != "cmd":
+            continue
+        if st_tag == "bash" and shell_type != "bash":
+            continue
+        if re.search(pattern_str, normalized, re.IGNORECASE):
+            if level == "HIGH":
+                if safety._is_temp_cleanup(normalized) and ('递归' in desc or 'rm -rf' in desc):
+                    if '..' in normalized:
+                        return SafetyResult(blocked=True, message=f"高风险Shell操作: {desc}(临时目录清理含..路径穿越,不予降危)",
+                                            safety_level="dangerous")
+                    medium_hits.append(desc)
+                    continue
+                return SafetyResult(blocked=True, message=f"高风险Shell操作: {desc}", safety_level="dangerous")
+            elif level == "MEDIUM" and desc not in medium_hits:
+                if protected_pids:
+                    for key, extract in (("强制停止进程", safety._extract_stop_process_pids),
+                                         ("强制杀进程", safety._extract_taskkill_pids),
+                                         ("kill进程", safety._extract_bash_kill_pids)):
+                        if key in desc:
+                            blocked_pids = extract(normalized) & protected_pids
+                            if blocked_pids:
+                                return SafetyResult(blocked=True, message=f"安全拦截: 目标PID {blocked_pids} 为系统保护进程, 禁止杀死",
+                                                    safety_level="dangerous")
+                medium_hits.append(desc)
+    if medium_hits:
+        combined = "、".join(medium_hits)
+        return SafetyResult(blocked=False, requires_confirmation=True, message=f"中风险Shell操作: {combined}",
+                            safety_level="destructive")
+    return None
+
+
+# ---------------------------------------------------------------- 语料
+
+_FILES = ["src/main.py", "README.md", "package.json", "data/input.csv", "build", "node_modules", "dist/*.js",
+          "C:\\Users\\dev\\project\\out", "$env:TEMP\\cache", "/tmp/build-cache", "%TEMP%\\x", "..\\secret",
+          "/var/log/app.log", "~/.cache/pip", "D:\\backup", "$HOME/work/repo", "/", "/etc/hosts"]
+
+_BENIGN = [
+    "git status", "git diff --stat", "git log --oneline -20", "git add -A && git commit -m \"fix: {w}\"",
+    "git checkout -b feature/{w}", "python -m pytest -q tests/", "python {f}", "pip install -r requirements.txt",
+    "pip install {w}=={n}.{n}", "npm install", "npm run build", "npx tsc --noEmit", "node scripts/{w}.js",
+    "ls -la {f}", "cat {f} | grep -n \"{w}\"", "find . -name \"*.py\" -newer {f}", "grep -rn \"{w}\" src/",
+    "wc -l {f}", "head -n {n} {f}", "tail -f /var/log/syslog", "mkdir -p {f}", "cp -r {f} {f}", "mv {f} {f}",
+    "curl -s https://api.example.com/v1/{w}?id={n}", "docker ps -a", "docker build -t {w}:latest .",
+    "Get-ChildItem -Path {f} -Recurse -Filter *.log", "Get-Content {f} -Tail {n}", "Select-String -Path {f} -Pattern \"{w}\"",
+    "Get-Process | Sort-Object CPU -Descending | Select-Object -First {n}", "Test-Path {f}", "Set-Location {f}",
+    "New-Item -ItemType Directory -Path {f}", "Copy-Item {f} {f} -Recurse", "Get-Service | Where-Object Status -eq Running",
+    "dir /b {f}", "type {f}", "echo %PATH%", "where python", "ipconfig /all", "tasklist /FI \"IMAGENAME eq {w}.exe\"",
+    "systeminfo | findstr /B /C:\"OS Name\"", "python -c \"import {w}; print({w}.__version__)\"",
+    "for f in *.txt; do echo $f; done", "tar -czf {w}.tar.gz {f}", "unzip -o {w}.zip -d {f}", "du -sh {f}",
+    "ps aux | grep {w}", "netstat -ano | findstr :{n}", "Invoke-WebRequest -Uri https://example.com/{w} -OutFile {f}",
+    "conda activate {w} && python train.py --epochs {n}", "cargo build --release", "go test ./...", "make -j{n}",
+    "sqlite3 {w}.db \"select count(*) from {w}\"", "echo \"model: {w}\" > config.yaml", "cd {f} && ls",
+]
+
+_RISKY = [
+    "rm -rf {f}", "rm -rf /tmp/{w}", "rm -r {f} -f", "Remove-Item {f} -Recurse -Force", "Remove-Item {f} -Recurse:$false",
+    "Remove-Item -Path {f} -Force", "ri {f} -Recurse", "del /s /q {f}", "del /f {f}", "rd /s /q {f}", "rmdir /s {f}",
+    "erase {f} -rf", "format C: /q", "format D:", "Format-Volume -DriveLetter E", "shutdown /r /t 0", "shutdown /a",
+    "net user {w} /delete", "net stop {w}", "net start {w}", "sc delete {w}", "sc stop {w}", "sc config {w} start= auto",
+    "cipher /w:C:\\", "dd if=/dev/zero of=/dev/sda bs=1M", "mkfs.ext4 /dev/sdb1", "chmod 777 /", "chmod -R 777 {f}",
+    "chown root:root /etc", "kill -9 {n}", "kill {pid}", "taskkill /F /PID {pid}", "taskkill /f /im {w}.exe",
+    "Stop-Process -Id {pid},{n} -Force", "Stop-Process -Name {w} -Force", "Start-Process notepad.exe",
+    "Set-ExecutionPolicy Bypass -Scope Process", "Invoke-Expression (Get-Content {f})", "Invoke-Command -ScriptBlock {{ hostname }}",
+    "Restart-Computer -Force", "Stop-Computer", "diskpart /s script.txt", "bcdedit /set {{current}} safeboot minimal",
+    "vssadmin delete shadows /all /quiet", "reg add HKCU\\Software\\{w} /v x /d 1", "reg delete HKCU\\Software\\{w} /f",
+    "reg import {w}.reg", "wmic process where name='{w}.exe' delete", "takeown /f {f} /r", "icacls {f} /grant Everyone:F",
+    "cacls {f} /grant dev:F",
+]
+
+_FUZZ_TOKENS = sorted({w for p, _, _, _ in SHELL_DANGEROUS_PATTERNS for w in re.findall(r"[A-Za-z][A-Za-z.-]+", p)}
+                      | {"-rf", "-r", "-f", "/s", "/f", "/w:", "/delete", "/grant", "-R", "777", "if=/dev/zero", "of=/dev/sda",
+                         "of=/dev/nvme0n1", "/dev/sdb", ":$false", "/a", "-a", "C:", "C:\\", "x:/", "/PID", "-Id", "-9", "/tmp",
+                         "$env:TEMP", "%TMP%", "..", "root:root", "user:grp", "model", "thread", "address", "redirect",
+                         "scale", "card", "ſc", "Kill", "İnvoke-Command", "reMOVE-ITEM", "RmDir", "DEL", "sc\u00a0delete"})
+_SEPS = [" ", " ", " ", "  ", "\t", "\n", "\r\n", ";", " && ", "|", ""]
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    return template.format(f=rng.choice(_FILES), w=rng.choice(["app", "demo", "cache", "worker", "svc", "node"]),
+                           n=rng.randint(1, 9999), pid=rng.choice([4242, 5092, 777, 31337]))
+
+
+def _realistic(count: int, rng: random.Random) -> List[str]:
+    """多数安全命令 + 少量危险命令, 其中一部分重复(agent 重试/多步任务反复执行同一命令)"""
+    out: List[str] = []
+    while len(out) < count:
+        if out and rng.random() < 0.35:
+            out.append(rng.choice(out[-200:]))
+        elif rng.random() < 0.85:
+            out.append(_fill(rng.choice(_BENIGN), rng))
+        else:
+            out.append(_fill(rng.choice(_RISKY), rng))
+    return out
+
+
+def _fuzz(count: int, rng: random.Random) -> List[str]:
+    out = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 8)):
+            tok = rng.choice(_FUZZ_TOKENS) if rng.random() < 0.7 else rng.choice(_FILES)
+            if rng.random() < 0.3:
+                tok = "".join(c.upper() if rng.random() < 0.5 else c.lower() for c in tok)
+            parts.append(tok)
+            parts.append(rng.choice(_SEPS))
+        out.append("".join(parts))
+    out.append("echo start\n" + "\n".join(_fill(rng.choice(_BENIGN), rng) for _ in range(400)) + "\nrm -rf /opt/app")
+    out.append(" ".join(rng.choice(_FUZZ_TOKENS) for _ in range(3000)))
+    return out
+
+
+# ---------------------------------------------------------------- 差分 / 微基准
+
+def _diff(label: str, commands: List[str]) -> int:
+    n = 0
+    for command in commands:
+        normalized = command.replace('\r\n', ' ').replace('\n', ' ')
+        for shell_type in _SHELL_TYPES:
+            got, want = list(match_shell_rules(normalized, shell_type)), _legacy_hits(normalized, shell_type)
+            assert got == want, f"{label}: match_shell_rules({command[:120]!r}, {shell_type}) 新 {got} != 旧 {want}"
+            for pids in (None, _PROTECTED):
+                got, want = check_shell_command_risk(command, shell_type, pids), _legacy_check(command, shell_type, pids)
+                assert got == want, f"{label}: check_shell_command_risk({command[:120]!r}, {shell_type}, {pids}) 新 {got} != 旧 {want}"
+                n += 1
+    return n
+
+
+def _bench(commands: List[str], shell_type: str) -> None:
+    t0 = time.perf_counter()
+    for c in commands:
+        _legacy_check(c, shell_type)
+    t_old = time.perf_counter() - t0
+    safety._scan_cache.clear()
+    before = shell_scan_stats()
+    t0 = time.perf_counter()
+    for c in commands:
+        check_shell_command_risk(c, shell_type)
+    t_cold = time.perf_counter() - t0
+    after = shell_scan_stats()
+    t0 = time.perf_counter()
+    for c in commands:
+        check_shell_command_risk(c, shell_type)
+    t_warm = time.perf_counter() - t0
+    n = len(commands)
+    hit_rate = (after["hits"] - before["hits"]) / n * 100
+    print(f"    {shell_type:<5} 旧 {t_old / n * 1e6:6.1f}µs/条  新(首遍, 语料内重复命中缓存 {hit_rate:4.1f}%) {t_cold / n * 1e6:6.1f}µs/条 "
+          f"({t_old / t_cold:.1f}x)  新(整遍重跑, 全命中) {t_warm / n * 1e6:6.1f}µs/条 ({t_old / t_warm:.1f}x)")
+
+
+def run(fuzz: int, bench: int, seed: int) -> None:
+    rng = random.Random(seed)
+    logging.disable(logging.WARNING)  # 中风险命中每条都会 logger.warning, 校验期间静音
+    try:
+        realistic = _realistic(3000, rng)
+        fuzzed = _fuzz(fuzz, rng)
+        n = _diff("仿 agent 语料", realistic)
+        print(f"  校验 [仿 agent 语料] {len(realistic)} 条 × {len(_SHELL_TYPES)} shell_type × 2 组保护 PID = {n} 次判定, 新旧一致 ✓")
+        n = _diff("模糊语料", fuzzed)
+        print(f"  校验 [模糊语料] {len(fuzzed)} 条(含 400 行脚本/3000 词长串) → {n} 次判定, 新旧一致 ✓")
+        n = _diff("缓存重放", realistic + fuzzed[:2000])
+        print(f"  校验 [缓存重放] 第二遍走缓存 {n} 次判定, 新旧一致 ✓  缓存 {shell_scan_stats()}")
+        assert all(_legacy_hits(c, "bash") == [] for c in ("ls -la", "git status")), "基础语料应无命中"
+
+        corpus = _realistic(bench, random.Random(seed + 1))
+        print(f"  微基准 仿 agent 语料 {bench} 条(约 35% 为近期重复命令):")
+        for shell_type in ("ps7", "cmd", "bash"):
+            _bench(corpus, shell_type)
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shell 风险规则单遍预筛 + 命中缓存差分校验 + 微基准")
+    parser.add_argument("--fuzz", type=int, default=20_000, help="模糊语料条数")
+    parser.add_argument("--bench", type=int, default=10_000, help="微基准语料条数")
+    parser.add_argument("--seed", type=int, default=20261017)
+    args = parser.parse_args()
+    run(args.fuzz, args.bench, args.seed)
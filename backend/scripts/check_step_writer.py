@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+StepWriter 写失败与 flush 校验(临时库, 注入写失败)
+
+  ①坏行: 某一步的 INSERT 总是失败 → 该批回滚后逐行重写, 只丢坏行; 其后的步骤与终态 FinalStep 照常落库,
+    error 已记录(raise_if_failed 抛出)
+  ②瞬时失败: 某批事务失败一次 → 逐行重写全部成功, 步骤完整, 无 error
+  ③未落库的合并行: 首个 chunk 行 INSERT 失败后继续合并 → 续写走 INSERT(不是 UPDATE 空行), 合并正文完整落库
+  ④写任务在内层 try 之外异常退出(_take_batch 抛错) → flush() 立即返回, 不悬挂
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/check_step_writer.py
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.db.database import DatabaseManager  # noqa: E402
+from app.services.chat import step_writer as step_writer_mod  # noqa: E402
+from app.services.chat.step_writer import StepWriter  # noqa: E402
+from app.services.chat.storage import load_execution_steps  # noqa: E402
+from app.utils.time_utils import get_local_iso_timestamp  # noqa: E402
+
+_real_insert = step_writer_mod.insert_execution_step_rows
+
+
+def _failing_insert(should_fail):
+    """按 should_fail(rows) 注入 INSERT 失败(抛错后 get_conn 回滚整个事务)"""
+    def _insert(conn, message_id, session_id, rows):
+        if rows and should_fail(rows):
+            raise RuntimeError(f"注入写失败: step_index={[r[0] for r in rows]}")
+        return _real_insert(conn, message_id, session_id, rows)
+    return _insert
+
+
+def _session(manager: DatabaseManager, session_id: str) -> str:
+    now = get_local_iso_timestamp()
+    with manager.get_conn("chat") as conn:
+        conn.execute(
+            "INSERT INTO chat_sessions (id, title, created_at, updated_at, version, is_valid) VALUES (?, ?, ?, ?, 1, 1)",
+            (session_id, session_id, now, now))
+    return session_id
+
+
+def _steps(manager: DatabaseManager, message_id: int) -> list:
+    with manager.get_read_conn("chat") as conn:
+        return load_execution_steps(conn, message_id) or []
+
+
+async def _bad_row(manager: DatabaseManager) -> None:
+    step_writer_mod.insert_execution_step_rows = _failing_insert(lambda rows: any('"BAD"' in r[1] for r in rows))
+    writer = StepWriter(_session(manager, "check-bad-row"), flush_interval=0.01).start()
+    for i in range(1, 6):
+        writer.submit({"type": "thought", "step": i, "content": "BAD" if i == 3 else f"t{i}"})
+    await writer.flush()
+    writer.submit({"type": "thought", "step": 6, "content": "after"})
+    writer.submit({"type": "final", "step": 7, "response": "done", "outcome": "failed"})
+    message_id = await writer.close()
+    steps = _steps(manager, message_id)
+    assert [s["step"] for s in steps] == [1, 2, 4, 5, 6, 7], steps
+    assert steps[-1]["type"] == "final" and writer.error is not None
+    try:
+        writer.raise_if_failed()
+        raise AssertionError("坏行丢弃后 raise_if_failed 未抛出")
+    except RuntimeError:
+        pass
+    print(f"  校验 [坏行] 逐行重写只丢坏行, 其后步骤与终态 FinalStep 照常落库 {[s['step'] for s in steps]}, error 已记录 ✓")
+
+
+async def _transient(manager: DatabaseManager) -> None:
+    failures = [1]
+
+    def once(rows):
+        if failures[0] and len(rows) > 1:
+            failures[0] -= 1
+            return True
+        return False
+
+    step_writer_mod.insert_execution_step_rows = _failing_insert(once)
+    writer = StepWriter(_session(manager, "check-transient"), flush_interval=0.01).start()
+    for i in range(1, 5):
+        writer.submit({"type": "thought", "step": i, "content": f"t{i}"})
+    writer.submit({"type": "final", "step": 5, "response": "done", "outcome": "completed"})
+    message_id = await writer.close()
+    steps = _steps(manager, message_id)
+    assert [s["step"] for s in steps] == [1, 2, 3, 4, 5] and writer.error is None, (steps, writer.error)
+    print(f"  校验 [瞬时失败] 批事务失败一次后逐行重写全部成功, 步骤完整, 无 error(事务 {writer.commit_count} 次) ✓")
+
+
+async def _merged_chunk(manager: DatabaseManager) -> None:
+    failures = [1]
+
+    def first_chunk(rows):
+        if failures[0] and any('"chunk"' in r[1] for r in rows):
+            failures[0] -= 1
+            return True
+        return False
+
+    step_writer_mod.insert_execution_step_rows = _failing_insert(first_chunk)
+    writer = StepWriter(_session(manager, "check-merged-chunk"), flush_interval=0.01).start()
+    writer.submit({"type": "thought", "step": 1, "content": "t1"})
+    writer.submit({"type": "chunk", "step": 2, "content": "甲"})
+    await writer.flush()
+    writer.submit({"type": "chunk", "step": 2, "content": "乙"})
+    writer.submit({"type": "final", "step": 3, "response": "done", "outcome": "completed"})
+    message_id = await writer.close()
+    steps = _steps(manager, message_id)
+    assert [s["type"] for s in steps] == ["thought", "chunk", "final"], steps
+    assert steps[1]["content"] == "甲乙", steps[1]
+    print("  校验 [未落库的合并行] 首个 chunk 行写失败后继续合并, 续写改走 INSERT, 合并正文完整落库 ✓")
+
+
+async def _flush_after_crash() -> None:
+    step_writer_mod.insert_execution_step_rows = _real_insert
+    writer = StepWriter("check-flush-crash", flush_interval=0.01)
+
+    def boom():
+        raise RuntimeError("注入 _take_batch 异常")
+
+    writer._take_batch = boom
+    writer.start()
+    writer.submit({"type": "thought", "step": 1, "content": "t1"})
+    await asyncio.wait_for(writer.flush(), timeout=5)
+    assert writer._task.done()
+    await writer.close()
+    print("  校验 [写任务异常退出] _take_batch 抛错后 flush() 立即返回, 不悬挂 ✓")
+
+
+async def _main(manager: DatabaseManager) -> None:
+    try:
+        await _bad_row(manager)
+        await _transient(manager)
+        await _merged_chunk(manager)
+        await _flush_after_crash()
+    finally:
+        step_writer_mod.insert_execution_step_rows = _real_insert
+
+
+def run() -> None:
+    with tempfile.TemporaryDirectory(prefix="omni-check-step-writer-") as tmp:
+        manager = DatabaseManager(db_dir=Path(tmp))
+        manager.init()
+        step_writer_mod.db = manager  # 写入器走临时库
+        try:
+            asyncio.run(_main(manager))
+        finally:
+            manager.close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="StepWriter 写失败与 flush 校验")
+    parser.parse_args()
+    run()
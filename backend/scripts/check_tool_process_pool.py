@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+工具进程池工作进程预导入 + 冷启动校验
+
+以 spawn 起真实工作进程(_Worker, 与 ToolProcessPool 同一入口 _worker_main), 发请求回查工作进程内 sys.modules:
+  ①预导入的工具模块已在工作进程内导入, 未预导入的对照模块未导入(证明是预导入生效, 不是被连带导入)
+  ②预导入列表含不存在的模块时只记警告, 其余模块照常预导入, 工作进程照常处理请求
+  ③空闲队列为空时 _acquire 冷启动在池线程起进程(_new_worker 不在事件循环线程执行)
+  ④冷启动等待中调用被取消: 槽位立即归还, 起好的进程进入空闲队列(不泄漏)
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/check_tool_process_pool.py
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.tools.tool_process_pool import ToolProcessPool, _Worker  # noqa: E402
+
+_PRELOAD = "app.tools.file.grep_engine"
+_CONTROL = "app.tools.file.tree"
+
+
+def _loaded(names: List[str]) -> Dict[str, bool]:
+    """工作进程内执行: 各模块是否已导入(spawn 子进程内 __main__ 即本脚本)"""
+    return {name: name in sys.modules for name in names}
+
+
+def _probe(preload: tuple) -> Dict[str, bool]:
+    worker = _Worker(multiprocessing.get_context("spawn"), preload)
+    try:
+        ok, result = worker.call(("__main__", "_loaded", {"names": [_PRELOAD, _CONTROL]}, None))
+    finally:
+        worker.retire()
+    assert ok, f"工作进程执行失败: {result!r}"
+    return result
+
+
+async def _cold_acquire(pool: ToolProcessPool) -> None:
+    loop = asyncio.get_running_loop()
+    real_new_worker, threads = pool._new_worker, []
+
+    def recording() -> _Worker:
+        threads.append(threading.current_thread())
+        return real_new_worker()
+
+    pool._new_worker = recording
+    t0 = time.perf_counter()
+    try:
+        worker = await pool._acquire("check", loop.time() + 60)
+    finally:
+        pool._new_worker = real_new_worker
+    spawn = time.perf_counter() - t0
+    assert worker.process.is_alive() and pool._busy == 1
+    pool._give_back(worker)
+    assert threads and threads[0] is not threading.main_thread(), threads
+    print(f"  校验 [冷启动不阻塞] 起进程在池线程 {threads[0].name} 执行({spawn * 1000:.0f}ms), 不占事件循环线程 ✓")
+
+
+async def _cancel_cold(pool: ToolProcessPool) -> None:
+    loop = asyncio.get_running_loop()
+    for worker in pool._idle:
+        worker.retire()
+    pool._idle.clear()
+    real_new_worker, entered, release = pool._new_worker, threading.Event(), threading.Event()
+
+    def gated() -> _Worker:
+        entered.set()
+        release.wait(30)  # 卡住起进程, 让取消落在冷启动等待中
+        return real_new_worker()
+
+    pool._new_worker = gated
+    try:
+        task = asyncio.create_task(pool._acquire("check", loop.time() + 60))
+        assert await loop.run_in_executor(None, entered.wait, 30), "冷启动未提交到池线程"
+        task.cancel()
+        try:
+            await task
+            raise AssertionError("冷启动等待中取消未抛 CancelledError")
+        except asyncio.CancelledError:
+            pass
+        assert pool._busy == 0, pool._busy
+        release.set()
+        for _ in range(600):
+            if pool._idle:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        release.set()
+        pool._new_worker = real_new_worker
+    assert len(pool._idle) == 1 and pool._idle[0].process.is_alive(), pool._idle
+    print("  校验 [冷启动中取消] 槽位立即归还, 起好的进程进入空闲队列 ✓")
+
+
+async def _cold_path() -> None:
+    pool = ToolProcessPool()
+    pool._ensure_started(1)  # 不预热: 空闲队列为空
+    try:
+        await _cold_acquire(pool)
+        await _cancel_cold(pool)
+    finally:
+        pool.shutdown()
+
+
+def run() -> None:
+    assert _PRELOAD not in sys.modules and _CONTROL not in sys.modules, "主进程已导入被测模块, 校验无意义"
+
+    result = _probe((_PRELOAD,))
+    assert result == {_PRELOAD: True, _CONTROL: False}, result
+    print(f"  校验 [预导入] spawn 工作进程内 {_PRELOAD} 已导入, 对照 {_CONTROL} 未导入 ✓")
+
+    result = _probe(("app.tools.no_such_module", _PRELOAD))
+    assert result == {_PRELOAD: True, _CONTROL: False}, result
+    print("  校验 [预导入失败] 不存在的模块只记警告, 其余模块照常预导入, 工作进程照常处理请求 ✓")
+
+    asyncio.run(_cold_path())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="工具进程池工作进程预导入 + 冷启动校验")
+    parser.parse_args()
+    run()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+searchtool BM25 倒排索引 — 差分校验 + 微基准
+
+合成注册表: N 个工具(默认 5000), 描述由中英混合词表随机拼成(工具名前缀/动作词/对象词/中文短语/噪声词), 分类随机
+校验:
+  - 每条查询: 倒排索引分数 == 旧实现(每次全量 _build_bm25 + _bm25_scores)的非零分数, 逐位相等
+  - searchtool 返回(data.matches / llm_data 除 duration_ms) == 旧 searchtool 复刻
+  - 随机增量变更后再比: 注销、同名重注册(改描述/改分类)、注销后重注册(排到末尾)、新增
+微基准: 旧(每次查询全量重建) vs 新(倒排索引) 单次 searchtool 耗时; 以及注册 N 个工具时维护索引的额外开销
+
+使用方法(需配置文件, 同后端启动):
+    python scripts/check_tool_search_index.py
+    python scripts/check_tool_search_index.py --tools 5000 --queries 300 --rounds 5 --seed 7
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import logging
+import math
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.tools import registry as registry_mod  # noqa: E402
+from app.tools.fundamental import tool_search  # noqa: E402
+from app.tools.tool_constants import TOOL_SEARCH_INER_RESULTS_TOP  # noqa: E402
+from app.tools.tool_types import ToolCategory  # noqa: E402
+
+_CATEGORIES = list(ToolCategory)
+_VERBS = ["read", "write", "list", "search", "delete", "copy", "move", "parse", "query", "export", "import", "convert",
+          "fetch", "download", "upload", "run", "stop", "start", "schedule", "monitor", "analyze", "plot", "merge", "split"]
+_OBJECTS = ["file", "directory", "csv", "excel", "pdf", "docx", "json", "yaml", "sql", "table", "chart", "image", "url",
+            "page", "process", "service", "registry", "timer", "window", "clipboard", "screenshot", "log", "archive", "zip"]
+_ZH = ["读取文件", "写入文本", "搜索目录", "删除文件", "数据分析", "生成图表", "执行命令", "网页抓取", "下载文件", "定时任务",
+       "注册表项", "窗口截图", "进程管理", "表格导出", "文档转换", "压缩解压", "剪贴板", "系统信息", "日志", "查", "改"]
+_NOISE = ["the", "a", "of", "to", "with", "and", "for", "in", "from", "by", "path", "content", "encoding", "utf-8",
+          "支持", "返回", "结果", "参数", "v2", "x64", "2026", "_", "-", "/", "（", "）", "：", "!!", "??"]
+
+
+# ---------------------------------------------------------------- 旧实现复刻(2026-10-17 前每次查询全量重建)
+
+def _legacy_tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    buf: List[str] = []
+    chinese_buf: List[str] = []
+    for ch in text.lower():
+        if '\u4e00' <= ch <= '\u9fff':
+            if buf:
+                tokens.append("".join(buf))
+                buf.clear()
+            chinese_buf.append(ch)
+        else:
+            if chinese_buf:
+                if len(chinese_buf) >= 2:
+                    for i in range(len(chinese_buf) - 1):
+                        tokens.append(chinese_buf[i] + chinese_buf[i + 1])
+                else:
+                    tokens.append(chinese_buf[0])
+                chinese_buf.clear()
+            if ch == '_':
+                if buf:
+                    tokens.append("".join(buf))
+                    buf.clear()
+            elif ch.isalnum():
+                buf.append(ch)
+            else:
+                if buf:
+                    tokens.append("".join(buf))
+                    buf.clear()
+    if chinese_buf:
+        if len(chinese_buf) >= 2:
+            for i in range(len(chinese_buf) - 1):
+                tokens.append(chinese_buf[i] + chinese_buf[i + 1])
+        else:
+            tokens.append(chinese_buf[0])
+    if buf:
+        tokens.append("".join(buf))
+    return tokens
+
+
+def _legacy_build_bm25(registry) -> Tuple[List[List[str]], List[str], float, Counter]:
+    docs: List[List[str]] = []
+    tool_names: List[str] = []
+    for name, metadata in registry._tools.items():
+        text = " ".join([name] * 3) + " " + metadata.description
+        docs.append(_legacy_tokenize(text))
+        tool_names.append(name)
+    N = len(docs)
+    avgdl = sum(len(d) for d in docs) / max(N, 1)
+    df: Counter = Counter()
+    for doc in docs:
+        for term in set(doc):
+            df[term] += 1
+    return docs, tool_names, avgdl, df
+
+
+def _legacy_bm25_scores(query_tokens, docs, avgdl, df, k1: float = 1.5, b: float = 0.75) -> List[float]:
+    N = len(docs)
+    if N == 0:
+        return []
+    doc_tfs = [Counter(d) for d in docs]
+    scores = [0.0] * N
+    unique_terms = []
+    seen_terms = set()
+    for term in query_tokens:
+        if term not in seen_terms:
+            seen_terms.add(term)
+            unique_terms.append(term)
+    for term in unique_terms:
+        n = df.get(term, 0)
+        if n == 0:
+            continue
+        idf = math.log((N - n + 0.5) / (n + 0.5) + 1.0)
+        for i in range(N):
+            tf = doc_tfs[i].get(term, 0)
+            if tf == 0:
+                continue
+            doc_len = len(docs[i])
+            scores[i] += idf * (tf * (k1 + 1)) / (tf + k1 * (1 - b + b * doc_len / avgdl))
+    return scores
+
+
+def _legacy_searchtool(registry, query: str) -> Dict[str, Any]:
+    """旧 searchtool 主流程(返回构建/分类保底沿用未改动的模块函数), duration_ms 固定 0"""
+    all_tools = registry._tools
+    if not all_tools:
+        return {"data": {"matches": []}, "llm_data": tool_search._build_tool_search_llm_data("success", 0, query, 0, 0, [])}
+    query_tokens = _legacy_tokenize(query.strip())
+    if not query_tokens:
+        return {"data": {"matches": []}, "llm_data": tool_search._build_tool_search_llm_data("warning", 0, query, 0, len(all_tools), [])}
+    docs, tool_names, avgdl, df = _legacy_build_bm25(registry)
+    scores = _legacy_bm25_scores(query_tokens, docs, avgdl, df)
+    scored = []
+    for i, name in enumerate(tool_names):
+        metadata = all_tools.get(name)
+        scored.append({"name": metadata.name, "category": metadata.category.value, "_score": round(scores[i], 4)})
+    scored.sort(key=lambda x: x["_score"], reverse=True)
+    if scored and scored[0]["_score"] > 0:
+        threshold = scored[0]["_score"] * 0.1
+        meaningful = [r for r in scored if r["_score"] >= threshold]
+    else:
+        meaningful = []
+    top_results = tool_search._apply_category_floor(meaningful, TOOL_SEARCH_INER_RESULTS_TOP)
+    if not meaningful:
+        return {"data": {"matches": []}, "llm_data": tool_search._build_tool_search_llm_data("warning", 0, query, 0, len(all_tools), [])}
+    matches = [{"name": r["name"], "category": r["category"]} for r in top_results]
+    return {"data": {"matches": matches},
+            "llm_data": tool_search._build_tool_search_llm_data("success", 0, query, len(meaningful), len(all_tools), matches)}
+
+
+# ---------------------------------------------------------------- 合成注册表 / 查询
+
+def _description(rng: random.Random) -> str:
+    words = []
+    for _ in range(rng.randint(4, 40)):
+        pool = rng.choice((_VERBS, _OBJECTS, _ZH, _NOISE, _NOISE))
+        words.append(rng.choice(pool))
+    return rng.choice(("", " ", "\n")).join(words) if rng.random() < 0.2 else " ".join(words)
+
+
+def _tool_name(rng: random.Random, n: int) -> str:
+    return rng.choice(("", "win_", "py")) + rng.choice(_VERBS) + rng.choice(("", "_", "")) + rng.choice(_OBJECTS) + f"{n}"
+
+
+def _register(reg, name: str, rng: random.Random) -> None:
+    reg.register(name=name, description=_description(rng), category=rng.choice(_CATEGORIES), implementation=len)
+
+
+def _queries(count: int, rng: random.Random, names: List[str]) -> List[str]:
+    out = ["?", "？？？", "___", "   read   ", "不存在的词汇", "zzzz qqqq", "读", "查"]
+    while len(out) < count:
+        kind = rng.random()
+        if kind < 0.15 and names:
+            out.append(rng.choice(names))
+        elif kind < 0.3:
+            out.append(rng.choice(_ZH) + rng.choice(_ZH))
+        else:
+            words = [rng.choice(rng.choice((_VERBS, _OBJECTS, _ZH, _NOISE))) for _ in range(rng.randint(1, 6))]
+            out.append(" ".join(w.upper() if rng.random() < 0.2 else w for w in words))
+    return out
+
+
+def _strip_duration(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {"data": result["data"], "llm_data": {k: v for k, v in result["llm_data"].items() if k != "duration_ms"}}
+
+
+def _diff(label: str, reg, queries: List[str]) -> int:
+    docs, names, avgdl, df = _legacy_build_bm25(reg)
+    for q in queries:
+        tokens = _legacy_tokenize(q.strip())
+        legacy = _legacy_bm25_scores(tokens, docs, avgdl, df)
+        want = {names[i]: s for i, s in enumerate(legacy) if s != 0.0}
+        got = reg.search_scores(tokens)
+        assert list(got.items()) == list(want.items()), f"{label}: 查询 {q!r} 分数不一致"
+        new, old = _strip_duration(tool_search.searchtool(q)), _strip_duration(_legacy_searchtool(reg, q))
+        assert new == old, f"{label}: 查询 {q!r} 结果不一致\n新 {new}\n旧 {old}"
+    return len(queries)
+
+
+def _mutate(reg, rng: random.Random, counter: List[int]) -> str:
+    names = list(reg._tools)
+    k = max(1, len(names) // 20)
+    for name in rng.sample(names, k):  # 注销
+        reg.unregister(name)
+    for name in rng.sample(list(reg._tools), k):  # 同名重注册: 改描述/改分类, 保持注册位置
+        _register(reg, name, rng)
+    for name in rng.sample(names, k // 2):  # 注销后重注册 / 已注销的再注册: 排到末尾
+        reg.unregister(name)
+        _register(reg, name, rng)
+    for _ in range(k):  # 新增
+        counter[0] += 1
+        _register(reg, _tool_name(rng, counter[0]), rng)
+    return f"注销 {k} / 重注册 {k} / 注销后重注册 {k // 2} / 新增 {k}"
+
+
+def run(tools: int, queries: int, rounds: int, seed: int) -> None:
+    rng = random.Random(seed)
+    logging.disable(logging.INFO)  # 注册/注销每个工具都打日志
+    try:
+        reg = registry_mod.ToolRegistry()
+        tool_search.tool_registry = reg  # searchtool 改查合成注册表
+        counter = [0]
+        t0 = time.perf_counter()
+        for _ in range(tools):
+            counter[0] += 1
+            _register(reg, _tool_name(rng, counter[0]), rng)
+        t_reg = time.perf_counter() - t0
+        qs = _queries(queries, rng, list(reg._tools))
+        n = _diff("初始", reg, qs)
+        print(f"  校验 [初始] {len(reg)} 个工具 × {n} 条查询: 分数逐位一致, searchtool 返回一致 ✓")
+        for r in range(rounds):
+            desc = _mutate(reg, rng, counter)
+            n = _diff(f"增量变更第 {r + 1} 轮", reg, _queries(queries, rng, list(reg._tools)))
+            print(f"  校验 [增量变更第 {r + 1} 轮: {desc}] {len(reg)} 个工具 × {n} 条查询 一致 ✓")
+        for name in list(reg._tools):
+            reg.unregister(name)
+        assert reg.search_scores(["read"]) == {} and _diff("全部注销", reg, qs[:20])
+        print("  校验 [全部注销] 空注册表 一致 ✓")
+
+        # ---------------- 微基准
+        bench = registry_mod.ToolRegistry()
+        tool_search.tool_registry = bench
+        brng = random.Random(seed + 1)
+        for i in range(tools):
+            _register(bench, _tool_name(brng, i), brng)
+        bq = _queries(200, brng, list(bench._tools))
+        t0 = time.perf_counter()
+        for q in bq:
+            _legacy_searchtool(bench, q)
+        t_old = (time.perf_counter() - t0) / len(bq)
+        t0 = time.perf_counter()
+        for q in bq:
+            tool_search.searchtool(q)
+        t_new = (time.perf_counter() - t0) / len(bq)
+        plain = registry_mod.ToolRegistry()
+        plain._search_index.upsert = lambda name, description: None  # 对照: 注册时不维护索引
+        prng = random.Random(seed + 1)
+        t0 = time.perf_counter()
+        for i in range(tools):
+            _register(plain, _tool_name(prng, i), prng)
+        t_plain = time.perf_counter() - t0
+        print(f"  微基准 {tools} 个工具 × {len(bq)} 条查询: 旧 {t_old * 1e3:7.2f}ms/次  新 {t_new * 1e3:6.3f}ms/次 ({t_old / t_new:.0f}x)")
+        print(f"         注册 {tools} 个工具: 含索引维护 {t_reg * 1e3:.0f}ms, 不维护索引 {t_plain * 1e3:.0f}ms "
+              f"(增量 {(t_reg - t_plain) / tools * 1e6:.1f}µs/个)")
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="searchtool BM25 倒排索引差分校验 + 微基准")
+    parser.add_argument("--tools", type=int, default=5000, help="合成注册表工具数")
+    parser.add_argument("--queries", type=int, default=100, help="每轮校验查询数")
+    parser.add_argument("--rounds", type=int, default=3, help="增量变更轮数")
+    parser.add_argument("--seed", type=int, default=20261017)
+    args = parser.parse_args()
+    run(args.tools, args.queries, args.rounds, args.seed)
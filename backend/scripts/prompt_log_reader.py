@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Prompt 日志读取工具: 还原流式 JSONL prompt 日志(logs/prompt-logs/*.jsonl[.part])
+
+jsonl 日志中 tools 数组与消息按内容哈希只写一次, 每轮只记"基于上一轮 + 追加"引用,
+本工具经 app.logger.prompt_logger.load_prompt_log 重放后输出每轮完整 prompt。
+
+使用方法:
+    python scripts/prompt_log_reader.py logs/prompt-logs/prompt_xxx.jsonl               # 每轮概要
+    python scripts/prompt_log_reader.py logs/prompt-logs/prompt_xxx.jsonl --round 3     # 第3轮完整 messages+tools(JSON)
+    python scripts/prompt_log_reader.py logs/prompt-logs/prompt_xxx.jsonl --to-json out.json  # 转为完整展开的缩进 JSON
+
+Author: 小欧 - 2026-10-17
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.logger.prompt_logger import load_prompt_log  # noqa: E402
+
+
+def _print_overview(log: dict) -> None:
+    info = log.get("基本信息", {})
+    print(f"会话={info.get('会话ID')}  用户消息ID={info.get('用户消息ID')}  "
+          f"AI消息ID={info.get('AI消息ID')}  状态={info.get('状态')}")
+    for call in log.get("LLM调用记录", []):
+        tools = call.get("工具") or []
+        print(f"  轮次{call.get('轮次'):>4}  消息={len(call.get('消息') or []):>4}  工具={len(tools):>3}  "
+              f"返回类型={call.get('返回类型', '-')}  结束原因={call.get('结束原因', '-')}")
+    print(f"步骤产出 {len(log.get('步骤产出', []))} 条, Prompt组装过程 {len(log.get('Prompt组装过程', []))} 条")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="还原流式 prompt 日志")
+    parser.add_argument("path", help="prompt 日志文件(.jsonl/.jsonl.part/.json)")
+    parser.add_argument("--round", type=int, help="输出指定轮次的完整 prompt(messages+tools)")
+    parser.add_argument("--to-json", help="把完整还原结果写为缩进 JSON 文件")
+    args = parser.parse_args()
+
+    log = load_prompt_log(args.path)
+    if args.to_json:
+        with open(args.to_json, "w", encoding="utf-8") as f:
+            json.dump(log, f, ensure_ascii=False, indent=2, default=str)
+        print(f"已写出: {args.to_json}")
+        return 0
+    if args.round is not None:
+        for call in log.get("LLM调用记录", []):
+            if call.get("轮次") == args.round and "消息" in call:
+                print(json.dumps({"messages": call["消息"], "tools": call.get("工具")},
+                                 ensure_ascii=False, indent=2, default=str))
+                return 0
+        print(f"未找到轮次 {args.round} 的调用记录", file=sys.stderr)
+        return 1
+    _print_overview(log)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())